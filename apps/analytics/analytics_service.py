@@ -5,7 +5,7 @@ from datetime import datetime, date, timedelta
 from decimal import Decimal
 from sqlalchemy.orm import Session
 from sqlalchemy import func, and_, or_, desc
-from core.database.connection import get_sync_session
+from core.database.session import run_in_async_session
 from domain.entities.shift import Shift
 from domain.entities.object import Object
 from domain.entities.user import User
@@ -19,8 +19,10 @@ class AnalyticsService:
         """Инициализация сервиса."""
         logger.info("AnalyticsService initialized")
     
+    @run_in_async_session
     def get_object_report(
         self,
+        db: Session,
         object_id: Optional[int],
         start_date: date,
         end_date: date,
@@ -39,100 +41,101 @@ class AnalyticsService:
             Словарь с данными отчета
         """
         try:
-            with get_sync_session() as db:
-                # Получаем объекты владельца
-                if object_id is None:
-                    # Все объекты владельца
-                    objects = db.query(Object).filter(Object.owner_id == owner_id).all()
-                    if not objects:
-                        return {"error": "У вас нет объектов для анализа"}
-                    object_ids = [obj.id for obj in objects]
-                    obj = None  # Нет конкретного объекта
-                else:
-                    # Конкретный объект
-                    obj = db.query(Object).filter(
-                        and_(Object.id == object_id, Object.owner_id == owner_id)
-                    ).first()
+            # Получаем объекты владельца
+            if object_id is None:
+                # Все объекты владельца
+                objects = db.query(Object).filter(Object.owner_id == owner_id).all()
+                if not objects:
+                    return {"error": "У вас нет объектов для анализа"}
+                object_ids = [obj.id for obj in objects]
+                obj = None  # Нет конкретного объекта
+            else:
+                # Конкретный объект
+                obj = db.query(Object).filter(
+                    and_(Object.id == object_id, Object.owner_id == owner_id)
+                ).first()
                     
-                    if not obj:
-                        return {"error": "Объект не найден или нет прав доступа"}
-                    object_ids = [object_id]
-                
-                # Получаем смены за период
-                shifts = db.query(Shift).join(User).filter(
-                    and_(
-                        Shift.object_id.in_(object_ids),
-                        func.date(Shift.start_time) >= start_date,
-                        func.date(Shift.start_time) <= end_date,
-                        Shift.status.in_(["completed", "active"])
-                    )
-                ).all()
-                
-                # Базовая статистика
-                total_shifts = len(shifts)
-                completed_shifts = len([s for s in shifts if s.status == "completed"])
-                active_shifts = len([s for s in shifts if s.status == "active"])
-                
-                # Расчет времени и оплаты
-                total_hours = sum([s.total_hours or 0 for s in shifts])
-                total_payment = sum([s.total_payment or 0 for s in shifts])
-                
-                # Статистика по сотрудникам
-                employee_stats = self._calculate_employee_stats(shifts, db)
-                
-                # Статистика по дням
-                daily_stats = self._calculate_daily_stats(shifts, start_date, end_date)
-                
-                # Средние показатели
-                avg_shift_duration = total_hours / completed_shifts if completed_shifts > 0 else 0
-                avg_daily_hours = total_hours / ((end_date - start_date).days + 1)
-                
-                # Формируем данные об объекте(ах)
-                if obj:
-                    # Один объект
-                    object_info = {
-                        "id": obj.id,
-                        "name": obj.name,
-                        "address": obj.address,
-                        "working_hours": obj.working_hours,
-                        "hourly_rate": float(obj.hourly_rate)
-                    }
-                else:
-                    # Все объекты
-                    object_info = {
-                        "id": None,
-                        "name": "Все объекты",
-                        "address": f"Всего объектов: {len(objects)}",
-                        "working_hours": "Различные",
-                        "hourly_rate": "Различные"
-                    }
-                
-                return {
-                    "object": object_info,
-                    "period": {
-                        "start_date": start_date.isoformat(),
-                        "end_date": end_date.isoformat(),
-                        "days": (end_date - start_date).days + 1
-                    },
-                    "summary": {
-                        "total_shifts": total_shifts,
-                        "completed_shifts": completed_shifts,
-                        "active_shifts": active_shifts,
-                        "total_hours": float(total_hours),
-                        "total_payment": float(total_payment),
-                        "avg_shift_duration": round(avg_shift_duration, 2),
-                        "avg_daily_hours": round(avg_daily_hours, 2)
-                    },
-                    "employees": employee_stats,
-                    "daily_breakdown": daily_stats
+                if not obj:
+                    return {"error": "Объект не найден или нет прав доступа"}
+                object_ids = [object_id]
+                
+            # Получаем смены за период
+            shifts = db.query(Shift).join(User).filter(
+                and_(
+                    Shift.object_id.in_(object_ids),
+                    func.date(Shift.start_time) >= start_date,
+                    func.date(Shift.start_time) <= end_date,
+                    Shift.status.in_(["completed", "active"])
+                )
+            ).all()
+                
+            # Базовая статистика
+            total_shifts = len(shifts)
+            completed_shifts = len([s for s in shifts if s.status == "completed"])
+            active_shifts = len([s for s in shifts if s.status == "active"])
+                
+            # Расчет времени и оплаты
+            total_hours = sum([s.total_hours or 0 for s in shifts])
+            total_payment = sum([s.total_payment or 0 for s in shifts])
+                
+            # Статистика по сотрудникам
+            employee_stats = self._calculate_employee_stats(shifts, db)
+                
+            # Статистика по дням
+            daily_stats = self._calculate_daily_stats(shifts, start_date, end_date)
+                
+            # Средние показатели
+            avg_shift_duration = total_hours / completed_shifts if completed_shifts > 0 else 0
+            avg_daily_hours = total_hours / ((end_date - start_date).days + 1)
+                
+            # Формируем данные об объекте(ах)
+            if obj:
+                # Один объект
+                object_info = {
+                    "id": obj.id,
+                    "name": obj.name,
+                    "address": obj.address,
+                    "working_hours": obj.working_hours,
+                    "hourly_rate": float(obj.hourly_rate)
                 }
+            else:
+                # Все объекты
+                object_info = {
+                    "id": None,
+                    "name": "Все объекты",
+                    "address": f"Всего объектов: {len(objects)}",
+                    "working_hours": "Различные",
+                    "hourly_rate": "Различные"
+                }
+                
+            return {
+                "object": object_info,
+                "period": {
+                    "start_date": start_date.isoformat(),
+                    "end_date": end_date.isoformat(),
+                    "days": (end_date - start_date).days + 1
+                },
+                "summary": {
+                    "total_shifts": total_shifts,
+                    "completed_shifts": completed_shifts,
+                    "active_shifts": active_shifts,
+                    "total_hours": float(total_hours),
+                    "total_payment": float(total_payment),
+                    "avg_shift_duration": round(avg_shift_duration, 2),
+                    "avg_daily_hours": round(avg_daily_hours, 2)
+                },
+                "employees": employee_stats,
+                "daily_breakdown": daily_stats
+            }
                 
         except Exception as e:
             logger.error(f"Error generating object report for object {object_id}: {e}")
             return {"error": f"Ошибка формирования отчета: {str(e)}"}
     
+    @run_in_async_session
     def get_personal_report(
         self,
+        db: Session,
         user_id: int,
         start_date: date,
         end_date: date,
@@ -151,88 +154,88 @@ class AnalyticsService:
             Словарь с данными отчета
         """
         try:
-            with get_sync_session() as db:
-                # Находим пользователя по database ID
-                user = db.query(User).filter(User.id == user_id).first()
-                if not user:
-                    return {"error": "Пользователь не найден"}
-                
-                # Формируем фильтры
-                filters = [
-                    Shift.user_id == user.id,
-                    func.date(Shift.start_time) >= start_date,
-                    func.date(Shift.start_time) <= end_date,
-                    Shift.status.in_(["completed", "active"])
-                ]
-                
-                if object_id:
-                    filters.append(Shift.object_id == object_id)
-                
-                # Получаем смены
-                shifts = db.query(Shift).join(Object).filter(
-                    and_(*filters)
-                ).order_by(desc(Shift.start_time)).all()
-                
-                # Базовая статистика
-                total_shifts = len(shifts)
-                completed_shifts = len([s for s in shifts if s.status == "completed"])
-                active_shifts = len([s for s in shifts if s.status == "active"])
-                
-                # Расчет времени и заработка
-                total_hours = sum([s.total_hours or 0 for s in shifts])
-                total_earnings = sum([s.total_payment or 0 for s in shifts])
-                
-                # Статистика по объектам
-                object_stats = self._calculate_object_stats_for_user(shifts, db)
-                
-                # Детальная разбивка по сменам
-                shift_details = []
-                for shift in shifts[:20]:  # Последние 20 смен
-                    shift_details.append({
-                        "id": shift.id,
-                        "object_name": shift.object.name,
-                        "date": shift.start_time.date().isoformat(),
-                        "start_time": shift.start_time.strftime("%H:%M"),
-                        "end_time": shift.end_time.strftime("%H:%M") if shift.end_time else "Активна",
-                        "duration_hours": float(shift.total_hours or 0),
-                        "payment": float(shift.total_payment or 0),
-                        "status": shift.status
-                    })
-                
-                # Средние показатели
-                avg_shift_duration = total_hours / completed_shifts if completed_shifts > 0 else 0
-                avg_daily_earnings = total_earnings / ((end_date - start_date).days + 1)
+            # Находим пользователя по database ID
+            user = db.query(User).filter(User.id == user_id).first()
+            if not user:
+                return {"error": "Пользователь не найден"}
+                
+            # Формируем фильтры
+            filters = [
+                Shift.user_id == user.id,
+                func.date(Shift.start_time) >= start_date,
+                func.date(Shift.start_time) <= end_date,
+                Shift.status.in_(["completed", "active"])
+            ]
+                
+            if object_id:
+                filters.append(Shift.object_id == object_id)
+                
+            # Получаем смены
+            shifts = db.query(Shift).join(Object).filter(
+                and_(*filters)
+            ).order_by(desc(Shift.start_time)).all()
+                
+            # Базовая статистика
+            total_shifts = len(shifts)
+            completed_shifts = len([s for s in shifts if s.status == "completed"])
+            active_shifts = len([s for s in shifts if s.status == "active"])
+                
+            # Расчет времени и заработка
+            total_hours = sum([s.total_hours or 0 for s in shifts])
+            total_earnings = sum([s.total_payment or 0 for s in shifts])
+                
+            # Статистика по объектам
+            object_stats = self._calculate_object_stats_for_user(shifts, db)
+                
+            # Детальная разбивка по сменам
+            shift_details = []
+            for shift in shifts[:20]:  # Последние 20 смен
+                shift_details.append({
+                    "id": shift.id,
+                    "object_name": shift.object.name,
+                    "date": shift.start_time.date().isoformat(),
+                    "start_time": shift.start_time.strftime("%H:%M"),
+                    "end_time": shift.end_time.strftime("%H:%M") if shift.end_time else "Активна",
+                    "duration_hours": float(shift.total_hours or 0),
+                    "payment": float(shift.total_payment or 0),
+                    "status": shift.status
+                })
+                
+            # Средние показатели
+            avg_shift_duration = total_hours / completed_shifts if completed_shifts > 0 else 0
+            avg_daily_earnings = total_earnings / ((end_date - start_date).days + 1)
                 
-                return {
-                    "user": {
-                        "id": user.id,
-                        "telegram_id": user.telegram_id,
-                        "name": user.full_name,
-                        "username": user.username
-                    },
-                    "period": {
-                        "start_date": start_date.isoformat(),
-                        "end_date": end_date.isoformat(),
-                        "days": (end_date - start_date).days + 1
-                    },
-                    "summary": {
-                        "total_shifts": total_shifts,
-                        "completed_shifts": completed_shifts,
-                        "active_shifts": active_shifts,
-                        "total_hours": float(total_hours),
-                        "total_earnings": float(total_earnings),
-                        "avg_shift_duration": round(avg_shift_duration, 2),
-                        "avg_daily_earnings": round(avg_daily_earnings, 2)
-                    },
-                    "objects": object_stats,
-                    "recent_shifts": shift_details
-                }
+            return {
+                "user": {
+                    "id": user.id,
+                    "telegram_id": user.telegram_id,
+                    "name": user.full_name,
+                    "username": user.username
+                },
+                "period": {
+                    "start_date": start_date.isoformat(),
+                    "end_date": end_date.isoformat(),
+                    "days": (end_date - start_date).days + 1
+                },
+                "summary": {
+                    "total_shifts": total_shifts,
+                    "completed_shifts": completed_shifts,
+                    "active_shifts": active_shifts,
+                    "total_hours": float(total_hours),
+                    "total_earnings": float(total_earnings),
+                    "avg_shift_duration": round(avg_shift_duration, 2),
+                    "avg_daily_earnings": round(avg_daily_earnings, 2)
+                },
+                "objects": object_stats,
+                "recent_shifts": shift_details
+            }
                 
         except Exception as e:
             logger.error(f"Error generating personal report for user {user_id}: {e}")
             return {"error": f"Ошибка формирования отчета: {str(e)}"}
     
-    def get_dashboard_metrics(self, owner_id: int) -> Dict[str, Any]:
+    @run_in_async_session
+    def get_dashboard_metrics(self, db: Session, owner_id: int) -> Dict[str, Any]:
         """
         Получает ключевые метрики для дашборда владельца.
         
@@ -243,62 +246,62 @@ class AnalyticsService:
             Словарь с метриками
         """
         try:
-            with get_sync_session() as db:
-                # Находим пользователя по database ID
-                owner = db.query(User).filter(User.id == owner_id).first()
-                if not owner:
-                    return {"error": "Пользователь не найден"}
-                
-                # Получаем объекты владельца
-                objects = db.query(Object).filter(Object.owner_id == owner.id).all()
-                object_ids = [obj.id for obj in objects]
+            # Находим пользователя по database ID
+            owner = db.query(User).filter(User.id == owner_id).first()
+            if not owner:
+                return {"error": "Пользователь не найден"}
                 
-                if not object_ids:
-                    return {
-                        "objects_count": 0,
-                        "active_shifts": 0,
-                        "today_stats": {"shifts": 0, "hours": 0, "payments": 0},
-                        "week_stats": {"shifts": 0, "hours": 0, "payments": 0},
-                        "month_stats": {"shifts": 0, "hours": 0, "payments": 0}
-                    }
+            # Получаем объекты владельца
+            objects = db.query(Object).filter(Object.owner_id == owner.id).all()
+            object_ids = [obj.id for obj in objects]
                 
-                # Текущие активные смены
-                active_shifts_count = db.query(Shift).filter(
-                    and_(
-                        Shift.object_id.in_(object_ids),
-                        Shift.status == "active"
-                    )
-                ).count()
+            if not object_ids:
+                return {
+                    "objects_count": 0,
+                    "active_shifts": 0,
+                    "today_stats": {"shifts": 0, "hours": 0, "payments": 0},
+                    "week_stats": {"shifts": 0, "hours": 0, "payments": 0},
+                    "month_stats": {"shifts": 0, "hours": 0, "payments": 0}
+                }
                 
-                # Статистика за сегодня
-                today = date.today()
-                today_stats = self._get_period_stats(db, object_ids, today, today)
+            # Текущие активные смены
+            active_shifts_count = db.query(Shift).filter(
+                and_(
+                    Shift.object_id.in_(object_ids),
+                    Shift.status == "active"
+                )
+            ).count()
                 
-                # Статистика за неделю
-                week_start = today - timedelta(days=6)
-                week_stats = self._get_period_stats(db, object_ids, week_start, today)
+            # Статистика за сегодня
+            today = date.today()
+            today_stats = self._get_period_stats(db, object_ids, today, today)
                 
-                # Статистика за месяц
-                month_start = today - timedelta(days=29)
-                month_stats = self._get_period_stats(db, object_ids, month_start, today)
+            # Статистика за неделю
+            week_start = today - timedelta(days=6)
+            week_stats = self._get_period_stats(db, object_ids, week_start, today)
                 
-                # Топ объекты по активности
-                top_objects = self._get_top_objects(db, object_ids, month_start, today)
+            # Статистика за месяц
+            month_start = today - timedelta(days=29)
+            month_stats = self._get_period_stats(db, object_ids, month_start, today)
                 
-                return {
-                    "objects_count": len(objects),
-                    "active_shifts": active_shifts_count,
-                    "today_stats": today_stats,
-                    "week_stats": week_stats,
-                    "month_stats": month_stats,
-                    "top_objects": top_objects
-                }
+            # Топ объекты по активности
+            top_objects = self._get_top_objects(db, object_ids, month_start, today)
+                
+            return {
+                "objects_count": len(objects),
+                "active_shifts": active_shifts_count,
+                "today_stats": today_stats,
+                "week_stats": week_stats,
+                "month_stats": month_stats,
+                "top_objects": top_objects
+            }
                 
         except Exception as e:
             logger.error(f"Error generating dashboard metrics for owner {owner_id}: {e}")
             return {"error": f"Ошибка получения метрик: {str(e)}"}
     
-    def get_owner_dashboard(self, owner_id: int) -> Dict[str, Any]:
+    @run_in_async_session
+    def get_owner_dashboard(self, db: Session, owner_id: int) -> Dict[str, Any]:
         """
         Получает данные для дашборда владельца.
         
@@ -309,64 +312,63 @@ class AnalyticsService:
             Словарь с данными дашборда
         """
         try:
-            with get_sync_session() as db:
-                # Получаем объекты владельца
-                objects = db.query(Object).filter(Object.owner_id == owner_id).all()
-                object_ids = [obj.id for obj in objects]
-                
-                if not object_ids:
-                    return {
-                        "total_payments": 0,
-                        "total_shifts": 0,
-                        "active_shifts": 0,
-                        "top_objects": []
-                    }
-                
-                # Общая сумма к выплате
-                total_payments = db.query(func.sum(Shift.total_payment)).filter(
-                    and_(
-                        Shift.object_id.in_(object_ids),
-                        Shift.status == "completed"
-                    )
-                ).scalar() or 0
-                
-                # Общее количество смен
-                total_shifts = db.query(func.count(Shift.id)).filter(
-                    Shift.object_id.in_(object_ids)
-                ).scalar() or 0
-                
-                # Активные смены
-                active_shifts = db.query(func.count(Shift.id)).filter(
-                    and_(
-                        Shift.object_id.in_(object_ids),
-                        Shift.status == "active"
-                    )
-                ).scalar() or 0
-                
-                # Топ объекты по активности
-                top_objects = db.query(
-                    Object.name,
-                    func.count(Shift.id).label('shifts_count')
-                ).join(Shift).filter(
-                    Shift.object_id.in_(object_ids)
-                ).group_by(Object.id, Object.name).order_by(
-                    func.count(Shift.id).desc()
-                ).limit(3).all()
-                
-                top_objects_list = [
-                    {
-                        "name": obj.name,
-                        "shifts_count": obj.shifts_count
-                    }
-                    for obj in top_objects
-                ]
+            # Получаем объекты владельца
+            objects = db.query(Object).filter(Object.owner_id == owner_id).all()
+            object_ids = [obj.id for obj in objects]
                 
+            if not object_ids:
                 return {
-                    "total_payments": float(total_payments),
-                    "total_shifts": total_shifts,
-                    "active_shifts": active_shifts,
-                    "top_objects": top_objects_list
+                    "total_payments": 0,
+                    "total_shifts": 0,
+                    "active_shifts": 0,
+                    "top_objects": []
+                }
+                
+            # Общая сумма к выплате
+            total_payments = db.query(func.sum(Shift.total_payment)).filter(
+                and_(
+                    Shift.object_id.in_(object_ids),
+                    Shift.status == "completed"
+                )
+            ).scalar() or 0
+                
+            # Общее количество смен
+            total_shifts = db.query(func.count(Shift.id)).filter(
+                Shift.object_id.in_(object_ids)
+            ).scalar() or 0
+                
+            # Активные смены
+            active_shifts = db.query(func.count(Shift.id)).filter(
+                and_(
+                    Shift.object_id.in_(object_ids),
+                    Shift.status == "active"
+                )
+            ).scalar() or 0
+                
+            # Топ объекты по активности
+            top_objects = db.query(
+                Object.name,
+                func.count(Shift.id).label('shifts_count')
+            ).join(Shift).filter(
+                Shift.object_id.in_(object_ids)
+            ).group_by(Object.id, Object.name).order_by(
+                func.count(Shift.id).desc()
+            ).limit(3).all()
+                
+            top_objects_list = [
+                {
+                    "name": obj.name,
+                    "shifts_count": obj.shifts_count
                 }
+                for obj in top_objects
+            ]
+                
+            return {
+                "total_payments": float(total_payments),
+                "total_shifts": total_shifts,
+                "active_shifts": active_shifts,
+                "top_objects": top_objects_list
+            }
                 
         except Exception as e:
             logger.error(f"Error getting owner dashboard for owner {owner_id}: {e}")
@@ -512,8 +514,10 @@ class AnalyticsService:
             for row in result
         ]
     
+    @run_in_async_session
     def get_cancellation_statistics(
         self,
+        db: Session,
         owner_id: int,
         start_date: date,
         end_date: date,
@@ -537,86 +541,85 @@ class AnalyticsService:
         from domain.entities.shift_schedule import ShiftSchedule
         
         try:
-            with get_sync_session() as db:
-                # Базовый запрос: только отмены объектов владельца
-                query = (
-                    db.query(ShiftCancellation)
-                    .join(Object, ShiftCancellation.object_id == Object.id)
-                    .join(ShiftSchedule, ShiftCancellation.shift_schedule_id == ShiftSchedule.id)
-                    .filter(
-                        Object.owner_id == owner_id,
-                        func.date(ShiftCancellation.created_at) >= start_date,
-                        func.date(ShiftCancellation.created_at) <= end_date
-                    )
+            # Базовый запрос: только отмены объектов владельца
+            query = (
+                db.query(ShiftCancellation)
+                .join(Object, ShiftCancellation.object_id == Object.id)
+                .join(ShiftSchedule, ShiftCancellation.shift_schedule_id == ShiftSchedule.id)
+                .filter(
+                    Object.owner_id == owner_id,
+                    func.date(ShiftCancellation.created_at) >= start_date,
+                    func.date(ShiftCancellation.created_at) <= end_date
                 )
+            )
                 
-                # Фильтры
-                if object_id:
-                    query = query.filter(ShiftCancellation.object_id == object_id)
-                if employee_id:
-                    query = query.filter(ShiftCancellation.employee_id == employee_id)
-                
-                cancellations = query.all()
-                
-                # Подсчет статистики
-                total_cancellations = len(cancellations)
-                
-                # По типам отменивших
-                by_type = {}
-                for c in cancellations:
-                    by_type[c.cancelled_by_type] = by_type.get(c.cancelled_by_type, 0) + 1
-                
-                # По причинам
-                by_reason = {}
-                for c in cancellations:
-                    by_reason[c.cancellation_reason] = by_reason.get(c.cancellation_reason, 0) + 1
-                
-                # По сотрудникам (топ 10)
-                by_employee = {}
-                for c in cancellations:
-                    if c.employee_id not in by_employee:
-                        by_employee[c.employee_id] = {
-                            'count': 0,
-                            'total_fine': Decimal('0'),
-                            'name': ''
-                        }
-                    by_employee[c.employee_id]['count'] += 1
-                    if c.fine_amount:
-                        by_employee[c.employee_id]['total_fine'] += c.fine_amount
-                
-                # Получаем имена сотрудников
-                for emp_id in by_employee.keys():
-                    user = db.query(User).filter(User.id == emp_id).first()
-                    if user:
-                        by_employee[emp_id]['name'] = f"{user.first_name} {user.last_name or ''}".strip()
-                
-                # Топ отменяющих
-                top_employees = sorted(
-                    [{'id': k, **v} for k, v in by_employee.items()],
-                    key=lambda x: x['count'],
-                    reverse=True
-                )[:10]
-                
-                # Суммы штрафов
-                total_fines = sum(float(c.fine_amount or 0) for c in cancellations)
-                applied_fines = sum(float(c.fine_amount or 0) for c in cancellations if c.fine_applied)
-                
-                # Уважительные причины
-                valid_reasons_count = sum(1 for c in cancellations if c.is_valid_reason)
-                valid_reasons_verified = sum(1 for c in cancellations if c.is_valid_reason and c.document_verified)
+            # Фильтры
+            if object_id:
+                query = query.filter(ShiftCancellation.object_id == object_id)
+            if employee_id:
+                query = query.filter(ShiftCancellation.employee_id == employee_id)
+                
+            cancellations = query.all()
+                
+            # Подсчет статистики
+            total_cancellations = len(cancellations)
+                
+            # По типам отменивших
+            by_type = {}
+            for c in cancellations:
+                by_type[c.cancelled_by_type] = by_type.get(c.cancelled_by_type, 0) + 1
+                
+            # По причинам
+            by_reason = {}
+            for c in cancellations:
+                by_reason[c.cancellation_reason] = by_reason.get(c.cancellation_reason, 0) + 1
+                
+            # По сотрудникам (топ 10)
+            by_employee = {}
+            for c in cancellations:
+                if c.employee_id not in by_employee:
+                    by_employee[c.employee_id] = {
+                        'count': 0,
+                        'total_fine': Decimal('0'),
+                        'name': ''
+                    }
+                by_employee[c.employee_id]['count'] += 1
+                if c.fine_amount:
+                    by_employee[c.employee_id]['total_fine'] += c.fine_amount
+                
+            # Получаем имена сотрудников
+            for emp_id in by_employee.keys():
+                user = db.query(User).filter(User.id == emp_id).first()
+                if user:
+                    by_employee[emp_id]['name'] = f"{user.first_name} {user.last_name or ''}".strip()
+                
+            # Топ отменяющих
+            top_employees = sorted(
+                [{'id': k, **v} for k, v in by_employee.items()],
+                key=lambda x: x['count'],
+                reverse=True
+            )[:10]
+                
+            # Суммы штрафов
+            total_fines = sum(float(c.fine_amount or 0) for c in cancellations)
+            applied_fines = sum(float(c.fine_amount or 0) for c in cancellations if c.fine_applied)
+                
+            # Уважительные причины
+            valid_reasons_count = sum(1 for c in cancellations if c.is_valid_reason)
+            valid_reasons_verified = sum(1 for c in cancellations if c.is_valid_reason and c.document_verified)
                 
-                return {
-                    'success': True,
-                    'total_cancellations': total_cancellations,
-                    'by_type': by_type,
-                    'by_reason': by_reason,
-                    'top_employees': top_employees,
-                    'total_fines': round(total_fines, 2),
-                    'applied_fines': round(applied_fines, 2),
-                    'valid_reasons_count': valid_reasons_count,
-                    'valid_reasons_verified': valid_reasons_verified,
-                    'valid_reasons_percent': round(valid_reasons_count / total_cancellations * 100, 1) if total_cancellations > 0 else 0
-                }
+            return {
+                'success': True,
+                'total_cancellations': total_cancellations,
+                'by_type': by_type,
+                'by_reason': by_reason,
+                'top_employees': top_employees,
+                'total_fines': round(total_fines, 2),
+                'applied_fines': round(applied_fines, 2),
+                'valid_reasons_count': valid_reasons_count,
+                'valid_reasons_verified': valid_reasons_verified,
+                'valid_reasons_percent': round(valid_reasons_count / total_cancellations * 100, 1) if total_cancellations > 0 else 0
+            }
                 
         except Exception as e:
             logger.error(f"Error getting cancellation statistics: {e}")
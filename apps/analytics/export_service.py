@@ -2,9 +2,8 @@
 
 import io
 import os
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from datetime import datetime, date
-import pandas as pd
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
@@ -12,9 +11,22 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
+from core.export.streaming import StreamingWorkbook
 from core.logging.logger import logger
 
 
+def _add_records_sheet(workbook: StreamingWorkbook, title: str, records: List[Dict[str, Any]]) -> None:
+    """Лист из списка словарей: колонки — ключи в порядке первого появления."""
+    headers: List[str] = []
+    for record in records:
+        for key in record:
+            if key not in headers:
+                headers.append(key)
+    sheet = workbook.add_sheet(title, headers)
+    for record in records:
+        sheet.append([record.get(key) for key in headers])
+
+
 class ExportService:
     """Сервис для экспорта отчетов в PDF и Excel."""
     
@@ -306,59 +318,38 @@ class ExportService:
             Excel файл в виде байтов
         """
         try:
-            buffer = io.BytesIO()
+            workbook = StreamingWorkbook(max_width=50)
+            
+            # Лист с общей информацией
+            summary = workbook.add_sheet('Общая информация', ['Показатель', 'Значение'])
+            for row in [
+                ['Название объекта', report_data['object']['name']],
+                ['Адрес', report_data['object']['address'] or 'Не указан'],
+                ['Время работы', report_data['object']['working_hours']],
+                ['Ставка за час', f"{report_data['object']['hourly_rate']} ₽"],
+                ['Период (начало)', report_data['period']['start_date']],
+                ['Период (конец)', report_data['period']['end_date']],
+                ['Всего смен', report_data['summary']['total_shifts']],
+                ['Завершенных смен', report_data['summary']['completed_shifts']],
+                ['Активных смен', report_data['summary']['active_shifts']],
+                ['Общее время (часов)', report_data['summary']['total_hours']],
+                ['Общая оплата (₽)', report_data['summary']['total_payment']],
+                ['Средняя длительность смены (ч)', report_data['summary']['avg_shift_duration']],
+                ['Среднее время в день (ч)', report_data['summary']['avg_daily_hours']]
+            ]:
+                summary.append(row)
+            
+            # Лист с данными по сотрудникам
+            if report_data.get('employees'):
+                _add_records_sheet(workbook, 'Сотрудники', report_data['employees'])
             
-            with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-                # Лист с общей информацией
-                summary_data = {
-                    'Показатель': [
-                        'Название объекта',
-                        'Адрес',
-                        'Время работы',
-                        'Ставка за час',
-                        'Период (начало)',
-                        'Период (конец)',
-                        'Всего смен',
-                        'Завершенных смен',
-                        'Активных смен',
-                        'Общее время (часов)',
-                        'Общая оплата (₽)',
-                        'Средняя длительность смены (ч)',
-                        'Среднее время в день (ч)'
-                    ],
-                    'Значение': [
-                        report_data['object']['name'],
-                        report_data['object']['address'] or 'Не указан',
-                        report_data['object']['working_hours'],
-                        f"{report_data['object']['hourly_rate']} ₽",
-                        report_data['period']['start_date'],
-                        report_data['period']['end_date'],
-                        report_data['summary']['total_shifts'],
-                        report_data['summary']['completed_shifts'],
-                        report_data['summary']['active_shifts'],
-                        report_data['summary']['total_hours'],
-                        report_data['summary']['total_payment'],
-                        report_data['summary']['avg_shift_duration'],
-                        report_data['summary']['avg_daily_hours']
-                    ]
-                }
-                
-                summary_df = pd.DataFrame(summary_data)
-                summary_df.to_excel(writer, sheet_name='Общая информация', index=False)
-                
-                # Лист с данными по сотрудникам
-                if report_data.get('employees'):
-                    employees_df = pd.DataFrame(report_data['employees'])
-                    employees_df.to_excel(writer, sheet_name='Сотрудники', index=False)
-                
-                # Лист с ежедневной статистикой
-                if report_data.get('daily_breakdown'):
-                    daily_df = pd.DataFrame(report_data['daily_breakdown'])
-                    daily_df.to_excel(writer, sheet_name='По дням', index=False)
+            # Лист с ежедневной статистикой
+            if report_data.get('daily_breakdown'):
+                _add_records_sheet(workbook, 'По дням', report_data['daily_breakdown'])
             
-            buffer.seek(0)
+            content = workbook.to_bytes()
             logger.info("Object report Excel generated successfully")
-            return buffer.getvalue()
+            return content
             
         except Exception as e:
             logger.error(f"Error generating Excel report: {e}")
@@ -375,63 +366,43 @@ class ExportService:
             Excel файл в виде байтов
         """
         try:
-            buffer = io.BytesIO()
-            
-            with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-                # Лист с общей информацией
-                summary_data = {
-                    'Показатель': [
-                        'Имя сотрудника',
-                        'Username',
-                        'Telegram ID',
-                        'Период (начало)',
-                        'Период (конец)',
-                        'Всего смен',
-                        'Завершенных смен',
-                        'Активных смен',
-                        'Общее время (часов)',
-                        'Общий заработок (₽)',
-                        'Средняя длительность смены (ч)',
-                        'Средний заработок в день (₽)'
-                    ],
-                    'Значение': [
-                        report_data['user']['name'],
-                        report_data['user']['username'] or 'Не указан',
-                        report_data['user']['telegram_id'],
-                        report_data['period']['start_date'],
-                        report_data['period']['end_date'],
-                        report_data['summary']['total_shifts'],
-                        report_data['summary']['completed_shifts'],
-                        report_data['summary']['active_shifts'],
-                        report_data['summary']['total_hours'],
-                        report_data['summary']['total_earnings'],
-                        report_data['summary']['avg_shift_duration'],
-                        report_data['summary']['avg_daily_earnings']
-                    ]
-                }
-                
-                summary_df = pd.DataFrame(summary_data)
-                summary_df.to_excel(writer, sheet_name='Общая информация', index=False)
-                
-                # Лист с данными по объектам
-                if report_data.get('objects'):
-                    objects_df = pd.DataFrame(report_data['objects'])
-                    objects_df.to_excel(writer, sheet_name='По объектам', index=False)
-                
-                # Лист с последними сменами
-                if report_data.get('recent_shifts'):
-                    shifts_df = pd.DataFrame(report_data['recent_shifts'])
-                    shifts_df.to_excel(writer, sheet_name='Последние смены', index=False)
+            workbook = StreamingWorkbook(max_width=50)
+            
+            # Лист с общей информацией
+            summary = workbook.add_sheet('Общая информация', ['Показатель', 'Значение'])
+            for row in [
+                ['Имя сотрудника', report_data['user']['name']],
+                ['Username', report_data['user']['username'] or 'Не указан'],
+                ['Telegram ID', report_data['user']['telegram_id']],
+                ['Период (начало)', report_data['period']['start_date']],
+                ['Период (конец)', report_data['period']['end_date']],
+                ['Всего смен', report_data['summary']['total_shifts']],
+                ['Завершенных смен', report_data['summary']['completed_shifts']],
+                ['Активных смен', report_data['summary']['active_shifts']],
+                ['Общее время (часов)', report_data['summary']['total_hours']],
+                ['Общий заработок (₽)', report_data['summary']['total_earnings']],
+                ['Средняя длительность смены (ч)', report_data['summary']['avg_shift_duration']],
+                ['Средний заработок в день (₽)', report_data['summary']['avg_daily_earnings']]
+            ]:
+                summary.append(row)
+            
+            # Лист с данными по объектам
+            if report_data.get('objects'):
+                _add_records_sheet(workbook, 'По объектам', report_data['objects'])
+            
+            # Лист с последними сменами
+            if report_data.get('recent_shifts'):
+                _add_records_sheet(workbook, 'Последние смены', report_data['recent_shifts'])
             
-            buffer.seek(0)
+            content = workbook.to_bytes()
             logger.info("Personal report Excel generated successfully")
-            return buffer.getvalue()
+            return content
             
         except Exception as e:
             logger.error(f"Error generating personal Excel report: {e}")
             raise
     
-    def generate_excel_report(
+    async def generate_excel_report(
         self,
         owner_id: int,
         object_id: Optional[int],
@@ -455,65 +426,31 @@ class ExportService:
             analytics_service = AnalyticsService()
             
             # Получаем данные отчета
-            report_data = analytics_service.get_object_report(
+            report_data = await analytics_service.get_object_report(
                 owner_id=owner_id,
                 object_id=object_id,
                 start_date=start_date,
                 end_date=end_date
             )
             
-            if not report_data or report_data.get('error'):
-                # Создаем пустой отчет
-                df = pd.DataFrame({
-                    'Сотрудник': ['Нет данных'],
-                    'Смен': [0],
-                    'Часов': [0],
-                    'Сумма к оплате': [0]
-                })
-            else:
-                # Создаем DataFrame из данных по сотрудникам
+            employees = []
+            if report_data and not report_data.get('error'):
                 employees = report_data.get('employees', [])
-                if employees:
-                    df = pd.DataFrame(employees)
-                    # Переименовываем колонки для лучшего понимания
-                    df = df.rename(columns={
-                        'name': 'Сотрудник',
-                        'shifts': 'Смен',
-                        'hours': 'Часов',
-                        'payment': 'Сумма к оплате'
-                    })
-                else:
-                    df = pd.DataFrame({
-                        'Сотрудник': ['Нет данных'],
-                        'Смен': [0],
-                        'Часов': [0],
-                        'Сумма к оплате': [0]
-                    })
-            
-            # Создаем Excel файл в памяти
-            output = io.BytesIO()
-            with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                df.to_excel(writer, sheet_name='Отчет', index=False)
-                
-                # Получаем workbook и worksheet
-                workbook = writer.book
-                worksheet = writer.sheets['Отчет']
-                
-                # Настраиваем ширину колонок
-                for column in worksheet.columns:
-                    max_length = 0
-                    column_letter = column[0].column_letter
-                    for cell in column:
-                        try:
-                            if len(str(cell.value)) > max_length:
-                                max_length = len(str(cell.value))
-                        except:
-                            pass
-                    adjusted_width = min(max_length + 2, 50)
-                    worksheet.column_dimensions[column_letter].width = adjusted_width
-            
-            output.seek(0)
-            return output.getvalue()
+            
+            workbook = StreamingWorkbook(max_width=50)
+            sheet = workbook.add_sheet('Отчет', ['Сотрудник', 'Смен', 'Часов', 'Сумма к оплате'])
+            if employees:
+                for employee in employees:
+                    sheet.append([
+                        employee.get('name'),
+                        employee.get('shifts'),
+                        employee.get('hours'),
+                        employee.get('payment')
+                    ])
+            else:
+                sheet.append(['Нет данных', 0, 0, 0])
+            
+            return workbook.to_bytes()
             
         except Exception as e:
             logger.error(f"Error generating Excel report: {e}")
@@ -7,7 +7,6 @@ from core.auth.user_manager import user_manager
 from apps.bot.services.shift_service import ShiftService
 from apps.bot.services.object_service import ObjectService
 from core.database.session import get_async_session
-from core.database.connection import get_sync_session
 from core.utils.timezone_helper import timezone_helper
 from domain.entities.object import Object
 from sqlalchemy import select
@@ -136,7 +135,7 @@ async def status_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
 """
         else:
             shift = active_shifts[0]  # Берем первую активную смену
-            obj_data = object_service.get_object_by_id(shift['object_id'])
+            obj_data = await object_service.get_object_by_id(shift['object_id'])
             
             # Конвертируем время в часовой пояс объекта
             object_timezone = obj_data.get('timezone', 'Europe/Moscow') if obj_data else 'Europe/Moscow'
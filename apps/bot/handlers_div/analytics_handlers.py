@@ -5,7 +5,7 @@ from telegram.ext import ContextTypes, ConversationHandler, CallbackQueryHandler
 from core.logging.logger import logger
 from apps.analytics.analytics_service import AnalyticsService
 from apps.analytics.export_service import ExportService
-from core.database.connection import get_sync_session
+from core.database.session import get_async_session
 from domain.entities.object import Object
 from sqlalchemy import select
 from datetime import datetime, timedelta, date
@@ -33,11 +33,11 @@ class AnalyticsHandlers:
         
         # Проверяем, есть ли у пользователя объекты
         try:
-            with get_sync_session() as session:
+            async with get_async_session() as session:
                 # Сначала находим пользователя по telegram_id
                 from domain.entities.user import User
                 user_query = select(User).where(User.telegram_id == user_id)
-                user_result = session.execute(user_query)
+                user_result = await session.execute(user_query)
                 user = user_result.scalar_one_or_none()
                 
                 if not user:
@@ -48,7 +48,7 @@ class AnalyticsHandlers:
                 
                 # Теперь находим объекты пользователя
                 objects_query = select(Object).where(Object.owner_id == user.id, Object.is_active == True)
-                objects_result = session.execute(objects_query)
+                objects_result = await session.execute(objects_query)
                 objects = objects_result.scalars().all()
                 
                 if not objects:
@@ -103,10 +103,10 @@ class AnalyticsHandlers:
         
         try:
             # Получаем внутренний user_id из базы данных
-            with get_sync_session() as session:
+            async with get_async_session() as session:
                 from domain.entities.user import User
                 user_query = select(User).where(User.telegram_id == user_id)
-                user_result = session.execute(user_query)
+                user_result = await session.execute(user_query)
                 user = user_result.scalar_one_or_none()
                 
                 if not user:
@@ -118,7 +118,7 @@ class AnalyticsHandlers:
                 internal_user_id = user.id
             
             # Получаем данные дашборда
-            dashboard_data = analytics_service.get_owner_dashboard(internal_user_id)
+            dashboard_data = await analytics_service.get_owner_dashboard(internal_user_id)
             
             # Формируем текст дашборда
             dashboard_text = "📈 **Дашборд владельца**\n\n"
@@ -165,11 +165,11 @@ class AnalyticsHandlers:
         user_id = update.effective_user.id
         
         try:
-            with get_sync_session() as session:
+            async with get_async_session() as session:
                 # Сначала находим пользователя по telegram_id
                 from domain.entities.user import User
                 user_query = select(User).where(User.telegram_id == user_id)
-                user_result = session.execute(user_query)
+                user_result = await session.execute(user_query)
                 user = user_result.scalar_one_or_none()
                 
                 if not user:
@@ -180,7 +180,7 @@ class AnalyticsHandlers:
                 
                 # Теперь находим объекты пользователя
                 objects_query = select(Object).where(Object.owner_id == user.id, Object.is_active == True)
-                objects_result = session.execute(objects_query)
+                objects_result = await session.execute(objects_query)
                 objects = objects_result.scalars().all()
                 
                 # Создаем клавиатуру с объектами
@@ -224,9 +224,9 @@ class AnalyticsHandlers:
             
             # Получаем название объекта
             try:
-                with get_sync_session() as session:
+                async with get_async_session() as session:
                     object_query = select(Object).where(Object.id == object_id)
-                    object_result = session.execute(object_query)
+                    object_result = await session.execute(object_query)
                     obj = object_result.scalar_one_or_none()
                     object_name = obj.name if obj else "Неизвестный объект"
             except Exception:
@@ -341,10 +341,10 @@ class AnalyticsHandlers:
         
         try:
             # Получаем внутренний user_id из базы данных
-            with get_sync_session() as session:
+            async with get_async_session() as session:
                 from domain.entities.user import User
                 user_query = select(User).where(User.telegram_id == user_id)
-                user_result = session.execute(user_query)
+                user_result = await session.execute(user_query)
                 user = user_result.scalar_one_or_none()
                 
                 if not user:
@@ -358,7 +358,7 @@ class AnalyticsHandlers:
             # Генерируем отчет
             if format_type == "text":
                 # Текстовый отчет
-                report_data = analytics_service.get_object_report(
+                report_data = await analytics_service.get_object_report(
                     owner_id=internal_user_id,
                     object_id=object_id,
                     start_date=start_date,
@@ -408,7 +408,7 @@ class AnalyticsHandlers:
                 # Excel отчет
                 try:
                     # Генерируем Excel файл
-                    excel_file = export_service.generate_excel_report(
+                    excel_file = await export_service.generate_excel_report(
                         owner_id=internal_user_id,
                         object_id=object_id,
                         start_date=start_date,
@@ -359,6 +359,11 @@ async def handle_location(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
                 if 'distance_meters' in result:
                     error_msg += f"\n📏 Расстояние: {result['distance_meters']:.0f}м"
                     error_msg += f"\n📐 Максимум: {result.get('max_distance_meters', 100)}м"
+                if result.get('nearby_objects'):
+                    nearby = ", ".join(
+                        f"{o['name']} ({o['distance_meters']:.0f}м)" for o in result['nearby_objects'][:3]
+                    )
+                    error_msg += f"\n📍 Рядом с вами: {nearby}"
                 
                 # Добавляем кнопки для повторной отправки или отмены
                 keyboard = [
@@ -770,7 +775,7 @@ async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     chat_id = query.message.chat_id
     
     # Обновляем активность пользователя
-    user_manager.update_user_activity(user.id)
+    await user_manager.update_user_activity(user.id)
     
     logger.info(
         f"Button callback received: user_id={user.id}, username={user.username}, callback_data={query.data}"
@@ -3,7 +3,7 @@
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, CallbackQuery
 from telegram.ext import ContextTypes, ConversationHandler
 from core.logging.logger import logger
-from core.database.connection import get_sync_session
+from core.database.session import get_async_session
 from domain.entities.user import User
 from domain.entities.shift import Shift
 from domain.entities.object import Object
@@ -57,9 +57,9 @@ class EarningsReportHandlers:
         
         try:
             # Получаем внутренний user_id
-            with get_sync_session() as session:
+            async with get_async_session() as session:
                 user_query = select(User).where(User.telegram_id == user_id)
-                user_result = session.execute(user_query)
+                user_result = await session.execute(user_query)
                 user = user_result.scalar_one_or_none()
                 
                 if not user:
@@ -176,9 +176,9 @@ class EarningsReportHandlers:
                 context.user_data['end_date'] = end_date
                 
                 # Получаем user_id из базы данных
-                with get_sync_session() as session:
+                async with get_async_session() as session:
                     user_query = select(User).where(User.telegram_id == update.effective_user.id)
-                    user_result = session.execute(user_query)
+                    user_result = await session.execute(user_query)
                     user = user_result.scalar_one_or_none()
                     
                     if not user:
@@ -223,7 +223,7 @@ class EarningsReportHandlers:
             return ConversationHandler.END
         
         try:
-            with get_sync_session() as session:
+            async with get_async_session() as session:
                 # Получаем все завершенные смены пользователя за период
                 shifts_query = select(Shift, Object).join(
                     Object, Shift.object_id == Object.id
@@ -236,7 +236,7 @@ class EarningsReportHandlers:
                     )
                 ).order_by(Shift.start_time)
                 
-                shifts_result = session.execute(shifts_query)
+                shifts_result = await session.execute(shifts_query)
                 shifts_data = shifts_result.all()
                 
                 logger.info(f"Found {len(shifts_data)} completed shifts for period {start_date} - {end_date}")
@@ -353,7 +353,7 @@ async def _handle_auto_close_input(update: Update, context: ContextTypes.DEFAULT
         # Создаем объект
         user_id = update.effective_user.id
         coordinates = f"{state['data']['latitude']},{state['data']['longitude']}"
-        result = object_service.create_object(
+        result = await object_service.create_object(
             name=state['data']['name'],
             address=state['data'].get('address', ''),
             coordinates=coordinates,
@@ -16,7 +16,7 @@ async def _handle_manage_objects(update: Update, context: ContextTypes.DEFAULT_T
     user_id = query.from_user.id
     
     # Получаем объекты пользователя
-    user_objects = object_service.get_user_objects(user_id)
+    user_objects = await object_service.get_user_objects(user_id)
     
     if not user_objects:
         await query.edit_message_text(
@@ -60,7 +60,7 @@ async def _handle_edit_object(update: Update, context: ContextTypes.DEFAULT_TYPE
     user_id = query.from_user.id
     
     # Получаем информацию об объекте
-    obj_data = object_service.get_object_by_id(object_id)
+    obj_data = await object_service.get_object_by_id(object_id)
     if not obj_data:
         await query.edit_message_text(
             text="❌ Объект не найден.",
@@ -173,7 +173,7 @@ async def _handle_edit_object_input(update: Update, context: ContextTypes.DEFAUL
         return
     
     # Обновляем поле объекта
-    result = object_service.update_object_field(object_id, field_name, text, user_id)
+    result = await object_service.update_object_field(object_id, field_name, text, user_id)
     
     # Очищаем состояние пользователя
     user_state_manager.clear_state(user_id)
@@ -201,7 +201,7 @@ async def _handle_edit_object_input(update: Update, context: ContextTypes.DEFAUL
 async def _show_updated_object_info(update: Update, context: ContextTypes.DEFAULT_TYPE, object_id: int):
     """Показывает обновленную информацию об объекте."""
     # Получаем информацию об объекте
-    obj_data = object_service.get_object_by_id(object_id)
+    obj_data = await object_service.get_object_by_id(object_id)
     if not obj_data:
         await update.message.reply_text(
             "❌ Объект не найден.",
@@ -269,7 +269,7 @@ async def _handle_delete_object(update: Update, context: ContextTypes.DEFAULT_TY
     user_id = query.from_user.id
     
     # Получаем информацию об объекте
-    obj_data = object_service.get_object_by_id(object_id)
+    obj_data = await object_service.get_object_by_id(object_id)
     if not obj_data:
         await query.edit_message_text(
             text="❌ Объект не найден.",
@@ -309,7 +309,7 @@ async def _handle_confirm_delete_object(update: Update, context: ContextTypes.DE
     user_id = query.from_user.id
     
     # Удаляем объект и все связанные данные
-    result = object_service.delete_object(object_id, user_id)
+    result = await object_service.delete_object(object_id, user_id)
     
     if result['success']:
         await query.edit_message_text(
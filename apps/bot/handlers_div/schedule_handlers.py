@@ -282,7 +282,7 @@ async def handle_schedule_confirmation(update: Update, context: ContextTypes.DEF
         # Получаем информацию о тайм-слоте
         from apps.bot.services.time_slot_service import TimeSlotService
         time_slot_service = TimeSlotService()
-        timeslot_data = time_slot_service.get_timeslot_by_id(slot_id)
+        timeslot_data = await time_slot_service.get_timeslot_by_id(slot_id)
         
         if not timeslot_data:
             await query.edit_message_text("❌ Ошибка: тайм-слот не найден.")
@@ -171,7 +171,7 @@ async def _handle_open_shift(update: Update, context: ContextTypes.DEFAULT_TYPE)
     user_id = user.id
     
     # Проверяем регистрацию пользователя
-    if not user_manager.is_user_registered(user_id):
+    if not await user_manager.is_user_registered(user_id):
         await query.edit_message_text(
             text="❌ <b>Пользователь не зарегистрирован</b>\n\nИспользуйте /start для регистрации.",
             parse_mode='HTML'
@@ -267,12 +267,8 @@ async def _handle_open_shift(update: Update, context: ContextTypes.DEFAULT_TYPE)
             # Проверяем: есть ли среди них открытые?
             async with get_async_session() as session:
                 opening_service = ObjectOpeningService(session)
-                open_objects = []
-                
-                for obj in objects:
-                    is_open = await opening_service.is_object_open(obj['id'])
-                    if is_open:
-                        open_objects.append(obj)
+                open_ids = await opening_service.get_open_object_ids(obj['id'] for obj in objects)
+                open_objects = [obj for obj in objects if obj['id'] in open_ids]
             
             if not open_objects:
                 # Нет открытых объектов - предлагаем сначала открыть объект
@@ -423,7 +419,7 @@ async def _handle_close_shift(update: Update, context: ContextTypes.DEFAULT_TYPE
     user_id = user.id
     
     # Проверяем регистрацию пользователя
-    if not user_manager.is_user_registered(user_id):
+    if not await user_manager.is_user_registered(user_id):
         await query.edit_message_text(
             text="❌ <b>Пользователь не зарегистрирован</b>\n\nИспользуйте /start для регистрации.",
             parse_mode='HTML'
@@ -457,19 +453,10 @@ async def _handle_close_shift(update: Update, context: ContextTypes.DEFAULT_TYPE
             # Получаем информацию об объекте и его задачах
             async with get_async_session() as session:
                 from sqlalchemy.orm import selectinload
-                from domain.entities.org_structure import OrgStructureUnit
-                
-                # Загружаем объект с org_unit и всей цепочкой родителей
-                def load_org_hierarchy():
-                    loader = selectinload(Object.org_unit)
-                    # Загружаем до 10 уровней иерархии (достаточно)
-                    current = loader
-                    for _ in range(10):
-                        current = current.selectinload(OrgStructureUnit.parent)
-                    return loader
                 
+                # Загружаем объект с org_unit (чат отчетов берется от подразделения объекта)
                 obj_query = select(Object).options(
-                    load_org_hierarchy()
+                    selectinload(Object.org_unit)
                 ).where(Object.id == shift['object_id'])
                 obj_result = await session.execute(obj_query)
                 obj = obj_result.scalar_one_or_none()
@@ -1020,7 +1007,7 @@ async def _handle_retry_location_open(update: Update, context: ContextTypes.DEFA
         target_object_id = object_id
     
     # Получаем информацию об объекте
-    obj_data = object_service.get_object_by_id(target_object_id)
+    obj_data = await object_service.get_object_by_id(target_object_id)
     if not obj_data:
         await query.edit_message_text(
             text="❌ Объект не найден.",
@@ -1073,7 +1060,7 @@ async def _handle_retry_location_close(update: Update, context: ContextTypes.DEF
         return
     
     # Получаем информацию об объекте
-    obj_data = object_service.get_object_by_id(shift_data['object_id'])
+    obj_data = await object_service.get_object_by_id(shift_data['object_id'])
     if not obj_data:
         await query.edit_message_text(
             text="❌ Объект не найден.",
@@ -19,7 +19,7 @@ async def _handle_manage_timeslots(update: Update, context: ContextTypes.DEFAULT
     user_id = query.from_user.id
     
     # Получаем информацию об объекте
-    obj_data = object_service.get_object_by_id(object_id)
+    obj_data = await object_service.get_object_by_id(object_id)
     if not obj_data:
         await query.edit_message_text(
             text="❌ Объект не найден.",
@@ -85,7 +85,7 @@ async def _handle_create_timeslot(update: Update, context: ContextTypes.DEFAULT_
     query = update.callback_query
     await query.answer()
     
-    obj_data = object_service.get_object_by_id(object_id)
+    obj_data = await object_service.get_object_by_id(object_id)
     
     message = f"➕ <b>Создание тайм-слота</b>\n\n"
     message += f"🏢 <b>Объект:</b> {obj_data['name']}\n"
@@ -241,7 +241,7 @@ async def _handle_edit_single_timeslot(update: Update, context: ContextTypes.DEF
     await query.answer()
     
     # Получаем информацию о тайм-слоте
-    timeslot = time_slot_service.get_timeslot_by_id(timeslot_id)
+    timeslot = await time_slot_service.get_timeslot_by_id(timeslot_id)
     if not timeslot:
         await query.edit_message_text(
             "❌ Тайм-слот не найден.",
@@ -252,7 +252,7 @@ async def _handle_edit_single_timeslot(update: Update, context: ContextTypes.DEF
         return
     
     # Получаем информацию об объекте
-    obj_data = object_service.get_object_by_id(timeslot['object_id'])
+    obj_data = await object_service.get_object_by_id(timeslot['object_id'])
     
     message = f"✏️ <b>Редактирование тайм-слота</b>\n\n"
     message += f"🏢 <b>Объект:</b> {obj_data['name']}\n"
@@ -353,7 +353,7 @@ async def _handle_create_regular_slot(update: Update, context: ContextTypes.DEFA
     query = update.callback_query
     await query.answer()
     
-    obj_data = object_service.get_object_by_id(object_id)
+    obj_data = await object_service.get_object_by_id(object_id)
     
     message = f"🕐 <b>Создание обычного тайм-слота</b>\n\n"
     message += f"🏢 <b>Объект:</b> {obj_data['name']}\n"
@@ -392,7 +392,7 @@ async def _handle_create_additional_slot(update: Update, context: ContextTypes.D
     query = update.callback_query
     await query.answer()
     
-    obj_data = object_service.get_object_by_id(object_id)
+    obj_data = await object_service.get_object_by_id(object_id)
     
     message = f"➕ <b>Создание дополнительного тайм-слота</b>\n\n"
     message += f"🏢 <b>Объект:</b> {obj_data['name']}\n"
@@ -614,7 +614,7 @@ async def _handle_edit_timeslot_time(update: Update, context: ContextTypes.DEFAU
     await query.answer()
     
     # Получаем информацию о тайм-слоте
-    timeslot = time_slot_service.get_timeslot_by_id(timeslot_id)
+    timeslot = await time_slot_service.get_timeslot_by_id(timeslot_id)
     if not timeslot:
         await query.edit_message_text("❌ Тайм-слот не найден.")
         return
@@ -651,7 +651,7 @@ async def _handle_edit_timeslot_rate(update: Update, context: ContextTypes.DEFAU
     await query.answer()
     
     # Получаем информацию о тайм-слоте
-    timeslot = time_slot_service.get_timeslot_by_id(timeslot_id)
+    timeslot = await time_slot_service.get_timeslot_by_id(timeslot_id)
     if not timeslot:
         await query.edit_message_text("❌ Тайм-слот не найден.")
         return
@@ -688,7 +688,7 @@ async def _handle_edit_timeslot_employees(update: Update, context: ContextTypes.
     await query.answer()
     
     # Получаем информацию о тайм-слоте
-    timeslot = time_slot_service.get_timeslot_by_id(timeslot_id)
+    timeslot = await time_slot_service.get_timeslot_by_id(timeslot_id)
     if not timeslot:
         await query.edit_message_text("❌ Тайм-слот не найден.")
         return
@@ -725,7 +725,7 @@ async def _handle_edit_timeslot_notes(update: Update, context: ContextTypes.DEFA
     await query.answer()
     
     # Получаем информацию о тайм-слоте
-    timeslot = time_slot_service.get_timeslot_by_id(timeslot_id)
+    timeslot = await time_slot_service.get_timeslot_by_id(timeslot_id)
     if not timeslot:
         await query.edit_message_text("❌ Тайм-слот не найден.")
         return
@@ -761,14 +761,14 @@ async def _handle_toggle_timeslot_status(update: Update, context: ContextTypes.D
     await query.answer()
     
     # Получаем информацию о тайм-слоте
-    timeslot = time_slot_service.get_timeslot_by_id(timeslot_id)
+    timeslot = await time_slot_service.get_timeslot_by_id(timeslot_id)
     if not timeslot:
         await query.edit_message_text("❌ Тайм-слот не найден.")
         return
     
     # Переключаем статус
     new_status = not timeslot['is_active']
-    result = time_slot_service.update_timeslot_field(timeslot_id, 'is_active', new_status)
+    result = await time_slot_service.update_timeslot_field(timeslot_id, 'is_active', new_status)
     
     if result['success']:
         status_text = "активен" if new_status else "неактивен"
@@ -783,7 +783,7 @@ async def _handle_delete_timeslot(update: Update, context: ContextTypes.DEFAULT_
     await query.answer()
     
     # Получаем информацию о тайм-слоте
-    timeslot = time_slot_service.get_timeslot_by_id(timeslot_id)
+    timeslot = await time_slot_service.get_timeslot_by_id(timeslot_id)
     if not timeslot:
         await query.edit_message_text("❌ Тайм-слот не найден.")
         return
@@ -836,13 +836,13 @@ async def _handle_confirm_delete_timeslot(update: Update, context: ContextTypes.
     await query.answer()
     
     # Получаем информацию о тайм-слоте
-    timeslot = time_slot_service.get_timeslot_by_id(timeslot_id)
+    timeslot = await time_slot_service.get_timeslot_by_id(timeslot_id)
     if not timeslot:
         await query.edit_message_text("❌ Тайм-слот не найден.")
         return
     
     # Удаляем тайм-слот
-    result = time_slot_service.delete_timeslot(timeslot_id)
+    result = await time_slot_service.delete_timeslot(timeslot_id)
     
     if result['success']:
         message = f"✅ <b>Тайм-слот удален!</b>\n\n"
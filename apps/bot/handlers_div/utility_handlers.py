@@ -63,7 +63,7 @@ async def _handle_status_callback(update: Update, context: ContextTypes.DEFAULT_
 """
         else:
             shift = active_shifts[0]
-            obj_data = object_service.get_object_by_id(shift['object_id'])
+            obj_data = await object_service.get_object_by_id(shift['object_id'])
             # Используем часовой пояс объекта
             object_timezone = obj_data.get('timezone', 'Europe/Moscow') if obj_data else 'Europe/Moscow'
             from datetime import datetime
@@ -266,8 +266,8 @@ async def _handle_timeslot_edit_input(update: Update, context: ContextTypes.DEFA
             end_time = time.fromisoformat(end_time_str.strip())
             
             # Обновляем время
-            result1 = time_slot_service.update_timeslot_field(timeslot_id, 'start_time', start_time_str.strip())
-            result2 = time_slot_service.update_timeslot_field(timeslot_id, 'end_time', end_time_str.strip())
+            result1 = await time_slot_service.update_timeslot_field(timeslot_id, 'start_time', start_time_str.strip())
+            result2 = await time_slot_service.update_timeslot_field(timeslot_id, 'end_time', end_time_str.strip())
             
             if result1['success'] and result2['success']:
                 message = f"✅ <b>Время тайм-слота обновлено!</b>\n\n"
@@ -282,7 +282,7 @@ async def _handle_timeslot_edit_input(update: Update, context: ContextTypes.DEFA
     elif action == UserAction.EDIT_TIMESLOT_RATE:
         try:
             rate = float(text)
-            result = time_slot_service.update_timeslot_field(timeslot_id, 'hourly_rate', rate)
+            result = await time_slot_service.update_timeslot_field(timeslot_id, 'hourly_rate', rate)
             
             if result['success']:
                 message = f"✅ <b>Ставка тайм-слота обновлена!</b>\n\n"
@@ -301,7 +301,7 @@ async def _handle_timeslot_edit_input(update: Update, context: ContextTypes.DEFA
                 await update.message.reply_text("❌ Количество сотрудников должно быть от 1 до 10")
                 return
                 
-            result = time_slot_service.update_timeslot_field(timeslot_id, 'max_employees', employees)
+            result = await time_slot_service.update_timeslot_field(timeslot_id, 'max_employees', employees)
             
             if result['success']:
                 message = f"✅ <b>Количество сотрудников обновлено!</b>\n\n"
@@ -315,7 +315,7 @@ async def _handle_timeslot_edit_input(update: Update, context: ContextTypes.DEFA
     
     elif action == UserAction.EDIT_TIMESLOT_NOTES:
         notes = text if text.lower() != 'удалить' else None
-        result = time_slot_service.update_timeslot_field(timeslot_id, 'notes', notes)
+        result = await time_slot_service.update_timeslot_field(timeslot_id, 'notes', notes)
         
         if result['success']:
             message = f"✅ <b>Заметки тайм-слота обновлены!</b>\n\n"
@@ -330,7 +330,7 @@ async def _handle_timeslot_edit_input(update: Update, context: ContextTypes.DEFA
     await user_state_manager.clear_state(user_id)
     
     # Получаем информацию о тайм-слоте для кнопки "Назад"
-    timeslot = time_slot_service.get_timeslot_by_id(timeslot_id)
+    timeslot = await time_slot_service.get_timeslot_by_id(timeslot_id)
     object_id = timeslot['object_id'] if timeslot else None
     
     keyboard = [
@@ -3,11 +3,12 @@
 from typing import List, Dict, Any, Optional
 from datetime import time
 from core.logging.logger import logger
-from core.database.connection import get_sync_session
+from core.database.session import run_in_async_session
 from core.geolocation.location_validator import LocationValidator
 from domain.entities.object import Object
 from domain.entities.user import User
 from sqlalchemy import select
+from sqlalchemy.orm import Session
 
 
 class ObjectService:
@@ -18,8 +19,10 @@ class ObjectService:
         self.location_validator = LocationValidator()
         logger.info("ObjectService initialized")
     
+    @run_in_async_session
     def create_object(
         self,
+        session: Session,
         name: str,
         address: str,
         coordinates: str,
@@ -73,47 +76,46 @@ class ObjectService:
                     'error': 'Время закрытия должно быть позже времени открытия'
                 }
             
-            with get_sync_session() as session:
-                # Находим пользователя по telegram_id для получения его id в БД
+            # Находим пользователя по telegram_id для получения его id в БД
                 
-                user_query = select(User).where(User.telegram_id == owner_id)
-                user_result = session.execute(user_query)
-                db_user = user_result.scalar_one_or_none()
-                
-                if not db_user:
-                    return {
-                        'success': False,
-                        'error': 'Пользователь не найден в базе данных. Обратитесь к администратору.'
-                    }
-                
-                # Создаем объект
-                new_object = Object(
-                    name=name,
-                    address=address,
-                    coordinates=coordinates,
-                    opening_time=opening_time_obj,
-                    closing_time=closing_time_obj,
-                    hourly_rate=hourly_rate,
-                    max_distance_meters=max_distance_meters,
-                    auto_close_minutes=auto_close_minutes,
-                    owner_id=db_user.id,  # Используем id из БД, а не telegram_id
-                    is_active=True
-                )
-                
-                session.add(new_object)
-                session.commit()
-                session.refresh(new_object)
-                
-                logger.info(
-                    f"Object created successfully: {name} (ID: {new_object.id}, owner: {owner_id})"
-                )
+            user_query = select(User).where(User.telegram_id == owner_id)
+            user_result = session.execute(user_query)
+            db_user = user_result.scalar_one_or_none()
                 
+            if not db_user:
                 return {
-                    'success': True,
-                    'object_id': new_object.id,
-                    'message': f'Объект "{name}" успешно создан!'
+                    'success': False,
+                    'error': 'Пользователь не найден в базе данных. Обратитесь к администратору.'
                 }
                 
+            # Создаем объект
+            new_object = Object(
+                name=name,
+                address=address,
+                coordinates=coordinates,
+                opening_time=opening_time_obj,
+                closing_time=closing_time_obj,
+                hourly_rate=hourly_rate,
+                max_distance_meters=max_distance_meters,
+                auto_close_minutes=auto_close_minutes,
+                owner_id=db_user.id,  # Используем id из БД, а не telegram_id
+                is_active=True
+            )
+                
+            session.add(new_object)
+            session.commit()
+            session.refresh(new_object)
+                
+            logger.info(
+                f"Object created successfully: {name} (ID: {new_object.id}, owner: {owner_id})"
+            )
+                
+            return {
+                'success': True,
+                'object_id': new_object.id,
+                'message': f'Объект "{name}" успешно создан!'
+            }
+                
         except Exception as e:
             logger.error(f"Error creating object: {e}")
             return {
@@ -121,7 +123,8 @@ class ObjectService:
                 'error': f'Ошибка при создании объекта: {str(e)}'
             }
     
-    def get_all_objects(self) -> List[Dict[str, Any]]:
+    @run_in_async_session
+    def get_all_objects(self, session: Session) -> List[Dict[str, Any]]:
         """
         Получает все объекты из базы данных.
         
@@ -129,39 +132,39 @@ class ObjectService:
             Список объектов
         """
         try:
-            with get_sync_session() as session:
-                # Получаем все объекты
-                query = select(Object).where(Object.is_active == True)
-                result = session.execute(query)
-                objects = result.scalars().all()
-                
-                # Преобразуем в словари
-                objects_list = []
-                for obj in objects:
-                    objects_list.append({
-                        'id': obj.id,
-                        'name': obj.name,
-                        'address': obj.address,
-                        'coordinates': obj.coordinates,
-                        'hourly_rate': float(obj.hourly_rate) if obj.hourly_rate else 0.0,
-                        'opening_time': obj.opening_time.strftime('%H:%M') if obj.opening_time else None,
-                        'closing_time': obj.closing_time.strftime('%H:%M') if obj.closing_time else None,
-                        'is_active': obj.is_active,
-                        'created_at': obj.created_at.isoformat() if obj.created_at else None,
-                        'max_distance_meters': obj.max_distance_meters or 500
-                    })
-                
-                logger.info(
-                    f"Objects retrieved successfully: {len(objects_list)} objects"
-                )
-                
-                return objects_list
+            # Получаем все объекты
+            query = select(Object).where(Object.is_active == True)
+            result = session.execute(query)
+            objects = result.scalars().all()
+                
+            # Преобразуем в словари
+            objects_list = []
+            for obj in objects:
+                objects_list.append({
+                    'id': obj.id,
+                    'name': obj.name,
+                    'address': obj.address,
+                    'coordinates': obj.coordinates,
+                    'hourly_rate': float(obj.hourly_rate) if obj.hourly_rate else 0.0,
+                    'opening_time': obj.opening_time.strftime('%H:%M') if obj.opening_time else None,
+                    'closing_time': obj.closing_time.strftime('%H:%M') if obj.closing_time else None,
+                    'is_active': obj.is_active,
+                    'created_at': obj.created_at.isoformat() if obj.created_at else None,
+                    'max_distance_meters': obj.max_distance_meters or 500
+                })
+                
+            logger.info(
+                f"Objects retrieved successfully: {len(objects_list)} objects"
+            )
+                
+            return objects_list
                 
         except Exception as e:
             logger.error(f"Error retrieving objects: {e}")
         return []
     
-    def get_object_by_id(self, object_id: int) -> Optional[Dict[str, Any]]:
+    @run_in_async_session
+    def get_object_by_id(self, session: Session, object_id: int) -> Optional[Dict[str, Any]]:
         """
         Получает объект по ID.
         
@@ -172,33 +175,33 @@ class ObjectService:
             Данные объекта или None
         """
         try:
-            with get_sync_session() as session:
-                query = select(Object).where(Object.id == object_id)
-                result = session.execute(query)
-                obj = result.scalar_one_or_none()
+            query = select(Object).where(Object.id == object_id)
+            result = session.execute(query)
+            obj = result.scalar_one_or_none()
                 
-                if not obj:
-                    return None
+            if not obj:
+                return None
                 
-                return {
-                    'id': obj.id,
-                    'name': obj.name,
-                    'address': obj.address,
-                    'coordinates': obj.coordinates,
-                    'hourly_rate': float(obj.hourly_rate) if obj.hourly_rate else 0.0,
-                    'opening_time': obj.opening_time.strftime('%H:%M') if obj.opening_time else None,
-                    'closing_time': obj.closing_time.strftime('%H:%M') if obj.closing_time else None,
-                    'is_active': obj.is_active,
-                    'created_at': obj.created_at.isoformat() if obj.created_at else None,
-                    'max_distance_meters': obj.max_distance_meters or 500,
-                    'timezone': obj.timezone or 'Europe/Moscow'
-                }
+            return {
+                'id': obj.id,
+                'name': obj.name,
+                'address': obj.address,
+                'coordinates': obj.coordinates,
+                'hourly_rate': float(obj.hourly_rate) if obj.hourly_rate else 0.0,
+                'opening_time': obj.opening_time.strftime('%H:%M') if obj.opening_time else None,
+                'closing_time': obj.closing_time.strftime('%H:%M') if obj.closing_time else None,
+                'is_active': obj.is_active,
+                'created_at': obj.created_at.isoformat() if obj.created_at else None,
+                'max_distance_meters': obj.max_distance_meters or 500,
+                'timezone': obj.timezone or 'Europe/Moscow'
+            }
                 
         except Exception as e:
             logger.error(f"Error retrieving object {object_id}: {e}")
         return None
     
-    def get_user_objects(self, owner_id: int) -> List[Dict[str, Any]]:
+    @run_in_async_session
+    def get_user_objects(self, session: Session, owner_id: int) -> List[Dict[str, Any]]:
         """
         Получает все объекты пользователя.
         
@@ -210,50 +213,50 @@ class ObjectService:
         """
         try:
             # Попытка работы с базой данных
-            with get_sync_session() as session:
-                
-                # Получаем пользователя по telegram_id
-                user_query = select(User).where(User.telegram_id == owner_id)
-                user_result = session.execute(user_query)
-                db_user = user_result.scalar_one_or_none()
-                
-                if not db_user:
-                    logger.warning(f"User {owner_id} not found in database")
-                    return []
-                
-                # Получаем объекты пользователя
-                query = select(Object).where(
-                    Object.owner_id == db_user.id,
-                    Object.is_active == True
-                )
-                result = session.execute(query)
-                objects = result.scalars().all()
-                
-                # Преобразуем в словари
-                objects_list = []
-                for obj in objects:
-                    objects_list.append({
-                        'id': obj.id,
-                        'name': obj.name,
-                        'address': obj.address,
-                        'coordinates': obj.coordinates,
-                        'hourly_rate': float(obj.hourly_rate) if obj.hourly_rate else 0.0,
-                        'opening_time': obj.opening_time.strftime('%H:%M') if obj.opening_time else None,
-                        'closing_time': obj.closing_time.strftime('%H:%M') if obj.closing_time else None,
-                        'working_hours': f"{obj.opening_time.strftime('%H:%M')} - {obj.closing_time.strftime('%H:%M')}" if obj.opening_time and obj.closing_time else "Не указано",
-                        'is_active': obj.is_active,
-                        'created_at': obj.created_at.isoformat() if obj.created_at else None,
-                        'max_distance_meters': obj.max_distance_meters or 500
-                    })
-                
-                logger.info(f"User objects retrieved: user_id={owner_id}, count={len(objects_list)}")
-                return objects_list
+                
+            # Получаем пользователя по telegram_id
+            user_query = select(User).where(User.telegram_id == owner_id)
+            user_result = session.execute(user_query)
+            db_user = user_result.scalar_one_or_none()
+                
+            if not db_user:
+                logger.warning(f"User {owner_id} not found in database")
+                return []
+                
+            # Получаем объекты пользователя
+            query = select(Object).where(
+                Object.owner_id == db_user.id,
+                Object.is_active == True
+            )
+            result = session.execute(query)
+            objects = result.scalars().all()
+                
+            # Преобразуем в словари
+            objects_list = []
+            for obj in objects:
+                objects_list.append({
+                    'id': obj.id,
+                    'name': obj.name,
+                    'address': obj.address,
+                    'coordinates': obj.coordinates,
+                    'hourly_rate': float(obj.hourly_rate) if obj.hourly_rate else 0.0,
+                    'opening_time': obj.opening_time.strftime('%H:%M') if obj.opening_time else None,
+                    'closing_time': obj.closing_time.strftime('%H:%M') if obj.closing_time else None,
+                    'working_hours': f"{obj.opening_time.strftime('%H:%M')} - {obj.closing_time.strftime('%H:%M')}" if obj.opening_time and obj.closing_time else "Не указано",
+                    'is_active': obj.is_active,
+                    'created_at': obj.created_at.isoformat() if obj.created_at else None,
+                    'max_distance_meters': obj.max_distance_meters or 500
+                })
+                
+            logger.info(f"User objects retrieved: user_id={owner_id}, count={len(objects_list)}")
+            return objects_list
                 
         except Exception as e:
             logger.error(f"Error retrieving user objects for {owner_id}: {e}")
             return []
     
-    def update_object_field(self, object_id: int, field_name: str, field_value, owner_id: int) -> Dict[str, Any]:
+    @run_in_async_session
+    def update_object_field(self, session: Session, object_id: int, field_name: str, field_value, owner_id: int) -> Dict[str, Any]:
         """
         Обновляет конкретное поле объекта.
         
@@ -267,123 +270,122 @@ class ObjectService:
             Результат обновления
         """
         try:
-            with get_sync_session() as session:
-                # Получаем пользователя по telegram_id
-                user_query = select(User).where(User.telegram_id == owner_id)
-                user_result = session.execute(user_query)
-                db_user = user_result.scalar_one_or_none()
+            # Получаем пользователя по telegram_id
+            user_query = select(User).where(User.telegram_id == owner_id)
+            user_result = session.execute(user_query)
+            db_user = user_result.scalar_one_or_none()
                 
-                if not db_user:
-                    return {
-                        'success': False,
-                        'error': 'Пользователь не найден в базе данных'
-                    }
+            if not db_user:
+                return {
+                    'success': False,
+                    'error': 'Пользователь не найден в базе данных'
+                }
+                
+            # Получаем объект
+            query = select(Object).where(Object.id == object_id)
+            result = session.execute(query)
+            obj = result.scalar_one_or_none()
                 
-                # Получаем объект
-                query = select(Object).where(Object.id == object_id)
-                result = session.execute(query)
-                obj = result.scalar_one_or_none()
+            if not obj:
+                return {
+                    'success': False,
+                    'error': 'Объект не найден'
+                }
+                
+            # Проверяем права доступа
+            if obj.owner_id != db_user.id:
+                return {
+                    'success': False,
+                    'error': 'У вас нет прав для редактирования этого объекта'
+                }
                 
-                if not obj:
+            # Обновляем поле
+            if field_name == 'max_distance_meters':
+                try:
+                    distance = int(field_value)
+                    if distance < 10 or distance > 5000:
+                        return {
+                            'success': False,
+                            'error': 'Максимальное расстояние должно быть от 10 до 5000 метров'
+                        }
+                    obj.max_distance_meters = distance
+                except ValueError:
                     return {
                         'success': False,
-                        'error': 'Объект не найден'
+                        'error': 'Неверное значение расстояния. Введите число.'
                     }
-                
-                # Проверяем права доступа
-                if obj.owner_id != db_user.id:
+            elif field_name == 'name':
+                if not field_value or len(field_value.strip()) < 1:
                     return {
                         'success': False,
-                        'error': 'У вас нет прав для редактирования этого объекта'
+                        'error': 'Название объекта не может быть пустым'
                     }
-                
-                # Обновляем поле
-                if field_name == 'max_distance_meters':
-                    try:
-                        distance = int(field_value)
-                        if distance < 10 or distance > 5000:
-                            return {
-                                'success': False,
-                                'error': 'Максимальное расстояние должно быть от 10 до 5000 метров'
-                            }
-                        obj.max_distance_meters = distance
-                    except ValueError:
+                obj.name = field_value.strip()
+            elif field_name == 'address':
+                obj.address = field_value.strip() if field_value else None
+            elif field_name == 'hourly_rate':
+                try:
+                    rate = float(field_value)
+                    if rate <= 0:
                         return {
                             'success': False,
-                            'error': 'Неверное значение расстояния. Введите число.'
+                            'error': 'Часовая ставка должна быть больше 0'
                         }
-                elif field_name == 'name':
-                    if not field_value or len(field_value.strip()) < 1:
-                        return {
-                            'success': False,
-                            'error': 'Название объекта не может быть пустым'
-                        }
-                    obj.name = field_value.strip()
-                elif field_name == 'address':
-                    obj.address = field_value.strip() if field_value else None
-                elif field_name == 'hourly_rate':
-                    try:
-                        rate = float(field_value)
-                        if rate <= 0:
-                            return {
-                                'success': False,
-                                'error': 'Часовая ставка должна быть больше 0'
-                            }
-                        obj.hourly_rate = rate
-                    except ValueError:
-                        return {
-                            'success': False,
-                            'error': 'Неверное значение часовой ставки. Введите число.'
-                        }
-                elif field_name == 'auto_close_minutes':
-                    try:
-                        minutes = int(field_value)
-                        if minutes < 15 or minutes > 480:
-                            return {
-                                'success': False,
-                                'error': 'Время автоматического закрытия должно быть от 15 до 480 минут (8 часов)'
-                            }
-                        obj.auto_close_minutes = minutes
-                    except ValueError:
-                        return {
-                            'success': False,
-                            'error': 'Неверное значение времени. Введите число в минутах.'
-                        }
-                elif field_name == 'opening_time':
-                    try:
-                        time_obj = time.fromisoformat(field_value)
-                        obj.opening_time = time_obj
-                    except ValueError:
-                        return {
-                            'success': False,
-                            'error': 'Неверный формат времени. Используйте HH:MM (например: 09:00)'
-                        }
-                elif field_name == 'closing_time':
-                    try:
-                        time_obj = time.fromisoformat(field_value)
-                        obj.closing_time = time_obj
-                    except ValueError:
+                    obj.hourly_rate = rate
+                except ValueError:
+                    return {
+                        'success': False,
+                        'error': 'Неверное значение часовой ставки. Введите число.'
+                    }
+            elif field_name == 'auto_close_minutes':
+                try:
+                    minutes = int(field_value)
+                    if minutes < 15 or minutes > 480:
                         return {
                             'success': False,
-                            'error': 'Неверный формат времени. Используйте HH:MM (например: 18:00)'
+                            'error': 'Время автоматического закрытия должно быть от 15 до 480 минут (8 часов)'
                         }
-                else:
+                    obj.auto_close_minutes = minutes
+                except ValueError:
                     return {
                         'success': False,
-                        'error': f'Поле "{field_name}" не поддерживается для редактирования'
+                        'error': 'Неверное значение времени. Введите число в минутах.'
                     }
+            elif field_name == 'opening_time':
+                try:
+                    time_obj = time.fromisoformat(field_value)
+                    obj.opening_time = time_obj
+                except ValueError:
+                    return {
+                        'success': False,
+                        'error': 'Неверный формат времени. Используйте HH:MM (например: 09:00)'
+                    }
+            elif field_name == 'closing_time':
+                try:
+                    time_obj = time.fromisoformat(field_value)
+                    obj.closing_time = time_obj
+                except ValueError:
+                    return {
+                        'success': False,
+                        'error': 'Неверный формат времени. Используйте HH:MM (например: 18:00)'
+                    }
+            else:
+                return {
+                    'success': False,
+                    'error': f'Поле "{field_name}" не поддерживается для редактирования'
+                }
                 
-                session.commit()
+            session.commit()
                 
-                logger.info(f"Object {object_id} field {field_name} updated to {field_value} by user {owner_id}")
+            logger.info(f"Object {object_id} field {field_name} updated to {field_value} by user {owner_id}")
                 
-                return {
-                    'success': True,
-                    'message': f'Поле "{field_name}" успешно обновлено',
-                    'object_id': object_id,
-                    'field_name': field_name,
-                    'new_value': field_value
-                }
+            return {
+                'success': True,
+                'message': f'Поле "{field_name}" успешно обновлено',
+                'object_id': object_id,
+                'field_name': field_name,
+                'new_value': field_value
+            }
                 
         except Exception as e:
             logger.error(f"Error updating object {object_id}: {e}")
@@ -392,7 +394,8 @@ class ObjectService:
                 'error': f'Ошибка при обновлении объекта: {str(e)}'
             }
 
-    def delete_object(self, object_id: int, owner_id: int) -> Dict[str, Any]:
+    @run_in_async_session
+    def delete_object(self, session: Session, object_id: int, owner_id: int) -> Dict[str, Any]:
         """
         Удаляет объект и все связанные с ним данные.
         
@@ -404,85 +407,84 @@ class ObjectService:
             Результат удаления
         """
         try:
-            with get_sync_session() as session:
-                # Получаем пользователя по telegram_id
-                user_query = select(User).where(User.telegram_id == owner_id)
-                user_result = session.execute(user_query)
-                db_user = user_result.scalar_one_or_none()
+            # Получаем пользователя по telegram_id
+            user_query = select(User).where(User.telegram_id == owner_id)
+            user_result = session.execute(user_query)
+            db_user = user_result.scalar_one_or_none()
                 
-                if not db_user:
-                    return {
-                        'success': False,
-                        'error': 'Пользователь не найден в базе данных'
-                    }
+            if not db_user:
+                return {
+                    'success': False,
+                    'error': 'Пользователь не найден в базе данных'
+                }
                 
-                # Получаем объект
-                query = select(Object).where(Object.id == object_id)
-                result = session.execute(query)
-                obj = result.scalar_one_or_none()
+            # Получаем объект
+            query = select(Object).where(Object.id == object_id)
+            result = session.execute(query)
+            obj = result.scalar_one_or_none()
                 
-                if not obj:
-                    return {
-                        'success': False,
-                        'error': 'Объект не найден'
-                    }
+            if not obj:
+                return {
+                    'success': False,
+                    'error': 'Объект не найден'
+                }
                 
-                # Проверяем права доступа
-                if obj.owner_id != db_user.id:
-                    return {
-                        'success': False,
-                        'error': 'У вас нет прав для удаления этого объекта'
-                    }
+            # Проверяем права доступа
+            if obj.owner_id != db_user.id:
+                return {
+                    'success': False,
+                    'error': 'У вас нет прав для удаления этого объекта'
+                }
                 
-                object_name = obj.name
+            object_name = obj.name
                 
-                # Удаляем все связанные данные
-                # 1. Удаляем тайм-слоты
-                from domain.entities.time_slot import TimeSlot
-                timeslots_query = select(TimeSlot).where(TimeSlot.object_id == object_id)
-                timeslots_result = session.execute(timeslots_query)
-                timeslots = timeslots_result.scalars().all()
-                timeslots_count = len(timeslots)
+            # Удаляем все связанные данные
+            # 1. Удаляем тайм-слоты
+            from domain.entities.time_slot import TimeSlot
+            timeslots_query = select(TimeSlot).where(TimeSlot.object_id == object_id)
+            timeslots_result = session.execute(timeslots_query)
+            timeslots = timeslots_result.scalars().all()
+            timeslots_count = len(timeslots)
                 
-                for timeslot in timeslots:
-                    session.delete(timeslot)
+            for timeslot in timeslots:
+                session.delete(timeslot)
                 
-                # 2. Удаляем запланированные смены
-                from domain.entities.shift_schedule import ShiftSchedule
-                shifts_query = select(ShiftSchedule).where(ShiftSchedule.object_id == object_id)
-                shifts_result = session.execute(shifts_query)
-                shifts = shifts_result.scalars().all()
-                shifts_count = len(shifts)
+            # 2. Удаляем запланированные смены
+            from domain.entities.shift_schedule import ShiftSchedule
+            shifts_query = select(ShiftSchedule).where(ShiftSchedule.object_id == object_id)
+            shifts_result = session.execute(shifts_query)
+            shifts = shifts_result.scalars().all()
+            shifts_count = len(shifts)
                 
-                for shift in shifts:
-                    session.delete(shift)
+            for shift in shifts:
+                session.delete(shift)
                 
-                # 3. Удаляем фактические смены
-                from domain.entities.shift import Shift
-                actual_shifts_query = select(Shift).where(Shift.object_id == object_id)
-                actual_shifts_result = session.execute(actual_shifts_query)
-                actual_shifts = actual_shifts_result.scalars().all()
-                actual_shifts_count = len(actual_shifts)
+            # 3. Удаляем фактические смены
+            from domain.entities.shift import Shift
+            actual_shifts_query = select(Shift).where(Shift.object_id == object_id)
+            actual_shifts_result = session.execute(actual_shifts_query)
+            actual_shifts = actual_shifts_result.scalars().all()
+            actual_shifts_count = len(actual_shifts)
                 
-                for shift in actual_shifts:
-                    session.delete(shift)
+            for shift in actual_shifts:
+                session.delete(shift)
                 
-                # 4. Удаляем сам объект
-                session.delete(obj)
+            # 4. Удаляем сам объект
+            session.delete(obj)
                 
-                session.commit()
+            session.commit()
                 
-                logger.info(f"Object {object_id} '{object_name}' deleted by user {owner_id}. "
-                           f"Deleted {timeslots_count} timeslots, {shifts_count} scheduled shifts, "
-                           f"and {actual_shifts_count} actual shifts.")
+            logger.info(f"Object {object_id} '{object_name}' deleted by user {owner_id}. "
+                       f"Deleted {timeslots_count} timeslots, {shifts_count} scheduled shifts, "
+                       f"and {actual_shifts_count} actual shifts.")
                 
-                return {
-                    'success': True,
-                    'message': f'Объект "{object_name}" успешно удален',
-                    'object_name': object_name,
-                    'timeslots_deleted': timeslots_count,
-                    'shifts_deleted': shifts_count + actual_shifts_count
-                }
+            return {
+                'success': True,
+                'message': f'Объект "{object_name}" успешно удален',
+                'object_name': object_name,
+                'timeslots_deleted': timeslots_count,
+                'shifts_deleted': shifts_count + actual_shifts_count
+            }
                 
         except Exception as e:
             logger.error(f"Error deleting object {object_id}: {e}")
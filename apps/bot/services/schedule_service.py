@@ -2,15 +2,22 @@
 
 from typing import Optional, Dict, Any, List, Tuple
 from datetime import datetime, timedelta, time, timezone, date
+import pytz
 from core.logging.logger import logger
 from core.database.session import get_async_session
-from core.utils.timezone_helper import timezone_helper
 from domain.entities.shift_schedule import ShiftSchedule
 from domain.entities.shift import Shift
 from domain.entities.object import Object
 from domain.entities.user import User
 from domain.entities.time_slot import TimeSlot
-from sqlalchemy import select, and_, or_, func
+from shared.services.timeslot_capacity_service import (
+    as_utc,
+    get_object_day_capacity,
+    get_timezone,
+    lock_object_day,
+    lock_timeslot,
+)
+from sqlalchemy import select, and_, or_
 from sqlalchemy.orm import joinedload
 
 
@@ -55,16 +62,10 @@ class ScheduleService:
                         'error': 'На эту дату нет доступных тайм-слотов'
                     }
                 
-                # Получаем забронированные смены на эту дату
-                booked_schedules_query = select(ShiftSchedule).where(
-                    and_(
-                        ShiftSchedule.object_id == object_id,
-                        func.date(ShiftSchedule.planned_start) == target_date,
-                        ShiftSchedule.status.in_(["planned", "confirmed"])
-                    )
-                )
-                booked_result = await session.execute(booked_schedules_query)
-                booked_schedules = booked_result.scalars().all()
+                # Занятость всех слотов объекта-дня одним проходом
+                obj = await session.get(Object, object_id)
+                tz = get_timezone(obj.timezone if obj else None)
+                capacity_by_slot = await get_object_day_capacity(session, time_slots, tz)
                 
                 available_slots = []
                 
@@ -81,27 +82,12 @@ class ScheduleService:
                             if current_time > end_time_plus_minute:
                                 continue
                     
-                    # Подсчитываем занятые места в этом тайм-слоте
-                    occupied_count = 0
-                    for booked_schedule in booked_schedules:
-                        # Проверяем, что смена связана с этим тайм-слотом
-                        if (booked_schedule.time_slot_id == slot.id):
-                            occupied_count += 1
-                        # Если time_slot_id не установлен, проверяем по времени (для старых записей)
-                        elif (booked_schedule.object_id == slot.object_id and
-                              booked_schedule.planned_start.date() == slot.slot_date and
-                              booked_schedule.time_slot_id is None):
-                            # Проверяем пересечение времени
-                            if (booked_schedule.planned_start.time() < slot.end_time and
-                                booked_schedule.planned_end.time() > slot.start_time):
-                                occupied_count += 1
-                    
-                    # Получаем доступные интервалы в слоте
-                    available_intervals = slot.get_available_intervals(booked_schedules)
+                    capacity = capacity_by_slot[slot.id]
+                    # Одновременно занятые места и интервалы, где есть свободное место
+                    occupied_count = capacity.peak
+                    available_intervals = capacity.free_time_intervals()
                     
-                    # Проверяем доступность по количеству сотрудников
-                    if available_intervals and occupied_count < slot.max_employees:
-                        
+                    if available_intervals:
                         available_slots.append({
                             "id": slot.id,
                             "start_time": slot.start_time.strftime('%H:%M'),
@@ -178,10 +164,9 @@ class ScheduleService:
                         'error': 'Пользователь не найден'
                     }
                 
-                # Получаем тайм-слот
-                timeslot_query = select(TimeSlot).where(TimeSlot.id == time_slot_id)
-                timeslot_result = await session.execute(timeslot_query)
-                timeslot = timeslot_result.scalar_one_or_none()
+                # Получаем тайм-слот с блокировкой строки: параллельные бронирования
+                # этого слота ждут коммита и видят уже созданную смену
+                timeslot = await lock_timeslot(session, time_slot_id)
                 
                 if not timeslot:
                     return {
@@ -196,44 +181,46 @@ class ScheduleService:
                         'error': f'Время работы должно быть в пределах тайм-слота: {timeslot.formatted_time_range}'
                     }
                 
-                # Проверяем, что выбранное время соответствует доступному интервалу
-                # Получаем забронированные смены для проверки доступных интервалов
-                booked_schedules_query = select(ShiftSchedule).where(
-                    and_(
-                        ShiftSchedule.object_id == timeslot.object_id,
-                        func.date(ShiftSchedule.planned_start) == timeslot.slot_date,
-                        ShiftSchedule.status.in_(["planned", "confirmed"])
-                    )
-                )
-                booked_result = await session.execute(booked_schedules_query)
-                booked_schedules = booked_result.scalars().all()
-                
-                # Получаем доступные интервалы в тайм-слоте
-                available_intervals = timeslot.get_available_intervals(booked_schedules)
+                # Получаем объект для timezone
+                object_query = select(Object).where(Object.id == timeslot.object_id)
+                object_result = await session.execute(object_query)
+                obj = object_result.scalar_one_or_none()
                 
-                # Проверяем доступность по количеству сотрудников
-                occupied_count = len(booked_schedules)
-                if occupied_count >= timeslot.max_employees:
+                if not obj:
                     return {
                         'success': False,
-                        'error': f'Тайм-слот полностью занят ({occupied_count}/{timeslot.max_employees})'
+                        'error': 'Объект не найден'
                     }
                 
-                # Проверяем, что выбранное время соответствует одному из доступных интервалов
-                time_fits_interval = False
-                for interval in available_intervals:
-                    interval_start, interval_end = interval
-                    if start_time >= interval_start and end_time <= interval_end:
-                        time_fits_interval = True
-                        break
+                object_timezone = obj.timezone if obj.timezone else 'Europe/Moscow'
+                tz = get_timezone(object_timezone)
+                
+                # Создаём naive datetime в локальном времени объекта
+                slot_datetime_naive = datetime.combine(timeslot.slot_date, start_time)
+                end_datetime_naive = datetime.combine(timeslot.slot_date, end_time)
+                
+                # Локализуем в timezone объекта, затем конвертируем в UTC для сохранения
+                slot_datetime_local = tz.localize(slot_datetime_naive)
+                end_datetime_local = tz.localize(end_datetime_naive)
+                slot_datetime = slot_datetime_local.astimezone(pytz.UTC).replace(tzinfo=None)
+                end_datetime = end_datetime_local.astimezone(pytz.UTC).replace(tzinfo=None)
+                
+                # Проверяем, что на выбранное время есть свободное место
+                capacity = (await get_object_day_capacity(session, [timeslot], tz))[timeslot.id]
+                available_intervals = capacity.free_time_intervals()
+                if not available_intervals:
+                    return {
+                        'success': False,
+                        'error': f'Тайм-слот полностью занят ({capacity.peak}/{capacity.max_employees})'
+                    }
                 
-                if not time_fits_interval:
+                if not capacity.fits(slot_datetime_local, end_datetime_local):
                     return {
                         'success': False,
                         'error': 'Выбранное время не соответствует доступным интервалам в тайм-слоте. Доступные интервалы: ' + ", ".join([f"{interval[0].strftime('%H:%M')}-{interval[1].strftime('%H:%M')}" for interval in available_intervals])
                     }
                 
-                # Проверяем доступность времени
+                # Проверяем, что у пользователя нет других смен в это время
                 availability_check = await self._check_time_availability_in_timeslot(
                     session, db_user.id, timeslot, start_time, end_time
                 )
@@ -244,30 +231,6 @@ class ScheduleService:
                         'error': availability_check['error']
                     }
                 
-                # Получаем объект для timezone
-                object_query = select(Object).where(Object.id == timeslot.object_id)
-                object_result = await session.execute(object_query)
-                obj = object_result.scalar_one_or_none()
-                
-                if not obj:
-                    return {
-                        'success': False,
-                        'error': 'Объект не найден'
-                    }
-                
-                # Конвертируем локальное время объекта в UTC для корректного хранения
-                import pytz
-                object_timezone = obj.timezone if obj.timezone else 'Europe/Moscow'
-                tz = pytz.timezone(object_timezone)
-                
-                # Создаём naive datetime в локальном времени объекта
-                slot_datetime_naive = datetime.combine(timeslot.slot_date, start_time)
-                end_datetime_naive = datetime.combine(timeslot.slot_date, end_time)
-                
-                # Локализуем в timezone объекта, затем конвертируем в UTC для сохранения
-                slot_datetime = tz.localize(slot_datetime_naive).astimezone(pytz.UTC).replace(tzinfo=None)
-                end_datetime = tz.localize(end_datetime_naive).astimezone(pytz.UTC).replace(tzinfo=None)
-                
                 logger.info(
                     f"Timezone conversion for bot scheduling",
                     timezone=object_timezone,
@@ -316,7 +279,7 @@ class ScheduleService:
         end_time: time
     ) -> Dict[str, Any]:
         """
-        Проверяет доступность времени в тайм-слоте.
+        Проверяет, что у пользователя нет других смен в это время.
         
         Args:
             session: Сессия БД
@@ -361,32 +324,7 @@ class ScheduleService:
                     'conflicts': conflicts
                 }
             
-            # Проверяем, не превышает ли количество сотрудников лимит тайм-слота
-            if timeslot.max_employees > 1:
-                # Получаем количество уже забронированных смен в этом тайм-слоте
-                booked_count_query = select(func.count(ShiftSchedule.id)).where(
-                    and_(
-                        ShiftSchedule.object_id == timeslot.object_id,
-                        func.date(ShiftSchedule.planned_start) == timeslot.slot_date,
-                        ShiftSchedule.status.in_(["planned", "confirmed"]),
-                        or_(
-                            and_(
-                                ShiftSchedule.planned_start < datetime.combine(timeslot.slot_date, end_time),
-                                ShiftSchedule.planned_end > datetime.combine(timeslot.slot_date, start_time)
-                            )
-                        )
-                    )
-                )
-                
-                booked_count_result = await session.execute(booked_count_query)
-                booked_count = booked_count_result.scalar()
-                
-                if booked_count >= timeslot.max_employees:
-                    return {
-                        'available': False,
-                        'error': f'Тайм-слот уже полностью занят (максимум {timeslot.max_employees} сотрудников)'
-                    }
-            
+            # Вместимость тайм-слота проверяется по занятости (timeslot_capacity_service)
             return {'available': True}
             
         except Exception as e:
@@ -446,6 +384,11 @@ class ScheduleService:
                         'error': 'Объект не найден'
                     }
                 
+                # Смена без привязки занимает место в слотах объекта-дня —
+                # берем ту же блокировку, что и бронирование тайм-слота
+                local_date = as_utc(planned_start).astimezone(get_timezone(obj.timezone)).date()
+                await lock_object_day(session, object_id, local_date)
+                
                 # Проверяем доступность времени
                 availability_check = await self._check_time_availability(
                     session, db_user.id, object_id, planned_start, planned_end
@@ -86,7 +86,10 @@ class ShiftService:
                         'success': False,
                         'error': location_validation['error'],
                         'distance_meters': location_validation.get('distance_meters'),
-                        'max_distance_meters': location_validation.get('max_distance_meters')
+                        'max_distance_meters': location_validation.get('max_distance_meters'),
+                        'nearby_objects': await self._get_nearby_objects(
+                            session, db_user.id, coordinates, exclude_object_id=object_id
+                        ),
                     }
                 
                 # Автоматически открываем объект (если еще не открыт)
@@ -268,17 +271,15 @@ class ShiftService:
                 
                 planned_start = None
                 
-                # Получить late_threshold_minutes из объекта или org_unit
+                # Получить late_threshold_minutes из объекта или org_unit (с учетом наследования)
                 late_threshold_minutes = 0
                 if not obj.inherit_late_settings and obj.late_threshold_minutes is not None:
                     late_threshold_minutes = obj.late_threshold_minutes
-                elif obj.org_unit:
-                    org_unit = obj.org_unit
-                    while org_unit:
-                        if not org_unit.inherit_late_settings and org_unit.late_threshold_minutes is not None:
-                            late_threshold_minutes = org_unit.late_threshold_minutes
-                            break
-                        org_unit = org_unit.parent
+                elif obj.org_unit_id:
+                    from shared.services.org_structure_closure_service import get_unit_settings
+                    unit_settings = await get_unit_settings(session, obj.org_unit_id)
+                    if unit_settings and unit_settings.late_threshold_minutes is not None:
+                        late_threshold_minutes = unit_settings.late_threshold_minutes
                 
                 # Вычисляем planned_start только для ЗАПЛАНИРОВАННЫХ смен
                 planned_start = None
@@ -291,18 +292,6 @@ class ShiftService:
                     object_timezone = obj.timezone or 'Europe/Moscow'
                     object_tz = pytz.timezone(object_timezone)
                     
-                    # Получить late_threshold_minutes из объекта или org_unit
-                    late_threshold_minutes = 0
-                    if not obj.inherit_late_settings and obj.late_threshold_minutes is not None:
-                        late_threshold_minutes = obj.late_threshold_minutes
-                    elif obj.org_unit:
-                        org_unit = obj.org_unit
-                        while org_unit:
-                            if not org_unit.inherit_late_settings and org_unit.late_threshold_minutes is not None:
-                                late_threshold_minutes = org_unit.late_threshold_minutes
-                                break
-                            org_unit = org_unit.parent
-                    
                     # timeslot.start_time уже в локальном времени объекта
                     base_time = dt.combine(timeslot_obj.slot_date, timeslot_obj.start_time)
                     # Локализуем naive datetime в timezone объекта
@@ -373,11 +362,6 @@ class ShiftService:
                     f"Shift opened successfully: shift_id={new_shift.id}, user_id={user_id}, object_id={object_id}, coordinates={coordinates}, distance_meters={location_validation['distance_meters']}"
                 )
                 
-                # Инвалидация кэша календаря
-                from core.cache.redis_cache import cache
-                await cache.clear_pattern("calendar_shifts:*")
-                await cache.clear_pattern("api_response:*")  # API responses
-                
                 # Форматируем время в часовом поясе объекта
                 object_timezone = getattr(obj, 'timezone', None) or 'Europe/Moscow'
                 local_start_time = timezone_helper.format_local_time(new_shift.start_time, object_timezone)
@@ -660,18 +644,11 @@ class ShiftService:
         """Получает объект по ID с загрузкой организационной структуры."""
         try:
             from sqlalchemy.orm import selectinload
-            from domain.entities.org_structure import OrgStructureUnit
-            
-            # Загружаем объект с org_unit и всей цепочкой родителей
-            def load_org_hierarchy():
-                loader = selectinload(Object.org_unit)
-                current = loader
-                for _ in range(10):  # До 10 уровней иерархии
-                    current = current.selectinload(OrgStructureUnit.parent)
-                return loader
             
+            # Наследуемые настройки подразделения читаются из проекции
+            # (org_structure_closure_service), цепочка родителей не нужна
             query = select(Object).options(
-                load_org_hierarchy()
+                selectinload(Object.org_unit)
             ).where(Object.id == object_id)
             result = await session.execute(query)
             return result.scalar_one_or_none()
@@ -679,6 +656,38 @@ class ShiftService:
             logger.error(f"Error getting object {object_id}: {e}")
             return None
     
+    async def _get_nearby_objects(
+        self,
+        session,
+        user_id: int,
+        coordinates: str,
+        exclude_object_id: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Доступные по договорам объекты, в радиусе которых находится пользователь."""
+        try:
+            from domain.entities.contract import Contract
+            from shared.services.contract_validation_service import build_active_contract_filter
+            from datetime import date
+            
+            allowed_query = select(Contract.allowed_objects).where(
+                and_(
+                    Contract.employee_id == user_id,
+                    build_active_contract_filter(date.today())
+                )
+            )
+            object_ids = {
+                object_id
+                for allowed in (await session.execute(allowed_query)).scalars().all()
+                for object_id in (allowed or [])
+                if object_id != exclude_object_id
+            }
+            return await self.location_validator.find_objects_within_distance(
+                session, coordinates, object_ids
+            )
+        except Exception as e:
+            logger.error(f"Error finding nearby objects for user {user_id}: {e}")
+            return []
+    
     async def _get_shift(self, session, shift_id: int) -> Optional[Shift]:
         """Получает смену по ID."""
         try:
@@ -5,7 +5,7 @@ from datetime import datetime, date, time, timedelta
 import pytz
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, or_, func
-from core.database.connection import get_sync_session
+from core.database.session import run_in_async_session
 from domain.entities.time_slot import TimeSlot
 from domain.entities.object import Object
 from domain.entities.shift_schedule import ShiftSchedule
@@ -19,7 +19,8 @@ class TimeSlotService:
         """Инициализация сервиса."""
         logger.info("TimeSlotService initialized")
     
-    def create_default_time_slots(self, object_id: int, start_date: date, 
+    @run_in_async_session
+    def create_default_time_slots(self, db: Session, object_id: int, start_date: date, 
                                  end_date: date) -> List[TimeSlot]:
         """
         Создает стандартные тайм-слоты для объекта на период.
@@ -33,43 +34,43 @@ class TimeSlotService:
             Список созданных тайм-слотов
         """
         try:
-            with get_sync_session() as db:
-                # Получаем объект
-                obj = db.query(Object).filter(Object.id == object_id).first()
-                if not obj:
-                    logger.error(f"Object {object_id} not found")
-                    return []
-                
-                created_slots = []
-                current_date = start_date
-                
-                while current_date <= end_date:
-                    # Создаем стандартный слот в рабочее время
-                    default_slot = TimeSlot(
-                        object_id=object_id,
-                        slot_date=current_date,
-                        start_time=obj.opening_time,
-                        end_time=obj.closing_time,
-                        hourly_rate=float(obj.hourly_rate) if obj.hourly_rate else 0,
-                        max_employees=1,
-                        is_additional=False,
-                        is_active=True
-                    )
+            # Получаем объект
+            obj = db.query(Object).filter(Object.id == object_id).first()
+            if not obj:
+                logger.error(f"Object {object_id} not found")
+                return []
+                
+            created_slots = []
+            current_date = start_date
+                
+            while current_date <= end_date:
+                # Создаем стандартный слот в рабочее время
+                default_slot = TimeSlot(
+                    object_id=object_id,
+                    slot_date=current_date,
+                    start_time=obj.opening_time,
+                    end_time=obj.closing_time,
+                    hourly_rate=float(obj.hourly_rate) if obj.hourly_rate else 0,
+                    max_employees=1,
+                    is_additional=False,
+                    is_active=True
+                )
                     
-                    db.add(default_slot)
-                    created_slots.append(default_slot)
+                db.add(default_slot)
+                created_slots.append(default_slot)
                     
-                    current_date += timedelta(days=1)
+                current_date += timedelta(days=1)
                 
-                db.commit()
-                logger.info(f"Created {len(created_slots)} default time slots for object {object_id}")
-                return created_slots
+            db.commit()
+            logger.info(f"Created {len(created_slots)} default time slots for object {object_id}")
+            return created_slots
                 
         except Exception as e:
             logger.error(f"Error creating default time slots: {e}")
             return []
     
-    def create_additional_time_slot(self, object_id: int, slot_date: date,
+    @run_in_async_session
+    def create_additional_time_slot(self, db: Session, object_id: int, slot_date: date,
                                    start_time: time, end_time: time,
                                    hourly_rate: Optional[float] = None,
                                    max_employees: int = 1,
@@ -90,41 +91,41 @@ class TimeSlotService:
             Созданный тайм-слот или None
         """
         try:
-            with get_sync_session() as db:
-                # Получаем объект для ставки по умолчанию
-                obj = db.query(Object).filter(Object.id == object_id).first()
-                if not obj:
-                    logger.error(f"Object {object_id} not found")
-                    return None
-                
-                # Определяем ставку
-                if hourly_rate is None:
-                    hourly_rate = float(obj.hourly_rate)
-                
-                # Создаем слот
-                time_slot = TimeSlot(
-                    object_id=object_id,
-                    slot_date=slot_date,
-                    start_time=start_time,
-                    end_time=end_time,
-                    hourly_rate=hourly_rate,
-                    max_employees=max_employees,
-                    is_additional=True,
-                    is_active=True,
-                    notes=notes
-                )
-                
-                db.add(time_slot)
-                db.commit()
-                
-                logger.info(f"Created additional time slot for object {object_id}: {slot_date} {start_time}-{end_time}")
-                return time_slot
+            # Получаем объект для ставки по умолчанию
+            obj = db.query(Object).filter(Object.id == object_id).first()
+            if not obj:
+                logger.error(f"Object {object_id} not found")
+                return None
+                
+            # Определяем ставку
+            if hourly_rate is None:
+                hourly_rate = float(obj.hourly_rate)
+                
+            # Создаем слот
+            time_slot = TimeSlot(
+                object_id=object_id,
+                slot_date=slot_date,
+                start_time=start_time,
+                end_time=end_time,
+                hourly_rate=hourly_rate,
+                max_employees=max_employees,
+                is_additional=True,
+                is_active=True,
+                notes=notes
+            )
+                
+            db.add(time_slot)
+            db.commit()
+                
+            logger.info(f"Created additional time slot for object {object_id}: {slot_date} {start_time}-{end_time}")
+            return time_slot
                 
         except Exception as e:
             logger.error(f"Error creating additional time slot: {e}")
             return None
     
-    async def get_object_timeslots(self, object_id: int) -> List[Dict[str, Any]]:
+    @run_in_async_session
+    def get_object_timeslots(self, db: Session, object_id: int) -> List[Dict[str, Any]]:
         """
         Получает все тайм-слоты объекта.
         
@@ -135,41 +136,41 @@ class TimeSlotService:
             Список тайм-слотов в виде словарей
         """
         try:
-            with get_sync_session() as db:
-                timeslots = db.query(TimeSlot).filter(
-                    TimeSlot.object_id == object_id
-                ).order_by(TimeSlot.slot_date, TimeSlot.start_time).all()
-                
-                result = []
-                for ts in timeslots:
-                    result.append({
-                        'id': ts.id,
-                        'object_id': ts.object_id,
-                        'slot_date': ts.slot_date,
-                        'start_time': ts.start_time,
-                        'end_time': ts.end_time,
-                        'hourly_rate': float(ts.hourly_rate) if ts.hourly_rate else None,
-                        'max_employees': ts.max_employees,
-                        'is_additional': ts.is_additional,
-                        'is_active': ts.is_active,
-                        'notes': ts.notes,
-                        'created_at': ts.created_at,
-                        'updated_at': ts.updated_at
-                    })
-                
-                logger.info(f"Retrieved {len(result)} timeslots for object {object_id}")
-                return result
+            timeslots = db.query(TimeSlot).filter(
+                TimeSlot.object_id == object_id
+            ).order_by(TimeSlot.slot_date, TimeSlot.start_time).all()
+                
+            result = []
+            for ts in timeslots:
+                result.append({
+                    'id': ts.id,
+                    'object_id': ts.object_id,
+                    'slot_date': ts.slot_date,
+                    'start_time': ts.start_time,
+                    'end_time': ts.end_time,
+                    'hourly_rate': float(ts.hourly_rate) if ts.hourly_rate else None,
+                    'max_employees': ts.max_employees,
+                    'is_additional': ts.is_additional,
+                    'is_active': ts.is_active,
+                    'notes': ts.notes,
+                    'created_at': ts.created_at,
+                    'updated_at': ts.updated_at
+                })
+                
+            logger.info(f"Retrieved {len(result)} timeslots for object {object_id}")
+            return result
                 
         except Exception as e:
             logger.error(f"Error retrieving object timeslots: {e}")
             return []
     
-    async def create_timeslot(self, object_id: int, slot_date: date,
-                             start_time: time, end_time: time,
-                             is_additional: bool = False,
-                             hourly_rate: Optional[float] = None,
-                             max_employees: int = 1,
-                             notes: Optional[str] = None) -> Dict[str, Any]:
+    @run_in_async_session
+    def create_timeslot(self, db: Session, object_id: int, slot_date: date,
+                       start_time: time, end_time: time,
+                       is_additional: bool = False,
+                       hourly_rate: Optional[float] = None,
+                       max_employees: int = 1,
+                       notes: Optional[str] = None) -> Dict[str, Any]:
         """
         Создает новый тайм-слот.
         
@@ -187,48 +188,48 @@ class TimeSlotService:
             Результат создания
         """
         try:
-            with get_sync_session() as db:
-                # Получаем объект для ставки по умолчанию
-                obj = db.query(Object).filter(Object.id == object_id).first()
-                if not obj:
-                    return {'success': False, 'error': 'Объект не найден'}
-                
-                # Определяем ставку
-                if hourly_rate is None:
-                    hourly_rate = float(obj.hourly_rate) if obj.hourly_rate else 0
-                
-                # Проверяем корректность времени
-                if start_time >= end_time:
-                    return {'success': False, 'error': 'Время начала должно быть меньше времени окончания'}
-                
-                # Создаем тайм-слот
-                timeslot = TimeSlot(
-                    object_id=object_id,
-                    slot_date=slot_date,
-                    start_time=start_time,
-                    end_time=end_time,
-                    hourly_rate=hourly_rate,
-                    max_employees=max_employees,
-                    is_additional=is_additional,
-                    is_active=True,
-                    notes=notes
-                )
-                
-                db.add(timeslot)
-                db.commit()
-                
-                logger.info(f"Created timeslot {timeslot.id} for object {object_id}")
-                return {
-                    'success': True,
-                    'timeslot_id': timeslot.id,
-                    'message': 'Тайм-слот успешно создан'
-                }
+            # Получаем объект для ставки по умолчанию
+            obj = db.query(Object).filter(Object.id == object_id).first()
+            if not obj:
+                return {'success': False, 'error': 'Объект не найден'}
+                
+            # Определяем ставку
+            if hourly_rate is None:
+                hourly_rate = float(obj.hourly_rate) if obj.hourly_rate else 0
+                
+            # Проверяем корректность времени
+            if start_time >= end_time:
+                return {'success': False, 'error': 'Время начала должно быть меньше времени окончания'}
+                
+            # Создаем тайм-слот
+            timeslot = TimeSlot(
+                object_id=object_id,
+                slot_date=slot_date,
+                start_time=start_time,
+                end_time=end_time,
+                hourly_rate=hourly_rate,
+                max_employees=max_employees,
+                is_additional=is_additional,
+                is_active=True,
+                notes=notes
+            )
+                
+            db.add(timeslot)
+            db.commit()
+                
+            logger.info(f"Created timeslot {timeslot.id} for object {object_id}")
+            return {
+                'success': True,
+                'timeslot_id': timeslot.id,
+                'message': 'Тайм-слот успешно создан'
+            }
                 
         except Exception as e:
             logger.error(f"Error creating timeslot: {e}")
             return {'success': False, 'error': f'Ошибка создания тайм-слота: {str(e)}'}
     
-    async def update_timeslot(self, timeslot_id: int, **kwargs) -> Dict[str, Any]:
+    @run_in_async_session
+    def update_timeslot(self, db: Session, timeslot_id: int, **kwargs) -> Dict[str, Any]:
         """
         Обновляет тайм-слот.
         
@@ -240,30 +241,30 @@ class TimeSlotService:
             Результат обновления
         """
         try:
-            with get_sync_session() as db:
-                timeslot = db.query(TimeSlot).filter(TimeSlot.id == timeslot_id).first()
-                if not timeslot:
-                    return {'success': False, 'error': 'Тайм-слот не найден'}
+            timeslot = db.query(TimeSlot).filter(TimeSlot.id == timeslot_id).first()
+            if not timeslot:
+                return {'success': False, 'error': 'Тайм-слот не найден'}
                 
-                # Обновляем поля
-                for field, value in kwargs.items():
-                    if hasattr(timeslot, field):
-                        setattr(timeslot, field, value)
+            # Обновляем поля
+            for field, value in kwargs.items():
+                if hasattr(timeslot, field):
+                    setattr(timeslot, field, value)
                 
-                timeslot.updated_at = datetime.utcnow()
-                db.commit()
+            timeslot.updated_at = datetime.utcnow()
+            db.commit()
                 
-                logger.info(f"Updated timeslot {timeslot_id}")
-                return {
-                    'success': True,
-                    'message': 'Тайм-слот успешно обновлен'
-                }
+            logger.info(f"Updated timeslot {timeslot_id}")
+            return {
+                'success': True,
+                'message': 'Тайм-слот успешно обновлен'
+            }
                 
         except Exception as e:
             logger.error(f"Error updating timeslot: {e}")
             return {'success': False, 'error': f'Ошибка обновления: {str(e)}'}
     
-    async def delete_timeslot(self, timeslot_id: int) -> Dict[str, Any]:
+    @run_in_async_session
+    def delete_timeslot(self, db: Session, timeslot_id: int) -> Dict[str, Any]:
         """
         Удаляет тайм-слот.
         
@@ -274,33 +275,33 @@ class TimeSlotService:
             Результат удаления
         """
         try:
-            with get_sync_session() as db:
-                timeslot = db.query(TimeSlot).filter(TimeSlot.id == timeslot_id).first()
-                if not timeslot:
-                    return {'success': False, 'error': 'Тайм-слот не найден'}
+            timeslot = db.query(TimeSlot).filter(TimeSlot.id == timeslot_id).first()
+            if not timeslot:
+                return {'success': False, 'error': 'Тайм-слот не найден'}
                 
-                # Проверяем, есть ли запланированные смены
-                scheduled_shifts = db.query(ShiftSchedule).filter(
-                    ShiftSchedule.timeslot_id == timeslot_id
-                ).count()
+            # Проверяем, есть ли запланированные смены
+            scheduled_shifts = db.query(ShiftSchedule).filter(
+                ShiftSchedule.timeslot_id == timeslot_id
+            ).count()
                 
-                if scheduled_shifts > 0:
-                    return {'success': False, 'error': 'Нельзя удалить тайм-слот с запланированными сменами'}
+            if scheduled_shifts > 0:
+                return {'success': False, 'error': 'Нельзя удалить тайм-слот с запланированными сменами'}
                 
-                db.delete(timeslot)
-                db.commit()
+            db.delete(timeslot)
+            db.commit()
                 
-                logger.info(f"Deleted timeslot {timeslot_id}")
-                return {
-                    'success': True,
-                    'message': 'Тайм-слот успешно удален'
-                }
+            logger.info(f"Deleted timeslot {timeslot_id}")
+            return {
+                'success': True,
+                'message': 'Тайм-слот успешно удален'
+            }
                 
         except Exception as e:
             logger.error(f"Error deleting timeslot: {e}")
             return {'success': False, 'error': f'Ошибка удаления: {str(e)}'}
     
-    def get_available_time_slots(self, object_id: int, target_date: date) -> List[Dict[str, Any]]:
+    @run_in_async_session
+    def get_available_time_slots(self, db: Session, object_id: int, target_date: date) -> List[Dict[str, Any]]:
         """
         Получает доступные тайм-слоты для объекта на дату.
         
@@ -312,54 +313,54 @@ class TimeSlotService:
             Список доступных слотов с информацией о занятости
         """
         try:
-            with get_sync_session() as db:
-                # Получаем все тайм-слоты на дату
-                time_slots = db.query(TimeSlot).filter(
-                    and_(
-                        TimeSlot.object_id == object_id,
-                        TimeSlot.slot_date == target_date,
-                        TimeSlot.is_active == True
-                    )
-                ).all()
-                
-                if not time_slots:
-                    return []
-                
-                # Получаем забронированные смены на эту дату
-                booked_schedules = db.query(ShiftSchedule).filter(
-                    and_(
-                        ShiftSchedule.object_id == object_id,
-                        func.date(ShiftSchedule.planned_start) == target_date,
-                        ShiftSchedule.status.in_(["planned", "confirmed"])
-                    )
-                ).all()
-                
-                available_slots = []
-                
-                for slot in time_slots:
-                    # Получаем доступные интервалы в слоте
-                    available_intervals = slot.get_available_intervals(booked_schedules)
+            # Получаем все тайм-слоты на дату
+            time_slots = db.query(TimeSlot).filter(
+                and_(
+                    TimeSlot.object_id == object_id,
+                    TimeSlot.slot_date == target_date,
+                    TimeSlot.is_active == True
+                )
+            ).all()
+                
+            if not time_slots:
+                return []
+                
+            # Получаем забронированные смены на эту дату
+            booked_schedules = db.query(ShiftSchedule).filter(
+                and_(
+                    ShiftSchedule.object_id == object_id,
+                    func.date(ShiftSchedule.planned_start) == target_date,
+                    ShiftSchedule.status.in_(["planned", "confirmed"])
+                )
+            ).all()
+                
+            available_slots = []
+                
+            for slot in time_slots:
+                # Получаем доступные интервалы в слоте
+                available_intervals = slot.get_available_intervals(booked_schedules)
                     
-                    if available_intervals:
-                        available_slots.append({
-                            "id": slot.id,
-                            "start_time": slot.start_time,
-                            "end_time": slot.end_time,
-                            "hourly_rate": float(slot.hourly_rate) if slot.hourly_rate else None,
-                            "max_employees": slot.max_employees,
-                            "is_additional": slot.is_additional,
-                            "notes": slot.notes,
-                            "available_intervals": available_intervals,
-                            "total_duration": slot.duration_hours
-                        })
-                
-                return available_slots
+                if available_intervals:
+                    available_slots.append({
+                        "id": slot.id,
+                        "start_time": slot.start_time,
+                        "end_time": slot.end_time,
+                        "hourly_rate": float(slot.hourly_rate) if slot.hourly_rate else None,
+                        "max_employees": slot.max_employees,
+                        "is_additional": slot.is_additional,
+                        "notes": slot.notes,
+                        "available_intervals": available_intervals,
+                        "total_duration": slot.duration_hours
+                    })
+                
+            return available_slots
                 
         except Exception as e:
             logger.error(f"Error getting available time slots: {e}")
             return []
     
-    def book_time_slot(self, user_id: int, time_slot_id: int,
+    @run_in_async_session
+    def book_time_slot(self, db: Session, user_id: int, time_slot_id: int,
                        start_time: time, end_time: time) -> Optional[ShiftSchedule]:
         """
         Бронирует тайм-слот для сотрудника.
@@ -374,47 +375,47 @@ class TimeSlotService:
             Созданная запланированная смена или None
         """
         try:
-            with get_sync_session() as db:
-                # Получаем тайм-слот
-                time_slot = db.query(TimeSlot).filter(TimeSlot.id == time_slot_id).first()
-                if not time_slot:
-                    logger.error(f"Time slot {time_slot_id} not found")
-                    return None
-                
-                # Проверяем доступность
-                booked_schedules = db.query(ShiftSchedule).filter(
-                    and_(
-                        ShiftSchedule.object_id == time_slot.object_id,
-                        func.date(ShiftSchedule.planned_start) == time_slot.slot_date,
-                        ShiftSchedule.status.in_(["planned", "confirmed"])
-                    )
-                ).all()
-                
-                if not time_slot.can_accommodate_employee(start_time, end_time, booked_schedules):
-                    logger.warning(f"Time slot {time_slot_id} cannot accommodate employee at {start_time}-{end_time}")
-                    return None
-                
-                # Создаем запланированную смену
-                shift_schedule = ShiftSchedule(
-                    user_id=user_id,
-                    object_id=time_slot.object_id,
-                    planned_start=datetime.combine(time_slot.slot_date, start_time),
-                    planned_end=datetime.combine(time_slot.slot_date, end_time),
-                    status="planned",
-                    hourly_rate=time_slot.hourly_rate
+            # Получаем тайм-слот
+            time_slot = db.query(TimeSlot).filter(TimeSlot.id == time_slot_id).first()
+            if not time_slot:
+                logger.error(f"Time slot {time_slot_id} not found")
+                return None
+                
+            # Проверяем доступность
+            booked_schedules = db.query(ShiftSchedule).filter(
+                and_(
+                    ShiftSchedule.object_id == time_slot.object_id,
+                    func.date(ShiftSchedule.planned_start) == time_slot.slot_date,
+                    ShiftSchedule.status.in_(["planned", "confirmed"])
                 )
+            ).all()
+                
+            if not time_slot.can_accommodate_employee(start_time, end_time, booked_schedules):
+                logger.warning(f"Time slot {time_slot_id} cannot accommodate employee at {start_time}-{end_time}")
+                return None
                 
-                db.add(shift_schedule)
-                db.commit()
+            # Создаем запланированную смену
+            shift_schedule = ShiftSchedule(
+                user_id=user_id,
+                object_id=time_slot.object_id,
+                planned_start=datetime.combine(time_slot.slot_date, start_time),
+                planned_end=datetime.combine(time_slot.slot_date, end_time),
+                status="planned",
+                hourly_rate=time_slot.hourly_rate
+            )
                 
-                logger.info(f"Booked time slot {time_slot_id} for user {user_id}: {start_time}-{end_time}")
-                return shift_schedule
+            db.add(shift_schedule)
+            db.commit()
+                
+            logger.info(f"Booked time slot {time_slot_id} for user {user_id}: {start_time}-{end_time}")
+            return shift_schedule
                 
         except Exception as e:
             logger.error(f"Error booking time slot: {e}")
             return None
     
-    def update_time_slot(self, time_slot_id: int, **kwargs) -> bool:
+    @run_in_async_session
+    def update_time_slot(self, db: Session, time_slot_id: int, **kwargs) -> bool:
         """
         Обновляет тайм-слот.
         
@@ -426,26 +427,26 @@ class TimeSlotService:
             True если успешно обновлен
         """
         try:
-            with get_sync_session() as db:
-                time_slot = db.query(TimeSlot).filter(TimeSlot.id == time_slot_id).first()
-                if not time_slot:
-                    logger.error(f"Time slot {time_slot_id} not found")
-                    return False
+            time_slot = db.query(TimeSlot).filter(TimeSlot.id == time_slot_id).first()
+            if not time_slot:
+                logger.error(f"Time slot {time_slot_id} not found")
+                return False
                 
-                # Обновляем поля
-                for key, value in kwargs.items():
-                    if hasattr(time_slot, key):
-                        setattr(time_slot, key, value)
+            # Обновляем поля
+            for key, value in kwargs.items():
+                if hasattr(time_slot, key):
+                    setattr(time_slot, key, value)
                 
-                db.commit()
-                logger.info(f"Updated time slot {time_slot_id}")
-                return True
+            db.commit()
+            logger.info(f"Updated time slot {time_slot_id}")
+            return True
                 
         except Exception as e:
             logger.error(f"Error updating time slot: {e}")
             return False
     
-    def delete_time_slot(self, time_slot_id: int) -> bool:
+    @run_in_async_session
+    def delete_time_slot(self, db: Session, time_slot_id: int) -> bool:
         """
         Удаляет тайм-слот.
         
@@ -456,119 +457,119 @@ class TimeSlotService:
             True если успешно удален
         """
         try:
-            with get_sync_session() as db:
-                time_slot = db.query(TimeSlot).filter(TimeSlot.id == time_slot_id).first()
-                if not time_slot:
-                    logger.error(f"Time slot {time_slot_id} not found")
-                    return False
-                
-                # Проверяем, есть ли забронированные смены
-                booked_count = db.query(ShiftSchedule).filter(
-                    and_(
-                        ShiftSchedule.object_id == time_slot.object_id,
-                        func.date(ShiftSchedule.planned_start) == time_slot.slot_date,
-                        ShiftSchedule.status.in_(["planned", "confirmed"])
-                    )
-                ).count()
-                
-                if booked_count > 0:
-                    logger.warning(f"Cannot delete time slot {time_slot_id}: {booked_count} booked schedules")
-                    return False
-                
-                db.delete(time_slot)
-                db.commit()
-                
-                logger.info(f"Deleted time slot {time_slot_id}")
-                return True
+            time_slot = db.query(TimeSlot).filter(TimeSlot.id == time_slot_id).first()
+            if not time_slot:
+                logger.error(f"Time slot {time_slot_id} not found")
+                return False
+                
+            # Проверяем, есть ли забронированные смены
+            booked_count = db.query(ShiftSchedule).filter(
+                and_(
+                    ShiftSchedule.object_id == time_slot.object_id,
+                    func.date(ShiftSchedule.planned_start) == time_slot.slot_date,
+                    ShiftSchedule.status.in_(["planned", "confirmed"])
+                )
+            ).count()
+                
+            if booked_count > 0:
+                logger.warning(f"Cannot delete time slot {time_slot_id}: {booked_count} booked schedules")
+                return False
+                
+            db.delete(time_slot)
+            db.commit()
+                
+            logger.info(f"Deleted time slot {time_slot_id}")
+            return True
                 
         except Exception as e:
             logger.error(f"Error deleting time slot: {e}")
             return False
     
-    async def auto_close_expired_shifts(self) -> Dict[str, Any]:
+    @run_in_async_session
+    def auto_close_expired_shifts(self, db: Session) -> Dict[str, Any]:
         """Автоматически закрывает просроченные смены."""
         try:
             now = datetime.now()
             
-            with get_sync_session() as db:
-                # Получаем все активные смены, которые должны быть закрыты
-                expired_shifts = db.query(ShiftSchedule).join(Object).filter(
-                    and_(
-                        ShiftSchedule.status == 'active',
-                        ShiftSchedule.end_time < now
-                    )
-                ).all()
-                
-                closed_count = 0
-                errors = []
-                
-                for shift in expired_shifts:
-                    try:
-                        # Проверяем, прошло ли достаточно времени для авто-закрытия
-                        object_auto_close_minutes = getattr(shift.object, 'auto_close_minutes', 60)
-                        close_deadline = shift.end_time + timedelta(minutes=object_auto_close_minutes)
-                        if now < close_deadline:
-                            logger.debug(f"Shift {shift.id} not ready for auto-close yet")
-                            continue
+            # Получаем все активные смены, которые должны быть закрыты
+            expired_shifts = db.query(ShiftSchedule).join(Object).filter(
+                and_(
+                    ShiftSchedule.status == 'active',
+                    ShiftSchedule.end_time < now
+                )
+            ).all()
+                
+            closed_count = 0
+            errors = []
+                
+            for shift in expired_shifts:
+                try:
+                    # Проверяем, прошло ли достаточно времени для авто-закрытия
+                    object_auto_close_minutes = getattr(shift.object, 'auto_close_minutes', 60)
+                    close_deadline = shift.end_time + timedelta(minutes=object_auto_close_minutes)
+                    if now < close_deadline:
+                        logger.debug(f"Shift {shift.id} not ready for auto-close yet")
+                        continue
 
-                        # Определяем локальное время закрытия объекта
-                        timezone = shift.object.timezone if shift.object and shift.object.timezone else 'Europe/Moscow'
-                        local_tz = pytz.timezone(timezone)
+                    # Определяем локальное время закрытия объекта
+                    timezone = shift.object.timezone if shift.object and shift.object.timezone else 'Europe/Moscow'
+                    local_tz = pytz.timezone(timezone)
 
-                        # Находим конец рабочего дня (используем время окончания тайм-слота)
-                        if shift.object and shift.object.closing_time:
-                            closing_dt = datetime.combine(shift.end_time.date(), shift.object.closing_time)
-                            closing_dt = local_tz.localize(closing_dt).astimezone(pytz.UTC)
-                        else:
-                            closing_dt = shift.end_time
+                    # Находим конец рабочего дня (используем время окончания тайм-слота)
+                    if shift.object and shift.object.closing_time:
+                        closing_dt = datetime.combine(shift.end_time.date(), shift.object.closing_time)
+                        closing_dt = local_tz.localize(closing_dt).astimezone(pytz.UTC)
+                    else:
+                        closing_dt = shift.end_time
 
-                        # Смена может закончиться либо по времени объекта, либо по дедлайну
-                        actual_end_time = max(closing_dt, close_deadline)
-                        actual_end_time = min(actual_end_time, now)
+                    # Смена может закончиться либо по времени объекта, либо по дедлайну
+                    actual_end_time = max(closing_dt, close_deadline)
+                    actual_end_time = min(actual_end_time, now)
 
-                        shift.status = 'completed'
-                        shift.actual_end_time = actual_end_time
-                        if not hasattr(shift, 'auto_closed'):
-                            shift.auto_closed = True
+                    shift.status = 'completed'
+                    shift.actual_end_time = actual_end_time
+                    if not hasattr(shift, 'auto_closed'):
+                        shift.auto_closed = True
 
-                        closed_count += 1
-                        logger.info(f"Auto-closed expired shift {shift.id} for user {shift.user_id}")
+                    closed_count += 1
+                    logger.info(f"Auto-closed expired shift {shift.id} for user {shift.user_id}")
                         
-                    except Exception as e:
-                        error_msg = f"Error auto-closing shift {shift.id}: {e}"
-                        logger.error(error_msg)
-                        errors.append(error_msg)
+                except Exception as e:
+                    error_msg = f"Error auto-closing shift {shift.id}: {e}"
+                    logger.error(error_msg)
+                    errors.append(error_msg)
                 
-                # Сохраняем изменения
-                db.commit()
+            # Сохраняем изменения
+            db.commit()
                 
-                return {
-                    "success": True,
-                    "closed_count": closed_count,
-                    "errors": errors
-                }
+            return {
+                "success": True,
+                "closed_count": closed_count,
+                "errors": errors
+            }
                 
         except Exception as e:
             logger.error(f"Error in auto_close_expired_shifts: {e}")
             return {"success": False, "error": str(e)}
     
-    async def get_expired_shifts_count(self) -> int:
+    @run_in_async_session
+    def get_expired_shifts_count(self, db: Session) -> int:
         """Получает количество просроченных смен для мониторинга."""
         try:
             now = datetime.now()
-            with get_sync_session() as db:
-                expired_shifts = db.query(ShiftSchedule).join(Object).filter(
-                    and_(
-                        ShiftSchedule.status == 'active',
-                        ShiftSchedule.end_time < now
-                    )
-                ).all()
-                return len(expired_shifts)
+            expired_shifts = db.query(ShiftSchedule).join(Object).filter(
+                and_(
+                    ShiftSchedule.status == 'active',
+                    ShiftSchedule.end_time < now
+                )
+            ).all()
+            return len(expired_shifts)
         except Exception as e:
             logger.error(f"Error getting expired shifts count: {e}")
             return 0
     
-    def get_object_time_slots(self, object_id: int, start_date: date, 
+    @run_in_async_session
+    def get_object_time_slots(self, db: Session, object_id: int, start_date: date, 
                              end_date: date) -> List[TimeSlot]:
         """
         Получает все тайм-слоты объекта за период.
@@ -582,23 +583,23 @@ class TimeSlotService:
             Список тайм-слотов
         """
         try:
-            with get_sync_session() as db:
-                time_slots = db.query(TimeSlot).filter(
-                    and_(
-                        TimeSlot.object_id == object_id,
-                        TimeSlot.slot_date >= start_date,
-                        TimeSlot.slot_date <= end_date,
-                        TimeSlot.is_active == True
-                    )
-                ).order_by(TimeSlot.slot_date, TimeSlot.start_time).all()
-                
-                return time_slots
+            time_slots = db.query(TimeSlot).filter(
+                and_(
+                    TimeSlot.object_id == object_id,
+                    TimeSlot.slot_date >= start_date,
+                    TimeSlot.slot_date <= end_date,
+                    TimeSlot.is_active == True
+                )
+            ).order_by(TimeSlot.slot_date, TimeSlot.start_time).all()
+                
+            return time_slots
                 
         except Exception as e:
             logger.error(f"Error getting object time slots: {e}")
             return []
     
-    async def create_timeslot_for_date(self, object_id: int, slot_date: str, is_additional: bool = False) -> Dict[str, Any]:
+    @run_in_async_session
+    def create_timeslot_for_date(self, db: Session, object_id: int, slot_date: str, is_additional: bool = False) -> Dict[str, Any]:
         """
         Создает тайм-слот на конкретную дату.
         
@@ -614,12 +615,80 @@ class TimeSlotService:
             # Парсим дату
             parsed_date = datetime.strptime(slot_date, '%Y-%m-%d').date()
             
-            with get_sync_session() as db:
-                # Получаем объект
-                obj = db.query(Object).filter(Object.id == object_id).first()
-                if not obj:
-                    return {'success': False, 'error': 'Объект не найден'}
+            # Получаем объект
+            obj = db.query(Object).filter(Object.id == object_id).first()
+            if not obj:
+                return {'success': False, 'error': 'Объект не найден'}
+                
+            # Определяем время для слота
+            if is_additional:
+                # Дополнительный слот - можно в любое время
+                start_time = time(20, 0)  # 20:00
+                end_time = time(23, 0)    # 23:00
+                hourly_rate = float(obj.hourly_rate) * 1.2 if obj.hourly_rate else 0  # +20% к ставке
+            else:
+                # Обычный слот - в рабочее время
+                start_time = obj.opening_time or time(9, 0)
+                end_time = obj.closing_time or time(18, 0)
+                hourly_rate = float(obj.hourly_rate) if obj.hourly_rate else 0
+                
+            # Создаем тайм-слот
+            timeslot = TimeSlot(
+                object_id=object_id,
+                slot_date=parsed_date,
+                start_time=start_time,
+                end_time=end_time,
+                hourly_rate=hourly_rate,
+                max_employees=1,
+                is_additional=is_additional,
+                is_active=True
+            )
+                
+            db.add(timeslot)
+            db.commit()
+                
+            logger.info(f"Created timeslot {timeslot.id} for object {object_id} on {slot_date}")
+            return {
+                'success': True,
+                'timeslot_id': timeslot.id,
+                'start_time': start_time.strftime('%H:%M'),
+                'end_time': end_time.strftime('%H:%M'),
+                'hourly_rate': hourly_rate,
+                'message': 'Тайм-слот успешно создан'
+            }
+                
+        except ValueError as e:
+            logger.error(f"Invalid date format: {slot_date}")
+            return {'success': False, 'error': 'Неверный формат даты'}
+        except Exception as e:
+            logger.error(f"Error creating timeslot for date: {e}")
+            return {'success': False, 'error': f'Ошибка создания тайм-слота: {str(e)}'}
+    
+    @run_in_async_session
+    def create_timeslots_for_week(self, db: Session, object_id: int, is_additional: bool = False) -> Dict[str, Any]:
+        """
+        Создает тайм-слоты на неделю.
+        
+        Args:
+            object_id: ID объекта
+            is_additional: Дополнительные слоты
+            
+        Returns:
+            Результат создания
+        """
+        try:
+            # Получаем объект
+            obj = db.query(Object).filter(Object.id == object_id).first()
+            if not obj:
+                return {'success': False, 'error': 'Объект не найден'}
+                
+            created_count = 0
+            today = date.today()
                 
+            # Создаем слоты на следующие 7 дней
+            for i in range(7):
+                slot_date = today + timedelta(days=i)
+                    
                 # Определяем время для слота
                 if is_additional:
                     # Дополнительный слот - можно в любое время
@@ -631,11 +700,11 @@ class TimeSlotService:
                     start_time = obj.opening_time or time(9, 0)
                     end_time = obj.closing_time or time(18, 0)
                     hourly_rate = float(obj.hourly_rate) if obj.hourly_rate else 0
-                
+                    
                 # Создаем тайм-слот
                 timeslot = TimeSlot(
                     object_id=object_id,
-                    slot_date=parsed_date,
+                    slot_date=slot_date,
                     start_time=start_time,
                     end_time=end_time,
                     hourly_rate=hourly_rate,
@@ -643,94 +712,26 @@ class TimeSlotService:
                     is_additional=is_additional,
                     is_active=True
                 )
-                
-                db.add(timeslot)
-                db.commit()
-                
-                logger.info(f"Created timeslot {timeslot.id} for object {object_id} on {slot_date}")
-                return {
-                    'success': True,
-                    'timeslot_id': timeslot.id,
-                    'start_time': start_time.strftime('%H:%M'),
-                    'end_time': end_time.strftime('%H:%M'),
-                    'hourly_rate': hourly_rate,
-                    'message': 'Тайм-слот успешно создан'
-                }
-                
-        except ValueError as e:
-            logger.error(f"Invalid date format: {slot_date}")
-            return {'success': False, 'error': 'Неверный формат даты'}
-        except Exception as e:
-            logger.error(f"Error creating timeslot for date: {e}")
-            return {'success': False, 'error': f'Ошибка создания тайм-слота: {str(e)}'}
-    
-    async def create_timeslots_for_week(self, object_id: int, is_additional: bool = False) -> Dict[str, Any]:
-        """
-        Создает тайм-слоты на неделю.
-        
-        Args:
-            object_id: ID объекта
-            is_additional: Дополнительные слоты
-            
-        Returns:
-            Результат создания
-        """
-        try:
-            with get_sync_session() as db:
-                # Получаем объект
-                obj = db.query(Object).filter(Object.id == object_id).first()
-                if not obj:
-                    return {'success': False, 'error': 'Объект не найден'}
-                
-                created_count = 0
-                today = date.today()
-                
-                # Создаем слоты на следующие 7 дней
-                for i in range(7):
-                    slot_date = today + timedelta(days=i)
-                    
-                    # Определяем время для слота
-                    if is_additional:
-                        # Дополнительный слот - можно в любое время
-                        start_time = time(20, 0)  # 20:00
-                        end_time = time(23, 0)    # 23:00
-                        hourly_rate = float(obj.hourly_rate) * 1.2 if obj.hourly_rate else 0  # +20% к ставке
-                    else:
-                        # Обычный слот - в рабочее время
-                        start_time = obj.opening_time or time(9, 0)
-                        end_time = obj.closing_time or time(18, 0)
-                        hourly_rate = float(obj.hourly_rate) if obj.hourly_rate else 0
-                    
-                    # Создаем тайм-слот
-                    timeslot = TimeSlot(
-                        object_id=object_id,
-                        slot_date=slot_date,
-                        start_time=start_time,
-                        end_time=end_time,
-                        hourly_rate=hourly_rate,
-                        max_employees=1,
-                        is_additional=is_additional,
-                        is_active=True
-                    )
                     
-                    db.add(timeslot)
-                    created_count += 1
+                db.add(timeslot)
+                created_count += 1
                 
-                db.commit()
+            db.commit()
                 
-                logger.info(f"Created {created_count} timeslots for object {object_id}")
-                return {
-                    'success': True,
-                    'created_count': created_count,
-                    'hourly_rate': hourly_rate,
-                    'message': f'Создано {created_count} тайм-слотов'
-                }
+            logger.info(f"Created {created_count} timeslots for object {object_id}")
+            return {
+                'success': True,
+                'created_count': created_count,
+                'hourly_rate': hourly_rate,
+                'message': f'Создано {created_count} тайм-слотов'
+            }
                 
         except Exception as e:
             logger.error(f"Error creating timeslots for week: {e}")
             return {'success': False, 'error': f'Ошибка создания тайм-слотов: {str(e)}'}
 
-    def get_timeslot_by_id(self, timeslot_id: int) -> Optional[Dict[str, Any]]:
+    @run_in_async_session
+    def get_timeslot_by_id(self, db: Session, timeslot_id: int) -> Optional[Dict[str, Any]]:
         """
         Получает тайм-слот по ID.
         
@@ -741,30 +742,30 @@ class TimeSlotService:
             Данные тайм-слота или None
         """
         try:
-            with get_sync_session() as db:
-                timeslot = db.query(TimeSlot).filter(TimeSlot.id == timeslot_id).first()
-                if not timeslot:
-                    return None
-                
-                return {
-                    'id': timeslot.id,
-                    'object_id': timeslot.object_id,
-                    'slot_date': timeslot.slot_date,
-                    'start_time': timeslot.start_time.strftime('%H:%M') if timeslot.start_time else None,
-                    'end_time': timeslot.end_time.strftime('%H:%M') if timeslot.end_time else None,
-                    'hourly_rate': float(timeslot.hourly_rate) if timeslot.hourly_rate else 0.0,
-                    'max_employees': timeslot.max_employees or 1,
-                    'notes': timeslot.notes,
-                    'is_active': timeslot.is_active,
-                    'is_additional': timeslot.is_additional,
-                    'created_at': timeslot.created_at.isoformat() if timeslot.created_at else None
-                }
+            timeslot = db.query(TimeSlot).filter(TimeSlot.id == timeslot_id).first()
+            if not timeslot:
+                return None
+                
+            return {
+                'id': timeslot.id,
+                'object_id': timeslot.object_id,
+                'slot_date': timeslot.slot_date,
+                'start_time': timeslot.start_time.strftime('%H:%M') if timeslot.start_time else None,
+                'end_time': timeslot.end_time.strftime('%H:%M') if timeslot.end_time else None,
+                'hourly_rate': float(timeslot.hourly_rate) if timeslot.hourly_rate else 0.0,
+                'max_employees': timeslot.max_employees or 1,
+                'notes': timeslot.notes,
+                'is_active': timeslot.is_active,
+                'is_additional': timeslot.is_additional,
+                'created_at': timeslot.created_at.isoformat() if timeslot.created_at else None
+            }
                 
         except Exception as e:
             logger.error(f"Error retrieving timeslot {timeslot_id}: {e}")
             return None
 
-    def update_timeslot_field(self, timeslot_id: int, field_name: str, field_value: Any) -> Dict[str, Any]:
+    @run_in_async_session
+    def update_timeslot_field(self, db: Session, timeslot_id: int, field_name: str, field_value: Any) -> Dict[str, Any]:
         """
         Обновляет поле тайм-слота.
         
@@ -777,42 +778,42 @@ class TimeSlotService:
             Результат обновления
         """
         try:
-            with get_sync_session() as db:
-                timeslot = db.query(TimeSlot).filter(TimeSlot.id == timeslot_id).first()
-                if not timeslot:
-                    return {'success': False, 'error': 'Тайм-слот не найден'}
-                
-                # Обновляем поле
-                if field_name == 'is_active':
-                    timeslot.is_active = bool(field_value)
-                elif field_name == 'hourly_rate':
-                    timeslot.hourly_rate = float(field_value)
-                elif field_name == 'max_employees':
-                    timeslot.max_employees = int(field_value)
-                elif field_name == 'notes':
-                    timeslot.notes = str(field_value) if field_value != 'удалить' else None
-                elif field_name == 'start_time':
-                    from datetime import time
-                    timeslot.start_time = time.fromisoformat(field_value)
-                elif field_name == 'end_time':
-                    from datetime import time
-                    timeslot.end_time = time.fromisoformat(field_value)
-                else:
-                    return {'success': False, 'error': f'Неизвестное поле: {field_name}'}
-                
-                db.commit()
-                logger.info(f"Updated timeslot {timeslot_id} field {field_name} to {field_value}")
-                
-                return {
-                    'success': True,
-                    'message': f'Поле {field_name} успешно обновлено'
-                }
+            timeslot = db.query(TimeSlot).filter(TimeSlot.id == timeslot_id).first()
+            if not timeslot:
+                return {'success': False, 'error': 'Тайм-слот не найден'}
+                
+            # Обновляем поле
+            if field_name == 'is_active':
+                timeslot.is_active = bool(field_value)
+            elif field_name == 'hourly_rate':
+                timeslot.hourly_rate = float(field_value)
+            elif field_name == 'max_employees':
+                timeslot.max_employees = int(field_value)
+            elif field_name == 'notes':
+                timeslot.notes = str(field_value) if field_value != 'удалить' else None
+            elif field_name == 'start_time':
+                from datetime import time
+                timeslot.start_time = time.fromisoformat(field_value)
+            elif field_name == 'end_time':
+                from datetime import time
+                timeslot.end_time = time.fromisoformat(field_value)
+            else:
+                return {'success': False, 'error': f'Неизвестное поле: {field_name}'}
+                
+            db.commit()
+            logger.info(f"Updated timeslot {timeslot_id} field {field_name} to {field_value}")
+                
+            return {
+                'success': True,
+                'message': f'Поле {field_name} успешно обновлено'
+            }
                 
         except Exception as e:
             logger.error(f"Error updating timeslot {timeslot_id} field {field_name}: {e}")
             return {'success': False, 'error': f'Ошибка обновления: {str(e)}'}
 
-    def delete_timeslot(self, timeslot_id: int) -> Dict[str, Any]:
+    @run_in_async_session
+    def delete_timeslot(self, db: Session, timeslot_id: int) -> Dict[str, Any]:
         """
         Удаляет тайм-слот.
         
@@ -823,30 +824,29 @@ class TimeSlotService:
             Результат удаления
         """
         try:
-            with get_sync_session() as db:
-                timeslot = db.query(TimeSlot).filter(TimeSlot.id == timeslot_id).first()
-                if not timeslot:
-                    return {'success': False, 'error': 'Тайм-слот не найден'}
-                
-                # Получаем информацию о тайм-слоте для логирования
-                slot_date = timeslot.slot_date
-                start_time = timeslot.start_time.strftime('%H:%M') if timeslot.start_time else None
-                end_time = timeslot.end_time.strftime('%H:%M') if timeslot.end_time else None
-                object_id = timeslot.object_id
-                
-                # Удаляем тайм-слот
-                db.delete(timeslot)
-                db.commit()
-                
-                logger.info(f"Deleted timeslot {timeslot_id} for object {object_id} on {slot_date}")
-                
-                return {
-                    'success': True,
-                    'message': 'Тайм-слот успешно удален',
-                    'slot_date': slot_date,
-                    'start_time': start_time,
-                    'end_time': end_time
-                }
+            timeslot = db.query(TimeSlot).filter(TimeSlot.id == timeslot_id).first()
+            if not timeslot:
+                return {'success': False, 'error': 'Тайм-слот не найден'}
+                
+            # Получаем информацию о тайм-слоте для логирования
+            slot_date = timeslot.slot_date
+            start_time = timeslot.start_time.strftime('%H:%M') if timeslot.start_time else None
+            end_time = timeslot.end_time.strftime('%H:%M') if timeslot.end_time else None
+            object_id = timeslot.object_id
+                
+            # Удаляем тайм-слот
+            db.delete(timeslot)
+            db.commit()
+                
+            logger.info(f"Deleted timeslot {timeslot_id} for object {object_id} on {slot_date}")
+                
+            return {
+                'success': True,
+                'message': 'Тайм-слот успешно удален',
+                'slot_date': slot_date,
+                'start_time': start_time,
+                'end_time': end_time
+            }
                 
         except Exception as e:
             logger.error(f"Error deleting timeslot {timeslot_id}: {e}")
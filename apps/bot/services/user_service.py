@@ -3,7 +3,8 @@
 from typing import Optional, Dict, Any
 from datetime import datetime
 from core.logging.logger import logger
-from core.database.connection import get_async_session, get_sync_session
+from core.database.session import get_async_session
+from sqlalchemy import select
 from domain.entities.user import User
 
 
@@ -112,13 +113,13 @@ class UserService:
         # Заглушка для MVP
         return 0.0
     
-    def get_user_by_telegram_id(self, telegram_id: int) -> Optional[Dict[str, Any]]:
-        """Синхронное получение пользователя по Telegram ID."""
+    async def get_user_by_telegram_id(self, telegram_id: int) -> Optional[Dict[str, Any]]:
+        """Получение пользователя по Telegram ID."""
         try:
             logger.info(f"Searching for user with telegram_id: {telegram_id}")
-            db = get_sync_session()
-            try:
-                user = db.query(User).filter(User.telegram_id == telegram_id).first()
+            async with get_async_session() as session:
+                result = await session.execute(select(User).where(User.telegram_id == telegram_id))
+                user = result.scalar_one_or_none()
                 
                 if not user:
                     logger.warning(f"User not found for telegram_id: {telegram_id}")
@@ -135,8 +136,6 @@ class UserService:
                     'role': user.role,
                     'is_active': user.is_active
                 }
-            finally:
-                db.close()
                 
         except Exception as e:
             logger.error(f"Failed to get user by telegram_id: {e}")
@@ -4,7 +4,6 @@ FastAPI приложение с Jinja2 шаблонами для управле
 """
 
 from fastapi import FastAPI, Request, Depends, HTTPException, status
-from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
@@ -79,6 +78,10 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print(f"❌ Ошибка отключения от Redis: {e}")
     
+    # Остановка воркеров генерации PDF
+    from core.pdf.render_pool import pdf_render_pool
+    pdf_render_pool.shutdown(wait=False)
+    
     # Закрытие базы данных
     from core.database.session import close_database
     try:
@@ -116,6 +119,10 @@ app.add_middleware(RateLimitMiddleware)
 from apps.web.middleware.features_middleware import FeaturesMiddleware
 app.add_middleware(FeaturesMiddleware)
 
+# Метрики HTTP запросов и бюджет запросов к БД (добавлен последним — внешний слой)
+from core.monitoring.middleware import RequestMetricsMiddleware
+app.add_middleware(RequestMetricsMiddleware)
+
 # Middleware для принудительного HTTPS
 @app.middleware("http")
 async def force_https(request: Request, call_next):
@@ -142,8 +149,13 @@ async def force_https(request: Request, call_next):
     response = await call_next(request)
     return response
 
-# Настройка статических файлов
-app.mount("/static", StaticFiles(directory="apps/web/static"), name="static")
+# Настройка статических файлов: хэшированные копии из манифеста кэшируются браузером навсегда
+from apps.web.utils.static_manifest import ImmutableStaticFiles, get_static_manifest
+app.mount(
+    "/static",
+    ImmutableStaticFiles(directory="apps/web/static", manifest=get_static_manifest()),
+    name="static"
+)
 
 # Настройка шаблонов: используем единый экземпляр
 from apps.web.jinja import templates
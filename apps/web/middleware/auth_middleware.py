@@ -11,6 +11,7 @@ from core.database.session import get_async_session
 from sqlalchemy import select
 from domain.entities.owner_profile import OwnerProfile
 from shared.services.industry_terms_service import IndustryTermsService
+from core.cache.user_context_cache import user_context_cache
 
 
 class AuthMiddleware:
@@ -21,57 +22,84 @@ class AuthMiddleware:
         self.user_manager = user_manager
     
     async def get_current_user(self, request: Request) -> Optional[dict]:
-        """Получение текущего пользователя из JWT токена."""
+        """Получение текущего пользователя из JWT токена.
+
+        Результат запоминается в request.state на время запроса: middleware,
+        проверки ролей и сам роут получают один и тот же контекст. Между
+        запросами контекст берется из короткоживущего общего кэша.
+        """
         token = request.cookies.get("access_token")
         if not token:
             logger.debug("No access token found in cookies")
             return None
         
+        memo = getattr(request.state, "auth_user_context", None)
+        if memo is not None and memo[0] == token:
+            return memo[1]
+        
+        user = await self._resolve_user(token)
+        request.state.auth_user_context = (token, user)
+        return user
+    
+    async def _resolve_user(self, token: str) -> Optional[dict]:
+        """Проверка токена и получение контекста пользователя (кэш или БД)."""
         try:
-            logger.debug(f"Verifying token: {token[:20]}...")
             payload = await self.auth_service.verify_token(token)
             if not payload:
                 logger.warning("Token verification failed - no payload")
                 return None
             
-            logger.debug(f"Token payload: {payload}")
-            user_id = payload.get("sub")
-            telegram_id = payload.get("telegram_id")
-            if user_id:
-                user = await self.user_manager.get_user_by_internal_id(int(user_id))
-            elif telegram_id:
-                user = await self.user_manager.get_user_by_telegram_id(int(telegram_id))
-            else:
-                logger.warning("No user_id or telegram_id in token payload")
-                return None
-            if not user:
-                logger.warning(f"User not found for user_id={user_id} telegram_id={telegram_id}")
-                return None
-
-            # UI-предпочтения владельца: тема/язык/отрасль + словарь терминов
-            try:
-                async with get_async_session() as session:
-                    prof = (
-                        await session.execute(
-                            select(OwnerProfile).where(OwnerProfile.user_id == user["id"])
-                        )
-                    ).scalar_one_or_none()
-                    if prof:
-                        user["theme"] = prof.theme or "light"
-                        user["language"] = prof.language or "ru"
-                        user["industry"] = prof.industry or "grocery"
-                        user["ui_terms"] = await IndustryTermsService.get_terms(
-                            session, user["industry"], user["language"]
-                        )
-            except Exception as prefs_err:
-                logger.warning(f"Failed to load ui prefs for user {user.get('id')}: {prefs_err}")
+            cached_user = await user_context_cache.get(token)
+            if cached_user is not None:
+                return cached_user
             
-            logger.debug(f"User found: {user}")
+            token_user_id = payload.get("id")
+            versions = await user_context_cache.snapshot_versions(token_user_id) if token_user_id else {}
+            user = await self._load_user(payload)
+            if user and user.get("id") == token_user_id:
+                await user_context_cache.set(token, user, versions)
             return user
         except Exception as e:
             logger.error(f"Error getting current user: {e}")
             return None
     
+    async def _load_user(self, payload: dict) -> Optional[dict]:
+        """Загрузка пользователя и UI-предпочтений владельца из БД."""
+        logger.debug(f"Token payload: {payload}")
+        user_id = payload.get("sub")
+        telegram_id = payload.get("telegram_id")
+        if user_id:
+            user = await self.user_manager.get_user_by_internal_id(int(user_id))
+        elif telegram_id:
+            user = await self.user_manager.get_user_by_telegram_id(int(telegram_id))
+        else:
+            logger.warning("No user_id or telegram_id in token payload")
+            return None
+        if not user:
+            logger.warning(f"User not found for user_id={user_id} telegram_id={telegram_id}")
+            return None
+
+        # UI-предпочтения владельца: тема/язык/отрасль + словарь терминов
+        try:
+            async with get_async_session() as session:
+                prof = (
+                    await session.execute(
+                        select(OwnerProfile).where(OwnerProfile.user_id == user["id"])
+                    )
+                ).scalar_one_or_none()
+                if prof:
+                    user["theme"] = prof.theme or "light"
+                    user["language"] = prof.language or "ru"
+                    user["industry"] = prof.industry or "grocery"
+                    user["ui_terms"] = await IndustryTermsService.get_terms(
+                        session, user["industry"], user["language"]
+                    )
+        except Exception as prefs_err:
+            logger.warning(f"Failed to load ui prefs for user {user.get('id')}: {prefs_err}")
+        
+        logger.debug(f"User found: {user}")
+        return user
+    
     def require_auth(self, redirect_to: str = "/auth/login"):
         """Декоратор для проверки авторизации."""
         def decorator(func):
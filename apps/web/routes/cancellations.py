@@ -86,9 +86,6 @@ async def owner_cancel_shift(
         )
         
         if result['success']:
-            from core.cache.redis_cache import cache
-            await cache.clear_pattern("calendar_shifts:*")
-            await cache.clear_pattern("api_response:*")
             # TODO: Отправить уведомление сотруднику
             return JSONResponse({
                 "success": True,
@@ -186,9 +183,6 @@ async def manager_cancel_shift(
         )
         
         if result['success']:
-            from core.cache.redis_cache import cache
-            await cache.clear_pattern("calendar_shifts:*")
-            await cache.clear_pattern("api_response:*")
             # TODO: Отправить уведомление сотруднику
             return JSONResponse({
                 "success": True,
@@ -460,7 +454,7 @@ async def owner_cancellations_analytics(
 
         # Получаем статистику
         analytics_service = AnalyticsService()
-        stats = analytics_service.get_cancellation_statistics(
+        stats = await analytics_service.get_cancellation_statistics(
             owner_id=owner_user_id,
             start_date=start_date,
             end_date=end_date,
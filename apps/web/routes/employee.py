@@ -30,6 +30,7 @@ from domain.entities.payment_schedule import PaymentSchedule
 from apps.web.utils.timezone_utils import WebTimezoneHelper
 from shared.services.role_based_login_service import RoleBasedLoginService
 from shared.services.calendar_filter_service import CalendarFilterService
+from core.cache.calendar_cache import view_tags
 from shared.services.object_access_service import ObjectAccessService
 from shared.models.calendar_data import TimeslotStatus
 from shared.services.shift_history_service import ShiftHistoryService
@@ -891,23 +892,25 @@ async def employee_api_objects(
         # Получаем доступные объекты
         objects_query = select(Object).where(Object.available_for_applicants == True)
         objects_result = await db.execute(objects_query)
+        available_objects = objects_result.scalars().all()
         objects = []
         
-        # Получаем рейтинги для всех объектов
+        # Получаем рейтинги для всех объектов одним запросом
         from shared.services.rating_service import RatingService
         rating_service = RatingService(db)
+        ratings = await rating_service.get_multiple_ratings([('object', obj.id) for obj in available_objects])
         
-        for obj in objects_result.scalars():
+        for obj in available_objects:
             # Парсим координаты из формата "lat,lon"
             lat, lon = obj.coordinates.split(',') if obj.coordinates else (0, 0)
             
-            # Получаем рейтинг объекта
-            rating = await rating_service.get_rating('object', obj.id)
-            if not rating:
-                rating = await rating_service.get_or_create_rating('object', obj.id)
+            # Рейтинг объекта (без отзывов — начальный)
+            rating = ratings.get(('object', obj.id))
+            average_rating = float(rating.average_rating) if rating else RatingService.DEFAULT_RATING
+            total_reviews = rating.total_reviews if rating else 0
             
             # Форматируем звездный рейтинг
-            star_info = rating_service.get_star_rating(float(rating.average_rating))
+            star_info = rating_service.get_star_rating(average_rating)
             
             objects.append({
                 'id': obj.id,
@@ -921,8 +924,8 @@ async def employee_api_objects(
                 'work_conditions': obj.work_conditions or 'Стандартные условия работы',
                 'shift_tasks': obj.shift_tasks or ['Выполнение основных обязанностей'],
                 'rating': {
-                    'average_rating': float(rating.average_rating),
-                    'total_reviews': rating.total_reviews,
+                    'average_rating': average_rating,
+                    'total_reviews': total_reviews,
                     'stars': star_info
                 }
             })
@@ -931,7 +934,7 @@ async def employee_api_objects(
         response_data = {"objects": objects}
         
         # Сохраняем в кэш (TTL 5 минут для публичных объектов)
-        await cache.set(cache_key, response_data, ttl=300, serialize="json")
+        await cache.set(cache_key, response_data, ttl=300, serialize="json", tags=["api_objects"])
         logger.info(f"Employee objects API: cached {len(objects)} public objects")
         
         return response_data
@@ -1061,68 +1064,64 @@ async def employee_create_application(
         # Отправляем уведомления через асинхронную команду  
         try:
             logger.info(f"=== Начинаем отправку уведомлений ===")
-            from core.database.session import get_sync_session
             from shared.services.notification_service import NotificationService
             from core.config.settings import settings
             from domain.entities.user import User
             
-            # Получаем синхронную сессию для NotificationService
-            session_factory = get_sync_session
-            with session_factory() as session:
-                logger.info(f"Sending notification to owner_id={obj.owner_id}, application_id={application.id}")
+            logger.info(f"Sending notification to owner_id={obj.owner_id}, application_id={application.id}")
                 
-                telegram_token = settings.telegram_bot_token
-                logger.info(f"Telegram token получен: {telegram_token[:10]}...")
+            telegram_token = settings.telegram_bot_token
+            logger.info(f"Telegram token получен: {telegram_token[:10]}...")
                 
-                notification_service = NotificationService(
-                    session=session,
-                    telegram_token=telegram_token
-                )
+            notification_service = NotificationService(
+                session=db,
+                telegram_token=telegram_token
+            )
                 
-                # Получаем информацию о пользователе для имени в уведомлении
-                user_query = select(User).where(User.id == user_id)
-                user_result = session.execute(user_query)
-                applicant_user = user_result.scalar_one_or_none()
+            # Получаем информацию о пользователе для имени в уведомлении
+            user_query = select(User).where(User.id == user_id)
+            user_result = await db.execute(user_query)
+            applicant_user = user_result.scalar_one_or_none()
                 
-                applicant_name = "Пользователь"
-                if applicant_user:
-                    if applicant_user.first_name or applicant_user.last_name:
-                        parts = []
-                        if applicant_user.first_name:
-                            parts.append(applicant_user.first_name.strip())
-                        if applicant_user.last_name:
-                            parts.append(applicant_user.last_name.strip())
-                        applicant_name = " ".join(parts) if parts else applicant_user.username
-                    elif applicant_user.username:
-                        applicant_name = applicant_user.username
+            applicant_name = "Пользователь"
+            if applicant_user:
+                if applicant_user.first_name or applicant_user.last_name:
+                    parts = []
+                    if applicant_user.first_name:
+                        parts.append(applicant_user.first_name.strip())
+                    if applicant_user.last_name:
+                        parts.append(applicant_user.last_name.strip())
+                    applicant_name = " ".join(parts) if parts else applicant_user.username
+                elif applicant_user.username:
+                    applicant_name = applicant_user.username
                 
-                # Уведомляем владельца конкретного объекта
-                owner_id = obj.owner_id
-                logger.info(f"Creating notification for owner user_id={owner_id}, for application_id={application.id}")
+            # Уведомляем владельца конкретного объекта
+            owner_id = obj.owner_id
+            logger.info(f"Creating notification for owner user_id={owner_id}, for application_id={application.id}")
                 
-                notification_payload = {
-                    "application_id": application.id,
-                    "applicant_name": applicant_name,
-                    "object_name": obj.name,
-                    "message": message
-                }
+            notification_payload = {
+                "application_id": application.id,
+                "applicant_name": applicant_name,
+                "object_name": obj.name,
+                "message": message
+            }
                 
-                logger.info(f"Notification payload: {notification_payload}")
+            logger.info(f"Notification payload: {notification_payload}")
                 
-                # Создаем уведомления для владельца  
-                try:
-                    notifications = notification_service.create(
-                        [owner_id],
-                        "application_created",
-                        notification_payload,
-                        send_telegram=True
-                    )
-                    logger.info(f"Notification created: {len(notifications)} notifications")
-                    session.commit()
-                    logger.info(f"Notifications committed to database successfully")
-                except Exception as service_error:
-                    logger.error(f"Error in notification service create: {service_error}")
-                    raise service_error
+            # Создаем уведомления для владельца  
+            try:
+                notifications = notification_service.create(
+                    [owner_id],
+                    "application_created",
+                    notification_payload,
+                    send_telegram=True
+                )
+                logger.info(f"Notification created: {len(notifications)} notifications")
+                await db.commit()
+                logger.info(f"Notifications committed to database successfully")
+            except Exception as service_error:
+                logger.error(f"Error in notification service create: {service_error}")
+                raise service_error
                     
         except Exception as notification_error:
             logger.error(f"Ошибка отправки уведомлений: {notification_error}")
@@ -1488,7 +1487,7 @@ async def employee_calendar_api_objects(
         } for obj in objects]
         
         # Сохраняем в кэш (TTL 2 минуты)
-        await cache.set(cache_key, objects_data, ttl=120, serialize="json")
+        await cache.set(cache_key, objects_data, ttl=120, serialize="json", tags=["api_objects"])
         logger.info(f"Employee calendar objects API: cached {len(objects_data)} objects")
         
         return objects_data
@@ -1653,6 +1652,10 @@ async def employee_calendar_timeslot_detail(
                 for shift in combined_shifts
             ]
 
+            # Свободные интервалы — тем же расчетом вместимости, что и проверка при бронировании
+            from shared.services.timeslot_capacity_service import get_slot_free_intervals
+            free_intervals = await get_slot_free_intervals(db, slot, tz_name)
+
             return {
                 "slot": {
                     "id": slot.id,
@@ -1665,6 +1668,7 @@ async def employee_calendar_timeslot_detail(
                     "max_employees": slot.max_employees or 1,
                     "is_active": slot.is_active,
                     "notes": slot.notes or "",
+                    "free_intervals": free_intervals,
                 },
                 "scheduled": scheduled,
                 "actual": actual
@@ -1776,7 +1780,7 @@ async def employee_api_employees(
         # Сохраняем в кэш (TTL 2 минуты) с ключом по telegram_id
         from core.cache.redis_cache import cache
         cache_key = f"api_employees:employee_tg_{user.telegram_id}"
-        await cache.set(cache_key, employee_data, ttl=120, serialize="json")
+        await cache.set(cache_key, employee_data, ttl=120, serialize="json", tags=["api_employees"])
         total_time = (time.time() - start_time) * 1000
         logger.info(f"Employee employees API: cache MISS, cached for user {user.id}, total_time={total_time:.2f}ms")
         
@@ -2667,7 +2671,10 @@ async def employee_calendar_api_data(
         }
         
         # Сохраняем в кэш (TTL 2 минуты)
-        await cache.set(f"api_response:{cache_key}", response_data, ttl=120, serialize="json")
+        await cache.set(
+            f"api_response:{cache_key}", response_data, ttl=120, serialize="json",
+            tags=["api_response", *view_tags(obj["id"] for obj in calendar_data.accessible_objects)]
+        )
         logger.info(f"Employee calendar API: response cached")
         
         return response_data
@@ -3182,27 +3189,11 @@ async def employee_plan_shift(
         if overlapping_existing:
             raise HTTPException(status_code=400, detail="У вас уже запланирована смена в это время")
 
-        # Проверяем лимит по количеству сотрудников в тайм-слоте для выбранного интервала
-        timeslot_schedules_query = select(ShiftSchedule).where(
-            ShiftSchedule.time_slot_id == timeslot_id,
-            ShiftSchedule.status.in_(["planned", "confirmed"])
-        )
-        current_slot_schedules = (await db.execute(timeslot_schedules_query)).scalars().all()
-
-        def to_utc(value: datetime) -> datetime:
-            if value is None:
-                return None
-            if value.tzinfo is None:
-                return pytz.UTC.localize(value)
-            return value.astimezone(pytz.UTC)
-
-        overlapping_slot_schedules = [
-            sched for sched in current_slot_schedules
-            if not (to_utc(sched.planned_end) <= slot_datetime or to_utc(sched.planned_start) >= end_datetime)
-        ]
-
-        max_employees = timeslot.max_employees or 1
-        if len(overlapping_slot_schedules) >= max_employees:
+        # Проверяем лимит по количеству сотрудников в тайм-слоте для выбранного интервала.
+        # Тайм-слоты объекта на эту дату блокируются до коммита: одновременные бронирования идут по очереди
+        from shared.services.timeslot_capacity_service import locked_slot_capacity
+        capacity = await locked_slot_capacity(db, timeslot, tz)
+        if not capacity.fits(slot_datetime, end_datetime):
             raise HTTPException(status_code=400, detail="На выбранное время нет свободных мест в тайм-слоте")
 
         # Определяем ставку с учетом флага use_contract_rate
@@ -3269,12 +3260,6 @@ async def employee_plan_shift(
                     schedule_id=shift_schedule.id,
                 )
         
-        # Очищаем кэш календаря для немедленного отображения
-        from core.cache.redis_cache import cache
-        await cache.clear_pattern("calendar_shifts:*")
-        await cache.clear_pattern("api_response:*")
-        logger.info(f"Calendar cache cleared after planning shift {shift_schedule.id}")
-        
         logger.info(f"Employee {user_id} successfully planned shift {shift_schedule.id} for timeslot {timeslot_id}")
         return {
             "success": True,
@@ -3376,9 +3361,6 @@ async def employee_cancel_planned_shift(
 
             schedule.status = 'cancelled'
             await db.commit()
-            from core.cache.redis_cache import cache
-            await cache.clear_pattern("calendar_shifts:*")
-            await cache.clear_pattern("api_response:*")
             return {"success": True}
     except HTTPException:
         raise
@@ -18,11 +18,11 @@ from shared.services.role_based_login_service import RoleBasedLoginService
 from apps.web.middleware.role_middleware import require_manager_or_owner
 from apps.web.dependencies import get_current_user_dependency
 from shared.services.calendar_filter_service import CalendarFilterService
+from core.cache.calendar_cache import view_tags
 from shared.services.shift_history_service import ShiftHistoryService
 from shared.services.cancellation_policy_service import CancellationPolicyService
 from shared.services.shift_cancellation_service import ShiftCancellationService
 from shared.services.shift_status_sync_service import ShiftStatusSyncService
-from core.cache.redis_cache import cache
 from apps.web.utils.shift_history_utils import build_shift_history_items
 from domain.entities.user import User
 from domain.entities.object import Object
@@ -2642,7 +2642,10 @@ async def manager_calendar_api_data(
         }
         
         # Сохраняем в кэш (TTL 2 минуты)
-        await cache.set(f"api_response:{cache_key}", response_data, ttl=120, serialize="json")
+        await cache.set(
+            f"api_response:{cache_key}", response_data, ttl=120, serialize="json",
+            tags=["api_response", *view_tags(obj["id"] for obj in calendar_data.accessible_objects)]
+        )
         logger.info(f"Manager calendar API: response cached with key {cache_key}")
         
         return response_data
@@ -2933,6 +2936,10 @@ async def get_timeslot_details_manager(
                 for sh in acts_all
             ]
 
+            # Свободные интервалы — тем же расчетом вместимости, что и проверка при бронировании
+            from shared.services.timeslot_capacity_service import get_slot_free_intervals
+            free_intervals = await get_slot_free_intervals(db, slot, tz_name)
+
             return {
                 "slot": {
                     "id": slot.id,
@@ -2945,6 +2952,7 @@ async def get_timeslot_details_manager(
                     "max_employees": slot.max_employees or 1,
                     "is_active": slot.is_active,
                     "notes": slot.notes or "",
+                    "free_intervals": free_intervals,
                 },
                 "scheduled": scheduled,
                 "actual": actual,
@@ -3678,7 +3686,7 @@ async def get_employees_for_manager(
                 })
             
             # Сохраняем в кэш (TTL 2 минуты)
-            await cache.set(cache_key, employees_data, ttl=120, serialize="json")
+            await cache.set(cache_key, employees_data, ttl=120, serialize="json", tags=["api_employees"])
             logger.info(f"Manager employees API: cached {len(employees_data)} employees")
             
             return employees_data
@@ -3743,7 +3751,7 @@ async def get_objects_for_manager_calendar(
                 })
             
             # Сохраняем в кэш (TTL 2 минуты)
-            await cache.set(cache_key, objects_data, ttl=120, serialize="json")
+            await cache.set(cache_key, objects_data, ttl=120, serialize="json", tags=["api_objects"])
             logger.info(f"Manager objects API: cached {len(objects_data)} objects")
             
             return objects_data
@@ -4034,6 +4042,13 @@ async def plan_shift_manager(
                     detail=error_msg
                 )
             
+            # Проверяем лимит по количеству сотрудников в тайм-слоте.
+            # Тайм-слоты объекта на эту дату блокируются до коммита: одновременные бронирования идут по очереди
+            from shared.services.timeslot_capacity_service import locked_slot_capacity
+            capacity = await locked_slot_capacity(db, timeslot, tz)
+            if not capacity.fits(slot_datetime_utc, end_datetime_utc):
+                raise HTTPException(status_code=400, detail="На выбранное время нет свободных мест в тайм-слоте")
+            
             # Создаем запланированную смену
             
             # Используем уже вычисленные времена в UTC
@@ -4133,12 +4148,6 @@ async def plan_shift_manager(
             await db.commit()
             await db.refresh(shift_schedule)
             
-            # Очищаем кэш календаря для немедленного отображения
-            from core.cache.redis_cache import cache
-            await cache.clear_pattern("calendar_shifts:*")
-            await cache.clear_pattern("api_response:*")
-            logger.info(f"Calendar cache cleared after planning shift {shift_schedule.id}")
-            
             logger.info(f"Successfully planned shift {shift_schedule.id}")
             return {
                 "success": True,
@@ -5031,12 +5040,6 @@ async def quick_create_timeslot_manager(
             await db.commit()
             await db.refresh(timeslot)
             
-            # Очищаем кэш календаря для немедленного отображения
-            from core.cache.redis_cache import cache
-            await cache.clear_pattern("calendar_shifts:*")
-            await cache.clear_pattern("api_response:*")
-            logger.info(f"Calendar cache cleared after creating timeslot {timeslot.id}")
-            
             logger.info(f"Timeslot created successfully with ID: {timeslot.id}")
             
             # Возвращаем результат до закрытия сессии
@@ -5331,53 +5334,50 @@ async def manager_approve_application(
         
         # Отправляем уведомления
         try:
-            from core.database.session import get_sync_session
             from shared.services.notification_service import NotificationService
             from core.config.settings import settings
             from domain.entities.user import User
             
-            session_factory = get_sync_session
-            with session_factory() as session:
-                notification_service = NotificationService(
-                    session=session,
-                    telegram_token=settings.telegram_bot_token
-                )
+            notification_service = NotificationService(
+                session=db,
+                telegram_token=settings.telegram_bot_token
+            )
                 
-                # Получаем информацию об управляющем для имени в уведомлении
-                manager_query = select(User).where(User.id == user_id)
-                manager_result = session.execute(manager_query)
-                manager_user = manager_result.scalar_one_or_none()
+            # Получаем информацию об управляющем для имени в уведомлении
+            manager_query = select(User).where(User.id == user_id)
+            manager_result = await db.execute(manager_query)
+            manager_user = manager_result.scalar_one_or_none()
                 
-                manager_name = "Управляющий"
-                if manager_user:
-                    if manager_user.first_name or manager_user.last_name:
-                        parts = []
-                        if manager_user.first_name:
-                            parts.append(manager_user.first_name.strip())
-                        if manager_user.last_name:
-                            parts.append(manager_user.last_name.strip())
-                        manager_name = " ".join(parts) if parts else manager_user.username
-                    elif manager_user.username:
-                        manager_name = manager_user.username
+            manager_name = "Управляющий"
+            if manager_user:
+                if manager_user.first_name or manager_user.last_name:
+                    parts = []
+                    if manager_user.first_name:
+                        parts.append(manager_user.first_name.strip())
+                    if manager_user.last_name:
+                        parts.append(manager_user.last_name.strip())
+                    manager_name = " ".join(parts) if parts else manager_user.username
+                elif manager_user.username:
+                    manager_name = manager_user.username
                 
-                # Уведомляем соискателя о назначении собеседования
-                notification_payload = {
-                    "application_id": application.id,
-                    "object_name": application.object.name if hasattr(application, 'object') and application.object else "Объект",
-                    "object_address": application.object.address if hasattr(application, 'object') and application.object else "—",
-                    "employee_position": application.object.employee_position if hasattr(application, 'object') and application.object and hasattr(application.object, 'employee_position') else "Должность не указана",
-                    "scheduled_at": application.interview_scheduled_at.isoformat(),
-                    "interview_type": interview_type,
-                    "owner_name": manager_name
-                }
+            # Уведомляем соискателя о назначении собеседования
+            notification_payload = {
+                "application_id": application.id,
+                "object_name": application.object.name if hasattr(application, 'object') and application.object else "Объект",
+                "object_address": application.object.address if hasattr(application, 'object') and application.object else "—",
+                "employee_position": application.object.employee_position if hasattr(application, 'object') and application.object and hasattr(application.object, 'employee_position') else "Должность не указана",
+                "scheduled_at": application.interview_scheduled_at.isoformat(),
+                "interview_type": interview_type,
+                "owner_name": manager_name
+            }
                 
-                notification_service.create(
-                    [application.applicant_id],
-                    "interview_assigned",
-                    notification_payload,
-                    send_telegram=True
-                )
-                session.commit()
+            notification_service.create(
+                [application.applicant_id],
+                "interview_assigned",
+                notification_payload,
+                send_telegram=True
+            )
+            await db.commit()
         except Exception as notification_error:
             logger.error(f"Ошибка отправки уведомлений управляющим: {notification_error}")
         
@@ -5426,52 +5426,49 @@ async def manager_reject_application(
         
         # Отправляем уведомления
         try:
-            from core.database.session import get_sync_session
             from shared.services.notification_service import NotificationService
             from core.config.settings import settings
             from domain.entities.user import User
             
-            session_factory = get_sync_session
-            with session_factory() as session:
-                notification_service = NotificationService(
-                    session=session,
-                    telegram_token=settings.telegram_bot_token
-                )
+            notification_service = NotificationService(
+                session=db,
+                telegram_token=settings.telegram_bot_token
+            )
                 
-                # Получаем информацию об управляющем для имени в уведомлении
-                manager_query = select(User).where(User.id == user_id)
-                manager_result = session.execute(manager_query)
-                manager_user = manager_result.scalar_one_or_none()
+            # Получаем информацию об управляющем для имени в уведомлении
+            manager_query = select(User).where(User.id == user_id)
+            manager_result = await db.execute(manager_query)
+            manager_user = manager_result.scalar_one_or_none()
                 
-                manager_name = "Управляющий"
-                if manager_user:
-                    if manager_user.first_name or manager_user.last_name:
-                        parts = []
-                        if manager_user.first_name:
-                            parts.append(manager_user.first_name.strip())
-                        if manager_user.last_name:
-                            parts.append(manager_user.last_name.strip())
-                        manager_name = " ".join(parts) if parts else manager_user.username
-                    elif manager_user.username:
-                        manager_name = manager_user.username
+            manager_name = "Управляющий"
+            if manager_user:
+                if manager_user.first_name or manager_user.last_name:
+                    parts = []
+                    if manager_user.first_name:
+                        parts.append(manager_user.first_name.strip())
+                    if manager_user.last_name:
+                        parts.append(manager_user.last_name.strip())
+                    manager_name = " ".join(parts) if parts else manager_user.username
+                elif manager_user.username:
+                    manager_name = manager_user.username
                 
-                # Уведомляем соискателя об отклонении
-                notification_payload = {
-                    "application_id": application.id,
-                    "object_name": application.object.name if hasattr(application, 'object') and application.object else "Объект",
-                    "object_address": application.object.address if hasattr(application, 'object') and application.object else "—",
-                    "employee_position": application.object.employee_position if hasattr(application, 'object') and application.object and hasattr(application.object, 'employee_position') else "Должность не указана",
-                    "reason": reject_reason,
-                    "owner_name": manager_name
-                }
+            # Уведомляем соискателя об отклонении
+            notification_payload = {
+                "application_id": application.id,
+                "object_name": application.object.name if hasattr(application, 'object') and application.object else "Объект",
+                "object_address": application.object.address if hasattr(application, 'object') and application.object else "—",
+                "employee_position": application.object.employee_position if hasattr(application, 'object') and application.object and hasattr(application.object, 'employee_position') else "Должность не указана",
+                "reason": reject_reason,
+                "owner_name": manager_name
+            }
                 
-                notification_service.create(
-                    [application.applicant_id],
-                    "application_rejected",
-                    notification_payload,
-                    send_telegram=True
-                )
-                session.commit()
+            notification_service.create(
+                [application.applicant_id],
+                "application_rejected",
+                notification_payload,
+                send_telegram=True
+            )
+            await db.commit()
         except Exception as notification_error:
             logger.error(f"Ошибка отправки уведомлений об отклонении управляющим: {notification_error}")
         
@@ -5599,7 +5596,6 @@ async def manager_cancel_shift(
     """Отмена смены управляющим"""
     from fastapi.responses import JSONResponse
     from datetime import datetime
-    from core.cache.redis_cache import cache
     
     try:
         # Определяем тип смены по ID
@@ -5672,8 +5668,6 @@ async def manager_cancel_shift(
                     content={"success": False, "message": cancel_result.get("message", "Не удалось отменить смену")},
                 )
 
-            await cache.clear_pattern("calendar_shifts:*")
-            await cache.clear_pattern("api_response:*")
             return JSONResponse(
                 status_code=200,
                 content={"success": True, "message": cancel_result.get("message", "Смена отменена")},
@@ -5743,8 +5737,6 @@ async def manager_cancel_shift(
             )
             await db.commit()
 
-        await cache.clear_pattern("calendar_shifts:*")
-        await cache.clear_pattern("api_response:*")
         return JSONResponse(
             status_code=200,
             content={"success": True, "message": "Смена отменена"},
@@ -1,14 +1,13 @@
 """Роуты для работы управляющих с начислениями и выплатами."""
 
 from fastapi import APIRouter, Request, Depends, HTTPException, status, Query, Form
-from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse, Response
+from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_
 from sqlalchemy.orm import selectinload
 from typing import Optional, List, Dict, Any
 from datetime import date, datetime, timedelta
 from decimal import Decimal
-from urllib.parse import quote
 
 from apps.web.jinja import templates
 from apps.web.middleware.auth_middleware import get_current_user
@@ -17,6 +16,7 @@ from apps.web.dependencies import require_manager_payroll_permission
 from core.database.session import get_db_session
 from apps.web.services.payroll_service import PayrollService
 from apps.web.services.payroll_statement_exporter import build_statement_workbook
+from core.export.streaming import file_response, save_workbook
 from shared.services.manager_permission_service import ManagerPermissionService
 from shared.services.payroll_statement_service import PayrollStatementService
 from domain.entities.object import Object
@@ -366,18 +366,12 @@ async def manager_payroll_statement_export(
         )
         await db.commit()
 
-        content = build_statement_workbook(statement)
+        path = await save_workbook(build_statement_workbook(statement))
         employee = statement["employee"]
         # Используем только ASCII для имени файла, чтобы избежать проблем с кодировкой
         safe_name = (employee.last_name or "employee").encode("ascii", "ignore").decode("ascii") or "employee"
         filename = f"manager_payroll_statement_{safe_name}_{employee_id}.xlsx"
-        # Кодируем имя файла для Content-Disposition заголовка
-        encoded_filename = quote(filename, safe="")
-        return Response(
-            content=content,
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers={"Content-Disposition": f'attachment; filename="{encoded_filename}"'},
-        )
+        return file_response(path, filename)
     except HTTPException:
         await db.rollback()
         raise
@@ -30,12 +30,12 @@ from apps.web.services.object_service import ObjectService, TimeSlotService
 from apps.web.utils.timezone_utils import web_timezone_helper
 from shared.services.system_features_service import SystemFeaturesService
 from shared.services.calendar_filter_service import CalendarFilterService
+from core.cache.calendar_cache import view_tags
 from shared.services.shift_history_service import ShiftHistoryService
 from shared.services.cancellation_policy_service import CancellationPolicyService
 from shared.services.shift_cancellation_service import ShiftCancellationService
 from shared.services.shift_status_sync_service import ShiftStatusSyncService
 from shared.services.shift_history_service import ShiftHistoryService
-from core.cache.redis_cache import cache
 from apps.web.utils.shift_history_utils import build_shift_history_items
 from shared.models.calendar_data import TimeslotStatus
 from domain.entities.user import User, UserRole
@@ -143,8 +143,6 @@ async def owner_dashboard(request: Request):
             from domain.entities.object_opening import ObjectOpening
             from core.utils.timezone_helper import timezone_helper
             
-            # Загружаем объекты с org_unit и всей цепочкой родителей (до 5 уровней иерархии)
-            from domain.entities.org_structure import OrgStructureUnit
             objects_result = await session.execute(
                 select(Object)
                 .where(
@@ -152,16 +150,13 @@ async def owner_dashboard(request: Request):
                     Object.is_active == True  # Только активные объекты
                 )
                 .order_by(desc(Object.created_at))
-                .options(
-                    selectinload(Object.org_unit).selectinload(OrgStructureUnit.parent)
-                    .selectinload(OrgStructureUnit.parent)
-                    .selectinload(OrgStructureUnit.parent)
-                    .selectinload(OrgStructureUnit.parent)
-                    .selectinload(OrgStructureUnit.parent)
-                )
             )
             objects_list = objects_result.scalars().all()
             
+            # Эффективные (унаследованные) настройки подразделений всех объектов одним запросом
+            from shared.services.org_structure_closure_service import load_unit_settings
+            unit_settings_by_id = await load_unit_settings(session, (obj.org_unit_id for obj in objects_list))
+            
             # Сегодняшняя дата
             today_local = timezone_helper.utc_to_local(datetime.now(timezone.utc)).date()
             
@@ -353,30 +348,21 @@ async def owner_dashboard(request: Request):
                         active_shifts_on_object = [s for s in shifts_today if s.status == 'active']
                         
                         # Получить эффективные настройки опоздания (с учетом наследования)
-                        async def get_effective_late_settings_for_object(obj: Object) -> dict:
+                        def get_effective_late_settings_for_object(obj: Object) -> dict:
                             if not obj.inherit_late_settings and obj.late_threshold_minutes is not None:
                                 return {
                                     'threshold_minutes': obj.late_threshold_minutes,
                                     'penalty_per_minute': obj.late_penalty_per_minute
                                 }
-                            if obj.org_unit_id:
-                                from domain.entities.org_structure import OrgStructureUnit
-                                current_unit_id = obj.org_unit_id
-                                while current_unit_id:
-                                    unit_query = select(OrgStructureUnit).where(OrgStructureUnit.id == current_unit_id)
-                                    unit_result = await session.execute(unit_query)
-                                    unit = unit_result.scalar_one_or_none()
-                                    if not unit:
-                                        break
-                                    if not unit.inherit_late_settings and unit.late_threshold_minutes is not None:
-                                        return {
-                                            'threshold_minutes': unit.late_threshold_minutes,
-                                            'penalty_per_minute': unit.late_penalty_per_minute
-                                        }
-                                    current_unit_id = unit.parent_id
+                            unit_settings = unit_settings_by_id.get(obj.org_unit_id)
+                            if unit_settings:
+                                return {
+                                    'threshold_minutes': unit_settings.late_threshold_minutes,
+                                    'penalty_per_minute': unit_settings.late_penalty_per_minute
+                                }
                             return {'threshold_minutes': None, 'penalty_per_minute': None}
                         
-                        late_settings = await get_effective_late_settings_for_object(obj)
+                        late_settings = get_effective_late_settings_for_object(obj)
                         threshold_minutes = late_settings.get('threshold_minutes') or 0
                         
                         # Сначала определяем сотрудника для открытия (если есть opener_shift)
@@ -2587,16 +2573,12 @@ async def owner_calendar_api_data(
             org_unit_ids_list = [org_unit_id]
         
         if org_unit_ids_list and not object_ids:
-            from apps.web.services.org_structure_service import OrgStructureService
             object_service = ObjectService(db)
-            org_service = OrgStructureService(db)
             all_objects = await object_service.get_objects_by_owner(owner_telegram_id)
             
-            # Получаем все потомки выбранных подразделений
-            all_org_unit_ids = set(org_unit_ids_list)
-            for unit_id in org_unit_ids_list:
-                descendants = await org_service._get_all_descendants(unit_id)
-                all_org_unit_ids.update([d.id for d in descendants])
+            # Получаем все потомки выбранных подразделений (одним запросом по замыканию)
+            from shared.services.org_structure_closure_service import get_descendant_ids
+            all_org_unit_ids = await get_descendant_ids(db, org_unit_ids_list)
             
             # Фильтруем объекты по подразделениям (включая потомков)
             filtered_by_org = [obj.id for obj in all_objects if obj.org_unit_id in all_org_unit_ids]
@@ -2753,7 +2735,10 @@ async def owner_calendar_api_data(
         }
         
         # Сохраняем в кэш (TTL 2 минуты)
-        await cache.set(f"api_response:{cache_key}", response_data, ttl=120, serialize="json")
+        await cache.set(
+            f"api_response:{cache_key}", response_data, ttl=120, serialize="json",
+            tags=["api_response", *view_tags(obj["id"] for obj in calendar_data.accessible_objects)]
+        )
         logger.info(f"Owner calendar API: response cached")
         
         return response_data
@@ -2820,7 +2805,7 @@ async def owner_calendar_api_objects(request: Request):
             ]
             
             # Сохраняем в кэш (TTL 2 минуты)
-            await cache.set(cache_key, objects_data, ttl=120, serialize="json")
+            await cache.set(cache_key, objects_data, ttl=120, serialize="json", tags=["api_objects"])
             logger.info(f"Owner objects API: cached {len(objects_data)} objects")
             
             return objects_data
@@ -2907,7 +2892,7 @@ async def api_employees(request: Request):
             ]
             
             # Сохраняем в кэш (TTL 2 минуты)
-            await cache.set(cache_key, employees_data, ttl=120, serialize="json")
+            await cache.set(cache_key, employees_data, ttl=120, serialize="json", tags=["api_employees"])
             logger.info(f"Owner employees API: cached {len(employees_data)} employees")
             
             return employees_data
@@ -3118,18 +3103,6 @@ async def owner_calendar_quick_create_timeslot(
                 telegram_id,
             )
 
-            # Очищаем кэш календаря безопасно (не роняем при ошибке Redis)
-            try:
-                from core.cache.redis_cache import cache
-                await cache.clear_pattern("calendar_shifts:*")
-                await cache.clear_pattern("api_response:*")
-                if new_slot:
-                    logger.info(f"Calendar cache cleared after creating timeslot {new_slot.id}")
-                else:
-                    logger.info("Calendar cache cleared after duplicate timeslot attempt")
-            except Exception:
-                logger.warning("Cache clear skipped (redis not available)")
-
             # Если дубликат (new_slot is None) — возвращаем идемпотентный успех
             if not new_slot:
                 return {"success": True, "already_exists": True, "message": "Тайм-слот уже существует"}
@@ -3337,20 +3310,11 @@ async def api_calendar_plan_shift(
             if existing_schedules:
                 raise HTTPException(status_code=400, detail="Сотрудник уже запланирован на это время")
 
-            # Проверяем лимит по количеству сотрудников в тайм-слоте (исключая редактируемую смену)
-            max_employees = timeslot.max_employees or 1
-            current_slot_schedules_query = select(ShiftSchedule).where(
-                ShiftSchedule.time_slot_id == timeslot_id,
-                ShiftSchedule.status.in_(["planned", "confirmed"])
-            )
-            if is_edit_mode:
-                current_slot_schedules_query = current_slot_schedules_query.where(ShiftSchedule.id != schedule_id)
-            current_slot_schedules = (await session.execute(current_slot_schedules_query)).scalars().all()
-            overlapping_schedules = [
-                sched for sched in current_slot_schedules
-                if not (sched.planned_end <= slot_datetime or sched.planned_start >= end_datetime)
-            ]
-            if len(overlapping_schedules) >= max_employees:
+            # Проверяем лимит по количеству сотрудников в тайм-слоте (исключая редактируемую смену).
+            # Тайм-слоты объекта на эту дату блокируются до коммита: одновременные бронирования идут по очереди
+            from shared.services.timeslot_capacity_service import locked_slot_capacity
+            capacity = await locked_slot_capacity(session, timeslot, tz, exclude_schedule_id=schedule_id)
+            if not capacity.fits(slot_datetime, end_datetime):
                 raise HTTPException(status_code=400, detail="На выбранное время нет свободных мест в тайм-слоте")
 
             # Определяем ставку с учетом флага use_contract_rate
@@ -3408,12 +3372,6 @@ async def api_calendar_plan_shift(
                     },
                 )
                 await session.commit()
-                
-                # Очищаем кэш календаря
-                from core.cache.redis_cache import cache
-                await cache.clear_pattern("calendar_shifts:*")
-                await cache.clear_pattern("api_response:*")
-                logger.info(f"Calendar cache cleared after updating shift {existing_schedule.id}")
 
                 return {
                     "success": True,
@@ -3453,12 +3411,6 @@ async def api_calendar_plan_shift(
                     },
                 )
                 await session.commit()
-                
-                # Очищаем кэш календаря для немедленного отображения
-                from core.cache.redis_cache import cache
-                await cache.clear_pattern("calendar_shifts:*")
-                await cache.clear_pattern("api_response:*")
-                logger.info(f"Calendar cache cleared after planning shift {new_schedule.id}")
 
                 return {
                     "success": True,
@@ -3550,12 +3502,6 @@ async def api_calendar_delete_shift(
             # Удаляем смену
             await session.delete(schedule)
             await session.commit()
-            
-            # Очищаем кэш календаря
-            from core.cache.redis_cache import cache
-            await cache.clear_pattern("calendar_shifts:*")
-            await cache.clear_pattern("api_response:*")
-            logger.info(f"Calendar cache cleared after deleting shift {schedule_id}")
 
             return {
                 "success": True,
@@ -3863,6 +3809,10 @@ async def owner_calendar_api_timeslot_detail(
                     "notes": shift.notes or ""
                 })
 
+            # Свободные интервалы — тем же расчетом вместимости, что и проверка при бронировании
+            from shared.services.timeslot_capacity_service import get_slot_free_intervals
+            free_intervals = await get_slot_free_intervals(session, slot, tz_name)
+
             return {
                 "slot": {
                     "id": slot.id,
@@ -3875,6 +3825,7 @@ async def owner_calendar_api_timeslot_detail(
                     "max_employees": slot.max_employees or 1,
                     "is_active": slot.is_active,
                     "notes": slot.notes or "",
+                    "free_intervals": free_intervals,
                 },
                 "scheduled": scheduled_data,
                 "actual": actual_data,
@@ -5178,8 +5129,6 @@ async def owner_cancel_shift_legacy(
                     content={"success": False, "message": cancel_result.get("message", "Не удалось отменить смену")},
                 )
 
-            await cache.clear_pattern("calendar_shifts:*")
-            await cache.clear_pattern("api_response:*")
             return JSONResponse(
                 status_code=200,
                 content={"success": True, "message": cancel_result.get("message", "Смена отменена")},
@@ -5248,8 +5197,6 @@ async def owner_cancel_shift_legacy(
             )
             await db.commit()
 
-        await cache.clear_pattern("calendar_shifts:*")
-        await cache.clear_pattern("api_response:*")
         return JSONResponse(
             status_code=200,
             content={"success": True, "message": "Смена отменена"},
@@ -7601,54 +7548,50 @@ async def approve_application(
         
         # Отправляем уведомления  
         try:
-            from core.database.session import get_sync_session
             from shared.services.notification_service import NotificationService
             from core.config.settings import settings
             from domain.entities.user import User
             
-            # Получаем синхронную сессию для NotificationService
-            session_factory = get_sync_session
-            with session_factory() as session:
-                notification_service = NotificationService(
-                    session=session,
-                    telegram_token=settings.telegram_bot_token
-                )
+            notification_service = NotificationService(
+                session=db,
+                telegram_token=settings.telegram_bot_token
+            )
                 
-                # Получаем информацию о владельце для имени в уведомлении
-                owner_query = select(User).where(User.id == user_id)
-                owner_result = session.execute(owner_query)
-                owner_user = owner_result.scalar_one_or_none()
+            # Получаем информацию о владельце для имени в уведомлении
+            owner_query = select(User).where(User.id == user_id)
+            owner_result = await db.execute(owner_query)
+            owner_user = owner_result.scalar_one_or_none()
                 
-                owner_name = "Владелец"
-                if owner_user:
-                    if owner_user.first_name or owner_user.last_name:
-                        parts = []
-                        if owner_user.first_name:
-                            parts.append(owner_user.first_name.strip())
-                        if owner_user.last_name:
-                            parts.append(owner_user.last_name.strip())
-                        owner_name = " ".join(parts) if parts else owner_user.username
-                    elif owner_user.username:
-                        owner_name = owner_user.username
+            owner_name = "Владелец"
+            if owner_user:
+                if owner_user.first_name or owner_user.last_name:
+                    parts = []
+                    if owner_user.first_name:
+                        parts.append(owner_user.first_name.strip())
+                    if owner_user.last_name:
+                        parts.append(owner_user.last_name.strip())
+                    owner_name = " ".join(parts) if parts else owner_user.username
+                elif owner_user.username:
+                    owner_name = owner_user.username
                 
-                # Уведомляем соискателя
-                notification_payload = {
-                    "application_id": application.id,
-                    "object_name": application.object.name if application.object else "Объект",
-                    "object_address": application.object.address if application.object else "—",
-                    "employee_position": application.object.employee_position if application.object and hasattr(application.object, 'employee_position') else "Должность не указана",
-                    "scheduled_at": application.interview_scheduled_at.isoformat(),
-                    "interview_type": interview_type,
-                    "owner_name": owner_name
-                }
+            # Уведомляем соискателя
+            notification_payload = {
+                "application_id": application.id,
+                "object_name": application.object.name if application.object else "Объект",
+                "object_address": application.object.address if application.object else "—",
+                "employee_position": application.object.employee_position if application.object and hasattr(application.object, 'employee_position') else "Должность не указана",
+                "scheduled_at": application.interview_scheduled_at.isoformat(),
+                "interview_type": interview_type,
+                "owner_name": owner_name
+            }
                 
-                notification_service.create(
-                    [application.applicant_id],
-                    "interview_assigned",
-                    notification_payload,
-                    send_telegram=True
-                )
-                session.commit()
+            notification_service.create(
+                [application.applicant_id],
+                "interview_assigned",
+                notification_payload,
+                send_telegram=True
+            )
+            await db.commit()
         except Exception as notification_error:
             logger.error(f"Ошибка отправки уведомлений: {notification_error}")
         
@@ -7720,57 +7663,53 @@ async def reject_application(
         
         # Отправляем уведомления
         try:
-            from core.database.session import get_sync_session
             from shared.services.notification_service import NotificationService
             logger.info(f"---> НАЧАЛО отправки уведомления о отклонении заявки {application_id} для соискателя {application.applicant_id}, причина: {reject_reason}")
             from core.config.settings import settings
             from domain.entities.user import User
             
-            # Получаем синхронную сессию для NotificationService
-            session_factory = get_sync_session
-            with session_factory() as session:
-                notification_service = NotificationService(
-                    session=session,
-                    telegram_token=settings.telegram_bot_token
-                )
+            notification_service = NotificationService(
+                session=db,
+                telegram_token=settings.telegram_bot_token
+            )
                 
-                # Получаем информацию о владельце для имени в уведомлении
-                owner_query = select(User).where(User.id == user_id)
-                owner_result = session.execute(owner_query)
-                owner_user = owner_result.scalar_one_or_none()
+            # Получаем информацию о владельце для имени в уведомлении
+            owner_query = select(User).where(User.id == user_id)
+            owner_result = await db.execute(owner_query)
+            owner_user = owner_result.scalar_one_or_none()
                 
-                owner_name = "Владелец"
-                if owner_user:
-                    if owner_user.first_name or owner_user.last_name:
-                        parts = []
-                        if owner_user.first_name:
-                            parts.append(owner_user.first_name.strip())
-                        if owner_user.last_name:
-                            parts.append(owner_user.last_name.strip())
-                        owner_name = " ".join(parts) if parts else owner_user.username
-                    elif owner_user.username:
-                        owner_name = owner_user.username
+            owner_name = "Владелец"
+            if owner_user:
+                if owner_user.first_name or owner_user.last_name:
+                    parts = []
+                    if owner_user.first_name:
+                        parts.append(owner_user.first_name.strip())
+                    if owner_user.last_name:
+                        parts.append(owner_user.last_name.strip())
+                    owner_name = " ".join(parts) if parts else owner_user.username
+                elif owner_user.username:
+                    owner_name = owner_user.username
                 
-                # Уведомляем соискателя об отклонении
-                notification_payload = {
-                    "application_id": application.id,
-                    "object_name": application.object.name if hasattr(application, 'object') and application.object else "Объект",
-                    "object_address": application.object.address if hasattr(application, 'object') and application.object else "—",
-                    "employee_position": application.object.employee_position if hasattr(application, 'object') and application.object and hasattr(application.object, 'employee_position') else "Должность не указана",
-                    "reason": reject_reason,
-                    "owner_name": owner_name
-                }
+            # Уведомляем соискателя об отклонении
+            notification_payload = {
+                "application_id": application.id,
+                "object_name": application.object.name if hasattr(application, 'object') and application.object else "Объект",
+                "object_address": application.object.address if hasattr(application, 'object') and application.object else "—",
+                "employee_position": application.object.employee_position if hasattr(application, 'object') and application.object and hasattr(application.object, 'employee_position') else "Должность не указана",
+                "reason": reject_reason,
+                "owner_name": owner_name
+            }
                 
-                logger.info(f"---> ВЫЗЫВАЕМ notification_service.create для пользователя {application.applicant_id}")
+            logger.info(f"---> ВЫЗЫВАЕМ notification_service.create для пользователя {application.applicant_id}")
                 
-                notification_service.create(
-                    [application.applicant_id],
-                    "application_rejected",
-                    notification_payload,
-                    send_telegram=True
-                )
-                session.commit()
-                logger.info(f"---> УВЕДОМЛЕНИЕ отправилось успешно для пользователя {application.applicant_id}")
+            notification_service.create(
+                [application.applicant_id],
+                "application_rejected",
+                notification_payload,
+                send_telegram=True
+            )
+            await db.commit()
+            logger.info(f"---> УВЕДОМЛЕНИЕ отправилось успешно для пользователя {application.applicant_id}")
         except Exception as notification_error:
             logger.error(f"Ошибка отправки уведомлений об отклонении: {notification_error}")
         
@@ -636,6 +636,7 @@ async def verify_and_fix_adjustments(
                 "penalties_corrected": report["penalties_corrected"],
                 "total_amount_added": float(report["total_amount_added"]),
                 "total_amount_corrected": float(report["total_amount_corrected"]),
+                "checkin_distance_violations": report.get("checkin_distance_violations", 0),
                 "details": report["details"]
             },
             "message": (
@@ -23,7 +23,6 @@ from shared.services.cancellation_policy_service import CancellationPolicyServic
 from shared.services.shift_cancellation_service import ShiftCancellationService
 from shared.services.shift_status_sync_service import ShiftStatusSyncService
 from domain.entities.shift_cancellation import ShiftCancellation
-from core.cache.redis_cache import cache
 from core.logging.logger import logger
 
 router = APIRouter()
@@ -729,8 +728,6 @@ async def cancel_shift(request: Request, shift_id: int, shift_type: Optional[str
                     status_code=400,
                 )
 
-            await cache.clear_pattern("calendar_shifts:*")
-            await cache.clear_pattern("api_response:*")
             return JSONResponse({"success": True, "message": cancel_result.get("message", "Смена отменена")})
 
         # Работа с фактической сменой
@@ -792,8 +789,6 @@ async def cancel_shift(request: Request, shift_id: int, shift_type: Optional[str
             )
             await session.commit()
 
-        await cache.clear_pattern("calendar_shifts:*")
-        await cache.clear_pattern("api_response:*")
         return JSONResponse({"success": True, "message": "Смена отменена"})
 
 
@@ -521,13 +521,10 @@ async def create_timeslot(
         
         logger.info(f"Created {created_count} timeslots for {len(selected_objects)} objects")
         
-        # Инвалидация кэша календаря и связанных API после создания тайм-слотов
+        # Список объектов; календарь сбрасывается по объект-дням после commit
         try:
             from core.cache.redis_cache import cache
-            await cache.clear_pattern("calendar_timeslots:*")
-            await cache.clear_pattern("calendar_shifts:*")
-            await cache.clear_pattern("api_response:*")
-            await cache.clear_pattern("api_objects:*")
+            await cache.invalidate_tags("api_objects")
             logger.info("Cache invalidated after timeslot creation")
         except Exception as e:
             # Не блокируем ответ при ошибке очистки кэша
@@ -734,16 +731,6 @@ async def update_timeslot(
             
             logger.info(f"Timeslot {timeslot_id} tasks updated: {len([t for t in task_texts if t.strip()])} tasks")
         
-        # Инвалидация кэша календаря и связанных API после обновления тайм-слота
-        try:
-            from core.cache.redis_cache import cache
-            await cache.clear_pattern("calendar_timeslots:*")
-            await cache.clear_pattern("calendar_shifts:*")
-            await cache.clear_pattern("api_response:*")
-        except Exception as _:
-            # Не блокируем ответ при ошибке очистки кэша
-            pass
-        
         logger.info(f"Timeslot {timeslot_id} updated successfully")
         
         return RedirectResponse(url=f"/owner/timeslots/object/{updated_timeslot.object_id}", status_code=status.HTTP_302_FOUND)
@@ -3,16 +3,15 @@
 from datetime import date, timedelta, datetime
 from typing import Optional, Dict, Any, Tuple, List
 from decimal import Decimal
-from urllib.parse import urlencode, quote
-import io
+from urllib.parse import urlencode
+import asyncio
+import os
 
 from fastapi import APIRouter, Depends, Request, Form, HTTPException, status, Query
-from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse, Response
+from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, or_, func
 from sqlalchemy.orm import selectinload
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill
 
 from apps.web.jinja import templates
 from apps.web.middleware.auth_middleware import get_current_user
@@ -22,6 +21,16 @@ from core.database.session import get_db_session
 from core.logging.logger import logger
 from apps.web.services.payroll_service import PayrollService
 from apps.web.services.payroll_statement_exporter import build_statement_workbook
+from apps.web.services.payroll_report_exporter import (
+    ACCRUALS_HEADERS,
+    ReportPeriod,
+    count_report_entries,
+    iter_accrual_csv_rows,
+    report_filename,
+    write_payroll_report,
+)
+from core.config.settings import settings
+from core.export.streaming import csv_response, file_response, save_workbook
 from domain.entities.user import User
 from domain.entities.payroll_entry import PayrollEntry
 from domain.entities.contract import Contract
@@ -34,6 +43,7 @@ from sqlalchemy import cast
 from shared.services.payroll_adjustment_service import PayrollAdjustmentService
 from shared.services.payment_schedule_service import get_payment_period_for_date
 from shared.services.payroll_generation_service import PayrollGenerationService
+from shared.services.org_structure_closure_service import load_units_by_schedule
 from shared.services.payroll_statement_service import PayrollStatementService
 from shared.services.contract_helper import get_inherited_payment_schedule_id
 
@@ -862,9 +872,10 @@ async def owner_payroll_report_export(
     _: None = Depends(require_owner_or_superadmin_web),
     db: AsyncSession = Depends(get_db_session),
     period_start: str = None,
-    period_end: str = None
+    period_end: str = None,
+    export_format: str = Query("xlsx", alias="format", regex="^(xlsx|csv)$")
 ):
-    """Экспорт отчёта по начислениям и выплатам в Excel."""
+    """Экспорт отчёта по начислениям и выплатам в Excel (или начислений в CSV)."""
     try:
         current_user = await get_current_user(request)
         if not current_user:
@@ -877,134 +888,38 @@ async def owner_payroll_report_export(
         if not period_start or not period_end:
             raise HTTPException(status_code=400, detail="Укажите период")
 
-        period_start_date = date.fromisoformat(period_start)
-        period_end_date = date.fromisoformat(period_end)
-
-        entries, report_data, payments_data = await _fetch_owner_payroll_report_data(
+        period = ReportPeriod(
             owner_id=owner_id,
-            period_start_date=period_start_date,
-            period_end_date=period_end_date,
-            db=db
+            period_start=date.fromisoformat(period_start),
+            period_end=date.fromisoformat(period_end)
         )
 
-        if not entries or not report_data:
+        entries_count = await count_report_entries(db, period)
+        if not entries_count:
             raise HTTPException(status_code=404, detail="Нет данных за выбранный период")
 
-        wb = Workbook()
-        ws_accruals = wb.active
-        ws_accruals.title = "Отчет по начислениям"
-
-        accruals_headers = [
-            "Объект",
-            "Сотрудник",
-            "Статус",
-            "Смен",
-            "Часов",
-            "Ставка",
-            "Доплачено",
-            "Удержано",
-            "Сумма"
-        ]
-        ws_accruals.append(accruals_headers)
-
-        header_font = Font(bold=True)
-        header_fill = PatternFill(start_color="E5E5E5", end_color="E5E5E5", fill_type="solid")
-
-        for cell in ws_accruals[1]:
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = Alignment(horizontal="center")
-
-        for obj in report_data["objects"]:
-            ws_accruals.append([obj["object_name"], "", "", "", "", "", "", "", ""])
-            for row in obj["rows"]:
-                ws_accruals.append([
-                    "",
-                    f"{row['last_name']} {row['first_name']}".strip(),
-                    row["status"],
-                    row["shifts_count"],
-                    row["hours"],
-                    row["rate"],
-                    row["bonus"],
-                    row["penalty"],
-                    row["total"],
-                ])
-            ws_accruals.append(["", "", "", "", "", "", "", "Итого по объекту", obj["subtotal"]])
-            ws_accruals.append([])
-
-        if report_data["multi_object_employees"]:
-            ws_accruals.append(["Сотрудники на нескольких объектах", "", "", "", "", "", "", "", ""])
-            for row in report_data["multi_object_employees"]:
-                ws_accruals.append([
-                    row["object_name"],
-                    f"{row['last_name']} {row['first_name']}".strip(),
-                    row["status"],
-                    row["shifts_count"],
-                    row["hours"],
-                    row["rate"],
-                    row["bonus"],
-                    row["penalty"],
-                    row["total"],
-                ])
-            ws_accruals.append([])
-
-        ws_accruals.append(["", "", "", "", "", "", "", "ОБЩИЙ ИТОГ", report_data["grand_total"]])
-
-        for column in ws_accruals.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            for cell in column:
-                if cell.value is not None:
-                    max_length = max(max_length, len(str(cell.value)))
-            ws_accruals.column_dimensions[column_letter].width = min(max_length + 2, 60)
-
-        ws_payments = wb.create_sheet(title="Отчет по выплатам")
-        payments_headers = ["Сотрудник", "К выплате", "Выплачено", "Способы оплаты", "Остаток"]
-        ws_payments.append(payments_headers)
-
-        for cell in ws_payments[1]:
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = Alignment(horizontal="center")
-
-        if payments_data and payments_data["employees"]:
-            for row in payments_data["employees"]:
-                ws_payments.append([
-                    f"{row['last_name']} {row['first_name']}".strip(),
-                    row["net_total"],
-                    row["paid"],
-                    row["payment_methods"],
-                    row["remainder"]
-                ])
-
-            ws_payments.append([
-                "ИТОГО:",
-                payments_data["total_net"],
-                payments_data["total_paid"],
-                "",
-                payments_data["total_remainder"]
-            ])
-        else:
-            ws_payments.append(["Нет данных", "", "", "", ""])
-
-        for column in ws_payments.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            for cell in column:
-                if cell.value is not None:
-                    max_length = max(max_length, len(str(cell.value)))
-            ws_payments.column_dimensions[column_letter].width = min(max_length + 2, 60)
-
-        output = io.BytesIO()
-        wb.save(output)
-        output.seek(0)
-
-        filename = f"payroll_report_{period_start}_{period_end}.xlsx"
-        return Response(
-            content=output.getvalue(),
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers={"Content-Disposition": f'attachment; filename="{filename}"'}
-        )
+        if export_format == "csv":
+            return csv_response(
+                iter_accrual_csv_rows(db, period),
+                report_filename(period, "csv"),
+                headers=ACCRUALS_HEADERS
+            )
+
+        # Большие отчёты формируются в фоне, пользователь получает ссылку на скачивание
+        if entries_count > settings.export_inline_max_rows:
+            from core.celery.tasks.payroll_tasks import export_payroll_report
+            job = export_payroll_report.delay(owner_id, period_start, period_end)
+            logger.info(
+                f"Payroll report export queued: owner={owner_id}, entries={entries_count}",
+                job_id=job.id
+            )
+            return RedirectResponse(
+                url=request.url_for("owner_payroll_report_export_job", job_id=job.id),
+                status_code=status.HTTP_303_SEE_OTHER
+            )
+
+        path = await write_payroll_report(db, period)
+        return file_response(path, report_filename(period))
 
     except HTTPException:
         raise
@@ -1013,6 +928,41 @@ async def owner_payroll_report_export(
         raise HTTPException(status_code=500, detail=f"Ошибка экспорта отчёта: {str(e)}")
 
 
+@router.get("/payroll/report/export/jobs/{job_id}", name="owner_payroll_report_export_job")
+async def owner_payroll_report_export_job(
+    request: Request,
+    job_id: str,
+    current_user: dict = Depends(require_owner_or_superadmin_web),
+    db: AsyncSession = Depends(get_db_session),
+):
+    """Скачивание отчёта, сформированного в фоне (пока не готов — страница ожидания)."""
+    owner_id = await get_user_id_from_current_user(current_user, db)
+    if not owner_id:
+        raise HTTPException(status_code=403, detail="Пользователь не найден")
+
+    from core.celery.celery_app import celery_app
+
+    # Чтение статуса из result backend — синхронный вызов Redis
+    job = celery_app.AsyncResult(job_id)
+    state = await asyncio.to_thread(lambda: job.state)
+    if state == "FAILURE":
+        raise HTTPException(status_code=500, detail="Не удалось сформировать отчёт")
+    if state != "SUCCESS":
+        return templates.TemplateResponse(
+            "owner/payroll/export_pending.html",
+            {"request": request, "current_user": current_user, "job_id": job_id}
+        )
+
+    result = await asyncio.to_thread(lambda: job.result)
+    if not result or result.get("owner_id") != owner_id:
+        raise HTTPException(status_code=404, detail="Отчёт не найден")
+    if not os.path.exists(result["path"]):
+        raise HTTPException(status_code=410, detail="Срок хранения отчёта истёк, сформируйте его заново")
+
+    # Файл остаётся до очистки по export_file_ttl_seconds: ссылку можно открыть повторно
+    return file_response(result["path"], result["filename"], delete=False)
+
+
 @router.get("/payroll/{entry_id}", response_class=HTMLResponse, name="owner_payroll_detail")
 async def owner_payroll_detail(
     request: Request,
@@ -1516,6 +1466,9 @@ async def owner_payroll_manual_recalculate(
         
         logger.info(f"Found {len(schedules)} active schedules total")
         
+        # Подразделения владельца по графикам (с учетом наследования) — один запрос для всех графиков
+        units_by_schedule = await load_units_by_schedule(db, owner_id=owner_id)
+        
         total_entries_created = 0
         total_entries_updated = 0
         total_adjustments_applied = 0
@@ -1544,47 +1497,7 @@ async def owner_payroll_manual_recalculate(
                 )
                 
                 # Найти объекты через подразделения с учетом наследования (как в автоматической задаче)
-                # Функция для рекурсивного поиска всех потомков подразделения
-                async def get_all_descendant_unit_ids(unit_id: int) -> List[int]:
-                    """Рекурсивно найти все дочерние подразделения"""
-                    result = [unit_id]
-                    children_query = select(OrgStructureUnit.id).where(
-                        OrgStructureUnit.parent_id == unit_id,
-                        OrgStructureUnit.is_active == True
-                    )
-                    children_result = await db.execute(children_query)
-                    children_ids = [row[0] for row in children_result.all()]
-                    
-                    for child_id in children_ids:
-                        result.extend(await get_all_descendant_unit_ids(child_id))
-                    
-                    return result
-                
-                # Найти подразделения, использующие этот график (с учетом наследования)
-                units_with_schedule = []
-                
-                # Найти все подразделения владельца
-                all_units_query = select(OrgStructureUnit).options(
-                    selectinload(OrgStructureUnit.parent)
-                ).where(
-                    OrgStructureUnit.owner_id == owner_id,
-                    OrgStructureUnit.is_active == True
-                )
-                
-                all_units_result = await db.execute(all_units_query)
-                all_units = all_units_result.scalars().all()
-                
-                # Проверить каждое подразделение
-                for unit in all_units:
-                    # Проверить, использует ли подразделение этот график (с учетом наследования)
-                    inherited_schedule_id = unit.get_inherited_payment_schedule_id()
-                    if inherited_schedule_id == schedule.id:
-                        # Добавить само подразделение и все его дочерние подразделения
-                        unit_ids = await get_all_descendant_unit_ids(unit.id)
-                        units_with_schedule.extend(unit_ids)
-                
-                # Убрать дубликаты
-                units_with_schedule = list(set(units_with_schedule))
+                units_with_schedule = list(units_by_schedule.get(schedule.id, {}).get(owner_id, ()))
                 
                 # Найти объекты:
                 # - с прямой привязкой к графику ИЛИ
@@ -1893,18 +1806,12 @@ async def owner_payroll_statement_export(
         )
         await db.commit()
 
-        content = build_statement_workbook(statement)
+        path = await save_workbook(build_statement_workbook(statement))
         employee = statement["employee"]
         # Используем только ASCII для имени файла, чтобы избежать проблем с кодировкой
         safe_name = (employee.last_name or "employee").encode("ascii", "ignore").decode("ascii") or "employee"
         filename = f"payroll_statement_{safe_name}_{employee_id}.xlsx"
-        # Кодируем имя файла для Content-Disposition заголовка
-        encoded_filename = quote(filename, safe="")
-        return Response(
-            content=content,
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers={"Content-Disposition": f'attachment; filename="{encoded_filename}"'},
-        )
+        return file_response(path, filename)
     except HTTPException:
         await db.rollback()
         raise
@@ -14,7 +14,6 @@ from sqlalchemy.orm import selectinload
 from apps.web.jinja import templates
 from apps.web.middleware.role_middleware import require_any_role, get_user_id_from_current_user
 from apps.web.utils.timezone_utils import WebTimezoneHelper
-from core.cache.redis_cache import cache
 from core.database.session import get_db_session
 from core.logging.logger import logger
 from domain.entities.shift_schedule import ShiftSchedule
@@ -547,13 +546,6 @@ async def submit_cancellation_form(
             message = result.get("message") or result.get("error") or "Не удалось отменить смену"
             error_messages.append(f"Смена {schedule.id}: {message}")
 
-    if success_ids:
-        try:
-            await cache.clear_pattern("calendar_shifts:*")
-            await cache.clear_pattern("api_response:*")
-        except Exception as cache_error:
-            logger.warning(f"Не удалось очистить кэш календаря: {cache_error}")
-
     sanitized_return = _sanitize_return_url(return_to) or ROLE_DEFAULT_RETURN.get(actor_role, "/")
 
     if success_ids and sanitized_return:
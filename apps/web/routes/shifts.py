@@ -17,7 +17,6 @@ from domain.entities.user import User
 from shared.services.shift_cancellation_service import ShiftCancellationService
 from shared.services.shift_status_sync_service import ShiftStatusSyncService
 from shared.services.shift_history_service import ShiftHistoryService
-from core.cache.redis_cache import cache
 
 router = APIRouter()
 from apps.web.jinja import templates
@@ -305,8 +304,6 @@ async def cancel_shift(request: Request, shift_id: int, shift_type: Optional[str
             if not cancel_result.get("success"):
                 return JSONResponse({"success": False, "error": cancel_result.get("message", "Не удалось отменить смену")}, status_code=400)
 
-            await cache.clear_pattern("calendar_shifts:*")
-            await cache.clear_pattern("api_response:*")
             return JSONResponse({"success": True, "message": cancel_result.get("message", "Смена отменена")})
 
         shift_query = select(Shift).options(
@@ -363,8 +360,6 @@ async def cancel_shift(request: Request, shift_id: int, shift_type: Optional[str
             )
             await session.commit()
 
-        await cache.clear_pattern("calendar_shifts:*")
-        await cache.clear_pattern("api_response:*")
         return JSONResponse({"success": True, "message": "Смена отменена"})
 
 
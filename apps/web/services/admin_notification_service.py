@@ -6,7 +6,7 @@ from sqlalchemy import select, func, and_, or_, desc, text, case
 from sqlalchemy.orm import selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from core.cache.redis_cache import cached
+from core.cache.memoize import cached
 from domain.entities.notification import Notification, NotificationType, NotificationStatus, NotificationChannel
 from domain.entities.payment_notification import PaymentNotification
 from domain.entities.user import User
@@ -21,7 +21,7 @@ class AdminNotificationService(NotificationService):
         # Не вызываем super().__init__(), так как базовый класс не принимает параметры
         self.session = session
 
-    @cached(ttl=timedelta(minutes=10), key_prefix="admin_notifications_stats")
+    @cached(ttl=timedelta(minutes=10), key_prefix="admin_notifications_stats", serialize="pickle", stale_ttl=timedelta(minutes=10))
     async def get_notifications_stats(self) -> Dict[str, Any]:
         """Получение общей статистики уведомлений (включая PaymentNotification)"""
         try:
@@ -78,7 +78,7 @@ class AdminNotificationService(NotificationService):
                 "last_updated": datetime.now()
             }
 
-    @cached(ttl=timedelta(minutes=15), key_prefix="admin_channel_stats")
+    @cached(ttl=timedelta(minutes=15), key_prefix="admin_channel_stats", stale_ttl=timedelta(minutes=15))
     async def get_channel_stats(self) -> Dict[str, Any]:
         """Статистика по каналам доставки"""
         try:
@@ -114,7 +114,7 @@ class AdminNotificationService(NotificationService):
             logger.error(f"Error getting channel stats: {e}")
             return {}
 
-    @cached(ttl=timedelta(minutes=15), key_prefix="admin_type_stats")
+    @cached(ttl=timedelta(minutes=15), key_prefix="admin_type_stats", stale_ttl=timedelta(minutes=15))
     async def get_type_stats(self) -> Dict[str, Any]:
         """Статистика по типам уведомлений"""
         try:
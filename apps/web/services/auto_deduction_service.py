@@ -96,13 +96,11 @@ class AutoDeductionService:
             if not shift.schedule_id or not shift.object_id:
                 return None
             
-            # Получить объект с подразделением для настроек штрафов
+            # Получить объект для настроек штрафов
             from domain.entities.object import Object
-            from sqlalchemy.orm import selectinload
+            from shared.services.org_structure_closure_service import get_object_late_settings
             
-            object_query = select(Object).options(
-                selectinload(Object.org_unit)
-            ).where(Object.id == shift.object_id)
+            object_query = select(Object).where(Object.id == shift.object_id)
             object_result = await self.db.execute(object_query)
             obj = object_result.scalar_one_or_none()
             
@@ -110,7 +108,7 @@ class AutoDeductionService:
                 return None
             
             # Получить эффективные настройки штрафа (с учетом наследования от подразделения)
-            late_settings = obj.get_effective_late_settings()
+            late_settings = await get_object_late_settings(self.db, obj)
             
             if late_settings['threshold_minutes'] is not None and late_settings['penalty_per_minute'] is not None:
                 threshold_minutes = late_settings['threshold_minutes']
@@ -16,7 +16,8 @@ from shared.services.manager_permission_service import ManagerPermissionService
 from shared.services.shift_history_service import ShiftHistoryService
 from shared.services.shift_status_sync_service import ShiftStatusSyncService
 from core.logging.logger import logger
-from core.cache.redis_cache import cached
+from core.cache.memoize import cached
+from core.cache.object_cache import OBJECTS_TAG
 from core.cache.cache_service import CacheService
 
 
@@ -399,8 +400,7 @@ class ContractService:
             
             # Инвалидация API кэшей
             from core.cache.redis_cache import cache
-            await cache.clear_pattern("api_employees:*")
-            await cache.clear_pattern("api_objects:*")
+            await cache.invalidate_tags("api_employees", "api_objects")
 
             # Уведомляем сотрудника о необходимости подписать договор
             try:
@@ -583,7 +583,7 @@ class ContractService:
             
             return list(employees.values())
     
-    @cached(ttl=timedelta(minutes=15), key_prefix="contract_employees")
+    @cached(ttl=timedelta(minutes=15), key_prefix="contract_employees", serialize="pickle", stale_ttl=timedelta(minutes=5))
     async def get_contract_employees_by_telegram_id(self, owner_telegram_id: int) -> List[Dict[str, Any]]:
         """Получение списка сотрудников владельца по telegram_id."""
         async with get_async_session() as session:
@@ -674,7 +674,7 @@ class ContractService:
             
             return list(employees.values())
     
-    @cached(ttl=timedelta(minutes=15), key_prefix="all_contract_employees")
+    @cached(ttl=timedelta(minutes=15), key_prefix="all_contract_employees", serialize="pickle", stale_ttl=timedelta(minutes=5))
     async def get_all_contract_employees_by_telegram_id(self, owner_telegram_id: int) -> List[Dict[str, Any]]:
         """Получение всех сотрудников владельца (включая бывших) по telegram_id."""
         async with get_async_session() as session:
@@ -888,9 +888,10 @@ class ContractService:
                 for emp in employees
             ]
     
-    @cached(ttl=timedelta(minutes=15), key_prefix="owner_objects")
+    @cached(ttl=timedelta(minutes=15), key_prefix="owner_objects", serialize="pickle",
+            tags=["owner_objects", OBJECTS_TAG])
     async def get_owner_objects(self, owner_telegram_id: int) -> List[Object]:
-        """Получение объектов владельца по telegram_id."""
+        """Получение объектов владельца по telegram_id (отсоединенные, только для чтения)."""
         async with get_async_session() as session:
             # Сначала находим пользователя по telegram_id
             user_query = select(User).where(User.telegram_id == owner_telegram_id)
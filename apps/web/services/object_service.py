@@ -15,7 +15,8 @@ from domain.entities.shift_schedule import ShiftSchedule
 from domain.entities.user import User
 from core.logging.logger import logger
 from datetime import datetime, time, date
-from core.cache.redis_cache import cached
+from core.cache.memoize import cached
+from core.cache.object_cache import OBJECTS_TAG
 from core.cache.cache_service import CacheService
 
 
@@ -38,10 +39,12 @@ class ObjectService:
             logger.error(f"Error getting user internal ID for telegram_id {telegram_id}: {e}")
             return None
     
-    @cached(ttl=timedelta(minutes=15), key_prefix="objects_by_owner")
+    @cached(ttl=timedelta(minutes=15), key_prefix="objects_by_owner", serialize="pickle",
+            tags=["objects_by_owner", OBJECTS_TAG])
     async def get_objects_by_owner(self, telegram_id: int, include_inactive: bool = False) -> List[Object]:
         """Получить все объекты владельца по Telegram ID.
         include_inactive=True возвращает также неактивные объекты.
+        Объекты из кэша отсоединены от сессии: только для чтения.
         """
         try:
             logger.info(f"get_objects_by_owner called with telegram_id={telegram_id} (type: {type(telegram_id)})")
@@ -891,12 +894,9 @@ class TimeSlotService:
             
             logger.info(f"Created timeslot {new_timeslot.id} for object {object_id}")
             
-            # Инвалидация кэша календаря
+            # Список объектов; календарь сбрасывается по объект-дням после commit
             from core.cache.redis_cache import cache
-            await cache.clear_pattern("calendar_timeslots:*")
-            await cache.clear_pattern("calendar_shifts:*")
-            await cache.clear_pattern("api_response:*")  # API responses
-            await cache.clear_pattern("api_objects:*")  # Панель объектов
+            await cache.invalidate_tags("api_objects")
             
             return new_timeslot
             
@@ -967,12 +967,9 @@ class TimeSlotService:
             
             logger.info(f"Updated timeslot {timeslot_id}")
             
-            # Инвалидация кэша календаря
+            # Список объектов; календарь сбрасывается по объект-дням после commit
             from core.cache.redis_cache import cache
-            await cache.clear_pattern("calendar_timeslots:*")
-            await cache.clear_pattern("calendar_shifts:*")
-            await cache.clear_pattern("api_response:*")  # API responses
-            await cache.clear_pattern("api_objects:*")  # Панель объектов
+            await cache.invalidate_tags("api_objects")
             
             return timeslot
             
@@ -1006,12 +1003,9 @@ class TimeSlotService:
             
             logger.info(f"Soft deleted timeslot {timeslot_id}")
             
-            # Инвалидация кэша календаря
+            # Список объектов; календарь сбрасывается по объект-дням после commit
             from core.cache.redis_cache import cache
-            await cache.clear_pattern("calendar_timeslots:*")
-            await cache.clear_pattern("calendar_shifts:*")
-            await cache.clear_pattern("api_response:*")  # API responses
-            await cache.clear_pattern("api_objects:*")  # Панель объектов
+            await cache.invalidate_tags("api_objects")
             
             return True
             
@@ -1154,12 +1148,9 @@ class TimeSlotService:
             
             logger.info(f"Created timeslot {new_timeslot.id} for object {object_id} by manager {telegram_id}")
             
-            # Инвалидация кэша календаря
+            # Список объектов; календарь сбрасывается по объект-дням после commit
             from core.cache.redis_cache import cache
-            await cache.clear_pattern("calendar_timeslots:*")
-            await cache.clear_pattern("calendar_shifts:*")
-            await cache.clear_pattern("api_response:*")  # API responses
-            await cache.clear_pattern("api_objects:*")  # Панель объектов
+            await cache.invalidate_tags("api_objects")
             
             return new_timeslot
             
@@ -1237,12 +1228,9 @@ class TimeSlotService:
             
             logger.info(f"Updated timeslot {timeslot_id} by manager {telegram_id}")
             
-            # Инвалидация кэша календаря
+            # Список объектов; календарь сбрасывается по объект-дням после commit
             from core.cache.redis_cache import cache
-            await cache.clear_pattern("calendar_timeslots:*")
-            await cache.clear_pattern("calendar_shifts:*")
-            await cache.clear_pattern("api_response:*")  # API responses
-            await cache.clear_pattern("api_objects:*")  # Панель объектов
+            await cache.invalidate_tags("api_objects")
             
             return timeslot
             
@@ -1277,12 +1265,9 @@ class TimeSlotService:
             
             logger.info(f"Soft deleted timeslot {timeslot_id} by manager {telegram_id}")
             
-            # Инвалидация кэша календаря
+            # Список объектов; календарь сбрасывается по объект-дням после commit
             from core.cache.redis_cache import cache
-            await cache.clear_pattern("calendar_timeslots:*")
-            await cache.clear_pattern("calendar_shifts:*")
-            await cache.clear_pattern("api_response:*")  # API responses
-            await cache.clear_pattern("api_objects:*")  # Панель объектов
+            await cache.invalidate_tags("api_objects")
             
             return True
             
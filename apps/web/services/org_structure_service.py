@@ -6,10 +6,15 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from decimal import Decimal
 
-from domain.entities.org_structure import OrgStructureUnit
+from domain.entities.org_structure import OrgStructureClosure, OrgStructureUnit
 from domain.entities.payment_system import PaymentSystem
 from domain.entities.payment_schedule import PaymentSchedule
 from core.logging.logger import logger
+from shared.services.org_structure_closure_service import (
+    get_unit_settings,
+    is_descendant,
+    rebuild_owner_projection,
+)
 
 
 class OrgStructureService:
@@ -100,6 +105,7 @@ class OrgStructureService:
             await upsert_org_unit_report_target(
                 self.db, new_unit.id, "telegram", telegram_report_chat_id,
             )
+            await rebuild_owner_projection(self.db, owner_id)
 
             await self.db.commit()
             await self.db.refresh(new_unit)
@@ -291,6 +297,9 @@ class OrgStructureService:
             if 'is_active' in data:
                 unit.is_active = data['is_active']
             
+            # Настройки наследуются потомками — пересчитать проекцию дерева
+            await rebuild_owner_projection(self.db, owner_id)
+            
             await self.db.commit()
             await self.db.refresh(unit)
             
@@ -307,7 +316,7 @@ class OrgStructureService:
         """
         Получить эффективный organization_profile_id с учетом наследования.
         
-        Если у подразделения не указан профиль - ищет в родительском дереве.
+        Если у подразделения не указан профиль - берется ближайший из родительского дерева.
         
         Args:
             unit_id: ID подразделения
@@ -315,21 +324,12 @@ class OrgStructureService:
         Returns:
             Optional[int]: ID профиля организации или None
         """
-        unit = await self.get_unit_by_id(unit_id)
-        if not unit:
+        settings = await get_unit_settings(self.db, unit_id)
+        if not settings:
             return None
         
-        # Если у текущего подразделения указан профиль - возвращаем его
-        if unit.organization_profile_id:
-            return unit.organization_profile_id
-        
-        # Если нет - ищем у родителя
-        if unit.parent_id:
-            return await self.get_effective_organization_profile_id(unit.parent_id)
-        
-        # Если дошли до корня и профиль не найден - возвращаем None
-        # В этом случае нужно будет использовать профиль по умолчанию владельца
-        return None
+        # None - профиль не найден до корня, используется профиль по умолчанию владельца
+        return settings.organization_profile_id
     
     async def delete_unit(self, unit_id: int, owner_id: int) -> bool:
         """
@@ -367,7 +367,7 @@ class OrgStructureService:
             if objects:
                 raise ValueError(f"Невозможно удалить подразделение: к нему привязано {len(objects)} объектов")
             
-            # Мягкое удаление
+            # Мягкое удаление: подразделение остается в дереве (и в замыкании) неактивным
             unit.is_active = False
             await self.db.commit()
             
@@ -427,8 +427,8 @@ class OrgStructureService:
             unit.parent_id = new_parent_id
             unit.level = new_level
             
-            # Обновить уровни всех дочерних подразделений
-            await self._update_children_levels(unit_id, new_level)
+            # Замыкание, наследуемые настройки и уровни всех потомков
+            await rebuild_owner_projection(self.db, owner_id)
             
             await self.db.commit()
             await self.db.refresh(unit)
@@ -465,16 +465,12 @@ class OrgStructureService:
         if unit_id == new_parent_id:
             return True
         
-        # Получить всех потомков unit_id
-        descendants = await self._get_all_descendants(unit_id)
-        descendant_ids = [d.id for d in descendants]
-        
         # Если new_parent_id среди потомков - будет цикл
-        return new_parent_id in descendant_ids
+        return await is_descendant(self.db, unit_id, new_parent_id)
     
     async def _get_all_descendants(self, unit_id: int) -> List[OrgStructureUnit]:
         """
-        Получить всех потомков подразделения (рекурсивно).
+        Получить всех потомков подразделения (любой глубины, по таблице замыкания).
         
         Args:
             unit_id: ID подразделения
@@ -482,37 +478,15 @@ class OrgStructureService:
         Returns:
             List[OrgStructureUnit]: Список всех потомков
         """
-        # Получить прямых детей
-        query = select(OrgStructureUnit).where(OrgStructureUnit.parent_id == unit_id)
-        result = await self.db.execute(query)
-        children = result.scalars().all()
-        
-        descendants = list(children)
-        
-        # Рекурсивно получить потомков каждого ребенка
-        for child in children:
-            child_descendants = await self._get_all_descendants(child.id)
-            descendants.extend(child_descendants)
-        
-        return descendants
-    
-    async def _update_children_levels(self, unit_id: int, parent_level: int) -> None:
-        """
-        Рекурсивно обновить уровни всех дочерних подразделений.
-        
-        Args:
-            unit_id: ID родительского подразделения
-            parent_level: Уровень родителя
-        """
-        # Получить всех детей
-        query = select(OrgStructureUnit).where(OrgStructureUnit.parent_id == unit_id)
+        descendant_ids = select(OrgStructureClosure.descendant_id).where(
+            OrgStructureClosure.ancestor_id == unit_id,
+            OrgStructureClosure.depth > 0
+        )
+        query = select(OrgStructureUnit).where(
+            OrgStructureUnit.id.in_(descendant_ids)
+        ).order_by(OrgStructureUnit.level, OrgStructureUnit.id)
         result = await self.db.execute(query)
-        children = result.scalars().all()
-        
-        for child in children:
-            child.level = parent_level + 1
-            # Рекурсивно обновить уровни потомков
-            await self._update_children_levels(child.id, child.level)
+        return result.scalars().all()
     
     async def get_inherited_payment_system(self, unit_id: int) -> Optional[PaymentSystem]:
         """
@@ -524,11 +498,11 @@ class OrgStructureService:
         Returns:
             Optional[PaymentSystem]: Система оплаты или None
         """
-        unit = await self.get_unit_by_id(unit_id)
-        if not unit:
+        settings = await get_unit_settings(self.db, unit_id)
+        if not settings:
             return None
         
-        system_id = unit.get_inherited_payment_system_id()
+        system_id = settings.payment_system_id
         if system_id is None:
             return None
         
@@ -547,11 +521,11 @@ class OrgStructureService:
         Returns:
             Optional[PaymentSchedule]: График выплат или None
         """
-        unit = await self.get_unit_by_id(unit_id)
-        if not unit:
+        settings = await get_unit_settings(self.db, unit_id)
+        if not settings:
             return None
         
-        schedule_id = unit.get_inherited_payment_schedule_id()
+        schedule_id = settings.payment_schedule_id
         if schedule_id is None:
             return None
         
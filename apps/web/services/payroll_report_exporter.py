@@ -0,0 +1,281 @@
+"""Экспорт отчёта владельца по начислениям и выплатам в Excel/CSV.
+
+Строки начислений читаются серверным курсором в порядке вывода (группировка
+по объектам и блок сотрудников на нескольких объектах выполняются в SQL) и
+сразу пишутся в write-only книгу: в памяти не держатся ни ORM-объекты
+начислений, ни их calculation_details.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+
+from sqlalchemy import String, case, cast, distinct, func, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.export.streaming import StreamingWorkbook, save_workbook
+from domain.entities.contract import Contract
+from domain.entities.employee_payment import EmployeePayment
+from domain.entities.object import Object
+from domain.entities.payroll_entry import PayrollEntry
+from domain.entities.user import User
+
+
+ACCRUALS_HEADERS = [
+    "Объект",
+    "Сотрудник",
+    "Статус",
+    "Смен",
+    "Часов",
+    "Ставка",
+    "Доплачено",
+    "Удержано",
+    "Сумма",
+]
+PAYMENTS_HEADERS = ["Сотрудник", "К выплате", "Выплачено", "Способы оплаты", "Остаток"]
+MULTI_OBJECT_TITLE = "Сотрудники на нескольких объектах"
+
+# Строк, которые asyncpg забирает с сервера за раз
+STREAM_BATCH_ROWS = 1000
+
+
+@dataclass(frozen=True)
+class ReportPeriod:
+    owner_id: int
+    period_start: date
+    period_end: date
+
+    def filters(self) -> List[Any]:
+        return [
+            Contract.owner_id == self.owner_id,
+            PayrollEntry.period_start >= self.period_start,
+            PayrollEntry.period_end <= self.period_end,
+        ]
+
+
+def contract_status_label(status: Optional[str]) -> str:
+    if status == 'active':
+        return "Работает"
+    if status == 'terminated':
+        return "Уволен"
+    return (status or "").capitalize()
+
+
+def _employee_name(row: Any) -> str:
+    return f"{row.last_name or ''} {row.first_name or ''}".strip()
+
+
+async def count_report_entries(db: AsyncSession, period: ReportPeriod) -> int:
+    query = select(func.count(PayrollEntry.id)).join(
+        Contract, Contract.id == PayrollEntry.contract_id
+    ).where(*period.filters())
+    return (await db.execute(query)).scalar() or 0
+
+
+def accrual_rows_query(period: ReportPeriod):
+    """Начисления в порядке листа: объекты по названию, затем сотрудники на нескольких объектах."""
+    multi_object_employees = select(PayrollEntry.employee_id).join(
+        Contract, Contract.id == PayrollEntry.contract_id
+    ).where(*period.filters()).group_by(
+        PayrollEntry.employee_id
+    ).having(func.count(distinct(PayrollEntry.object_id)) > 1).subquery()
+
+    is_multi = multi_object_employees.c.employee_id.isnot(None)
+    object_title = func.coalesce(Object.name, literal("Объект #") + cast(PayrollEntry.object_id, String))
+    last_name = func.coalesce(User.last_name, "")
+    first_name = func.coalesce(User.first_name, "")
+    shifts = PayrollEntry.calculation_details["shifts"]
+    shifts_count = case(
+        (func.jsonb_typeof(shifts) == "array", func.jsonb_array_length(shifts)),
+        else_=0,
+    )
+
+    return select(
+        is_multi.label("is_multi"),
+        PayrollEntry.object_id,
+        object_title.label("object_title"),
+        Object.name.label("object_name"),
+        User.last_name,
+        User.first_name,
+        Contract.status.label("contract_status"),
+        shifts_count.label("shifts_count"),
+        PayrollEntry.hours_worked,
+        PayrollEntry.hourly_rate,
+        PayrollEntry.total_bonuses,
+        PayrollEntry.total_deductions,
+        PayrollEntry.net_amount,
+    ).join(
+        Contract, Contract.id == PayrollEntry.contract_id
+    ).join(
+        User, User.id == PayrollEntry.employee_id
+    ).outerjoin(
+        Object, Object.id == PayrollEntry.object_id
+    ).outerjoin(
+        multi_object_employees, multi_object_employees.c.employee_id == PayrollEntry.employee_id
+    ).where(
+        *period.filters()
+    ).order_by(
+        is_multi,
+        case((is_multi, None), else_=object_title),
+        case((is_multi, None), else_=PayrollEntry.object_id),
+        case((is_multi, last_name), else_=None),
+        case((is_multi, first_name), else_=None),
+        PayrollEntry.object_id,
+        PayrollEntry.employee_id,
+    ).execution_options(yield_per=STREAM_BATCH_ROWS)
+
+
+async def stream_accrual_rows(db: AsyncSession, period: ReportPeriod) -> AsyncIterator[Any]:
+    """Строки начислений через серверный курсор."""
+    result = await db.stream(accrual_rows_query(period))
+    async for row in result:
+        yield row
+
+
+def _entry_cells(row: Any, object_cell: str) -> List[Any]:
+    return [
+        object_cell,
+        _employee_name(row),
+        contract_status_label(row.contract_status),
+        row.shifts_count or 0,
+        float(row.hours_worked or 0),
+        float(row.hourly_rate or 0),
+        float(row.total_bonuses or 0),
+        float(row.total_deductions or 0),
+        float(row.net_amount or 0),
+    ]
+
+
+async def write_accruals_sheet(sheet: Any, rows: AsyncIterator[Any]) -> int:
+    """Лист начислений с итогами по объектам; возвращает число начислений."""
+    count = 0
+    grand_total = 0.0
+    current_object: Optional[tuple] = None
+    subtotal = 0.0
+    multi_started = False
+
+    def close_object() -> None:
+        sheet.append(["", "", "", "", "", "", "", "Итого по объекту", subtotal])
+        sheet.append([])
+
+    async for row in rows:
+        count += 1
+        total = float(row.net_amount or 0)
+        grand_total += total
+
+        if row.is_multi:
+            if current_object is not None:
+                close_object()
+                current_object = None
+            if not multi_started:
+                sheet.append([MULTI_OBJECT_TITLE, "", "", "", "", "", "", "", ""])
+                multi_started = True
+            sheet.append(_entry_cells(row, row.object_name or "—"))
+            continue
+
+        object_key = (row.object_title, row.object_id)
+        if object_key != current_object:
+            if current_object is not None:
+                close_object()
+            current_object = object_key
+            subtotal = 0.0
+            sheet.append([row.object_title, "", "", "", "", "", "", "", ""])
+        subtotal += total
+        sheet.append(_entry_cells(row, ""))
+
+    if current_object is not None:
+        close_object()
+    if multi_started:
+        sheet.append([])
+    sheet.append(["", "", "", "", "", "", "", "ОБЩИЙ ИТОГ", grand_total])
+    return count
+
+
+async def load_payment_rows(db: AsyncSession, period: ReportPeriod) -> List[Dict[str, Any]]:
+    """Итоги по сотрудникам для листа выплат (агрегаты в SQL, строка на сотрудника)."""
+    accrued_query = select(
+        PayrollEntry.employee_id,
+        User.last_name,
+        User.first_name,
+        func.sum(PayrollEntry.net_amount).label("net_total"),
+    ).join(
+        Contract, Contract.id == PayrollEntry.contract_id
+    ).join(
+        User, User.id == PayrollEntry.employee_id
+    ).where(
+        *period.filters()
+    ).group_by(PayrollEntry.employee_id, User.last_name, User.first_name)
+
+    paid_query = select(
+        EmployeePayment.employee_id,
+        func.sum(EmployeePayment.amount).label("paid"),
+        func.array_agg(distinct(EmployeePayment.payment_method)).label("methods"),
+    ).join(
+        PayrollEntry, EmployeePayment.payroll_entry_id == PayrollEntry.id
+    ).join(
+        Contract, Contract.id == PayrollEntry.contract_id
+    ).where(
+        *period.filters()
+    ).group_by(EmployeePayment.employee_id)
+
+    paid = {row.employee_id: row for row in (await db.execute(paid_query)).all()}
+
+    rows = []
+    for row in (await db.execute(accrued_query)).all():
+        net_total = float(row.net_total or 0)
+        payment = paid.get(row.employee_id)
+        paid_amount = float(payment.paid or 0) if payment else 0.0
+        methods = sorted(m for m in (payment.methods or []) if m) if payment else []
+        rows.append({
+            "last_name": row.last_name or "",
+            "first_name": row.first_name or "",
+            "net_total": net_total,
+            "paid": paid_amount,
+            "payment_methods": ", ".join(methods),
+            "remainder": net_total - paid_amount,
+        })
+    rows.sort(key=lambda x: (x["last_name"], x["first_name"]))
+    return rows
+
+
+def write_payments_sheet(sheet: Any, employees: Sequence[Dict[str, Any]]) -> None:
+    if not employees:
+        sheet.append(["Нет данных", "", "", "", ""])
+        return
+    for row in employees:
+        sheet.append([
+            f"{row['last_name']} {row['first_name']}".strip(),
+            row["net_total"],
+            row["paid"],
+            row["payment_methods"],
+            row["remainder"],
+        ])
+    sheet.append([
+        "ИТОГО:",
+        sum(row["net_total"] for row in employees),
+        sum(row["paid"] for row in employees),
+        "",
+        sum(row["remainder"] for row in employees),
+    ])
+
+
+async def write_payroll_report(db: AsyncSession, period: ReportPeriod, path: Optional[str] = None) -> str:
+    """Формирует XLSX-отчёт в файл и возвращает путь к нему."""
+    workbook = StreamingWorkbook()
+    accruals = workbook.add_sheet("Отчет по начислениям", ACCRUALS_HEADERS)
+    await write_accruals_sheet(accruals, stream_accrual_rows(db, period))
+    payments = workbook.add_sheet("Отчет по выплатам", PAYMENTS_HEADERS)
+    write_payments_sheet(payments, await load_payment_rows(db, period))
+    return await save_workbook(workbook, path)
+
+
+async def iter_accrual_csv_rows(db: AsyncSession, period: ReportPeriod) -> AsyncIterator[List[Any]]:
+    """Строки начислений для CSV (без итоговых строк, объект в каждой строке)."""
+    async for row in stream_accrual_rows(db, period):
+        yield _entry_cells(row, row.object_name or row.object_title or "—")
+
+
+def report_filename(period: ReportPeriod, extension: str = "xlsx") -> str:
+    return f"payroll_report_{period.period_start.isoformat()}_{period.period_end.isoformat()}.{extension}"
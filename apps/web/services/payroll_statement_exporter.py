@@ -2,22 +2,14 @@
 
 from __future__ import annotations
 
-from decimal import Decimal
-from io import BytesIO
 from typing import Any, Dict, List
 
-from openpyxl import Workbook
-from openpyxl.styles import Alignment, Font, PatternFill
+from core.export.streaming import StreamingWorkbook
 
 
-def build_statement_workbook(statement: Dict[str, Any]) -> bytes:
-    """Формирует Excel-файл по данным расчётного листа."""
-    wb = Workbook()
-    ws_summary = wb.active
-    ws_summary.title = "Расчётный лист"
-
-    header_font = Font(bold=True)
-    header_fill = PatternFill(start_color="E5E5E5", end_color="E5E5E5", fill_type="solid")
+def build_statement_workbook(statement: Dict[str, Any]) -> StreamingWorkbook:
+    """Формирует write-only книгу по данным расчётного листа (сохранение — save_workbook)."""
+    workbook = StreamingWorkbook()
 
     summary_headers = [
         "Период",
@@ -29,15 +21,10 @@ def build_statement_workbook(statement: Dict[str, Any]) -> bytes:
         "Выплачено",
         "Остаток",
     ]
-    ws_summary.append(summary_headers)
-    for cell in ws_summary[1]:
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = Alignment(horizontal="center")
+    ws_summary = workbook.add_sheet("Расчётный лист", summary_headers)
 
     for block in statement["entries"]:
         entry = block.entry
-        period = f"{entry.period_start.strftime('%d.%m.%Y')} — {entry.period_end.strftime('%d.%m.%Y')}"
         object_name = entry.object_.name if entry.object_ else "—"
         gross = float(entry.gross_amount or 0)
         bonus = float(entry.total_bonuses or 0)
@@ -46,7 +33,7 @@ def build_statement_workbook(statement: Dict[str, Any]) -> bytes:
         paid = float(block.paid_amount)
         balance = net - paid
 
-        ws_summary.append([period, object_name, gross, bonus, deduction, net, paid, balance])
+        ws_summary.append([_period_label(entry), object_name, gross, bonus, deduction, net, paid, balance])
 
     totals = statement["totals"]
     ws_summary.append([])
@@ -63,37 +50,20 @@ def build_statement_workbook(statement: Dict[str, Any]) -> bytes:
         ]
     )
 
-    _auto_fit_columns(ws_summary)
-
-    _add_adjustments_sheet(wb, statement["entries"])
-    _add_payments_sheet(wb, statement["entries"])
-
-    output = BytesIO()
-    wb.save(output)
-    output.seek(0)
-    return output.getvalue()
+    _add_adjustments_sheet(workbook, statement["entries"])
+    _add_payments_sheet(workbook, statement["entries"])
+    return workbook
 
 
-def _auto_fit_columns(worksheet) -> None:
-    for column in worksheet.columns:
-        max_length = 0
-        column_letter = column[0].column_letter
-        for cell in column:
-            if cell.value is not None:
-                max_length = max(max_length, len(str(cell.value)))
-        worksheet.column_dimensions[column_letter].width = min(max_length + 2, 60)
+def _period_label(entry: Any) -> str:
+    return f"{entry.period_start.strftime('%d.%m.%Y')} — {entry.period_end.strftime('%d.%m.%Y')}"
 
 
-def _add_adjustments_sheet(workbook: Workbook, entries: List[Any]) -> None:
-    ws = workbook.create_sheet("Корректировки")
-    headers = ["Период", "Тип", "Сумма", "Описание", "Привязка"]
-    ws.append(headers)
-    for cell in ws[1]:
-        cell.font = Font(bold=True)
-        cell.fill = PatternFill(start_color="E5E5E5", end_color="E5E5E5", fill_type="solid")
+def _add_adjustments_sheet(workbook: StreamingWorkbook, entries: List[Any]) -> None:
+    ws = workbook.add_sheet("Корректировки", ["Период", "Тип", "Сумма", "Описание", "Привязка"])
 
     for block in entries:
-        period = f"{block.entry.period_start.strftime('%d.%m.%Y')} — {block.entry.period_end.strftime('%d.%m.%Y')}"
+        period = _period_label(block.entry)
         for adj in block.adjustments:
             adj_type = adj.get_type_label()
             amount = float(adj.amount or 0)
@@ -101,19 +71,12 @@ def _add_adjustments_sheet(workbook: Workbook, entries: List[Any]) -> None:
             link = f"Смена #{adj.shift_id}" if adj.shift_id else ""
             ws.append([period, adj_type, amount, description, link])
 
-    _auto_fit_columns(ws)
 
-
-def _add_payments_sheet(workbook: Workbook, entries: List[Any]) -> None:
-    ws = workbook.create_sheet("Выплаты")
-    headers = ["Период", "Дата", "Сумма", "Способ", "Статус", "Комментарий"]
-    ws.append(headers)
-    for cell in ws[1]:
-        cell.font = Font(bold=True)
-        cell.fill = PatternFill(start_color="E5E5E5", end_color="E5E5E5", fill_type="solid")
+def _add_payments_sheet(workbook: StreamingWorkbook, entries: List[Any]) -> None:
+    ws = workbook.add_sheet("Выплаты", ["Период", "Дата", "Сумма", "Способ", "Статус", "Комментарий"])
 
     for block in entries:
-        period = f"{block.entry.period_start.strftime('%d.%m.%Y')} — {block.entry.period_end.strftime('%d.%m.%Y')}"
+        period = _period_label(block.entry)
         for payment in block.payments:
             ws.append(
                 [
@@ -125,6 +88,3 @@ def _add_payments_sheet(workbook: Workbook, entries: List[Any]) -> None:
                     payment.notes or "",
                 ]
             )
-
-    _auto_fit_columns(ws)
-
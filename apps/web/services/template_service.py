@@ -2,7 +2,7 @@
 Сервис для работы с шаблонами планирования
 """
 from typing import List, Optional, Dict, Any
-from datetime import datetime, date, timedelta
+from datetime import datetime, date, time, timedelta
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, or_
 from sqlalchemy.orm import selectinload
@@ -273,69 +273,104 @@ class TemplateService:
             if not template:
                 return {"success": False, "error": "Шаблон не найден"}
             
-            created_slots = []
-            total_created = 0
-            
-            # Применяем шаблон к каждому объекту
-            for object_id_str in object_ids:
-                # Преобразуем строку в число
-                try:
-                    object_id = int(object_id_str)
-                except (ValueError, TypeError):
-                    logger.warning(f"Invalid object_id: {object_id_str}")
-                    continue
-                
-                # Проверяем, что объект принадлежит владельцу
-                from apps.web.services.object_service import ObjectService
-                object_service = ObjectService(self.db)
-                obj = await object_service.get_object_by_id(object_id, owner_telegram_id)
-                if not obj:
-                    logger.warning(f"Object {object_id} not found for owner {owner_telegram_id}")
-                    continue
-                
-                # Создаем слоты для этого объекта
-                current_date = start_date
-                while current_date <= end_date:
-                    if self._should_create_slots_for_date(template, current_date):
-                        # Создаем тайм-слот для объекта
-                        timeslot_data = {
-                            "slot_date": current_date,
-                            "start_time": start_time_override or template.start_time,
-                            "end_time": end_time_override or template.end_time,
-                            "hourly_rate": hourly_rate_override if hourly_rate_override is not None else template.hourly_rate,
-                            "is_active": True
-                        }
-                        
-                        # Создаем тайм-слот через ObjectService
-                        from apps.web.services.object_service import TimeSlotService
-                        timeslot_service = TimeSlotService(self.db)
-                        timeslot = await timeslot_service.create_timeslot(timeslot_data, object_id, owner_telegram_id)
-                        
-                        if timeslot:
-                            created_slots.append({
-                                "id": timeslot.id,
-                                "object_id": object_id,
-                                "object_name": obj.name,
-                                "slot_date": current_date.isoformat(),
-                                "start_time": template.start_time,
-                                "end_time": template.end_time,
-                                "hourly_rate": template.hourly_rate
-                            })
-                            total_created += 1
-                    
-                    current_date += timedelta(days=1)
+            # Объекты владельца — одним запросом
+            owner_id = await self._get_user_internal_id(owner_telegram_id)
+            requested_ids = self._parse_object_ids(object_ids)
+            objects_query = select(Object.id, Object.name).where(
+                Object.id.in_(requested_ids),
+                Object.owner_id == owner_id
+            )
+            objects = (await self.db.execute(objects_query)).all()
+            for object_id in sorted(set(requested_ids) - {obj.id for obj in objects}):
+                logger.warning(f"Object {object_id} not found for owner {owner_telegram_id}")
             
-            return {
-                "success": True,
-                "created_slots_count": total_created,
-                "created_slots": created_slots,
-                "message": f"Шаблон применен к {len(object_ids)} объектам. Создано {total_created} тайм-слотов."
-            }
+            return await self._materialize_template(
+                template, start_date, end_date, objects, len(object_ids),
+                start_time_override, end_time_override, hourly_rate_override
+            )
             
         except Exception as e:
             logger.error(f"Error applying template to objects: {e}")
             return {"success": False, "error": f"Ошибка применения шаблона: {str(e)}"}
 
+    @staticmethod
+    def _parse_object_ids(object_ids: List[Any]) -> List[int]:
+        """ID объектов из формы (строки/числа), некорректные пропускаются"""
+        parsed = []
+        for object_id_str in object_ids:
+            try:
+                parsed.append(int(object_id_str))
+            except (ValueError, TypeError):
+                logger.warning(f"Invalid object_id: {object_id_str}")
+        return parsed
+    
+    async def _materialize_template(
+        self,
+        template: PlanningTemplate,
+        start_date: date,
+        end_date: date,
+        objects: List[Any],
+        requested_count: int,
+        start_time_override: Optional[str],
+        end_time_override: Optional[str],
+        hourly_rate_override: Optional[int],
+    ) -> Dict[str, Any]:
+        """Создание тайм-слотов шаблона для проверенных объектов одной транзакцией"""
+        from shared.services.timeslot_planner_service import (
+            PlannedSlot,
+            TimeslotPlanner,
+            plan_dates,
+            repeat_weekday_mask,
+        )
+        
+        start_time_str = start_time_override or template.start_time
+        end_time_str = end_time_override or template.end_time
+        hourly_rate = hourly_rate_override if hourly_rate_override is not None else template.hourly_rate
+        start_time_val = time.fromisoformat(start_time_str)
+        end_time_val = time.fromisoformat(end_time_str)
+        
+        dates = plan_dates(start_date, end_date, repeat_weekday_mask(template.repeat_type, template.repeat_days))
+        slots = [
+            PlannedSlot(
+                object_id=obj.id,
+                slot_date=slot_date,
+                start_time=start_time_val,
+                end_time=end_time_val,
+                hourly_rate=hourly_rate,
+            )
+            for obj in objects
+            for slot_date in dates
+        ]
+        
+        # Дубликаты — как в TimeSlotService.create_timeslot: активный слот с тем же временем
+        try:
+            result = await TimeslotPlanner(self.db).materialize(slots)
+        except Exception:
+            await self.db.rollback()
+            raise
+        
+        object_names = {obj.id: obj.name for obj in objects}
+        created_slots = [
+            {
+                "id": row["id"],
+                "object_id": row["object_id"],
+                "object_name": object_names.get(row["object_id"]),
+                "slot_date": row["slot_date"].isoformat(),
+                "start_time": start_time_str,
+                "end_time": end_time_str,
+                "hourly_rate": hourly_rate
+            }
+            for row in result.created
+        ]
+        total_created = len(created_slots)
+        
+        return {
+            "success": True,
+            "created_slots_count": total_created,
+            "created_slots": created_slots,
+            "message": f"Шаблон применен к {requested_count} объектам. Создано {total_created} тайм-слотов."
+        }
+    
     async def _get_user_internal_id(self, telegram_id: int) -> int:
         """Получение внутреннего ID пользователя по Telegram ID"""
         try:
@@ -409,64 +444,23 @@ class TemplateService:
             if not template:
                 return {"success": False, "error": "Публичный шаблон не найден"}
             
+            # Доступ менеджера и объекты — без запросов на каждый объект
             permission_service = ManagerPermissionService(self.db)
-            created_slots = []
-            total_created = 0
-            
-            # Применяем шаблон к каждому объекту
-            for object_id in object_ids:
-                # Проверяем доступ менеджера к объекту
-                has_access = await permission_service.check_manager_object_access(telegram_id, object_id)
-                if not has_access:
+            accessible_ids = set(await permission_service.get_manager_object_ids(telegram_id))
+            requested_ids = self._parse_object_ids(object_ids)
+            for object_id in requested_ids:
+                if object_id not in accessible_ids:
                     logger.warning(f"Manager {telegram_id} has no access to object {object_id}")
-                    continue
-                
-                # Получаем объект
-                from apps.web.services.object_service import ObjectService
-                object_service = ObjectService(self.db)
-                obj = await object_service.get_object_by_id_for_manager(object_id, telegram_id)
-                if not obj:
-                    logger.warning(f"Object {object_id} not found for manager {telegram_id}")
-                    continue
-                
-                # Создаем слоты для этого объекта
-                current_date = start_date
-                while current_date <= end_date:
-                    if self._should_create_slots_for_date(template, current_date):
-                        # Создаем тайм-слот для объекта
-                        timeslot_data = {
-                            "slot_date": current_date,
-                            "start_time": start_time_override or template.start_time,
-                            "end_time": end_time_override or template.end_time,
-                            "hourly_rate": hourly_rate_override if hourly_rate_override is not None else template.hourly_rate,
-                            "is_active": True
-                        }
-                        
-                        # Создаем тайм-слот через TimeSlotService
-                        from apps.web.services.object_service import TimeSlotService
-                        timeslot_service = TimeSlotService(self.db)
-                        timeslot = await timeslot_service.create_timeslot_for_manager(timeslot_data, object_id, telegram_id)
-                        
-                        if timeslot:
-                            created_slots.append({
-                                "id": timeslot.id,
-                                "object_id": object_id,
-                                "object_name": obj.name,
-                                "slot_date": current_date.isoformat(),
-                                "start_time": template.start_time,
-                                "end_time": template.end_time,
-                                "hourly_rate": template.hourly_rate
-                            })
-                            total_created += 1
-                    
-                    current_date += timedelta(days=1)
             
-            return {
-                "success": True,
-                "created_slots_count": total_created,
-                "created_slots": created_slots,
-                "message": f"Шаблон применен к {len(object_ids)} объектам. Создано {total_created} тайм-слотов."
-            }
+            objects_query = select(Object.id, Object.name).where(
+                Object.id.in_([object_id for object_id in requested_ids if object_id in accessible_ids])
+            )
+            objects = (await self.db.execute(objects_query)).all()
+            
+            return await self._materialize_template(
+                template, start_date, end_date, objects, len(object_ids),
+                start_time_override, end_time_override, hourly_rate_override
+            )
             
         except Exception as e:
             logger.error(f"Error applying template to objects for manager: {e}")
@@ -1257,7 +1257,10 @@
       const effectiveSlotStart = slotStart || fallbackSlotStart || '';
       const effectiveSlotEnd = slotEnd || fallbackSlotEnd || '';
 
-      const freeIntervals = calculateFreeIntervals(effectiveSlotStart, effectiveSlotEnd, plannedShifts);
+      // Свободные интервалы считает сервер (с учетом вместимости слота и смен без привязки)
+      const freeIntervals = Array.isArray(slotInfo.free_intervals)
+        ? slotInfo.free_intervals
+        : calculateFreeIntervals(effectiveSlotStart, effectiveSlotEnd, plannedShifts);
       // Определяем, есть ли запланированная смена для редактирования
       const scheduleId = activeConfig.scheduleId;
       const isEditMode = scheduleId !== null && scheduleId !== undefined;
@@ -4,7 +4,7 @@ Jinja2 фильтры для приложения
 from datetime import datetime
 from typing import Optional, List
 import json
-from .static_version import get_static_url_with_version
+from .static_manifest import get_static_manifest
 from core.utils.timezone_helper import TimezoneHelper
 from core.config.menu_config import MenuConfig
 
@@ -17,9 +17,9 @@ def static_version_filter(file_path: str) -> str:
         file_path: Путь к статическому файлу относительно static/
         
     Returns:
-        URL с версией
+        URL хэшированной копии файла из манифеста (без обращения к диску)
     """
-    return get_static_url_with_version(file_path)
+    return get_static_manifest().url(file_path)
 
 
 def format_datetime_local(dt: Optional[datetime], timezone_str: str = 'Europe/Moscow', format_str: str = '%d.%m.%Y %H:%M') -> str:
@@ -0,0 +1,261 @@
+"""
+Манифест статических файлов с хэшированными именами
+
+Манифест строится при сборке образа (scripts/build_static_manifest.py) или
+при старте приложения, если исходники изменились. Для каждого файла из
+static/ в каталоге сборки создается копия с хэшем содержимого в имени
+(css/main.css -> css/main.3f2a9c1b0d.css) и сжатые варианты .br/.gz.
+
+Фильтр static_version превращается в поиск по словарю, а хэшированные
+файлы отдаются с Cache-Control: immutable — браузер не перепроверяет их,
+пока в шаблоне не появится новое имя.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.types import Scope
+
+from core.config.settings import settings
+from core.logging.logger import logger
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli необязателен, остается gzip
+    brotli = None
+
+
+STATIC_DIR = Path(__file__).parent.parent / "static"
+STATIC_URL = "/static/"
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+# Сжимаются только текстовые форматы: изображения и шрифты уже сжаты
+COMPRESSIBLE_SUFFIXES = {".css", ".js", ".mjs", ".json", ".map", ".svg", ".txt", ".html", ".ico"}
+MIN_COMPRESS_SIZE = 512
+
+# Кодировка -> расширение сжатого варианта, в порядке предпочтения
+ENCODING_SUFFIXES = (("br", ".br"), ("gzip", ".gz"))
+
+
+@dataclass
+class StaticAsset:
+    """Хэшированная копия файла и ее сжатые варианты."""
+
+    path: str  # путь относительно static/ с хэшем в имени
+    encodings: Tuple[str, ...] = ()
+
+
+@dataclass
+class StaticManifest:
+    """Соответствие исходных путей хэшированным копиям."""
+
+    build_dir: Path
+    assets: Dict[str, StaticAsset] = field(default_factory=dict)
+    fingerprint: str = ""
+
+    def __post_init__(self):
+        self.hashed: Dict[str, StaticAsset] = {asset.path: asset for asset in self.assets.values()}
+
+    def url(self, file_path: str) -> str:
+        """URL файла: хэшированный, если файл есть в манифесте."""
+        asset = self.assets.get(file_path.lstrip("/"))
+        return f"{STATIC_URL}{asset.path if asset else file_path.lstrip('/')}"
+
+
+def hashed_name(file_path: str, content: bytes) -> str:
+    """css/main.css -> css/main.<hash>.css"""
+    digest = hashlib.md5(content).hexdigest()[:10]
+    path = Path(file_path)
+    return path.with_name(f"{path.stem}.{digest}{path.suffix}").as_posix()
+
+
+def _source_files(static_dir: Path) -> List[Tuple[str, Path]]:
+    files = []
+    for root, dirs, names in os.walk(static_dir):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for name in sorted(names):
+            if name.startswith("."):
+                continue
+            full_path = Path(root) / name
+            files.append((full_path.relative_to(static_dir).as_posix(), full_path))
+    return files
+
+
+def source_fingerprint(static_dir: Path) -> str:
+    """Отпечаток исходников по путям, размерам и времени изменения (без чтения файлов)."""
+    digest = hashlib.md5()
+    for rel_path, full_path in _source_files(static_dir):
+        stat = full_path.stat()
+        digest.update(f"{rel_path}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+
+def _compressed_variants(content: bytes) -> Dict[str, bytes]:
+    variants = {}
+    if brotli is not None:
+        variants["br"] = brotli.compress(content, quality=11)
+    variants["gzip"] = gzip.compress(content, compresslevel=9, mtime=0)
+    # Сжатие, не давшее выигрыша, не нужно
+    return {encoding: data for encoding, data in variants.items() if len(data) < len(content)}
+
+
+def _write_if_changed(path: Path, content: bytes) -> None:
+    if path.exists() and path.stat().st_size == len(content) and path.read_bytes() == content:
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    tmp_path.write_bytes(content)
+    os.replace(tmp_path, path)
+
+
+def build_manifest(static_dir: Path = STATIC_DIR, build_dir: Optional[Path] = None) -> StaticManifest:
+    """Собрать хэшированные копии, сжатые варианты и manifest.json.
+
+    Файлы сборки, не попавшие в новый манифест, удаляются.
+    """
+    build_dir = Path(build_dir or settings.static_build_dir)
+    fingerprint = source_fingerprint(static_dir)
+    assets: Dict[str, StaticAsset] = {}
+    written = {MANIFEST_NAME}
+
+    for rel_path, full_path in _source_files(static_dir):
+        content = full_path.read_bytes()
+        asset_path = hashed_name(rel_path, content)
+        _write_if_changed(build_dir / asset_path, content)
+        written.add(asset_path)
+
+        encodings = []
+        if full_path.suffix.lower() in COMPRESSIBLE_SUFFIXES and len(content) >= MIN_COMPRESS_SIZE:
+            variants = _compressed_variants(content)
+            for encoding, suffix in ENCODING_SUFFIXES:
+                if encoding in variants:
+                    _write_if_changed(build_dir / f"{asset_path}{suffix}", variants[encoding])
+                    written.add(f"{asset_path}{suffix}")
+                    encodings.append(encoding)
+        assets[rel_path] = StaticAsset(path=asset_path, encodings=tuple(encodings))
+
+    data = {
+        "version": MANIFEST_VERSION,
+        "fingerprint": fingerprint,
+        "assets": {
+            rel_path: {"path": asset.path, "encodings": list(asset.encodings)}
+            for rel_path, asset in assets.items()
+        },
+    }
+    _write_if_changed(build_dir / MANIFEST_NAME, json.dumps(data, indent=2, sort_keys=True).encode())
+
+    for rel_path, full_path in _source_files(build_dir):
+        if rel_path not in written:
+            full_path.unlink()
+
+    logger.info("Static manifest built", assets=len(assets), build_dir=str(build_dir))
+    return StaticManifest(build_dir=build_dir, assets=assets, fingerprint=fingerprint)
+
+
+def read_manifest(build_dir: Path) -> Optional[StaticManifest]:
+    """Прочитать manifest.json; None — если его нет или формат устарел."""
+    manifest_path = build_dir / MANIFEST_NAME
+    try:
+        data = json.loads(manifest_path.read_text())
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"Invalid static manifest: {e}", path=str(manifest_path))
+        return None
+    if data.get("version") != MANIFEST_VERSION:
+        return None
+    assets = {
+        rel_path: StaticAsset(path=entry["path"], encodings=tuple(entry.get("encodings", ())))
+        for rel_path, entry in data.get("assets", {}).items()
+    }
+    return StaticManifest(build_dir=build_dir, assets=assets, fingerprint=data.get("fingerprint", ""))
+
+
+def load_manifest(static_dir: Path = STATIC_DIR, build_dir: Optional[Path] = None) -> StaticManifest:
+    """Манифест сборки; пересобирается, если исходники изменились после нее."""
+    build_dir = Path(build_dir or settings.static_build_dir)
+    manifest = read_manifest(build_dir)
+    if manifest is not None and manifest.fingerprint == source_fingerprint(static_dir):
+        return manifest
+    try:
+        return build_manifest(static_dir, build_dir)
+    except OSError as e:
+        # Каталог сборки недоступен для записи: отдаем исходные файлы без хэшей
+        logger.error(f"Failed to build static manifest: {e}", build_dir=str(build_dir))
+        return StaticManifest(build_dir=build_dir)
+
+
+_manifest: Optional[StaticManifest] = None
+
+
+def get_static_manifest() -> StaticManifest:
+    """Манифест процесса (загружается один раз)."""
+    global _manifest
+    if _manifest is None:
+        _manifest = load_manifest()
+    return _manifest
+
+
+# ----------------------------------------------------------------------
+# Отдача статики
+# ----------------------------------------------------------------------
+
+def choose_encoding(accept_encoding: str, available: Tuple[str, ...]) -> Optional[str]:
+    """Лучшая из доступных кодировок, которую принимает клиент."""
+    accepted = set()
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        params = params.replace(" ", "")
+        if params.startswith("q="):
+            try:
+                if float(params[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(name.strip().lower())
+    for encoding in available:
+        if encoding in accepted:
+            return encoding
+    return None
+
+
+class ImmutableStaticFiles(StaticFiles):
+    """StaticFiles, отдающий хэшированные копии из манифеста с долгим кэшированием.
+
+    Хэшированные пути отдаются из каталога сборки с Cache-Control: immutable и
+    предсжатым вариантом по Accept-Encoding. Прочие файлы — из static/ с
+    перепроверкой по ETag.
+    """
+
+    def __init__(self, *args, manifest: StaticManifest, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.manifest = manifest
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        asset = self.manifest.hashed.get(Path(path).as_posix())
+        if asset is None or scope["method"] not in ("GET", "HEAD"):
+            response = await super().get_response(path, scope)
+            if response.status_code in (200, 304):
+                response.headers["Cache-Control"] = "no-cache"
+            return response
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""), asset.encodings)
+        file_path = self.manifest.build_dir / asset.path
+        headers = {
+            "Cache-Control": f"public, max-age={settings.static_max_age_seconds}, immutable",
+            "Vary": "Accept-Encoding",
+        }
+        if encoding is not None:
+            file_path = file_path.with_name(file_path.name + dict(ENCODING_SUFFIXES)[encoding])
+            headers["Content-Encoding"] = encoding
+        media_type = mimetypes.guess_type(asset.path)[0] or "text/plain"
+        return FileResponse(file_path, headers=headers, media_type=media_type, method=scope["method"])
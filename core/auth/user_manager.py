@@ -6,7 +6,6 @@
 from datetime import datetime
 from typing import Dict, Optional, List
 from core.logging.logger import logger
-from core.database.connection import get_sync_session
 from core.database.session import get_async_session
 from domain.entities.user import User
 from domain.entities.messenger_account import MessengerAccount
@@ -33,7 +32,7 @@ class UserManager:
         """Отключено: не используем JSON."""
         return
     
-    def _ensure_messenger_account_tg(
+    async def _ensure_messenger_account_tg(
         self, session, user_id: int, telegram_id: int, username: Optional[str] = None
     ) -> None:
         """Добавить запись в messenger_accounts если её нет (provider=telegram)."""
@@ -44,7 +43,7 @@ class UserManager:
                 MessengerAccount.external_user_id == str(telegram_id),
             )
         )
-        existing = session.execute(q).scalar_one_or_none()
+        existing = (await session.execute(q)).scalar_one_or_none()
         if existing:
             return
         ma = MessengerAccount(
@@ -55,16 +54,16 @@ class UserManager:
             username=username,
         )
         session.add(ma)
-        session.commit()
+        await session.commit()
 
-    def register_user(self, user_id: int, first_name: str, username: Optional[str] = None,
+    async def register_user(self, user_id: int, first_name: str, username: Optional[str] = None,
                      last_name: Optional[str] = None, language_code: Optional[str] = None) -> dict:
         """Регистрируем нового пользователя. user_id = telegram_id от бота."""
-        with get_sync_session() as session:
+        async with get_async_session() as session:
             query = select(User).where(User.telegram_id == user_id)
-            existing_user = session.execute(query).scalar_one_or_none()
+            existing_user = (await session.execute(query)).scalar_one_or_none()
             if existing_user:
-                self._ensure_messenger_account_tg(session, existing_user.id, user_id, username)
+                await self._ensure_messenger_account_tg(session, existing_user.id, user_id, username)
                 logger.info(f"User already exists in DB: {user_id} ({first_name})")
                 return {
                     "id": existing_user.id,
@@ -83,9 +82,9 @@ class UserManager:
                 is_active=True,
             )
             session.add(new_user)
-            session.commit()
-            session.refresh(new_user)
-            self._ensure_messenger_account_tg(session, new_user.id, user_id, username)
+            await session.commit()
+            await session.refresh(new_user)
+            await self._ensure_messenger_account_tg(session, new_user.id, user_id, username)
             logger.info(f"Registered new user in DB: {user_id} ({first_name})")
             return {
                 "id": new_user.id,
@@ -95,12 +94,12 @@ class UserManager:
                 "is_active": True,
             }
     
-    def get_user(self, user_id: int) -> Optional[dict]:
+    async def get_user(self, user_id: int) -> Optional[dict]:
         """Получаем пользователя по Telegram ID из БД."""
         try:
-            with get_sync_session() as session:
+            async with get_async_session() as session:
                 query = select(User).where(User.telegram_id == user_id)
-                db_user = session.execute(query).scalar_one_or_none()
+                db_user = (await session.execute(query)).scalar_one_or_none()
                 if not db_user:
                     return None
                 return {
@@ -175,9 +174,9 @@ class UserManager:
     async def get_all_users(self) -> List[dict]:
         """Получение всех пользователей."""
         try:
-            with get_sync_session() as session:
+            async with get_async_session() as session:
                 query = select(User).order_by(User.created_at.desc())
-                result = session.execute(query)
+                result = await session.execute(query)
                 users = result.scalars().all()
                 
                 return [
@@ -233,9 +232,9 @@ class UserManager:
     async def update_user_role(self, user_id: int, role: str) -> bool:
         """Обновление роли пользователя. user_id = внутренний users.id."""
         try:
-            with get_sync_session() as session:
+            async with get_async_session() as session:
                 query = select(User).where(User.id == user_id)
-                result = session.execute(query)
+                result = await session.execute(query)
                 user = result.scalar_one_or_none()
                 
                 if not user:
@@ -246,7 +245,7 @@ class UserManager:
                 if hasattr(user, 'roles') and user.roles:
                     user.roles = [role]
                 
-                session.commit()
+                await session.commit()
                 
                 logger.info(f"Updated user {user_id} role to {role}")
                 return True
@@ -257,9 +256,9 @@ class UserManager:
     async def update_user_roles(self, user_id: int, roles: list) -> bool:
         """Обновление множественных ролей пользователя. user_id = внутренний users.id."""
         try:
-            with get_sync_session() as session:
+            async with get_async_session() as session:
                 query = select(User).where(User.id == user_id)
-                result = session.execute(query)
+                result = await session.execute(query)
                 user = result.scalar_one_or_none()
                 
                 if not user:
@@ -271,7 +270,7 @@ class UserManager:
                 if roles:
                     user.role = roles[0]
                 
-                session.commit()
+                await session.commit()
                 
                 logger.info(f"Updated user {user_id} roles to {roles}")
                 return True
@@ -282,16 +281,16 @@ class UserManager:
     async def delete_user(self, user_id: int) -> bool:
         """Удаление пользователя. user_id = внутренний users.id."""
         try:
-            with get_sync_session() as session:
+            async with get_async_session() as session:
                 query = select(User).where(User.id == user_id)
-                result = session.execute(query)
+                result = await session.execute(query)
                 user = result.scalar_one_or_none()
                 
                 if not user:
                     return False
                 
-                session.delete(user)
-                session.commit()
+                await session.delete(user)
+                await session.commit()
                 
                 logger.info(f"Deleted user {user_id}")
                 return True
@@ -299,90 +298,71 @@ class UserManager:
             logger.error(f"Failed to delete user {user_id}: {e}")
             return False
     
-    def update_user_activity(self, user_id: int) -> None:
+    async def update_user_activity(self, user_id: int) -> None:
         """Обновляем время последней активности пользователя."""
         try:
-            with get_sync_session() as session:
+            async with get_async_session() as session:
                 query = select(User).where(User.telegram_id == user_id)
-                db_user = session.execute(query).scalar_one_or_none()
+                db_user = (await session.execute(query)).scalar_one_or_none()
                 if db_user:
                     # Поле last_activity может отсутствовать в модели; просто коммитим, чтобы обновился updated_at
-                    session.commit()
+                    await session.commit()
                     logger.info(f"Updated user activity in DB: {user_id}")
         except Exception as e:
             logger.error(f"Failed to update user activity {user_id}: {e}")
     
-    def is_user_registered(self, user_id: int) -> bool:
+    async def is_user_registered(self, user_id: int) -> bool:
         """Проверяем, зарегистрирован ли пользователь."""
         try:
-            with get_sync_session() as session:
+            async with get_async_session() as session:
                 query = select(User).where(User.telegram_id == user_id)
-                return session.execute(query).scalar_one_or_none() is not None
+                return (await session.execute(query)).scalar_one_or_none() is not None
         except Exception as e:
             logger.error(f"Failed to check user registered {user_id}: {e}")
             return False
     
-    def get_all_users(self) -> List[dict]:
-        """Получаем список всех пользователей."""
-        try:
-            with get_sync_session() as session:
-                users = session.execute(select(User)).scalars().all()
-                return [
-                    {
-                        "id": u.telegram_id,
-                        "first_name": u.first_name,
-                        "last_name": u.last_name,
-                        "username": u.username,
-                        "is_active": u.is_active,
-                    }
-                    for u in users
-                ]
-        except Exception as e:
-            logger.error(f"Failed to get all users: {e}")
-            return []
-    
-    def get_active_users(self) -> List[dict]:
+    async def get_active_users(self) -> List[dict]:
         """Получаем список активных пользователей."""
-        return [u for u in self.get_all_users() if u.get("is_active", True)]
+        return [u for u in await self.get_all_users() if u.get("is_active", True)]
     
-    def deactivate_user(self, user_id: int) -> bool:
+    async def deactivate_user(self, user_id: int) -> bool:
         """Деактивируем пользователя."""
         try:
-            with get_sync_session() as session:
+            async with get_async_session() as session:
                 query = select(User).where(User.telegram_id == user_id)
-                db_user = session.execute(query).scalar_one_or_none()
+                db_user = (await session.execute(query)).scalar_one_or_none()
                 if not db_user:
                     return False
                 db_user.is_active = False
-                session.commit()
+                await session.commit()
                 logger.info(f"Deactivated user: {user_id}")
                 return True
         except Exception as e:
             logger.error(f"Failed to deactivate user {user_id}: {e}")
             return False
     
-    def activate_user(self, user_id: int) -> bool:
+    async def activate_user(self, user_id: int) -> bool:
         """Активируем пользователя."""
         try:
-            with get_sync_session() as session:
+            async with get_async_session() as session:
                 query = select(User).where(User.telegram_id == user_id)
-                db_user = session.execute(query).scalar_one_or_none()
+                db_user = (await session.execute(query)).scalar_one_or_none()
                 if not db_user:
                     return False
                 db_user.is_active = True
-                session.commit()
+                await session.commit()
                 logger.info(f"Activated user: {user_id}")
                 return True
         except Exception as e:
             logger.error(f"Failed to activate user {user_id}: {e}")
             return False
     
-    def get_user_stats(self, user_id: int) -> Optional[dict]:
+    async def get_user_stats(self, user_id: int) -> Optional[dict]:
         """Получаем статистику пользователя."""
         try:
-            with get_sync_session() as session:
+            async with get_async_session() as session:
                 query = select(User).where(User.telegram_id == user_id)
-                db_user = session.execute(query).scalar_one_or_none()
+                db_user = (await session.execute(query)).scalar_one_or_none()
                 if not db_user:
                     return None
                 # Агрегаты можно считать отдельно; возвращаем базовую инфо
@@ -404,13 +384,13 @@ class UserManager:
         )
         return True
     
-    def _save_user_to_db(self, user_data: dict) -> None:
+    async def _save_user_to_db(self, user_data: dict) -> None:
         """Сохраняет пользователя в PostgreSQL базу данных."""
         try:
-            with get_sync_session() as session:
+            async with get_async_session() as session:
                 # Проверяем, существует ли пользователь в БД
                 query = select(User).where(User.telegram_id == user_data["id"])
-                result = session.execute(query)
+                result = await session.execute(query)
                 existing_user = result.scalar_one_or_none()
                 
                 if existing_user:
@@ -432,11 +412,11 @@ class UserManager:
                     )
                     session.add(new_user)
 
-                session.commit()
+                await session.commit()
                 if not existing_user:
-                    session.refresh(new_user)
+                    await session.refresh(new_user)
                 db_user = existing_user if existing_user else new_user
-                self._ensure_messenger_account_tg(
+                await self._ensure_messenger_account_tg(
                     session, db_user.id, user_data["id"], user_data.get("username")
                 )
                 logger.info(f"User {user_data['id']} saved to database successfully")
@@ -2,7 +2,8 @@
 
 from datetime import timedelta
 from typing import List, Optional, Dict, Any
-from core.cache.redis_cache import cache, cached
+from core.cache.memoize import cached
+from core.cache.redis_cache import cache
 from core.logging.logger import logger
 
 
@@ -104,7 +105,7 @@ class CacheService:
     async def set_user_objects(cls, user_id: int, objects: List[Dict[str, Any]], ttl: timedelta = None) -> bool:
         """Сохранение объектов пользователя в кэш."""
         key = f"{cls.USER_OBJECTS_PREFIX}:{user_id}"
-        return await cache.set(key, objects, ttl=ttl or cls.DEFAULT_TTL)
+        return await cache.set(key, objects, ttl=ttl or cls.DEFAULT_TTL, tags=[cls.USER_OBJECTS_PREFIX])
     
     @classmethod
     async def delete_user_objects(cls, user_id: int) -> bool:
@@ -122,7 +123,7 @@ class CacheService:
     async def set_analytics_data(cls, cache_key: str, data: Dict[str, Any], ttl: timedelta = None) -> bool:
         """Сохранение аналитических данных в кэш."""
         key = f"{cls.ANALYTICS_PREFIX}:{cache_key}"
-        return await cache.set(key, data, ttl=ttl or cls.LONG_TTL)
+        return await cache.set(key, data, ttl=ttl or cls.LONG_TTL, tags=[cls.ANALYTICS_PREFIX])
     
     @classmethod
     async def invalidate_user_cache(cls, user_id: int) -> None:
@@ -132,10 +133,8 @@ class CacheService:
         await cls.delete_user_objects(user_id)
         
         # Инвалидируем кэши методов ContractService с декоратором @cached
-        # Эти методы кэшируются с ключами вида: contract_employees:get_contract_employees_by_telegram_id:HASH
-        await cache.clear_pattern("contract_employees:*")
-        await cache.clear_pattern("all_contract_employees:*")
-        await cache.clear_pattern("owner_objects:*")
+        # (записи помечены тегом = key_prefix, сброс — один INCR на тег)
+        await cache.invalidate_tags("contract_employees", "all_contract_employees", "owner_objects")
         
         logger.info(f"User cache invalidated for user {user_id}")
     
@@ -143,15 +142,9 @@ class CacheService:
     async def invalidate_object_cache(cls, object_id: int) -> None:
         """Инвалидация кэша объекта."""
         await cls.delete_object(object_id)
-        # Инвалидируем кэш пользователей, связанных с объектом
-        pattern = f"{cls.USER_OBJECTS_PREFIX}:*"
-        await cache.clear_pattern(pattern)
-        
-        # Инвалидируем кэши ObjectService с декоратором @cached
-        await cache.clear_pattern("objects_by_owner:*")
-        
-        # Инвалидируем кэши публичных объектов для employee
-        await cache.clear_pattern("api_objects:employee_*")
+        # Инвалидируем кэш пользователей, связанных с объектом,
+        # кэши ObjectService с декоратором @cached и панели объектов
+        await cache.invalidate_tags(cls.USER_OBJECTS_PREFIX, "objects_by_owner", "api_objects")
         
         logger.info(f"Object cache invalidated for object {object_id}")
     
@@ -166,9 +159,8 @@ class CacheService:
     @classmethod
     async def clear_analytics_cache(cls) -> None:
         """Очистка кэша аналитики."""
-        pattern = f"{cls.ANALYTICS_PREFIX}:*"
-        cleared_count = await cache.clear_pattern(pattern)
-        logger.info(f"Analytics cache cleared, {cleared_count} keys removed")
+        await cache.invalidate_tags(cls.ANALYTICS_PREFIX)
+        logger.info("Analytics cache cleared")
     
     @classmethod
     async def set(cls, key: str, value: Any, ttl: timedelta = None) -> bool:
@@ -198,6 +190,19 @@ class CacheService:
         """
         return await cache.clear_pattern(pattern)
     
+    @classmethod
+    async def invalidate_tags(cls, *tags: str) -> Dict[str, int]:
+        """
+        Инвалидация всех записей с указанными тегами (O(1) на тег).
+        
+        Args:
+            tags: Теги (для @cached — key_prefix декоратора)
+            
+        Returns:
+            Новые версии тегов
+        """
+        return await cache.invalidate_tags(*tags)
+    
     @classmethod
     async def get_cache_stats(cls) -> Dict[str, Any]:
         """Получение статистики кэша."""
@@ -0,0 +1,224 @@
+"""Общий кэш данных календаря с точечной инвалидацией.
+
+Календарь собирается из фрагментов «объект × день»: в каждом фрагменте
+лежат сырые строки тайм-слотов, фактических и запланированных смен объекта
+за один день, без данных, зависящих от пользователя (права, название
+объекта). Поэтому фрагменты общие для всех ролей и воркеров, а месячный
+вид после правки одного слота пересчитывает только один объект-день.
+
+Готовые ответы API календаря (per user/период/набор объектов) помечаются
+тегами своих объектов и сбрасываются только при изменениях этих объектов.
+
+Инвалидация выполняется автоматически по событиям ORM: после commit
+сессии повышаются версии тегов тех объектов-дней, где изменились TimeSlot,
+ShiftSchedule или Shift. Массовые UPDATE/DELETE по этим таблицам
+сбрасывают все фрагменты через общий тег; пакетные INSERT отмечают свои
+объекты-дни явно (mark_changed_days).
+"""
+
+from datetime import date, datetime, timedelta
+from itertools import chain
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import pytz
+from sqlalchemy import inspect
+
+from core.cache.orm_invalidation import ALL_CHANGES, TagInvalidation
+from core.cache.redis_cache import (
+    cache,
+    invalidate_tags_anywhere,
+    schedule_tag_invalidation,
+)
+from core.logging.logger import logger
+
+
+FRAGMENT_PREFIX = "calendar_fragment"
+OBJECT_TAG_PREFIX = "calendar_object"
+DAY_TAG_PREFIX = "calendar_day"
+ALL_FRAGMENTS_TAG = "calendar_fragments"
+FRAGMENT_TTL = timedelta(minutes=30)
+# Счетчик версии объект-дня должен пережить все фрагменты, помеченные им
+DAY_TAG_TTL = timedelta(days=1)
+
+# Таблицы, изменения в которых меняют календарь
+CALENDAR_TABLES = {"time_slots", "shifts", "shift_schedules"}
+
+ObjectDay = Tuple[int, date]
+
+
+def fragment_key(object_id: int, day: date) -> str:
+    """Ключ фрагмента календаря объекта за день."""
+    return f"{FRAGMENT_PREFIX}:{object_id}:{day.isoformat()}"
+
+
+def object_tag(object_id: int) -> str:
+    """Тег ответов календаря, включающих объект."""
+    return f"{OBJECT_TAG_PREFIX}:{object_id}"
+
+
+def day_tag(object_id: int, day: date) -> str:
+    """Тег фрагмента одного объект-дня."""
+    return f"{DAY_TAG_PREFIX}:{object_id}:{day.isoformat()}"
+
+
+def fragment_tags(object_id: int, day: date) -> List[str]:
+    """Теги фрагмента: объект-день и общий тег календаря."""
+    return [day_tag(object_id, day), ALL_FRAGMENTS_TAG]
+
+
+def view_tags(object_ids: Iterable[int]) -> List[str]:
+    """Теги готового ответа календаря по набору объектов."""
+    return [object_tag(object_id) for object_id in sorted(set(object_ids))] + [ALL_FRAGMENTS_TAG]
+
+
+def empty_fragment() -> Dict[str, List[Dict[str, Any]]]:
+    """Пустой фрагмент (объект-день без данных тоже кэшируется)."""
+    return {"timeslots": [], "actual_shifts": [], "planned_shifts": []}
+
+
+def datetime_day(value: datetime) -> date:
+    """День, к которому относится смена (по UTC, как в фильтре запросов)."""
+    if value.tzinfo is not None:
+        value = value.astimezone(pytz.UTC)
+    return value.date()
+
+
+def iter_days(date_range_start: date, date_range_end: date) -> Iterable[date]:
+    """Дни периода включительно."""
+    day = date_range_start
+    while day <= date_range_end:
+        yield day
+        day += timedelta(days=1)
+
+
+class CalendarCache:
+    """Хранилище фрагментов календаря в общем Redis-кэше."""
+
+    async def get_fragments(
+        self,
+        object_ids: List[int],
+        date_range_start: date,
+        date_range_end: date
+    ) -> Tuple[Dict[ObjectDay, Dict[str, Any]], List[ObjectDay]]:
+        """Получение фрагментов периода одним MGET.
+
+        Returns:
+            (найденные фрагменты, список отсутствующих объект-дней)
+        """
+        pairs = [
+            (object_id, day)
+            for object_id in object_ids
+            for day in iter_days(date_range_start, date_range_end)
+        ]
+        if not cache.is_connected:
+            return {}, pairs
+
+        cached = await cache.get_many([fragment_key(*pair) for pair in pairs], serialize="pickle")
+        found: Dict[ObjectDay, Dict[str, Any]] = {}
+        missing: List[ObjectDay] = []
+        for pair in pairs:
+            fragment = cached.get(fragment_key(*pair))
+            if fragment is None:
+                missing.append(pair)
+            else:
+                found[pair] = fragment
+
+        logger.debug(f"Calendar fragments: requested={len(pairs)}, cached={len(found)}, missing={len(missing)}")
+        return found, missing
+
+    async def snapshot_versions(self, pairs: List[ObjectDay]) -> Dict[str, int]:
+        """Версии тегов до загрузки из БД.
+
+        Фрагменты сохраняются с версиями, снятыми до запроса: если объект-день
+        изменится во время загрузки, записанный фрагмент сразу станет устаревшим.
+        """
+        if not cache.is_connected or not pairs:
+            return {}
+        tags = [tag for pair in pairs for tag in fragment_tags(*pair)]
+        return await cache.get_tag_versions(tags)
+
+    async def set_fragments(
+        self,
+        fragments: Dict[ObjectDay, Dict[str, Any]],
+        versions: Dict[str, int]
+    ) -> None:
+        """Сохранение фрагментов одним pipeline."""
+        if not cache.is_connected or not fragments:
+            return
+
+        mapping = {fragment_key(*pair): fragment for pair, fragment in fragments.items()}
+        tags = {
+            fragment_key(*pair): {tag: versions.get(tag, 0) for tag in fragment_tags(*pair)}
+            for pair in fragments
+        }
+        await cache.set_many(mapping, ttl=FRAGMENT_TTL, serialize="pickle", tags=tags)
+
+    async def invalidate_days(self, pairs: Iterable[ObjectDay]) -> None:
+        """Сброс фрагментов объект-дней и ответов, включающих эти объекты."""
+        pairs = list(pairs)
+        await self._invalidate_tags(sorted({day_tag(*pair) for pair in pairs}), ttl=DAY_TAG_TTL)
+        await self._invalidate_tags(sorted({object_tag(object_id) for object_id, _ in pairs}))
+
+    async def invalidate_all(self) -> None:
+        """Сброс всех фрагментов календаря."""
+        await self._invalidate_tags([ALL_FRAGMENTS_TAG])
+
+    async def _invalidate_tags(self, tags: List[str], ttl: Optional[timedelta] = None) -> None:
+        await invalidate_tags_anywhere(tags, ttl)
+
+
+calendar_cache = CalendarCache()
+
+
+# ----------------------------------------------------------------------
+# Инвалидация по событиям ORM
+# ----------------------------------------------------------------------
+
+def _instance_days(instance: Any, table: str) -> Set[ObjectDay]:
+    """Объект-дни, затронутые изменением экземпляра (текущие и прежние значения)."""
+    state = inspect(instance)
+
+    def values(attr: str) -> List[Any]:
+        history = state.attrs[attr].history
+        current = getattr(instance, attr, None)
+        return [value for value in chain([current], history.deleted or ()) if value is not None]
+
+    object_ids = values("object_id")
+    days: Set[date] = set()
+    if table == "time_slots":
+        days.update(values("slot_date"))
+    else:
+        attrs = ("start_time", "end_time") if table == "shifts" else ("planned_start", "planned_end")
+        for attr in attrs:
+            for value in values(attr):
+                # Наивное время может быть локальным: захватываем соседние дни
+                day = datetime_day(value)
+                days.update({day - timedelta(days=1), day, day + timedelta(days=1)})
+
+    return {(object_id, day) for object_id in object_ids for day in days}
+
+
+def _invalidate_changes(pending: Set[Any]) -> None:
+    """Инвалидация фрагментов изменившихся объект-дней."""
+    if ALL_CHANGES in pending:
+        schedule_tag_invalidation([ALL_FRAGMENTS_TAG])
+        return
+
+    schedule_tag_invalidation(sorted({day_tag(*pair) for pair in pending}), DAY_TAG_TTL)
+    schedule_tag_invalidation(sorted({object_tag(object_id) for object_id, _ in pending}))
+
+
+invalidation = TagInvalidation("calendar_cache", CALENDAR_TABLES, _instance_days, _invalidate_changes)
+
+
+def mark_changed_days(session: Any, pairs: Iterable[ObjectDay]) -> None:
+    """Отметить объекты-дни, измененные мимо unit of work (Core INSERT в сессии).
+
+    Инвалидация выполнится после commit сессии, как для изменений через ORM.
+    """
+    invalidation.mark(session, pairs)
+
+
+def register_calendar_invalidation() -> None:
+    """Подписка на события ORM для инвалидации кэша календаря (идемпотентно)."""
+    invalidation.register()
@@ -0,0 +1,144 @@
+"""Локальный (in-process) LRU-уровень кэша StaffProBot."""
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from fnmatch import fnmatchcase
+from typing import Dict, Iterable, Optional, Tuple
+
+
+@dataclass
+class LocalCacheEntry:
+    """Запись локального кэша.
+
+    Хранит значение в сериализованном виде (как в Redis), чтобы каждый
+    вызывающий получал собственную копию и не мог испортить общий объект.
+    """
+
+    payload: bytes
+    serialize: str
+    expires_at: float
+    tags: Dict[str, int] = field(default_factory=dict)
+
+
+class LocalLRUCache:
+    """Ограниченный по размеру LRU-кэш с TTL для одного процесса."""
+
+    def __init__(self, max_entries: int = 2048, ttl_seconds: float = 30.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, LocalCacheEntry]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def get(self, key: str) -> Optional[LocalCacheEntry]:
+        """Получение записи; просроченные записи удаляются."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        if entry.expires_at <= time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def set(
+        self,
+        key: str,
+        payload: bytes,
+        serialize: str,
+        ttl_seconds: Optional[float] = None,
+        tags: Optional[Dict[str, int]] = None,
+    ) -> None:
+        """Сохранение записи. TTL не превышает TTL локального уровня."""
+        if self.max_entries <= 0:
+            return
+
+        ttl = self.ttl_seconds if ttl_seconds is None else min(ttl_seconds, self.ttl_seconds)
+        if ttl <= 0:
+            return
+
+        self._entries[key] = LocalCacheEntry(
+            payload=payload,
+            serialize=serialize,
+            expires_at=time.monotonic() + ttl,
+            tags=dict(tags or {}),
+        )
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: str) -> bool:
+        """Удаление записи по ключу."""
+        return self._entries.pop(key, None) is not None
+
+    def delete_many(self, keys: Iterable[str]) -> int:
+        """Удаление нескольких записей."""
+        return sum(1 for key in keys if self.delete(key))
+
+    def delete_pattern(self, pattern: str) -> int:
+        """Удаление записей по glob-паттерну (как в Redis SCAN MATCH)."""
+        matched = [key for key in self._entries if fnmatchcase(key, pattern)]
+        return self.delete_many(matched)
+
+    def clear(self) -> None:
+        """Полная очистка локального кэша."""
+        self._entries.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Статистика локального уровня."""
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class TagVersionMap:
+    """Локальная копия версий тегов с ограниченным временем доверия.
+
+    Версии обновляются сообщениями pub/sub при инвалидации; TTL страхует
+    от потерянных сообщений.
+    """
+
+    def __init__(self, ttl_seconds: float = 30.0):
+        self.ttl_seconds = ttl_seconds
+        self._versions: Dict[str, Tuple[int, float]] = {}
+
+    def get(self, tag: str) -> Optional[int]:
+        """Актуальная локальная версия тега или None."""
+        item = self._versions.get(tag)
+        if item is None:
+            return None
+        version, fetched_at = item
+        if time.monotonic() - fetched_at > self.ttl_seconds:
+            del self._versions[tag]
+            return None
+        return version
+
+    def set(self, tag: str, version: int) -> None:
+        """Запоминание версии тега (версии только растут)."""
+        current = self._versions.get(tag)
+        if current is not None and current[0] > version:
+            version = current[0]
+        self._versions[tag] = (version, time.monotonic())
+
+    def clear(self) -> None:
+        """Сброс всех локальных версий."""
+        self._versions.clear()
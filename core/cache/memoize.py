@@ -0,0 +1,276 @@
+"""Мемоизация результатов async-функций в Redis (декоратор @cached).
+
+Ключ записи строится из значимых аргументов вызова: по умолчанию из всех,
+кроме self/cls и сессий БД, либо из явно перечисленных `key_args`.
+Значения кодируются каноническим JSON и хэшируются, поэтому ключ не зависит
+от адресов объектов в памяти и совпадает во всех процессах. Аргумент без
+стабильного представления отключает кэш для вызова, а не засоряет Redis.
+
+Защита от лавины запросов:
+- одновременные промахи по одному ключу в процессе ждут одно вычисление;
+- при `stale_ttl` запись после `ttl` еще живет в Redis: ее отдают сразу,
+  а пересчитывает один вызов (блокировка в Redis на все процессы).
+
+Счетчики hit/miss по префиксам ключей — `cached_stats` и метрики Prometheus.
+"""
+
+import asyncio
+import hashlib
+import inspect
+import json
+import time
+from collections import defaultdict
+from datetime import date, datetime, time as dt_time, timedelta
+from decimal import Decimal
+from enum import Enum
+from functools import wraps
+from typing import Any, Dict, List, Optional, Sequence, Union
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from core.cache.redis_cache import RedisCache, cache
+from core.logging.logger import logger
+from core.monitoring.metrics import MetricsCollector
+
+
+# Аргументы, которые по умолчанию не участвуют в ключе
+EXCLUDED_ARG_NAMES = frozenset({"self", "cls", "session", "db", "db_session"})
+EXCLUDED_ARG_TYPES = (AsyncSession, Session)
+
+# Блокировка пересчета устаревшей записи (одна на все процессы)
+REFRESH_LOCK_PREFIX = "cache:refresh:"
+REFRESH_LOCK_TTL_SECONDS = 30
+
+
+class UnstableCacheKey(TypeError):
+    """Аргумент не имеет стабильного представления для ключа кэша."""
+
+
+def _key_default(value: Any) -> Any:
+    """Каноническое представление значений, которые не кодирует json."""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime, date, dt_time)):
+        return value.isoformat()
+    if isinstance(value, (Decimal, UUID)):
+        return str(value)
+    if isinstance(value, (set, frozenset)):
+        return sorted(_encode(item) for item in value)
+    raise UnstableCacheKey(f"unstable cache key argument of type {type(value).__name__}")
+
+
+def _encode(value: Any) -> str:
+    return json.dumps(
+        value, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=_key_default
+    )
+
+
+def make_cache_key(prefix: str, func_name: str, arguments: Dict[str, Any]) -> str:
+    """Ключ записи: префикс, имя функции и хэш канонического JSON аргументов."""
+    digest = hashlib.sha256(_encode(arguments).encode("utf-8")).hexdigest()[:32]
+    return f"{prefix}:{func_name}:{digest}"
+
+
+def key_arguments(
+    signature: inspect.Signature,
+    args: tuple,
+    kwargs: Dict[str, Any],
+    key_args: Optional[Sequence[str]] = None
+) -> Dict[str, Any]:
+    """Значимые аргументы вызова (с примененными значениями по умолчанию)."""
+    bound = signature.bind(*args, **kwargs)
+    bound.apply_defaults()
+    if key_args is not None:
+        return {name: bound.arguments[name] for name in key_args}
+    return {
+        name: value
+        for name, value in bound.arguments.items()
+        if name not in EXCLUDED_ARG_NAMES and not isinstance(value, EXCLUDED_ARG_TYPES)
+    }
+
+
+class CachedStats:
+    """Счетчики обращений к @cached по префиксам ключей (в пределах процесса)."""
+
+    RESULTS = ("hit", "stale", "shared", "miss", "refresh", "bypass")
+    SERVED_FROM_CACHE = ("hit", "stale", "shared")
+
+    def __init__(self):
+        self._counts: Dict[str, Dict[str, int]] = defaultdict(lambda: dict.fromkeys(self.RESULTS, 0))
+
+    def record(self, prefix: str, result: str) -> None:
+        counts = self._counts[prefix]
+        counts[result] += 1
+        MetricsCollector.record_cached_call(prefix, result, self.hit_ratio(counts))
+
+    @classmethod
+    def hit_ratio(cls, counts: Dict[str, int]) -> float:
+        """Доля вызовов, обслуженных кэшем, в процентах (bypass не учитывается)."""
+        served = sum(counts[result] for result in cls.SERVED_FROM_CACHE)
+        total = served + counts["miss"] + counts["refresh"]
+        if total == 0:
+            return 0.0
+        return round(served / total * 100, 2)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            prefix: {**counts, "hit_ratio": self.hit_ratio(counts)}
+            for prefix, counts in sorted(self._counts.items())
+        }
+
+    def reset(self) -> None:
+        self._counts.clear()
+
+
+cached_stats = CachedStats()
+
+
+async def _try_refresh_lock(cache_key: str) -> bool:
+    """Захват права пересчитать устаревшую запись (SET NX с TTL)."""
+    try:
+        return bool(await cache.redis.set(
+            f"{REFRESH_LOCK_PREFIX}{cache_key}", 1, nx=True, ex=REFRESH_LOCK_TTL_SECONDS
+        ))
+    except Exception as e:
+        logger.warning(f"Failed to acquire cache refresh lock: {e}, key={cache_key}")
+        return False
+
+
+async def _release_refresh_lock(cache_key: str) -> None:
+    try:
+        await cache.redis.delete(f"{REFRESH_LOCK_PREFIX}{cache_key}")
+    except Exception as e:
+        logger.warning(f"Failed to release cache refresh lock: {e}, key={cache_key}")
+
+
+def cached(
+    ttl: Union[int, timedelta] = 300,
+    key_prefix: str = "",
+    serialize: str = "json",
+    tags: Optional[List[str]] = None,
+    key_args: Optional[Sequence[str]] = None,
+    stale_ttl: Union[int, timedelta] = 0
+):
+    """Декоратор для кэширования результатов async-функций.
+
+    Записи помечаются тегами `tags` (по умолчанию — `key_prefix`), поэтому
+    `cache.invalidate_tags(key_prefix)` сбрасывает все результаты функции.
+
+    Args:
+        ttl: Сколько значение считается свежим
+        key_prefix: Префикс ключей, тег по умолчанию и метка в статистике
+        serialize: 'json' или 'pickle' (ORM-объекты и другие не-JSON значения)
+        tags: Теги записей
+        key_args: Имена аргументов, образующих ключ (по умолчанию все, кроме self/cls и сессий БД)
+        stale_ttl: Сколько после ttl отдавать устаревшее значение, пока один вызов его пересчитывает
+    """
+    cache_tags = tags if tags is not None else ([key_prefix] if key_prefix else [])
+    fresh_seconds = RedisCache._ttl_seconds(ttl)
+    stale_seconds = RedisCache._ttl_seconds(stale_ttl) or 0
+
+    def decorator(func):
+        signature = inspect.signature(func)
+        if key_args is not None:
+            unknown = set(key_args) - set(signature.parameters)
+            if unknown:
+                raise ValueError(f"@cached key_args {sorted(unknown)} are not parameters of {func.__qualname__}")
+
+        func_name = func.__qualname__
+        stats_prefix = key_prefix or func_name
+        inflight: Dict[str, asyncio.Future] = {}
+        unstable_reported: List[str] = []
+
+        async def compute(cache_key: str, args: tuple, kwargs: Dict[str, Any]) -> Any:
+            future = asyncio.get_running_loop().create_future()
+            inflight[cache_key] = future
+            try:
+                # Версии тегов снимаются до вычисления: инвалидация во время
+                # выполнения функции не даст записать устаревший результат
+                tag_versions = None
+                if cache_tags:
+                    try:
+                        tag_versions = await cache.get_tag_versions(cache_tags)
+                    except Exception as e:
+                        logger.warning(f"Failed to get tag versions for {func_name}: {e}")
+
+                result = await func(*args, **kwargs)
+
+                entry = {
+                    "value": result,
+                    "fresh_until": time.time() + fresh_seconds if fresh_seconds else None,
+                }
+                await cache.set(
+                    cache_key,
+                    entry,
+                    ttl=fresh_seconds + stale_seconds if fresh_seconds else None,
+                    serialize=serialize,
+                    tags=tag_versions or cache_tags
+                )
+                logger.debug(f"Cache set for function {func_name}, key={cache_key}")
+                future.set_result(result)
+                return result
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except Exception as e:
+                future.set_exception(e)
+                # Исключение получат ожидающие; без них не логировать «never retrieved»
+                future.exception()
+                raise
+            finally:
+                if inflight.get(cache_key) is future:
+                    del inflight[cache_key]
+
+        def pending(cache_key: str) -> Optional[asyncio.Future]:
+            future = inflight.get(cache_key)
+            if future is not None and future.get_loop() is asyncio.get_running_loop():
+                return future
+            return None
+
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            if not cache.is_connected:
+                return await func(*args, **kwargs)
+
+            try:
+                cache_key = make_cache_key(
+                    key_prefix, func_name, key_arguments(signature, args, kwargs, key_args)
+                )
+            except UnstableCacheKey as e:
+                if not unstable_reported:
+                    unstable_reported.append(str(e))
+                    logger.warning(f"@cached bypassed for {func_name}: {e}")
+                cached_stats.record(stats_prefix, "bypass")
+                return await func(*args, **kwargs)
+
+            entry = await cache.get(cache_key, serialize=serialize)
+            if isinstance(entry, dict) and "fresh_until" in entry:
+                fresh_until = entry["fresh_until"]
+                if fresh_until is None or time.time() < fresh_until:
+                    cached_stats.record(stats_prefix, "hit")
+                    return entry["value"]
+
+                # Устаревшая запись: пересчитывает один вызов, остальные получают ее сразу
+                if pending(cache_key) is not None or not await _try_refresh_lock(cache_key):
+                    cached_stats.record(stats_prefix, "stale")
+                    return entry["value"]
+                cached_stats.record(stats_prefix, "refresh")
+                try:
+                    return await compute(cache_key, args, kwargs)
+                finally:
+                    await _release_refresh_lock(cache_key)
+
+            future = pending(cache_key)
+            if future is not None:
+                cached_stats.record(stats_prefix, "shared")
+                result = await asyncio.shield(future)
+                # Копия в том же виде, что и при попадании в кэш
+                return RedisCache._deserialize(RedisCache._serialize(result, serialize), serialize)
+
+            cached_stats.record(stats_prefix, "miss")
+            return await compute(cache_key, args, kwargs)
+
+        return wrapper
+    return decorator
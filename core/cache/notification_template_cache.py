@@ -0,0 +1,64 @@
+"""Версия кастомных шаблонов уведомлений для реестра скомпилированных шаблонов.
+
+Реестр (shared.templates.notifications.registry) держит шаблоны в памяти
+процесса и перезагружает кастомные шаблоны из БД, только когда меняется
+версия общего тега. Версия читается из локальной копии версий тегов
+(обновляется через pub/sub, см. core.cache.redis_cache), поэтому проверка
+в цикле рассылки не ходит в Redis.
+
+После commit сессии, изменившей NotificationTemplate (в том числе
+массовыми UPDATE/DELETE), версия тега повышается.
+"""
+
+from typing import Any, Callable, List, Optional, Set
+
+from core.cache.orm_invalidation import TagInvalidation
+from core.cache.redis_cache import cache, schedule_tag_invalidation
+from core.logging.logger import logger
+
+
+TEMPLATES_TAG = "notification_templates"
+TEMPLATES_TABLE = "notification_templates"
+
+# Сброс реестра текущего процесса сразу после commit (без ожидания pub/sub)
+_local_listeners: List[Callable[[], None]] = []
+
+
+def add_local_listener(listener: Callable[[], None]) -> None:
+    if listener not in _local_listeners:
+        _local_listeners.append(listener)
+
+
+async def current_version() -> Optional[int]:
+    """Версия кастомных шаблонов; None — без Redis."""
+    if not cache.is_connected:
+        return None
+    try:
+        return (await cache.get_tag_versions([TEMPLATES_TAG]))[TEMPLATES_TAG]
+    except Exception as e:
+        logger.warning(f"Failed to read notification templates version: {e}")
+        return None
+
+
+# ----------------------------------------------------------------------
+# Инвалидация по событиям ORM
+# ----------------------------------------------------------------------
+
+def _invalidate_changes(pending: Set[Any]) -> None:
+    """Повышение версии шаблонов."""
+    for listener in _local_listeners:
+        listener()
+    schedule_tag_invalidation([TEMPLATES_TAG])
+
+
+invalidation = TagInvalidation(
+    "notification_templates",
+    [TEMPLATES_TABLE],
+    lambda instance, table: [TEMPLATES_TAG],
+    _invalidate_changes,
+)
+
+
+def register_notification_template_invalidation() -> None:
+    """Подписка на события ORM для перезагрузки шаблонов (идемпотентно)."""
+    invalidation.register()
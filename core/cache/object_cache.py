@@ -0,0 +1,35 @@
+"""Инвалидация закэшированных списков объектов владельца.
+
+Списки объектов (ObjectService.get_objects_by_owner,
+ContractService.get_owner_objects) кэшируются через @cached и помечаются
+тегом OBJECTS_TAG. Объекты меняются не только из веб-сервиса объектов
+(бот, API, менеджерские роуты, массовые UPDATE), поэтому тег повышается
+после commit любой сессии, изменившей Object.
+"""
+
+from typing import Any, Set
+
+from core.cache.orm_invalidation import TagInvalidation
+from core.cache.redis_cache import schedule_tag_invalidation
+
+
+OBJECTS_TAG = "objects"
+OBJECTS_TABLE = "objects"
+
+
+def _invalidate_changes(pending: Set[Any]) -> None:
+    """Сброс списков объектов."""
+    schedule_tag_invalidation([OBJECTS_TAG])
+
+
+invalidation = TagInvalidation(
+    "object_cache",
+    [OBJECTS_TABLE],
+    lambda instance, table: [OBJECTS_TAG],
+    _invalidate_changes,
+)
+
+
+def register_object_invalidation() -> None:
+    """Подписка на события ORM для инвалидации списков объектов (идемпотентно)."""
+    invalidation.register()
@@ -0,0 +1,91 @@
+"""Инвалидация тегов кэша по событиям ORM.
+
+Общая обвязка для кэшей, которые сбрасываются после commit сессии:
+after_flush накапливает изменившиеся ключи в session.info, do_orm_execute
+отмечает массовые UPDATE/DELETE по отслеживаемым таблицам (ALL_CHANGES),
+after_rollback отбрасывает накопленное, after_commit передает накопленное
+в invalidate модуля кэша. Какие ключи собирать и какие теги сбрасывать,
+решает сам модуль кэша.
+"""
+
+from itertools import chain
+from typing import Any, Callable, Hashable, Iterable, Set
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from core.logging.logger import logger
+
+
+# Массовое изменение: сбросить все записи кэша
+ALL_CHANGES = "__all__"
+
+CollectChanges = Callable[[Any, str], Iterable[Hashable]]
+InvalidateChanges = Callable[[Set[Hashable]], None]
+
+
+class TagInvalidation:
+    """Обработчики событий ORM одного кэша."""
+
+    def __init__(
+        self,
+        name: str,
+        tables: Iterable[str],
+        collect: CollectChanges,
+        invalidate: InvalidateChanges
+    ):
+        self.name = name
+        self.tables = frozenset(tables)
+        self.pending_key = f"{name}_pending"
+        self._collect = collect
+        self._invalidate = invalidate
+
+    def mark(self, session: Any, keys: Iterable[Hashable]) -> None:
+        """Отметить изменения, сделанные мимо unit of work (Core-запросы в сессии)."""
+        session.info.setdefault(self.pending_key, set()).update(keys)
+
+    def after_flush(self, session: Session, flush_context: Any) -> None:
+        """after_flush: накопление изменившихся ключей до commit."""
+        for instance in chain(session.new, session.dirty, session.deleted):
+            table = getattr(instance, "__tablename__", None)
+            if table not in self.tables:
+                continue
+            try:
+                keys = list(self._collect(instance, table))
+            except Exception as e:
+                logger.warning(f"Failed to collect {self.name} changes for {table}: {e}")
+                keys = [ALL_CHANGES]
+            if keys:
+                self.mark(session, keys)
+
+    def do_orm_execute(self, orm_execute_state: Any) -> None:
+        """do_orm_execute: массовые UPDATE/DELETE сбрасывают весь кэш."""
+        if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+            return
+        table = getattr(getattr(orm_execute_state.statement, "table", None), "name", None)
+        if table in self.tables:
+            self.mark(orm_execute_state.session, [ALL_CHANGES])
+
+    def after_rollback(self, session: Session) -> None:
+        """after_rollback: изменения не применились."""
+        session.info.pop(self.pending_key, None)
+
+    def after_commit(self, session: Session) -> None:
+        """after_commit: сброс тегов изменившихся ключей."""
+        pending = session.info.pop(self.pending_key, None)
+        if not pending:
+            return
+        try:
+            self._invalidate(pending)
+        except Exception as e:
+            logger.warning(f"Failed to invalidate {self.name}: {e}")
+
+    def register(self) -> None:
+        """Подписка на события ORM (идемпотентно)."""
+        if event.contains(Session, "after_commit", self.after_commit):
+            return
+        event.listen(Session, "after_flush", self.after_flush)
+        event.listen(Session, "do_orm_execute", self.do_orm_execute)
+        event.listen(Session, "after_rollback", self.after_rollback)
+        event.listen(Session, "after_commit", self.after_commit)
+
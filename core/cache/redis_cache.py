@@ -1,27 +1,62 @@
-"""Redis кэширование для StaffProBot."""
+"""Redis кэширование для StaffProBot.
 
+Кэш двухуровневый: перед Redis стоит ограниченный LRU-кэш процесса
+(`core.cache.local_cache`). Согласованность локальных уровней между
+процессами поддерживается через Redis pub/sub, а групповая инвалидация —
+через версии тегов: инвалидация тега это один INCR вместо сканирования
+пространства ключей.
+"""
+
+import asyncio
 import json
 import pickle
-import hashlib
+import uuid
 from datetime import timedelta
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
 from core.config.settings import settings
 from core.logging.logger import logger
+from core.cache.local_cache import LocalLRUCache, TagVersionMap
+from core.monitoring.metrics import MetricsCollector
 
 # Импорт Redis - обязательная зависимость
 import redis.asyncio as redis
 
 
+# Префикс ключей с версиями тегов
+TAG_VERSION_PREFIX = "cache:tag:"
+
+# Маркер записи с тегами: ни JSON, ни pickle не начинаются с нулевого байта
+TAGGED_PAYLOAD_MARKER = b"\x00spc:tags\x00"
+
+# Размер пачки при SCAN/UNLINK
+SCAN_BATCH_SIZE = 500
+
+TagsArg = Optional[Union[Iterable[str], Dict[str, int]]]
+
+
 class RedisCache:
     """Асинхронный Redis кэш с поддержкой JSON и Pickle сериализации."""
-    
+
     def __init__(self, redis_url: str = None, db: int = None):
         """Инициализация Redis клиента."""
         self.redis_url = redis_url or settings.redis_url
         self.db = db or settings.redis_db
         self.redis: Optional[redis.Redis] = None
         self.is_connected = False
-    
+
+        # Локальный уровень и инвалидация между процессами
+        self.local: Optional[LocalLRUCache] = None
+        if settings.cache_local_enabled:
+            self.local = LocalLRUCache(
+                max_entries=settings.cache_local_max_entries,
+                ttl_seconds=settings.cache_local_ttl_seconds
+            )
+        self.tag_versions = TagVersionMap(ttl_seconds=settings.cache_local_ttl_seconds)
+        self.invalidation_channel = settings.cache_invalidation_channel
+        self.instance_id = uuid.uuid4().hex
+        self._listener_task: Optional[asyncio.Task] = None
+        self._listener_ready = False
+
     async def connect(self) -> None:
         """Подключение к Redis."""
         try:
@@ -32,183 +67,545 @@ class RedisCache:
                 socket_connect_timeout=5,
                 socket_timeout=5
             )
-            
+
             # Проверка подключения
             await self.redis.ping()
             self.is_connected = True
             logger.info("Redis cache connected successfully")
-            
+
+            if self.local is not None:
+                if self._listener_task is not None and not self._listener_task.done():
+                    self._listener_task.cancel()
+                self._listener_task = asyncio.create_task(self._listen_invalidations())
+
         except Exception as e:
             logger.error(f"Failed to connect to Redis: {e}")
             self.is_connected = False
             raise
-    
+
     async def disconnect(self) -> None:
         """Отключение от Redis."""
+        if self._listener_task is not None:
+            self._listener_task.cancel()
+            try:
+                await self._listener_task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._listener_task = None
+        self._reset_local()
+
         if self.redis:
             await self.redis.close()
             self.is_connected = False
             logger.info("Redis cache disconnected")
-    
+
+    # ------------------------------------------------------------------
+    # Сериализация
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _serialize(value: Any, serialize: str) -> bytes:
+        """Сериализация значения в байты."""
+        if serialize == "json":
+            return json.dumps(value, ensure_ascii=False, default=str).encode('utf-8')
+        if serialize == "pickle":
+            return pickle.dumps(value)
+        raise ValueError(f"Unsupported serialization type: {serialize}")
+
+    @staticmethod
+    def _deserialize(payload: bytes, serialize: str) -> Any:
+        """Десериализация значения из байтов."""
+        if serialize == "json":
+            return json.loads(payload.decode('utf-8'))
+        if serialize == "pickle":
+            return pickle.loads(payload)
+        raise ValueError(f"Unsupported serialization type: {serialize}")
+
+    @staticmethod
+    def _pack(payload: bytes, tags: Dict[str, int]) -> bytes:
+        """Упаковка значения вместе с версиями тегов."""
+        if not tags:
+            return payload
+        header = json.dumps(tags, separators=(",", ":")).encode('utf-8')
+        return TAGGED_PAYLOAD_MARKER + header + b"\n" + payload
+
+    @staticmethod
+    def _unpack(raw: bytes) -> Tuple[bytes, Dict[str, int]]:
+        """Распаковка значения и версий тегов."""
+        if not raw.startswith(TAGGED_PAYLOAD_MARKER):
+            return raw, {}
+        header, payload = raw[len(TAGGED_PAYLOAD_MARKER):].split(b"\n", 1)
+        return payload, json.loads(header.decode('utf-8'))
+
+    @staticmethod
+    def _ttl_seconds(ttl: Optional[Union[int, timedelta]]) -> Optional[int]:
+        """Конвертация TTL в секунды."""
+        if isinstance(ttl, timedelta):
+            return int(ttl.total_seconds())
+        return ttl
+
+    # ------------------------------------------------------------------
+    # Локальный уровень
+    # ------------------------------------------------------------------
+
+    def _local_available(self) -> bool:
+        """Локальный уровень используется только при живой подписке на инвалидацию."""
+        return self.local is not None and self._listener_ready
+
+    def _reset_local(self) -> None:
+        """Сброс локального уровня (после потери подписки ему нельзя доверять)."""
+        if self.local is not None:
+            self.local.clear()
+        self.tag_versions.clear()
+
+    def _queue_invalidation(self, pipe: Any, **message: Any) -> None:
+        """Добавление в pipeline сообщения об инвалидации для других процессов."""
+        if self.local is None:
+            return
+        message["origin"] = self.instance_id
+        pipe.publish(self.invalidation_channel, json.dumps(message, ensure_ascii=False))
+
+    async def _listen_invalidations(self) -> None:
+        """Фоновая подписка на сообщения об инвалидации локального уровня."""
+        while self.is_connected:
+            pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self.invalidation_channel)
+                self._listener_ready = True
+                logger.debug(f"Cache invalidation listener subscribed: channel={self.invalidation_channel}")
+                async for message in pubsub.listen():
+                    self._handle_invalidation(message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Cache invalidation listener failed: {e}")
+            finally:
+                self._listener_ready = False
+                self._reset_local()
+                try:
+                    await pubsub.close()
+                except Exception:
+                    pass
+            await asyncio.sleep(1)
+
+    def _handle_invalidation(self, message: Dict[str, Any]) -> None:
+        """Применение сообщения об инвалидации к локальному уровню."""
+        if message.get("type") != "message" or self.local is None:
+            return
+        try:
+            data = json.loads(message["data"])
+        except (TypeError, ValueError):
+            return
+
+        for tag, version in (data.get("tags") or {}).items():
+            self.tag_versions.set(tag, int(version))
+
+        if data.get("origin") == self.instance_id:
+            return
+        if data.get("keys"):
+            self.local.delete_many(data["keys"])
+        if data.get("pattern"):
+            self.local.delete_pattern(data["pattern"])
+
+    # ------------------------------------------------------------------
+    # Теги
+    # ------------------------------------------------------------------
+
+    async def get_tag_versions(self, tags: Iterable[str]) -> Dict[str, int]:
+        """Текущие версии тегов (из локальной копии или одним MGET)."""
+        tags = list(dict.fromkeys(tags))
+        versions: Dict[str, int] = {}
+        missing: List[str] = []
+        use_local = self._local_available()
+
+        for tag in tags:
+            version = self.tag_versions.get(tag) if use_local else None
+            if version is None:
+                missing.append(tag)
+            else:
+                versions[tag] = version
+
+        if missing:
+            raw_versions = await self.redis.mget([f"{TAG_VERSION_PREFIX}{tag}" for tag in missing])
+            for tag, raw in zip(missing, raw_versions):
+                version = int(raw) if raw is not None else 0
+                versions[tag] = version
+                self.tag_versions.set(tag, version)
+
+        return versions
+
+    async def _tags_current(self, tags: Dict[str, int]) -> bool:
+        """Проверка, что записанные версии тегов не устарели."""
+        if not tags:
+            return True
+        current = await self.get_tag_versions(tags.keys())
+        return all(current.get(tag) == version for tag, version in tags.items())
+
+    async def invalidate_tags(self, *tags: str, ttl: Optional[Union[int, timedelta]] = None) -> Dict[str, int]:
+        """Инвалидация всех записей с указанными тегами за O(1) на тег.
+
+        Args:
+            tags: Теги
+            ttl: Время жизни счетчиков версий (для короткоживущих тегов;
+                должно быть больше TTL помеченных записей)
+
+        Returns:
+            Новые версии тегов
+        """
+        if not self.is_connected or not tags:
+            return {}
+
+        try:
+            ttl_seconds = self._ttl_seconds(ttl)
+            pipe = self.redis.pipeline(transaction=False)
+            for tag in tags:
+                pipe.incr(f"{TAG_VERSION_PREFIX}{tag}")
+                if ttl_seconds:
+                    pipe.expire(f"{TAG_VERSION_PREFIX}{tag}", ttl_seconds)
+            results = await pipe.execute()
+            step = 2 if ttl_seconds else 1
+            versions = {tag: int(version) for tag, version in zip(tags, results[::step])}
+
+            for tag, version in versions.items():
+                self.tag_versions.set(tag, version)
+
+            if self.local is not None:
+                pipe = self.redis.pipeline(transaction=False)
+                self._queue_invalidation(pipe, tags=versions)
+                await pipe.execute()
+
+            logger.info(f"Cache tags invalidated: {versions}")
+            return versions
+
+        except Exception as e:
+            logger.error(f"Failed to invalidate cache tags: {e}, tags={tags}")
+            return {}
+
+    # ------------------------------------------------------------------
+    # Основные операции
+    # ------------------------------------------------------------------
+
     async def set(
         self,
         key: str,
         value: Any,
         ttl: Optional[Union[int, timedelta]] = None,
-        serialize: str = "json"
+        serialize: str = "json",
+        tags: TagsArg = None,
+        local: bool = True
     ) -> bool:
         """Сохранение значения в кэш.
-        
+
         Args:
             key: Ключ для сохранения
             value: Значение для сохранения
             ttl: Время жизни в секундах или timedelta
             serialize: Тип сериализации ('json' или 'pickle')
+            tags: Теги записи (список имен или уже снятые версии {tag: version})
+            local: Сохранять ли значение в локальном уровне процесса
         """
         if not self.is_connected:
             logger.warning(f"Redis not connected, skipping cache set for key {key}")
             return False
-        
+
         try:
-            # Сериализация значения
-            if serialize == "json":
-                serialized_value = json.dumps(value, ensure_ascii=False, default=str)
-            elif serialize == "pickle":
-                serialized_value = pickle.dumps(value)
-            else:
-                raise ValueError(f"Unsupported serialization type: {serialize}")
-            
-            # Конвертация TTL
-            if isinstance(ttl, timedelta):
-                ttl_seconds = int(ttl.total_seconds())
-            else:
-                ttl_seconds = ttl
-            
-            # Сохранение в Redis
-            success = await self.redis.set(key, serialized_value, ex=ttl_seconds)
-            
+            payload = self._serialize(value, serialize)
+            ttl_seconds = self._ttl_seconds(ttl)
+
+            tag_versions: Dict[str, int] = {}
+            if isinstance(tags, dict):
+                tag_versions = dict(tags)
+            elif tags:
+                tag_versions = await self.get_tag_versions(tags)
+
+            # Сохранение в Redis и оповещение других процессов одним round trip
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.set(key, self._pack(payload, tag_versions), ex=ttl_seconds)
+            self._queue_invalidation(pipe, keys=[key])
+            results = await pipe.execute()
+            success = bool(results[0])
+
+            if self.local is not None:
+                if success and local and self._local_available():
+                    self.local.set(key, payload, serialize, ttl_seconds, tag_versions)
+                else:
+                    self.local.delete(key)
+
             if success:
                 logger.debug(f"Cache set successful: key={key}, ttl={ttl_seconds}, serialize={serialize}")
-            
-            return bool(success)
-            
+
+            return success
+
         except Exception as e:
             logger.error(f"Failed to set cache: {e}, key={key}, error={str(e)}")
             return False
-    
-    async def get(self, key: str, serialize: str = "json") -> Optional[Any]:
+
+    async def get(self, key: str, serialize: str = "json", local: bool = True) -> Optional[Any]:
         """Получение значения из кэша.
-        
+
         Args:
             key: Ключ для получения
             serialize: Тип десериализации ('json' или 'pickle')
+            local: Использовать ли локальный уровень процесса
         """
         if not self.is_connected:
             logger.warning(f"Redis not connected, skipping cache get for key {key}")
             return None
-        
+
         try:
-            serialized_value = await self.redis.get(key)
-            
-            if serialized_value is None:
+            use_local = local and self._local_available()
+
+            if use_local:
+                entry = self.local.get(key)
+                if entry is not None and entry.serialize == serialize and await self._tags_current(entry.tags):
+                    MetricsCollector.record_cache_tier("local", "hit")
+                    logger.debug(f"Cache hit (local): key={key}, serialize={serialize}")
+                    return self._deserialize(entry.payload, serialize)
+                if entry is not None:
+                    self.local.delete(key)
+                MetricsCollector.record_cache_tier("local", "miss")
+
+            # GET и PTTL одним round trip: локальная копия не переживет ключ в Redis
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.get(key)
+            pipe.pttl(key)
+            raw, pttl = await pipe.execute()
+
+            if raw is None:
+                MetricsCollector.record_cache_tier("redis", "miss")
                 logger.debug(f"Cache miss for key {key}")
                 return None
-            
-            # Десериализация значения
-            if serialize == "json":
-                value = json.loads(serialized_value.decode('utf-8'))
-            elif serialize == "pickle":
-                value = pickle.loads(serialized_value)
-            else:
-                raise ValueError(f"Unsupported serialization type: {serialize}")
-            
+
+            payload, tags = self._unpack(raw)
+            if not await self._tags_current(tags):
+                MetricsCollector.record_cache_tier("redis", "miss")
+                logger.debug(f"Cache miss (stale tags) for key {key}")
+                return None
+
+            value = self._deserialize(payload, serialize)
+            MetricsCollector.record_cache_tier("redis", "hit")
+
+            if use_local:
+                ttl_seconds = pttl / 1000 if pttl and pttl > 0 else None
+                self.local.set(key, payload, serialize, ttl_seconds, tags)
+
             logger.debug(f"Cache hit: key={key}, serialize={serialize}")
             return value
-            
+
         except Exception as e:
             logger.error(f"Failed to get cache: {e}, key={key}, error={str(e)}")
             return None
-    
+
     async def delete(self, key: str) -> bool:
         """Удаление значения из кэша."""
         if not self.is_connected:
             logger.warning(f"Redis not connected, skipping cache delete for key {key}")
             return False
-        
+
         try:
-            result = await self.redis.delete(key)
+            if self.local is not None:
+                self.local.delete(key)
+
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.delete(key)
+            self._queue_invalidation(pipe, keys=[key])
+            results = await pipe.execute()
+            result = results[0]
             logger.debug(f"Cache delete: key={key}, deleted={bool(result)}")
             return bool(result)
-            
+
         except Exception as e:
             logger.error(f"Failed to delete cache: {e}, key={key}, error={str(e)}")
             return False
-    
+
+    async def get_many(self, keys: List[str], serialize: str = "json") -> Dict[str, Any]:
+        """Получение нескольких значений одним MGET (без локального уровня).
+
+        Returns:
+            Словарь {key: value} только для найденных и не устаревших записей
+        """
+        if not self.is_connected or not keys:
+            return {}
+
+        try:
+            raw_values = await self.redis.mget(keys)
+            unpacked: Dict[str, Tuple[bytes, Dict[str, int]]] = {}
+            all_tags: List[str] = []
+            for key, raw in zip(keys, raw_values):
+                if raw is None:
+                    continue
+                payload, tags = self._unpack(raw)
+                unpacked[key] = (payload, tags)
+                all_tags.extend(tags)
+
+            current = await self.get_tag_versions(all_tags) if all_tags else {}
+            result: Dict[str, Any] = {}
+            for key, (payload, tags) in unpacked.items():
+                if all(current.get(tag) == version for tag, version in tags.items()):
+                    result[key] = self._deserialize(payload, serialize)
+
+            if result:
+                MetricsCollector.record_cache_tier("redis", "hit")
+            if len(result) < len(keys):
+                MetricsCollector.record_cache_tier("redis", "miss")
+            logger.debug(f"Cache get_many: requested={len(keys)}, hits={len(result)}")
+            return result
+
+        except Exception as e:
+            logger.error(f"Failed to get many from cache: {e}, keys={len(keys)}")
+            return {}
+
+    async def set_many(
+        self,
+        mapping: Dict[str, Any],
+        ttl: Optional[Union[int, timedelta]] = None,
+        serialize: str = "json",
+        tags: Optional[Dict[str, Union[List[str], Dict[str, int]]]] = None
+    ) -> bool:
+        """Сохранение нескольких значений одним pipeline (без локального уровня).
+
+        Args:
+            mapping: Значения по ключам
+            ttl: Время жизни в секундах или timedelta
+            serialize: Тип сериализации ('json' или 'pickle')
+            tags: Теги записей по ключам: {key: [tag, ...]} или уже снятые
+                версии {key: {tag: version}}
+        """
+        if not self.is_connected or not mapping:
+            return False
+
+        try:
+            ttl_seconds = self._ttl_seconds(ttl)
+            tags = tags or {}
+            all_tags = [
+                tag for key_tags in tags.values()
+                if not isinstance(key_tags, dict)
+                for tag in key_tags
+            ]
+            versions = await self.get_tag_versions(all_tags) if all_tags else {}
+
+            pipe = self.redis.pipeline(transaction=False)
+            for key, value in mapping.items():
+                key_tags = tags.get(key) or {}
+                if not isinstance(key_tags, dict):
+                    key_tags = {tag: versions[tag] for tag in key_tags}
+                pipe.set(key, self._pack(self._serialize(value, serialize), key_tags), ex=ttl_seconds)
+            self._queue_invalidation(pipe, keys=list(mapping))
+            await pipe.execute()
+
+            if self.local is not None:
+                self.local.delete_many(mapping)
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to set many to cache: {e}, keys={len(mapping)}")
+            return False
+
+    async def delete_many(self, keys: List[str]) -> int:
+        """Удаление нескольких ключей одним round trip."""
+        if not self.is_connected or not keys:
+            return 0
+
+        try:
+            if self.local is not None:
+                self.local.delete_many(keys)
+
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.unlink(*keys)
+            self._queue_invalidation(pipe, keys=list(keys))
+            results = await pipe.execute()
+            return int(results[0])
+
+        except Exception as e:
+            logger.error(f"Failed to delete many from cache: {e}, keys={len(keys)}")
+            return 0
+
     async def exists(self, key: str) -> bool:
         """Проверка существования ключа в кэше."""
         if not self.is_connected:
             return False
-        
+
         try:
             result = await self.redis.exists(key)
             return bool(result)
         except Exception as e:
             logger.error(f"Failed to check cache existence: {e}, key={key}, error={str(e)}")
             return False
-    
+
     async def expire(self, key: str, ttl: Union[int, timedelta]) -> bool:
         """Установка TTL для существующего ключа."""
         if not self.is_connected:
             return False
-        
+
         try:
-            if isinstance(ttl, timedelta):
-                ttl_seconds = int(ttl.total_seconds())
-            else:
-                ttl_seconds = ttl
-            
+            ttl_seconds = self._ttl_seconds(ttl)
+
+            if self.local is not None:
+                self.local.delete(key)
+
             result = await self.redis.expire(key, ttl_seconds)
             return bool(result)
         except Exception as e:
             logger.error(f"Failed to set cache expiration: {e}, key={key}, error={str(e)}")
             return False
-    
+
     async def keys(self, pattern: str = "*") -> List[str]:
-        """Получение списка ключей по паттерну."""
+        """Получение списка ключей по паттерну (через неблокирующий SCAN)."""
         if not self.is_connected:
             return []
-        
+
         try:
-            keys = await self.redis.keys(pattern)
-            return [key.decode('utf-8') for key in keys]
+            return [
+                key.decode('utf-8')
+                async for key in self.redis.scan_iter(match=pattern, count=SCAN_BATCH_SIZE)
+            ]
         except Exception as e:
             logger.error(f"Failed to get cache keys: {e}, pattern={pattern}, error={str(e)}")
             return []
-    
+
     async def clear_pattern(self, pattern: str) -> int:
-        """Удаление всех ключей по паттерну."""
+        """Удаление всех ключей по паттерну.
+
+        Использует SCAN + UNLINK пачками, не блокируя Redis. Для групп
+        ключей, записанных с тегами, дешевле `invalidate_tags`.
+        """
         if not self.is_connected:
             return 0
-        
+
         try:
-            keys = await self.keys(pattern)
-            if keys:
-                result = await self.redis.delete(*keys)
+            if self.local is not None:
+                self.local.delete_pattern(pattern)
+
+            result = 0
+            batch: List[bytes] = []
+            async for key in self.redis.scan_iter(match=pattern, count=SCAN_BATCH_SIZE):
+                batch.append(key)
+                if len(batch) >= SCAN_BATCH_SIZE:
+                    result += await self.redis.unlink(*batch)
+                    batch = []
+            if batch:
+                result += await self.redis.unlink(*batch)
+
+            if self.local is not None:
+                pipe = self.redis.pipeline(transaction=False)
+                self._queue_invalidation(pipe, pattern=pattern)
+                await pipe.execute()
+
+            if result:
                 logger.info(f"Cleared {result} cache keys for pattern {pattern}")
-                return result
-            return 0
+            return result
         except Exception as e:
             logger.error(f"Failed to clear cache pattern: {e}, pattern={pattern}, error={str(e)}")
             return 0
-    
+
     async def get_stats(self) -> Dict[str, Any]:
         """Получение статистики Redis."""
         if not self.is_connected:
             return {}
-        
+
         try:
             info = await self.redis.info()
-            return {
+            stats = {
                 'connected_clients': info.get('connected_clients', 0),
                 'used_memory': info.get('used_memory', 0),
                 'used_memory_human': info.get('used_memory_human', '0B'),
@@ -220,10 +617,21 @@ class RedisCache:
                     info.get('keyspace_misses', 0)
                 )
             }
+            if self.local is not None:
+                local_stats = self.local.get_stats()
+                local_stats['hit_rate'] = self._calculate_hit_rate(
+                    local_stats['hits'], local_stats['misses']
+                )
+                local_stats['active'] = self._local_available()
+                stats['local'] = local_stats
+
+            from core.cache.memoize import cached_stats
+            stats['functions'] = cached_stats.snapshot()
+            return stats
         except Exception as e:
             logger.error(f"Failed to get Redis stats: {e}")
             return {}
-    
+
     def _calculate_hit_rate(self, hits: int, misses: int) -> float:
         """Расчет hit rate кэша."""
         total = hits + misses
@@ -236,36 +644,74 @@ class RedisCache:
 cache = RedisCache()
 
 
-# Декораторы для кэширования
-def cached(
-    ttl: Union[int, timedelta] = 300,
-    key_prefix: str = "",
-    serialize: str = "json"
-):
-    """Декоратор для кэширования результатов функций."""
-    def decorator(func):
-        async def wrapper(*args, **kwargs):
-            # Генерация стабильного ключа кэша с использованием MD5
-            args_str = str(args) + str(sorted(kwargs.items()))
-            args_hash = hashlib.md5(args_str.encode()).hexdigest()
-            cache_key = f"{key_prefix}:{func.__name__}:{args_hash}"
-            
-            # Попытка получить из кэша
-            cached_result = await cache.get(cache_key, serialize=serialize)
-            if cached_result is not None:
-                logger.debug(f"Cache hit for function {func.__name__}, key={cache_key}")
-                return cached_result
-            
-            # Выполнение функции
-            result = await func(*args, **kwargs)
-            
-            # Сохранение в кэш
-            await cache.set(cache_key, result, ttl=ttl, serialize=serialize)
-            logger.debug(f"Cache set for function {func.__name__}, key={cache_key}")
-            
-            return result
-        return wrapper
-    return decorator
+_sync_redis = None
+_background_tasks: Set[asyncio.Task] = set()
+
+
+def sync_invalidate_tags(tags: List[str], ttl: Optional[timedelta] = None) -> None:
+    """Инвалидация тегов синхронным клиентом (нет подключенного async-кэша или event loop)."""
+    global _sync_redis
+    try:
+        if _sync_redis is None:
+            import redis as redis_sync
+            _sync_redis = redis_sync.from_url(
+                settings.redis_url,
+                db=settings.redis_db,
+                socket_connect_timeout=5,
+                socket_timeout=5
+            )
+        pipe = _sync_redis.pipeline(transaction=False)
+        for tag in tags:
+            pipe.incr(f"{TAG_VERSION_PREFIX}{tag}")
+            if ttl:
+                pipe.expire(f"{TAG_VERSION_PREFIX}{tag}", int(ttl.total_seconds()))
+        results = pipe.execute()
+        if settings.cache_local_enabled:
+            versions = dict(zip(tags, results[::2] if ttl else results))
+            _sync_redis.publish(
+                settings.cache_invalidation_channel,
+                json.dumps({"origin": "sync", "tags": versions})
+            )
+    except Exception as e:
+        logger.warning(f"Failed to invalidate cache tags synchronously: {e}")
+
+
+async def invalidate_tags_anywhere(tags: List[str], ttl: Optional[timedelta] = None) -> None:
+    """Инвалидация тегов через async-кэш, а без подключения — синхронным клиентом."""
+    if not tags:
+        return
+    if cache.is_connected:
+        await cache.invalidate_tags(*tags, ttl=ttl)
+    else:
+        await asyncio.to_thread(sync_invalidate_tags, tags, ttl)
+
+
+def schedule_tag_invalidation(tags: List[str], ttl: Optional[timedelta] = None) -> None:
+    """Инвалидация тегов из синхронного кода (обработчики событий ORM).
+
+    В event loop инвалидация уходит фоновой задачей, вне его (Celery,
+    синхронные сессии) выполняется сразу синхронным клиентом.
+    """
+    if not tags:
+        return
+
+    async def invalidate() -> None:
+        try:
+            await invalidate_tags_anywhere(tags, ttl)
+        except Exception as e:
+            logger.warning(f"Failed to invalidate cache tags {tags}: {e}")
+
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+
+    if loop is not None:
+        task = loop.create_task(invalidate())
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+    else:
+        sync_invalidate_tags(tags, ttl)
 
 
 async def init_cache() -> None:
@@ -0,0 +1,120 @@
+"""Кэш скомпилированных правил Rules Engine в памяти процесса.
+
+Правила владельца (вместе с общими правилами без владельца) компилируются
+один раз и хранятся в процессе вместе с версиями своих тегов. Перед
+использованием версии сверяются с Redis (локальная копия версий обновляется
+через pub/sub, см. core.cache.redis_cache), поэтому изменение правила в
+любом процессе сбрасывает скомпилированный набор везде.
+
+После commit сессии, изменившей Rule, повышается версия тега владельца
+(или общего тега для правил без владельца). Массовые UPDATE/DELETE по
+rules сбрасывают наборы всех владельцев.
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import inspect
+
+from core.cache.orm_invalidation import ALL_CHANGES, TagInvalidation
+from core.cache.redis_cache import cache, invalidate_tags_anywhere, schedule_tag_invalidation
+from core.config.settings import settings
+from core.logging.logger import logger
+
+
+OWNER_TAG_PREFIX = "rules_owner"
+GLOBAL_RULES_TAG = "rules_owner:global"
+ALL_RULES_TAG = "rules_all"
+
+RULES_TABLE = "rules"
+
+
+def owner_tag(owner_id: int) -> str:
+    return f"{OWNER_TAG_PREFIX}:{owner_id}"
+
+
+def ruleset_tags(owner_id: int) -> List[str]:
+    """Теги набора правил владельца: свои правила, общие правила, массовые изменения."""
+    return [owner_tag(owner_id), GLOBAL_RULES_TAG, ALL_RULES_TAG]
+
+
+class RulesCache:
+    """LRU скомпилированных наборов правил по владельцу с проверкой версий тегов."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, Tuple[Dict[str, int], Any]]" = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        # Без Redis нет версий тегов: изменения из других процессов не увидеть
+        return cache.is_connected and self.max_entries > 0
+
+    async def snapshot_versions(self, owner_id: int) -> Dict[str, int]:
+        """Версии тегов до загрузки правил (изменение во время загрузки не закэшируется)."""
+        if not self.enabled:
+            return {}
+        try:
+            return await cache.get_tag_versions(ruleset_tags(owner_id))
+        except Exception as e:
+            logger.warning(f"Failed to read rules cache versions: {e}", owner_id=owner_id)
+            return {}
+
+    def get(self, owner_id: int, versions: Dict[str, int]) -> Optional[Any]:
+        """Скомпилированный набор, если версии тегов не изменились."""
+        if not versions:
+            return None
+        entry = self._entries.get(owner_id)
+        if entry is None:
+            return None
+        cached_versions, ruleset = entry
+        if cached_versions != versions:
+            del self._entries[owner_id]
+            return None
+        self._entries.move_to_end(owner_id)
+        return ruleset
+
+    def set(self, owner_id: int, versions: Dict[str, int], ruleset: Any) -> None:
+        if not versions:
+            return
+        self._entries[owner_id] = (versions, ruleset)
+        self._entries.move_to_end(owner_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    async def invalidate_owner(self, owner_id: Optional[int]) -> None:
+        """Сброс набора правил (для изменений в обход ORM-сессии)."""
+        await invalidate_tags_anywhere([owner_tag(owner_id) if owner_id is not None else GLOBAL_RULES_TAG])
+
+
+rules_cache = RulesCache(max_entries=settings.rules_cache_max_owners)
+
+
+# ----------------------------------------------------------------------
+# Инвалидация по событиям ORM
+# ----------------------------------------------------------------------
+
+def _instance_owners(instance: Any, table: str) -> List[Optional[int]]:
+    """Владельцы, чьи наборы правил затронуты изменением (None — общие правила)."""
+    # Правило перенесено к другому владельцу: сбросить и прежний набор
+    return [getattr(instance, "owner_id", None), *inspect(instance).attrs.owner_id.history.deleted]
+
+
+def _invalidate_changes(pending: Set[Any]) -> None:
+    """Сброс наборов правил изменившихся владельцев."""
+    if ALL_CHANGES in pending:
+        schedule_tag_invalidation([ALL_RULES_TAG])
+        return
+    tags = {GLOBAL_RULES_TAG if owner_id is None else owner_tag(owner_id) for owner_id in pending}
+    schedule_tag_invalidation(sorted(tags))
+
+
+invalidation = TagInvalidation("rules_cache", [RULES_TABLE], _instance_owners, _invalidate_changes)
+
+
+def register_rules_invalidation() -> None:
+    """Подписка на события ORM для инвалидации кэша правил (идемпотентно)."""
+    invalidation.register()
@@ -0,0 +1,113 @@
+"""Общий кэш контекста авторизованного пользователя веб-приложения.
+
+Контекст (пользователь, роли, UI-предпочтения владельца и словарь терминов)
+собирается из нескольких запросов к БД. Он кэшируется на короткое время по
+версии токена (хэш JWT) и помечается тегом пользователя. После commit
+сессии, изменившей пользователя, его профиль владельца или привязку
+мессенджера, тег сбрасывается по событиям ORM. Массовые UPDATE/DELETE по
+этим таблицам и правки словаря терминов сбрасывают все контексты.
+"""
+
+import hashlib
+from typing import Any, Dict, List, Optional, Set
+
+from core.cache.orm_invalidation import ALL_CHANGES, TagInvalidation
+from core.cache.redis_cache import cache, invalidate_tags_anywhere, schedule_tag_invalidation
+from core.config.settings import settings
+
+
+CONTEXT_PREFIX = "user_context"
+USER_TAG_PREFIX = "user_context_user"
+ALL_CONTEXTS_TAG = "user_context_all"
+
+# Таблица -> атрибут с id пользователя
+USER_CONTEXT_TABLES = {
+    "users": "id",
+    "owner_profiles": "user_id",
+    "messenger_accounts": "user_id",
+}
+# Изменения в этих таблицах затрагивают контекст всех пользователей
+GLOBAL_CONTEXT_TABLES = {"industry_terms"}
+
+
+def token_version(token: str) -> str:
+    """Версия токена: новый логин или обновление токена дают новый ключ."""
+    return hashlib.sha256(token.encode()).hexdigest()[:32]
+
+
+def context_key(token: str) -> str:
+    return f"{CONTEXT_PREFIX}:{token_version(token)}"
+
+
+def user_tag(user_id: int) -> str:
+    return f"{USER_TAG_PREFIX}:{user_id}"
+
+
+def context_tags(user_id: int) -> List[str]:
+    return [user_tag(user_id), ALL_CONTEXTS_TAG]
+
+
+class UserContextCache:
+    """Короткоживущий кэш контекста пользователя в общем Redis-кэше."""
+
+    async def get(self, token: str) -> Optional[Dict[str, Any]]:
+        if not cache.is_connected:
+            return None
+        return await cache.get(context_key(token), serialize="pickle")
+
+    async def snapshot_versions(self, user_id: int) -> Dict[str, int]:
+        """Версии тегов до загрузки из БД (изменение во время загрузки не закэшируется)."""
+        if not cache.is_connected:
+            return {}
+        return await cache.get_tag_versions(context_tags(user_id))
+
+    async def set(self, token: str, context: Dict[str, Any], versions: Dict[str, int]) -> None:
+        if not cache.is_connected:
+            return
+        await cache.set(
+            context_key(token),
+            context,
+            ttl=settings.auth_user_context_ttl_seconds,
+            serialize="pickle",
+            tags={tag: versions.get(tag, 0) for tag in context_tags(context["id"])}
+        )
+
+    async def invalidate_user(self, user_id: int) -> None:
+        """Сброс контекстов пользователя (для изменений в обход ORM-сессии)."""
+        await invalidate_tags_anywhere([user_tag(user_id)])
+
+
+user_context_cache = UserContextCache()
+
+
+# ----------------------------------------------------------------------
+# Инвалидация по событиям ORM
+# ----------------------------------------------------------------------
+
+def _instance_users(instance: Any, table: str) -> List[Any]:
+    """Пользователи, чей контекст затронут изменением экземпляра."""
+    if table in GLOBAL_CONTEXT_TABLES:
+        return [ALL_CHANGES]
+    user_id = getattr(instance, USER_CONTEXT_TABLES[table], None)
+    return [user_id] if user_id is not None else []
+
+
+def _invalidate_changes(pending: Set[Any]) -> None:
+    """Сброс контекстов изменившихся пользователей."""
+    if ALL_CHANGES in pending:
+        schedule_tag_invalidation([ALL_CONTEXTS_TAG])
+    else:
+        schedule_tag_invalidation(sorted(user_tag(user_id) for user_id in pending))
+
+
+invalidation = TagInvalidation(
+    "user_context",
+    set(USER_CONTEXT_TABLES) | GLOBAL_CONTEXT_TABLES,
+    _instance_users,
+    _invalidate_changes,
+)
+
+
+def register_user_context_invalidation() -> None:
+    """Подписка на события ORM для инвалидации контекста пользователей (идемпотентно)."""
+    invalidation.register()
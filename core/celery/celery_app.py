@@ -3,6 +3,7 @@
 import os
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import setup_logging as celery_setup_logging
 from core.config.settings import settings
 from core.logging.logger import logger
 
@@ -210,8 +211,16 @@ celery_app.conf.update(
     },
 )
 
+@celery_setup_logging.connect
+def _keep_app_logging(**kwargs):
+    """Оставить логирование приложения (вывод через очередь, core.logging) вместо настройки Celery."""
+
+
 # Автоматическое обнаружение задач
 celery_app.autodiscover_tasks()
 
+# Постоянный event loop и пул соединений процесса воркера (сигналы worker_process_*)
+import core.celery.runtime  # noqa: E402,F401
+
 # Логирование запуска Celery
 logger.info(f"Celery application configured - broker: {settings.rabbitmq_url}, backend: {settings.redis_url}")
@@ -0,0 +1,198 @@
+"""Асинхронная среда выполнения Celery-задач.
+
+Раньше каждая задача вызывала asyncio.run(): новый event loop, новое
+подключение к PostgreSQL (NullPool) и новые клиенты Redis/Telegram на
+каждый запуск. Теперь в каждом процессе воркера работает один долгоживущий
+event loop (отдельный поток, создается по сигналу worker_process_init).
+Корутины задач выполняются в нем, поэтому пул соединений с БД, клиент Redis
+и HTTP-клиенты Bot API переиспользуются между задачами.
+
+Использование:
+
+    @celery_app.task(name="my_task")
+    @async_task
+    async def my_task(arg):
+        async with get_celery_session() as session:
+            ...
+
+или run_async(coro()) внутри синхронной задачи.
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from functools import wraps
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+from celery.signals import worker_process_init, worker_process_shutdown
+
+from core.config.settings import settings
+from core.logging.logger import logger
+
+
+T = TypeVar("T")
+
+# Ожидание закрытия ресурсов при остановке воркера
+SHUTDOWN_TIMEOUT_SECONDS = 10
+
+
+class WorkerRuntime:
+    """Event loop процесса воркера и общие ресурсы, привязанные к нему."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._engine = None
+        self._session_factory = None
+
+    @property
+    def loop(self) -> Optional[asyncio.AbstractEventLoop]:
+        return self._loop if self._pid == os.getpid() else None
+
+    def start(self) -> asyncio.AbstractEventLoop:
+        """Запустить event loop процесса (идемпотентно, повторно — после fork)."""
+        with self._lock:
+            if self.loop is not None and self._thread.is_alive():
+                return self._loop
+
+            # После fork поток родителя не существует — начинаем с чистого состояния
+            self._engine = None
+            self._session_factory = None
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(
+                target=self._run_loop, args=(loop,), name="celery-async-runtime", daemon=True
+            )
+            thread.start()
+            self._loop, self._thread, self._pid = loop, thread, os.getpid()
+            logger.info("Celery async runtime started", pid=self._pid)
+            return loop
+
+    def in_runtime_loop(self) -> bool:
+        """Вызов выполняется внутри event loop воркера."""
+        loop = self.loop
+        if loop is None:
+            return False
+        try:
+            return asyncio.get_running_loop() is loop
+        except RuntimeError:
+            return False
+
+    def run(self, coro: Awaitable[T], timeout: Optional[float] = None) -> T:
+        """Выполнить корутину в event loop воркера и дождаться результата."""
+        loop = self.start()
+        if self.in_runtime_loop():
+            raise RuntimeError("run_async() cannot be called from the worker event loop, use await")
+
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise
+        except BaseException:
+            # Например, SoftTimeLimitExceeded в потоке задачи — корутину тоже останавливаем
+            future.cancel()
+            raise
+
+    def session_factory(self):
+        """Фабрика сессий с пулом соединений (создается в loop воркера один раз)."""
+        if self._session_factory is None:
+            from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+            from sqlalchemy.orm import sessionmaker
+            from core.monitoring.sql_instrumentation import install_sql_instrumentation
+
+            install_sql_instrumentation()
+
+            database_url = settings.database_url.replace('postgresql://', 'postgresql+asyncpg://')
+            self._engine = create_async_engine(
+                database_url,
+                pool_size=settings.celery_db_pool_size,
+                max_overflow=settings.celery_db_max_overflow,
+                pool_recycle=settings.celery_db_pool_recycle_seconds,
+                pool_pre_ping=True,
+                future=True
+            )
+            self._session_factory = sessionmaker(
+                bind=self._engine, class_=AsyncSession, expire_on_commit=False
+            )
+        return self._session_factory
+
+    def shutdown(self) -> None:
+        """Закрыть общие ресурсы и остановить event loop."""
+        with self._lock:
+            loop, thread = self.loop, self._thread
+            if loop is None or not thread.is_alive():
+                return
+            try:
+                asyncio.run_coroutine_threadsafe(self._close_resources(), loop).result(
+                    SHUTDOWN_TIMEOUT_SECONDS
+                )
+            except Exception as e:
+                logger.warning(f"Failed to close Celery runtime resources: {e}")
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(SHUTDOWN_TIMEOUT_SECONDS)
+            self._loop = self._thread = self._pid = None
+            logger.info("Celery async runtime stopped")
+
+    async def _open_resources(self) -> None:
+        from core.cache.redis_cache import cache
+
+        self.session_factory()
+        try:
+            await cache.connect()
+        except Exception as e:
+            logger.warning(f"Celery runtime: Redis is not available: {e}")
+
+    async def _close_resources(self) -> None:
+        from core.cache.redis_cache import cache
+        from shared.services.senders.telegram_sender import close_telegram_senders
+
+        await close_telegram_senders()
+        if cache.is_connected:
+            await cache.disconnect()
+        engine, self._engine, self._session_factory = self._engine, None, None
+        if engine is not None:
+            await engine.dispose()
+
+    @staticmethod
+    def _run_loop(loop: asyncio.AbstractEventLoop) -> None:
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_forever()
+        finally:
+            loop.close()
+
+
+runtime = WorkerRuntime()
+
+
+def run_async(coro: Awaitable[T]) -> T:
+    """Выполнить корутину в event loop воркера (замена asyncio.run в задачах)."""
+    return runtime.run(coro)
+
+
+def async_task(func: Callable[..., Awaitable[T]]) -> Callable[..., T]:
+    """Декоратор: синхронная функция задачи Celery, выполняющая корутину в loop воркера."""
+
+    @wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> T:
+        return runtime.run(func(*args, **kwargs))
+
+    return wrapper
+
+
+@worker_process_init.connect
+def _start_worker_runtime(**kwargs: Any) -> None:
+    runtime.start()
+    try:
+        runtime.run(runtime._open_resources())
+    except Exception as e:
+        logger.error(f"Failed to initialize Celery runtime resources: {e}")
+
+
+@worker_process_shutdown.connect
+def _stop_worker_runtime(**kwargs: Any) -> None:
+    runtime.shutdown()
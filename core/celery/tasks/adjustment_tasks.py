@@ -3,9 +3,9 @@
 from datetime import datetime, timedelta, time as dt_time
 import pytz
 from decimal import Decimal
-import asyncio
 
 from core.celery.celery_app import celery_app
+from core.celery.runtime import run_async
 from core.database.session import get_celery_session
 from core.logging.logger import logger
 from sqlalchemy import select, and_, func
@@ -13,16 +13,16 @@ from sqlalchemy.orm import selectinload
 
 from domain.entities.shift import Shift
 from domain.entities.object import Object
-from domain.entities.org_structure import OrgStructureUnit
 from domain.entities.payroll_adjustment import PayrollAdjustment
 from shared.services.payroll_adjustment_service import PayrollAdjustmentService
 from shared.services.late_penalty_calculator import LatePenaltyCalculator
+from shared.services.org_structure_closure_service import get_unit_settings
 
 
 async def get_effective_late_settings_for_object(session, obj: Object) -> dict:
     """
     Получить эффективные настройки штрафов с учетом иерархии org_unit.
-    Использует SQL запросы вместо lazy loading для работы в async контексте.
+    Использует проекцию org_unit_effective_settings вместо lazy loading по цепочке родителей.
     """
     # Если у объекта свои настройки
     if not obj.inherit_late_settings and obj.late_threshold_minutes is not None and obj.late_penalty_per_minute is not None:
@@ -32,29 +32,19 @@ async def get_effective_late_settings_for_object(session, obj: Object) -> dict:
             'source': 'object'
         }
     
-    # Если есть org_unit - обходим иерархию
+    # Если есть org_unit - эффективные настройки подразделения (одна строка проекции)
     if obj.org_unit_id:
-        current_unit_id = obj.org_unit_id
-        
-        while current_unit_id:
-            # Загружаем текущее подразделение
-            unit_query = select(OrgStructureUnit).where(OrgStructureUnit.id == current_unit_id)
-            unit_result = await session.execute(unit_query)
-            unit = unit_result.scalar_one_or_none()
-            
-            if not unit:
-                break
-            
-            # Проверяем есть ли у него свои настройки
-            if not unit.inherit_late_settings and unit.late_threshold_minutes is not None and unit.late_penalty_per_minute is not None:
-                return {
-                    'threshold_minutes': unit.late_threshold_minutes,
-                    'penalty_per_minute': unit.late_penalty_per_minute,
-                    'source': f'org_unit:{unit.name}'
-                }
-            
-            # Переходим к родителю
-            current_unit_id = unit.parent_id
+        unit_settings = await get_unit_settings(session, obj.org_unit_id)
+        if (
+            unit_settings
+            and unit_settings.late_threshold_minutes is not None
+            and unit_settings.late_penalty_per_minute is not None
+        ):
+            return {
+                'threshold_minutes': unit_settings.late_threshold_minutes,
+                'penalty_per_minute': unit_settings.late_penalty_per_minute,
+                'source': f'org_unit:{unit_settings.late_source_name}'
+            }
     
     # Настройки не найдены
     return {
@@ -648,5 +638,5 @@ def process_closed_shifts_adjustments():
             }
     
     # Запускаем async функцию в event loop
-    return asyncio.run(process())
+    return run_async(process())
 
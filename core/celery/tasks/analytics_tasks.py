@@ -5,6 +5,7 @@ from typing import Dict, Any, List
 from celery import Task
 
 from core.celery.celery_app import celery_app
+from core.celery.runtime import run_async
 from core.logging.logger import logger
 from core.cache.cache_service import CacheService
 
@@ -87,8 +88,7 @@ def generate_report_async(self, user_id: int, report_type: str, params: Dict[str
                     'export_format': export_format
                 }
         
-        import asyncio
-        result = asyncio.run(_generate_report())
+        result = run_async(_generate_report())
         
         # Отправляем уведомление с готовым отчетом
         from core.celery.tasks.notification_tasks import send_report_notification
@@ -188,8 +188,7 @@ def update_analytics_cache(self, cache_keys: List[str] = None):
                 
                 return updated_count
         
-        import asyncio
-        updated_count = asyncio.run(_update_cache())
+        updated_count = run_async(_update_cache())
         
         logger.info(f"Updated {updated_count} analytics cache keys")
         return {"updated_count": updated_count}
@@ -203,7 +202,6 @@ def update_analytics_cache(self, cache_keys: List[str] = None):
 def cleanup_cache(self):
     """Очистка устаревших кэшей."""
     try:
-        import asyncio
         
         async def _cleanup_cache():
             # Очищаем устаревшие аналитические кэши
@@ -215,7 +213,7 @@ def cleanup_cache(self):
             return cache_stats
         
         # Запускаем async функцию
-        cache_stats = asyncio.run(_cleanup_cache())
+        cache_stats = run_async(_cleanup_cache())
         
         logger.info(
             "Cache cleanup completed",
@@ -270,8 +268,7 @@ def calculate_monthly_metrics(self, year: int = None, month: int = None):
                 
                 return metrics
         
-        import asyncio
-        metrics = asyncio.run(_calculate_metrics())
+        metrics = run_async(_calculate_metrics())
         
         logger.info(
             "Monthly metrics calculated",
@@ -324,8 +321,7 @@ def generate_scheduled_reports(self):
                 
                 return generated_count
         
-        import asyncio
-        generated_count = asyncio.run(_generate_reports())
+        generated_count = run_async(_generate_reports())
         
         logger.info(f"Scheduled {generated_count} reports")
         return {"generated_count": generated_count}
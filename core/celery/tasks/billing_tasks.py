@@ -6,6 +6,7 @@ from sqlalchemy import select, and_, cast, String
 from sqlalchemy.orm import selectinload
 
 from core.celery.celery_app import celery_app
+from core.celery.runtime import run_async
 from core.database.session import get_celery_session
 from domain.entities.user_subscription import UserSubscription, SubscriptionStatus
 from domain.entities.billing_transaction import BillingTransaction, TransactionStatus
@@ -209,15 +210,8 @@ def check_expiring_subscriptions():
                 "payments_created": payments_created
             }
     
-    # Запускаем асинхронную функцию
-    import asyncio
-    try:
-        loop = asyncio.get_event_loop()
-    except RuntimeError:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-    
-    return loop.run_until_complete(_check_expiring_subscriptions_async())
+    # Запускаем асинхронную функцию в event loop воркера
+    return run_async(_check_expiring_subscriptions_async())
 
 
 @celery_app.task(name="check-expired-subscriptions")
@@ -296,15 +290,8 @@ def check_expired_subscriptions():
                 "notifications_created": notifications_created
             }
     
-    # Запускаем асинхронную функцию
-    import asyncio
-    try:
-        loop = asyncio.get_event_loop()
-    except RuntimeError:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-    
-    return loop.run_until_complete(_check_expired_subscriptions_async())
+    # Запускаем асинхронную функцию в event loop воркера
+    return run_async(_check_expired_subscriptions_async())
 
 
 @celery_app.task(name="activate-scheduled-subscriptions")
@@ -359,13 +346,6 @@ def activate_scheduled_subscriptions():
                 await session.rollback()
                 raise
     
-    # Запускаем асинхронную функцию
-    import asyncio
-    try:
-        loop = asyncio.get_event_loop()
-    except RuntimeError:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-    
-    return loop.run_until_complete(_activate_scheduled_subscriptions_async())
+    # Запускаем асинхронную функцию в event loop воркера
+    return run_async(_activate_scheduled_subscriptions_async())
 
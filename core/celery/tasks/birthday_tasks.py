@@ -2,6 +2,7 @@
 
 from celery import Task
 from core.celery.celery_app import celery_app
+from core.celery.runtime import run_async
 from core.logging.logger import logger
 
 # Государственные праздники РФ: (день, месяц, название, эмодзи)
@@ -27,9 +28,8 @@ class BirthdayTask(Task):
 @celery_app.task(base=BirthdayTask, bind=True, name="send_birthday_greetings")
 def send_birthday_greetings(self):
     """Поздравить сотрудников с ДР: генерация текста Yandex GPT + рассылка."""
-    import asyncio
     try:
-        return asyncio.run(_send_birthday_greetings_async())
+        return run_async(_send_birthday_greetings_async())
     except Exception as e:
         logger.error(f"send_birthday_greetings failed: {e}")
         raise
@@ -42,21 +42,21 @@ async def _send_birthday_greetings_async():
     import pytz
 
     from core.database.session import get_celery_session
-    from core.config.settings import settings
     from domain.entities.user import User
     from domain.entities.contract import Contract
     from domain.entities.object import Object
     from shared.services.yandex_gpt_service import generate_birthday_greeting
-    from telegram import Bot
+    from shared.services.senders.telegram_sender import get_telegram_sender
 
     moscow_tz = pytz.timezone("Europe/Moscow")
     today_msk = datetime.now(moscow_tz).date()
     today_day = today_msk.day
     today_month = today_msk.month
 
-    bot = Bot(token=settings.telegram_bot_token)
     sent_count = 0
     errors = []
+    # Личные поздравления копятся и отправляются одной рассылкой после обхода
+    outbox: list[tuple[int, str, dict]] = []
 
     async with get_celery_session() as session:
         # Найти активных сотрудников с ДР сегодня (сравниваем день и месяц)
@@ -114,16 +114,8 @@ async def _send_birthday_greetings_async():
 
                 # 1. Поздравить самого сотрудника
                 if employee.telegram_id and employee.telegram_id not in sent_to:
-                    try:
-                        await bot.send_message(
-                            chat_id=employee.telegram_id,
-                            text=message,
-                            parse_mode="Markdown",
-                        )
-                        sent_to.add(employee.telegram_id)
-                        sent_count += 1
-                    except Exception as e:
-                        errors.append(f"employee {employee.id}: {e}")
+                    outbox.append((employee.telegram_id, message, {"recipient": f"employee {employee.id}"}))
+                    sent_to.add(employee.telegram_id)
 
                 # 2. Поздравить владельцев (если включено в настройках)
                 for owner_id in owner_ids:
@@ -140,16 +132,8 @@ async def _send_birthday_greetings_async():
                         continue
 
                     if owner.telegram_id and owner.telegram_id not in sent_to:
-                        try:
-                            await bot.send_message(
-                                chat_id=owner.telegram_id,
-                                text=message,
-                                parse_mode="Markdown",
-                            )
-                            sent_to.add(owner.telegram_id)
-                            sent_count += 1
-                        except Exception as e:
-                            errors.append(f"owner {owner_id}: {e}")
+                        outbox.append((owner.telegram_id, message, {"recipient": f"owner {owner_id}"}))
+                        sent_to.add(owner.telegram_id)
 
                     # 3. Найти менеджеров владельца и поздравить их
                     managers_q = await session.execute(
@@ -166,20 +150,12 @@ async def _send_birthday_greetings_async():
                     managers = managers_q.scalars().all()
                     for manager in managers:
                         if manager.telegram_id and manager.telegram_id not in sent_to:
-                            try:
-                                await bot.send_message(
-                                    chat_id=manager.telegram_id,
-                                    text=message,
-                                    parse_mode="Markdown",
-                                )
-                                sent_to.add(manager.telegram_id)
-                                sent_count += 1
-                            except Exception as e:
-                                errors.append(f"manager {manager.id}: {e}")
+                            outbox.append((manager.telegram_id, message, {"recipient": f"manager {manager.id}"}))
+                            sent_to.add(manager.telegram_id)
 
                 # 4. Группы отчётов объектов: TG + MAX (notification_targets + legacy)
                 if object_ids:
-                    from shared.services.report_group_broadcast import send_object_report_group_text
+                    from shared.services.report_group_broadcast import send_report_group_texts
 
                     objs_q = await session.execute(
                         select(Object).where(Object.id.in_(list(object_ids)))
@@ -187,8 +163,7 @@ async def _send_birthday_greetings_async():
                     objects = objs_q.scalars().all()
                     sent_to_tg: set[str] = set()
                     sent_to_max: set[str] = set()
-                    for obj in objects:
-                        res = await send_object_report_group_text(session, obj, message)
+                    for obj, res in await send_report_group_texts(session, objects, message):
                         tg, mx = res["telegram"], res["max"]
                         if tg["ok"] and tg["chat_id"] and tg["chat_id"] not in sent_to_tg:
                             sent_to_tg.add(tg["chat_id"])
@@ -202,7 +177,7 @@ async def _send_birthday_greetings_async():
                 logger.info(
                     f"send_birthday_greetings: поздравлен {employee.first_name} "
                     f"{employee.last_name or ''} (id={employee.id}), "
-                    f"отправлено {len(sent_to)} сообщений"
+                    f"получателей {len(sent_to)}"
                 )
 
             except Exception as e:
@@ -210,6 +185,11 @@ async def _send_birthday_greetings_async():
                 logger.error(error_msg)
                 errors.append(error_msg)
 
+    if outbox:
+        result = await get_telegram_sender().send_bulk_texts(outbox, parse_mode="Markdown")
+        sent_count += result["sent"]
+        errors.extend(f"{error['recipient']}: {error['reason']}" for error in result["errors"])
+
     logger.info(f"send_birthday_greetings: всего отправлено {sent_count}, ошибок {len(errors)}")
     return {"sent": sent_count, "errors": errors}
 
@@ -217,9 +197,8 @@ async def _send_birthday_greetings_async():
 @celery_app.task(base=BirthdayTask, bind=True, name="send_holiday_greetings")
 def send_holiday_greetings(self):
     """Поздравить коллективы объектов с государственными праздниками РФ."""
-    import asyncio
     try:
-        return asyncio.run(_send_holiday_greetings_async())
+        return run_async(_send_holiday_greetings_async())
     except Exception as e:
         logger.error(f"send_holiday_greetings failed: {e}")
         raise
@@ -235,7 +214,7 @@ async def _send_holiday_greetings_async():
     from domain.entities.object import Object
     from shared.services.report_group_broadcast import (
         owner_wants_holiday_report_group_broadcast,
-        send_object_report_group_text,
+        send_report_group_texts,
     )
     from shared.services.yandex_gpt_service import generate_holiday_greeting
 
@@ -294,8 +273,7 @@ async def _send_holiday_greetings_async():
             sent_to_tg: set[str] = set()
             sent_to_max: set[str] = set()
 
-            for obj in objects:
-                res = await send_object_report_group_text(session, obj, message)
+            for obj, res in await send_report_group_texts(session, objects, message):
                 tg, mx = res["telegram"], res["max"]
                 if tg["ok"] and tg["chat_id"] and tg["chat_id"] not in sent_to_tg:
                     sent_to_tg.add(tg["chat_id"])
@@ -1,6 +1,5 @@
 """Celery задачи мониторинга Telegram-бота."""
 
-import asyncio
 import json
 from datetime import datetime, timezone, timedelta
 from typing import List, Optional
@@ -8,6 +7,7 @@ from typing import List, Optional
 from sqlalchemy import select, or_
 
 from core.celery.celery_app import celery_app
+from core.celery.runtime import run_async
 from core.cache.redis_cache import cache
 from core.logging.logger import logger
 from core.database.session import get_celery_session
@@ -30,7 +30,7 @@ ALERT_TTL_SECONDS = 5 * 60
 def monitor_bot_heartbeat() -> None:
     """Проверка heartbeat Telegram-бота."""
     try:
-        asyncio.run(_monitor_bot_heartbeat())
+        run_async(_monitor_bot_heartbeat())
     except Exception as exc:
         logger.error("monitor_bot_heartbeat failed", exc_info=exc)
 
@@ -1,11 +1,13 @@
 """Celery задачи для уведомлений (универсальные)."""
 
-import asyncio
-from typing import Dict, Any
-from datetime import datetime, timezone
+import time
+from collections import defaultdict
+from typing import Dict, Any, List, Optional
+from datetime import datetime, timedelta, timezone
 from celery import Task
 
 from core.celery.celery_app import celery_app
+from core.celery.runtime import run_async
 from core.logging.logger import logger
 
 
@@ -24,118 +26,285 @@ class NotificationTask(Task):
 
 
 async def _dispatch_all_scheduled():
-    """Получить pending-уведомления и отправить через соответствующие каналы.
-
-    Использует get_celery_session (NullPool) — безопасно для asyncio.run().
+    """Отправить pending-уведомления, время которых наступило.
+
+    Уведомления забираются пачками через FOR UPDATE SKIP LOCKED, помечаются
+    sending и фиксируются до отправки: блокировки не держатся во время
+    рассылки, пересекающиеся запуски beat пачку не видят. Пачка отправляется
+    через BulkSender (ограниченная конкуренция, порядок внутри чата, лимиты
+    Telegram и общая пауза при flood control), итоговые статусы пишутся
+    групповыми UPDATE в отдельной транзакции. Ошибка записи итогов оставляет
+    пачку в sending; по истечении settings.notification_claim_lease_seconds
+    после захвата (claimed_at) такие строки, как и строки упавшего воркера,
+    забираются повторно — возможна повторная доставка.
+
+    Выполняется в постоянном event loop воркера: сессия из пула get_celery_session,
+    клиенты Redis и Bot API переиспользуются между запусками.
     """
+    from core.config.settings import settings
     from core.database.session import get_celery_session
-    from domain.entities.notification import (
-        Notification, NotificationChannel, NotificationStatus,
-    )
-    from domain.entities.user import User
     from shared.services.senders.telegram_sender import get_telegram_sender
     from shared.services.senders.max_sender import get_max_sender
-    from shared.services.messenger_account_service import get_max_external_user_id_for_user
-    from shared.services.notification_auto_login_vars import enrich_variables_with_action_link
-    from sqlalchemy import select, text, and_, cast, String
+    from shared.services.senders.bulk_sender import BulkSender, latency_summary
 
-    stats: Dict[str, int] = {"processed": 0, "sent": 0, "failed": 0}
+    stats: Dict[str, Any] = {"processed": 0, "sent": 0, "failed": 0}
+    batch_size = settings.notification_dispatch_batch_size
+    concurrency = settings.notification_dispatch_concurrency
 
-    async with get_celery_session() as session:
-        now = datetime.now(timezone.utc)
+    tg_sender = get_telegram_sender(connection_pool_size=concurrency)
+    max_sender = get_max_sender()
+    bulk_sender = BulkSender(concurrency=concurrency, throttle=tg_sender.throttle)
+    latencies: List[float] = []
+    started = time.monotonic()
+
+    while True:
+        async with get_celery_session() as session:
+            try:
+                notifications = await _claim_batch(session, batch_size, settings.notification_claim_lease_seconds)
+                if not notifications:
+                    break
+                await _mark_many(session, [n.id for n in notifications], "sending")
+                await session.commit()
+            except Exception as e:
+                # Строки остаются pending и будут взяты следующим запуском
+                logger.error(f"Error claiming notification batch: {e}")
+                await session.rollback()
+                break
+
+            try:
+                results = await _send_batch(
+                    session, notifications, tg_sender, max_sender, bulk_sender, latencies
+                )
+            except Exception as e:
+                # Часть пачки могла уйти: не повторяем, помечаем failed
+                logger.error(f"Error sending notification batch: {e}")
+                await session.rollback()
+                results = {n.id: "Send interrupted" for n in notifications}
+
+            try:
+                await _apply_results(session, results)
+                await session.commit()
+            except Exception as e:
+                logger.error(
+                    "Error recording notification results, batch left in sending",
+                    error=str(e),
+                    notification_ids=[n.id for n in notifications],
+                )
+                await session.rollback()
+                break
+
+        sent = sum(1 for error in results.values() if error is None)
+        stats["processed"] += len(notifications)
+        stats["sent"] += sent
+        stats["failed"] += len(results) - sent
 
-        from sqlalchemy import or_
-        rows = await session.execute(
-            select(Notification).where(
+        if len(notifications) < batch_size:
+            break
+
+    stats["latency"] = latency_summary(latencies)
+    stats["duration_seconds"] = round(time.monotonic() - started, 2)
+    logger.info("Scheduled notifications dispatched", **stats)
+    return stats
+
+
+async def _claim_batch(session, batch_size: int, lease_seconds: int) -> List[Any]:
+    """Забрать пачку уведомлений с блокировкой строк до commit.
+
+    Берутся pending-уведомления, время которых наступило, и sending-уведомления
+    с истекшим захватом (claimed_at старше lease_seconds).
+    """
+    from domain.entities.notification import Notification, NotificationStatus
+    from sqlalchemy import select, and_, or_, cast, String
+
+    now = datetime.now(timezone.utc)
+    status = cast(Notification.status, String)
+    rows = await session.execute(
+        select(Notification).where(
+            or_(
                 and_(
-                    cast(Notification.status, String) == NotificationStatus.PENDING.value,
+                    status == NotificationStatus.PENDING.value,
                     or_(
                         Notification.scheduled_at <= now,
                         Notification.scheduled_at.is_(None),
                     ),
-                )
-            ).order_by(Notification.scheduled_at.nulls_first())
+                ),
+                and_(
+                    status == NotificationStatus.SENDING.value,
+                    or_(
+                        Notification.claimed_at < now - timedelta(seconds=lease_seconds),
+                        Notification.claimed_at.is_(None),
+                    ),
+                ),
+            )
         )
-        notifications = list(rows.scalars().all())
-        stats["processed"] = len(notifications)
+        .order_by(Notification.scheduled_at.nulls_first(), Notification.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    return list(rows.scalars().all())
+
+
+async def _send_batch(
+    session,
+    notifications: List[Any],
+    tg_sender,
+    max_sender,
+    bulk_sender,
+    latencies: Optional[List[float]] = None,
+) -> Dict[int, Optional[str]]:
+    """Конкурентно отправить пачку.
 
-        if not notifications:
-            return stats
+    Все обращения к БД (получатели, MAX-аккаунты) выполняются до отправки,
+    т.к. сессия не допускает конкурентных запросов.
 
-        user_ids = {n.user_id for n in notifications}
-        user_rows = await session.execute(
-            select(User).where(User.id.in_(user_ids))
+    Returns:
+        {notification_id: текст ошибки или None при успехе}
+    """
+    from domain.entities.notification import NotificationChannel
+    from domain.entities.user import User
+    from shared.services.messenger_account_service import get_max_external_user_ids_for_users
+    from sqlalchemy import select
+
+    user_ids = {n.user_id for n in notifications}
+    user_rows = await session.execute(select(User).where(User.id.in_(user_ids)))
+    users_map = {u.id: u for u in user_rows.scalars().all()}
+
+    max_user_ids = {
+        n.user_id for n in notifications if _channel_of(n) == NotificationChannel.MAX
+    }
+    max_accounts = await get_max_external_user_ids_for_users(session, max_user_ids)
+
+    results: Dict[int, Optional[str]] = {}
+    messages = []
+    for notif in notifications:
+        message, error = _prepare_message(
+            notif,
+            users_map.get(notif.user_id),
+            max_accounts.get(notif.user_id),
+            tg_sender,
+            max_sender,
         )
-        users_map = {u.id: u for u in user_rows.scalars().all()}
+        if message is None:
+            results[notif.id] = error
+        else:
+            messages.append(message)
 
-        tg_sender = get_telegram_sender()
-        max_sender = get_max_sender()
+    report = await bulk_sender.send(messages)
+    results.update(report.results)
+    if latencies is not None:
+        latencies.extend(report.latencies_ms)
+    return results
 
-        for notif in notifications:
-            try:
-                user = users_map.get(notif.user_id)
-                if not user:
-                    logger.warning(f"User {notif.user_id} not found for notification {notif.id}")
-                    await _mark(session, notif.id, "failed", error="User not found")
-                    stats["failed"] += 1
-                    continue
-
-                channel = notif.channel_enum
-                success = False
-
-                if channel == NotificationChannel.TELEGRAM:
-                    if not user.telegram_id:
-                        logger.warning(f"User {user.id} has no telegram_id")
-                        await _mark(session, notif.id, "failed", error="No telegram_id")
-                        stats["failed"] += 1
-                        continue
-                    vars_enriched = await enrich_variables_with_action_link(
-                        notif, user, dict(notif.data or {})
-                    )
-                    success = await tg_sender.send_notification(
-                        notification=notif,
-                        telegram_id=user.telegram_id,
-                        variables=vars_enriched,
-                    )
-                elif channel == NotificationChannel.MAX:
-                    max_ext = await get_max_external_user_id_for_user(session, user.id)
-                    if not max_ext:
-                        logger.warning(f"User {user.id} has no MAX account")
-                        await _mark(session, notif.id, "failed", error="No max external_user_id")
-                        stats["failed"] += 1
-                        continue
-                    vars_enriched = await enrich_variables_with_action_link(
-                        notif, user, dict(notif.data or {})
-                    )
-                    success = await max_sender.send_notification(
-                        notification=notif,
-                        max_user_id=max_ext,
-                        variables=vars_enriched,
-                    )
-                elif channel == NotificationChannel.IN_APP:
-                    success = True
-                else:
-                    logger.warning(f"Unsupported channel {notif.channel} for notification {notif.id}")
-                    success = False
-
-                if success:
-                    await _mark(session, notif.id, "sent")
-                    stats["sent"] += 1
-                else:
-                    await _mark(session, notif.id, "failed", error="Send failed")
-                    stats["failed"] += 1
 
-            except Exception as e:
-                logger.error(f"Error dispatching notification {notif.id}: {e}")
-                try:
-                    await session.rollback()
-                    await _mark(session, notif.id, "failed", error=str(e)[:200])
-                except Exception:
-                    pass
-                stats["failed"] += 1
+def _channel_of(notif) -> Optional[Any]:
+    """Канал уведомления или None, если канал неизвестен."""
+    try:
+        return notif.channel_enum
+    except ValueError:
+        return None
+
+
+def _prepare_message(
+    notif,
+    user,
+    max_external_user_id: Optional[str],
+    tg_sender,
+    max_sender,
+):
+    """Сообщение рассылки для уведомления.
+
+    Returns:
+        (BulkMessage, None) — нужно отправить;
+        (None, None) — доставлено без отправки (in-app);
+        (None, текст ошибки) — отправить невозможно.
+    """
+    from domain.entities.notification import NotificationChannel
+    from shared.services.notification_auto_login_vars import enrich_variables_with_action_link
+    from shared.services.senders.bulk_sender import BulkMessage
 
-    logger.info("Scheduled notifications dispatched", **stats)
-    return stats
+    if not user:
+        logger.warning(f"User {notif.user_id} not found for notification {notif.id}")
+        return None, "User not found"
+
+    channel = _channel_of(notif)
+
+    if channel == NotificationChannel.TELEGRAM:
+        if not user.telegram_id:
+            logger.warning(f"User {user.id} has no telegram_id")
+            return None, "No telegram_id"
+
+        async def send() -> bool:
+            vars_enriched = await enrich_variables_with_action_link(
+                notif, user, dict(notif.data or {})
+            )
+            return await tg_sender.send_notification(
+                notification=notif,
+                telegram_id=user.telegram_id,
+                variables=vars_enriched,
+            )
+
+        return BulkMessage(chat_key=("telegram", user.telegram_id), send=send, ref=notif.id), None
+
+    if channel == NotificationChannel.MAX:
+        if not max_external_user_id:
+            logger.warning(f"User {user.id} has no MAX account")
+            return None, "No max external_user_id"
+
+        async def send() -> bool:
+            vars_enriched = await enrich_variables_with_action_link(
+                notif, user, dict(notif.data or {})
+            )
+            return await max_sender.send_notification(
+                notification=notif,
+                max_user_id=max_external_user_id,
+                variables=vars_enriched,
+            )
+
+        return BulkMessage(chat_key=("max", max_external_user_id), send=send, ref=notif.id), None
+
+    if channel == NotificationChannel.IN_APP:
+        return None, None
+
+    logger.warning(f"Unsupported channel {notif.channel} for notification {notif.id}")
+    return None, "Send failed"
+
+
+async def _apply_results(session, results: Dict[int, Optional[str]]) -> None:
+    """Групповое обновление статусов пачки (без commit)."""
+    sent_ids = [notif_id for notif_id, error in results.items() if error is None]
+    failed_by_error: Dict[str, List[int]] = defaultdict(list)
+    for notif_id, error in results.items():
+        if error is not None:
+            failed_by_error[error].append(notif_id)
+
+    await _mark_many(session, sent_ids, "sent")
+    for error, notif_ids in failed_by_error.items():
+        await _mark_many(session, notif_ids, "failed", error=error)
+
+
+async def _mark_many(session, notif_ids: List[int], status: str, error: str | None = None):
+    """Обновить статус нескольких уведомлений одним UPDATE (без commit)."""
+    from domain.entities.notification import Notification
+    from sqlalchemy import update
+
+    if not notif_ids:
+        return
+
+    values: Dict[str, Any] = {"status": status}
+    if status == "sending":
+        values["claimed_at"] = datetime.now(timezone.utc)
+    if status == "sent":
+        values["sent_at"] = datetime.now(timezone.utc)
+    if error:
+        values["error_message"] = error
+        values["retry_count"] = Notification.retry_count + 1
+
+    await session.execute(
+        update(Notification)
+        .where(Notification.id.in_(notif_ids))
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
 
 
 async def _mark(session, notif_id: int, status: str, error: str | None = None):
@@ -164,7 +333,7 @@ async def _mark(session, notif_id: int, status: str, error: str | None = None):
 def send_notification_now(notification_id: int) -> bool:
     """Отправить одно уведомление по ID."""
     try:
-        return asyncio.run(_dispatch_single(notification_id))
+        return run_async(_dispatch_single(notification_id))
     except Exception as e:
         logger.error("send_notification_now failed", notification_id=notification_id, error=str(e))
         return False
@@ -182,8 +351,11 @@ async def _dispatch_single(notification_id: int) -> bool:
     from sqlalchemy import select, cast, String
 
     async with get_celery_session() as session:
+        # SKIP LOCKED: уведомление уже отправляется пакетной рассылкой
         row = await session.execute(
-            select(Notification).where(Notification.id == notification_id)
+            select(Notification)
+            .where(Notification.id == notification_id)
+            .with_for_update(skip_locked=True)
         )
         notif = row.scalar_one_or_none()
         if not notif or notif.status_enum != NotificationStatus.PENDING:
@@ -235,7 +407,7 @@ async def _dispatch_single(notification_id: int) -> bool:
 def dispatch_scheduled_notifications() -> Dict[str, Any]:
     """Обработать и отправить все запланированные уведомления (scheduled <= now)."""
     try:
-        return asyncio.run(_dispatch_all_scheduled())
+        return run_async(_dispatch_all_scheduled())
     except Exception as e:
         logger.error("dispatch_scheduled_notifications failed", error=str(e))
         return {"processed": 0, "sent": 0, "failed": 0, "error": str(e)}
@@ -1,8 +1,8 @@
 """Celery задачи: напоминания о неподписанных офертах, автоэкспирация."""
 
-import asyncio
 from celery import Task
 from core.celery.celery_app import celery_app
+from core.celery.runtime import run_async
 from core.logging.logger import logger
 
 
@@ -15,7 +15,7 @@ class OfferTask(Task):
 def send_offer_reminders(self):
     """Напомнить сотрудникам о неподписанных офертах (>24ч), эскалировать owner (>3д), автоэкспирация."""
     try:
-        return asyncio.run(_send_offer_reminders_async())
+        return run_async(_send_offer_reminders_async())
     except Exception as e:
         logger.error(f"send_offer_reminders failed: {e}")
         raise
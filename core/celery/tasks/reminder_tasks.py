@@ -8,6 +8,7 @@ from sqlalchemy.orm import selectinload
 import pytz
 
 from core.celery.celery_app import celery_app
+from core.celery.runtime import run_async
 from core.logging.logger import logger
 from core.database.session import get_celery_session
 from core.utils.timezone_helper import timezone_helper
@@ -42,8 +43,7 @@ def create_shift_reminders(self) -> Dict[str, Any]:
         Статистика: сколько уведомлений создано
     """
     try:
-        import asyncio
-        return asyncio.run(_create_shift_reminders_async())
+        return run_async(_create_shift_reminders_async())
     except Exception as e:
         logger.error(f"create_shift_reminders failed: {e}")
         raise
@@ -157,8 +157,7 @@ def check_shifts_did_not_start(self) -> Dict[str, Any]:
         Статистика: сколько уведомлений создано
     """
     try:
-        import asyncio
-        return asyncio.run(_check_shifts_did_not_start_async())
+        return run_async(_check_shifts_did_not_start_async())
     except Exception as e:
         logger.error(f"check_shifts_did_not_start failed: {e}")
         raise
@@ -214,7 +213,9 @@ async def _check_shifts_did_not_start_async() -> Dict[str, Any]:
             
             from shared.services.notification_service import NotificationService
             from shared.templates.notifications.base_templates import NotificationTemplateManager
+            from shared.templates.notifications.registry import notification_templates
             notification_service = NotificationService()
+            await notification_templates.refresh()
             
             for schedule in schedules:
                 try:
@@ -363,8 +364,7 @@ def check_object_openings(self) -> Dict[str, Any]:
         Статистика: сколько уведомлений создано
     """
     try:
-        import asyncio
-        return asyncio.run(_check_object_openings_async())
+        return run_async(_check_object_openings_async())
     except Exception as e:
         logger.error(f"check_object_openings failed: {e}")
         raise
@@ -6,6 +6,7 @@ from celery import Task
 from decimal import Decimal, ROUND_HALF_UP
 
 from core.celery.celery_app import celery_app
+from core.celery.runtime import run_async
 from core.logging.logger import logger
 from core.cache.cache_service import CacheService
 import pytz
@@ -31,7 +32,6 @@ class ShiftTask(Task):
 def auto_close_shifts(self):
     """Автоматическое закрытие просроченных смен."""
     try:
-        import asyncio
         from core.database.session import get_celery_session
         from datetime import datetime, time, timedelta
         from sqlalchemy import select, and_, func as sqlfunc
@@ -84,7 +84,7 @@ def auto_close_shifts(self):
                                 end_local = obj_tz.localize(end_local)
                                 planned_end_utc = end_local.astimezone(pytz.UTC)
                                 end_time_utc = planned_end_utc
-                                logger.info(f"Shift {shift.id}: using timeslot end_time {timeslot.end_time}")
+                                logger.debug("Shift end from timeslot", shift_id=shift.id, end_time=timeslot.end_time)
                         
                         # Для спонтанных смен используем closing_time объекта
                         if planned_end_utc is None and obj and obj.closing_time:
@@ -92,7 +92,7 @@ def auto_close_shifts(self):
                             end_local = obj_tz.localize(end_local)
                             planned_end_utc = end_local.astimezone(pytz.UTC)
                             end_time_utc = planned_end_utc
-                            logger.info(f"Shift {shift.id}: using object closing_time {obj.closing_time}")
+                            logger.debug("Shift end from object closing_time", shift_id=shift.id, closing_time=obj.closing_time)
 
                         # Проверяем, совпадает ли planned_end с closing_time объекта
                         planned_end_matches_closing_time = False
@@ -102,7 +102,7 @@ def auto_close_shifts(self):
                             planned_end_time = planned_end_local.time()
                             if planned_end_time == obj.closing_time:
                                 planned_end_matches_closing_time = True
-                                logger.debug(f"Shift {shift.id}: planned_end ({planned_end_time}) matches object closing_time ({obj.closing_time})")
+                                logger.debug("Shift planned_end matches object closing_time", shift_id=shift.id, closing_time=obj.closing_time)
 
                         # Если planned_end совпадает с closing_time объекта, используем auto_close_minutes
                         should_close = False
@@ -113,9 +113,12 @@ def auto_close_shifts(self):
                             if now_utc >= auto_close_deadline:
                                 should_close = True
                                 close_at_time = planned_end_utc
-                                logger.info(
-                                    f"Shift {shift.id}: auto-close condition met (planned_end={planned_end_utc}, "
-                                    f"auto_close_minutes={obj.auto_close_minutes}, deadline={auto_close_deadline}, now={now_utc})"
+                                logger.debug(
+                                    "Shift auto-close condition met",
+                                    shift_id=shift.id,
+                                    planned_end=planned_end_utc,
+                                    auto_close_minutes=obj.auto_close_minutes,
+                                    deadline=auto_close_deadline
                                 )
                         elif planned_end_time and planned_end_utc and obj and obj.closing_time:
                             # planned_end != closing_time: сравниваем кол-во активных смен с max_employees тайм-слота
@@ -133,14 +136,20 @@ def auto_close_shifts(self):
                                 if now_utc >= deadline:
                                     should_close = True
                                     close_at_time = planned_end_utc
-                                    logger.info(
-                                        f"Shift {shift.id}: overstaffed ({active_count}>{ts_max_employees}), "
-                                        f"auto-close at planned_end={planned_end_utc} (deadline={deadline})"
+                                    logger.debug(
+                                        "Shift overstaffed, closing at planned_end",
+                                        shift_id=shift.id,
+                                        active=active_count,
+                                        max_employees=ts_max_employees,
+                                        planned_end=planned_end_utc
                                     )
                                 else:
                                     logger.debug(
-                                        f"Shift {shift.id}: overstaffed ({active_count}>{ts_max_employees}), "
-                                        f"waiting until {deadline}"
+                                        "Shift overstaffed, waiting",
+                                        shift_id=shift.id,
+                                        active=active_count,
+                                        max_employees=ts_max_employees,
+                                        deadline=deadline
                                     )
                             else:
                                 # Норма: ждём closing_time объекта, закрываем по closing_time
@@ -150,14 +159,22 @@ def auto_close_shifts(self):
                                 if now_utc >= closing_utc:
                                     should_close = True
                                     close_at_time = closing_utc
-                                    logger.info(
-                                        f"Shift {shift.id}: planned_end ({planned_end_time}) != closing_time ({obj.closing_time}), "
-                                        f"active={active_count} <= max={ts_max_employees}, closing at closing_time"
+                                    logger.debug(
+                                        "Shift closing at object closing_time",
+                                        shift_id=shift.id,
+                                        planned_end=planned_end_time,
+                                        closing_time=obj.closing_time,
+                                        active=active_count,
+                                        max_employees=ts_max_employees
                                     )
                                 else:
                                     logger.debug(
-                                        f"Shift {shift.id}: planned_end ({planned_end_time}) != closing_time ({obj.closing_time}), "
-                                        f"active={active_count} <= max={ts_max_employees}, waiting for closing_time={closing_utc}"
+                                        "Shift waiting for object closing_time",
+                                        shift_id=shift.id,
+                                        planned_end=planned_end_time,
+                                        closing_time=closing_utc,
+                                        active=active_count,
+                                        max_employees=ts_max_employees
                                     )
                         elif end_time_utc and now_utc >= end_time_utc:
                             # Для остальных смен (без auto_close_minutes или без planned_end) - стандартная логика
@@ -184,7 +201,7 @@ def auto_close_shifts(self):
                                 time_source = f"object closing_time (auto_close_minutes={obj.auto_close_minutes})"
                             else:
                                 time_source = "timeslot" if (shift.is_planned and shift.time_slot_id) else "object closing_time"
-                            logger.info(f"Auto-closed {shift_type} shift {shift.id} at {close_at_time} ({time_source})")
+                            logger.info("Auto-closed shift", shift_type=shift_type, shift_id=shift.id, closed_at=close_at_time, time_source=time_source)
                             
                             # Этап 4: Автооткрытие следующей запланированной смены (для фактических Shift)
                             if shift.is_planned and shift.schedule_id and shift.time_slot_id:
@@ -304,7 +321,7 @@ def auto_close_shifts(self):
                                                 else:
                                                     logger.debug(f"User or coordinates not found for auto-opening: shift_id={shift.id}")
                                             else:
-                                                logger.debug(f"Time mismatch for consecutive shifts: prev_end={prev_timeslot.end_time if prev_timeslot else None}, next_start={next_timeslot.start_time}")
+                                                logger.debug("Time mismatch for consecutive shifts", lazy=lambda: {"prev_end": prev_timeslot.end_time if prev_timeslot else None, "next_start": next_timeslot.start_time})
                                         else:
                                             logger.debug(f"No next planned shift found for user_id={shift.user_id} on date={close_at_time.date()}")
                                     
@@ -379,7 +396,7 @@ def auto_close_shifts(self):
                             planned_end_time = planned_end_local.time()
                             if planned_end_time == obj.closing_time:
                                 planned_end_matches_closing_time = True
-                                logger.debug(f"Schedule {schedule.id}: planned_end ({planned_end_time}) matches object closing_time ({obj.closing_time})")
+                                logger.debug("Schedule planned_end matches object closing_time", schedule_id=schedule.id, closing_time=obj.closing_time)
 
                         # Если planned_end совпадает с closing_time объекта, используем auto_close_minutes
                         should_close = False
@@ -390,9 +407,12 @@ def auto_close_shifts(self):
                             if now_utc >= auto_close_deadline:
                                 should_close = True
                                 close_at_time = planned_end_utc
-                                logger.info(
-                                    f"Schedule {schedule.id}: auto-close condition met (planned_end={planned_end_utc}, "
-                                    f"auto_close_minutes={obj.auto_close_minutes}, deadline={auto_close_deadline}, now={now_utc})"
+                                logger.debug(
+                                    "Schedule auto-close condition met",
+                                    schedule_id=schedule.id,
+                                    planned_end=planned_end_utc,
+                                    auto_close_minutes=obj.auto_close_minutes,
+                                    deadline=auto_close_deadline
                                 )
                         elif planned_end_time and planned_end_utc and planned_end_local and obj and obj.closing_time:
                             # planned_end != closing_time: сравниваем кол-во активных смен с max_employees тайм-слота
@@ -410,14 +430,20 @@ def auto_close_shifts(self):
                                 if now_utc >= deadline:
                                     should_close = True
                                     close_at_time = planned_end_utc
-                                    logger.info(
-                                        f"Schedule {schedule.id}: overstaffed ({active_count}>{ts_max_employees}), "
-                                        f"auto-close at planned_end={planned_end_utc} (deadline={deadline})"
+                                    logger.debug(
+                                        "Schedule overstaffed, closing at planned_end",
+                                        schedule_id=schedule.id,
+                                        active=active_count,
+                                        max_employees=ts_max_employees,
+                                        planned_end=planned_end_utc
                                     )
                                 else:
                                     logger.debug(
-                                        f"Schedule {schedule.id}: overstaffed ({active_count}>{ts_max_employees}), "
-                                        f"waiting until {deadline}"
+                                        "Schedule overstaffed, waiting",
+                                        schedule_id=schedule.id,
+                                        active=active_count,
+                                        max_employees=ts_max_employees,
+                                        deadline=deadline
                                     )
                             else:
                                 # Норма: ждём closing_time объекта, закрываем по closing_time
@@ -427,14 +453,22 @@ def auto_close_shifts(self):
                                 if now_utc >= closing_utc:
                                     should_close = True
                                     close_at_time = closing_utc
-                                    logger.info(
-                                        f"Schedule {schedule.id}: planned_end ({planned_end_time}) != closing_time ({obj.closing_time}), "
-                                        f"active={active_count} <= max={ts_max_employees}, closing at closing_time"
+                                    logger.debug(
+                                        "Schedule closing at object closing_time",
+                                        schedule_id=schedule.id,
+                                        planned_end=planned_end_time,
+                                        closing_time=obj.closing_time,
+                                        active=active_count,
+                                        max_employees=ts_max_employees
                                     )
                                 else:
                                     logger.debug(
-                                        f"Schedule {schedule.id}: planned_end ({planned_end_time}) != closing_time ({obj.closing_time}), "
-                                        f"active={active_count} <= max={ts_max_employees}, waiting for closing_time={closing_utc}"
+                                        "Schedule waiting for object closing_time",
+                                        schedule_id=schedule.id,
+                                        planned_end=planned_end_time,
+                                        closing_time=closing_utc,
+                                        active=active_count,
+                                        max_employees=ts_max_employees
                                     )
                         elif end_time_utc and now_utc >= end_time_utc:
                             # Для остальных смен (без auto_close_minutes или без planned_end) - стандартная логика
@@ -460,7 +494,7 @@ def auto_close_shifts(self):
                                 time_source = f"object closing_time (auto_close_minutes={obj.auto_close_minutes})"
                             else:
                                 time_source = "timeslot/object closing time"
-                            logger.info(f"Auto-closed planned shift {schedule.id} at {close_at_time} ({time_source})")
+                            logger.info("Auto-closed planned shift", schedule_id=schedule.id, closed_at=close_at_time, time_source=time_source)
                             
                             # Этап 4: Автооткрытие следующей запланированной смены
                             try:
@@ -573,7 +607,7 @@ def auto_close_shifts(self):
                                         else:
                                             logger.debug(f"No previous shift or coordinates for auto-opening consecutive shift: schedule_id={schedule.id}")
                                     else:
-                                        logger.debug(f"Time mismatch for consecutive shifts: prev_end={prev_timeslot.end_time if prev_timeslot else None}, next_start={next_timeslot.start_time}")
+                                        logger.debug("Time mismatch for consecutive shifts", lazy=lambda: {"prev_end": prev_timeslot.end_time if prev_timeslot else None, "next_start": next_timeslot.start_time})
                                 else:
                                     logger.debug(f"No next planned shift found for user_id={schedule.user_id} on date={end_time_utc.date()}")
                                     
@@ -627,7 +661,7 @@ def auto_close_shifts(self):
                 }
                 
         # Запускаем async-функцию корректно
-        result = asyncio.run(_auto_close_shifts())
+        result = run_async(_auto_close_shifts())
         return result
         
     except Exception as e:
@@ -667,8 +701,7 @@ def calculate_shift_payment(self, shift_id: int):
                 
                 return payment_data
         
-        import asyncio
-        payment_data = asyncio.run(_calculate_payment())
+        payment_data = run_async(_calculate_payment())
         
         logger.info(
             "Shift payment calculated",
@@ -729,8 +762,7 @@ def validate_shift_location(self, shift_id: int, coordinates: str):
                     "object_coordinates": object_coordinates
                 }
         
-        import asyncio
-        validation_result = asyncio.run(_validate_location())
+        validation_result = run_async(_validate_location())
         
         logger.info(
             "Shift location validated",
@@ -768,8 +800,7 @@ def cleanup_expired_shifts(self):
                 
                 return deleted_count
         
-        import asyncio
-        deleted_count = asyncio.run(_cleanup_shifts())
+        deleted_count = run_async(_cleanup_shifts())
         
         logger.info(f"Cleaned up {deleted_count} expired shifts")
         return {"deleted_count": deleted_count}
@@ -827,8 +858,7 @@ def sync_shift_schedules(self):
                 
                 return synced_count
         
-        import asyncio
-        synced_count = asyncio.run(_sync_schedules())
+        synced_count = run_async(_sync_schedules())
         
         logger.info(f"Synced {synced_count} shift schedules")
         return {"synced_count": synced_count}
@@ -843,10 +873,14 @@ def plan_next_year_timeslots(self):
     """1 декабря — автогенерация тайм-слотов объектов на следующий год по графику работы."""
     try:
         from core.database.session import get_celery_session
-        from sqlalchemy import select, and_
+        from sqlalchemy import select
         from domain.entities.object import Object
-        from domain.entities.time_slot import TimeSlot
-        from datetime import date, timedelta
+        from shared.services.timeslot_planner_service import (
+            PlannedSlot,
+            TimeslotPlanner,
+            WORK_WEEK_MASK,
+            plan_dates,
+        )
 
         async def _plan_next_year():
             async with get_celery_session() as session:
@@ -854,48 +888,36 @@ def plan_next_year_timeslots(self):
                 start_date = date(next_year, 1, 1)
                 end_date = date(next_year, 12, 31)
 
-                objs_res = await session.execute(select(Object).where(Object.is_active == True))
-                objects = objs_res.scalars().all()
-
-                created_total = 0
-                for obj in objects:
-                    work_days_mask = getattr(obj, "work_days_mask", 31)
-                    schedule_repeat_weeks = getattr(obj, "schedule_repeat_weeks", 1)
-
-                    base_week_index = start_date.isocalendar().week
-                    d = start_date
-
-                    while d <= end_date:
-                        dow_mask = 1 << (d.weekday())
-                        if (work_days_mask & dow_mask) != 0:
-                            week_index = d.isocalendar().week
-                            if ((week_index - base_week_index) % schedule_repeat_weeks) == 0:
-                                exists_res = await session.execute(
-                                    select(TimeSlot).where(
-                                        and_(
-                                            TimeSlot.object_id == obj.id,
-                                            TimeSlot.slot_date == d
-                                        )
-                                    )
-                                )
-                                if not exists_res.scalars().first():
-                                    ts = TimeSlot(
-                                        object_id=obj.id,
-                                        slot_date=d,
-                                        start_time=obj.opening_time,
-                                        end_time=obj.closing_time,
-                                        hourly_rate=float(obj.hourly_rate) if obj.hourly_rate else 0,
-                                        is_active=True
-                                    )
-                                    session.add(ts)
-                                    created_total += 1
-                        d = d + timedelta(days=1)
+                objs_res = await session.execute(
+                    select(
+                        Object.id,
+                        Object.opening_time,
+                        Object.closing_time,
+                        Object.hourly_rate,
+                        Object.work_days_mask,
+                        Object.schedule_repeat_weeks,
+                    ).where(Object.is_active == True)
+                )
 
-                await session.commit()
-                return created_total
+                slots = []
+                for obj in objs_res.all():
+                    days_mask = obj.work_days_mask if obj.work_days_mask is not None else WORK_WEEK_MASK
+                    for slot_date in plan_dates(start_date, end_date, days_mask, obj.schedule_repeat_weeks or 1):
+                        slots.append(PlannedSlot(
+                            object_id=obj.id,
+                            slot_date=slot_date,
+                            start_time=obj.opening_time,
+                            end_time=obj.closing_time,
+                            hourly_rate=obj.hourly_rate or 0,
+                        ))
+
+                # День, в котором у объекта уже есть любой слот (в т.ч. удаленный), не трогаем
+                result = await TimeslotPlanner(session).materialize(
+                    slots, match_times=False, active_only=False
+                )
+                return result.created_count
 
-        import asyncio
-        created = asyncio.run(_plan_next_year())
+        created = run_async(_plan_next_year())
         logger.info(f"Planned next year timeslots: created={created}")
         return created
     except Exception as e:
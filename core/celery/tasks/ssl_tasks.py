@@ -13,6 +13,7 @@ from shared.services.notification_service import NotificationService
 
 # Получаем экземпляр Celery
 from core.celery.celery_app import celery_app
+from core.celery.runtime import run_async
 
 
 async def _renew_ssl_certificates_async() -> Dict[str, Any]:
@@ -89,8 +90,7 @@ async def _renew_ssl_certificates_async() -> Dict[str, Any]:
 @celery_app.task(name="renew_ssl_certificates")
 def renew_ssl_certificates() -> Dict[str, Any]:
     """Периодическая проверка и обновление SSL сертификатов"""
-    import asyncio
-    return asyncio.run(_renew_ssl_certificates_async())
+    return run_async(_renew_ssl_certificates_async())
 
 
 async def _check_certificate_expiry_async() -> Dict[str, Any]:
@@ -178,8 +178,7 @@ async def _check_certificate_expiry_async() -> Dict[str, Any]:
 @celery_app.task(name="check_certificate_expiry")
 def check_certificate_expiry() -> Dict[str, Any]:
     """Проверка срока действия сертификатов"""
-    import asyncio
-    return asyncio.run(_check_certificate_expiry_async())
+    return run_async(_check_certificate_expiry_async())
 
 
 @celery_app.task
@@ -298,8 +297,7 @@ async def _validate_ssl_configuration_async() -> Dict[str, Any]:
 @celery_app.task(name="validate_ssl_configuration")
 def validate_ssl_configuration() -> Dict[str, Any]:
     """Валидация SSL конфигурации"""
-    import asyncio
-    return asyncio.run(_validate_ssl_configuration_async())
+    return run_async(_validate_ssl_configuration_async())
 
 
 async def _send_ssl_notification(notification_type: str, message: str, data: Dict[str, Any]) -> None:
@@ -3,28 +3,35 @@
 from __future__ import annotations
 
 from datetime import datetime, timedelta, time
-from typing import List, Optional
-from decimal import Decimal
 
-from sqlalchemy import select, and_, or_, cast, func
+from sqlalchemy import select, and_, or_, cast, func, case, exists, literal, Date, DateTime
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import aliased, selectinload
+from sqlalchemy.dialects.postgresql import JSONB, insert as pg_insert
 
 from core.celery.celery_app import celery_app
+from core.celery.runtime import run_async
 from core.database.session import get_celery_session
 from core.logging.logger import logger
 from domain.entities.task_plan import TaskPlanV2
 from domain.entities.task_entry import TaskEntryV2
 from domain.entities.shift_schedule import ShiftSchedule
-from domain.entities.time_slot import TimeSlot
 from domain.entities.shift import Shift
 
 
+# Окно совпадения начала смены со временем плана
+PLAN_TIME_WINDOW = timedelta(minutes=30)
+
+
 async def create_task_entries_for_date(session: AsyncSession, target_date: datetime.date) -> int:
     """
     Создать TaskEntryV2 для всех активных планов на заданную дату.
     
+    Периодичность планов проверяется в Python (планов немного), пары
+    (план, смена) подбираются одним запросом с соединением и вставляются
+    INSERT ... SELECT ... ON CONFLICT DO NOTHING: уже назначенные пары
+    отсекает NOT EXISTS, параллельный запуск — уникальный индекс.
+    
     Args:
         session: Асинхронная сессия БД
         target_date: Дата для создания задач
@@ -32,57 +39,95 @@ async def create_task_entries_for_date(session: AsyncSession, target_date: datet
     Returns:
         Количество созданных TaskEntryV2
     """
-    created_count = 0
+    plans_result = await session.execute(select(TaskPlanV2).where(TaskPlanV2.is_active == True))
+    plan_ids = [
+        plan.id for plan in plans_result.scalars().all()
+        if should_create_entry_for_date(plan, target_date)
+    ]
+    if not plan_ids:
+        return 0
     
-    # Получаем все активные планы
-    plans_query = select(TaskPlanV2).where(
-        TaskPlanV2.is_active == True
-    ).options(
-        selectinload(TaskPlanV2.template),
-        selectinload(TaskPlanV2.object)
+    day_start = datetime.combine(target_date, time.min)
+    existing = aliased(TaskEntryV2)
+    candidates = select(
+        TaskPlanV2.template_id,
+        TaskPlanV2.id,
+        ShiftSchedule.id,
+        ShiftSchedule.user_id  # В ShiftSchedule поле называется user_id
+    ).join(
+        ShiftSchedule,
+        and_(
+            plan_covers_object(ShiftSchedule.object_id),
+            plan_matches_start_time(ShiftSchedule.planned_start, target_date)
+        )
+    ).where(
+        TaskPlanV2.id.in_(plan_ids),
+        ShiftSchedule.status.in_(["confirmed", "planned"]),
+        ShiftSchedule.planned_start >= day_start,
+        ShiftSchedule.planned_start < day_start + timedelta(days=1),
+        ~exists().where(
+            existing.plan_id == TaskPlanV2.id,
+            existing.shift_schedule_id == ShiftSchedule.id
+        )
     )
-    plans_result = await session.execute(plans_query)
-    plans = plans_result.scalars().all()
-    
-    for plan in plans:
-        # Проверяем, подходит ли план для данной даты
-        if not should_create_entry_for_date(plan, target_date):
-            continue
-        
-        # Получаем смены для этого плана
-        shift_schedules = await get_relevant_shift_schedules(session, plan, target_date)
-        
-        for shift in shift_schedules:
-            # Проверяем, не существует ли уже TaskEntry
-            existing_query = select(TaskEntryV2).where(
-                and_(
-                    TaskEntryV2.plan_id == plan.id,
-                    TaskEntryV2.shift_schedule_id == shift.id
-                )
-            )
-            existing_result = await session.execute(existing_query)
-            if existing_result.scalar_one_or_none():
-                continue  # Уже существует
-            
-            # Создаём TaskEntryV2
-            entry = TaskEntryV2(
-                template_id=plan.template_id,
-                plan_id=plan.id,
-                shift_schedule_id=shift.id,
-                employee_id=shift.user_id,  # В ShiftSchedule поле называется user_id
-                is_completed=False,
-                created_at=datetime.utcnow()
-            )
-            session.add(entry)
-            created_count += 1
-            logger.debug(
-                f"Created TaskEntryV2 for plan {plan.id}, shift {shift.id}, employee {shift.user_id}"
-            )
+    insert_stmt = pg_insert(TaskEntryV2).from_select(
+        ["template_id", "plan_id", "shift_schedule_id", "employee_id"],
+        candidates
+    ).on_conflict_do_nothing(
+        index_elements=["plan_id", "shift_schedule_id"],
+        index_where=TaskEntryV2.shift_id.is_(None)
+    ).returning(TaskEntryV2.id)
     
+    result = await session.execute(insert_stmt)
+    created_count = len(result.all())
     await session.commit()
     return created_count
 
 
+def plan_covers_object(object_id_column):
+    """
+    SQL-условие: план относится к объекту.
+    
+    Как и раньше: непустой object_ids — список объектов плана, иначе
+    object_id (устаревшее поле), иначе план общий для всех объектов.
+    """
+    object_ids = cast(TaskPlanV2.object_ids, JSONB)
+    has_object_ids = case(
+        (func.jsonb_typeof(object_ids) == "array", func.jsonb_array_length(object_ids)),
+        else_=0
+    ) > 0
+    return or_(
+        and_(has_object_ids, object_ids.op("@>")(func.jsonb_build_array(object_id_column))),
+        and_(~has_object_ids, TaskPlanV2.object_id == object_id_column),
+        and_(~has_object_ids, TaskPlanV2.object_id.is_(None))
+    )
+
+
+def plan_matches_start_time(planned_start_column, target_date: datetime.date):
+    """SQL-условие: начало смены в окне ±30 минут от времени плана (если оно задано)."""
+    plan_start = func.timezone(
+        "UTC",
+        literal(target_date, Date) + TaskPlanV2.planned_time_start,
+        type_=DateTime(timezone=True)
+    )
+    return or_(
+        TaskPlanV2.planned_time_start.is_(None),
+        and_(
+            planned_start_column >= plan_start - PLAN_TIME_WINDOW,
+            planned_start_column <= plan_start + PLAN_TIME_WINDOW
+        )
+    )
+
+
+def start_time_matches(plan: TaskPlanV2, start: datetime) -> bool:
+    """Время начала смены в окне ±30 минут от времени плана (если оно задано)."""
+    if not plan.planned_time_start:
+        return True
+    plan_time_seconds = plan.planned_time_start.hour * 3600 + plan.planned_time_start.minute * 60
+    shift_time_seconds = start.hour * 3600 + start.minute * 60
+    return abs(plan_time_seconds - shift_time_seconds) <= PLAN_TIME_WINDOW.total_seconds()
+
+
 def should_create_entry_for_date(plan: TaskPlanV2, target_date: datetime.date) -> bool:
     """
     Проверяет, нужно ли создавать TaskEntry для плана на данную дату.
@@ -123,55 +168,6 @@ def should_create_entry_for_date(plan: TaskPlanV2, target_date: datetime.date) -
     return False
 
 
-async def get_relevant_shift_schedules(
-    session: AsyncSession, 
-    plan: TaskPlanV2, 
-    target_date: datetime.date
-) -> List[ShiftSchedule]:
-    """
-    Получить смены, на которые нужно назначить задачу.
-    
-    Args:
-        session: Асинхронная сессия БД
-        plan: План задачи
-        target_date: Дата смен
-        
-    Returns:
-        Список смен
-    """
-    # Базовый запрос - активные смены на заданную дату
-    query = select(ShiftSchedule).where(
-        and_(
-            ShiftSchedule.status.in_(["confirmed", "planned"]),
-            ShiftSchedule.planned_start >= datetime.combine(target_date, time.min),
-            ShiftSchedule.planned_start < datetime.combine(target_date + timedelta(days=1), time.min)
-        )
-    ).options(
-        selectinload(ShiftSchedule.time_slot)
-    )
-    
-    # Фильтр по объектам (если указаны в плане)
-    if plan.object_ids:
-        query = query.where(ShiftSchedule.object_id.in_(plan.object_ids))
-    elif plan.object_id:  # Для обратной совместимости
-        query = query.where(ShiftSchedule.object_id == plan.object_id)
-    
-    # Фильтр по времени начала (если указано в плане)
-    if plan.planned_time_start:
-        # Ищем смены, время начала которых попадает в окно ±30 минут
-        time_start = datetime.combine(target_date, plan.planned_time_start)
-        time_end = time_start + timedelta(minutes=30)
-        query = query.where(
-            and_(
-                ShiftSchedule.planned_start >= time_start - timedelta(minutes=30),
-                ShiftSchedule.planned_start <= time_end
-            )
-        )
-    
-    result = await session.execute(query)
-    return result.scalars().all()
-
-
 async def create_task_entries_for_active_shifts(session: AsyncSession, plan: TaskPlanV2) -> int:
     """
     Создать TaskEntryV2 для уже активных смен по новому плану.
@@ -184,7 +180,6 @@ async def create_task_entries_for_active_shifts(session: AsyncSession, plan: Tas
     Returns:
         Количество созданных TaskEntryV2
     """
-    created_count = 0
     today = datetime.utcnow().date()
     
     # Получаем активные смены (сегодня и будущие)
@@ -193,8 +188,6 @@ async def create_task_entries_for_active_shifts(session: AsyncSession, plan: Tas
             ShiftSchedule.status.in_(["confirmed", "planned"]),
             ShiftSchedule.planned_start >= datetime.combine(today, time.min)
         )
-    ).options(
-        selectinload(ShiftSchedule.time_slot)
     )
     
     # Фильтр по объектам (если указаны в плане)
@@ -204,58 +197,44 @@ async def create_task_entries_for_active_shifts(session: AsyncSession, plan: Tas
         query = query.where(ShiftSchedule.object_id == plan.object_id)
     
     result = await session.execute(query)
-    shifts = result.scalars().all()
+    shifts = [
+        shift for shift in result.scalars().all()
+        if should_create_entry_for_date(plan, shift.planned_start.date())
+        and start_time_matches(plan, shift.planned_start)
+    ]
+    if not shifts:
+        return 0
     
-    for shift in shifts:
-        # Проверяем, подходит ли смена для этого плана
-        shift_date = shift.planned_start.date()
-        
-        # Проверяем соответствие дате/периодичности
-        if not should_create_entry_for_date(plan, shift_date):
-            continue
-        
-        # Проверяем время начала
-        if plan.planned_time_start:
-            shift_time = shift.planned_start.time()
-            plan_time_seconds = (
-                plan.planned_time_start.hour * 3600 + 
-                plan.planned_time_start.minute * 60
-            )
-            shift_time_seconds = (
-                shift_time.hour * 3600 + 
-                shift_time.minute * 60
-            )
-            # Разница не более 30 минут
-            if abs(plan_time_seconds - shift_time_seconds) > 1800:
-                continue
-        
-        # Проверяем, не существует ли уже TaskEntry
-        existing_query = select(TaskEntryV2).where(
-            and_(
-                TaskEntryV2.plan_id == plan.id,
-                TaskEntryV2.shift_schedule_id == shift.id
-            )
-        )
-        existing_result = await session.execute(existing_query)
-        if existing_result.scalar_one_or_none():
-            continue
-        
-        # Создаём TaskEntryV2
-        entry = TaskEntryV2(
-            template_id=plan.template_id,
-            plan_id=plan.id,
-            shift_schedule_id=shift.id,
-            employee_id=shift.user_id,  # В ShiftSchedule поле называется user_id
-            is_completed=False,
-            created_at=datetime.utcnow()
-        )
-        session.add(entry)
-        created_count += 1
-        logger.debug(
-            f"Created TaskEntryV2 for plan {plan.id}, shift {shift.id}, employee {shift.user_id}"
+    # Уже назначенные смены — одним запросом
+    existing_result = await session.execute(
+        select(TaskEntryV2.shift_schedule_id).where(
+            TaskEntryV2.plan_id == plan.id,
+            TaskEntryV2.shift_schedule_id.in_([shift.id for shift in shifts])
         )
+    )
+    existing_ids = set(existing_result.scalars().all())
     
-    return created_count
+    rows = [
+        {
+            "template_id": plan.template_id,
+            "plan_id": plan.id,
+            "shift_schedule_id": shift.id,
+            "employee_id": shift.user_id,  # В ShiftSchedule поле называется user_id
+            "is_completed": False,
+            "requires_media": False
+        }
+        for shift in shifts
+        if shift.id not in existing_ids
+    ]
+    if not rows:
+        return 0
+    
+    insert_stmt = pg_insert(TaskEntryV2).values(rows).on_conflict_do_nothing(
+        index_elements=["plan_id", "shift_schedule_id"],
+        index_where=TaskEntryV2.shift_id.is_(None)
+    ).returning(TaskEntryV2.id)
+    result = await session.execute(insert_stmt)
+    return len(result.all())
 
 
 @celery_app.task(name="auto_assign_tasks")
@@ -264,7 +243,6 @@ def auto_assign_tasks_celery():
     Celery задача: автоматическое назначение задач на смены.
     Запускается ежедневно в 4:00 МСК.
     """
-    import asyncio
     
     async def _run():
         async with get_celery_session() as session:
@@ -281,7 +259,7 @@ def auto_assign_tasks_celery():
             
             return count_today + count_tomorrow
     
-    return asyncio.run(_run())
+    return run_async(_run())
 
 
 async def create_task_entries_for_shift(session: AsyncSession, shift: Shift) -> int:
@@ -296,35 +274,30 @@ async def create_task_entries_for_shift(session: AsyncSession, shift: Shift) ->
     Returns:
         Количество созданных TaskEntryV2
     """
-    created_count = 0
     shift_date = shift.start_time.date()
     
     # Получаем все активные планы для этого объекта С eager loading шаблонов
     query = select(TaskPlanV2).where(
-        TaskPlanV2.is_active == True
+        TaskPlanV2.is_active == True,
+        plan_covers_object(shift.object_id)
     ).options(
         selectinload(TaskPlanV2.template)  # КРИТИЧНО: загружаем шаблоны заранее!
     )
     
-    # Фильтр по объекту смены (работает для всех типов смен)
-    # Используем JSONB оператор @> для проверки содержания элемента в массиве
-    query = query.where(
-        or_(
-            TaskPlanV2.object_id == shift.object_id,
-            cast(TaskPlanV2.object_ids, JSONB).op('@>')(cast([shift.object_id], JSONB)),
-            # Общие планы (без привязки к объектам)
-            and_(
-                TaskPlanV2.object_ids.is_(None),
-                TaskPlanV2.object_id.is_(None)
-            )
-        )
-    )
-    
     result = await session.execute(query)
     plans = result.scalars().all()
     
     logger.info(f"Found {len(plans)} active TaskPlanV2 for shift {shift.id} (object={shift.object_id})")
     
+    # Для запланированных смен время плана сверяется с плановым началом (один запрос на смену)
+    schedule_start = None
+    if shift.schedule_id and any(plan.planned_time_start for plan in plans):
+        schedule_result = await session.execute(
+            select(ShiftSchedule.planned_start).where(ShiftSchedule.id == shift.schedule_id)
+        )
+        schedule_start = schedule_result.scalar_one_or_none()
+    
+    rows = []
     for plan in plans:
         # Проверяем, подходит ли план для даты смены
         if not should_create_entry_for_date(plan, shift_date):
@@ -332,61 +305,37 @@ async def create_task_entries_for_shift(session: AsyncSession, shift: Shift) ->
             continue
         
         # Проверяем время начала (если указано в плане)
-        if plan.planned_time_start and shift.schedule_id:
-            # Для запланированных смен проверяем время
-            from domain.entities.shift_schedule import ShiftSchedule
-            schedule_query = select(ShiftSchedule).where(ShiftSchedule.id == shift.schedule_id)
-            schedule_result = await session.execute(schedule_query)
-            schedule = schedule_result.scalar_one_or_none()
-            
-            if schedule:
-                shift_time = schedule.planned_start.time()
-                plan_time_seconds = (
-                    plan.planned_time_start.hour * 3600 + 
-                    plan.planned_time_start.minute * 60
-                )
-                shift_time_seconds = (
-                    shift_time.hour * 3600 + 
-                    shift_time.minute * 60
-                )
-                # Разница не более 30 минут
-                if abs(plan_time_seconds - shift_time_seconds) > 1800:
-                    logger.debug(f"Plan {plan.id} skipped: time mismatch")
-                    continue
-        
-        # Проверяем, не существует ли уже TaskEntry для ЭТОЙ СМЕНЫ (по shift_id - универсально!)
-        existing_query = select(TaskEntryV2).where(
-            and_(
-                TaskEntryV2.plan_id == plan.id,
-                TaskEntryV2.shift_id == shift.id  # Используем shift_id вместо shift_schedule_id!
-            )
-        )
-        existing_result = await session.execute(existing_query)
-        if existing_result.scalar_one_or_none():
-            logger.debug(f"TaskEntry for plan {plan.id} and shift {shift.id} already exists")
+        if schedule_start is not None and not start_time_matches(plan, schedule_start):
+            logger.debug(f"Plan {plan.id} skipped: time mismatch")
             continue
         
-        # Создаём TaskEntryV2 (теперь безопасно обращаться к plan.template!)
         if not plan.template:
             logger.warning(f"Plan {plan.id} has no template, skipping")
             continue
-            
-        entry = TaskEntryV2(
-            template_id=plan.template_id,
-            plan_id=plan.id,
-            shift_id=shift.id,  # Основная привязка - работает для всех типов смен!
-            shift_schedule_id=shift.schedule_id if shift.schedule_id else None,  # Для аналитики
-            employee_id=shift.user_id,
-            is_completed=False,
-            requires_media=plan.template.requires_media,  # Теперь безопасно!
-            created_at=datetime.utcnow()
-        )
-        session.add(entry)
-        created_count += 1
-        logger.info(
-            f"Created TaskEntryV2 for shift {shift.id} (planned={bool(shift.schedule_id)}), "
-            f"plan {plan.id}, template={plan.template.title}"
-        )
+        
+        rows.append({
+            "template_id": plan.template_id,
+            "plan_id": plan.id,
+            "shift_id": shift.id,  # Основная привязка - работает для всех типов смен!
+            "shift_schedule_id": shift.schedule_id if shift.schedule_id else None,  # Для аналитики
+            "employee_id": shift.user_id,
+            "is_completed": False,
+            "requires_media": plan.template.requires_media
+        })
     
-    return created_count
-
+    if not rows:
+        return 0
+    
+    # Уже созданные для этой смены задачи (plan_id, shift_id) пропускает уникальный индекс
+    insert_stmt = pg_insert(TaskEntryV2).values(rows).on_conflict_do_nothing(
+        index_elements=["plan_id", "shift_id"],
+        index_where=TaskEntryV2.shift_id.isnot(None)
+    ).returning(TaskEntryV2.plan_id)
+    result = await session.execute(insert_stmt)
+    created_plan_ids = [plan_id for (plan_id,) in result.all()]
+    
+    logger.info(
+        f"Created TaskEntryV2 for shift {shift.id} (planned={bool(shift.schedule_id)})",
+        plan_ids=created_plan_ids
+    )
+    return len(created_plan_ids)
@@ -3,18 +3,50 @@
 from __future__ import annotations
 
 from datetime import datetime, timedelta
-from typing import List
+from typing import Optional
 from decimal import Decimal
 
-from sqlalchemy import select, and_
+from sqlalchemy import select, and_, case, func, literal
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.celery.celery_app import celery_app
+from core.celery.runtime import run_async
+from core.config.settings import settings
 from core.database.session import get_celery_session
 from core.logging.logger import logger
 from domain.entities.task_entry import TaskEntryV2
 from domain.entities.payroll_adjustment import PayrollAdjustment
-from domain.entities.shift_schedule import ShiftSchedule
+from domain.entities.system_settings import SystemSettings
+from domain.entities.task_template import TaskTemplateV2
+
+
+# Системный пользователь (superadmin) — автор автоматических корректировок
+SYSTEM_USER_ID = 9
+WATERMARK_KEY = "task_bonuses_watermark"
+
+
+async def get_watermark(session: AsyncSession) -> Optional[datetime]:
+    """Время выполнения последней задачи, учтенной прошлым запуском."""
+    result = await session.execute(
+        select(SystemSettings.value).where(SystemSettings.key == WATERMARK_KEY)
+    )
+    value = result.scalar_one_or_none()
+    return datetime.fromisoformat(value) if value else None
+
+
+async def set_watermark(session: AsyncSession, value: datetime) -> None:
+    """Сохранить отметку в той же транзакции, что и корректировки."""
+    stmt = pg_insert(SystemSettings).values(
+        key=WATERMARK_KEY,
+        value=value.isoformat(),
+        description="Tasks v2: время выполнения последней задачи, обработанной process_task_bonuses"
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[SystemSettings.key],
+        set_={"value": stmt.excluded.value, "updated_at": func.now()}
+    )
+    await session.execute(stmt)
 
 
 async def process_completed_tasks_bonuses(session: AsyncSession) -> int:
@@ -22,83 +54,81 @@ async def process_completed_tasks_bonuses(session: AsyncSession) -> int:
     Обработать выполненные задачи и создать корректировки payroll.
     
     Логика:
-    - Находим завершённые TaskEntryV2 без связанной корректировки
+    - Берем задачи, выполненные после отметки прошлого запуска (с перекрытием
+      settings.task_bonuses_lookback_minutes: completed_at ставится до коммита)
     - Для каждой создаём PayrollAdjustment на основе default_bonus_amount из шаблона
     - Положительная сумма = бонус, отрицательная = штраф
+    - Задачи без запланированной смены (спонтанные) пропускаются
+    
+    Корректировки вставляются одним INSERT ... SELECT ... ON CONFLICT DO NOTHING
+    (уникальный индекс по task_entry_v2_id), отметка сдвигается в той же транзакции.
     
     Returns:
         Количество созданных корректировок
     """
-    from sqlalchemy.orm import selectinload
+    watermark = await get_watermark(session)
     
-    created_count = 0
+    scope = and_(
+        TaskEntryV2.is_completed == True,
+        TaskEntryV2.completed_at.isnot(None)
+    )
+    if watermark is not None:
+        lookback = timedelta(minutes=settings.task_bonuses_lookback_minutes)
+        scope = and_(scope, TaskEntryV2.completed_at > watermark - lookback)
     
-    # Получаем завершённые задачи с шаблонами
-    query = select(TaskEntryV2).where(
-        and_(
-            TaskEntryV2.is_completed == True,
-            TaskEntryV2.completed_at.isnot(None)
-        )
-    ).options(
-        selectinload(TaskEntryV2.template),
-        selectinload(TaskEntryV2.shift_schedule)
-    ).order_by(TaskEntryV2.completed_at.desc()).limit(1000)
+    # Новая отметка — последнее выполнение в окне, до вставки и в той же транзакции
+    max_result = await session.execute(select(func.max(TaskEntryV2.completed_at)).where(scope))
+    new_watermark = max_result.scalar()
+    if new_watermark is None:
+        return 0
     
-    result = await session.execute(query)
-    completed_entries = result.scalars().all()
+    amount = TaskTemplateV2.default_bonus_amount
+    candidates = select(
+        TaskEntryV2.employee_id,
+        TaskEntryV2.shift_schedule_id,
+        TaskEntryV2.id,
+        case((amount > 0, "task_bonus"), else_="task_penalty"),
+        amount,
+        literal("Задача: ") + TaskTemplateV2.title,
+        func.jsonb_build_object("task_code", TaskTemplateV2.code, "task_title", TaskTemplateV2.title),
+        literal(SYSTEM_USER_ID),
+        literal(False),  # Будет применено Celery задачей
+        func.now()
+    ).join(
+        TaskTemplateV2, TaskTemplateV2.id == TaskEntryV2.template_id
+    ).where(
+        scope,
+        amount.isnot(None),
+        amount != 0,
+        TaskEntryV2.shift_schedule_id.isnot(None),
+        TaskEntryV2.employee_id.isnot(None)
+    )
+    insert_stmt = pg_insert(PayrollAdjustment).from_select(
+        [
+            "employee_id", "shift_schedule_id", "task_entry_v2_id", "adjustment_type", "amount",
+            "description", "details", "created_by", "is_applied", "created_at"
+        ],
+        candidates
+    ).on_conflict_do_nothing(
+        index_elements=["task_entry_v2_id"],
+        index_where=PayrollAdjustment.task_entry_v2_id.isnot(None)
+    ).returning(PayrollAdjustment.amount)
     
-    for entry in completed_entries:
-        template = entry.template
-        if not template or not template.default_bonus_amount:
-            continue  # Нет шаблона или суммы
-        
-        # Проверяем, не создана ли уже корректировка для этой задачи
-        existing_adj_query = select(PayrollAdjustment).where(
-            and_(
-                PayrollAdjustment.task_entry_v2_id == entry.id
-            )
-        )
-        existing_adj_result = await session.execute(existing_adj_query)
-        if existing_adj_result.scalar_one_or_none():
-            continue  # Корректировка уже существует
-        
-        # Определяем данные для корректировки
-        shift_schedule = entry.shift_schedule
-        if not shift_schedule:
-            logger.warning(f"TaskEntryV2 {entry.id} has no shift_schedule, skipping adjustment")
-            continue
-        
-        amount = template.default_bonus_amount
-        adjustment_type = "task_bonus" if amount > 0 else "task_penalty"
-        description = f"Задача: {template.title}"
-        
-        # Создаём корректировку
-        adjustment = PayrollAdjustment(
-            employee_id=entry.employee_id,
-            shift_schedule_id=shift_schedule.id,
-            task_entry_v2_id=entry.id,
-            adjustment_type=adjustment_type,
-            amount=amount,
-            description=description,
-            details={"task_code": template.code, "task_title": template.title},
-            created_by=9,  # Системный пользователь (superadmin)
-            is_applied=False,  # Будет применено Celery задачей
-            created_at=datetime.utcnow()
-        )
-        session.add(adjustment)
-        created_count += 1
-        
-        logger.info(
-            f"Created PayrollAdjustment for TaskEntryV2",
-            entry_id=entry.id,
-            employee_id=entry.employee_id,
-            amount=float(amount),
-            type=adjustment_type,
-            template_code=template.code
-        )
+    result = await session.execute(insert_stmt)
+    amounts = [row_amount for (row_amount,) in result.all()]
     
+    if watermark is None or new_watermark > watermark:
+        await set_watermark(session, new_watermark)
     await session.commit()
-    return created_count
+    
+    if amounts:
+        logger.info(
+            "Created PayrollAdjustments for completed TaskEntryV2",
+            adjustments=len(amounts),
+            total_amount=float(sum(amounts, Decimal("0"))),
+            watermark=new_watermark.isoformat()
+        )
+    return len(amounts)
 
 
 @celery_app.task(name="process_task_bonuses")
@@ -107,7 +137,6 @@ def process_task_bonuses_celery():
     Celery задача: обработка бонусов/штрафов за выполненные задачи.
     Запускается каждые 10 минут.
     """
-    import asyncio
     
     async def _run():
         async with get_celery_session() as session:
@@ -115,5 +144,5 @@ def process_task_bonuses_celery():
             logger.info(f"Processed task bonuses: {count} adjustments created")
             return count
     
-    return asyncio.run(_run())
+    return run_async(_run())
 
@@ -14,10 +14,23 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from core.celery.celery_app import celery_app
+from core.celery.runtime import run_async
 from core.database.session import get_celery_session
 from core.logging.logger import logger
 
 
+async def _send_task_message(telegram_id: int, text: str, notification) -> bool:
+    """Отправка сообщения через общий (в пределах loop воркера) Telegram-клиент."""
+    from shared.services.senders.telegram_sender import get_telegram_sender
+
+    return await get_telegram_sender()._send_with_retry(
+        telegram_id=telegram_id,
+        message=text,
+        parse_mode="HTML",
+        notification=notification
+    )
+
+
 @celery_app.task(name="notify_tasks_updated")
 def notify_tasks_updated(employee_ids: list[int] | tuple[int, ...]) -> int:
     """Отправить сотрудникам сервисное сообщение о новых задачах.
@@ -32,7 +45,6 @@ def notify_tasks_updated(employee_ids: list[int] | tuple[int, ...]) -> int:
         from core.database.session import get_sync_session
         from sqlalchemy import select
         from domain.entities.user import User
-        from shared.services.senders.telegram_sender import get_telegram_sender
         from domain.entities.notification import (
             Notification,
             NotificationType,
@@ -49,7 +61,6 @@ def notify_tasks_updated(employee_ids: list[int] | tuple[int, ...]) -> int:
             result = session.execute(select(User).where(User.id.in_(list(employee_ids))))
             users: Iterable[User] = result.scalars().all()
 
-            sender = get_telegram_sender()
             sent_count = 0
 
             for u in users:
@@ -72,20 +83,9 @@ def notify_tasks_updated(employee_ids: list[int] | tuple[int, ...]) -> int:
                 text = "📋 Новая задача назначена. Откройте ‘📝 Мои задачи’, чтобы посмотреть список."
 
                 # Отправляем в Telegram, минуя шаблонизатор уведомлений
-                import asyncio
-                loop = asyncio.new_event_loop()
-                try:
-                    asyncio.set_event_loop(loop)
-                    success = loop.run_until_complete(sender._send_with_retry(
-                        telegram_id=int(u.telegram_id),
-                        message=text,
-                        parse_mode="HTML",
-                        notification=notification
-                    ))
-                    if success:
-                        sent_count += 1
-                finally:
-                    loop.close()
+                success = run_async(_send_task_message(int(u.telegram_id), text, notification))
+                if success:
+                    sent_count += 1
 
             logger.info("Tasks updated notifications sent", total=sent_count)
             return sent_count
@@ -108,8 +108,6 @@ def check_overdue_tasks() -> dict:
     Returns:
         dict: {"checked": int, "overdue": int, "notifications_sent": int}
     """
-    import asyncio
-    
     async def _check_overdue() -> dict:
         async with get_celery_session() as session:
             from domain.entities.task_entry import TaskEntryV2
@@ -279,15 +277,7 @@ def check_overdue_tasks() -> dict:
             }
     
     try:
-        loop = asyncio.get_event_loop()
-        if loop.is_running():
-            # Если event loop уже запущен, создаем новый
-            import concurrent.futures
-            with concurrent.futures.ThreadPoolExecutor() as executor:
-                future = executor.submit(asyncio.run, _check_overdue())
-                return future.result()
-        else:
-            return asyncio.run(_check_overdue())
+        return run_async(_check_overdue())
     except Exception as e:
         logger.error("check_overdue_tasks failed", error=str(e), exc_info=True)
         return {"checked": 0, "overdue": 0, "notifications_sent": 0, "error": str(e)}
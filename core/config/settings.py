@@ -21,12 +21,27 @@ class Settings(BaseSettings):
     database_pool_size: int = 20
     database_max_overflow: int = 30
     database_echo: bool = False
-    
+    # Инструментирование SQL (core/monitoring/sql_instrumentation.py)
+    request_query_budget: int = 100  # запросов к БД на HTTP-запрос, больше — предупреждение (0 — без проверки)
+    request_repeated_query_threshold: int = 10  # повторов одного запроса за HTTP-запрос (N+1)
+    sql_slow_query_ms: int = 500  # 0 — не логировать медленные запросы
+    # Синхронные запросы к БД в потоке event loop: off | warn | raise
+    # (пусто — warn при debug, иначе off)
+    db_blocking_guard: str = ""
+
     # Redis
     redis_url: str = "redis://localhost:6379"
     redis_db: int = 0
     redis_password: Optional[str] = None
     
+    # Кэш: локальный LRU-уровень процесса перед Redis
+    cache_local_enabled: bool = True
+    cache_local_max_entries: int = 2048
+    cache_local_ttl_seconds: int = 30
+    cache_invalidation_channel: str = "cache:invalidate"
+    auth_user_context_ttl_seconds: int = 60  # контекст пользователя веб-приложения
+    rules_cache_max_owners: int = 1024  # скомпилированных наборов правил Rules Engine на процесс
+    
     # User State Backend
     state_backend: str = "redis"  # memory | redis
     state_ttl_minutes: int = 15
@@ -48,6 +63,16 @@ class Settings(BaseSettings):
     telegram_webhook_url: Optional[str] = None
     telegram_webhook_path: str = "/webhook"
     
+    # Рассылка уведомлений (лимиты Bot API: ~30 сообщений/с всего, ~1/с в один чат)
+    notification_dispatch_batch_size: int = 200
+    notification_dispatch_concurrency: int = 20
+    notification_claim_lease_seconds: int = 900  # через сколько зависшая в sending пачка забирается повторно
+    telegram_global_rate_limit: float = 25.0
+    telegram_chat_rate_limit: float = 1.0
+    telegram_chat_burst: int = 3
+    notification_templates_refresh_seconds: int = 60  # перезагрузка кастомных шаблонов без Redis
+    notification_templates_custom_override: bool = False  # кастомные шаблоны из БД переопределяют статические при рассылке
+    
     # Email (SMTP)
     smtp_host: str = "smtp.gmail.com"
     smtp_port: int = 587
@@ -95,6 +120,7 @@ class Settings(BaseSettings):
     # Feature flags (новые функции)
     enable_rules_engine: bool = True  # Rules Engine для штрафов/премий
     enable_tasks_v2: bool = True  # Новая система задач (TaskTemplateV2)
+    task_bonuses_lookback_minutes: int = 60  # перекрытие окна бонусов за задачи (выполнение отмечается до коммита)
     enable_incidents: bool = True  # Инциденты (нарушения)
     enable_media_orchestrator: bool = False  # Единый поток медиа (в разработке)
 
@@ -115,6 +141,26 @@ class Settings(BaseSettings):
     s3_bucket: Optional[str] = Field(default=None, env="S3_BUCKET")
     s3_region: str = Field(default="us-east-1", env="S3_REGION")
     
+    # Генерация PDF: пул процессов и кэш готовых документов
+    pdf_render_workers: int = 2  # 0 — рендер в потоке, без пула процессов
+    pdf_render_max_pending: int = 8  # одновременных задач рендера на процесс приложения
+    pdf_render_timeout_seconds: int = 60
+    pdf_render_cache_ttl_seconds: int = 86400
+
+    # Статика веб-приложения: хэшированные копии и предсжатые варианты (apps/web/utils/static_manifest.py)
+    static_build_dir: str = "apps/web/static_build"
+    static_max_age_seconds: int = 31536000  # для хэшированных файлов, отдаются с immutable
+
+    # Выгрузка отчетов (core/export): большие формируются в Celery и скачиваются по ссылке
+    export_inline_max_rows: int = 5000  # начислений в отчете, до которых файл отдается сразу
+    export_storage_dir: str = "storage/exports"  # общий каталог web и celery_worker
+    export_file_ttl_seconds: int = 3600  # как result_expires Celery: статус задачи живет столько же
+
+    # Celery: пул соединений с БД на процесс воркера (см. core/celery/runtime.py)
+    celery_db_pool_size: int = 5
+    celery_db_max_overflow: int = 5
+    celery_db_pool_recycle_seconds: int = 1800
+    
     # API
     api_host: str = "0.0.0.0"
     api_port: int = 8000
@@ -138,6 +184,7 @@ class Settings(BaseSettings):
     # Дефолт false: без явного MAX_FEATURES_ENABLED=true MAX не включается (безопасно для dev/тестов).
     # На проде задавайте в compose: MAX_FEATURES_ENABLED=${MAX_FEATURES_ENABLED:-true}
     max_features_enabled: bool = Field(default=False, env="MAX_FEATURES_ENABLED")
+    max_global_rate_limit: float = Field(default=20.0, env="MAX_GLOBAL_RATE_LIMIT")
 
     # GitHub (для интеграции с Issues API)
     github_token: Optional[str] = os.getenv("GITHUB_TOKEN")
@@ -0,0 +1,85 @@
+"""Обнаружение синхронных запросов к БД в потоке event loop.
+
+Синхронный драйвер (psycopg2, sqlite3) блокирует поток на всё время
+запроса: пока он ждет ответа БД, event loop бота или веб-воркера не
+обслуживает других пользователей. Подписка на `before_cursor_execute`
+всех синхронных Engine ловит такие запросы, если в текущем потоке
+работает event loop. Запросы через asyncpg (включая ORM Query API
+внутри `AsyncSession.run_sync`) идут через async-диалект и не проверяются.
+
+Режимы (settings.db_blocking_guard):
+- off   — проверка выключена (по умолчанию в production);
+- warn  — предупреждение в лог один раз на место вызова (по умолчанию при debug);
+- raise — исключение BlockingDatabaseCallError (тесты).
+"""
+
+import asyncio
+import traceback
+from typing import Optional, Set
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from core.config.settings import settings
+from core.logging.logger import logger
+
+
+GUARD_MODES = ("off", "warn", "raise")
+
+_mode = "off"
+_reported_callers: Set[str] = set()
+
+
+class BlockingDatabaseCallError(RuntimeError):
+    """Синхронный запрос к БД выполнен в потоке работающего event loop."""
+
+
+def _caller_location() -> str:
+    """Ближайший к запросу кадр стека вне SQLAlchemy и этого модуля."""
+    for frame in reversed(traceback.extract_stack()):
+        if frame.filename == __file__ or "/sqlalchemy/" in frame.filename.replace("\\", "/"):
+            continue
+        return f"{frame.filename}:{frame.lineno} in {frame.name}"
+    return "<unknown>"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if _mode == "off" or conn.dialect.is_async:
+        return
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return  # поток без event loop: Celery, скрипты, asyncio.to_thread
+
+    caller = _caller_location()
+    message = f"Blocking database call on the event loop thread at {caller}"
+    if _mode == "raise":
+        raise BlockingDatabaseCallError(message)
+    if caller not in _reported_callers:
+        _reported_callers.add(caller)
+        logger.warning(message, statement=statement[:200])
+
+
+def resolve_guard_mode(mode: Optional[str] = None) -> str:
+    """Режим из аргумента или настроек (пусто — warn при debug, иначе off)."""
+    mode = (mode or settings.db_blocking_guard or ("warn" if settings.debug else "off")).lower()
+    if mode not in GUARD_MODES:
+        raise ValueError(f"Unknown db_blocking_guard mode {mode!r}, expected one of {GUARD_MODES}")
+    return mode
+
+
+def install_blocking_guard(mode: Optional[str] = None) -> str:
+    """Включает проверку для всех синхронных Engine процесса (идемпотентно).
+
+    Returns:
+        Действующий режим
+    """
+    global _mode
+    _mode = resolve_guard_mode(mode)
+    if _mode != "off" and not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    return _mode
+
+
+def current_guard_mode() -> str:
+    return _mode
@@ -10,9 +10,32 @@ from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import NullPool, AsyncAdaptedQueuePool
 from sqlalchemy import create_engine
 from contextlib import contextmanager
+from functools import wraps
 
 from core.config.settings import settings
 from core.logging.logger import logger
+from core.cache.calendar_cache import register_calendar_invalidation
+from core.cache.user_context_cache import register_user_context_invalidation
+from core.cache.rules_cache import register_rules_invalidation
+from core.cache.notification_template_cache import register_notification_template_invalidation
+from core.cache.object_cache import register_object_invalidation
+from core.database.blocking_guard import install_blocking_guard
+from core.monitoring.sql_instrumentation import install_sql_instrumentation
+
+# Инвалидация общего кэша календаря по изменениям TimeSlot/ShiftSchedule/Shift
+register_calendar_invalidation()
+# Инвалидация кэша контекста пользователя по изменениям User/OwnerProfile
+register_user_context_invalidation()
+# Инвалидация скомпилированных правил Rules Engine по изменениям Rule
+register_rules_invalidation()
+# Перезагрузка скомпилированных шаблонов уведомлений по изменениям NotificationTemplate
+register_notification_template_invalidation()
+# Сброс закэшированных списков объектов владельца по изменениям Object
+register_object_invalidation()
+# Проверка синхронных запросов к БД в потоке event loop (settings.db_blocking_guard)
+install_blocking_guard()
+# Метрики и бюджет запросов для всех Engine процесса
+install_sql_instrumentation()
 
 
 class DatabaseManager:
@@ -118,13 +141,43 @@ async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
         await session.close()
 
 
+def run_in_async_session(func):
+    """Выполняет метод с ORM Query API в пуловой async-сессии.
+
+    Метод принимает синхронную `Session` вторым аргументом (после self) и
+    исполняется через `AsyncSession.run_sync`: запросы идут через asyncpg и
+    не блокируют event loop. Обёрнутый метод становится корутиной.
+    Использование:
+        @run_in_async_session
+        def get_item(self, db: Session, item_id: int): ...
+
+        item = await service.get_item(item_id)
+    """
+    @wraps(func)
+    async def wrapper(self, *args, **kwargs):
+        async with get_async_session() as session:
+            return await session.run_sync(
+                lambda sync_session: func(self, sync_session, *args, **kwargs)
+            )
+    return wrapper
+
+
 @asynccontextmanager
 async def get_celery_session() -> AsyncGenerator[AsyncSession, None]:
     """Сессия для Celery-задач.
 
-    Каждый вызов создаёт свежее соединение (NullPool), чтобы избежать
-    конфликта asyncpg с закрытыми event loop'ами при повторных asyncio.run().
+    В воркере задачи выполняются в постоянном event loop процесса
+    (core.celery.runtime), и сессии берутся из общего пула соединений.
+    Вне его (скрипты, тесты, asyncio.run) каждый вызов создаёт свежее
+    соединение (NullPool), не привязанное к чужому event loop.
     """
+    from core.celery.runtime import runtime
+
+    if runtime.in_runtime_loop():
+        async with runtime.session_factory()() as session:
+            yield session
+        return
+
     database_url = settings.database_url.replace('postgresql://', 'postgresql+asyncpg://')
     engine = create_async_engine(database_url, poolclass=NullPool, future=True)
     session_factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
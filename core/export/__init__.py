@@ -0,0 +1,21 @@
+"""Потоковая выгрузка отчетов (XLSX write-only, CSV)."""
+
+from .streaming import (
+    CSV_MEDIA_TYPE,
+    XLSX_MEDIA_TYPE,
+    ColumnWidths,
+    StreamingWorkbook,
+    csv_response,
+    file_response,
+    save_workbook,
+)
+
+__all__ = [
+    'CSV_MEDIA_TYPE',
+    'XLSX_MEDIA_TYPE',
+    'ColumnWidths',
+    'StreamingWorkbook',
+    'csv_response',
+    'file_response',
+    'save_workbook',
+]
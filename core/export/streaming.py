@@ -0,0 +1,261 @@
+"""Потоковая выгрузка отчетов в XLSX и CSV.
+
+Раньше отчеты собирали книгу openpyxl целиком в памяти, затем обходили все
+ячейки каждой колонки для подбора ширины и отдавали один BytesIO. На
+годовых отчетах крупных владельцев это давало всплески памяти воркера.
+
+Здесь книга создается в режиме write-only: строки сразу пишутся во
+временные файлы openpyxl, в памяти остается только окно первых строк
+листа. Ширина колонок считается по этому окну по мере поступления строк
+(write-only лист записывает <cols> до первой строки, поэтому после окна
+ширины зафиксированы). Готовый файл отдается кусками через
+StreamingResponse, временный файл удаляется после отправки.
+
+CSV пишется построчно, без буфера всего отчета.
+"""
+
+import asyncio
+import codecs
+import csv
+import io
+import os
+import tempfile
+from typing import Any, AsyncIterable, Dict, Iterable, Iterator, List, Optional, Sequence, Union
+from urllib.parse import quote
+
+from openpyxl import Workbook
+from openpyxl.cell import Cell, WriteOnlyCell
+from openpyxl.styles import Alignment, Font, PatternFill
+from openpyxl.utils import get_column_letter
+from starlette.responses import StreamingResponse
+
+from core.logging.logger import logger
+
+
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+CSV_MEDIA_TYPE = "text/csv; charset=utf-8"
+
+DEFAULT_MAX_WIDTH = 60
+# Строк листа, по которым подбирается ширина колонок (остальные пишутся сразу)
+WIDTH_SAMPLE_ROWS = 1000
+CHUNK_SIZE = 64 * 1024
+CSV_ROWS_PER_CHUNK = 500
+
+HEADER_FONT = Font(bold=True)
+HEADER_FILL = PatternFill(start_color="E5E5E5", end_color="E5E5E5", fill_type="solid")
+HEADER_ALIGNMENT = Alignment(horizontal="center")
+
+
+class ColumnWidths:
+    """Ширина колонок по длине значений, накопленная по потоку строк."""
+
+    def __init__(self, max_width: int = DEFAULT_MAX_WIDTH, padding: int = 2):
+        self.max_width = max_width
+        self.padding = padding
+        self._lengths: Dict[int, int] = {}
+
+    def observe(self, values: Iterable[Any]) -> None:
+        for index, value in enumerate(values, 1):
+            if value is None:
+                continue
+            if isinstance(value, Cell):
+                value = value.value
+            length = len(str(value))
+            if length > self._lengths.get(index, 0):
+                self._lengths[index] = length
+
+    def widths(self) -> Dict[int, int]:
+        """Ширины по номерам колонок (с 1)."""
+        return {
+            index: min(length + self.padding, self.max_width)
+            for index, length in self._lengths.items()
+        }
+
+
+class StreamingSheet:
+    """Лист write-only книги с подбором ширины колонок по первым строкам."""
+
+    def __init__(self, worksheet: Any, max_width: int, sample_rows: int):
+        self.worksheet = worksheet
+        self.sample_rows = sample_rows
+        self.widths = ColumnWidths(max_width)
+        self._sample: Optional[List[Sequence[Any]]] = []
+        self.rows_written = 0
+
+    def append_header(self, headers: Sequence[str]) -> None:
+        """Строка заголовков (жирный шрифт, серая заливка)."""
+        cells = []
+        for header in headers:
+            cell = WriteOnlyCell(self.worksheet, value=header)
+            cell.font = HEADER_FONT
+            cell.fill = HEADER_FILL
+            cell.alignment = HEADER_ALIGNMENT
+            cells.append(cell)
+        self.append(cells)
+
+    def append(self, values: Sequence[Any]) -> None:
+        values = list(values)
+        self.rows_written += 1
+        if self._sample is None:
+            self.worksheet.append(values)
+            return
+        self.widths.observe(values)
+        self._sample.append(values)
+        if len(self._sample) >= self.sample_rows:
+            self._flush_sample()
+
+    def _flush_sample(self) -> None:
+        if self._sample is None:
+            return
+        for index, width in self.widths.widths().items():
+            self.worksheet.column_dimensions[get_column_letter(index)].width = width
+        for values in self._sample:
+            self.worksheet.append(values)
+        self._sample = None
+
+    def close(self) -> None:
+        self._flush_sample()
+
+
+class StreamingWorkbook:
+    """Write-only книга XLSX: память не растет с числом строк."""
+
+    def __init__(self, max_width: int = DEFAULT_MAX_WIDTH, sample_rows: int = WIDTH_SAMPLE_ROWS):
+        self.workbook = Workbook(write_only=True)
+        self.max_width = max_width
+        self.sample_rows = sample_rows
+        self.sheets: List[StreamingSheet] = []
+
+    def add_sheet(self, title: str, headers: Optional[Sequence[str]] = None) -> StreamingSheet:
+        sheet = StreamingSheet(self.workbook.create_sheet(title=title), self.max_width, self.sample_rows)
+        if headers:
+            sheet.append_header(headers)
+        self.sheets.append(sheet)
+        return sheet
+
+    def save(self, target: Union[str, Any]) -> None:
+        """Сохранить в путь или файловый объект (книга после этого закрыта)."""
+        if not self.sheets:
+            self.add_sheet("Лист1")
+        for sheet in self.sheets:
+            sheet.close()
+        self.workbook.save(target)
+
+    def to_bytes(self) -> bytes:
+        """Для небольших выгрузок, которые дальше нужны целиком (отправка в Telegram)."""
+        output = io.BytesIO()
+        self.save(output)
+        return output.getvalue()
+
+
+def temp_export_path(suffix: str = ".xlsx", directory: Optional[str] = None) -> str:
+    """Путь для временного файла выгрузки."""
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    fd, path = tempfile.mkstemp(prefix="export_", suffix=suffix, dir=directory)
+    os.close(fd)
+    return path
+
+
+async def save_workbook(workbook: StreamingWorkbook, path: Optional[str] = None) -> str:
+    """Сохранить книгу в файл вне event loop (упаковка zip — CPU-bound)."""
+    path = path or temp_export_path()
+    try:
+        await asyncio.to_thread(workbook.save, path)
+    except Exception:
+        _remove_file(path)
+        raise
+    return path
+
+
+def _remove_file(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning(f"Failed to remove export file {path}: {e}")
+
+
+def iter_file(path: str, chunk_size: int = CHUNK_SIZE, delete: bool = True) -> Iterator[bytes]:
+    """Чтение файла кусками; файл удаляется после отправки (или обрыва)."""
+    try:
+        with open(path, "rb") as file:
+            while True:
+                chunk = file.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        if delete:
+            _remove_file(path)
+
+
+def content_disposition(filename: str) -> str:
+    return f'attachment; filename="{quote(filename, safe="")}"'
+
+
+def file_response(path: str, filename: str, media_type: str = XLSX_MEDIA_TYPE, delete: bool = True) -> StreamingResponse:
+    """StreamingResponse из готового файла выгрузки."""
+    headers = {"Content-Disposition": content_disposition(filename)}
+    try:
+        headers["Content-Length"] = str(os.path.getsize(path))
+    except OSError:
+        pass
+    return StreamingResponse(iter_file(path, delete=delete), media_type=media_type, headers=headers)
+
+
+async def iter_csv(
+    rows: Union[Iterable[Sequence[Any]], AsyncIterable[Sequence[Any]]],
+    headers: Optional[Sequence[str]] = None,
+    bom: bool = True,
+    rows_per_chunk: int = CSV_ROWS_PER_CHUNK,
+) -> AsyncIterable[bytes]:
+    """CSV кусками по rows_per_chunk строк (BOM — чтобы Excel открыл UTF-8)."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    pending = 0
+
+    def take() -> bytes:
+        data = buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+        return data
+
+    if bom:
+        buffer.write(codecs.BOM_UTF8.decode("utf-8"))
+    if headers:
+        writer.writerow(headers)
+        pending += 1
+
+    if hasattr(rows, "__aiter__"):
+        async for row in rows:
+            writer.writerow(row)
+            pending += 1
+            if pending >= rows_per_chunk:
+                yield take()
+                pending = 0
+    else:
+        for row in rows:
+            writer.writerow(row)
+            pending += 1
+            if pending >= rows_per_chunk:
+                yield take()
+                pending = 0
+
+    tail = take()
+    if tail:
+        yield tail
+
+
+def csv_response(
+    rows: Union[Iterable[Sequence[Any]], AsyncIterable[Sequence[Any]]],
+    filename: str,
+    headers: Optional[Sequence[str]] = None,
+) -> StreamingResponse:
+    """Потоковая CSV-выгрузка."""
+    return StreamingResponse(
+        iter_csv(rows, headers),
+        media_type=CSV_MEDIA_TYPE,
+        headers={"Content-Disposition": content_disposition(filename)},
+    )
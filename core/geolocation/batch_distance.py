@@ -0,0 +1,114 @@
+"""Пакетный расчет расстояний на NumPy для аудита отметок геолокации.
+
+Точки передаются массивами формы (n, 2) в градусах: [широта, долгота].
+Невалидные координаты представлены NaN и дают NaN в расстояниях, поэтому
+аудит десятков тысяч смен не требует Python-цикла по каждой смене.
+"""
+
+from typing import Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .distance_calculator import DistanceCalculator
+
+# Ограничение размера промежуточной матрицы при поиске ближайших (элементов)
+NEAREST_CHUNK_ELEMENTS = 4_000_000
+
+
+class BatchDistanceCalculator:
+    """Векторизованные расстояния по формуле Гаверсина."""
+
+    EARTH_RADIUS_METERS = DistanceCalculator.EARTH_RADIUS_METERS
+
+    @staticmethod
+    def parse_points(coordinates: Iterable[Optional[str]]) -> np.ndarray:
+        """
+        Массив точек из строк 'lat,lon' (разбор кэшируется).
+
+        Returns:
+            Массив (n, 2); для пустых и невалидных строк — NaN
+        """
+        points = [
+            DistanceCalculator.parse_coordinates(value) if value else None
+            for value in coordinates
+        ]
+        return np.array(
+            [point if point is not None else (np.nan, np.nan) for point in points],
+            dtype=np.float64,
+        ).reshape(-1, 2)
+
+    @staticmethod
+    def pairwise(points_a: np.ndarray, points_b: np.ndarray) -> np.ndarray:
+        """
+        Расстояния между соответствующими точками двух массивов.
+
+        Args:
+            points_a: Массив (n, 2)
+            points_b: Массив (n, 2)
+
+        Returns:
+            Массив (n,) расстояний в метрах
+        """
+        a = np.radians(np.asarray(points_a, dtype=np.float64))
+        b = np.radians(np.asarray(points_b, dtype=np.float64))
+        return BatchDistanceCalculator._haversine(a[:, 0], a[:, 1], b[:, 0], b[:, 1])
+
+    @staticmethod
+    def matrix(points_a: np.ndarray, points_b: np.ndarray) -> np.ndarray:
+        """
+        Матрица расстояний каждая-с-каждой.
+
+        Returns:
+            Массив (n, m) расстояний в метрах
+        """
+        a = np.radians(np.asarray(points_a, dtype=np.float64))
+        b = np.radians(np.asarray(points_b, dtype=np.float64))
+        return BatchDistanceCalculator._haversine(
+            a[:, 0:1], a[:, 1:2], b[None, :, 0], b[None, :, 1]
+        )
+
+    @staticmethod
+    def nearest(points: np.ndarray, targets: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Ближайшая цель для каждой точки.
+
+        Матрица считается блоками, чтобы память не росла как n * m.
+
+        Returns:
+            (индексы ближайших целей, расстояния); для невалидных точек — -1 и NaN
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        targets = np.asarray(targets, dtype=np.float64).reshape(-1, 2)
+        indices = np.full(len(points), -1, dtype=np.int64)
+        distances = np.full(len(points), np.nan)
+        if len(points) == 0 or len(targets) == 0:
+            return indices, distances
+
+        chunk = max(1, NEAREST_CHUNK_ELEMENTS // len(targets))
+        for start in range(0, len(points), chunk):
+            block = BatchDistanceCalculator.matrix(points[start:start + chunk], targets)
+            # NaN (невалидные цели) не должны выигрывать в argmin
+            block = np.where(np.isnan(block), np.inf, block)
+            best = np.argmin(block, axis=1)
+            best_distances = block[np.arange(len(block)), best]
+            found = np.isfinite(best_distances)
+            indices[start:start + chunk] = np.where(found, best, -1)
+            distances[start:start + chunk] = np.where(found, best_distances, np.nan)
+        return indices, distances
+
+    @staticmethod
+    def within(
+        distances: np.ndarray,
+        max_distances: Sequence[float],
+    ) -> np.ndarray:
+        """Маска «в пределах радиуса»; NaN-расстояния считаются нарушением."""
+        distances = np.asarray(distances, dtype=np.float64)
+        return np.nan_to_num(distances, nan=np.inf) <= np.asarray(max_distances, dtype=np.float64)
+
+    @staticmethod
+    def _haversine(lat1, lon1, lat2, lon2) -> np.ndarray:
+        a = (
+            np.sin((lat2 - lat1) / 2) ** 2
+            + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+        )
+        return 2 * BatchDistanceCalculator.EARTH_RADIUS_METERS * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
@@ -1,6 +1,7 @@
 """Сервис для расчета расстояний между географическими координатами."""
 
 import math
+from functools import lru_cache
 from typing import Tuple, Optional
 import logging
 
@@ -67,12 +68,22 @@ class DistanceCalculator:
         """
         Парсит координаты из строки формата 'lat,lon'.
         
+        Результат кэшируется: координаты объектов повторяются в каждой
+        проверке открытия/закрытия смены и в пакетном аудите.
+        
         Args:
             coordinates: Строка с координатами
             
         Returns:
             Кортеж (широта, долгота) или None при ошибке
         """
+        if isinstance(coordinates, str):
+            return _parse_coordinates_cached(coordinates)
+        return DistanceCalculator._parse_coordinates(coordinates)
+    
+    @staticmethod
+    def _parse_coordinates(coordinates: str) -> Optional[Tuple[float, float]]:
+        """Разбор строки координат без кэша."""
         try:
             if not coordinates or ',' not in coordinates:
                 return None
@@ -167,3 +178,8 @@ class DistanceCalculator:
                 f"max allowed: {max_distance_meters}m: {e}"
             )
             return False
+
+
+@lru_cache(maxsize=4096)
+def _parse_coordinates_cached(coordinates: str) -> Optional[Tuple[float, float]]:
+    return DistanceCalculator._parse_coordinates(coordinates)
@@ -0,0 +1,33 @@
+"""Типы и выражения PostGIS geography для координат объектов и смен.
+
+Колонки geography заполняются триггерами БД из строковых координат
+"lat,lon" (миграция 20261016_geography_locations), поэтому приложение
+продолжает писать строки, а пространственные запросы работают по
+GiST-индексам.
+"""
+
+from typing import Tuple
+
+from sqlalchemy import cast, func
+from sqlalchemy.types import UserDefinedType
+
+# WGS 84 — система координат GPS
+SRID = 4326
+
+
+class Geography(UserDefinedType):
+    """Колонка geography(Point, 4326)."""
+
+    cache_ok = True
+
+    def get_col_spec(self, **kw) -> str:
+        return f"geography(Point,{SRID})"
+
+
+def point(lat: float, lon: float):
+    """SQL-выражение точки geography (PostGIS принимает долготу первой)."""
+    return cast(func.ST_SetSRID(func.ST_MakePoint(lon, lat), SRID), Geography())
+
+
+def point_from_tuple(coords: Tuple[float, float]):
+    return point(*coords)
@@ -1,11 +1,15 @@
 """Сервис для валидации геолокации при работе со сменами."""
 
-from typing import Optional, Dict, Any, Tuple
+from typing import Optional, Dict, Any, Iterable, List, Tuple
 import logging
 
+from sqlalchemy import and_, func, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
 logger = logging.getLogger(__name__)
 from core.config.settings import settings
 from .distance_calculator import DistanceCalculator
+from .geography import point
 
 
 class LocationValidator:
@@ -163,6 +167,98 @@ class LocationValidator:
                 'object_coordinates': object_coordinates
             }
     
+    async def find_objects_within_distance(
+        self,
+        session: AsyncSession,
+        coordinates: str,
+        object_ids: Iterable[int],
+    ) -> List[Dict[str, Any]]:
+        """
+        Объекты из списка, в радиусе которых находится точка (запрос к PostGIS).
+        
+        Радиус берется из max_distance_meters объекта. ST_DWithin по
+        geography использует GiST-индекс objects.location.
+        
+        Args:
+            session: Сессия БД
+            coordinates: Координаты пользователя 'lat,lon'
+            object_ids: ID объектов, доступных пользователю
+            
+        Returns:
+            Список {'id', 'name', 'distance_meters', 'max_distance_meters'}
+            по возрастанию расстояния
+        """
+        from domain.entities.object import Object
+        
+        coords = DistanceCalculator.parse_coordinates(coordinates)
+        object_ids = list(object_ids)
+        if coords is None or not object_ids:
+            return []
+        
+        user_point = point(*coords)
+        radius = func.coalesce(Object.max_distance_meters, literal(self.max_distance_meters))
+        distance = func.ST_Distance(Object.location, user_point).label("distance")
+        query = (
+            select(Object.id, Object.name, radius.label("radius"), distance)
+            .where(
+                and_(
+                    Object.id.in_(object_ids),
+                    Object.location.isnot(None),
+                    func.ST_DWithin(Object.location, user_point, radius),
+                )
+            )
+            .order_by(distance)
+        )
+        rows = (await session.execute(query)).all()
+        return [self._object_distance_row(row) for row in rows]
+    
+    async def find_nearest_objects(
+        self,
+        session: AsyncSession,
+        coordinates: str,
+        object_ids: Iterable[int],
+        limit: int = 5,
+    ) -> List[Dict[str, Any]]:
+        """
+        Ближайшие к точке объекты из списка (KNN-поиск по GiST-индексу).
+        
+        Returns:
+            Список {'id', 'name', 'distance_meters', 'max_distance_meters', 'is_within_distance'}
+        """
+        from domain.entities.object import Object
+        
+        coords = DistanceCalculator.parse_coordinates(coordinates)
+        object_ids = list(object_ids)
+        if coords is None or not object_ids:
+            return []
+        
+        user_point = point(*coords)
+        radius = func.coalesce(Object.max_distance_meters, literal(self.max_distance_meters))
+        query = (
+            select(
+                Object.id,
+                Object.name,
+                radius.label("radius"),
+                func.ST_Distance(Object.location, user_point).label("distance"),
+            )
+            .where(and_(Object.id.in_(object_ids), Object.location.isnot(None)))
+            .order_by(Object.location.op("<->")(user_point))
+            .limit(limit)
+        )
+        rows = (await session.execute(query)).all()
+        return [self._object_distance_row(row) for row in rows]
+    
+    @staticmethod
+    def _object_distance_row(row) -> Dict[str, Any]:
+        distance = float(row.distance)
+        return {
+            'id': row.id,
+            'name': row.name,
+            'distance_meters': round(distance, 2),
+            'max_distance_meters': row.radius,
+            'is_within_distance': distance <= row.radius,
+        }
+    
     def _check_coordinate_accuracy(self, lat: float, lon: float) -> bool:
         """
         Проверяет точность координат.
@@ -1,21 +1,54 @@
 """
 Модуль логирования для StaffProBot
 Реализует структурированное JSON логирование
+
+Записи только кладутся в очередь (QueueHandler), форматирование и вывод
+выполняет поток QueueListener — вызывающий код (event loop, цикл задачи
+Celery) не ждет сериализации и записи в stdout.
+
+Переменные окружения:
+- LOG_LEVEL            — уровень (INFO)
+- LOG_FORMAT           — text | json (text); в text поля вызова дописываются key=value
+- LOG_JSON_SERIALIZER  — json | orjson (orjson, если установлен)
+- LOG_QUEUE            — 1 | 0: вывод через очередь (1)
+- LOG_QUEUE_SIZE       — размер очереди; при переполнении записи отбрасываются (10000)
+- LOG_SAMPLING         — 1 | 0: учитывать rate_limit/sample в вызовах (1)
 """
 
+import atexit
 import logging
 import json
+import os
+import queue
+import random
 import sys
-from datetime import datetime
-from typing import Any, Dict, Optional
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson необязателен
+    orjson = None
+
+
+# Атрибуты LogRecord; остальные — дополнительные поля (extra)
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
 
 class JSONFormatter(logging.Formatter):
     """Форматтер для вывода логов в JSON формате"""
-    
+
+    def __init__(self, serializer: Optional[str] = None):
+        super().__init__()
+        serializer = serializer or ("orjson" if orjson is not None else "json")
+        self._use_orjson = serializer == "orjson" and orjson is not None
+
     def format(self, record: logging.LogRecord) -> str:
         """Форматирует запись лога в JSON"""
         log_entry = {
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": datetime.fromtimestamp(record.created, tz=timezone.utc).replace(tzinfo=None).isoformat(),
             "level": record.levelname,
             "logger": record.name,
             "message": record.getMessage(),
@@ -23,97 +56,261 @@ class JSONFormatter(logging.Formatter):
             "function": record.funcName,
             "line": record.lineno
         }
-        
-        # Добавляем дополнительные поля если есть
-        if hasattr(record, 'user_id'):
-            log_entry['user_id'] = record.user_id
-        if hasattr(record, 'request_id'):
-            log_entry['request_id'] = record.request_id
-        if hasattr(record, 'execution_time'):
-            log_entry['execution_time'] = record.execution_time
-        
+
+        # Добавляем дополнительные поля (extra) если есть
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and key not in log_entry:
+                log_entry[key] = value
+
         # Добавляем exception info если есть
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            log_entry['exception'] = record.exc_text
+
+        return self.dumps(log_entry)
+
+    def dumps(self, log_entry: Dict[str, Any]) -> str:
+        if self._use_orjson:
+            return orjson.dumps(log_entry, default=str).decode()
+        return json.dumps(log_entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Текстовый формат; дополнительные поля (extra) дописываются как key=value."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        fields = " ".join(
+            f"{key}={value}" for key, value in record.__dict__.items() if key not in _RECORD_ATTRS
+        )
+        if not fields:
+            return text
+        head, sep, tail = text.partition("\n")
+        return f"{head} | {fields}{sep}{tail}"
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler без форматирования в вызывающем потоке.
+
+    Фиксируются только текст сообщения и traceback (аргументы и исключение
+    могут измениться после возврата из вызова). При переполнении очереди
+    запись отбрасывается, число отброшенных добавляется к следующей записи.
+    """
+
+    def __init__(self, log_queue: "queue.Queue[logging.LogRecord]"):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
         if record.exc_info:
-            log_entry['exception'] = self.formatException(record.exc_info)
-        
-        return json.dumps(log_entry, ensure_ascii=False)
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        if self.dropped:
+            record.dropped_records = self.dropped
+            self.dropped = 0
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _CallSiteSampler:
+    """Ограничение частоты записей по месту вызова (файл:строка)."""
+
+    def __init__(self):
+        # место вызова -> [время последней записи, пропущено с нее]
+        self._sites: Dict[Tuple[str, int], list] = {}
+
+    def allow(self, site: Tuple[str, int], rate_limit: Optional[float], sample: Optional[float]) -> Optional[int]:
+        """None — запись пропускается; иначе число пропущенных с прошлой записи."""
+        state = self._sites.get(site)
+        if state is None:
+            state = self._sites[site] = [float("-inf"), 0]
+        if sample is not None and random.random() >= sample:
+            state[1] += 1
+            return None
+        if rate_limit:
+            now = time.monotonic()
+            if now - state[0] < rate_limit:
+                state[1] += 1
+                return None
+            state[0] = now
+        suppressed, state[1] = state[1], 0
+        return suppressed
+
+
+_sampler = _CallSiteSampler()
+_sampling_enabled = True
+
 
 class StructuredLogger:
-    """Структурированный логгер с дополнительным контекстом"""
+    """Структурированный логгер с дополнительным контекстом
+
+    Дополнительные аргументы вызова:
+    - lazy: функция без аргументов, возвращающая dict полей; вызывается,
+      только если уровень включен (тяжелые debug-данные);
+    - rate_limit: не чаще одной записи в N секунд с этого места вызова;
+    - sample: доля записей (0..1), которые пишутся с этого места вызова.
+    Сообщение тоже может быть функцией без аргументов.
+    Пропущенные записи учитываются полем suppressed следующей записи.
+    """
+
+    _CONTROL_KEYS = ("lazy", "rate_limit", "sample")
 
     def __init__(self, name: str):
         self.logger = logging.getLogger(name)
-    
-    def _log_with_context(self, level: int, message: str, **kwargs: Any) -> None:
+
+    def is_enabled_for(self, level: int) -> bool:
+        return self.logger.isEnabledFor(level)
+
+    def _log_with_context(self, level: int, message: Union[str, Callable[[], str]], **kwargs: Any) -> None:
         """Логирует сообщение с дополнительным контекстом"""
+        if not self.logger.isEnabledFor(level):
+            return
+        lazy = kwargs.pop("lazy", None)
+        rate_limit = kwargs.pop("rate_limit", None)
+        sample = kwargs.pop("sample", None)
+
+        suppressed = 0
+        if _sampling_enabled and (rate_limit is not None or sample is not None):
+            frame = sys._getframe(2)
+            suppressed = _sampler.allow((frame.f_code.co_filename, frame.f_lineno), rate_limit, sample)
+            if suppressed is None:
+                return
+
+        if callable(message):
+            message = message()
+        if lazy is not None:
+            kwargs.update(lazy())
+
         reserved = {"exc_info", "stack_info", "stacklevel", "extra"}
         extra = {}
         for key, value in kwargs.items():
             if key not in reserved and value is not None:
-                extra[key] = value
+                # Имена атрибутов LogRecord (created, module, ...) logging не принимает в extra
+                extra[f"{key}_" if key in _RECORD_ATTRS else key] = value
+        if suppressed:
+            extra["suppressed"] = suppressed
         exc_info = kwargs.get("exc_info")
-        self.logger.log(level, message, extra=extra, exc_info=exc_info)
-    
-    def debug(self, message: str, **kwargs: Any) -> None:
+        # stacklevel=3: module/function/line места вызова, а не этого модуля
+        self.logger.log(level, message, extra=extra, exc_info=exc_info, stacklevel=3)
+
+    def debug(self, message: Union[str, Callable[[], str]], **kwargs: Any) -> None:
         """Логирует debug сообщение"""
         self._log_with_context(logging.DEBUG, message, **kwargs)
-    
-    def info(self, message: str, **kwargs: Any) -> None:
+
+    def info(self, message: Union[str, Callable[[], str]], **kwargs: Any) -> None:
         """Логирует info сообщение"""
         self._log_with_context(logging.INFO, message, **kwargs)
-    
-    def warning(self, message: str, **kwargs: Any) -> None:
+
+    def warning(self, message: Union[str, Callable[[], str]], **kwargs: Any) -> None:
         """Логирует warning сообщение"""
         self._log_with_context(logging.WARNING, message, **kwargs)
-    
-    def error(self, message: str, **kwargs: Any) -> None:
+
+    def error(self, message: Union[str, Callable[[], str]], **kwargs: Any) -> None:
         """Логирует error сообщение"""
         self._log_with_context(logging.ERROR, message, **kwargs)
-    
-    def critical(self, message: str, **kwargs: Any) -> None:
+
+    def critical(self, message: Union[str, Callable[[], str]], **kwargs: Any) -> None:
         """Логирует critical сообщение"""
         self._log_with_context(logging.CRITICAL, message, **kwargs)
-    
+
     def exception(self, message: str, **kwargs: Any) -> None:
         """Логирует exception с traceback"""
         extra = {}
         for key, value in kwargs.items():
-            if value is not None:
-                extra[key] = value
-        
-        self.logger.exception(message, extra=extra)
+            if value is not None and key not in self._CONTROL_KEYS:
+                extra[f"{key}_" if key in _RECORD_ATTRS else key] = value
+
+        self.logger.exception(message, extra=extra, stacklevel=2)
+
+
+_queue_handler: Optional[NonBlockingQueueHandler] = None
+_listener: Optional[QueueListener] = None
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    return os.environ.get(name, "1" if default else "0").strip().lower() in ("1", "true", "yes", "on")
+
+
+def _start_listener(handler: logging.Handler, queue_size: int) -> None:
+    """Новая очередь и поток вывода (при настройке и в дочернем процессе после fork)."""
+    global _listener
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=queue_size)
+    _queue_handler.queue = log_queue
+    _listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
+
+
+def stop_logging() -> None:
+    """Остановить поток вывода, дописав записи из очереди."""
+    global _listener
+    if _listener is not None:
+        listener, _listener = _listener, None
+        try:
+            listener.stop()
+        except Exception:
+            pass
+
 
 def setup_logging() -> None:
     """Настраивает логирование для приложения"""
-    import os
+    global _queue_handler, _sampling_enabled
     log_level_str = os.environ.get("LOG_LEVEL", "INFO").upper()
     log_level = getattr(logging, log_level_str, logging.INFO)
 
     root_logger = logging.getLogger()
     root_logger.setLevel(log_level)
 
+    stop_logging()
     for handler in root_logger.handlers[:]:
         root_logger.removeHandler(handler)
 
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(log_level)
-    
-    # Используем простой формат для MVP
-    console_formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
-    
+
+    if os.environ.get("LOG_FORMAT", "text").lower() == "json":
+        console_formatter = JSONFormatter(os.environ.get("LOG_JSON_SERIALIZER") or None)
+    else:
+        # Используем простой формат для MVP
+        console_formatter = TextFormatter(
+            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+        )
+
     console_handler.setFormatter(console_formatter)
-    root_logger.addHandler(console_handler)
+
+    _sampling_enabled = _env_flag("LOG_SAMPLING", True)
+    if _env_flag("LOG_QUEUE", True):
+        _queue_handler = NonBlockingQueueHandler(queue.Queue())
+        _start_listener(console_handler, int(os.environ.get("LOG_QUEUE_SIZE", "10000")))
+        root_logger.addHandler(_queue_handler)
+    else:
+        _queue_handler = None
+        root_logger.addHandler(console_handler)
 
     # Подавляем DEBUG-шум от сторонних библиотек
     for noisy in ("httpcore", "httpx", "telegram", "urllib3", "asyncio"):
         logging.getLogger(noisy).setLevel(logging.WARNING)
 
+
+def _restart_listener_after_fork() -> None:
+    # Поток вывода не переживает fork (prefork-воркеры Celery): запускаем свой
+    if _queue_handler is not None and _listener is not None:
+        _start_listener(_listener.handlers[0], _queue_handler.queue.maxsize)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_listener_after_fork)
+atexit.register(stop_logging)
+
 # Создаем основной логгер
 logger = StructuredLogger("staffprobot")
 
 # Настраиваем логирование при импорте модуля
 setup_logging()
-
-
@@ -1,8 +1,9 @@
 """Middleware для ограничения частоты запросов."""
 
-from fastapi import Request, HTTPException
+from fastapi import Request
+from fastapi.responses import JSONResponse
 from starlette.middleware.base import BaseHTTPMiddleware
-from core.utils.rate_limiter import RateLimiter
+from core.utils.rate_limiter import RateLimiter, RateLimitResult
 from core.logging.logger import logger
 
 
@@ -45,38 +46,46 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
         # Определяем лимит для пользователя
         max_requests = await self._get_max_requests(request)
         
-        # Проверяем лимит
-        allowed = await RateLimiter.check_rate_limit(
+        # Проверка, списание и остаток квоты — один вызов лимитера
+        result = await RateLimiter.hit(
             key=rate_key,
             max_requests=max_requests,
             window_seconds=self.WINDOW_SECONDS
         )
         
-        if not allowed:
-            # Получаем оставшееся время до сброса
-            remaining = await RateLimiter.get_remaining_requests(rate_key, max_requests)
-            
+        if not result.allowed:
             logger.warning(
                 f"Rate limit exceeded for {rate_key}",
                 path=path,
                 max_requests=max_requests
             )
             
-            raise HTTPException(
+            # HTTPException из BaseHTTPMiddleware не доходит до обработчиков
+            # исключений FastAPI, поэтому ответ 429 формируем сами
+            response = JSONResponse(
                 status_code=429,
-                detail=f"Превышен лимит запросов. Максимум {max_requests} запросов в минуту. Попробуйте через минуту."
+                content={
+                    "detail": f"Превышен лимит запросов. Максимум {max_requests} запросов в минуту. "
+                              f"Попробуйте через {result.retry_seconds} с."
+                }
             )
+            response.headers["Retry-After"] = str(result.retry_seconds)
+            self._set_limit_headers(response, result)
+            return response
         
         # Добавляем заголовки с информацией о лимитах
         response = await call_next(request)
-        
-        remaining = await RateLimiter.get_remaining_requests(rate_key, max_requests)
-        response.headers["X-RateLimit-Limit"] = str(max_requests)
-        response.headers["X-RateLimit-Remaining"] = str(remaining)
-        response.headers["X-RateLimit-Reset"] = str(self.WINDOW_SECONDS)
+        self._set_limit_headers(response, result)
         
         return response
     
+    @staticmethod
+    def _set_limit_headers(response, result: RateLimitResult) -> None:
+        """Заголовки X-RateLimit-* (Reset — секунд до полного восстановления квоты)."""
+        response.headers["X-RateLimit-Limit"] = str(result.limit)
+        response.headers["X-RateLimit-Remaining"] = str(result.remaining)
+        response.headers["X-RateLimit-Reset"] = str(result.reset_seconds)
+    
     async def _get_rate_key(self, request: Request) -> str:
         """Получение ключа для rate limiting."""
         # Пытаемся получить user из состояния (установлен auth middleware)
@@ -34,6 +34,19 @@ db_query_duration_seconds = Histogram(
     ['table', 'operation']
 )
 
+http_request_db_queries = Histogram(
+    'staffprobot_http_request_db_queries',
+    'Database queries per HTTP request',
+    ['endpoint'],
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500)
+)
+
+query_budget_exceeded_total = Counter(
+    'staffprobot_query_budget_exceeded_total',
+    'HTTP requests over the query budget or with repeated queries (N+1)',
+    ['endpoint', 'reason']
+)
+
 db_connections_active = Gauge(
     'staffprobot_db_connections_active',
     'Active database connections'
@@ -46,6 +59,44 @@ cache_operations_total = Counter(
     ['operation', 'result']
 )
 
+cache_tier_operations_total = Counter(
+    'staffprobot_cache_tier_operations_total',
+    'Cache lookups by tier (local LRU / redis)',
+    ['tier', 'result']
+)
+
+cached_function_calls_total = Counter(
+    'staffprobot_cached_function_calls_total',
+    '@cached lookups by key prefix (hit / stale / shared / miss / refresh / bypass)',
+    ['prefix', 'result']
+)
+
+cached_function_hit_ratio = Gauge(
+    'staffprobot_cached_function_hit_ratio',
+    '@cached hit ratio percentage by key prefix',
+    ['prefix']
+)
+
+# Метрики rate limiting
+rate_limit_decisions_total = Counter(
+    'staffprobot_rate_limit_decisions_total',
+    'Rate limiter decisions by backend (redis / local fallback)',
+    ['backend', 'result']
+)
+
+# Метрики генерации PDF
+pdf_render_duration_seconds = Histogram(
+    'staffprobot_pdf_render_duration_seconds',
+    'PDF render duration in the render pool (seconds)',
+    ['kind']
+)
+
+pdf_render_cache_total = Counter(
+    'staffprobot_pdf_render_cache_total',
+    'PDF render cache lookups (hit / miss / shared in-flight render)',
+    ['result']
+)
+
 cache_hit_ratio = Gauge(
     'staffprobot_cache_hit_ratio',
     'Cache hit ratio percentage'
@@ -147,6 +198,16 @@ class MetricsCollector:
             operation=operation
         ).observe(duration)
     
+    @staticmethod
+    def record_request_queries(endpoint: str, count: int):
+        """Записывает число запросов к БД за HTTP запрос."""
+        http_request_db_queries.labels(endpoint=endpoint).observe(count)
+    
+    @staticmethod
+    def record_query_budget_exceeded(endpoint: str, reason: str):
+        """Записывает превышение бюджета запросов (budget) или повторы запроса (repeated)."""
+        query_budget_exceeded_total.labels(endpoint=endpoint, reason=reason).inc()
+    
     @staticmethod
     def update_db_connections(count: int):
         """Обновляет количество активных соединений с БД."""
@@ -160,6 +221,20 @@ class MetricsCollector:
             result=result
         ).inc()
     
+    @staticmethod
+    def record_cache_tier(tier: str, result: str):
+        """Записывает попадание/промах на уровне кэша (local или redis)."""
+        cache_tier_operations_total.labels(
+            tier=tier,
+            result=result
+        ).inc()
+    
+    @staticmethod
+    def record_cached_call(prefix: str, result: str, hit_ratio: float):
+        """Записывает обращение к @cached и текущий hit ratio префикса."""
+        cached_function_calls_total.labels(prefix=prefix, result=result).inc()
+        cached_function_hit_ratio.labels(prefix=prefix).set(hit_ratio)
+    
     @staticmethod
     def update_cache_hit_ratio(ratio: float):
         """Обновляет коэффициент попаданий в кэш."""
@@ -1,10 +1,11 @@
 """Middleware для сбора метрик."""
 
 import time
-from typing import Callable, Any
+from typing import Callable, Any, Dict
 from functools import wraps
 
 from core.monitoring.metrics import metrics_collector
+from core.monitoring.sql_instrumentation import check_query_budget, track_queries
 from core.logging.logger import logger
 
 
@@ -117,5 +118,72 @@ class MonitoringMiddleware:
         return decorator
 
 
+class RequestMetricsMiddleware:
+    """ASGI middleware: длительность HTTP запросов и бюджет запросов к БД.
+
+    Метка endpoint — шаблон маршрута (/owner/objects/{object_id}), а не
+    фактический путь, чтобы число рядов метрик не зависело от id.
+    """
+
+    UNMATCHED = "unmatched"
+
+    def __init__(self, app):
+        self.app = app
+        self._templates: Dict[int, str] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        start_time = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        with track_queries(f"{scope['method']} {scope['path']}") as stats:
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                endpoint = self.route_template(scope)
+                duration = time.perf_counter() - start_time
+                try:
+                    metrics_collector.record_http_request(scope["method"], endpoint, status_code, duration)
+                    metrics_collector.record_request_queries(endpoint, stats.count)
+                    stats.label = f"{scope['method']} {endpoint}"
+                    check_query_budget(stats, endpoint)
+                except Exception as e:
+                    logger.debug(f"Request metrics failed: {e}")
+
+    def route_template(self, scope) -> str:
+        """Шаблон маршрута, выбранного роутером (роутер дописывает endpoint в scope)."""
+        route = scope.get("route")
+        if route is not None and hasattr(route, "path"):
+            return route.path
+
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return self.UNMATCHED
+        template = self._templates.get(id(endpoint))
+        if template is None:
+            template = self._find_template(scope, endpoint)
+            self._templates[id(endpoint)] = template
+        return template
+
+    def _find_template(self, scope, endpoint) -> str:
+        app = scope.get("app")
+        for route in getattr(app, "routes", ()):
+            if getattr(route, "endpoint", None) is endpoint:
+                return route.path
+            if getattr(route, "app", None) is endpoint:
+                # Mount (например, /static): весь подмаршрут одной меткой
+                return f"{route.path}/{{path}}"
+        return self.UNMATCHED
+
+
 # Глобальный экземпляр middleware
 monitoring_middleware = MonitoringMiddleware()
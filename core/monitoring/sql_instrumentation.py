@@ -0,0 +1,232 @@
+"""Автоматическое инструментирование SQL-запросов.
+
+Подписка на `before/after_cursor_execute` всех Engine процесса (включая
+sync_engine у AsyncEngine веб-приложения, бота и воркеров Celery) замеряет
+каждый запрос и пишет метрики db_queries_total/db_query_duration_seconds с
+метками таблицы и операции.
+
+Запросы внутри `track_queries()` (HTTP-запрос, см. RequestMetricsMiddleware)
+дополнительно считаются по «форме» — тексту запроса с параметрами, сведенными
+к `?`. По итогам проверяется бюджет: общее число запросов
+(settings.request_query_budget) и повторы одной формы
+(settings.request_repeated_query_threshold, признак N+1).
+
+Медленные запросы (settings.sql_slow_query_ms) логируются с местом вызова в
+коде приложения.
+"""
+
+import re
+import sys
+import time
+import traceback
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from core.config.settings import settings
+from core.logging.logger import logger
+from core.monitoring.metrics import metrics_collector
+
+
+OPERATIONS = ("select", "insert", "update", "delete")
+
+_PARAM_RE = re.compile(r"\$\d+|%\(\w+\)s|\?")
+_PARAM_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE_RE = re.compile(r"\s+")
+_CTE_BODY_RE = re.compile(r"\)\s*(select|insert|update|delete)\b", re.IGNORECASE)
+_TABLE_RES = {
+    "select": re.compile(r"\bFROM\s+([\w\".]+)", re.IGNORECASE),
+    "insert": re.compile(r"\bINTO\s+([\w\".]+)", re.IGNORECASE),
+    "update": re.compile(r"\bUPDATE\s+([\w\".]+)", re.IGNORECASE),
+    "delete": re.compile(r"\bFROM\s+([\w\".]+)", re.IGNORECASE),
+}
+
+# Разбор текста запроса кэшируется: SQLAlchemy повторяет одни и те же строки
+_MAX_PARSED = 4096
+_parsed: Dict[str, Tuple[str, str, str]] = {}
+
+_START_KEY = "query_start"
+
+
+@dataclass
+class QueryStats:
+    """Запросы к БД в пределах одного HTTP-запроса (или другой единицы работы)."""
+
+    label: str
+    count: int = 0
+    duration: float = 0.0
+    shapes: Counter = field(default_factory=Counter)
+
+    def record(self, shape: str, duration: float) -> None:
+        self.count += 1
+        self.duration += duration
+        self.shapes[shape] += 1
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """Формы запросов, выполненные не меньше threshold раз."""
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= threshold]
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def parse_statement(statement: str) -> Tuple[str, str, str]:
+    """(таблица, операция, форма запроса) для текста SQL."""
+    parsed = _parsed.get(statement)
+    if parsed is not None:
+        return parsed
+
+    shape = _WHITESPACE_RE.sub(" ", _PARAM_LIST_RE.sub("(?...)", _PARAM_RE.sub("?", statement))).strip()
+    head = shape.split(" ", 1)[0].lower()
+    if head == "with":
+        bodies = _CTE_BODY_RE.findall(shape)
+        head = bodies[-1].lower() if bodies else head
+    operation = head if head in OPERATIONS else "other"
+
+    table = "-"
+    if operation != "other":
+        match = _TABLE_RES[operation].search(shape)
+        if match:
+            table = match.group(1).replace('"', "").rsplit(".", 1)[-1]
+
+    if len(_parsed) >= _MAX_PARSED:
+        _parsed.clear()
+    parsed = _parsed[statement] = (table, operation, shape)
+    return parsed
+
+
+def _caller_location() -> str:
+    """Место запроса в коде приложения.
+
+    Внутри AsyncSession запрос выполняется в дочернем greenlet, а код
+    приложения остается в стеке родителя — поэтому смотрим и его.
+    """
+    frames = traceback.extract_stack()
+    greenlet = sys.modules.get("greenlet")
+    if greenlet is not None:
+        parent = greenlet.getcurrent().parent
+        if parent is not None and parent.gr_frame is not None:
+            frames = traceback.extract_stack(parent.gr_frame) + frames
+    for frame in reversed(frames):
+        filename = frame.filename.replace("\\", "/")
+        if (
+            frame.filename == __file__
+            or "/site-packages/" in filename
+            or "/sqlalchemy/" in filename
+            or "/asyncio/" in filename
+            or "/core/database/" in filename
+        ):
+            continue
+        return f"{frame.filename}:{frame.lineno} in {frame.name}"
+    return "<unknown>"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault(_START_KEY, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    starts = conn.info.get(_START_KEY)
+    if not starts:
+        return
+    duration = time.perf_counter() - starts.pop()
+    try:
+        table, operation, shape = parse_statement(statement)
+        metrics_collector.record_db_query(table, operation, duration)
+
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.record(shape, duration)
+
+        slow_ms = settings.sql_slow_query_ms
+        if slow_ms and duration * 1000 >= slow_ms:
+            logger.warning(
+                "Slow SQL query",
+                duration_ms=round(duration * 1000, 1),
+                table=table,
+                operation=operation,
+                caller=_caller_location(),
+                request=stats.label if stats is not None else None,
+                statement=shape[:500]
+            )
+    except Exception as e:  # метрики не должны ломать запрос
+        logger.debug(f"SQL instrumentation failed: {e}")
+
+
+def _handle_error(exception_context) -> None:
+    # after_cursor_execute не вызывается при ошибке запроса
+    conn = exception_context.connection
+    starts = conn.info.get(_START_KEY) if conn is not None else None
+    if starts:
+        starts.pop()
+
+
+def install_sql_instrumentation() -> None:
+    """Подписка на события всех Engine процесса (идемпотентно)."""
+    if event.contains(Engine, "after_cursor_execute", _after_cursor_execute):
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(Engine, "handle_error", _handle_error)
+
+
+@contextmanager
+def track_queries(label: str) -> Iterator[QueryStats]:
+    """Счетчик запросов к БД для кода внутри блока (и порожденных им задач)."""
+    stats = QueryStats(label=label)
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    return _current_stats.get()
+
+
+def check_query_budget(
+    stats: QueryStats,
+    endpoint: str,
+    budget: Optional[int] = None,
+    repeat_threshold: Optional[int] = None
+) -> List[str]:
+    """Проверка бюджета запросов; нарушения логируются и попадают в метрики.
+
+    Returns:
+        Список нарушений: "budget" и/или "repeated"
+    """
+    budget = settings.request_query_budget if budget is None else budget
+    repeat_threshold = settings.request_repeated_query_threshold if repeat_threshold is None else repeat_threshold
+    violations = []
+
+    if budget and stats.count > budget:
+        violations.append("budget")
+        logger.warning(
+            "Request exceeded query budget",
+            request=stats.label,
+            queries=stats.count,
+            budget=budget,
+            db_time_ms=round(stats.duration * 1000, 1)
+        )
+
+    repeated = stats.repeated(repeat_threshold) if repeat_threshold else []
+    if repeated:
+        violations.append("repeated")
+        shape, count = repeated[0]
+        logger.warning(
+            "Repeated SQL query in request (possible N+1)",
+            request=stats.label,
+            repeats=count,
+            shapes=len(repeated),
+            statement=shape[:500]
+        )
+
+    for reason in violations:
+        metrics_collector.record_query_budget_exceeded(endpoint, reason)
+    return violations
@@ -0,0 +1,5 @@
+"""Генерация PDF вне event loop: пул процессов и кэш готовых документов."""
+
+from .render_pool import PdfRenderPool, pdf_render_pool
+
+__all__ = ['PdfRenderPool', 'pdf_render_pool']
@@ -0,0 +1,282 @@
+"""Пул процессов для рендеринга PDF.
+
+Рендер weasyprint/reportlab — CPU-bound и занимает сотни миллисекунд, а
+внутри async-обработчика он останавливает event loop всего воркера uvicorn.
+Задачи рендера отправляются в ограниченный пул процессов (spawn), воркеры
+которого при старте один раз регистрируют шрифты и держат разобранные CSS.
+
+Готовые документы кэшируются в Redis по хэшу содержимого: повторное
+скачивание неизменного договора не запускает рендер. Одинаковые запросы,
+пришедшие одновременно, ждут один рендер.
+"""
+
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+
+from core.cache.redis_cache import cache
+from core.config.settings import settings
+from core.logging.logger import logger
+from core.monitoring.metrics import pdf_render_cache_total, pdf_render_duration_seconds
+
+
+CACHE_PREFIX = "pdf_render"
+# Увеличить при изменении шаблонов/стилей, чтобы не отдавать старые документы
+RENDER_CACHE_VERSION = 1
+
+FONT_PATHS = [
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
+    '/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf',
+    '/System/Library/Fonts/Helvetica.ttc',
+    'C:\\Windows\\Fonts\\arial.ttf',
+]
+
+
+# ----------------------------------------------------------------------
+# Состояние процесса-воркера
+# ----------------------------------------------------------------------
+
+_reportlab_font: Optional[str] = None
+_weasyprint_font_config = None
+_weasyprint_stylesheets: Dict[str, Any] = {}
+
+
+def register_reportlab_fonts() -> str:
+    """Регистрация шрифта с кириллицей для reportlab (один раз на процесс).
+
+    Returns:
+        Имя шрифта для стилей
+    """
+    global _reportlab_font
+    if _reportlab_font is not None:
+        return _reportlab_font
+
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+
+    for font_path in FONT_PATHS:
+        if not os.path.exists(font_path):
+            continue
+        try:
+            pdfmetrics.registerFont(TTFont('DejaVuSans', font_path))
+            pdfmetrics.registerFont(TTFont('DejaVuSans-Bold', font_path))
+            logger.info(f"Registered font from: {font_path}")
+            _reportlab_font = 'DejaVuSans'
+            return _reportlab_font
+        except Exception as e:
+            logger.warning(f"Failed to register font {font_path}: {e}")
+
+    logger.warning("No suitable font found, using default")
+    try:
+        from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+        pdfmetrics.registerFont(UnicodeCIDFont('STSong-Light'))
+        _reportlab_font = 'STSong-Light'
+    except Exception as e:
+        logger.warning(f"Failed to register fallback font: {e}")
+        _reportlab_font = 'Helvetica'
+    return _reportlab_font
+
+
+def _weasyprint_stylesheet(css: str):
+    """Разобранный CSS (кэш процесса) и общая конфигурация шрифтов weasyprint."""
+    global _weasyprint_font_config
+    from weasyprint import CSS
+    from weasyprint.text.fonts import FontConfiguration
+
+    if _weasyprint_font_config is None:
+        _weasyprint_font_config = FontConfiguration()
+    stylesheet = _weasyprint_stylesheets.get(css)
+    if stylesheet is None:
+        stylesheet = CSS(string=css, font_config=_weasyprint_font_config)
+        _weasyprint_stylesheets[css] = stylesheet
+    return stylesheet, _weasyprint_font_config
+
+
+def warm_up_worker(*stylesheets: str) -> None:
+    """Инициализатор воркера: шрифты и CSS готовятся до первой задачи."""
+    register_reportlab_fonts()
+    try:
+        for css in stylesheets:
+            _weasyprint_stylesheet(css)
+    except Exception as e:
+        # weasyprint требует системных библиотек (pango) и есть не везде
+        logger.warning(f"weasyprint warm-up skipped: {e}")
+
+
+def render_html(html: str, css: str = "") -> bytes:
+    """Рендер HTML в PDF через weasyprint (выполняется в воркере)."""
+    import weasyprint
+
+    if not css:
+        return weasyprint.HTML(string=html).write_pdf()
+    stylesheet, font_config = _weasyprint_stylesheet(css)
+    return weasyprint.HTML(string=html).write_pdf(stylesheets=[stylesheet], font_config=font_config)
+
+
+# ----------------------------------------------------------------------
+# Пул
+# ----------------------------------------------------------------------
+
+def content_cache_key(kind: str, *parts: Any) -> str:
+    """Ключ кэша по хэшу содержимого документа.
+
+    Строки и байты хэшируются как есть, остальное — как канонический JSON.
+    """
+    digest = hashlib.sha256(f"{kind}:{RENDER_CACHE_VERSION}".encode())
+    for part in parts:
+        if isinstance(part, bytes):
+            data = part
+        elif isinstance(part, str):
+            data = part.encode()
+        else:
+            data = json.dumps(part, sort_keys=True, ensure_ascii=False, default=str).encode()
+        digest.update(len(data).to_bytes(8, "big"))
+        digest.update(data)
+    return f"{CACHE_PREFIX}:{kind}:{digest.hexdigest()}"
+
+
+class PdfRenderPool:
+    """Асинхронная отправка задач рендера PDF в пул процессов."""
+
+    def __init__(self, warm_stylesheets: tuple = ()):
+        self.warm_stylesheets = tuple(warm_stylesheets)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def add_stylesheet(self, css: str) -> None:
+        """CSS, который воркеры разберут при старте (до первого рендера)."""
+        if css not in self.warm_stylesheets:
+            self.warm_stylesheets += (css,)
+
+    async def render(
+        self,
+        kind: str,
+        func: Callable[..., bytes],
+        *args: Any,
+        cache_key: Optional[str] = None
+    ) -> bytes:
+        """Выполнить рендер в пуле.
+
+        Args:
+            kind: Тип документа (для метрик и логов)
+            func: Функция уровня модуля (должна сериализоваться pickle)
+            args: Аргументы функции — простые данные, не ORM-объекты
+            cache_key: Ключ кэша (см. content_cache_key); None — без кэша
+
+        Returns:
+            Содержимое PDF
+        """
+        if cache_key is None:
+            return await self._submit(kind, func, args)
+
+        cached = await self._get_cached(cache_key)
+        if cached is not None:
+            pdf_render_cache_total.labels(result="hit").inc()
+            return cached
+
+        inflight = self._inflight.get(cache_key)
+        if inflight is not None:
+            pdf_render_cache_total.labels(result="shared").inc()
+            return await asyncio.shield(inflight)
+
+        pdf_render_cache_total.labels(result="miss").inc()
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[cache_key] = future
+        try:
+            pdf_bytes = await self._submit(kind, func, args)
+            future.set_result(pdf_bytes)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Исключение получат ожидающие; без них не логировать «never retrieved»
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(cache_key, None)
+
+        await self._set_cached(cache_key, pdf_bytes)
+        return pdf_bytes
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Остановить воркеры (при завершении приложения)."""
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    async def _submit(self, kind: str, func: Callable[..., bytes], args: tuple) -> bytes:
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        async with self._get_semaphore():
+            executor = self._get_executor()
+            try:
+                pdf_bytes = await asyncio.wait_for(
+                    loop.run_in_executor(executor, func, *args),
+                    timeout=settings.pdf_render_timeout_seconds
+                )
+            except BrokenProcessPool as e:
+                # Воркер упал (например, OOM) — следующий вызов создаст новый пул
+                logger.error(f"PDF render pool broken, restarting: {e}")
+                if executor is not None and executor is self._executor:
+                    self.shutdown(wait=False)
+                raise
+            except asyncio.TimeoutError:
+                logger.error(f"PDF render timed out: kind={kind}")
+                raise
+
+        duration = time.perf_counter() - start
+        pdf_render_duration_seconds.labels(kind=kind).observe(duration)
+        logger.info(f"PDF rendered", kind=kind, size=len(pdf_bytes), duration=round(duration, 3))
+        return pdf_bytes
+
+    def _get_executor(self) -> Optional[ProcessPoolExecutor]:
+        """Пул процессов; None — рендер в потоке (pdf_render_workers = 0)."""
+        if settings.pdf_render_workers <= 0:
+            return None
+        if self._executor is None:
+            # spawn: форк процесса с event loop и открытыми соединениями небезопасен
+            self._executor = ProcessPoolExecutor(
+                max_workers=settings.pdf_render_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=warm_up_worker,
+                initargs=self.warm_stylesheets
+            )
+        return self._executor
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """Ограничение очереди рендера (семафор привязан к текущему event loop)."""
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(max(1, settings.pdf_render_max_pending))
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    @staticmethod
+    async def _get_cached(cache_key: str) -> Optional[bytes]:
+        if not cache.is_connected:
+            return None
+        return await cache.get(cache_key, serialize="pickle", local=False)
+
+    @staticmethod
+    async def _set_cached(cache_key: str, pdf_bytes: bytes) -> None:
+        if not cache.is_connected:
+            return
+        await cache.set(
+            cache_key,
+            pdf_bytes,
+            ttl=settings.pdf_render_cache_ttl_seconds,
+            serialize="pickle",
+            local=False
+        )
+
+
+pdf_render_pool = PdfRenderPool()
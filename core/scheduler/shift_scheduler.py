@@ -375,11 +375,6 @@ class ShiftScheduler:
                         error=str(notification_error),
                     )
                 
-                # Инвалидация кэша календаря
-                from core.cache.redis_cache import cache
-                await cache.clear_pattern("calendar_shifts:*")
-                await cache.clear_pattern("api_response:*")  # API responses
-                
                 return True
                 
         except Exception as e:
@@ -1,122 +1,295 @@
-"""Rate Limiter для защиты API от злоупотреблений."""
+"""Rate Limiter для защиты API от злоупотреблений.
+
+Лимит считается алгоритмом GCRA (generic cell rate algorithm): для ключа
+хранится одно число — теоретическое время прибытия следующего запроса (TAT).
+Это скользящее окно без «ступенек» на границе минут: max_requests запросов
+можно сделать пачкой, дальше квота восстанавливается равномерно.
+
+Проверка, списание и расчет остатка выполняются одним Lua-скриптом на
+стороне Redis — один round trip на запрос, ключ всегда записывается вместе
+с TTL. Если Redis недоступен, лимит считается тем же алгоритмом в памяти
+процесса (лимит на воркер), а не отключается.
+"""
+
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
 
-from typing import Optional
 from core.cache.redis_cache import cache
 from core.logging.logger import logger
+from core.monitoring.metrics import rate_limit_decisions_total
+
+
+KEY_PREFIX = "rate_limit:"
+
+# Пауза перед повторной попыткой подключения к Redis после ошибки,
+# чтобы при падении Redis не ждать таймаут подключения в каждом запросе
+REDIS_RETRY_SECONDS = 5.0
+
+# Максимум ключей локального лимитера
+LOCAL_MAX_KEYS = 10000
+
+# KEYS[1] — ключ лимита; ARGV: лимит, окно (мс), стоимость запроса (0 — только остаток).
+# Возвращает {allowed, remaining, reset_after_ms, retry_after_ms}.
+GCRA_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local interval = period / limit
+
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + tonumber(t[2]) / 1000
+
+local tat = tonumber(redis.call('GET', KEYS[1])) or now
+if tat < now then
+    tat = now
+end
+
+local new_tat = tat + cost * interval
+local allow_at = new_tat - period
+local allowed = 0
+local retry_after = 0
+
+if now >= allow_at then
+    allowed = 1
+    tat = new_tat
+    if cost > 0 then
+        redis.call('SET', KEYS[1], string.format('%.3f', new_tat), 'PX', math.ceil(new_tat - now))
+    end
+else
+    retry_after = allow_at - now
+end
+
+local remaining = math.floor((now + period - tat) / interval + 1e-9)
+if remaining < 0 then
+    remaining = 0
+end
+return {allowed, remaining, math.ceil(tat - now), math.ceil(retry_after)}
+"""
+
+
+@dataclass(frozen=True)
+class RateLimitResult:
+    """Результат проверки лимита."""
+
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_after: float  # секунд до полного восстановления квоты
+    retry_after: float  # секунд до следующего разрешенного запроса (0 если разрешен)
+
+    @property
+    def reset_seconds(self) -> int:
+        return math.ceil(self.reset_after)
+
+    @property
+    def retry_seconds(self) -> int:
+        return max(1, math.ceil(self.retry_after)) if not self.allowed else 0
+
+
+def gcra(
+    tat: Optional[float],
+    now: float,
+    limit: int,
+    period: float,
+    cost: int = 1
+) -> Tuple[RateLimitResult, float]:
+    """Шаг GCRA (та же логика, что в Lua-скрипте).
+
+    Returns:
+        (результат, новое значение TAT)
+    """
+    interval = period / limit
+    tat = max(tat if tat is not None else now, now)
+    new_tat = tat + cost * interval
+    allow_at = new_tat - period
+
+    if now >= allow_at:
+        allowed, retry_after, tat = True, 0.0, new_tat
+    else:
+        allowed, retry_after = False, allow_at - now
+
+    remaining = max(0, math.floor((now + period - tat) / interval + 1e-9))
+    return RateLimitResult(allowed, limit, remaining, tat - now, retry_after), tat
+
+
+class LocalRateLimiter:
+    """Лимитер в памяти процесса на случай недоступности Redis."""
+
+    def __init__(self, max_keys: int = LOCAL_MAX_KEYS):
+        self.max_keys = max_keys
+        self._tats: "OrderedDict[str, float]" = OrderedDict()
+
+    def hit(self, key: str, max_requests: int, window_seconds: float, cost: int = 1) -> RateLimitResult:
+        now = time.monotonic()
+        result, tat = gcra(self._tats.get(key), now, max_requests, window_seconds, cost)
+        if cost > 0 and result.allowed:
+            self._tats[key] = tat
+            self._tats.move_to_end(key)
+            self._evict(now)
+        return result
+
+    def reset(self, key: str) -> bool:
+        return self._tats.pop(key, None) is not None
+
+    def _evict(self, now: float) -> None:
+        if len(self._tats) <= self.max_keys:
+            return
+        # Сначала ключи с полностью восстановленной квотой, затем самые старые
+        for key in [key for key, tat in self._tats.items() if tat <= now]:
+            del self._tats[key]
+        while len(self._tats) > self.max_keys:
+            self._tats.popitem(last=False)
 
 
 class RateLimiter:
     """Утилита для ограничения частоты запросов через Redis."""
-    
-    @staticmethod
+
+    _local = LocalRateLimiter()
+    _gcra_script = None
+    _redis_retry_at = 0.0
+
+    @classmethod
+    async def hit(
+        cls,
+        key: str,
+        max_requests: int,
+        window_seconds: float,
+        cost: int = 1
+    ) -> RateLimitResult:
+        """Учесть запрос и получить решение вместе с остатком квоты.
+
+        Args:
+            key: Уникальный ключ для отслеживания (например, IP адрес или user_id)
+            max_requests: Максимальное количество запросов за окно
+            window_seconds: Временное окно в секундах
+            cost: Стоимость запроса (0 — только узнать остаток)
+        """
+        redis_client = await cls._get_redis()
+        if redis_client is not None:
+            try:
+                script = cls._script(redis_client)
+                allowed, remaining, reset_ms, retry_ms = await script(
+                    keys=[f"{KEY_PREFIX}{key}"],
+                    args=[max_requests, int(window_seconds * 1000), cost]
+                )
+                result = RateLimitResult(
+                    allowed=bool(allowed),
+                    limit=max_requests,
+                    remaining=int(remaining),
+                    reset_after=int(reset_ms) / 1000,
+                    retry_after=int(retry_ms) / 1000
+                )
+                cls._record(result, "redis", key, cost)
+                return result
+            except Exception as e:
+                logger.error(f"Rate limit check failed, using local limiter: {e}")
+                cls._redis_retry_at = time.monotonic() + REDIS_RETRY_SECONDS
+
+        result = cls._local.hit(key, max_requests, window_seconds, cost)
+        cls._record(result, "local", key, cost)
+        return result
+
+    @classmethod
     async def check_rate_limit(
-        key: str, 
-        max_requests: int, 
+        cls,
+        key: str,
+        max_requests: int,
         window_seconds: int
     ) -> bool:
         """Проверка лимита запросов.
-        
+
         Args:
             key: Уникальный ключ для отслеживания (например, IP адрес или user_id)
             max_requests: Максимальное количество запросов
             window_seconds: Временное окно в секундах
-            
+
         Returns:
             True если лимит не превышен, False если превышен
         """
-        try:
-            # Подключаемся к Redis если не подключен
-            if not cache.is_connected:
-                await cache.connect()
-            
-            # Формируем ключ для rate limiting
-            rate_key = f"rate_limit:{key}"
-            
-            # Инкрементируем счетчик
-            current = await cache.redis.incr(rate_key)
-            
-            # Если это первый запрос, устанавливаем TTL
-            if current == 1:
-                await cache.redis.expire(rate_key, window_seconds)
-            
-            # Проверяем лимит
-            if current > max_requests:
-                logger.warning(
-                    f"Rate limit exceeded",
-                    key=key,
-                    current=current,
-                    max_requests=max_requests,
-                    window_seconds=window_seconds
-                )
-                return False
-            
-            logger.debug(
-                f"Rate limit check passed",
-                key=key,
-                current=current,
-                max_requests=max_requests
-            )
-            return True
-            
-        except Exception as e:
-            # При ошибке Redis пропускаем запрос (graceful degradation)
-            logger.error(f"Rate limit check failed: {e}")
-            return True
-    
-    @staticmethod
+        result = await cls.hit(key, max_requests, window_seconds)
+        return result.allowed
+
+    @classmethod
     async def get_remaining_requests(
+        cls,
         key: str,
-        max_requests: int
+        max_requests: int,
+        window_seconds: int = 60
     ) -> int:
-        """Получение количества оставшихся запросов.
-        
+        """Получение количества оставшихся запросов (без списания).
+
         Args:
             key: Уникальный ключ для отслеживания
             max_requests: Максимальное количество запросов
-            
+            window_seconds: Временное окно в секундах
+
         Returns:
             Количество оставшихся запросов
         """
-        try:
-            if not cache.is_connected:
-                await cache.connect()
-            
-            rate_key = f"rate_limit:{key}"
-            current = await cache.redis.get(rate_key)
-            
-            if current is None:
-                return max_requests
-            
-            current_count = int(current)
-            remaining = max_requests - current_count
-            
-            return max(0, remaining)
-            
-        except Exception as e:
-            logger.error(f"Failed to get remaining requests: {e}")
-            return max_requests
-    
-    @staticmethod
-    async def reset_limit(key: str) -> bool:
+        result = await cls.hit(key, max_requests, window_seconds, cost=0)
+        return result.remaining
+
+    @classmethod
+    async def reset_limit(cls, key: str) -> bool:
         """Сброс лимита для ключа.
-        
+
         Args:
             key: Уникальный ключ для сброса
-            
+
         Returns:
             True если успешно сброшен
         """
+        local_reset = cls._local.reset(key)
+        redis_client = await cls._get_redis()
+        if redis_client is None:
+            return local_reset
+
         try:
-            if not cache.is_connected:
-                await cache.connect()
-            
-            rate_key = f"rate_limit:{key}"
-            result = await cache.redis.delete(rate_key)
-            
+            result = await redis_client.delete(f"{KEY_PREFIX}{key}")
             logger.info(f"Rate limit reset for key {key}")
-            return bool(result)
-            
+            return bool(result) or local_reset
         except Exception as e:
             logger.error(f"Failed to reset rate limit: {e}")
-            return False
+            return local_reset
+
+    @classmethod
+    async def _get_redis(cls):
+        """Клиент Redis или None, если Redis недоступен."""
+        if time.monotonic() < cls._redis_retry_at:
+            return None
+        if cache.is_connected:
+            return cache.redis
+        try:
+            await cache.connect()
+            return cache.redis
+        except Exception:
+            cls._redis_retry_at = time.monotonic() + REDIS_RETRY_SECONDS
+            return None
 
+    @classmethod
+    def _script(cls, redis_client):
+        """Lua-скрипт, привязанный к клиенту (EVALSHA с автозагрузкой)."""
+        script = cls._gcra_script
+        if script is None or script.registered_client is not redis_client:
+            script = cls._gcra_script = redis_client.register_script(GCRA_SCRIPT)
+        return script
+
+    @staticmethod
+    def _record(result: RateLimitResult, backend: str, key: str, cost: int) -> None:
+        if cost == 0:
+            return
+        rate_limit_decisions_total.labels(
+            backend=backend,
+            result="allowed" if result.allowed else "limited"
+        ).inc()
+        if not result.allowed:
+            logger.warning(
+                "Rate limit exceeded",
+                key=key,
+                backend=backend,
+                max_requests=result.limit,
+                retry_after=result.retry_after
+            )
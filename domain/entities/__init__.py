@@ -7,7 +7,7 @@ from .base import Base
 from .user import User
 from .payment_system import PaymentSystem
 from .payment_schedule import PaymentSchedule
-from .org_structure import OrgStructureUnit
+from .org_structure import OrgStructureUnit, OrgStructureClosure, OrgUnitEffectiveSettings
 from .payroll_entry import PayrollEntry
 from .payroll_adjustment import PayrollAdjustment
 from .employee_payment import EmployeePayment
@@ -69,6 +69,8 @@ __all__ = [
     "PaymentSystem",
     "PaymentSchedule",
     "OrgStructureUnit",
+    "OrgStructureClosure",
+    "OrgUnitEffectiveSettings",
     "PayrollEntry",
     "PayrollAdjustment",
     "EmployeePayment",
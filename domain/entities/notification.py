@@ -87,6 +87,7 @@ class NotificationStatus(enum.Enum):
     """Статус уведомления."""
     PENDING = "pending"           # Ожидает отправки
     SCHEDULED = "scheduled"       # Запланировано
+    SENDING = "sending"           # Взято в отправку (диспетчер)
     SENT = "sent"                 # Отправлено
     DELIVERED = "delivered"       # Доставлено
     FAILED = "failed"             # Не удалось отправить
@@ -143,6 +144,7 @@ class Notification(Base):
     scheduled_at = Column(DateTime(timezone=True), nullable=True, index=True)  # Время планируемой отправки
     sent_at = Column(DateTime(timezone=True), nullable=True)                   # Время фактической отправки
     read_at = Column(DateTime(timezone=True), nullable=True)                   # Время прочтения
+    claimed_at = Column(DateTime(timezone=True), nullable=True)                # Время захвата диспетчером (sending)
     
     # Метаданные
     error_message = Column(Text, nullable=True)      # Сообщение об ошибке (если failed)
@@ -4,8 +4,9 @@ from sqlalchemy import Column, Integer, String, Boolean, DateTime, Time, Numeric
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.sql import func
 from .base import Base
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 from typing import Optional
+from core.geolocation.geography import Geography
 
 
 
@@ -20,6 +21,8 @@ class Object(Base):
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     address = Column(Text, nullable=True)
     coordinates = Column(String(100), nullable=False)  # "lat,lon" формат для MVP
+    # Точка PostGIS, заполняется триггером БД из coordinates (только для чтения)
+    location = deferred(Column(Geography(), nullable=True))
     opening_time = Column(Time, nullable=False)
     closing_time = Column(Time, nullable=False)
     hourly_rate = Column(Numeric(10, 2), nullable=False)
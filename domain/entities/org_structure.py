@@ -198,3 +198,57 @@ class OrgStructureUnit(Base):
             'inherited_from': None
         }
 
+
+
+class OrgStructureClosure(Base):
+    """
+    Замыкание иерархии подразделений: пара (предок, потомок) на каждую связь любой глубины.
+
+    Включает строку самого подразделения (depth=0). Поддерживается
+    OrgStructureService при создании, перемещении и удалении подразделений.
+    """
+
+    __tablename__ = "org_structure_closure"
+
+    ancestor_id = Column(Integer, ForeignKey("org_structure_units.id", ondelete="CASCADE"), primary_key=True)
+    descendant_id = Column(Integer, ForeignKey("org_structure_units.id", ondelete="CASCADE"), primary_key=True, index=True)
+    depth = Column(Integer, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<OrgStructureClosure(ancestor_id={self.ancestor_id}, descendant_id={self.descendant_id}, depth={self.depth})>"
+
+
+class OrgUnitEffectiveSettings(Base):
+    """
+    Эффективные (унаследованные) настройки подразделения.
+
+    Проекция результата get_inherited_* по всей цепочке родителей: чтение
+    настроек подразделения — один запрос по первичному ключу. Пересчитывается
+    для всего дерева владельца при любом изменении подразделений.
+    """
+
+    __tablename__ = "org_unit_effective_settings"
+
+    unit_id = Column(Integer, ForeignKey("org_structure_units.id", ondelete="CASCADE"), primary_key=True)
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+
+    payment_system_id = Column(Integer, ForeignKey("payment_systems.id", ondelete="SET NULL"), nullable=True)
+    payment_schedule_id = Column(Integer, ForeignKey("payment_schedules.id", ondelete="SET NULL"), nullable=True)
+    organization_profile_id = Column(Integer, ForeignKey("organization_profiles.id", ondelete="SET NULL"), nullable=True)
+
+    # Подразделение-источник настроек (NULL — настройки нигде не заданы)
+    late_threshold_minutes = Column(Integer, nullable=True)
+    late_penalty_per_minute = Column(Numeric(10, 2), nullable=True)
+    late_source_unit_id = Column(Integer, nullable=True)
+    late_source_name = Column(String(255), nullable=True)
+
+    cancellation_short_notice_hours = Column(Integer, nullable=True)
+    cancellation_short_notice_fine = Column(Numeric(10, 2), nullable=True)
+    cancellation_invalid_reason_fine = Column(Numeric(10, 2), nullable=True)
+    cancellation_source_unit_id = Column(Integer, nullable=True)
+    cancellation_source_name = Column(String(255), nullable=True)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self) -> str:
+        return f"<OrgUnitEffectiveSettings(unit_id={self.unit_id}, owner_id={self.owner_id})>"
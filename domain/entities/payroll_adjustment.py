@@ -1,6 +1,6 @@
 """Модель корректировки начислений."""
 
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Numeric, Text
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Numeric, Text, Index, text
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -61,6 +61,14 @@ class PayrollAdjustment(Base):
     creator = relationship("User", foreign_keys=[created_by])
     updater = relationship("User", foreign_keys=[updated_by])
     
+    __table_args__ = (
+        # Одна корректировка на задачу: бонусы вставляются ON CONFLICT DO NOTHING
+        Index(
+            'uq_payroll_adjustments_task_entry_v2', task_entry_v2_id,
+            unique=True, postgresql_where=text('task_entry_v2_id IS NOT NULL')
+        ),
+    )
+    
     def __repr__(self) -> str:
         return f"<PayrollAdjustment(id={self.id}, type='{self.adjustment_type}', amount={self.amount}, employee_id={self.employee_id})>"
     
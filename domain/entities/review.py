@@ -4,7 +4,7 @@
 Включает модели для отзывов, медиа-файлов, обжалований, рейтингов и правил системы.
 """
 
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, Numeric, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, Numeric, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -135,6 +135,19 @@ class Rating(Base):
     total_reviews = Column(Integer, default=0, nullable=False)
     last_updated = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
     
+    # Агрегаты учитываемых отзывов (обновляются RatingService при смене статуса)
+    rating_sum = Column(Numeric(12, 1), default=0, server_default="0", nullable=False)
+    stars_1 = Column(Integer, default=0, server_default="0", nullable=False)
+    stars_2 = Column(Integer, default=0, server_default="0", nullable=False)
+    stars_3 = Column(Integer, default=0, server_default="0", nullable=False)
+    stars_4 = Column(Integer, default=0, server_default="0", nullable=False)
+    stars_5 = Column(Integer, default=0, server_default="0", nullable=False)
+    
+    __table_args__ = (
+        UniqueConstraint('target_type', 'target_id', name='uq_ratings_target'),
+        Index('ix_ratings_top', 'target_type', average_rating.desc(), total_reviews.desc()),
+    )
+    
     def __repr__(self) -> str:
         return f"<Rating(id={self.id}, target_type='{self.target_type}', target_id={self.target_id}, average_rating={self.average_rating}, total_reviews={self.total_reviews})>"
     
@@ -142,6 +155,11 @@ class Rating(Base):
     def rating_stars(self) -> float:
         """Рейтинг в звездах (округленный до 0.5)."""
         return round(self.average_rating * 2) / 2
+    
+    @property
+    def rating_distribution(self) -> dict:
+        """Распределение учитываемых отзывов по звездам."""
+        return {str(stars): getattr(self, f"stars_{stars}") or 0 for stars in range(1, 6)}
 
 
 class SystemRule(Base):
@@ -2,8 +2,9 @@
 
 from sqlalchemy import Column, Integer, String, Boolean, DateTime, Numeric, ForeignKey, Text
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 from .base import Base
+from core.geolocation.geography import Geography
 from typing import Optional
 from datetime import datetime
 
@@ -29,6 +30,9 @@ class Shift(Base):
     
     start_coordinates = Column(String(100), nullable=True)  # "lat,lon" формат для MVP
     end_coordinates = Column(String(100), nullable=True)  # "lat,lon" формат для MVP
+    # Точки PostGIS, заполняются триггером БД из *_coordinates (только для чтения)
+    start_location = deferred(Column(Geography(), nullable=True))
+    end_location = deferred(Column(Geography(), nullable=True))
     total_hours = Column(Numeric(5, 2), nullable=True)
     hourly_rate = Column(Numeric(10, 2), nullable=True)
     total_payment = Column(Numeric(10, 2), nullable=True)
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from sqlalchemy import Column, Integer, DateTime, ForeignKey, Boolean, Text, JSON
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Boolean, Text, JSON, Index, text
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 
@@ -37,4 +37,16 @@ class TaskEntryV2(Base):
     shift_schedule = relationship("ShiftSchedule", foreign_keys=[shift_schedule_id])
     employee = relationship("User", foreign_keys=[employee_id])
 
-
+    __table_args__ = (
+        # Одна задача плана на запланированную смену (до открытия) и на открытую смену;
+        # назначение вставляет строки ON CONFLICT DO NOTHING (core/celery/tasks/task_assignment.py)
+        Index(
+            'uq_task_entries_v2_plan_schedule', plan_id, shift_schedule_id,
+            unique=True, postgresql_where=text('shift_id IS NULL')
+        ),
+        Index(
+            'uq_task_entries_v2_plan_shift', plan_id, shift_id,
+            unique=True, postgresql_where=text('shift_id IS NOT NULL')
+        ),
+        Index('ix_task_entries_v2_completed_at', completed_at, postgresql_where=text('is_completed')),
+    )
@@ -0,0 +1,120 @@
+"""PostGIS geography columns for object and shift coordinates
+
+Revision ID: 20261016_geography_locations
+Revises: 20260325_owner_profile_theme
+Create Date: 2026-10-16
+
+Строковые координаты "lat,lon" остаются источником записи: колонки
+geography заполняются триггерами BEFORE INSERT/UPDATE, существующие
+строки заполняются при миграции. Невалидные строки дают NULL.
+"""
+
+from alembic import op
+
+
+revision = "20261016_geography_locations"
+down_revision = "20260325_owner_profile_theme"
+branch_labels = None
+depends_on = None
+
+
+PARSE_POINT_FUNCTION = """
+CREATE OR REPLACE FUNCTION staffprobot_parse_point(coords text)
+RETURNS geography
+LANGUAGE plpgsql IMMUTABLE AS $$
+DECLARE
+    parts text[];
+    lat double precision;
+    lon double precision;
+BEGIN
+    IF coords IS NULL THEN
+        RETURN NULL;
+    END IF;
+    parts := string_to_array(replace(coords, ' ', ''), ',');
+    IF array_length(parts, 1) <> 2 THEN
+        RETURN NULL;
+    END IF;
+    lat := parts[1]::double precision;
+    lon := parts[2]::double precision;
+    IF lat NOT BETWEEN -90 AND 90 OR lon NOT BETWEEN -180 AND 180 THEN
+        RETURN NULL;
+    END IF;
+    RETURN ST_SetSRID(ST_MakePoint(lon, lat), 4326)::geography;
+EXCEPTION WHEN others THEN
+    RETURN NULL;
+END
+$$;
+"""
+
+OBJECTS_TRIGGER = """
+CREATE OR REPLACE FUNCTION objects_sync_location() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.location := staffprobot_parse_point(NEW.coordinates);
+    RETURN NEW;
+END
+$$;
+
+DROP TRIGGER IF EXISTS trg_objects_sync_location ON objects;
+CREATE TRIGGER trg_objects_sync_location
+    BEFORE INSERT OR UPDATE OF coordinates ON objects
+    FOR EACH ROW EXECUTE FUNCTION objects_sync_location();
+"""
+
+SHIFTS_TRIGGER = """
+CREATE OR REPLACE FUNCTION shifts_sync_location() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.start_location := staffprobot_parse_point(NEW.start_coordinates);
+    NEW.end_location := staffprobot_parse_point(NEW.end_coordinates);
+    RETURN NEW;
+END
+$$;
+
+DROP TRIGGER IF EXISTS trg_shifts_sync_location ON shifts;
+CREATE TRIGGER trg_shifts_sync_location
+    BEFORE INSERT OR UPDATE OF start_coordinates, end_coordinates ON shifts
+    FOR EACH ROW EXECUTE FUNCTION shifts_sync_location();
+"""
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS postgis;")
+    op.execute(PARSE_POINT_FUNCTION)
+
+    op.execute("ALTER TABLE objects ADD COLUMN IF NOT EXISTS location geography(Point,4326)")
+    op.execute("ALTER TABLE shifts ADD COLUMN IF NOT EXISTS start_location geography(Point,4326)")
+    op.execute("ALTER TABLE shifts ADD COLUMN IF NOT EXISTS end_location geography(Point,4326)")
+
+    # Заполнение до создания индексов и триггеров: один проход по таблицам
+    op.execute("UPDATE objects SET location = staffprobot_parse_point(coordinates)")
+    op.execute(
+        "UPDATE shifts SET "
+        "start_location = staffprobot_parse_point(start_coordinates), "
+        "end_location = staffprobot_parse_point(end_coordinates) "
+        "WHERE start_coordinates IS NOT NULL OR end_coordinates IS NOT NULL"
+    )
+
+    op.execute(OBJECTS_TRIGGER)
+    op.execute(SHIFTS_TRIGGER)
+
+    op.execute("CREATE INDEX IF NOT EXISTS ix_objects_location ON objects USING gist (location)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_shifts_start_location ON shifts USING gist (start_location)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_shifts_end_location ON shifts USING gist (end_location)")
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS trg_shifts_sync_location ON shifts")
+    op.execute("DROP TRIGGER IF EXISTS trg_objects_sync_location ON objects")
+    op.execute("DROP FUNCTION IF EXISTS shifts_sync_location()")
+    op.execute("DROP FUNCTION IF EXISTS objects_sync_location()")
+
+    op.execute("DROP INDEX IF EXISTS ix_shifts_end_location")
+    op.execute("DROP INDEX IF EXISTS ix_shifts_start_location")
+    op.execute("DROP INDEX IF EXISTS ix_objects_location")
+
+    op.execute("ALTER TABLE shifts DROP COLUMN IF EXISTS end_location")
+    op.execute("ALTER TABLE shifts DROP COLUMN IF EXISTS start_location")
+    op.execute("ALTER TABLE objects DROP COLUMN IF EXISTS location")
+
+    op.execute("DROP FUNCTION IF EXISTS staffprobot_parse_point(text)")
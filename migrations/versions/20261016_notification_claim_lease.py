@@ -0,0 +1,28 @@
+"""Notification claim lease
+
+Revision ID: 20261016_notification_claim_lease
+Revises: 20261016_rating_aggregates
+Create Date: 2026-10-16
+
+Диспетчер уведомлений помечает взятую пачку sending и записывает время
+захвата в claimed_at. Строки, оставшиеся в sending дольше
+settings.notification_claim_lease_seconds (воркер упал или не записал
+итоги), забираются повторно.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261016_notification_claim_lease"
+down_revision = "20261016_rating_aggregates"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('notifications', sa.Column('claimed_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('notifications', 'claimed_at')
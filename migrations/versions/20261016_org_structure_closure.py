@@ -0,0 +1,130 @@
+"""Org structure closure table and effective settings projection
+
+Revision ID: 20261016_org_structure_closure
+Revises: 20261016_geography_locations
+Create Date: 2026-10-16
+
+org_structure_closure — все пары предок/потомок иерархии подразделений,
+org_unit_effective_settings — настройки подразделений с учетом наследования.
+Обе таблицы заполняются при миграции рекурсивными запросами, дальше их
+пересчитывает OrgStructureService при изменении дерева.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261016_org_structure_closure"
+down_revision = "20261016_geography_locations"
+branch_labels = None
+depends_on = None
+
+
+BACKFILL_CLOSURE = """
+WITH RECURSIVE chain(ancestor_id, descendant_id, depth, path) AS (
+    SELECT id, id, 0, ARRAY[id] FROM org_structure_units
+    UNION ALL
+    SELECT u.parent_id, c.descendant_id, c.depth + 1, c.path || u.parent_id
+    FROM chain c
+    JOIN org_structure_units u ON u.id = c.ancestor_id
+    WHERE u.parent_id IS NOT NULL AND NOT u.parent_id = ANY(c.path)
+)
+INSERT INTO org_structure_closure (ancestor_id, descendant_id, depth)
+SELECT ancestor_id, descendant_id, depth FROM chain
+"""
+
+# Сверху вниз от корней: собственное значение подразделения или унаследованное
+BACKFILL_EFFECTIVE_SETTINGS = """
+WITH RECURSIVE resolved AS (
+    SELECT
+        u.id AS unit_id,
+        u.owner_id,
+        u.payment_system_id,
+        u.payment_schedule_id,
+        u.organization_profile_id,
+        CASE WHEN NOT u.inherit_late_settings AND u.late_threshold_minutes IS NOT NULL
+                  AND u.late_penalty_per_minute IS NOT NULL
+             THEN u.id END AS late_source_unit_id,
+        CASE WHEN NOT u.inherit_cancellation_settings AND u.cancellation_short_notice_hours IS NOT NULL
+             THEN u.id END AS cancellation_source_unit_id
+    FROM org_structure_units u
+    WHERE u.parent_id IS NULL
+    UNION ALL
+    SELECT
+        u.id,
+        u.owner_id,
+        COALESCE(u.payment_system_id, r.payment_system_id),
+        COALESCE(u.payment_schedule_id, r.payment_schedule_id),
+        COALESCE(u.organization_profile_id, r.organization_profile_id),
+        CASE WHEN NOT u.inherit_late_settings AND u.late_threshold_minutes IS NOT NULL
+                  AND u.late_penalty_per_minute IS NOT NULL
+             THEN u.id ELSE r.late_source_unit_id END,
+        CASE WHEN NOT u.inherit_cancellation_settings AND u.cancellation_short_notice_hours IS NOT NULL
+             THEN u.id ELSE r.cancellation_source_unit_id END
+    FROM org_structure_units u
+    JOIN resolved r ON u.parent_id = r.unit_id
+)
+INSERT INTO org_unit_effective_settings (
+    unit_id, owner_id, payment_system_id, payment_schedule_id, organization_profile_id,
+    late_threshold_minutes, late_penalty_per_minute, late_source_unit_id, late_source_name,
+    cancellation_short_notice_hours, cancellation_short_notice_fine, cancellation_invalid_reason_fine,
+    cancellation_source_unit_id, cancellation_source_name
+)
+SELECT
+    r.unit_id, r.owner_id, r.payment_system_id, r.payment_schedule_id, r.organization_profile_id,
+    late.late_threshold_minutes, late.late_penalty_per_minute, late.id, late.name,
+    cancel.cancellation_short_notice_hours, cancel.cancellation_short_notice_fine,
+    cancel.cancellation_invalid_reason_fine, cancel.id, cancel.name
+FROM resolved r
+LEFT JOIN org_structure_units late ON late.id = r.late_source_unit_id
+LEFT JOIN org_structure_units cancel ON cancel.id = r.cancellation_source_unit_id
+"""
+
+
+def upgrade() -> None:
+    op.create_table(
+        'org_structure_closure',
+        sa.Column('ancestor_id', sa.Integer(), nullable=False),
+        sa.Column('descendant_id', sa.Integer(), nullable=False),
+        sa.Column('depth', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['ancestor_id'], ['org_structure_units.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['descendant_id'], ['org_structure_units.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('ancestor_id', 'descendant_id')
+    )
+    op.create_index('ix_org_structure_closure_descendant_id', 'org_structure_closure', ['descendant_id'])
+
+    op.create_table(
+        'org_unit_effective_settings',
+        sa.Column('unit_id', sa.Integer(), nullable=False),
+        sa.Column('owner_id', sa.Integer(), nullable=False),
+        sa.Column('payment_system_id', sa.Integer(), nullable=True),
+        sa.Column('payment_schedule_id', sa.Integer(), nullable=True),
+        sa.Column('organization_profile_id', sa.Integer(), nullable=True),
+        sa.Column('late_threshold_minutes', sa.Integer(), nullable=True),
+        sa.Column('late_penalty_per_minute', sa.Numeric(precision=10, scale=2), nullable=True),
+        sa.Column('late_source_unit_id', sa.Integer(), nullable=True),
+        sa.Column('late_source_name', sa.String(length=255), nullable=True),
+        sa.Column('cancellation_short_notice_hours', sa.Integer(), nullable=True),
+        sa.Column('cancellation_short_notice_fine', sa.Numeric(precision=10, scale=2), nullable=True),
+        sa.Column('cancellation_invalid_reason_fine', sa.Numeric(precision=10, scale=2), nullable=True),
+        sa.Column('cancellation_source_unit_id', sa.Integer(), nullable=True),
+        sa.Column('cancellation_source_name', sa.String(length=255), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['unit_id'], ['org_structure_units.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['payment_system_id'], ['payment_systems.id'], ondelete='SET NULL'),
+        sa.ForeignKeyConstraint(['payment_schedule_id'], ['payment_schedules.id'], ondelete='SET NULL'),
+        sa.ForeignKeyConstraint(['organization_profile_id'], ['organization_profiles.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('unit_id')
+    )
+    op.create_index('ix_org_unit_effective_settings_owner_id', 'org_unit_effective_settings', ['owner_id'])
+
+    op.execute(BACKFILL_CLOSURE)
+    op.execute(BACKFILL_EFFECTIVE_SETTINGS)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_org_unit_effective_settings_owner_id', table_name='org_unit_effective_settings')
+    op.drop_table('org_unit_effective_settings')
+    op.drop_index('ix_org_structure_closure_descendant_id', table_name='org_structure_closure')
+    op.drop_table('org_structure_closure')
@@ -0,0 +1,116 @@
+"""Incremental rating aggregates
+
+Revision ID: 20261016_rating_aggregates
+Revises: 20261016_task_entry_uniques
+Create Date: 2026-10-16
+
+RatingService хранит в ratings агрегаты учитываемых отзывов (сумма,
+распределение по звездам) и обновляет их приращением при смене статуса
+отзыва или обжалования:
+
+- одна строка на цель (uq_ratings_target) — для INSERT ... ON CONFLICT;
+- ix_ratings_top — выборка лучших по типу цели без сортировки таблицы.
+
+Дубликаты строк ratings удаляются, агрегаты пересчитываются по отзывам тем же
+сгруппированным запросом, что и RatingService.rebuild_ratings.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261016_rating_aggregates"
+down_revision = "20261016_task_entry_uniques"
+branch_labels = None
+depends_on = None
+
+
+STAR_COLUMNS = [f"stars_{stars}" for stars in range(1, 6)]
+
+DEDUPE_RATINGS = """
+DELETE FROM ratings r
+USING ratings keep
+WHERE r.target_type = keep.target_type
+  AND r.target_id = keep.target_id
+  AND keep.id > r.id
+"""
+
+# Рейтинги без учитываемых отзывов — начальные; остальные перезаписывает BACKFILL
+RESET_RATINGS = """
+UPDATE ratings SET total_reviews = 0, average_rating = 5.0
+"""
+
+# Вес отзыва как в RatingService._calculate_review_weight: 1 для отзывов не старше
+# суток, далее e^(-ln2 * дни / 90), но не меньше 0.1
+BACKFILL_RATINGS = """
+WITH aged AS (
+    SELECT r.target_type, r.target_id, r.rating,
+           floor(extract(epoch FROM now() - r.published_at) / 86400) AS days
+    FROM reviews r
+    WHERE r.status = 'approved'
+      AND r.published_at IS NOT NULL
+      AND NOT EXISTS (
+          SELECT 1 FROM review_appeals a WHERE a.review_id = r.id AND a.status = 'approved'
+      )
+), counted AS (
+    SELECT target_type, target_id, rating,
+           CASE WHEN days <= 1 THEN 1.0 ELSE greatest(exp(-ln(2.0) * days / 90), 0.1) END AS weight
+    FROM aged
+), grouped AS (
+    SELECT target_type, target_id,
+           count(*) AS total_reviews,
+           sum(rating) AS rating_sum,
+           count(*) FILTER (WHERE least(greatest(floor(rating), 1), 5) = 1) AS stars_1,
+           count(*) FILTER (WHERE least(greatest(floor(rating), 1), 5) = 2) AS stars_2,
+           count(*) FILTER (WHERE least(greatest(floor(rating), 1), 5) = 3) AS stars_3,
+           count(*) FILTER (WHERE least(greatest(floor(rating), 1), 5) = 4) AS stars_4,
+           count(*) FILTER (WHERE least(greatest(floor(rating), 1), 5) = 5) AS stars_5,
+           sum(weight * rating::float8) AS weighted_sum,
+           sum(weight) AS weight_total
+    FROM counted
+    GROUP BY target_type, target_id
+)
+INSERT INTO ratings (
+    target_type, target_id, total_reviews, rating_sum, stars_1, stars_2, stars_3, stars_4, stars_5,
+    average_rating, last_updated
+)
+SELECT target_type, target_id, total_reviews, rating_sum, stars_1, stars_2, stars_3, stars_4, stars_5,
+       CASE WHEN weight_total > 0 THEN round(weighted_sum / weight_total * 2) / 2 ELSE 5.0 END,
+       now()
+FROM grouped
+ON CONFLICT ON CONSTRAINT uq_ratings_target DO UPDATE SET
+    total_reviews = excluded.total_reviews,
+    rating_sum = excluded.rating_sum,
+    stars_1 = excluded.stars_1,
+    stars_2 = excluded.stars_2,
+    stars_3 = excluded.stars_3,
+    stars_4 = excluded.stars_4,
+    stars_5 = excluded.stars_5,
+    average_rating = excluded.average_rating,
+    last_updated = excluded.last_updated
+"""
+
+
+def upgrade() -> None:
+    op.add_column('ratings', sa.Column('rating_sum', sa.Numeric(12, 1), server_default='0', nullable=False))
+    for name in STAR_COLUMNS:
+        op.add_column('ratings', sa.Column(name, sa.Integer(), server_default='0', nullable=False))
+
+    op.execute(DEDUPE_RATINGS)
+    op.create_unique_constraint('uq_ratings_target', 'ratings', ['target_type', 'target_id'])
+    op.create_index(
+        'ix_ratings_top',
+        'ratings',
+        ['target_type', sa.text('average_rating DESC'), sa.text('total_reviews DESC')]
+    )
+
+    op.execute(RESET_RATINGS)
+    op.execute(BACKFILL_RATINGS)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_ratings_top', table_name='ratings')
+    op.drop_constraint('uq_ratings_target', 'ratings', type_='unique')
+    for name in reversed(STAR_COLUMNS):
+        op.drop_column('ratings', name)
+    op.drop_column('ratings', 'rating_sum')
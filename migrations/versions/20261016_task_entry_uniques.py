@@ -0,0 +1,95 @@
+"""Unique keys for task entries and task bonus adjustments
+
+Revision ID: 20261016_task_entry_uniques
+Revises: 20261016_org_structure_closure
+Create Date: 2026-10-16
+
+Назначение задач и начисление бонусов (core/celery/tasks/task_assignment.py,
+task_bonuses.py) вставляют строки INSERT ... ON CONFLICT DO NOTHING вместо
+проверки существования на каждую пару:
+
+- task_entries_v2: одна задача плана на запланированную смену до ее
+  открытия (plan_id, shift_schedule_id при shift_id IS NULL) и одна на
+  открытую смену (plan_id, shift_id);
+- payroll_adjustments: одна корректировка на задачу (task_entry_v2_id).
+
+Дубликаты, появившиеся из-за гонок, удаляются до создания индексов:
+у задач остается выполненная (иначе самая ранняя), у корректировок
+лишние отвязываются от задачи (суммы уже могли попасть в начисления).
+"""
+
+from alembic import op
+
+
+revision = "20261016_task_entry_uniques"
+down_revision = "20261016_org_structure_closure"
+branch_labels = None
+depends_on = None
+
+
+DEDUPE_SCHEDULE_ENTRIES = """
+DELETE FROM task_entries_v2 e
+USING task_entries_v2 keep
+WHERE e.shift_id IS NULL AND keep.shift_id IS NULL
+  AND e.plan_id = keep.plan_id
+  AND e.shift_schedule_id = keep.shift_schedule_id
+  AND (keep.is_completed, -keep.id) > (e.is_completed, -e.id)
+"""
+
+DEDUPE_SHIFT_ENTRIES = """
+DELETE FROM task_entries_v2 e
+USING task_entries_v2 keep
+WHERE e.shift_id IS NOT NULL
+  AND e.plan_id = keep.plan_id
+  AND e.shift_id = keep.shift_id
+  AND (keep.is_completed, -keep.id) > (e.is_completed, -e.id)
+"""
+
+DETACH_DUPLICATE_ADJUSTMENTS = """
+UPDATE payroll_adjustments a
+SET task_entry_v2_id = NULL
+FROM payroll_adjustments keep
+WHERE a.task_entry_v2_id = keep.task_entry_v2_id
+  AND keep.id < a.id
+"""
+
+
+def upgrade() -> None:
+    op.execute(DEDUPE_SCHEDULE_ENTRIES)
+    op.execute(DEDUPE_SHIFT_ENTRIES)
+    op.execute(DETACH_DUPLICATE_ADJUSTMENTS)
+
+    op.create_index(
+        'uq_task_entries_v2_plan_schedule',
+        'task_entries_v2',
+        ['plan_id', 'shift_schedule_id'],
+        unique=True,
+        postgresql_where='shift_id IS NULL'
+    )
+    op.create_index(
+        'uq_task_entries_v2_plan_shift',
+        'task_entries_v2',
+        ['plan_id', 'shift_id'],
+        unique=True,
+        postgresql_where='shift_id IS NOT NULL'
+    )
+    op.create_index(
+        'ix_task_entries_v2_completed_at',
+        'task_entries_v2',
+        ['completed_at'],
+        postgresql_where='is_completed'
+    )
+    op.create_index(
+        'uq_payroll_adjustments_task_entry_v2',
+        'payroll_adjustments',
+        ['task_entry_v2_id'],
+        unique=True,
+        postgresql_where='task_entry_v2_id IS NOT NULL'
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_payroll_adjustments_task_entry_v2', table_name='payroll_adjustments')
+    op.drop_index('ix_task_entries_v2_completed_at', table_name='task_entries_v2')
+    op.drop_index('uq_task_entries_v2_plan_shift', table_name='task_entries_v2')
+    op.drop_index('uq_task_entries_v2_plan_schedule', table_name='task_entries_v2')
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Сборка манифеста статических файлов веб-приложения.
+
+Создает хэшированные копии файлов из apps/web/static, их сжатые варианты
+(.br/.gz) и manifest.json в settings.static_build_dir. Запускается при
+сборке образа; при старте приложение пересобирает манифест само, если
+исходники изменились.
+"""
+
+import sys
+import os
+
+# Добавляем корневую папку проекта в путь
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from apps.web.utils.static_manifest import build_manifest
+
+
+def main():
+    """Сборка манифеста."""
+    try:
+        manifest = build_manifest()
+        print(f"✅ Манифест статики собран: {len(manifest.assets)} файлов в {manifest.build_dir}")
+    except Exception as e:
+        print(f"❌ Ошибка сборки манифеста статики: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,6 @@
 
 from __future__ import annotations
 
-import asyncio
 from typing import TYPE_CHECKING, Optional
 
 from core.logging.logger import logger
@@ -118,15 +117,14 @@ async def _handle_start(update: NormalizedUpdate, messenger: Messenger) -> None:
         return
 
     try:
-        is_registered = await asyncio.to_thread(user_manager.is_user_registered, int(ext_id))
+        is_registered = await user_manager.is_user_registered(int(ext_id))
     except Exception as e:
         logger.error(f"start: error checking registration {ext_id}: {e}", exc_info=True)
         is_registered = False
 
     if not is_registered:
         try:
-            await asyncio.to_thread(
-                user_manager.register_user,
+            await user_manager.register_user(
                 int(ext_id),
                 first_name,
                 update.from_username,
@@ -160,7 +158,7 @@ async def _handle_start(update: NormalizedUpdate, messenger: Messenger) -> None:
             welcome = f"👋 Привет, {first_name}! Добро пожаловать в StaffProBot!"
     else:
         try:
-            await asyncio.to_thread(user_manager.update_user_activity, int(ext_id))
+            await user_manager.update_user_activity(int(ext_id))
         except Exception as e:
             logger.warning(f"start: error updating activity {ext_id}: {e}")
         welcome = f"""👋 Привет, {first_name}!
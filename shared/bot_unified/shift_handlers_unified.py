@@ -89,10 +89,8 @@ async def handle_open_shift(
 
     async with get_async_session() as session:
         opening_service = ObjectOpeningService(session)
-        open_objects = []
-        for obj in objects:
-            if await opening_service.is_object_open(obj["id"]):
-                open_objects.append(obj)
+        open_ids = await opening_service.get_open_object_ids(obj["id"] for obj in objects)
+        open_objects = [obj for obj in objects if obj["id"] in open_ids]
 
     if not open_objects:
         await messenger.send_text(
@@ -364,6 +362,11 @@ async def handle_location_message(
             msg = f"❌ {err}"
             if "distance_meters" in result:
                 msg += f"\n📏 Расстояние: {result['distance_meters']:.0f}м"
+            if result.get("nearby_objects"):
+                nearby = ", ".join(
+                    f"{o['name']} ({o['distance_meters']:.0f}м)" for o in result["nearby_objects"][:3]
+                )
+                msg += f"\n📍 Рядом с вами: {nearby}"
             await messenger.send_text(chat_id, msg, keyboard=START_KEYBOARD)
 
     elif user_state.action == UserAction.CLOSE_SHIFT:
@@ -1,56 +1,10 @@
 """Адаптеры для совместимости с существующим кодом."""
 
 from typing import List, Dict, Any, Optional
-from apps.bot.services.object_service import ObjectService
 from .schedule_service import ScheduleService
 from .shift_service import ShiftService
 
 
-class ObjectServiceAdapter:
-    """Адаптер для ObjectService для обратной совместимости."""
-    
-    def __init__(self):
-        """Инициализация адаптера."""
-        self._service = ObjectService.get_instance()
-    
-    def create_object(
-        self,
-        name: str,
-        address: str,
-        coordinates: str,
-        opening_time: str,
-        closing_time: str,
-        hourly_rate: float,
-        owner_id: int
-    ) -> Dict[str, Any]:
-        """Создание объекта через общий сервис."""
-        return self._service.create_object(
-            name, address, coordinates, opening_time, 
-            closing_time, hourly_rate, owner_id
-        )
-    
-    def get_user_objects(self, owner_telegram_id: int) -> List[Dict[str, Any]]:
-        """Получение объектов пользователя через общий сервис."""
-        return self._service.get_user_objects(owner_telegram_id)
-    
-    def get_object_by_id(self, object_id: int) -> Optional[Dict[str, Any]]:
-        """Получение объекта по ID через общий сервис."""
-        return self._service.get_object_by_id(object_id)
-    
-    def update_object(
-        self,
-        object_id: int,
-        field_name: str,
-        new_value: Any
-    ) -> Dict[str, Any]:
-        """Обновление объекта через общий сервис."""
-        return self._service.update_object(object_id, field_name, new_value)
-    
-    def delete_object(self, object_id: int) -> Dict[str, Any]:
-        """Удаление объекта через общий сервис."""
-        return self._service.delete_object(object_id)
-
-
 class ScheduleServiceAdapter:
     """Адаптер для ScheduleService для обратной совместимости."""
     
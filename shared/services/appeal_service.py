@@ -12,6 +12,7 @@ from sqlalchemy import select, and_, or_, func
 from core.logging.logger import logger
 from domain.entities.review import Review, ReviewAppeal
 from domain.entities.user import User
+from shared.services.rating_service import RatingService
 
 
 class AppealService:
@@ -86,9 +87,14 @@ class AppealService:
             
             self.session.add(appeal)
             
+            rating_service = RatingService(self.session)
+            was_counted = await rating_service.is_review_counted(review)
+            
             # Обновляем статус отзыва на "appealed"
             review.status = 'appealed'
             
+            # Обжалованный отзыв не учитывается в рейтинге до решения
+            await rating_service.apply_review_change(review, was_counted)
             await self.session.commit()
             await self.session.refresh(appeal)
             
@@ -164,17 +170,20 @@ class AppealService:
                 logger.warning(f"Appeal {appeal_id} is not pending")
                 return False
             
+            # Обновляем статус отзыва в зависимости от решения
+            review_query = select(Review).where(Review.id == appeal.review_id)
+            review_result = await self.session.execute(review_query)
+            review = review_result.scalar_one_or_none()
+            
+            rating_service = RatingService(self.session)
+            was_counted = await rating_service.is_review_counted(review) if review else False
+            
             # Обновляем обжалование
             appeal.status = decision
             appeal.moderator_decision = decision
             appeal.decision_notes = decision_notes
             appeal.decided_at = datetime.utcnow()
             
-            # Обновляем статус отзыва в зависимости от решения
-            review_query = select(Review).where(Review.id == appeal.review_id)
-            review_result = await self.session.execute(review_query)
-            review = review_result.scalar_one_or_none()
-            
             if review:
                 if decision == 'approved':
                     # Если обжалование одобрено, возвращаем отзыв на модерацию
@@ -183,6 +192,8 @@ class AppealService:
                 else:
                     # Если обжалование отклонено, оставляем статус отзыва как есть
                     pass
+                
+                await rating_service.apply_review_change(review, was_counted)
             
             await self.session.commit()
             
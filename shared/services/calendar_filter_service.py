@@ -1,16 +1,13 @@
 """Универсальный сервис фильтрации данных календаря."""
 
 import logging
-import hashlib
-import json
 import math
 from collections import defaultdict
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime, date, time, timedelta
 import pytz
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_, func
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select, and_, or_, func, exists
 
 from domain.entities.user import User
 from domain.entities.object import Object
@@ -28,8 +25,8 @@ from shared.models.calendar_data import (
     TimeslotStatus
 )
 from shared.services.object_access_service import ObjectAccessService
-from core.cache.redis_cache import cached
-from core.cache.cache_service import CacheService
+from shared.services.timeslot_capacity_service import Booking, SlotCapacity, SlotWindow, as_utc, compute_capacity
+from core.cache.calendar_cache import calendar_cache, datetime_day, empty_fragment, iter_days
 
 logger = logging.getLogger(__name__)
 
@@ -68,39 +65,6 @@ class CalendarFilterService:
     def __init__(self, db: AsyncSession):
         self.db = db
         self.object_access_service = ObjectAccessService(db)
-        # Простой кэш в памяти (в продакшене лучше использовать Redis)
-        self._cache: Dict[str, Any] = {}
-        self._cache_ttl: Dict[str, datetime] = {}
-    
-    def _generate_cache_key(self, user_telegram_id: int, user_role: str, 
-                           date_range_start: date, date_range_end: date, 
-                           object_filter: Optional[List[int]] = None) -> str:
-        """Генерирует ключ кэша для запроса."""
-        cache_data = {
-            'user_telegram_id': user_telegram_id,
-            'user_role': user_role,
-            'date_range_start': date_range_start.isoformat(),
-            'date_range_end': date_range_end.isoformat(),
-            'object_filter': sorted(object_filter) if object_filter else None
-        }
-        cache_str = json.dumps(cache_data, sort_keys=True)
-        return hashlib.md5(cache_str.encode()).hexdigest()
-    
-    def _get_from_cache(self, cache_key: str) -> Optional[Any]:
-        """Получает данные из кэша."""
-        if cache_key in self._cache and cache_key in self._cache_ttl:
-            if datetime.now() < self._cache_ttl[cache_key]:
-                return self._cache[cache_key]
-            else:
-                # Удаляем устаревшие данные
-                del self._cache[cache_key]
-                del self._cache_ttl[cache_key]
-        return None
-    
-    def _set_cache(self, cache_key: str, data: Any, ttl_minutes: int = 5):
-        """Сохраняет данные в кэш."""
-        self._cache[cache_key] = data
-        self._cache_ttl[cache_key] = datetime.now() + timedelta(minutes=ttl_minutes)
     
     async def get_calendar_data(
         self,
@@ -124,15 +88,6 @@ class CalendarFilterService:
             CalendarData с тайм-слотами и сменами
         """
         try:
-            # Временно отключаем кэш для отладки
-            # cache_key = self._generate_cache_key(
-            #     user_telegram_id, user_role, date_range_start, date_range_end, object_filter
-            # )
-            # cached_data = self._get_from_cache(cache_key)
-            # if cached_data:
-            #     logger.debug(f"Cache hit for user {user_telegram_id}")
-            #     return cached_data
-            
             logger.info(f"Getting calendar data for user {user_telegram_id}, role {user_role}, period {date_range_start} to {date_range_end}")
             
             # Получаем доступные объекты
@@ -174,9 +129,10 @@ class CalendarFilterService:
                     accessible_objects=accessible_objects
                 )
             
-            # Получаем тайм-слоты и смены параллельно
-            timeslots = await self._get_timeslots(filtered_object_ids, date_range_start, date_range_end, accessible_objects)
-            shifts = await self._get_shifts(filtered_object_ids, date_range_start, date_range_end, accessible_objects)
+            # Тайм-слоты и смены собираем из общих фрагментов «объект × день»
+            timeslots, shifts = await self._get_calendar_items(
+                filtered_object_ids, date_range_start, date_range_end, accessible_objects
+            )
             
             # Обновляем статусы тайм-слотов на основе смен
             timeslots = self._update_timeslot_statuses(timeslots, shifts, accessible_objects)
@@ -193,9 +149,6 @@ class CalendarFilterService:
                 accessible_objects=accessible_objects
             )
             
-            # Временно отключаем сохранение в кэш для отладки
-            # self._set_cache(cache_key, result, ttl_minutes=5)
-            
             return result
             
         except Exception as e:
@@ -209,7 +162,80 @@ class CalendarFilterService:
                 accessible_objects=[]
             )
     
-    @cached(ttl=timedelta(minutes=10), key_prefix="calendar_timeslots")
+    async def _get_calendar_items(
+        self,
+        object_ids: List[int],
+        date_range_start: date,
+        date_range_end: date,
+        accessible_objects: List[Dict[str, Any]]
+    ) -> Tuple[List[CalendarTimeslot], List[CalendarShift]]:
+        """Собрать тайм-слоты и смены периода из фрагментов «объект × день».
+        
+        Отсутствующие в кэше фрагменты загружаются из БД одним набором
+        запросов; права и данные объекта накладываются при сборке.
+        """
+        objects_map = {obj['id']: obj for obj in accessible_objects}
+        
+        fragments, missing = await calendar_cache.get_fragments(object_ids, date_range_start, date_range_end)
+        if missing:
+            # Версии снимаются до загрузки: изменения во время запроса не попадут в кэш
+            versions = await calendar_cache.snapshot_versions(missing)
+            loaded = await self._load_fragments(missing)
+            fragments.update(loaded)
+            await calendar_cache.set_fragments(loaded, versions)
+        
+        timeslot_rows = []
+        actual_rows = []
+        planned_rows = []
+        for object_id in object_ids:
+            for day in iter_days(date_range_start, date_range_end):
+                fragment = fragments.get((object_id, day))
+                if not fragment:
+                    continue
+                timeslot_rows.extend(fragment["timeslots"])
+                actual_rows.extend(fragment["actual_shifts"])
+                planned_rows.extend(fragment["planned_shifts"])
+        
+        timeslot_rows.sort(key=lambda row: (row['slot_date'], row['start_time']))
+        actual_rows.sort(key=lambda row: row['start_time'])
+        planned_rows.sort(key=lambda row: row['planned_start'])
+        
+        timeslots = self._build_timeslots(timeslot_rows, objects_map)
+        actual_shifts = self._build_actual_shifts(actual_rows, objects_map)
+        actual_schedule_ids = {shift.schedule_id for shift in actual_shifts if shift.schedule_id}
+        planned_shifts = self._build_planned_shifts(planned_rows, objects_map, exclude_schedule_ids=actual_schedule_ids)
+        
+        logger.info(
+            f"Calendar fragments: {len(fragments)} object-days ({len(missing)} loaded from DB), "
+            f"{len(timeslots)} timeslots, {len(actual_shifts)} actual and {len(planned_shifts)} planned shifts"
+        )
+        return timeslots, actual_shifts + planned_shifts
+    
+    async def _load_fragments(
+        self,
+        pairs: List[Tuple[int, date]]
+    ) -> Dict[Tuple[int, date], Dict[str, List[Dict[str, Any]]]]:
+        """Загрузить фрагменты объект-дней из БД (три запроса на весь набор)."""
+        object_ids = sorted({object_id for object_id, _ in pairs})
+        days = [day for _, day in pairs]
+        date_range_start, date_range_end = min(days), max(days)
+        
+        fragments = {pair: empty_fragment() for pair in pairs}
+        
+        def put(object_id: int, day: date, section: str, row: Dict[str, Any]) -> None:
+            fragment = fragments.get((object_id, day))
+            if fragment is not None:
+                fragment[section].append(row)
+        
+        for row in await self._load_timeslot_rows(object_ids, date_range_start, date_range_end):
+            put(row['object_id'], row['slot_date'], "timeslots", row)
+        for row in await self._load_actual_shift_rows(object_ids, date_range_start, date_range_end):
+            put(row['object_id'], datetime_day(row['start_time']), "actual_shifts", row)
+        for row in await self._load_planned_shift_rows(object_ids, date_range_start, date_range_end):
+            put(row['object_id'], datetime_day(row['planned_start']), "planned_shifts", row)
+        
+        return fragments
+    
     async def _get_timeslots(
         self,
         object_ids: List[int],
@@ -219,77 +245,113 @@ class CalendarFilterService:
     ) -> List[CalendarTimeslot]:
         """Получить тайм-слоты для объектов."""
         try:
-            logger.info(f"_get_timeslots called with object_ids={object_ids}, date_range={date_range_start} to {date_range_end}")
-            # Создаем словарь объектов для быстрого доступа
             objects_map = {obj['id']: obj for obj in accessible_objects}
-            
-            # Оптимизированный запрос с индексами
-            timeslots_query = select(TimeSlot).options(
-                selectinload(TimeSlot.object)
-            ).where(
-                and_(
-                    TimeSlot.object_id.in_(object_ids),
-                    TimeSlot.slot_date >= date_range_start,
-                    TimeSlot.slot_date <= date_range_end,  # Включаем конечную дату
-                    TimeSlot.is_active == True
-                )
-            ).order_by(TimeSlot.slot_date, TimeSlot.start_time)
-            
-            timeslots_result = await self.db.execute(timeslots_query)
-            timeslots = timeslots_result.scalars().all()
-            
-            logger.info(f"CalendarFilterService: Found {len(timeslots)} timeslots in database for objects {object_ids}")
-            for slot in timeslots:
-                logger.info(f"  - Timeslot {slot.id}: {slot.slot_date} {slot.start_time}-{slot.end_time} (object {slot.object_id})")
-            
-            calendar_timeslots = []
-            for slot in timeslots:
-                obj_info = objects_map.get(slot.object_id)
-                if not obj_info:
-                    logger.warning(f"Timeslot {slot.id} references object {slot.object_id} not in accessible objects")
-                    continue
-                
-                calendar_timeslots.append(CalendarTimeslot(
-                    id=slot.id,
-                    object_id=slot.object_id,
-                    object_name=obj_info['name'],
-                    date=slot.slot_date,
-                    start_time=slot.start_time,
-                    end_time=slot.end_time,
-                    hourly_rate=float(slot.hourly_rate) if slot.hourly_rate else obj_info['hourly_rate'],
-                    max_employees=slot.max_employees if slot.max_employees is not None else 1,
-                    is_active=slot.is_active,
-                    notes=slot.notes,
-                    work_conditions=obj_info.get('work_conditions'),
-                    shift_tasks=obj_info.get('shift_tasks'),
-                    coordinates=obj_info.get('coordinates'),
-                    can_edit=obj_info.get('can_edit', False),
-                    can_plan=obj_info.get('can_edit_schedule', False),
-                    can_view=obj_info.get('can_view', True)
-                ))
-            
-            logger.info(f"Found {len(calendar_timeslots)} timeslots")
-            return calendar_timeslots
-            
+            rows = await self._load_timeslot_rows(object_ids, date_range_start, date_range_end)
+            return self._build_timeslots(rows, objects_map)
         except Exception as e:
             logger.error(f"Error getting timeslots: {e}", exc_info=True)
             return []
     
-    async def _get_object_timezones(self, object_ids: List[int]) -> Dict[int, str]:
-        """Получить временные зоны объектов."""
+    async def _load_timeslot_rows(
+        self,
+        object_ids: List[int],
+        date_range_start: date,
+        date_range_end: date
+    ) -> List[Dict[str, Any]]:
+        """Загрузить строки тайм-слотов одним запросом."""
+        # Данные объекта берутся из accessible_objects, поэтому связь TimeSlot.object не подгружаем
+        timeslots_query = select(TimeSlot).where(
+            and_(
+                TimeSlot.object_id.in_(object_ids),
+                TimeSlot.slot_date >= date_range_start,
+                TimeSlot.slot_date <= date_range_end,  # Включаем конечную дату
+                TimeSlot.is_active == True
+            )
+        ).order_by(TimeSlot.slot_date, TimeSlot.start_time)
+        
+        timeslots_result = await self.db.execute(timeslots_query)
+        timeslots = timeslots_result.scalars().all()
+        logger.debug(f"CalendarFilterService: Found {len(timeslots)} timeslots in database for objects {object_ids}")
+        
+        return [
+            {
+                'id': slot.id,
+                'object_id': slot.object_id,
+                'slot_date': slot.slot_date,
+                'start_time': slot.start_time,
+                'end_time': slot.end_time,
+                'hourly_rate': float(slot.hourly_rate) if slot.hourly_rate else None,
+                'max_employees': slot.max_employees,
+                'is_active': slot.is_active,
+                'notes': slot.notes,
+            }
+            for slot in timeslots
+        ]
+    
+    def _build_timeslots(
+        self,
+        rows: List[Dict[str, Any]],
+        objects_map: Dict[int, Dict[str, Any]]
+    ) -> List[CalendarTimeslot]:
+        """Построить тайм-слоты календаря с учетом прав пользователя на объекты."""
+        calendar_timeslots = []
+        for row in rows:
+            obj_info = objects_map.get(row['object_id'])
+            if not obj_info:
+                logger.warning(f"Timeslot {row['id']} references object {row['object_id']} not in accessible objects")
+                continue
+            
+            calendar_timeslots.append(CalendarTimeslot(
+                id=row['id'],
+                object_id=row['object_id'],
+                object_name=obj_info['name'],
+                date=row['slot_date'],
+                start_time=row['start_time'],
+                end_time=row['end_time'],
+                hourly_rate=row['hourly_rate'] if row['hourly_rate'] else obj_info['hourly_rate'],
+                max_employees=row['max_employees'] if row['max_employees'] is not None else 1,
+                is_active=row['is_active'],
+                notes=row['notes'],
+                work_conditions=obj_info.get('work_conditions'),
+                shift_tasks=obj_info.get('shift_tasks'),
+                coordinates=obj_info.get('coordinates'),
+                can_edit=obj_info.get('can_edit', False),
+                can_plan=obj_info.get('can_edit_schedule', False),
+                can_view=obj_info.get('can_view', True)
+            ))
+        
+        return calendar_timeslots
+    
+    async def _get_object_timezones(
+        self,
+        object_ids: List[int],
+        objects_map: Optional[Dict[int, Dict[str, Any]]] = None
+    ) -> Dict[int, str]:
+        """Получить временные зоны объектов.
+        
+        Зоны берутся из уже загруженных доступных объектов; в БД
+        запрашиваются только отсутствующие в objects_map.
+        """
         try:
-            from domain.entities.object import Object
-            query = select(Object.id, Object.timezone).where(Object.id.in_(object_ids))
-            result = await self.db.execute(query)
             timezones = {}
-            for row in result:
-                timezones[row.id] = row.timezone or 'Europe/Moscow'
+            missing_ids = []
+            for obj_id in object_ids:
+                obj_info = (objects_map or {}).get(obj_id)
+                if obj_info and obj_info.get('timezone'):
+                    timezones[obj_id] = obj_info['timezone']
+                else:
+                    missing_ids.append(obj_id)
+            
+            if missing_ids:
+                query = select(Object.id, Object.timezone).where(Object.id.in_(missing_ids))
+                result = await self.db.execute(query)
+                for row in result:
+                    timezones[row.id] = row.timezone or 'Europe/Moscow'
             return timezones
         except Exception as e:
             logger.error(f"Error getting object timezones: {e}", exc_info=True)
             return {obj_id: 'Europe/Moscow' for obj_id in object_ids}
     
-    @cached(ttl=timedelta(minutes=3), key_prefix="calendar_shifts")
     async def _get_shifts(
         self,
         object_ids: List[int],
@@ -303,7 +365,7 @@ class CalendarFilterService:
             objects_map = {obj['id']: obj for obj in accessible_objects}
             
             # Получаем временные зоны объектов
-            object_timezones = await self._get_object_timezones(object_ids)
+            object_timezones = await self._get_object_timezones(object_ids, objects_map)
             
             calendar_shifts = []
             
@@ -335,77 +397,108 @@ class CalendarFilterService:
     ) -> List[CalendarShift]:
         """Получить запланированные смены, исключая те, которые уже начались."""
         try:
-            # КРИТИЧЕСКИ ВАЖНО: Исключаем запланированные смены, которые уже начались
-            # Используем LEFT JOIN для проверки отсутствия фактических смен
-            conditions = [
-                ShiftSchedule.object_id.in_(object_ids),
-                ShiftSchedule.planned_start >= datetime.combine(date_range_start, time.min),
-                ShiftSchedule.planned_start < datetime.combine(date_range_end, time.max),
-                ShiftSchedule.status.in_(["planned", "confirmed"]),
-                # ИСКЛЮЧАЕМ смены, которые уже начались
-                ShiftSchedule.actual_shift_id.is_(None),
-                # ИСКЛЮЧАЕМ отменённые смены
-                ShiftSchedule.status != "cancelled"
-            ]
-            
-            # Исключаем запланированные смены, для которых уже есть фактические
-            if exclude_schedule_ids:
-                conditions.append(ShiftSchedule.id.notin_(exclude_schedule_ids))
-            
-            planned_query = select(ShiftSchedule).options(
-                selectinload(ShiftSchedule.user),
-                selectinload(ShiftSchedule.object)
-            ).where(and_(*conditions)).order_by(ShiftSchedule.planned_start)
-            
-            planned_result = await self.db.execute(planned_query)
-            planned_shifts = planned_result.scalars().all()
-            
-            # Дополнительная проверка: исключаем смены, для которых есть связанные Shift с is_planned=True
-            filtered_planned_shifts = []
-            for shift_schedule in planned_shifts:
-                # Проверяем, есть ли связанная фактическая смена
-                actual_shift_query = select(Shift).where(
-                    and_(
-                        Shift.schedule_id == shift_schedule.id,
-                        Shift.is_planned == True
-                    )
-                )
-                actual_shift_result = await self.db.execute(actual_shift_query)
-                actual_shift = actual_shift_result.scalar_one_or_none()
-                
-                if not actual_shift:  # Нет связанной фактической смены - показываем
-                    obj_info = objects_map.get(shift_schedule.object_id)
-                    if obj_info and shift_schedule.user:
-                        object_timezone = object_timezones.get(shift_schedule.object_id, 'Europe/Moscow')
-                        filtered_planned_shifts.append(CalendarShift(
-                            id=f"schedule_{shift_schedule.id}",  # Добавляем префикс для запланированных смен
-                            user_id=shift_schedule.user_id,
-                            user_name=f"{shift_schedule.user.first_name or ''} {shift_schedule.user.last_name or ''}".strip(),
-                            object_id=shift_schedule.object_id,
-                            object_name=obj_info['name'],
-                            start_time=shift_schedule.planned_start,  # Отключаем конвертацию - делается в API
-                            time_slot_id=shift_schedule.time_slot_id,
-                            planned_start=shift_schedule.planned_start,
-                            planned_end=shift_schedule.planned_end,
-                            shift_type=ShiftType.PLANNED,
-                            status=ShiftStatus(shift_schedule.status),
-                            hourly_rate=float(shift_schedule.hourly_rate) if shift_schedule.hourly_rate else None,
-                            notes=shift_schedule.notes,
-                            is_planned=True,
-                            schedule_id=shift_schedule.id,
-                            can_edit=obj_info.get('can_edit', False),
-                            can_cancel=obj_info.get('can_edit_schedule', False),
-                            can_view=obj_info.get('can_view', True),
-                            timezone=obj_info.get('timezone', 'Europe/Moscow')
-                        ))
-            
-            logger.info(f"Found {len(filtered_planned_shifts)} planned shifts (after filtering)")
-            return filtered_planned_shifts
-            
+            rows = await self._load_planned_shift_rows(object_ids, date_range_start, date_range_end)
+            return self._build_planned_shifts(rows, objects_map, exclude_schedule_ids)
         except Exception as e:
             logger.error(f"Error getting planned shifts: {e}", exc_info=True)
             return []
     
+    async def _load_planned_shift_rows(
+        self,
+        object_ids: List[int],
+        date_range_start: date,
+        date_range_end: date
+    ) -> List[Dict[str, Any]]:
+        """Загрузить строки запланированных смен, которые еще не начались."""
+        # КРИТИЧЕСКИ ВАЖНО: Исключаем запланированные смены, которые уже начались
+        conditions = [
+            ShiftSchedule.object_id.in_(object_ids),
+            ShiftSchedule.planned_start >= datetime.combine(date_range_start, time.min),
+            ShiftSchedule.planned_start < datetime.combine(date_range_end, time.max),
+            ShiftSchedule.status.in_(["planned", "confirmed"]),
+            # ИСКЛЮЧАЕМ смены, которые уже начались
+            ShiftSchedule.actual_shift_id.is_(None),
+            # ИСКЛЮЧАЕМ отменённые смены
+            ShiftSchedule.status != "cancelled"
+        ]
+        
+        # Anti-join: исключаем расписания, по которым уже открыта фактическая смена
+        # (раньше это проверялось отдельным запросом на каждое расписание)
+        conditions.append(
+            ~exists().where(
+                and_(
+                    Shift.schedule_id == ShiftSchedule.id,
+                    or_(
+                        Shift.is_planned == True,
+                        Shift.status.in_(["active", "completed"])
+                    )
+                )
+            )
+        )
+        
+        # Имя сотрудника берем JOIN-ом в том же запросе; без пользователя смена не показывается
+        planned_query = select(
+            ShiftSchedule, User.first_name, User.last_name
+        ).join(
+            User, User.id == ShiftSchedule.user_id
+        ).where(and_(*conditions)).order_by(ShiftSchedule.planned_start)
+        
+        planned_result = await self.db.execute(planned_query)
+        
+        return [
+            {
+                'id': shift_schedule.id,
+                'user_id': shift_schedule.user_id,
+                'user_name': f"{first_name or ''} {last_name or ''}".strip(),
+                'object_id': shift_schedule.object_id,
+                'time_slot_id': shift_schedule.time_slot_id,
+                'planned_start': shift_schedule.planned_start,
+                'planned_end': shift_schedule.planned_end,
+                'status': shift_schedule.status,
+                'hourly_rate': float(shift_schedule.hourly_rate) if shift_schedule.hourly_rate else None,
+                'notes': shift_schedule.notes,
+            }
+            for shift_schedule, first_name, last_name in planned_result.all()
+        ]
+    
+    def _build_planned_shifts(
+        self,
+        rows: List[Dict[str, Any]],
+        objects_map: Dict[int, Dict[str, Any]],
+        exclude_schedule_ids: Optional[set] = None
+    ) -> List[CalendarShift]:
+        """Построить запланированные смены календаря."""
+        filtered_planned_shifts = []
+        for row in rows:
+            if exclude_schedule_ids and row['id'] in exclude_schedule_ids:
+                continue
+            obj_info = objects_map.get(row['object_id'])
+            if not obj_info:
+                continue
+            filtered_planned_shifts.append(CalendarShift(
+                id=f"schedule_{row['id']}",  # Добавляем префикс для запланированных смен
+                user_id=row['user_id'],
+                user_name=row['user_name'],
+                object_id=row['object_id'],
+                object_name=obj_info['name'],
+                start_time=row['planned_start'],  # Отключаем конвертацию - делается в API
+                time_slot_id=row['time_slot_id'],
+                planned_start=row['planned_start'],
+                planned_end=row['planned_end'],
+                shift_type=ShiftType.PLANNED,
+                status=ShiftStatus(row['status']),
+                hourly_rate=row['hourly_rate'],
+                notes=row['notes'],
+                is_planned=True,
+                schedule_id=row['id'],
+                can_edit=obj_info.get('can_edit', False),
+                can_cancel=obj_info.get('can_edit_schedule', False),
+                can_view=obj_info.get('can_view', True),
+                timezone=obj_info.get('timezone', 'Europe/Moscow')
+            ))
+        
+        return filtered_planned_shifts
+    
     async def _get_actual_shifts(
         self,
         object_ids: List[int],
@@ -416,68 +509,104 @@ class CalendarFilterService:
     ) -> List[CalendarShift]:
         """Получить фактические смены (активные и завершенные)."""
         try:
-            actual_query = select(Shift).options(
-                selectinload(Shift.user),
-                selectinload(Shift.object)
-            ).where(
-                and_(
-                    Shift.object_id.in_(object_ids),
-                    Shift.start_time >= datetime.combine(date_range_start, time.min),
-                    Shift.start_time < datetime.combine(date_range_end, time.max),
-                    # ИСКЛЮЧАЕМ отменённые смены
-                    Shift.status.in_(["active", "completed"])
-                )
-            ).order_by(Shift.start_time)
-            
-            actual_result = await self.db.execute(actual_query)
-            actual_shifts = actual_result.scalars().all()
-            
-            calendar_shifts = []
-            for shift in actual_shifts:
-                obj_info = objects_map.get(shift.object_id)
-                if obj_info and shift.user:
-                    # Определяем тип смены
-                    if shift.status == "active":
-                        shift_type = ShiftType.ACTIVE
-                    elif shift.status == "completed":
-                        shift_type = ShiftType.COMPLETED
-                    else:
-                        shift_type = ShiftType.ACTIVE  # По умолчанию
-                    
-                    object_timezone = object_timezones.get(shift.object_id, 'Europe/Moscow')
-                    calendar_shifts.append(CalendarShift(
-                        id=shift.id,
-                        user_id=shift.user_id,
-                        user_name=f"{shift.user.first_name or ''} {shift.user.last_name or ''}".strip(),
-                        object_id=shift.object_id,
-                        object_name=obj_info['name'],
-                        time_slot_id=shift.time_slot_id,
-                        start_time=shift.start_time,  # Отключаем конвертацию - делается в API
-                        end_time=shift.end_time,  # Отключаем конвертацию - делается в API
-                        shift_type=shift_type,
-                        status=ShiftStatus(shift.status),
-                        hourly_rate=float(shift.hourly_rate) if shift.hourly_rate else None,
-                        total_hours=float(shift.total_hours) if shift.total_hours else None,
-                        total_payment=float(shift.total_payment) if shift.total_payment else None,
-                        notes=shift.notes,
-                        is_planned=shift.is_planned,
-                        schedule_id=shift.schedule_id,
-                        actual_shift_id=shift.id,
-                        start_coordinates=shift.start_coordinates,
-                        end_coordinates=shift.end_coordinates,
-                        can_edit=obj_info.get('can_edit', False),
-                        can_cancel=obj_info.get('can_edit_schedule', False),
-                        can_view=obj_info.get('can_view', True),
-                        timezone=obj_info.get('timezone', 'Europe/Moscow')
-                    ))
-            
-            logger.info(f"Found {len(calendar_shifts)} actual shifts")
-            return calendar_shifts
-            
+            rows = await self._load_actual_shift_rows(object_ids, date_range_start, date_range_end)
+            return self._build_actual_shifts(rows, objects_map)
         except Exception as e:
             logger.error(f"Error getting actual shifts: {e}", exc_info=True)
             return []
     
+    async def _load_actual_shift_rows(
+        self,
+        object_ids: List[int],
+        date_range_start: date,
+        date_range_end: date
+    ) -> List[Dict[str, Any]]:
+        """Загрузить строки фактических смен (активные и завершенные)."""
+        # Имя сотрудника берем JOIN-ом в том же запросе; без пользователя смена не показывается
+        actual_query = select(
+            Shift, User.first_name, User.last_name
+        ).join(
+            User, User.id == Shift.user_id
+        ).where(
+            and_(
+                Shift.object_id.in_(object_ids),
+                Shift.start_time >= datetime.combine(date_range_start, time.min),
+                Shift.start_time < datetime.combine(date_range_end, time.max),
+                # ИСКЛЮЧАЕМ отменённые смены
+                Shift.status.in_(["active", "completed"])
+            )
+        ).order_by(Shift.start_time)
+        
+        actual_result = await self.db.execute(actual_query)
+        
+        return [
+            {
+                'id': shift.id,
+                'user_id': shift.user_id,
+                'user_name': f"{first_name or ''} {last_name or ''}".strip(),
+                'object_id': shift.object_id,
+                'time_slot_id': shift.time_slot_id,
+                'start_time': shift.start_time,
+                'end_time': shift.end_time,
+                'status': shift.status,
+                'hourly_rate': float(shift.hourly_rate) if shift.hourly_rate else None,
+                'total_hours': float(shift.total_hours) if shift.total_hours else None,
+                'total_payment': float(shift.total_payment) if shift.total_payment else None,
+                'notes': shift.notes,
+                'is_planned': shift.is_planned,
+                'schedule_id': shift.schedule_id,
+                'start_coordinates': shift.start_coordinates,
+                'end_coordinates': shift.end_coordinates,
+            }
+            for shift, first_name, last_name in actual_result.all()
+        ]
+    
+    def _build_actual_shifts(
+        self,
+        rows: List[Dict[str, Any]],
+        objects_map: Dict[int, Dict[str, Any]]
+    ) -> List[CalendarShift]:
+        """Построить фактические смены календаря."""
+        calendar_shifts = []
+        for row in rows:
+            obj_info = objects_map.get(row['object_id'])
+            if not obj_info:
+                continue
+            
+            # Определяем тип смены
+            if row['status'] == "completed":
+                shift_type = ShiftType.COMPLETED
+            else:
+                shift_type = ShiftType.ACTIVE  # По умолчанию
+            
+            calendar_shifts.append(CalendarShift(
+                id=row['id'],
+                user_id=row['user_id'],
+                user_name=row['user_name'],
+                object_id=row['object_id'],
+                object_name=obj_info['name'],
+                time_slot_id=row['time_slot_id'],
+                start_time=row['start_time'],  # Отключаем конвертацию - делается в API
+                end_time=row['end_time'],  # Отключаем конвертацию - делается в API
+                shift_type=shift_type,
+                status=ShiftStatus(row['status']),
+                hourly_rate=row['hourly_rate'],
+                total_hours=row['total_hours'],
+                total_payment=row['total_payment'],
+                notes=row['notes'],
+                is_planned=row['is_planned'],
+                schedule_id=row['schedule_id'],
+                actual_shift_id=row['id'],
+                start_coordinates=row['start_coordinates'],
+                end_coordinates=row['end_coordinates'],
+                can_edit=obj_info.get('can_edit', False),
+                can_cancel=obj_info.get('can_edit_schedule', False),
+                can_view=obj_info.get('can_view', True),
+                timezone=obj_info.get('timezone', 'Europe/Moscow')
+            ))
+        
+        return calendar_shifts
+    
     @staticmethod
     def _format_minutes(value: float) -> str:
         """Форматирует минуты в строку вида '8 ч 24 м'."""
@@ -490,6 +619,13 @@ class CalendarFilterService:
             parts.append(f"{minutes} м")
         return " ".join(parts)
 
+    @staticmethod
+    def _shift_bounds(shift: CalendarShift) -> Tuple[Optional[datetime], Optional[datetime]]:
+        """Интервал смены: плановый для запланированных, фактический для остальных."""
+        if shift.shift_type == ShiftType.PLANNED:
+            return shift.planned_start or shift.start_time, shift.planned_end or shift.end_time
+        return shift.start_time or shift.planned_start, shift.end_time or shift.planned_end
+
     def _update_timeslot_statuses(
         self,
         timeslots: List[CalendarTimeslot],
@@ -530,14 +666,58 @@ class CalendarFilterService:
                 ShiftStatus.CONFIRMED
             }
 
+            # Занятость всех тайм-слотов объекта-дня считается одним проходом
+            # (timeslot_capacity_service); смены без привязки к слоту относятся
+            # к дню своего начала по времени объекта
+            slots_by_id = {timeslot.id: timeslot for timeslot in timeslots}
+            windows_by_day: Dict[Tuple[int, date], List[SlotWindow]] = defaultdict(list)
+            for timeslot in timeslots:
+                windows_by_day[(timeslot.object_id, timeslot.date)].append(SlotWindow.local(
+                    timeslot.id,
+                    timeslot.date,
+                    timeslot.start_time,
+                    timeslot.end_time,
+                    timeslot.max_employees,
+                    get_object_timezone(timeslot.object_id)
+                ))
+
+            bookings_by_day: Dict[Tuple[int, date], List[Booking]] = defaultdict(list)
+            for shift in shifts:
+                # Учитываем все смены для вычисления current_employees (включая активные)
+                if shift.status not in allowed_shift_statuses and shift.status != ShiftStatus.ACTIVE:
+                    continue
+                start_dt, end_dt = self._shift_bounds(shift)
+                if not start_dt:
+                    continue
+                booking = Booking(
+                    start=as_utc(start_dt),
+                    end=as_utc(end_dt) if end_dt else None,
+                    time_slot_id=shift.time_slot_id
+                )
+                if shift.time_slot_id:
+                    slot = slots_by_id.get(shift.time_slot_id)
+                    if slot is None:
+                        continue
+                    day_key = (slot.object_id, slot.date)
+                elif shift.object_id:
+                    local_start = booking.start.astimezone(get_object_timezone(shift.object_id))
+                    day_key = (shift.object_id, local_start.date())
+                else:
+                    continue
+                bookings_by_day[day_key].append(booking)
+
+            capacity_by_slot: Dict[int, SlotCapacity] = {}
+            for day_key, windows in windows_by_day.items():
+                capacity_by_slot.update(compute_capacity(windows, bookings_by_day.get(day_key, ())))
+
             for timeslot in timeslots:
                 tz = get_object_timezone(timeslot.object_id)
 
                 slot_start_local = tz.localize(datetime.combine(timeslot.date, timeslot.start_time))
                 slot_end_local = tz.localize(datetime.combine(timeslot.date, timeslot.end_time))
-                slot_duration_minutes = max(0, (slot_end_local - slot_start_local).total_seconds() / 60)
                 max_employees = timeslot.max_employees if timeslot.max_employees else 1
-                capacity_minutes = slot_duration_minutes * max_employees
+                capacity = capacity_by_slot[timeslot.id]
+                capacity_minutes = capacity.capacity_minutes
                 now_local = now_utc.astimezone(tz)
 
                 # Для тайм-слотов, которые уже начались, помечаем как HIDDEN, но НЕ пропускаем
@@ -549,28 +729,14 @@ class CalendarFilterService:
 
                 direct_shifts = shifts_by_timeslot.get(timeslot.id, [])
                 fallback_candidates = fallback_shifts_by_object.get(timeslot.object_id, [])
-                
-                # Логирование для отладки тайм-слота 4468
-                if timeslot.id == 4468:
-                    logger.info(
-                        f"Timeslot 4468 debug: direct_shifts={len(direct_shifts)}, fallback_candidates={len(fallback_candidates)}",
-                        extra={
-                            "timeslot_id": 4468,
-                            "direct_shifts": [{"id": s.id, "type": s.shift_type, "status": s.status, "time_slot_id": s.time_slot_id} for s in direct_shifts],
-                            "fallback_candidates": [{"id": s.id, "type": s.shift_type, "status": s.status, "time_slot_id": s.time_slot_id} for s in fallback_candidates[:5]]  # Первые 5
-                        }
-                    )
 
-                overlap_intervals: List[tuple[datetime, datetime]] = []
-                concurrency_events: List[tuple[datetime, int]] = []
                 shift_details = []
                 actual_intervals = []
 
                 def register_interval(
                     shift: CalendarShift,
                     start_dt: Optional[datetime],
-                    end_dt: Optional[datetime],
-                    include_in_details: bool
+                    end_dt: Optional[datetime]
                 ) -> None:
                     if not start_dt:
                         return
@@ -591,55 +757,21 @@ class CalendarFilterService:
                     if overlap_end <= overlap_start:
                         return
 
-                    overlap_intervals.append((overlap_start, overlap_end))
-                    concurrency_events.append((overlap_start, 1))
-                    concurrency_events.append((overlap_end, -1))
-
-                    if include_in_details:
-                        shift_details.append({
-                            "shift": shift,
-                            "start_local": overlap_start,
-                            "end_local": overlap_end
-                        })
-                        if shift.shift_type in (ShiftType.ACTIVE, ShiftType.COMPLETED):
-                            actual_intervals.append((overlap_start, overlap_end))
+                    shift_details.append({
+                        "shift": shift,
+                        "start_local": overlap_start,
+                        "end_local": overlap_end
+                    })
+                    if shift.shift_type in (ShiftType.ACTIVE, ShiftType.COMPLETED):
+                        actual_intervals.append((overlap_start, overlap_end))
 
                 for shift in direct_shifts:
-                    # Регистрируем все смены для вычисления current_employees (включая активные)
-                    # Но для других целей используем allowed_shift_statuses
-                    if shift.status not in allowed_shift_statuses and shift.status != ShiftStatus.ACTIVE:
-                        continue
-                    if shift.shift_type == ShiftType.PLANNED:
-                        start_dt = shift.planned_start or shift.start_time
-                        end_dt = shift.planned_end or shift.end_time
-                    else:
-                        start_dt = shift.start_time or shift.planned_start
-                        end_dt = shift.end_time or shift.planned_end
-                    register_interval(shift, start_dt, end_dt, include_in_details=True)
-
-                for shift in fallback_candidates:
-                    # Регистрируем все смены для вычисления current_employees (включая активные)
                     if shift.status not in allowed_shift_statuses and shift.status != ShiftStatus.ACTIVE:
                         continue
-                    if shift.shift_type == ShiftType.PLANNED:
-                        start_dt = shift.planned_start or shift.start_time
-                        end_dt = shift.planned_end or shift.end_time
-                    else:
-                        start_dt = shift.start_time or shift.planned_start
-                        end_dt = shift.end_time or shift.planned_end
-
-                    if not start_dt:
-                        continue
-                    start_aware = start_dt if start_dt.tzinfo else pytz.UTC.localize(start_dt)
-                    if start_aware.astimezone(tz).date() != timeslot.date:
-                        continue
-
-                    register_interval(shift, start_dt, end_dt, include_in_details=False)
-
-                occupied_minutes = 0.0
-                for interval_start, interval_end in overlap_intervals:
-                    occupied_minutes += max(0, (interval_end - interval_start).total_seconds() / 60)
+                    start_dt, end_dt = self._shift_bounds(shift)
+                    register_interval(shift, start_dt, end_dt)
 
+                occupied_minutes = capacity.occupied_minutes
                 if capacity_minutes > 0:
                     occupied_minutes = min(capacity_minutes, occupied_minutes)
                     free_minutes = max(0, capacity_minutes - occupied_minutes)
@@ -653,14 +785,7 @@ class CalendarFilterService:
                 timeslot.free_minutes = round(free_minutes, 2)
                 timeslot.occupancy_ratio = occupancy_ratio
 
-                concurrency_events.sort(key=lambda item: (item[0], -item[1]))
-                current_concurrency = 0
-                max_concurrency = 0
-                for _, delta in concurrency_events:
-                    current_concurrency += delta
-                    max_concurrency = max(max_concurrency, current_concurrency)
-
-                max_concurrency = min(max_employees, max_concurrency)
+                max_concurrency = min(max_employees, capacity.peak)
                 timeslot.current_employees = max_concurrency
                 timeslot.available_slots = max(0, max_employees - max_concurrency)
 
@@ -755,9 +880,11 @@ class CalendarFilterService:
                     # Если тайм-слот уже начался и есть активные смены, то нельзя добавить новую смену
                     # Все треки уже заняты (даже если current_employees < max_employees)
                     has_free_track = False
+                    # Выполняется для каждого тайм-слота каждого запроса календаря
                     logger.info(
                         f"Timeslot {timeslot.id}: has_free_track=False (current day slot with active shifts)",
-                        extra={
+                        rate_limit=60,
+                        lazy=lambda: {
                             "timeslot_id": timeslot.id,
                             "slot_started": slot_started,
                             "slot_not_ended": slot_not_ended,
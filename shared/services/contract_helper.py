@@ -6,7 +6,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from domain.entities.contract import Contract
 from domain.entities.object import Object
-from domain.entities.org_structure import OrgStructureUnit
+from shared.services.org_structure_closure_service import get_unit_settings
 
 
 async def get_inherited_payment_schedule_id(
@@ -61,25 +61,11 @@ async def get_inherited_payment_schedule_id(
     if not obj.org_unit_id:
         return None
     
-    # ПРИОРИТЕТ 3-4+: Получить график от подразделения (с учетом наследования по цепочке)
-    # Реализуем логику вручную, чтобы избежать lazy loading
-    current_unit_id = obj.org_unit_id
-    
-    while current_unit_id:
-        result = await session.execute(
-            select(OrgStructureUnit).where(OrgStructureUnit.id == current_unit_id)
-        )
-        unit = result.scalar_one_or_none()
-        
-        if not unit:
-            break
-        
-        # Если у подразделения есть явный график - вернуть его
-        if unit.payment_schedule_id:
-            return unit.payment_schedule_id
-        
-        # Иначе идем к родителю
-        current_unit_id = unit.parent_id
+    # ПРИОРИТЕТ 3-4+: График подразделения с учетом наследования по цепочке
+    # (проекция org_unit_effective_settings, без lazy loading родителей)
+    unit_settings = await get_unit_settings(session, obj.org_unit_id)
+    if unit_settings and unit_settings.payment_schedule_id:
+        return unit_settings.payment_schedule_id
     
     return None
 
@@ -7,6 +7,7 @@ from io import BytesIO
 from typing import Any, Dict, Optional
 
 from core.logging.logger import logger
+from core.pdf.render_pool import content_cache_key, pdf_render_pool, render_html
 
 
 _CSS = """
@@ -19,6 +20,9 @@ p { text-align: justify; margin: 0.3em 0; }
 .pep-block strong { display: inline-block; min-width: 180px; }
 """
 
+# Воркеры пула разбирают стили договора при старте
+pdf_render_pool.add_stylesheet(_CSS)
+
 
 def _render_pep_block(pep_metadata: Dict[str, Any]) -> str:
     """Блок «Подписано ПЭП» для вставки в конец PDF."""
@@ -56,13 +60,11 @@ class ContractPdfService:
         Returns:
             bytes — содержимое PDF-файла.
         """
-        import weasyprint
-
         pep_block = _render_pep_block(pep_metadata) if pep_metadata else ""
 
         full_html = f"""<!DOCTYPE html>
 <html lang="ru">
-<head><meta charset="utf-8"><style>{_CSS}</style></head>
+<head><meta charset="utf-8"></head>
 <body>
 {contract_html}
 {pep_block}
@@ -70,8 +72,13 @@ class ContractPdfService:
 </html>"""
 
         try:
-            doc = weasyprint.HTML(string=full_html)
-            pdf_bytes = doc.write_pdf()
+            pdf_bytes = await pdf_render_pool.render(
+                "signed_contract",
+                render_html,
+                full_html,
+                _CSS,
+                cache_key=content_cache_key("signed_contract", full_html, _CSS)
+            )
             logger.info("Contract PDF generated", size=len(pdf_bytes))
             return pdf_bytes
         except Exception as e:
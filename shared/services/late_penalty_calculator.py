@@ -9,8 +9,8 @@ from sqlalchemy.orm import selectinload
 
 from domain.entities.shift import Shift
 from domain.entities.object import Object
-from domain.entities.org_structure import OrgStructureUnit
 from core.logging.logger import logger
+from shared.services.org_structure_closure_service import get_unit_settings
 
 
 class LatePenaltyCalculator:
@@ -28,8 +28,9 @@ class LatePenaltyCalculator:
         
         Логика наследования:
         1. Если object.inherit_late_settings == False → использовать настройки объекта
-        2. Если True → получить org_unit и вызвать org_unit.get_inherited_late_settings()
-        3. Подняться по иерархии до тех пор, пока не найдем настройки
+        2. Если True → взять эффективные настройки подразделения объекта
+           (проекция org_unit_effective_settings, та же логика, что
+           org_unit.get_inherited_late_settings())
         
         Args:
             obj: Объект
@@ -79,33 +80,30 @@ class LatePenaltyCalculator:
                 'inherited_from': None
             }
         
-        # Загружаем org_unit (если еще не загружен)
-        if not hasattr(obj, 'org_unit') or obj.org_unit is None:
-            query = select(OrgStructureUnit).where(OrgStructureUnit.id == obj.org_unit_id)
-            result = await self.session.execute(query)
-            org_unit = result.scalar_one_or_none()
-            
-            if not org_unit:
-                logger.warning(
-                    "Подразделение не найдено",
-                    org_unit_id=obj.org_unit_id,
-                    object_id=obj.id
-                )
-                return {
-                    'threshold_minutes': None,
-                    'penalty_per_minute': None,
-                    'inherited_from': None
-                }
-        else:
-            org_unit = obj.org_unit
+        # Настройки подразделения с учетом наследования — одна строка проекции
+        unit_settings = await get_unit_settings(self.session, obj.org_unit_id)
+        if not unit_settings:
+            logger.warning(
+                "Подразделение не найдено",
+                org_unit_id=obj.org_unit_id,
+                object_id=obj.id
+            )
+            return {
+                'threshold_minutes': None,
+                'penalty_per_minute': None,
+                'inherited_from': None
+            }
         
-        # Используем метод модели OrgStructureUnit для получения настроек с наследованием
-        inherited_settings = await self._get_org_unit_late_settings_recursive(org_unit)
+        inherited_settings = {
+            'threshold_minutes': unit_settings.late_threshold_minutes,
+            'penalty_per_minute': unit_settings.late_penalty_per_minute,
+            'inherited_from': unit_settings.late_source_name
+        }
         
         logger.debug(
             "Настройки получены с наследованием",
             object_id=obj.id,
-            org_unit_id=org_unit.id,
+            org_unit_id=obj.org_unit_id,
             inherited_from=inherited_settings.get('inherited_from'),
             threshold=inherited_settings.get('threshold_minutes'),
             penalty=float(inherited_settings.get('penalty_per_minute') or 0)
@@ -113,49 +111,6 @@ class LatePenaltyCalculator:
         
         return inherited_settings
     
-    async def _get_org_unit_late_settings_recursive(
-        self,
-        org_unit: OrgStructureUnit
-    ) -> Dict[str, Any]:
-        """
-        Рекурсивно получить настройки штрафов из org_unit с учетом наследования.
-        
-        Args:
-            org_unit: Подразделение
-            
-        Returns:
-            dict: Настройки штрафов
-        """
-        # Если подразделение НЕ наследует настройки и они заданы, возвращаем их
-        if (not org_unit.inherit_late_settings and 
-            org_unit.late_threshold_minutes is not None and 
-            org_unit.late_penalty_per_minute is not None):
-            return {
-                'threshold_minutes': org_unit.late_threshold_minutes,
-                'penalty_per_minute': org_unit.late_penalty_per_minute,
-                'inherited_from': org_unit.name
-            }
-        
-        # Если наследует или настройки не заданы, идем к родителю
-        if org_unit.parent_id:
-            # Загружаем родителя
-            if not hasattr(org_unit, 'parent') or org_unit.parent is None:
-                query = select(OrgStructureUnit).where(OrgStructureUnit.id == org_unit.parent_id)
-                result = await self.session.execute(query)
-                parent = result.scalar_one_or_none()
-                
-                if parent:
-                    return await self._get_org_unit_late_settings_recursive(parent)
-            elif org_unit.parent:
-                return await self._get_org_unit_late_settings_recursive(org_unit.parent)
-        
-        # Настройки нигде не определены
-        return {
-            'threshold_minutes': None,
-            'penalty_per_minute': None,
-            'inherited_from': None
-        }
-    
     async def calculate_late_penalty(
         self,
         shift: Shift,
@@ -1,6 +1,6 @@
 """Сервис привязок мессенджеров и OAuth к пользователям."""
 
-from typing import Optional
+from typing import Dict, Iterable, Optional
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -68,3 +68,19 @@ async def get_max_external_user_id_for_user(
     result = await session.execute(stmt)
     ext = result.scalar_one_or_none()
     return str(ext) if ext else None
+
+
+async def get_max_external_user_ids_for_users(
+    session: AsyncSession,
+    user_ids: Iterable[int],
+) -> Dict[int, str]:
+    """external_user_id для MAX по набору user_id одним запросом."""
+    user_ids = list(set(user_ids))
+    if not user_ids:
+        return {}
+    stmt = select(MessengerAccount.user_id, MessengerAccount.external_user_id).where(
+        MessengerAccount.user_id.in_(user_ids),
+        MessengerAccount.provider == "max",
+    )
+    result = await session.execute(stmt)
+    return {user_id: str(ext) for user_id, ext in result.all() if ext}
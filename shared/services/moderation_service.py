@@ -12,6 +12,7 @@ from sqlalchemy import select, and_, or_, func
 from core.logging.logger import logger
 from domain.entities.review import Review, ReviewAppeal
 from domain.entities.user import User
+from shared.services.rating_service import RatingService
 
 
 class ModerationService:
@@ -62,6 +63,9 @@ class ModerationService:
                 logger.warning(f"Review {review_id} is not pending moderation")
                 return False
             
+            rating_service = RatingService(self.session)
+            was_counted = await rating_service.is_review_counted(review)
+            
             # Обновляем статус отзыва
             review.status = decision
             review.moderation_notes = notes
@@ -72,6 +76,8 @@ class ModerationService:
             else:
                 logger.info(f"Review {review_id} rejected by moderator {moderator_id}")
             
+            # Рейтинг цели обновляется в той же транзакции
+            await rating_service.apply_review_change(review, was_counted)
             await self.session.commit()
             
             # Отправляем уведомления (TODO: интеграция с системой уведомлений)
@@ -1,8 +1,10 @@
 """Диспетчер уведомлений для StaffProBot."""
 
+from collections import defaultdict
 from typing import Optional, Dict, Any, List
 from datetime import datetime, timezone
 
+from core.config.settings import settings
 from core.logging.logger import logger
 from core.database.session import get_async_session
 from domain.entities.notification import (
@@ -15,11 +17,16 @@ from sqlalchemy import select
 
 from .notification_service import NotificationService
 from .notification_auto_login_vars import enrich_variables_with_action_link
-from .messenger_account_service import get_max_external_user_id_for_user
+from .messenger_account_service import (
+    get_max_external_user_id_for_user,
+    get_max_external_user_ids_for_users,
+)
 from .senders.telegram_sender import get_telegram_sender
 from .senders.max_sender import get_max_sender
 from .senders.email_sender import get_email_sender
 from .senders.sms_sender import get_sms_sender
+from .senders.bulk_sender import BulkMessage, BulkSender
+from shared.templates.notifications.registry import notification_templates
 
 
 class NotificationDispatcher:
@@ -51,6 +58,9 @@ class NotificationDispatcher:
             True если успешно отправлено
         """
         try:
+            # Актуальные кастомные шаблоны (запрос к БД только после их изменения)
+            await notification_templates.refresh()
+            
             # Получаем уведомление из БД
             async with get_async_session() as session:
                 query = select(Notification).where(Notification.id == notification_id)
@@ -272,36 +282,101 @@ class NotificationDispatcher:
     
     async def dispatch_bulk(
         self,
-        notification_ids: List[int]
+        notification_ids: List[int],
+        concurrency: Optional[int] = None
     ) -> Dict[str, Any]:
         """
         Массовая отправка уведомлений.
         
+        Уведомления и получатели загружаются одним набором запросов,
+        отправка идет параллельно через BulkSender (порядок внутри
+        получателя сохраняется), статусы обновляются групповыми UPDATE.
+        
         Args:
             notification_ids: Список ID уведомлений
+            concurrency: Максимум одновременных отправок (по умолчанию из settings)
             
         Returns:
-            Статистика: {total: int, sent: int, failed: int}
+            Статистика: {total, sent, failed, latency}
         """
-        stats = {
+        stats: Dict[str, Any] = {
             "total": len(notification_ids),
             "sent": 0,
             "failed": 0
         }
+        if not notification_ids:
+            return stats
         
-        for notification_id in notification_ids:
-            success = await self.dispatch_notification(notification_id)
+        await notification_templates.refresh()
+        
+        async with get_async_session() as session:
+            result = await session.execute(
+                select(Notification).where(Notification.id.in_(notification_ids))
+            )
+            notifications = [
+                notification for notification in result.scalars().all()
+                if notification.status_enum == NotificationStatus.PENDING
+            ]
             
-            if success:
-                stats["sent"] += 1
-            else:
-                stats["failed"] += 1
+            user_ids = {notification.user_id for notification in notifications}
+            users_result = await session.execute(select(User).where(User.id.in_(user_ids)))
+            users_map = {user.id: user for user in users_result.scalars().all()}
+            
+            max_accounts = await get_max_external_user_ids_for_users(
+                session,
+                [
+                    n.user_id for n in notifications
+                    if n.channel in (NotificationChannel.MAX.value, NotificationChannel.MAX.name)
+                ]
+            )
+        
+        errors: Dict[int, Optional[str]] = {}
+        messages = []
+        for notification in notifications:
+            user = users_map.get(notification.user_id)
+            if not user:
+                logger.error(f"User {notification.user_id} not found for notification {notification.id}")
+                errors[notification.id] = "User not found"
+                continue
+            messages.append(BulkMessage(
+                chat_key=(notification.channel, user.id),
+                send=lambda n=notification, u=user: self._send_via_channel(
+                    notification=n,
+                    user=u,
+                    max_external_user_id=max_accounts.get(u.id)
+                ),
+                ref=notification.id
+            ))
+        
+        sender = BulkSender(
+            concurrency=concurrency or settings.notification_dispatch_concurrency,
+            throttle=self.telegram_sender.throttle
+        )
+        report = await sender.send(messages)
+        errors.update(report.results)
+        
+        sent_ids = [notification_id for notification_id, error in errors.items() if error is None]
+        failed_by_error: Dict[str, List[int]] = defaultdict(list)
+        for notification_id, error in errors.items():
+            if error is not None:
+                failed_by_error[error].append(notification_id)
+        
+        await self.notification_service.update_notifications_status(sent_ids, NotificationStatus.SENT)
+        for error, ids in failed_by_error.items():
+            await self.notification_service.update_notifications_status(
+                ids, NotificationStatus.FAILED, error_message=error
+            )
+        
+        stats["sent"] = len(sent_ids)
+        stats["failed"] = len(errors) - len(sent_ids)
+        stats["latency"] = report.as_dict()["latency"]
         
         logger.info(
             f"Bulk dispatch completed",
             total=stats["total"],
             sent=stats["sent"],
-            failed=stats["failed"]
+            failed=stats["failed"],
+            p95_ms=stats["latency"]["p95_ms"]
         )
         
         return stats
@@ -7,7 +7,7 @@ from sqlalchemy import select, and_, or_, func, desc, text
 from sqlalchemy.orm import selectinload
 from core.database.session import get_async_session
 from core.logging.logger import logger
-from core.cache.redis_cache import cached
+from core.cache.memoize import cached
 from core.cache.cache_service import CacheService
 from domain.entities.notification import (
     Notification,
@@ -164,7 +164,7 @@ class NotificationService:
                 )
         return tg, max_n
 
-    @cached(ttl=timedelta(minutes=5), key_prefix="user_notifications")
+    @cached(ttl=timedelta(minutes=5), key_prefix="user_notifications", serialize="pickle")
     async def get_user_notifications(
         self,
         user_id: int,
@@ -686,6 +686,54 @@ class NotificationService:
             logger.error(f"Error updating notification {notification_id} status: {e}")
             return False
     
+    async def update_notifications_status(
+        self,
+        notification_ids: List[int],
+        status: NotificationStatus,
+        error_message: Optional[str] = None
+    ) -> int:
+        """
+        Обновление статуса нескольких уведомлений одним UPDATE.
+        
+        Args:
+            notification_ids: ID уведомлений
+            status: Новый статус
+            error_message: Сообщение об ошибке (если failed)
+            
+        Returns:
+            Количество обновленных уведомлений
+        """
+        if not notification_ids:
+            return 0
+        try:
+            async with get_async_session() as session:
+                status_value = status.value if isinstance(status, NotificationStatus) else status
+                assignments = ["status = :status"]
+                params: Dict[str, Any] = {"status": status_value, "ids": list(notification_ids)}
+                
+                if status == NotificationStatus.SENT:
+                    assignments.append("sent_at = :now")
+                    params["now"] = datetime.now(timezone.utc)
+                elif status == NotificationStatus.READ:
+                    assignments.append("read_at = :now")
+                    params["now"] = datetime.now(timezone.utc)
+                if error_message:
+                    assignments.append("error_message = :error_message, retry_count = retry_count + 1")
+                    params["error_message"] = error_message
+                
+                result = await session.execute(
+                    text(f"UPDATE notifications SET {', '.join(assignments)} WHERE id = ANY(:ids)"),
+                    params
+                )
+                await session.commit()
+                
+                await CacheService.invalidate_tags("user_notifications", "unread_count")
+                return result.rowcount or 0
+                
+        except Exception as e:
+            logger.error(f"Error updating status of {len(notification_ids)} notifications: {e}")
+            return 0
+    
     async def _invalidate_user_cache(self, user_id: int) -> None:
         """
         Инвалидация кэша уведомлений пользователя.
@@ -696,9 +744,8 @@ class NotificationService:
         try:
             # Ключи кэша формируются как: {key_prefix}:{func_name}:{args_hash}
             # Нужно инвалидировать все ключи с префиксами user_notifications и unread_count
-            # Используем широкие паттерны для инвалидации всех ключей этих префиксов
-            await CacheService.invalidate_pattern(f"user_notifications:*")
-            await CacheService.invalidate_pattern(f"unread_count:*")
+            # @cached помечает записи тегом = key_prefix, поэтому сбрасываем теги
+            await CacheService.invalidate_tags("user_notifications", "unread_count")
             
             logger.debug(f"Invalidated notification cache for user {user_id}")
             
@@ -1,6 +1,6 @@
 """Сервис управления состоянием объектов (открыт/закрыт)."""
 
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterable, Set
 from datetime import datetime, date
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -50,6 +50,25 @@ class ObjectOpeningService:
         )
         return is_open
     
+    async def get_open_object_ids(self, object_ids: Iterable[int]) -> Set[int]:
+        """Какие из объектов сейчас открыты (один запрос на весь список).
+        
+        Args:
+            object_ids: ID объектов
+            
+        Returns:
+            Множество ID открытых объектов
+        """
+        object_ids = list(object_ids)
+        if not object_ids:
+            return set()
+        query = select(ObjectOpening.object_id).where(
+            ObjectOpening.object_id.in_(object_ids),
+            ObjectOpening.closed_at.is_(None)
+        )
+        result = await self.db.execute(query)
+        return set(result.scalars().all())
+    
     async def get_active_opening(self, object_id: int) -> Optional[ObjectOpening]:
         """Получить активную запись открытия объекта.
         
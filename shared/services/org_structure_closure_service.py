@@ -0,0 +1,375 @@
+"""Замыкание иерархии подразделений и проекция эффективных настроек.
+
+Наследование системы оплаты, графика выплат, профиля организации и штрафов
+(опоздание, отмена смены) раньше вычислялось обходом OrgStructureUnit.parent:
+запрос на каждый уровень или цепочки selectinload фиксированной глубины.
+
+Здесь дерево владельца пересчитывается целиком при каждом изменении
+подразделений (деревья небольшие — десятки узлов, пересчет в памяти):
+- org_structure_closure — все пары предок/потомок с глубиной;
+- org_unit_effective_settings — результат наследования по всей цепочке.
+
+Чтения — один запрос по индексу. Правила наследования те же, что в
+OrgStructureUnit.get_inherited_* и Object.get_effective_*: свои штрафы за
+опоздание подразделение задает при выключенном наследовании и заданных
+пороге и ставке, штрафы за отмену — при выключенном наследовании и заданном
+сроке уведомления; иначе значения берутся у родителя.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import bindparam, delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from core.logging.logger import logger
+from domain.entities.object import Object
+from domain.entities.org_structure import (
+    OrgStructureClosure,
+    OrgStructureUnit,
+    OrgUnitEffectiveSettings,
+)
+
+
+UNIT_COLUMNS = (
+    OrgStructureUnit.id,
+    OrgStructureUnit.parent_id,
+    OrgStructureUnit.owner_id,
+    OrgStructureUnit.name,
+    OrgStructureUnit.level,
+    OrgStructureUnit.payment_system_id,
+    OrgStructureUnit.payment_schedule_id,
+    OrgStructureUnit.organization_profile_id,
+    OrgStructureUnit.inherit_late_settings,
+    OrgStructureUnit.late_threshold_minutes,
+    OrgStructureUnit.late_penalty_per_minute,
+    OrgStructureUnit.inherit_cancellation_settings,
+    OrgStructureUnit.cancellation_short_notice_hours,
+    OrgStructureUnit.cancellation_short_notice_fine,
+    OrgStructureUnit.cancellation_invalid_reason_fine,
+)
+
+LATE_FIELDS = ("late_threshold_minutes", "late_penalty_per_minute", "late_source_unit_id", "late_source_name")
+CANCELLATION_FIELDS = (
+    "cancellation_short_notice_hours",
+    "cancellation_short_notice_fine",
+    "cancellation_invalid_reason_fine",
+    "cancellation_source_unit_id",
+    "cancellation_source_name",
+)
+
+
+def build_closure(units: Iterable[Any]) -> List[Dict[str, int]]:
+    """
+    Строки замыкания (ancestor_id, descendant_id, depth) для набора подразделений.
+
+    Args:
+        units: Строки/объекты с полями id, parent_id
+
+    Returns:
+        List[Dict]: Строки для org_structure_closure (включая depth=0 для самого узла)
+    """
+    parents = {unit.id: unit.parent_id for unit in units}
+    rows = []
+    for unit_id in parents:
+        current, depth, seen = unit_id, 0, set()
+        while current is not None and current in parents and current not in seen:  # защита от цикла в данных
+            seen.add(current)
+            rows.append({"ancestor_id": current, "descendant_id": unit_id, "depth": depth})
+            current = parents[current]
+            depth += 1
+    return rows
+
+
+def _effective_row(unit: Any, inherited: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    inherited = inherited or {}
+    row = {
+        "unit_id": unit.id,
+        "owner_id": unit.owner_id,
+        "payment_system_id": (
+            unit.payment_system_id if unit.payment_system_id is not None else inherited.get("payment_system_id")
+        ),
+        "payment_schedule_id": (
+            unit.payment_schedule_id if unit.payment_schedule_id is not None else inherited.get("payment_schedule_id")
+        ),
+        "organization_profile_id": unit.organization_profile_id or inherited.get("organization_profile_id"),
+    }
+
+    if (
+        not unit.inherit_late_settings
+        and unit.late_threshold_minutes is not None
+        and unit.late_penalty_per_minute is not None
+    ):
+        row.update(
+            late_threshold_minutes=unit.late_threshold_minutes,
+            late_penalty_per_minute=unit.late_penalty_per_minute,
+            late_source_unit_id=unit.id,
+            late_source_name=unit.name,
+        )
+    else:
+        row.update({field: inherited.get(field) for field in LATE_FIELDS})
+
+    if not unit.inherit_cancellation_settings and unit.cancellation_short_notice_hours is not None:
+        row.update(
+            cancellation_short_notice_hours=unit.cancellation_short_notice_hours,
+            cancellation_short_notice_fine=unit.cancellation_short_notice_fine,
+            cancellation_invalid_reason_fine=unit.cancellation_invalid_reason_fine,
+            cancellation_source_unit_id=unit.id,
+            cancellation_source_name=unit.name,
+        )
+    else:
+        row.update({field: inherited.get(field) for field in CANCELLATION_FIELDS})
+
+    return row
+
+
+def resolve_effective_settings(units: Iterable[Any]) -> Dict[int, Dict[str, Any]]:
+    """
+    Эффективные настройки каждого подразделения (один проход сверху вниз).
+
+    Args:
+        units: Строки/объекты со столбцами UNIT_COLUMNS
+
+    Returns:
+        Dict[int, Dict]: unit_id -> строка для org_unit_effective_settings
+    """
+    by_id = {unit.id: unit for unit in units}
+    resolved: Dict[int, Dict[str, Any]] = {}
+    for unit_id in by_id:
+        chain = []
+        current = unit_id
+        while current is not None and current in by_id and current not in resolved and current not in chain:
+            chain.append(current)
+            current = by_id[current].parent_id
+        inherited = resolved.get(current)
+        for chain_id in reversed(chain):
+            resolved[chain_id] = _effective_row(by_id[chain_id], inherited)
+            inherited = resolved[chain_id]
+    return resolved
+
+
+def unit_levels(closure: Iterable[Dict[str, int]]) -> Dict[int, int]:
+    """Уровень подразделения = глубина до самого дальнего предка."""
+    levels: Dict[int, int] = {}
+    for row in closure:
+        if row["depth"] >= levels.get(row["descendant_id"], 0):
+            levels[row["descendant_id"]] = row["depth"]
+    return levels
+
+
+async def rebuild_owner_projection(session: AsyncSession, owner_id: int) -> None:
+    """
+    Пересчитать замыкание, эффективные настройки и уровни всех подразделений владельца.
+
+    Вызывается в транзакции изменения подразделений, коммит — на стороне вызывающего.
+    """
+    units = (
+        await session.execute(select(*UNIT_COLUMNS).where(OrgStructureUnit.owner_id == owner_id))
+    ).all()
+    closure = build_closure(units)
+    effective = resolve_effective_settings(units)
+
+    owner_unit_ids = select(OrgStructureUnit.id).where(OrgStructureUnit.owner_id == owner_id)
+    await session.execute(
+        delete(OrgStructureClosure).where(OrgStructureClosure.descendant_id.in_(owner_unit_ids))
+    )
+    await session.execute(
+        delete(OrgUnitEffectiveSettings).where(OrgUnitEffectiveSettings.owner_id == owner_id)
+    )
+    if closure:
+        await session.execute(insert(OrgStructureClosure), closure)
+    if effective:
+        await session.execute(insert(OrgUnitEffectiveSettings), list(effective.values()))
+
+    levels = unit_levels(closure)
+    changed_levels = [
+        {"unit_id": unit.id, "new_level": levels.get(unit.id, 0)}
+        for unit in units
+        if unit.level != levels.get(unit.id, 0)
+    ]
+    if changed_levels:
+        table = OrgStructureUnit.__table__
+        await session.execute(
+            table.update().where(table.c.id == bindparam("unit_id")).values(level=bindparam("new_level")),
+            changed_levels,
+        )
+
+    logger.debug(
+        "Org structure projection rebuilt",
+        owner_id=owner_id,
+        units=len(units),
+        closure_rows=len(closure),
+        levels_changed=len(changed_levels)
+    )
+
+
+async def get_unit_settings(session: AsyncSession, unit_id: int) -> Optional[OrgUnitEffectiveSettings]:
+    """
+    Эффективные настройки подразделения.
+
+    Если строки проекции нет (дерево изменено в обход OrgStructureService),
+    настройки считаются по дереву владельца в памяти, без записи.
+    """
+    result = await session.execute(
+        select(OrgUnitEffectiveSettings).where(OrgUnitEffectiveSettings.unit_id == unit_id)
+    )
+    settings_row = result.scalar_one_or_none()
+    if settings_row is not None:
+        return settings_row
+
+    owner_id = select(OrgStructureUnit.owner_id).where(OrgStructureUnit.id == unit_id).scalar_subquery()
+    units = (
+        await session.execute(select(*UNIT_COLUMNS).where(OrgStructureUnit.owner_id == owner_id))
+    ).all()
+    row = resolve_effective_settings(units).get(unit_id)
+    if row is None:
+        return None
+    logger.warning("Org unit effective settings missing, resolved in memory", unit_id=unit_id)
+    return OrgUnitEffectiveSettings(**row)
+
+
+async def load_unit_settings(
+    session: AsyncSession,
+    unit_ids: Iterable[Optional[int]]
+) -> Dict[int, OrgUnitEffectiveSettings]:
+    """Эффективные настройки нескольких подразделений одним запросом."""
+    ids = {unit_id for unit_id in unit_ids if unit_id}
+    if not ids:
+        return {}
+    result = await session.execute(
+        select(OrgUnitEffectiveSettings).where(OrgUnitEffectiveSettings.unit_id.in_(ids))
+    )
+    settings_by_unit = {row.unit_id: row for row in result.scalars().all()}
+    for unit_id in ids - settings_by_unit.keys():
+        settings_row = await get_unit_settings(session, unit_id)
+        if settings_row is not None:
+            settings_by_unit[unit_id] = settings_row
+    return settings_by_unit
+
+
+async def get_descendant_ids(
+    session: AsyncSession,
+    unit_ids: Iterable[int],
+    include_self: bool = True
+) -> Set[int]:
+    """ID всех потомков подразделений (любой глубины) одним запросом."""
+    ids = set(unit_ids)
+    if not ids:
+        return set()
+    query = select(OrgStructureClosure.descendant_id).where(OrgStructureClosure.ancestor_id.in_(ids))
+    if not include_self:
+        query = query.where(OrgStructureClosure.depth > 0)
+    result = await session.execute(query)
+    descendants = set(result.scalars().all())
+    return descendants | ids if include_self else descendants
+
+
+async def load_units_by_schedule(
+    session: AsyncSession,
+    owner_id: Optional[int] = None
+) -> Dict[int, Dict[int, Set[int]]]:
+    """
+    Активные подразделения, использующие график выплат (с учетом наследования), и их потомки.
+
+    Графики берутся из org_unit_effective_settings, потомки — из замыкания;
+    неактивные подразделения не учитываются.
+
+    Returns:
+        Dict: {payment_schedule_id: {owner_id: {unit_id, ...}}}
+    """
+    ancestor = aliased(OrgStructureUnit)
+    descendant = aliased(OrgStructureUnit)
+    query = (
+        select(
+            OrgUnitEffectiveSettings.payment_schedule_id,
+            OrgUnitEffectiveSettings.owner_id,
+            OrgStructureClosure.descendant_id
+        )
+        .join(ancestor, ancestor.id == OrgUnitEffectiveSettings.unit_id)
+        .join(OrgStructureClosure, OrgStructureClosure.ancestor_id == OrgUnitEffectiveSettings.unit_id)
+        .join(descendant, descendant.id == OrgStructureClosure.descendant_id)
+        .where(
+            OrgUnitEffectiveSettings.payment_schedule_id.isnot(None),
+            ancestor.is_active == True,
+            descendant.is_active == True
+        )
+    )
+    if owner_id is not None:
+        query = query.where(OrgUnitEffectiveSettings.owner_id == owner_id)
+
+    units_by_schedule: Dict[int, Dict[int, Set[int]]] = {}
+    for schedule_id, unit_owner_id, unit_id in (await session.execute(query)).all():
+        units_by_schedule.setdefault(schedule_id, {}).setdefault(unit_owner_id, set()).add(unit_id)
+    return units_by_schedule
+
+
+async def is_descendant(session: AsyncSession, ancestor_id: int, unit_id: int) -> bool:
+    """Является ли unit_id потомком ancestor_id (или им самим)."""
+    result = await session.execute(
+        select(OrgStructureClosure.depth).where(
+            OrgStructureClosure.ancestor_id == ancestor_id,
+            OrgStructureClosure.descendant_id == unit_id
+        )
+    )
+    return result.scalar_one_or_none() is not None
+
+
+def object_late_settings(obj: Object, unit_settings: Optional[Any]) -> Dict[str, Any]:
+    """Как Object.get_effective_late_settings(), но по проекции подразделения."""
+    if not obj.inherit_late_settings and obj.late_threshold_minutes is not None and obj.late_penalty_per_minute is not None:
+        return {
+            'threshold_minutes': obj.late_threshold_minutes,
+            'penalty_per_minute': obj.late_penalty_per_minute,
+            'source': 'object'
+        }
+    if unit_settings is not None and unit_settings.late_threshold_minutes is not None:
+        return {
+            'threshold_minutes': unit_settings.late_threshold_minutes,
+            'penalty_per_minute': unit_settings.late_penalty_per_minute,
+            'source': 'org_unit'
+        }
+    return {
+        'threshold_minutes': None,
+        'penalty_per_minute': None,
+        'source': 'default'
+    }
+
+
+def object_cancellation_settings(obj: Object, unit_settings: Optional[Any]) -> Dict[str, Any]:
+    """Как Object.get_cancellation_settings(), но по проекции подразделения."""
+    if not obj.inherit_cancellation_settings and obj.cancellation_short_notice_hours is not None:
+        return {
+            'short_notice_hours': obj.cancellation_short_notice_hours,
+            'short_notice_fine': obj.cancellation_short_notice_fine,
+            'invalid_reason_fine': obj.cancellation_invalid_reason_fine,
+            'source': 'object'
+        }
+    if unit_settings is not None and unit_settings.cancellation_short_notice_hours is not None:
+        return {
+            'short_notice_hours': unit_settings.cancellation_short_notice_hours,
+            'short_notice_fine': unit_settings.cancellation_short_notice_fine,
+            'invalid_reason_fine': unit_settings.cancellation_invalid_reason_fine,
+            'source': 'org_unit'
+        }
+    return {
+        'short_notice_hours': 24,
+        'short_notice_fine': None,
+        'invalid_reason_fine': None,
+        'source': 'default'
+    }
+
+
+async def get_object_late_settings(session: AsyncSession, obj: Object) -> Dict[str, Any]:
+    """Настройки штрафа за опоздание объекта: не больше одного запроса."""
+    unit_settings = None
+    if obj.org_unit_id and (obj.inherit_late_settings or obj.late_threshold_minutes is None or obj.late_penalty_per_minute is None):
+        unit_settings = await get_unit_settings(session, obj.org_unit_id)
+    return object_late_settings(obj, unit_settings)
+
+
+async def get_object_cancellation_settings(session: AsyncSession, obj: Object) -> Dict[str, Any]:
+    """Настройки штрафов за отмену смены объекта: не больше одного запроса."""
+    unit_settings = None
+    if obj.org_unit_id and (obj.inherit_cancellation_settings or obj.cancellation_short_notice_hours is None):
+        unit_settings = await get_unit_settings(session, obj.org_unit_id)
+    return object_cancellation_settings(obj, unit_settings)
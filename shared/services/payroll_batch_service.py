@@ -0,0 +1,623 @@
+"""Пакетное создание начислений по графикам выплат.
+
+Раньше задача обходила графики → подразделения → объекты → владельцев →
+договоры и на каждом уровне делала свои запросы (потомки подразделений,
+корректировки, существующие начисления, смены). Здесь расчет разбит на фазы:
+
+1. resolve — графики с выплатой в эту дату и договоры, которые по ним
+   рассчитываются (наследование графика — из org_unit_effective_settings);
+2. load — договоры, неприменённые корректировки, существующие начисления
+   и смены за все периоды загружаются несколькими запросами;
+3. compute — начисления считаются в памяти (логика та же, что была в задаче);
+4. write — новые начисления вставляются одним INSERT, обновления начислений
+   и корректировок выполняются пакетными UPDATE.
+
+Время каждой фазы возвращается в отчете.
+"""
+
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+
+from sqlalchemy import and_, bindparam, func, insert, or_, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.logging.logger import logger
+from domain.entities.contract import Contract
+from domain.entities.object import Object
+from domain.entities.payment_schedule import PaymentSchedule
+from domain.entities.payroll_adjustment import PayrollAdjustment
+from domain.entities.payroll_entry import PayrollEntry
+from domain.entities.shift import Shift
+from shared.services.org_structure_closure_service import load_unit_settings, load_units_by_schedule
+from shared.services.payment_schedule_service import get_payment_period_for_date
+
+
+# (employee_id, object_id, period_start, period_end)
+EntryKey = Tuple[int, int, date, date]
+
+INDIVIDUAL_BONUS_TYPES = ('task_bonus', 'manual_bonus', 'incident_refund')
+INDIVIDUAL_DEDUCTION_TYPES = ('task_penalty', 'manual_deduction', 'incident_deduction', 'late_start')
+
+
+@dataclass
+class PayrollTask:
+    """Расчет начислений договора за период графика."""
+
+    kind: str  # 'schedule' — график владельца/подразделения, 'individual' — индивидуальный график договора
+    schedule_id: int
+    period_start: date
+    period_end: date
+    contract: Contract
+
+
+@dataclass
+class AdjustmentRow:
+    adjustment: PayrollAdjustment
+    shift_date: Optional[date]
+    created_date: Optional[date]
+
+
+@dataclass
+class EntryDraft:
+    """Начисление, вычисленное в памяти (новое или обновление существующего)."""
+
+    key: EntryKey
+    contract_id: int
+    values: Dict[str, Any]
+    entry_id: Optional[int] = None  # None — нужно создать
+
+
+@dataclass
+class PayrollBatchResult:
+    entries_created: int = 0
+    entries_updated: int = 0
+    adjustments_applied: int = 0
+    errors: List[Any] = field(default_factory=list)
+    timings: Dict[str, float] = field(default_factory=dict)
+
+
+@contextmanager
+def _timed(timings: Dict[str, float], phase: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[phase] = round(time.perf_counter() - start, 3)
+
+
+class PayrollBatchService:
+    """Создание начислений по графикам выплат за дату одним пакетом."""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        # Состояние корректировок в ходе расчета: adjustment_id -> (is_applied, entry_id | EntryKey | None)
+        self._state: Dict[int, Tuple[bool, Union[int, EntryKey, None]]] = {}
+        self._changed_adjustments: Set[int] = set()
+        self._entries: Dict[EntryKey, EntryDraft] = {}
+        self._adjustments: Dict[int, List[AdjustmentRow]] = defaultdict(list)
+        self._shifts: Dict[int, Any] = {}
+        self._objects: Dict[int, Any] = {}
+
+    async def create_entries_by_schedule(self, today: date) -> PayrollBatchResult:
+        """
+        Создать/обновить начисления по всем графикам с датой выплаты today.
+
+        Изменения не коммитятся — commit выполняет вызывающий код.
+        """
+        result = PayrollBatchResult()
+
+        with _timed(result.timings, "resolve"):
+            tasks = await self._resolve_tasks(today)
+        if not tasks:
+            logger.info("No payroll tasks for date", date=today.isoformat())
+            return result
+
+        with _timed(result.timings, "load"):
+            await self._load(tasks)
+
+        with _timed(result.timings, "compute"):
+            for task in tasks:
+                try:
+                    if task.kind == "schedule":
+                        self._compute_schedule_task(task, today, result)
+                    else:
+                        self._compute_individual_task(task, result)
+                except Exception as e:
+                    error_msg = f"Error creating payroll entry for contract {task.contract.id}: {e}"
+                    logger.error(error_msg, schedule_id=task.schedule_id)
+                    result.errors.append(error_msg)
+
+        with _timed(result.timings, "write"):
+            await self._write()
+
+        logger.info(
+            "Payroll batch computed",
+            tasks=len(tasks),
+            entries_created=result.entries_created,
+            entries_updated=result.entries_updated,
+            adjustments_applied=result.adjustments_applied,
+            timings=result.timings
+        )
+        return result
+
+    # ------------------------------------------------------------------
+    # Фаза 1: графики и договоры
+    # ------------------------------------------------------------------
+
+    async def _resolve_tasks(self, today: date) -> List[PayrollTask]:
+        schedules_result = await self.session.execute(
+            select(PaymentSchedule)
+            .where(PaymentSchedule.is_active == True)
+            .order_by(PaymentSchedule.id)
+        )
+        due = []
+        for schedule in schedules_result.scalars().all():
+            payment_period = await get_payment_period_for_date(schedule, today)
+            if not payment_period:
+                continue
+            period_start = payment_period['period_start']
+            period_end = payment_period['period_end']
+            if period_start > period_end:
+                logger.warning(
+                    "Invalid period (start > end)",
+                    schedule_id=schedule.id,
+                    period_start=period_start.isoformat(),
+                    period_end=period_end.isoformat()
+                )
+                continue
+            due.append((schedule, period_start, period_end))
+
+        logger.info(f"Found {len(due)} payment schedules with payment on {today.isoformat()}")
+        if not due:
+            return []
+
+        units_by_schedule = await load_units_by_schedule(self.session)
+
+        contracts_result = await self.session.execute(
+            select(Contract)
+            .where(
+                or_(
+                    Contract.status == 'active',
+                    and_(
+                        Contract.status == 'terminated',
+                        Contract.settlement_policy == 'schedule'
+                    )
+                )
+            )
+            .order_by(Contract.id)
+        )
+        contracts = contracts_result.scalars().all()
+
+        first_object_ids = {c.allowed_objects[0] for c in contracts if c.allowed_objects}
+        objects_result = await self.session.execute(
+            select(
+                Object.id,
+                Object.owner_id,
+                Object.payment_schedule_id,
+                Object.org_unit_id,
+                Object.is_active
+            ).where(
+                or_(Object.is_active == True, Object.id.in_(first_object_ids))
+            )
+        )
+        self._objects = {row.id: row for row in objects_result.all()}
+        unit_settings = await load_unit_settings(
+            self.session, (obj.org_unit_id for obj in self._objects.values())
+        )
+
+        contracts_by_owner: Dict[int, List[Contract]] = defaultdict(list)
+        effective_schedule: Dict[int, Optional[int]] = {}
+        for contract in contracts:
+            contracts_by_owner[contract.owner_id].append(contract)
+            effective_schedule[contract.id] = self._effective_schedule_id(contract, unit_settings)
+
+        tasks: List[PayrollTask] = []
+        for schedule, period_start, period_end in due:
+            unit_ids = self._schedule_unit_ids(units_by_schedule, schedule)
+            owner_ids = sorted({
+                obj.owner_id for obj in self._objects.values()
+                if obj.is_active and obj.owner_id and (
+                    obj.payment_schedule_id == schedule.id or obj.org_unit_id in unit_ids
+                )
+            })
+            logger.info(
+                f"Processing schedule {schedule.id}: {schedule.name}",
+                period_start=period_start.isoformat(),
+                period_end=period_end.isoformat(),
+                owners=len(owner_ids)
+            )
+
+            for owner_id in owner_ids:
+                for contract in contracts_by_owner.get(owner_id, ()):
+                    if effective_schedule[contract.id] == schedule.id:
+                        tasks.append(PayrollTask("schedule", schedule.id, period_start, period_end, contract))
+
+            # Индивидуальные графики сотрудников
+            for contract in contracts:
+                if not contract.inherit_payment_schedule and contract.payment_schedule_id == schedule.id:
+                    tasks.append(PayrollTask("individual", schedule.id, period_start, period_end, contract))
+
+        return tasks
+
+    @staticmethod
+    def _schedule_unit_ids(
+        units_by_schedule: Dict[int, Dict[int, Set[int]]],
+        schedule: PaymentSchedule
+    ) -> Set[int]:
+        """Подразделения графика: владельца графика или всех владельцев для системного."""
+        by_owner = units_by_schedule.get(schedule.id, {})
+        if schedule.owner_id:
+            return by_owner.get(schedule.owner_id, set())
+        return set().union(*by_owner.values())
+
+    def _effective_schedule_id(
+        self,
+        contract: Contract,
+        unit_settings: Dict[int, Any]
+    ) -> Optional[int]:
+        """График договора (та же цепочка, что в get_inherited_payment_schedule_id)."""
+        if not contract.inherit_payment_schedule:
+            return contract.payment_schedule_id
+        if not contract.allowed_objects:
+            return None
+        obj = self._objects.get(contract.allowed_objects[0])
+        if not obj:
+            return None
+        if obj.payment_schedule_id:
+            return obj.payment_schedule_id
+        if not obj.org_unit_id:
+            return None
+        settings_row = unit_settings.get(obj.org_unit_id)
+        return settings_row.payment_schedule_id if settings_row else None
+
+    # ------------------------------------------------------------------
+    # Фаза 2: загрузка данных всех периодов
+    # ------------------------------------------------------------------
+
+    async def _load(self, tasks: List[PayrollTask]) -> None:
+        employee_ids = {task.contract.employee_id for task in tasks}
+        periods = {(task.period_start, task.period_end) for task in tasks}
+        range_start = min(start for start, _ in periods)
+        range_end = max(end for _, end in periods)
+
+        entries_result = await self.session.execute(
+            select(PayrollEntry)
+            .where(
+                PayrollEntry.employee_id.in_(employee_ids),
+                tuple_(PayrollEntry.period_start, PayrollEntry.period_end).in_(list(periods))
+            )
+            .order_by(PayrollEntry.id)
+        )
+        for entry in entries_result.scalars().all():
+            key = (entry.employee_id, entry.object_id, entry.period_start, entry.period_end)
+            if key not in self._entries:
+                self._entries[key] = EntryDraft(key, entry.contract_id, {}, entry_id=entry.id)
+        existing_ids = [draft.entry_id for draft in self._entries.values()]
+
+        shift_date = func.date(Shift.end_time)
+        created_date = func.date(PayrollAdjustment.created_at)
+        adjustments_result = await self.session.execute(
+            select(PayrollAdjustment, shift_date.label("shift_date"), created_date.label("created_date"))
+            .outerjoin(Shift, PayrollAdjustment.shift_id == Shift.id)
+            .where(
+                PayrollAdjustment.employee_id.in_(employee_ids),
+                or_(
+                    PayrollAdjustment.is_applied == False,
+                    PayrollAdjustment.payroll_entry_id.is_(None),
+                    PayrollAdjustment.payroll_entry_id.in_(existing_ids)
+                ),
+                or_(
+                    and_(
+                        PayrollAdjustment.shift_id.isnot(None),
+                        shift_date >= range_start,
+                        shift_date <= range_end
+                    ),
+                    and_(
+                        PayrollAdjustment.shift_id.is_(None),
+                        or_(
+                            and_(created_date >= range_start, created_date <= range_end),
+                            PayrollAdjustment.payroll_entry_id.in_(existing_ids)
+                        )
+                    )
+                )
+            )
+            .order_by(PayrollAdjustment.id)
+        )
+        for adjustment, adj_shift_date, adj_created_date in adjustments_result.all():
+            self._adjustments[adjustment.employee_id].append(
+                AdjustmentRow(adjustment, adj_shift_date, adj_created_date)
+            )
+            self._state[adjustment.id] = (adjustment.is_applied, adjustment.payroll_entry_id)
+
+        shift_ids = {
+            row.adjustment.shift_id
+            for rows in self._adjustments.values() for row in rows
+            if row.adjustment.adjustment_type == 'shift_base' and row.adjustment.shift_id
+        }
+        if shift_ids:
+            shifts_result = await self.session.execute(
+                select(Shift.id, Shift.start_time, Shift.total_hours, Shift.hourly_rate)
+                .where(Shift.id.in_(shift_ids))
+                .order_by(Shift.id)
+            )
+            self._shifts = {row.id: row for row in shifts_result.all()}
+
+    # ------------------------------------------------------------------
+    # Фаза 3: расчет в памяти
+    # ------------------------------------------------------------------
+
+    def _compute_schedule_task(self, task: PayrollTask, today: date, result: PayrollBatchResult) -> None:
+        """Начисления по графику: все неприменённые корректировки за период, по объектам."""
+        contract = task.contract
+        by_object: Dict[int, List[AdjustmentRow]] = defaultdict(list)
+        for row in self._adjustments.get(contract.employee_id, ()):
+            is_applied, _ = self._state[row.adjustment.id]
+            if not is_applied and self._in_period(row, task):
+                by_object[row.adjustment.object_id].append(row)
+
+        for obj_id, new_rows in by_object.items():
+            key = (contract.employee_id, obj_id, task.period_start, task.period_end)
+            draft = self._entries.get(key)
+            # Пересчет с учетом корректировок, уже примененных к этому начислению
+            applied_rows = self._applied_rows(contract.employee_id, key, task) if draft else []
+            adjustments = [row.adjustment for row in applied_rows + new_rows]
+
+            gross_amount = Decimal('0.00')
+            total_bonuses = Decimal('0.00')
+            total_deductions = Decimal('0.00')
+            total_hours = Decimal('0.00')
+            for adj in adjustments:
+                amount = Decimal(str(adj.amount))
+                if adj.adjustment_type == 'shift_base':
+                    gross_amount += amount
+                    if adj.details and 'hours' in adj.details:
+                        total_hours += Decimal(str(adj.details['hours']))
+                elif amount > 0:
+                    total_bonuses += amount
+                else:
+                    total_deductions += abs(amount)
+
+            calculation_details = {
+                "created_by": "celery_schedule",
+                "created_at": today.isoformat(),
+                "shifts": self._shift_details(adjustments),
+                "adjustments": [
+                    {
+                        "adjustment_id": adj.id,
+                        "type": adj.adjustment_type,
+                        "amount": float(adj.amount),
+                        "description": adj.description or "",
+                        "shift_id": adj.shift_id
+                    }
+                    for adj in adjustments
+                ]
+            }
+            self._save_entry(
+                key, contract, gross_amount, total_bonuses, total_deductions, total_hours,
+                calculation_details, new_rows, result
+            )
+
+    def _compute_individual_task(self, task: PayrollTask, result: PayrollBatchResult) -> None:
+        """Начисление по индивидуальному графику договора (на первый объект договора)."""
+        contract = task.contract
+        if not contract.allowed_objects:
+            logger.warning(f"Contract {contract.id} has no allowed_objects, skipping", rate_limit=60)
+            return
+        obj_id = contract.allowed_objects[0]
+        if obj_id not in self._objects:
+            logger.warning(f"Object {obj_id} not found for contract {contract.id}", rate_limit=60)
+            return
+
+        key = (contract.employee_id, obj_id, task.period_start, task.period_end)
+        draft = self._entries.get(key)
+        entry_ref = self._entry_ref(draft) if draft else None
+
+        applied_rows: List[AdjustmentRow] = []
+        new_rows: List[AdjustmentRow] = []
+        for row in self._adjustments.get(contract.employee_id, ()):
+            adj = row.adjustment
+            is_applied, ref = self._state[adj.id]
+            hanging = is_applied and ref is None
+            applied_here = entry_ref is not None and is_applied and ref == entry_ref
+            if is_applied and not hanging and not applied_here:
+                continue
+            if adj.shift_id is not None:
+                if not self._in_period(row, task):
+                    continue
+            elif not (applied_here or (ref is None and self._created_in_period(row, task))):
+                continue
+
+            # Сбрасываем статус "зависших"
+            if hanging:
+                self._set_state(adj.id, False, None)
+            if adj.adjustment_type == 'shift_base' and adj.object_id != obj_id:
+                continue
+            (applied_rows if applied_here else new_rows).append(row)
+
+        if not new_rows and not applied_rows:
+            return
+
+        adjustments = [row.adjustment for row in applied_rows + new_rows]
+        gross_amount = Decimal('0.00')
+        total_bonuses = Decimal('0.00')
+        total_deductions = Decimal('0.00')
+        total_hours = Decimal('0.00')
+        for adj in adjustments:
+            amount = Decimal(str(adj.amount))
+            if adj.adjustment_type == 'shift_base':
+                gross_amount += amount
+                if adj.details and 'hours' in adj.details:
+                    total_hours += Decimal(str(adj.details['hours']))
+            elif adj.adjustment_type in INDIVIDUAL_BONUS_TYPES:
+                total_bonuses += amount
+            elif adj.adjustment_type in INDIVIDUAL_DEDUCTION_TYPES:
+                total_deductions += abs(amount)
+
+        calculation_details = {
+            "adjustments": [
+                {
+                    "id": adj.id,
+                    "type": adj.adjustment_type,
+                    "amount": float(adj.amount),
+                    "description": adj.description
+                }
+                for adj in adjustments
+            ]
+        }
+        self._save_entry(
+            key, contract, gross_amount, total_bonuses, total_deductions, total_hours,
+            calculation_details, new_rows, result
+        )
+
+    def _save_entry(
+        self,
+        key: EntryKey,
+        contract: Contract,
+        gross_amount: Decimal,
+        total_bonuses: Decimal,
+        total_deductions: Decimal,
+        total_hours: Decimal,
+        calculation_details: Dict[str, Any],
+        new_rows: List[AdjustmentRow],
+        result: PayrollBatchResult
+    ) -> None:
+        avg_hourly_rate = gross_amount / total_hours if total_hours > 0 else Decimal('0.00')
+        values = {
+            "hours_worked": float(total_hours),
+            "hourly_rate": float(avg_hourly_rate),
+            "gross_amount": float(gross_amount),
+            "total_bonuses": float(total_bonuses),
+            "total_deductions": float(total_deductions),
+            "net_amount": float(gross_amount + total_bonuses - total_deductions),
+            "calculation_details": calculation_details,
+        }
+
+        draft = self._entries.get(key)
+        if draft is None:
+            draft = self._entries[key] = EntryDraft(key, contract.id, values)
+            result.entries_created += 1
+        else:
+            draft.values = values
+            result.entries_updated += 1
+
+        entry_ref = self._entry_ref(draft)
+        for row in new_rows:
+            self._set_state(row.adjustment.id, True, entry_ref)
+        result.adjustments_applied += len(new_rows)
+
+    def _applied_rows(self, employee_id: int, key: EntryKey, task: PayrollTask) -> List[AdjustmentRow]:
+        entry_ref = self._entry_ref(self._entries[key])
+        rows = []
+        for row in self._adjustments.get(employee_id, ()):
+            is_applied, ref = self._state[row.adjustment.id]
+            if is_applied and ref == entry_ref and (
+                row.adjustment.shift_id is None or self._in_period(row, task)
+            ):
+                rows.append(row)
+        return rows
+
+    def _shift_details(self, adjustments: List[PayrollAdjustment]) -> List[Dict[str, Any]]:
+        shift_ids = {adj.shift_id for adj in adjustments if adj.adjustment_type == 'shift_base' and adj.shift_id}
+        details = []
+        for shift_id in sorted(shift_ids):
+            shift = self._shifts.get(shift_id)
+            if shift is None:
+                continue
+            shift_hours = Decimal(str(shift.total_hours)) if shift.total_hours else Decimal('0')
+            shift_rate = Decimal(str(shift.hourly_rate)) if shift.hourly_rate else Decimal('0')
+            details.append({
+                "shift_id": shift.id,
+                "date": shift.start_time.date().isoformat() if shift.start_time else None,
+                "hours": float(shift_hours),
+                "rate": float(shift_rate),
+                "amount": float(shift_hours * shift_rate)
+            })
+        return details
+
+    @staticmethod
+    def _entry_ref(draft: EntryDraft) -> Union[int, EntryKey]:
+        """Ссылка на начисление: id существующего или ключ еще не созданного."""
+        return draft.entry_id if draft.entry_id is not None else draft.key
+
+    @staticmethod
+    def _in_period(row: AdjustmentRow, task: PayrollTask) -> bool:
+        if row.adjustment.shift_id is not None:
+            return row.shift_date is not None and task.period_start <= row.shift_date <= task.period_end
+        return PayrollBatchService._created_in_period(row, task)
+
+    @staticmethod
+    def _created_in_period(row: AdjustmentRow, task: PayrollTask) -> bool:
+        return row.created_date is not None and task.period_start <= row.created_date <= task.period_end
+
+    def _set_state(self, adjustment_id: int, is_applied: bool, ref: Union[int, EntryKey, None]) -> None:
+        self._state[adjustment_id] = (is_applied, ref)
+        self._changed_adjustments.add(adjustment_id)
+
+    # ------------------------------------------------------------------
+    # Фаза 4: запись
+    # ------------------------------------------------------------------
+
+    async def _write(self) -> None:
+        entries_table = PayrollEntry.__table__
+        new_drafts = [draft for draft in self._entries.values() if draft.entry_id is None]
+        new_keys = {draft.key for draft in new_drafts}
+        if new_drafts:
+            inserted = await self.session.execute(
+                insert(entries_table)
+                .values([
+                    {
+                        "employee_id": draft.key[0],
+                        "contract_id": draft.contract_id,
+                        "object_id": draft.key[1],
+                        "period_start": draft.key[2],
+                        "period_end": draft.key[3],
+                        **draft.values,
+                    }
+                    for draft in new_drafts
+                ])
+                .returning(
+                    entries_table.c.id,
+                    entries_table.c.employee_id,
+                    entries_table.c.object_id,
+                    entries_table.c.period_start,
+                    entries_table.c.period_end
+                )
+            )
+            new_ids = {
+                (row.employee_id, row.object_id, row.period_start, row.period_end): row.id
+                for row in inserted.all()
+            }
+            for draft in new_drafts:
+                draft.entry_id = new_ids[draft.key]
+
+        updated_drafts = [draft for draft in self._entries.values() if draft.values and draft.key not in new_keys]
+        if updated_drafts:
+            await self.session.execute(
+                update(entries_table)
+                .where(entries_table.c.id == bindparam("b_id"))
+                .values({name: bindparam(f"b_{name}") for name in updated_drafts[0].values}),
+                [
+                    {"b_id": draft.entry_id, **{f"b_{name}": value for name, value in draft.values.items()}}
+                    for draft in updated_drafts
+                ]
+            )
+
+        if self._changed_adjustments:
+            adjustments_table = PayrollAdjustment.__table__
+            params = []
+            for adjustment_id in sorted(self._changed_adjustments):
+                is_applied, ref = self._state[adjustment_id]
+                if isinstance(ref, tuple):
+                    ref = self._entries[ref].entry_id
+                params.append({"b_id": adjustment_id, "b_is_applied": is_applied, "b_entry_id": ref})
+            await self.session.execute(
+                update(adjustments_table)
+                .where(adjustments_table.c.id == bindparam("b_id"))
+                .values(is_applied=bindparam("b_is_applied"), payroll_entry_id=bindparam("b_entry_id")),
+                params
+            )
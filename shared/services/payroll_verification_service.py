@@ -6,6 +6,7 @@ from typing import Dict, List, Any, Optional
 from sqlalchemy import select, and_, or_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
+import numpy as np
 import pytz
 
 from domain.entities.shift import Shift
@@ -14,6 +15,7 @@ from domain.entities.object import Object
 from domain.entities.user import User
 from domain.entities.time_slot import TimeSlot
 from domain.entities.timeslot_task_template import TimeslotTaskTemplate
+from core.config.settings import settings
 from core.logging.logger import logger
 
 
@@ -46,6 +48,7 @@ class PayrollVerificationService:
             "missing_adjustments_created": 0,
             "penalties_corrected": 0,
             "invalid_late_penalties_removed": 0,
+            "checkin_distance_violations": 0,
             "total_amount_added": Decimal("0"),
             "total_amount_corrected": Decimal("0"),
             "details": []
@@ -84,10 +87,101 @@ class PayrollVerificationService:
         report["invalid_late_penalties_removed"] = late_report["removed"]
         report["details"].extend(late_report["details"])
 
+        # 4. Отметки геолокации вне радиуса объекта (только отчет, без исправлений)
+        checkin_report = await self.audit_checkin_distances(owner_id, start_date, end_date)
+        report["checkin_distance_violations"] = checkin_report["violations"]
+        report["details"].extend(checkin_report["details"])
+
         await self.session.commit()
         
         return report
     
+    async def audit_checkin_distances(
+        self,
+        owner_id: int,
+        start_date: date,
+        end_date: date
+    ) -> Dict[str, Any]:
+        """
+        Проверить расстояния отметок открытия/закрытия смен до объектов.
+        
+        Все смены периода загружаются одним запросом (только координаты),
+        расстояния считаются пакетно на NumPy.
+        
+        Returns:
+            Отчет: число проверенных смен, нарушений, статистика расстояний
+        """
+        from core.geolocation.batch_distance import BatchDistanceCalculator
+        
+        query = (
+            select(
+                Shift.id,
+                Shift.user_id,
+                Shift.object_id,
+                Shift.start_coordinates,
+                Shift.end_coordinates,
+                Object.name,
+                Object.coordinates,
+                Object.max_distance_meters,
+            )
+            .join(Object, Object.id == Shift.object_id)
+            .where(
+                and_(
+                    Object.owner_id == owner_id,
+                    Shift.start_time >= datetime.combine(start_date, datetime.min.time()),
+                    Shift.start_time < datetime.combine(end_date + timedelta(days=1), datetime.min.time()),
+                )
+            )
+        )
+        rows = (await self.session.execute(query)).all()
+        report = {"shifts_checked": len(rows), "violations": 0, "distance_stats": {}, "details": []}
+        if not rows:
+            return report
+        
+        calc = BatchDistanceCalculator
+        object_points = calc.parse_points(row.coordinates for row in rows)
+        start_distances = calc.pairwise(calc.parse_points(row.start_coordinates for row in rows), object_points)
+        end_distances = calc.pairwise(calc.parse_points(row.end_coordinates for row in rows), object_points)
+        max_distances = np.array(
+            [row.max_distance_meters or settings.max_distance_meters for row in rows], dtype=np.float64
+        )
+        
+        # Отсутствующая отметка (NaN) нарушением не считается
+        start_violation = ~np.isnan(start_distances) & ~calc.within(start_distances, max_distances)
+        end_violation = ~np.isnan(end_distances) & ~calc.within(end_distances, max_distances)
+        violating = np.flatnonzero(start_violation | end_violation)
+        report["violations"] = int(len(violating))
+        
+        measured = np.concatenate([start_distances, end_distances])
+        measured = measured[~np.isnan(measured)]
+        if len(measured):
+            report["distance_stats"] = {
+                "p50_meters": round(float(np.percentile(measured, 50)), 1),
+                "p95_meters": round(float(np.percentile(measured, 95)), 1),
+                "max_meters": round(float(measured.max()), 1),
+            }
+        
+        for index in violating:
+            row = rows[index]
+            report["details"].append({
+                "type": "checkin_distance",
+                "shift_id": row.id,
+                "user_id": row.user_id,
+                "object_id": row.object_id,
+                "object_name": row.name,
+                "start_distance_meters": None if np.isnan(start_distances[index]) else round(float(start_distances[index]), 1),
+                "end_distance_meters": None if np.isnan(end_distances[index]) else round(float(end_distances[index]), 1),
+                "max_distance_meters": int(max_distances[index]),
+            })
+        
+        logger.info(
+            f"Check-in distance audit completed",
+            owner_id=owner_id,
+            shifts_checked=report["shifts_checked"],
+            violations=report["violations"]
+        )
+        return report
+    
     async def _force_close_unclosed_shifts(self, owner_id: int) -> Dict[str, Any]:
         """Принудительно закрыть активные смены, которые должны были закрыться автоматически."""
         report: Dict[str, Any] = {"shifts_closed": 0, "details": []}
@@ -1,16 +1,30 @@
 """
 Сервис для расчета и управления рейтингами в системе отзывов.
 
-Обеспечивает автоматический расчет рейтингов с учетом времени и взвешенного среднего.
+Рейтинг цели хранится как агрегаты учитываемых отзывов (сумма, количество,
+распределение по звездам) и обновляется приращением в той же транзакции, где
+меняется статус отзыва или обжалования (apply_review_change). Чтение
+рейтингов — индексный доступ к ratings, полный пересчет — один
+сгруппированный запрос (rebuild_ratings).
+
+Учитывается одобренный опубликованный отзыв без одобренного обжалования.
+Взвешенное по свежести среднее (average_rating) зависит от текущего времени
+(см. _calculate_review_weight), поэтому при изменении оно пересчитывается
+одним запросом по отзывам этой цели, а не приращением.
 """
 
 import math
 from datetime import datetime, timedelta
+from decimal import Decimal
 from typing import Optional, Dict, Any, List, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_
+from sqlalchemy import select, func, and_, case, cast, exists, tuple_, update, Float
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from core.logging.logger import logger
-from domain.entities.review import Review, Rating
+from domain.entities.review import Review, ReviewAppeal, Rating
+
+
+STAR_COLUMNS = tuple(f"stars_{stars}" for stars in range(1, 6))
 
 
 class RatingService:
@@ -19,7 +33,7 @@ class RatingService:
     # Начальный рейтинг для новых объектов/сотрудников
     DEFAULT_RATING = 5.0
     
-    # Коэффициент затухания для учета времени (в днях)
+    # Период полураспада веса отзыва (в днях)
     # Чем больше значение, тем медленнее "стареют" отзывы
     DECAY_HALF_LIFE_DAYS = 90
     
@@ -27,9 +41,216 @@ class RatingService:
         """Инициализация сервиса."""
         self.session = session
     
+    # Минимальный вес отзыва (отзывы не теряют полностью свою значимость)
+    MIN_REVIEW_WEIGHT = 0.1
+    
+    @classmethod
+    def _calculate_review_weight(cls, review_date: datetime, current_date: datetime) -> float:
+        """
+        Расчет веса отзыва на основе времени.
+        
+        Использует экспоненциальное затухание для учета "свежести" отзывов.
+        
+        Args:
+            review_date: Дата публикации отзыва
+            current_date: Текущая дата
+            
+        Returns:
+            float: Вес отзыва (от 0.1 до 1)
+        """
+        # Вычисляем количество дней с момента публикации
+        days_diff = (current_date - review_date).days
+        
+        # Если отзыв свежий (менее дня), вес = 1
+        if days_diff <= 1:
+            return 1.0
+        
+        # weight = e^(-ln(2) * days / half_life)
+        weight = math.exp(-math.log(2) * days_diff / cls.DECAY_HALF_LIFE_DAYS)
+        return max(weight, cls.MIN_REVIEW_WEIGHT)
+    
+    @classmethod
+    def _weight_expr(cls):
+        """SQL: вес отзыва на текущий момент (то же, что _calculate_review_weight)."""
+        days = func.floor(func.extract("epoch", func.now() - Review.published_at) / 86400)
+        return case(
+            (days <= 1, 1.0),
+            else_=func.greatest(
+                func.exp(-math.log(2) * days / cls.DECAY_HALF_LIFE_DAYS),
+                cls.MIN_REVIEW_WEIGHT
+            )
+        )
+    
+    @staticmethod
+    def star_bucket(rating: Any) -> int:
+        """Столбец распределения для оценки (4.5 -> 4)."""
+        return min(max(int(float(rating)), 1), 5)
+    
+    @classmethod
+    def _average_expr(cls):
+        """SQL-агрегат: взвешенное по свежести среднее, округленное до 0.5."""
+        weight = cls._weight_expr()
+        weighted_sum = func.sum(weight * cast(Review.rating, Float))
+        weight_total = func.sum(weight)
+        return case(
+            (weight_total > 0, func.round(weighted_sum / weight_total * 2) / 2),
+            else_=cls.DEFAULT_RATING
+        )
+    
+    @staticmethod
+    def counted_reviews_filter():
+        """SQL-условие: отзыв учитывается в рейтинге."""
+        return and_(
+            Review.status == 'approved',
+            Review.published_at.isnot(None),
+            ~exists().where(
+                ReviewAppeal.review_id == Review.id,
+                ReviewAppeal.status == 'approved'
+            )
+        )
+    
+    async def is_review_counted(self, review: Review) -> bool:
+        """Учитывается ли отзыв в рейтинге при текущем состоянии сессии."""
+        if review.status != 'approved' or review.published_at is None:
+            return False
+        query = select(ReviewAppeal.id).where(
+            and_(
+                ReviewAppeal.review_id == review.id,
+                ReviewAppeal.status == 'approved'
+            )
+        ).limit(1)
+        result = await self.session.execute(query)
+        return result.scalar_one_or_none() is None
+    
+    async def apply_review_change(self, review: Review, was_counted: bool) -> None:
+        """
+        Применить к рейтингу изменение статуса отзыва или его обжалования.
+        
+        Вызывается до commit вызывающего кода: рейтинг меняется в той же
+        транзакции. was_counted — результат is_review_counted до изменения.
+        """
+        is_counted = await self.is_review_counted(review)
+        if is_counted == was_counted:
+            return
+        sign = 1 if is_counted else -1
+        delta = {
+            "total_reviews": sign,
+            "rating_sum": sign * Decimal(str(review.rating)),
+            f"stars_{self.star_bucket(review.rating)}": sign,
+        }
+        
+        if sign > 0:
+            stmt = pg_insert(Rating).values(
+                target_type=review.target_type,
+                target_id=review.target_id,
+                average_rating=round(float(review.rating) * 2) / 2,
+                last_updated=func.now(),
+                **delta
+            ).on_conflict_do_update(
+                constraint="uq_ratings_target",
+                set_=self._increment(delta)
+            )
+        else:
+            stmt = update(Rating).where(
+                and_(
+                    Rating.target_type == review.target_type,
+                    Rating.target_id == review.target_id
+                )
+            ).values(**self._increment(delta)).execution_options(synchronize_session=False)
+        await self.session.execute(stmt)
+        await self._refresh_average(review.target_type, review.target_id)
+        
+        logger.info(
+            "Rating aggregate updated",
+            target_type=review.target_type,
+            target_id=review.target_id,
+            review_id=review.id,
+            delta=sign
+        )
+    
+    def _increment(self, delta: Dict[str, Any]) -> Dict[str, Any]:
+        """SET для прибавления приращения к строке ratings."""
+        values = {name: getattr(Rating, name) + value for name, value in delta.items()}
+        values["last_updated"] = func.now()
+        return values
+    
+    async def _refresh_average(self, target_type: str, target_id: int) -> None:
+        """Пересчитать взвешенное среднее цели по ее учитываемым отзывам (без commit)."""
+        average = select(self._average_expr()).where(
+            Review.target_type == target_type,
+            Review.target_id == target_id,
+            self.counted_reviews_filter()
+        ).scalar_subquery()
+        stmt = update(Rating).where(
+            and_(
+                Rating.target_type == target_type,
+                Rating.target_id == target_id
+            )
+        ).values(average_rating=average).execution_options(synchronize_session=False)
+        await self.session.execute(stmt)
+    
+    async def rebuild_ratings(self, target_type: Optional[str] = None, target_id: Optional[int] = None) -> int:
+        """
+        Пересчитать агрегаты по отзывам одним сгруппированным запросом.
+        
+        Рейтинги целей, у которых не осталось учитываемых отзывов,
+        сбрасываются к начальному значению. Не делает commit.
+        
+        Returns:
+            int: Количество целей с учитываемыми отзывами
+        """
+        review_scope = [self.counted_reviews_filter()]
+        rating_scope = []
+        if target_type:
+            review_scope.append(Review.target_type == target_type)
+            rating_scope.append(Rating.target_type == target_type)
+        if target_id is not None:
+            review_scope.append(Review.target_id == target_id)
+            rating_scope.append(Rating.target_id == target_id)
+        
+        reset = update(Rating).where(
+            *rating_scope,
+            Rating.total_reviews != 0,
+            ~exists().where(
+                Review.target_type == Rating.target_type,
+                Review.target_id == Rating.target_id,
+                self.counted_reviews_filter()
+            )
+        ).values(
+            total_reviews=0,
+            rating_sum=0,
+            average_rating=self.DEFAULT_RATING,
+            last_updated=func.now(),
+            **{name: 0 for name in STAR_COLUMNS}
+        ).execution_options(synchronize_session=False)
+        await self.session.execute(reset)
+        
+        bucket = func.least(func.greatest(func.floor(Review.rating), 1), 5)
+        grouped = select(
+            Review.target_type,
+            Review.target_id,
+            func.count(),
+            func.sum(Review.rating),
+            *[func.count().filter(bucket == stars) for stars in range(1, 6)],
+            self._average_expr(),
+            func.now()
+        ).where(*review_scope).group_by(Review.target_type, Review.target_id)
+        
+        columns = [
+            "target_type", "target_id", "total_reviews", "rating_sum", *STAR_COLUMNS,
+            "average_rating", "last_updated"
+        ]
+        stmt = pg_insert(Rating).from_select(columns, grouped)
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_ratings_target",
+            set_={name: getattr(stmt.excluded, name) for name in columns[2:]}
+        ).returning(Rating.id)
+        result = await self.session.execute(stmt)
+        return len(result.all())
+    
     async def calculate_rating(self, target_type: str, target_id: int) -> Optional[Rating]:
         """
-        Расчет рейтинга для объекта или сотрудника.
+        Пересчет рейтинга объекта или сотрудника по отзывам.
         
         Args:
             target_type: Тип цели ('employee' или 'object')
@@ -39,73 +260,13 @@ class RatingService:
             Rating: Объект рейтинга или None
         """
         try:
-            # Получаем все одобренные отзывы
-            query = select(Review).where(
-                and_(
-                    Review.target_type == target_type,
-                    Review.target_id == target_id,
-                    Review.status == 'approved',
-                    Review.published_at.isnot(None)
-                )
-            ).order_by(Review.published_at.desc())
-            
-            result = await self.session.execute(query)
-            all_reviews = result.scalars().all()
-            
-            # Исключаем отзывы с успешно обжалованными обжалованиями
-            from domain.entities.review import ReviewAppeal
-            reviews = []
-            for review in all_reviews:
-                appeal_query = select(ReviewAppeal).where(
-                    and_(
-                        ReviewAppeal.review_id == review.id,
-                        ReviewAppeal.status == 'approved'
-                    )
-                )
-                appeal_result = await self.session.execute(appeal_query)
-                appeal = appeal_result.scalar_one_or_none()
-                
-                # Если обжалования нет или оно не одобрено, включаем отзыв
-                if not appeal:
-                    reviews.append(review)
-            
-            if not reviews:
-                # Если отзывов нет, возвращаем начальный рейтинг
-                return await self.get_or_create_rating(target_type, target_id)
-            
-            # Рассчитываем взвешенное среднее
-            weighted_sum = 0.0
-            total_weight = 0.0
-            
-            current_time = datetime.utcnow()
-            
-            for review in reviews:
-                # Рассчитываем вес отзыва на основе времени
-                weight = self._calculate_review_weight(review.published_at, current_time)
-                
-                # Добавляем к общей сумме
-                weighted_sum += float(review.rating) * weight
-                total_weight += weight
-            
-            if total_weight == 0:
-                # Если все веса равны нулю (очень старые отзывы)
-                average_rating = self.DEFAULT_RATING
-            else:
-                average_rating = weighted_sum / total_weight
-            
-            # Округляем до 0.5
-            rounded_rating = round(average_rating * 2) / 2
+            await self.rebuild_ratings(target_type, target_id)
+            await self.session.commit()
             
-            # Обновляем или создаем рейтинг
             rating = await self.get_or_create_rating(target_type, target_id)
-            rating.average_rating = rounded_rating
-            rating.total_reviews = len(reviews)
-            rating.last_updated = current_time
-            
-            await self.session.commit()
             await self.session.refresh(rating)
             
-            logger.info(f"Calculated rating for {target_type} {target_id}: {rounded_rating} from {len(reviews)} reviews")
+            logger.info(f"Calculated rating for {target_type} {target_id}: {rating.average_rating} from {rating.total_reviews} reviews")
             
             return rating
             
@@ -114,33 +275,6 @@ class RatingService:
             await self.session.rollback()
             return None
     
-    def _calculate_review_weight(self, review_date: datetime, current_date: datetime) -> float:
-        """
-        Расчет веса отзыва на основе времени.
-        
-        Использует экспоненциальное затухание для учета "свежести" отзывов.
-        
-        Args:
-            review_date: Дата публикации отзыва
-            current_date: Текущая дата
-            
-        Returns:
-            float: Вес отзыва (от 0 до 1)
-        """
-        # Вычисляем количество дней с момента публикации
-        days_diff = (current_date - review_date).days
-        
-        # Если отзыв свежий (менее дня), вес = 1
-        if days_diff <= 1:
-            return 1.0
-        
-        # Экспоненциальное затухание
-        # weight = e^(-ln(2) * days / half_life)
-        weight = math.exp(-math.log(2) * days_diff / self.DECAY_HALF_LIFE_DAYS)
-        
-        # Минимальный вес - 0.1 (отзывы не теряют полностью свою значимость)
-        return max(weight, 0.1)
-    
     async def get_or_create_rating(self, target_type: str, target_id: int) -> Rating:
         """
         Получение существующего рейтинга или создание нового.
@@ -152,28 +286,19 @@ class RatingService:
         Returns:
             Rating: Объект рейтинга
         """
-        query = select(Rating).where(
-            and_(
-                Rating.target_type == target_type,
-                Rating.target_id == target_id
-            )
-        )
-        
-        result = await self.session.execute(query)
-        rating = result.scalar_one_or_none()
+        rating = await self.get_rating(target_type, target_id)
         
         if not rating:
-            # Создаем новый рейтинг с начальным значением
-            rating = Rating(
+            # Создаем новый рейтинг с начальным значением (параллельная вставка не мешает)
+            stmt = pg_insert(Rating).values(
                 target_type=target_type,
                 target_id=target_id,
                 average_rating=self.DEFAULT_RATING,
                 total_reviews=0
-            )
-            
-            self.session.add(rating)
+            ).on_conflict_do_nothing(constraint="uq_ratings_target")
+            await self.session.execute(stmt)
             await self.session.commit()
-            await self.session.refresh(rating)
+            rating = await self.get_rating(target_type, target_id)
             
             logger.info(f"Created new rating for {target_type} {target_id}")
         
@@ -213,19 +338,10 @@ class RatingService:
         if not targets:
             return {}
         
-        # Формируем условия для поиска
-        conditions = []
-        for target_type, target_id in targets:
-            conditions.append(
-                and_(
-                    Rating.target_type == target_type,
-                    Rating.target_id == target_id
-                )
-            )
-        
-        # Объединяем условия через OR
-        from sqlalchemy import or_
-        query = select(Rating).where(or_(*conditions))
+        # Поиск по уникальному индексу (target_type, target_id)
+        query = select(Rating).where(
+            tuple_(Rating.target_type, Rating.target_id).in_(list(set(targets)))
+        )
         
         result = await self.session.execute(query)
         ratings = result.scalars().all()
@@ -261,6 +377,7 @@ class RatingService:
         Returns:
             List[Rating]: Список рейтингов
         """
+        # Индекс ix_ratings_top (target_type, average_rating DESC, total_reviews DESC)
         query = select(Rating).where(
             Rating.target_type == target_type
         ).order_by(
@@ -282,36 +399,9 @@ class RatingService:
         Returns:
             Dict: Статистика рейтинга
         """
-        # Получаем все одобренные отзывы
-        query = select(Review).where(
-            and_(
-                Review.target_type == target_type,
-                Review.target_id == target_id,
-                Review.status == 'approved'
-            )
-        )
-        
-        result = await self.session.execute(query)
-        all_reviews = result.scalars().all()
-        
-        # Исключаем отзывы с успешно обжалованными обжалованиями
-        from domain.entities.review import ReviewAppeal
-        reviews = []
-        for review in all_reviews:
-            appeal_query = select(ReviewAppeal).where(
-                and_(
-                    ReviewAppeal.review_id == review.id,
-                    ReviewAppeal.status == 'approved'
-                )
-            )
-            appeal_result = await self.session.execute(appeal_query)
-            appeal = appeal_result.scalar_one_or_none()
-            
-            # Если обжалования нет или оно не одобрено, включаем отзыв
-            if not appeal:
-                reviews.append(review)
+        rating = await self.get_rating(target_type, target_id)
         
-        if not reviews:
+        if not rating or not rating.total_reviews:
             return {
                 "total_reviews": 0,
                 "average_rating": self.DEFAULT_RATING,
@@ -319,30 +409,25 @@ class RatingService:
                 "recent_reviews": 0
             }
         
-        # Подсчитываем распределение рейтингов
-        rating_distribution = {str(i): 0 for i in range(1, 6)}
-        recent_reviews = 0
-        
-        current_time = datetime.utcnow()
-        thirty_days_ago = current_time - timedelta(days=30)
-        
-        for review in reviews:
-            # Распределение по звездам
-            rating_key = str(int(float(review.rating)))
-            rating_distribution[rating_key] += 1
-            
-            # Недавние отзывы (за последние 30 дней)
-            if review.published_at and review.published_at >= thirty_days_ago:
-                recent_reviews += 1
+        # Недавние отзывы (за последние 30 дней)
+        thirty_days_ago = datetime.utcnow() - timedelta(days=30)
+        recent_query = select(func.count()).select_from(Review).where(
+            and_(
+                Review.target_type == target_type,
+                Review.target_id == target_id,
+                Review.published_at >= thirty_days_ago,
+                self.counted_reviews_filter()
+            )
+        )
+        recent_reviews = (await self.session.execute(recent_query)).scalar() or 0
         
         # Средний рейтинг
-        total_rating = sum(float(review.rating) for review in reviews)
-        average_rating = total_rating / len(reviews)
+        average_rating = float(rating.rating_sum) / rating.total_reviews
         
         return {
-            "total_reviews": len(reviews),
+            "total_reviews": rating.total_reviews,
             "average_rating": round(average_rating, 2),
-            "rating_distribution": rating_distribution,
+            "rating_distribution": rating.rating_distribution,
             "recent_reviews": recent_reviews
         }
     
@@ -391,21 +476,8 @@ class RatingService:
             int: Количество обновленных рейтингов
         """
         try:
-            # Получаем все уникальные цели из отзывов
-            query = select(Review.target_type, Review.target_id).distinct()
-            
-            if target_type:
-                query = query.where(Review.target_type == target_type)
-            
-            result = await self.session.execute(query)
-            targets = result.fetchall()
-            
-            updated_count = 0
-            
-            for target_type_val, target_id_val in targets:
-                rating = await self.calculate_rating(target_type_val, target_id_val)
-                if rating:
-                    updated_count += 1
+            updated_count = await self.rebuild_ratings(target_type)
+            await self.session.commit()
             
             logger.info(f"Recalculated {updated_count} ratings")
             return updated_count
@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Optional, Tuple, TypedDict
+from typing import Dict, Iterable, List, Optional, Tuple, TypedDict
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -116,44 +116,87 @@ async def send_object_report_group_text(
     Отправить текст в TG и/или MAX по настроенным чатам объекта.
     Дублирование по объектам обрабатывает вызывающий (разные chat_id).
     """
-    ch = await resolve_object_report_group_channels(session, obj)
-    tg_s = ch.telegram_chat_id or ""
-    max_s = ch.max_report_chat_id or ""
-
-    out: ReportGroupSendResult = {
-        "telegram": {"ok": False, "chat_id": ch.telegram_chat_id},
-        "max": {"ok": False, "chat_id": ch.max_report_chat_id},
-    }
-
-    if ch.allow_telegram and tg_s and settings.telegram_bot_token:
-        try:
-            from telegram import Bot
-
-            bot = Bot(token=settings.telegram_bot_token)
-            await bot.send_message(
-                chat_id=tg_s,
-                text=text,
-                parse_mode=telegram_parse_mode,
-            )
-            out["telegram"]["ok"] = True
-        except Exception as e:
-            logger.warning(
-                "report_group_broadcast: TG send failed",
-                object_id=obj.id,
-                error=str(e),
-            )
-
-    if ch.allow_max and max_s and settings.max_bot_token and settings.max_features_enabled:
-        try:
-            from shared.bot_unified.max_client import MaxClient
-
-            await MaxClient().send_text(max_s, text)
-            out["max"]["ok"] = True
-        except Exception as e:
-            logger.warning(
-                "report_group_broadcast: MAX send failed",
-                object_id=obj.id,
-                error=str(e),
-            )
-
+    [(_, out)] = await send_report_group_texts(
+        session, [obj], text, telegram_parse_mode=telegram_parse_mode
+    )
     return out
+
+
+async def send_report_group_texts(
+    session: AsyncSession,
+    objects: Iterable[Object],
+    text: str,
+    *,
+    telegram_parse_mode: Optional[str] = "Markdown",
+) -> List[Tuple[Object, ReportGroupSendResult]]:
+    """
+    Отправить текст в группы отчётов нескольких объектов.
+
+    Чаты всех объектов определяются до отправки; общий чат нескольких
+    объектов получает сообщение один раз. Отправка идет через BulkSender
+    с лимитами Telegram отправщика уведомлений.
+    """
+    from shared.services.senders.bulk_sender import BulkMessage, BulkSender
+
+    resolved = [(obj, await resolve_object_report_group_channels(session, obj)) for obj in objects]
+
+    send_tg = bool(settings.telegram_bot_token)
+    send_max = bool(settings.max_bot_token and settings.max_features_enabled)
+    tg_sender = None
+    if send_tg and any(ch.allow_telegram and ch.telegram_chat_id for _, ch in resolved):
+        from shared.services.senders.telegram_sender import get_telegram_sender
+
+        tg_sender = get_telegram_sender()
+
+    messages: Dict[Tuple[str, str], BulkMessage] = {}
+    for obj, ch in resolved:
+        if tg_sender is not None and ch.allow_telegram and ch.telegram_chat_id:
+            key = ("telegram", ch.telegram_chat_id)
+            if key not in messages:
+                messages[key] = BulkMessage(
+                    chat_key=key,
+                    send=lambda c=ch.telegram_chat_id: tg_sender.send_text(c, text, parse_mode=telegram_parse_mode),
+                    ref=key,
+                    meta={"object_id": obj.id},
+                )
+        if send_max and ch.allow_max and ch.max_report_chat_id:
+            key = ("max", ch.max_report_chat_id)
+            if key not in messages:
+                messages[key] = BulkMessage(
+                    chat_key=key,
+                    send=lambda c=ch.max_report_chat_id: _send_max_text(c, text),
+                    ref=key,
+                    meta={"object_id": obj.id},
+                )
+
+    sent: Dict[Tuple[str, str], bool] = {}
+    if messages:
+        bulk_sender = BulkSender(
+            concurrency=settings.notification_dispatch_concurrency,
+            throttle=tg_sender.throttle if tg_sender is not None else None,
+        )
+        report = await bulk_sender.send(messages.values())
+        sent = {key: error is None for key, error in report.results.items()}
+        for error in report.errors:
+            logger.warning("report_group_broadcast: send failed", **error)
+
+    results: List[Tuple[Object, ReportGroupSendResult]] = []
+    for obj, ch in resolved:
+        results.append((obj, {
+            "telegram": {
+                "ok": sent.get(("telegram", ch.telegram_chat_id), False),
+                "chat_id": ch.telegram_chat_id,
+            },
+            "max": {
+                "ok": sent.get(("max", ch.max_report_chat_id), False),
+                "chat_id": ch.max_report_chat_id,
+            },
+        }))
+    return results
+
+
+async def _send_max_text(chat_id: str, text: str) -> bool:
+    from shared.bot_unified.max_client import MaxClient
+
+    await MaxClient().send_text(chat_id, text)
+    return True
@@ -1,48 +1,178 @@
+"""Rules Engine: применимые правила владельца для контекста события.
+
+Правила компилируются один раз: condition_json/action_json разбираются,
+правила раскладываются по области (scope) и индексируются по самому
+частому ключу условий, поэтому оценка контекста проверяет только правила
+с подходящим значением этого ключа. Скомпилированный набор владельца
+кэшируется в процессе с инвалидацией по версиям (core.cache.rules_cache).
+"""
+
 from __future__ import annotations
 
-from typing import Any, Dict, List
+import heapq
+import json
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
+from core.cache.rules_cache import rules_cache
+from core.logging.logger import logger
 from domain.entities.rule import Rule
 
 
+@dataclass(frozen=True)
+class CompiledRule:
+    """Правило с разобранными условием и действием."""
+
+    rule_id: int
+    code: str
+    position: int  # порядок (priority, id) внутри набора
+    conditions: Tuple[Tuple[str, Any], ...]
+    action: Dict[str, Any]
+
+    def matches(self, context: Dict[str, Any]) -> bool:
+        # Все пары key==value должны совпасть в context
+        for key, value in self.conditions:
+            if context.get(key) != value:
+                return False
+        return True
+
+
+def _parse_json(value: Any) -> Any:
+    return json.loads(value) if isinstance(value, (str, bytes)) else value
+
+
+def compile_rule(rule: Rule, position: int) -> Optional[CompiledRule]:
+    """Разобрать правило; None — если JSON условия/действия некорректен."""
+    try:
+        condition = _parse_json(rule.condition_json)
+        action = _parse_json(rule.action_json)
+    except (TypeError, ValueError) as e:
+        logger.warning(f"Rule skipped: invalid JSON: {e}", rule_id=rule.id, rule_code=rule.code)
+        return None
+    if not isinstance(condition, dict) or not isinstance(action, dict):
+        logger.warning("Rule skipped: condition/action is not an object", rule_id=rule.id, rule_code=rule.code)
+        return None
+    return CompiledRule(
+        rule_id=rule.id,
+        code=rule.code,
+        position=position,
+        conditions=tuple(condition.items()),
+        action=action,
+    )
+
+
+def _hashable(value: Any) -> bool:
+    try:
+        hash(value)
+    except TypeError:
+        return False
+    return True
+
+
+class ScopeIndex:
+    """Правила одной области, проиндексированные по самому частому ключу условий."""
+
+    def __init__(self, rules: Sequence[CompiledRule]):
+        self.rules = list(rules)
+        key_counts = Counter(
+            key for rule in self.rules for key, value in rule.conditions if _hashable(value)
+        )
+        self.key: Optional[str] = key_counts.most_common(1)[0][0] if key_counts else None
+        self.by_value: Dict[Any, List[CompiledRule]] = defaultdict(list)
+        self.unindexed: List[CompiledRule] = []
+        for rule in self.rules:
+            conditions = dict(rule.conditions)
+            if self.key in conditions and _hashable(conditions[self.key]):
+                self.by_value[conditions[self.key]].append(rule)
+            else:
+                self.unindexed.append(rule)
+
+    def candidates(self, context: Dict[str, Any]) -> Iterable[CompiledRule]:
+        """Правила, которые могут подойти контексту, в порядке приоритета."""
+        if self.key is None:
+            return self.rules
+        try:
+            indexed = self.by_value.get(context.get(self.key), ())
+        except TypeError:  # нехешируемое значение в контексте
+            indexed = ()
+        if not indexed:
+            return self.unindexed
+        if not self.unindexed:
+            return indexed
+        return heapq.merge(indexed, self.unindexed, key=lambda rule: rule.position)
+
+    def match(self, context: Dict[str, Any]) -> List[CompiledRule]:
+        return [rule for rule in self.candidates(context) if rule.matches(context)]
+
+
+class CompiledRuleSet:
+    """Скомпилированные правила (владельца) по областям."""
+
+    def __init__(self, rules: Iterable[Rule]):
+        by_scope: Dict[str, List[CompiledRule]] = defaultdict(list)
+        for position, rule in enumerate(rules):
+            compiled = compile_rule(rule, position)
+            if compiled is not None:
+                by_scope[rule.scope].append(compiled)
+        self.scopes = {scope: ScopeIndex(rules) for scope, rules in by_scope.items()}
+
+    def evaluate(self, scope: str, context: Dict[str, Any]) -> List[Dict[str, Any]]:
+        index = self.scopes.get(scope)
+        if index is None:
+            return []
+        # Копии: вызывающий код может дополнять действие
+        return [dict(rule.action) for rule in index.match(context)]
+
+
 class RulesEngine:
     def __init__(self, session: AsyncSession):
         self.session = session
+        # Наборы в пределах экземпляра, когда кэш процесса недоступен (нет Redis)
+        self._rulesets: Dict[int, CompiledRuleSet] = {}
 
-    async def load_rules(self, owner_id: int | None, scope: str) -> List[Rule]:
-        query = select(Rule).where(Rule.scope == scope, Rule.is_active == True)
+    async def load_rules(self, owner_id: int | None, scope: str | None) -> List[Rule]:
+        query = select(Rule).where(Rule.is_active == True)
+        if scope is not None:
+            query = query.where(Rule.scope == scope)
         if owner_id is not None:
             query = query.where((Rule.owner_id == owner_id) | (Rule.owner_id.is_(None)))
         query = query.order_by(Rule.priority, Rule.id)
         res = await self.session.execute(query)
         return res.scalars().all()
 
+    async def get_ruleset(self, owner_id: int) -> CompiledRuleSet:
+        """Скомпилированные правила владельца (все области, включая общие правила)."""
+        versions = await rules_cache.snapshot_versions(owner_id)
+        ruleset = rules_cache.get(owner_id, versions) if versions else self._rulesets.get(owner_id)
+        if ruleset is None:
+            ruleset = CompiledRuleSet(await self.load_rules(owner_id, None))
+            if versions:
+                rules_cache.set(owner_id, versions, ruleset)
+            else:
+                self._rulesets[owner_id] = ruleset
+        return ruleset
+
     async def evaluate(self, owner_id: int | None, scope: str, context: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Возвращает список действий (action dict) для применимых правил.
-        Минимальная реализация: простая фильтрация по ключам context.
+        Условие правила - набор пар key==value, все должны совпасть в context.
         condition_json/action_json - JSON-словари.
         """
-        actions: List[Dict[str, Any]] = []
-        rules = await self.load_rules(owner_id, scope)
-        for r in rules:
-            try:
-                import json
-                cond = json.loads(r.condition_json)
-                act = json.loads(r.action_json)
-            except Exception:
-                continue
-
-            if self._matches(cond, context):
-                actions.append(act)
-        return actions
-
-    def _matches(self, condition: Dict[str, Any], context: Dict[str, Any]) -> bool:
-        # Простой матчер: все пары key==value должны совпасть в context
-        for k, v in condition.items():
-            if context.get(k) != v:
-                return False
-        return True
-
+        return (await self.evaluate_many(owner_id, scope, [context]))[0]
 
+    async def evaluate_many(
+        self,
+        owner_id: int | None,
+        scope: str,
+        contexts: Iterable[Dict[str, Any]]
+    ) -> List[List[Dict[str, Any]]]:
+        """Действия для каждого контекста (пакетная оценка: правила загружаются один раз)."""
+        if owner_id is None:
+            # Без владельца — правила всех владельцев области (не кэшируются)
+            ruleset = CompiledRuleSet(await self.load_rules(None, scope))
+        else:
+            ruleset = await self.get_ruleset(owner_id)
+        return [ruleset.evaluate(scope, context) for context in contexts]
@@ -0,0 +1,117 @@
+"""Массовая отправка сообщений: ограниченная конкуренция и порядок внутри чата."""
+
+import asyncio
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional
+
+from core.logging.logger import logger
+from shared.services.senders.throttle import MessageThrottle
+
+
+@dataclass
+class BulkMessage:
+    """Одно сообщение рассылки.
+
+    send — фабрика корутины отправки, возвращающей True при успехе.
+    Сообщения с одинаковым chat_key отправляются строго по очереди.
+    """
+
+    chat_key: Hashable
+    send: Callable[[], Awaitable[bool]]
+    ref: Any = None
+    meta: Dict[str, Any] = field(default_factory=dict)
+
+
+def latency_summary(latencies_ms: List[float]) -> Dict[str, float]:
+    """Сводка задержек отправки: среднее, p50, p95, максимум (мс)."""
+    if not latencies_ms:
+        return {"count": 0, "avg_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+
+    ordered = sorted(latencies_ms)
+
+    def percentile(p: float) -> float:
+        return ordered[max(0, math.ceil(p * len(ordered)) - 1)]
+
+    return {
+        "count": len(ordered),
+        "avg_ms": round(sum(ordered) / len(ordered), 1),
+        "p50_ms": round(percentile(0.5), 1),
+        "p95_ms": round(percentile(0.95), 1),
+        "max_ms": round(ordered[-1], 1),
+    }
+
+
+@dataclass
+class BulkSendReport:
+    """Результат рассылки."""
+
+    sent: int = 0
+    failed: int = 0
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+    results: Dict[Any, Optional[str]] = field(default_factory=dict)
+    latencies_ms: List[float] = field(default_factory=list)
+    duration_seconds: float = 0.0
+
+    def record(self, message: BulkMessage, error: Optional[str], latency_ms: float) -> None:
+        self.latencies_ms.append(latency_ms)
+        if message.ref is not None:
+            self.results[message.ref] = error
+        if error is None:
+            self.sent += 1
+        else:
+            self.failed += 1
+            self.errors.append({**message.meta, "reason": error})
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "sent": self.sent,
+            "failed": self.failed,
+            "errors": self.errors,
+            "latency": latency_summary(self.latencies_ms),
+            "duration_seconds": round(self.duration_seconds, 2),
+        }
+
+
+class BulkSender:
+    """Параллельная отправка с ограничением конкуренции.
+
+    Сообщения группируются по чату: каждый чат обслуживает одна корутина,
+    поэтому порядок сообщений получателю сохраняется, а лимит чата
+    ожидается вне семафора и не занимает слоты отправки. Общая пауза
+    при flood control и глобальный лимит обеспечиваются отправщиками
+    через тот же MessageThrottle.
+    """
+
+    def __init__(self, concurrency: int, throttle: Optional[MessageThrottle] = None):
+        self.concurrency = max(1, concurrency)
+        self.throttle = throttle
+
+    async def send(self, messages: Iterable[BulkMessage]) -> BulkSendReport:
+        by_chat: "OrderedDict[Hashable, List[BulkMessage]]" = OrderedDict()
+        for message in messages:
+            by_chat.setdefault(message.chat_key, []).append(message)
+
+        report = BulkSendReport()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        started = time.monotonic()
+
+        async def send_chat(chat_key: Hashable, chat_messages: List[BulkMessage]) -> None:
+            for message in chat_messages:
+                if self.throttle is not None:
+                    await self.throttle.acquire_chat(chat_key)
+                async with semaphore:
+                    sent_at = time.monotonic()
+                    try:
+                        error = None if await message.send() else "Send failed"
+                    except Exception as e:
+                        logger.error(f"Bulk send failed (ref={message.ref}, chat={chat_key}): {e}")
+                        error = str(e)[:200]
+                    latency_ms = (time.monotonic() - sent_at) * 1000
+                report.record(message, error, latency_ms)
+
+        await asyncio.gather(*(send_chat(key, items) for key, items in by_chat.items()))
+        report.duration_seconds = time.monotonic() - started
+        return report
@@ -3,13 +3,17 @@
 from __future__ import annotations
 
 import re
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
 
 from core.config.settings import settings
 from core.logging.logger import logger
 from domain.entities.notification import Notification, NotificationPriority, NotificationType
 from shared.bot_unified.max_client import MaxClient
 from shared.templates.notifications import NotificationTemplateManager
+from shared.services.senders.bulk_sender import BulkMessage, BulkSender
+from shared.services.senders.throttle import MessageThrottle
 
 
 class MaxNotificationSender:
@@ -32,8 +36,17 @@ class MaxNotificationSender:
         NotificationType.PASSWORD_RESET: "🔐",
     }
 
-    def __init__(self, client: Optional[MaxClient] = None):
+    # Повторы после HTTP 429 (пауза берется из Retry-After)
+    MAX_FLOOD_WAITS = 5
+    DEFAULT_RETRY_AFTER = 1.0
+
+    def __init__(self, client: Optional[MaxClient] = None, throttle: Optional[MessageThrottle] = None):
         self._client = client or MaxClient()
+        self.throttle = throttle or MessageThrottle(
+            global_rate=settings.max_global_rate_limit,
+            chat_rate=settings.telegram_chat_rate_limit,
+            chat_burst=settings.telegram_chat_burst,
+        )
 
     async def send_notification(
         self,
@@ -68,7 +81,7 @@ class MaxNotificationSender:
 
             text = self._format_message(notification, title_to_use, message_to_use)
             text = self._markdownish_to_html(text)
-            await self._client.send_to_user(max_user_id, text, format="html")
+            await self._send_with_backoff(max_user_id, text)
             logger.info(
                 "MAX notification sent",
                 notification_id=notification.id,
@@ -83,6 +96,61 @@ class MaxNotificationSender:
             )
             return False
 
+    async def _send_with_backoff(self, max_user_id: str, text: str) -> None:
+        """Отправка с общей паузой при HTTP 429 (остальные ошибки пробрасываются)."""
+        for flood_wait in range(self.MAX_FLOOD_WAITS):
+            await self.throttle.acquire_global()
+            try:
+                await self._client.send_to_user(max_user_id, text, format="html")
+                return
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code != 429 or flood_wait == self.MAX_FLOOD_WAITS - 1:
+                    raise
+                retry_after = self._retry_after_seconds(e.response)
+                logger.warning(f"MAX rate limit, pausing sends for {retry_after}s")
+                self.throttle.pause(retry_after)
+
+    @classmethod
+    def _retry_after_seconds(cls, response: httpx.Response) -> float:
+        try:
+            return max(float(response.headers.get("Retry-After", cls.DEFAULT_RETRY_AFTER)), 0.0)
+        except (TypeError, ValueError):
+            return cls.DEFAULT_RETRY_AFTER
+
+    async def send_bulk_notifications(
+        self,
+        notifications: List[Tuple[Notification, str, Optional[Dict[str, Any]]]],
+        concurrency: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Массовая отправка: (notification, max_user_id, variables).
+        Параллельно, с порядком внутри получателя и общей паузой при 429.
+        """
+        messages = [
+            BulkMessage(
+                chat_key=max_user_id,
+                send=lambda n=notification, u=max_user_id, v=variables: self.send_notification(
+                    notification=n, max_user_id=u, variables=v
+                ),
+                ref=notification.id,
+                meta={"notification_id": notification.id, "max_user_id": max_user_id},
+            )
+            for notification, max_user_id, variables in notifications
+        ]
+        sender = BulkSender(
+            concurrency=concurrency or settings.notification_dispatch_concurrency,
+            throttle=self.throttle,
+        )
+        results = (await sender.send(messages)).as_dict()
+        logger.info(
+            "MAX bulk notification send completed",
+            sent=results["sent"],
+            failed=results["failed"],
+            total=len(notifications),
+            p95_ms=results["latency"]["p95_ms"],
+        )
+        return results
+
     def _format_message(
         self,
         notification: Notification,
@@ -1,10 +1,14 @@
 """Telegram отправщик уведомлений для StaffProBot."""
 
+import asyncio
+import random
+import weakref
 from typing import Optional, Dict, Any
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from telegram import Bot
-from telegram.error import TelegramError, BadRequest, Forbidden, NetworkError
+from telegram.error import TelegramError, BadRequest, Forbidden, NetworkError, RetryAfter
 from telegram.constants import ParseMode
+from telegram.request import HTTPXRequest
 
 from core.logging.logger import logger
 from core.config.settings import settings
@@ -15,6 +19,8 @@ from domain.entities.notification import (
     NotificationPriority
 )
 from shared.templates.notifications import NotificationTemplateManager
+from shared.services.senders.bulk_sender import BulkMessage, BulkSender
+from shared.services.senders.throttle import MessageThrottle
 
 
 class TelegramNotificationSender:
@@ -59,20 +65,31 @@ class TelegramNotificationSender:
         NotificationType.FEATURE_ANNOUNCEMENT: "🎉"
     }
     
-    def __init__(self, bot_token: Optional[str] = None):
+    def __init__(
+        self,
+        bot_token: Optional[str] = None,
+        connection_pool_size: Optional[int] = None,
+        throttle: Optional[MessageThrottle] = None
+    ):
         """
         Инициализация отправщика.
         
         Args:
             bot_token: Токен бота (опционально, по умолчанию из settings)
+            connection_pool_size: Размер пула HTTP-соединений для конкурентной отправки
+                (по умолчанию у python-telegram-bot одно соединение)
+            throttle: Лимиты отправки (по умолчанию — общие для всех отправщиков этого бота)
         """
         self.bot_token = bot_token or settings.telegram_bot_token
         if not self.bot_token:
             raise ValueError("Telegram bot token is not configured")
         
-        self.bot = Bot(token=self.bot_token)
+        self._request = HTTPXRequest(connection_pool_size=connection_pool_size or 1)
+        self.bot = Bot(token=self.bot_token, request=self._request)
+        self.throttle = throttle or get_telegram_throttle(self.bot_token)
         self.max_retries = 3
-        self.retry_delay = 2  # секунды
+        self.max_flood_waits = 5  # Повторы после RetryAfter не считаются ошибками
+        self.retry_delay = 2  # секунды, база экспоненциальной задержки
     
     async def send_notification(
         self,
@@ -156,7 +173,7 @@ class TelegramNotificationSender:
         telegram_id: int,
         message: str,
         parse_mode: str,
-        notification: Notification
+        notification: Optional[Notification] = None
     ) -> bool:
         """
         Отправка сообщения с повторными попытками.
@@ -165,14 +182,17 @@ class TelegramNotificationSender:
             telegram_id: Telegram ID получателя
             message: Текст сообщения
             parse_mode: Режим парсинга (HTML/Markdown)
-            notification: Объект уведомления для обновления статуса
+            notification: Объект уведомления (для логов; None для произвольного текста)
             
         Returns:
             True если отправлено успешно
         """
-        import asyncio
-        
-        for attempt in range(self.max_retries):
+        notification_id = getattr(notification, "id", None)
+        attempt = 0
+        flood_waits = 0
+        while attempt < self.max_retries:
+            # Глобальный лимит и общая пауза после flood control
+            await self.throttle.acquire_global()
             try:
                 # Отправляем сообщение
                 await self.bot.send_message(
@@ -184,55 +204,67 @@ class TelegramNotificationSender:
                 
                 return True
                 
+            except RetryAfter as e:
+                # Flood control: ставим на паузу все отправки этого отправщика
+                retry_after = self._retry_after_seconds(e)
+                flood_waits += 1
+                logger.warning(
+                    f"Telegram flood control, pausing sends for {retry_after}s "
+                    f"(telegram_id={telegram_id}, notification_id={notification_id})"
+                )
+                self.throttle.pause(retry_after)
+                if flood_waits >= self.max_flood_waits:
+                    return False
+                continue
+                
             except Forbidden as e:
                 # Пользователь заблокировал бота - не повторяем
                 logger.warning(
-                    f"User blocked the bot (telegram_id={telegram_id}, notification_id={notification.id}): {e}"
+                    f"User blocked the bot (telegram_id={telegram_id}, notification_id={notification_id}): {e}"
                 )
                 return False
                 
             except BadRequest as e:
                 # Неверный запрос (например, неверный chat_id) - не повторяем
                 logger.warning(
-                    f"Bad request to Telegram API (telegram_id={telegram_id}, notification_id={notification.id}): {e}"
+                    f"Bad request to Telegram API (telegram_id={telegram_id}, notification_id={notification_id}): {e}"
                 )
                 return False
                 
-            except NetworkError as e:
-                # Сетевая ошибка - повторяем
+            except (NetworkError, TelegramError) as e:
+                # Сетевая или другая ошибка Telegram API - повторяем с экспоненциальной задержкой
+                attempt += 1
                 logger.warning(
-                    f"Network error, attempt {attempt + 1}/{self.max_retries} "
-                    f"(telegram_id={telegram_id}, notification_id={notification.id}): {e}"
+                    f"Telegram API error, attempt {attempt}/{self.max_retries} "
+                    f"(telegram_id={telegram_id}, notification_id={notification_id}): {e}"
                 )
                 
-                if attempt < self.max_retries - 1:
-                    await asyncio.sleep(self.retry_delay * (attempt + 1))
+                if attempt < self.max_retries:
+                    await asyncio.sleep(self._backoff_delay(attempt))
                     continue
-                else:
-                    return False
-                    
-            except TelegramError as e:
-                # Другая ошибка Telegram API - повторяем
-                logger.warning(
-                    f"Telegram API error, attempt {attempt + 1}/{self.max_retries} "
-                    f"(telegram_id={telegram_id}, notification_id={notification.id}): {e}"
-                )
-                
-                if attempt < self.max_retries - 1:
-                    await asyncio.sleep(self.retry_delay * (attempt + 1))
-                    continue
-                else:
-                    return False
+                return False
                     
             except Exception as e:
                 # Неожиданная ошибка
                 logger.error(
-                    f"Unexpected error sending Telegram message (telegram_id={telegram_id}, notification_id={notification.id}): {e}"
+                    f"Unexpected error sending Telegram message (telegram_id={telegram_id}, notification_id={notification_id}): {e}"
                 )
                 return False
         
         return False
     
+    def _backoff_delay(self, attempt: int) -> float:
+        """Экспоненциальная задержка с джиттером (чтобы параллельные повторы не совпадали)."""
+        return self.retry_delay * (2 ** (attempt - 1)) + random.uniform(0, self.retry_delay)
+    
+    @staticmethod
+    def _retry_after_seconds(error: RetryAfter) -> float:
+        """Время ожидания из RetryAfter (int или timedelta в зависимости от версии PTB)."""
+        retry_after = getattr(error, "retry_after", 1)
+        if isinstance(retry_after, timedelta):
+            return retry_after.total_seconds()
+        return float(retry_after or 1)
+    
     def _format_message(
         self,
         notification: Notification,
@@ -279,65 +311,92 @@ class TelegramNotificationSender:
     
     async def send_bulk_notifications(
         self,
-        notifications: list[tuple[Notification, int, Optional[Dict[str, Any]]]]
+        notifications: list[tuple[Notification, int, Optional[Dict[str, Any]]]],
+        concurrency: Optional[int] = None
     ) -> Dict[str, Any]:
         """
         Массовая отправка уведомлений.
         
+        Сообщения отправляются параллельно (не больше concurrency одновременно),
+        сообщения одному получателю — по порядку. RetryAfter приостанавливает
+        всю рассылку на указанное Telegram время.
+        
         Args:
             notifications: Список кортежей (notification, telegram_id, variables)
+            concurrency: Максимум одновременных отправок (по умолчанию из settings)
             
         Returns:
-            Статистика отправки: {sent: int, failed: int, errors: list}
+            Статистика отправки: {sent, failed, errors, latency, duration_seconds}
         """
-        results = {
-            "sent": 0,
-            "failed": 0,
-            "errors": []
-        }
+        messages = [
+            BulkMessage(
+                chat_key=telegram_id,
+                send=lambda n=notification, t=telegram_id, v=variables: self.send_notification(
+                    notification=n, telegram_id=t, variables=v
+                ),
+                ref=notification.id,
+                meta={"notification_id": notification.id, "telegram_id": telegram_id}
+            )
+            for notification, telegram_id, variables in notifications
+        ]
         
-        for notification, telegram_id, variables in notifications:
-            try:
-                success = await self.send_notification(
-                    notification=notification,
-                    telegram_id=telegram_id,
-                    variables=variables
-                )
-                
-                if success:
-                    results["sent"] += 1
-                else:
-                    results["failed"] += 1
-                    results["errors"].append({
-                        "notification_id": notification.id,
-                        "telegram_id": telegram_id,
-                        "reason": "Send failed"
-                    })
-                    
-            except Exception as e:
-                results["failed"] += 1
-                results["errors"].append({
-                    "notification_id": notification.id,
-                    "telegram_id": telegram_id,
-                    "reason": str(e)
-                })
-                
-                logger.error(
-                    f"Error in bulk notification send",
-                    notification_id=notification.id,
-                    telegram_id=telegram_id,
-                    error=str(e)
-                )
+        sender = BulkSender(
+            concurrency=concurrency or settings.notification_dispatch_concurrency,
+            throttle=self.throttle
+        )
+        results = (await sender.send(messages)).as_dict()
         
         logger.info(
             f"Bulk notification send completed",
             sent=results["sent"],
             failed=results["failed"],
-            total=len(notifications)
+            total=len(notifications),
+            p95_ms=results["latency"]["p95_ms"],
+            duration_seconds=results["duration_seconds"]
         )
         
         return results
     
+    async def send_text(
+        self,
+        chat_id: int | str,
+        text: str,
+        parse_mode: Optional[str] = ParseMode.HTML
+    ) -> bool:
+        """Отправка произвольного текста с теми же повторами и лимитами, что у уведомлений."""
+        return await self._send_with_retry(telegram_id=chat_id, message=text, parse_mode=parse_mode)
+    
+    async def send_bulk_texts(
+        self,
+        messages: list[tuple[int | str, str, Dict[str, Any]]],
+        parse_mode: Optional[str] = ParseMode.HTML,
+        concurrency: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Массовая отправка произвольных текстов (рассылки, поздравления).
+        
+        Args:
+            messages: Список кортежей (chat_id, text, meta); meta попадает в errors
+            parse_mode: Режим парсинга
+            concurrency: Максимум одновременных отправок (по умолчанию из settings)
+            
+        Returns:
+            Статистика отправки: {sent, failed, errors, latency, duration_seconds}
+        """
+        bulk_messages = [
+            BulkMessage(
+                chat_key=chat_id,
+                send=lambda c=chat_id, t=text: self.send_text(c, t, parse_mode=parse_mode),
+                meta={"chat_id": chat_id, **meta}
+            )
+            for chat_id, text, meta in messages
+        ]
+        sender = BulkSender(
+            concurrency=concurrency or settings.notification_dispatch_concurrency,
+            throttle=self.throttle
+        )
+        return (await sender.send(bulk_messages)).as_dict()
+    
     async def test_connection(self) -> bool:
         """
         Проверка подключения к Telegram API.
@@ -354,10 +413,59 @@ class TelegramNotificationSender:
             return False
 
 
-def get_telegram_sender() -> TelegramNotificationSender:
+# Отправщики по event loop: HTTP-клиент бота привязан к loop, в котором используется
+_throttles: Dict[str, MessageThrottle] = {}
+
+
+def get_telegram_throttle(bot_token: str) -> MessageThrottle:
     """
-    Создание экземпляра Telegram отправщика.
-    Каждый вызов создаёт новый экземпляр — безопасно для Celery (asyncio.run).
+    Лимиты отправки бота, общие для всех отправщиков процесса.
+
+    Bot API ограничивает скорость на токен, поэтому отправщики с разными
+    пулами соединений (и в разных event loop) расходуют один бюджет.
     """
-    return TelegramNotificationSender()
+    throttle = _throttles.get(bot_token)
+    if throttle is None:
+        throttle = _throttles[bot_token] = MessageThrottle(
+            global_rate=settings.telegram_global_rate_limit,
+            chat_rate=settings.telegram_chat_rate_limit,
+            chat_burst=settings.telegram_chat_burst
+        )
+    return throttle
+
+
+_loop_senders: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Optional[int], TelegramNotificationSender]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_telegram_sender(connection_pool_size: Optional[int] = None) -> TelegramNotificationSender:
+    """
+    Отправщик Telegram, общий для текущего event loop.
 
+    В долгоживущем loop (воркер Celery, веб-приложение) соединения с Bot API
+    и лимиты отправки переиспользуются между задачами. Вне event loop
+    создается новый экземпляр.
+    """
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return TelegramNotificationSender(connection_pool_size=connection_pool_size)
+
+    senders = _loop_senders.setdefault(loop, {})
+    sender = senders.get(connection_pool_size)
+    if sender is None:
+        sender = senders[connection_pool_size] = TelegramNotificationSender(
+            connection_pool_size=connection_pool_size
+        )
+    return sender
+
+
+async def close_telegram_senders() -> None:
+    """Закрыть HTTP-соединения отправщиков текущего event loop."""
+    senders = _loop_senders.pop(asyncio.get_running_loop(), {})
+    for sender in senders.values():
+        try:
+            await sender._request.shutdown()
+        except Exception as e:
+            logger.warning(f"Failed to close Telegram sender: {e}")
@@ -0,0 +1,116 @@
+"""Ограничение частоты исходящих сообщений мессенджеров (token bucket)."""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+
+class TokenBucket:
+    """Token bucket с резервированием токенов.
+
+    Каждый вызов сразу резервирует токен (баланс может уйти в минус) и
+    получает время ожидания своей очереди, поэтому конкурентные корутины
+    обслуживаются по порядку без повторных проверок.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def reserve(self) -> float:
+        """Зарезервировать токен; возвращает, сколько секунд ждать до его получения."""
+        now = time.monotonic()
+        self._refill(now)
+        self._tokens -= 1
+        if self._tokens >= 0:
+            return 0.0
+        return -self._tokens / self.rate
+
+    async def acquire(self) -> None:
+        """Дождаться токена."""
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    @property
+    def is_idle(self) -> bool:
+        """Бакет полностью восстановился (его можно выбросить без потери лимита)."""
+        self._refill(time.monotonic())
+        return self._tokens >= self.capacity
+
+
+class MessageThrottle:
+    """Глобальный лимит отправки и лимит на один чат.
+
+    Лимиты действуют в пределах процесса: при нескольких воркерах очереди
+    уведомлений глобальную скорость нужно делить между ними.
+    """
+
+    def __init__(
+        self,
+        global_rate: float,
+        chat_rate: float,
+        chat_burst: int = 1,
+        max_chats: int = 10000
+    ):
+        self.global_bucket = TokenBucket(global_rate, capacity=global_rate)
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_chats = max_chats
+        self._chats: "OrderedDict[Hashable, TokenBucket]" = OrderedDict()
+        self._paused_until = 0.0
+
+    def _chat_bucket(self, chat_id: Hashable) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) >= self.max_chats:
+                self._evict_idle()
+            bucket = TokenBucket(self.chat_rate, capacity=self.chat_burst)
+            self._chats[chat_id] = bucket
+        else:
+            self._chats.move_to_end(chat_id)
+        return bucket
+
+    def _evict_idle(self) -> None:
+        for chat_id in [chat_id for chat_id, bucket in self._chats.items() if bucket.is_idle]:
+            del self._chats[chat_id]
+        while len(self._chats) >= self.max_chats:
+            self._chats.popitem(last=False)
+
+    async def acquire_chat(self, chat_id: Hashable) -> None:
+        """Дождаться лимита чата."""
+        await self._chat_bucket(chat_id).acquire()
+
+    def pause(self, seconds: float) -> None:
+        """Общая пауза всех отправок (flood control: RetryAfter, HTTP 429).
+
+        Одна ошибка flood control останавливает все корутины, а не только
+        получившую ее: иначе остальные продолжают слать и продлевают бан.
+        """
+        self._paused_until = max(self._paused_until, time.monotonic() + max(0.0, seconds))
+
+    @property
+    def paused_for(self) -> float:
+        """Сколько секунд осталось до конца общей паузы."""
+        return max(0.0, self._paused_until - time.monotonic())
+
+    async def acquire_global(self) -> None:
+        """Дождаться конца общей паузы и глобального лимита."""
+        while self.paused_for > 0:
+            await asyncio.sleep(self.paused_for)
+        await self.global_bucket.acquire()
+
+    async def acquire(self, chat_id: Optional[Hashable] = None) -> None:
+        """Дождаться права на отправку сообщения в чат."""
+        if chat_id is not None:
+            await self.acquire_chat(chat_id)
+        await self.acquire_global()
@@ -5,7 +5,7 @@ from decimal import Decimal
 from datetime import datetime, timezone
 from sqlalchemy import select, and_
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload, joinedload
+from sqlalchemy.orm import selectinload
 
 from domain.entities.shift_schedule import ShiftSchedule
 from domain.entities.shift_cancellation import ShiftCancellation
@@ -15,6 +15,7 @@ from domain.entities.payroll_adjustment import PayrollAdjustment
 from domain.entities.user import User
 from core.logging.logger import logger
 from shared.services.cancellation_policy_service import CancellationPolicyService
+from shared.services.org_structure_closure_service import get_object_cancellation_settings
 from shared.services.shift_history_service import ShiftHistoryService
 from shared.services.shift_notification_service import ShiftNotificationService
 from shared.services.shift_status_sync_service import ShiftStatusSyncService
@@ -96,10 +97,8 @@ class ShiftCancellationService:
                 "hours_before_shift": float(hours_before_shift) if hours_before_shift is not None else None,
             }
             
-            # Получаем объект для настроек штрафов (с eager loading org_unit и цепочки parent'ов)
-            object_query = select(Object).where(Object.id == shift.object_id).options(
-                joinedload(Object.org_unit).joinedload('parent').joinedload('parent').joinedload('parent').joinedload('parent')
-            )
+            # Получаем объект для настроек штрафов (наследуемые настройки — из проекции подразделения)
+            object_query = select(Object).where(Object.id == shift.object_id)
             object_result = await self.session.execute(object_query)
             obj = object_result.scalar_one_or_none()
             
@@ -242,7 +241,7 @@ class ShiftCancellationService:
 
             # Базовая логика по настройкам объекта (для совместимости)
             if obj and total_fine == 0:
-                settings = obj.get_cancellation_settings()
+                settings = await get_object_cancellation_settings(self.session, obj)
                 short_notice_hours = settings.get('short_notice_hours')
                 short_notice_fine = settings.get('short_notice_fine')
                 invalid_reason_fine = settings.get('invalid_reason_fine')
@@ -511,15 +510,13 @@ class ShiftCancellationService:
             
             # Если справка отклонена ИЛИ причина не уважительная - создаем штрафы
             elif not is_approved or (reason_obj and not reason_obj.treated_as_valid):
-                # Получаем объект для настроек (с eager loading org_unit и цепочки parent'ов)
-                object_query = select(Object).where(Object.id == cancellation.object_id).options(
-                    joinedload(Object.org_unit).joinedload('parent').joinedload('parent').joinedload('parent').joinedload('parent')
-                )
+                # Получаем объект для настроек (наследуемые настройки — из проекции подразделения)
+                object_query = select(Object).where(Object.id == cancellation.object_id)
                 object_result = await self.session.execute(object_query)
                 obj = object_result.scalar_one_or_none()
                 
                 if obj:
-                    cancellation_settings = obj.get_cancellation_settings()
+                    cancellation_settings = await get_object_cancellation_settings(self.session, obj)
                     short_notice_hours = cancellation_settings.get('short_notice_hours')
                     short_notice_fine = cancellation_settings.get('short_notice_fine')
                     invalid_reason_fine = cancellation_settings.get('invalid_reason_fine')
@@ -0,0 +1,355 @@
+"""Вместимость тайм-слотов: свободные интервалы и бронирование без гонок.
+
+Занятость всех тайм-слотов одного объекта на дату считается одним проходом
+заметающей прямой по границам слотов и смен (O((S + B) log(S + B)) вместо
+перебора всех смен для каждого слота). Для каждого слота получается
+разбиение его окна на отрезки с числом одновременно занятых мест; отсюда
+свободные интервалы (занято меньше max_employees), пиковая загрузка и
+занятые минуты.
+
+Смена учитывается в своем тайм-слоте (time_slot_id), а смена без привязки
+(старые записи, спонтанные смены) — во всех слотах объекта-дня, с которыми
+пересекается по времени. Интервалы полуоткрытые: смены 09-12 и 12-15 одно
+место не делят.
+
+Бронирование сериализуется по объекту-дню: lock_timeslot() берет строки
+всех слотов объекта на дату (SELECT ... FOR UPDATE в порядке id) до проверки
+вместимости, и конкурирующая транзакция ждет коммита первой, после чего
+видит ее смену. Смена без привязки занимает место в нескольких слотах,
+поэтому блокировки одной строки слота недостаточно; создание такой смены
+берет ту же блокировку через lock_object_day().
+"""
+
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import pytz
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from domain.entities.shift_schedule import ShiftSchedule
+from domain.entities.time_slot import TimeSlot
+
+
+DEFAULT_TIMEZONE = "Europe/Moscow"
+BOOKED_STATUSES = ("planned", "confirmed")
+
+# Порядок событий в одной точке: сначала закрываются смены и слоты,
+# потом открываются (полуоткрытые интервалы)
+_BOOKING_END, _SLOT_END, _BOOKING_START, _SLOT_START = range(4)
+
+Segment = Tuple[datetime, datetime, int]
+
+
+def get_timezone(name: Optional[str]) -> pytz.BaseTzInfo:
+    """Временная зона объекта (по умолчанию Europe/Moscow)."""
+    try:
+        return pytz.timezone(name or DEFAULT_TIMEZONE)
+    except pytz.UnknownTimeZoneError:
+        return pytz.timezone(DEFAULT_TIMEZONE)
+
+
+def as_utc(value: datetime) -> datetime:
+    """Naive datetime в БД хранится в UTC."""
+    if value.tzinfo is None:
+        return pytz.UTC.localize(value)
+    return value.astimezone(pytz.UTC)
+
+
+@dataclass(frozen=True)
+class SlotWindow:
+    """Окно тайм-слота в абсолютном времени."""
+
+    slot_id: int
+    start: datetime
+    end: datetime
+    max_employees: int = 1
+    tz: pytz.BaseTzInfo = pytz.UTC
+
+    @classmethod
+    def local(
+        cls,
+        slot_id: int,
+        slot_date: date,
+        start_time: time,
+        end_time: time,
+        max_employees: Optional[int],
+        tz: pytz.BaseTzInfo
+    ) -> "SlotWindow":
+        """Окно по локальным дате и времени слота в зоне объекта."""
+        return cls(
+            slot_id=slot_id,
+            start=tz.localize(datetime.combine(slot_date, start_time)),
+            end=tz.localize(datetime.combine(slot_date, end_time)),
+            max_employees=max_employees or 1,
+            tz=tz,
+        )
+
+    @classmethod
+    def from_timeslot(cls, slot: TimeSlot, tz: pytz.BaseTzInfo) -> "SlotWindow":
+        return cls.local(slot.id, slot.slot_date, slot.start_time, slot.end_time, slot.max_employees, tz)
+
+
+@dataclass(frozen=True)
+class Booking:
+    """Занятое место: смена в слоте (time_slot_id) или без привязки (None).
+
+    end=None — смена еще не закрыта, занимает место до конца дня.
+    """
+
+    start: datetime
+    end: Optional[datetime] = None
+    time_slot_id: Optional[int] = None
+
+    @classmethod
+    def from_schedule(cls, schedule: ShiftSchedule) -> "Booking":
+        return cls(
+            start=as_utc(schedule.planned_start),
+            end=as_utc(schedule.planned_end) if schedule.planned_end else None,
+            time_slot_id=schedule.time_slot_id,
+        )
+
+
+@dataclass
+class SlotCapacity:
+    """Занятость окна тайм-слота."""
+
+    window: SlotWindow
+    # Отрезки, покрывающие окно целиком: (начало, конец, занято мест)
+    segments: List[Segment] = field(default_factory=list)
+    # Смены, пересекающиеся с окном
+    bookings: int = 0
+
+    @property
+    def max_employees(self) -> int:
+        return self.window.max_employees
+
+    @property
+    def peak(self) -> int:
+        """Наибольшее число одновременно занятых мест."""
+        return max((count for _, _, count in self.segments), default=0)
+
+    @property
+    def available(self) -> int:
+        """Свободных мест в самый загруженный момент."""
+        return max(0, self.max_employees - self.peak)
+
+    @property
+    def occupied_minutes(self) -> float:
+        """Занятые человеко-минуты (не больше вместимости)."""
+        return sum(
+            min(count, self.max_employees) * (end - start).total_seconds() / 60
+            for start, end, count in self.segments
+        )
+
+    @property
+    def capacity_minutes(self) -> float:
+        return max(0.0, (self.window.end - self.window.start).total_seconds() / 60) * self.max_employees
+
+    def free_intervals(self) -> List[Tuple[datetime, datetime]]:
+        """Интервалы, где есть свободное место (в зоне объекта)."""
+        intervals: List[Tuple[datetime, datetime]] = []
+        for start, end, count in self.segments:
+            if count >= self.max_employees:
+                continue
+            if intervals and intervals[-1][1] == start:
+                intervals[-1] = (intervals[-1][0], end)
+            else:
+                intervals.append((start, end))
+        return [(start.astimezone(self.window.tz), end.astimezone(self.window.tz)) for start, end in intervals]
+
+    def free_time_intervals(self) -> List[Tuple[time, time]]:
+        """Свободные интервалы как локальное время суток."""
+        return [(start.time(), end.time()) for start, end in self.free_intervals()]
+
+    def load(self, start: datetime, end: datetime) -> int:
+        """Наибольшая занятость внутри [start, end)."""
+        return max((count for seg_start, seg_end, count in self.segments if seg_start < end and start < seg_end), default=0)
+
+    def fits(self, start: datetime, end: datetime) -> bool:
+        """Поместится ли еще одна смена [start, end)."""
+        if not (self.window.start <= start < end <= self.window.end):
+            return False
+        return self.load(start, end) < self.max_employees
+
+
+def compute_capacity(windows: Iterable[SlotWindow], bookings: Iterable[Booking]) -> Dict[int, SlotCapacity]:
+    """Занятость тайм-слотов одного объекта-дня одним проходом.
+
+    Returns:
+        {slot_id: SlotCapacity}
+    """
+    result: Dict[int, SlotCapacity] = {}
+    events: List[Tuple[datetime, int, object]] = []
+    for window in windows:
+        result[window.slot_id] = SlotCapacity(window=window)
+        if window.end > window.start:
+            events.append((window.start, _SLOT_START, window.slot_id))
+            events.append((window.end, _SLOT_END, window.slot_id))
+    for booking in bookings:
+        if booking.end is not None and booking.end <= booking.start:
+            continue
+        events.append((booking.start, _BOOKING_START, booking.time_slot_id))
+        if booking.end is not None:
+            events.append((booking.end, _BOOKING_END, booking.time_slot_id))
+    if not events:
+        return result
+
+    events.sort(key=lambda item: (item[0], item[1]))
+
+    # Открытые смены по слоту привязки (None — без привязки)
+    open_bookings: Dict[Optional[int], int] = {}
+    active: Dict[int, SlotCapacity] = {}
+
+    def occupied(slot_id: int) -> int:
+        return open_bookings.get(slot_id, 0) + open_bookings.get(None, 0)
+
+    index = 0
+    while index < len(events):
+        point = events[index][0]
+        while index < len(events) and events[index][0] == point:
+            _, kind, key = events[index]
+            index += 1
+            if kind == _BOOKING_END:
+                open_bookings[key] -= 1
+            elif kind == _SLOT_END:
+                active.pop(key, None)
+            elif kind == _BOOKING_START:
+                open_bookings[key] = open_bookings.get(key, 0) + 1
+                if key is None:
+                    for capacity in active.values():
+                        capacity.bookings += 1
+                elif key in active:
+                    active[key].bookings += 1
+            else:
+                capacity = result[key]
+                active[key] = capacity
+                capacity.bookings += occupied(key)
+
+        if not active or index == len(events):
+            continue
+        next_point = events[index][0]
+        for slot_id, capacity in active.items():
+            count = occupied(slot_id)
+            segments = capacity.segments
+            if segments and segments[-1][2] == count:
+                segments[-1] = (segments[-1][0], next_point, count)
+            else:
+                segments.append((point, next_point, count))
+    return result
+
+
+def local_day_bounds(slot_date: date, tz: pytz.BaseTzInfo) -> Tuple[datetime, datetime]:
+    """Границы локального дня в UTC."""
+    start = tz.localize(datetime.combine(slot_date, time.min))
+    end = tz.localize(datetime.combine(slot_date + timedelta(days=1), time.min))
+    return start.astimezone(pytz.UTC), end.astimezone(pytz.UTC)
+
+
+async def load_bookings(
+    session: AsyncSession,
+    object_id: int,
+    slot_date: date,
+    slot_ids: Sequence[int],
+    tz: pytz.BaseTzInfo,
+    exclude_schedule_id: Optional[int] = None
+) -> List[Booking]:
+    """Запланированные смены объекта-дня одним запросом: привязанные к слотам
+    и без привязки, пересекающиеся с локальным днем."""
+    day_start, day_end = local_day_bounds(slot_date, tz)
+    unlinked = and_(
+        ShiftSchedule.time_slot_id.is_(None),
+        ShiftSchedule.planned_start < day_end,
+        ShiftSchedule.planned_end > day_start,
+    )
+    scope = or_(ShiftSchedule.time_slot_id.in_(list(slot_ids)), unlinked) if slot_ids else unlinked
+    query = select(ShiftSchedule).where(
+        ShiftSchedule.object_id == object_id,
+        ShiftSchedule.status.in_(BOOKED_STATUSES),
+        scope,
+    )
+    if exclude_schedule_id is not None:
+        query = query.where(ShiftSchedule.id != exclude_schedule_id)
+    schedules = (await session.execute(query)).scalars().all()
+    return [Booking.from_schedule(schedule) for schedule in schedules if schedule.planned_start]
+
+
+async def get_object_day_capacity(
+    session: AsyncSession,
+    slots: Sequence[TimeSlot],
+    tz: pytz.BaseTzInfo,
+    exclude_schedule_id: Optional[int] = None
+) -> Dict[int, SlotCapacity]:
+    """Занятость тайм-слотов одного объекта на одну дату."""
+    if not slots:
+        return {}
+    bookings = await load_bookings(
+        session,
+        slots[0].object_id,
+        slots[0].slot_date,
+        [slot.id for slot in slots],
+        tz,
+        exclude_schedule_id=exclude_schedule_id,
+    )
+    return compute_capacity((SlotWindow.from_timeslot(slot, tz) for slot in slots), bookings)
+
+
+async def lock_object_day(session: AsyncSession, object_id: int, slot_date: date) -> List[TimeSlot]:
+    """Блокирует все тайм-слоты объекта на дату до конца транзакции (SELECT ... FOR UPDATE).
+
+    Строки берутся в порядке id, поэтому конкурирующие бронирования одного
+    объекта-дня не взаимоблокируются.
+    """
+    query = (
+        select(TimeSlot)
+        .where(TimeSlot.object_id == object_id, TimeSlot.slot_date == slot_date)
+        .order_by(TimeSlot.id)
+        .with_for_update()
+    )
+    return list((await session.execute(query)).scalars().all())
+
+
+async def lock_timeslot(session: AsyncSession, timeslot_id: int) -> Optional[TimeSlot]:
+    """Блокирует тайм-слот вместе со всеми слотами его объекта-дня.
+
+    Вызывается перед проверкой вместимости и вставкой смены. Смена без
+    привязки занимает место во всех пересекающихся слотах объекта-дня,
+    поэтому блокируется весь объект-день, а не только строка слота.
+    """
+    slot_day = (
+        await session.execute(select(TimeSlot.object_id, TimeSlot.slot_date).where(TimeSlot.id == timeslot_id))
+    ).one_or_none()
+    if slot_day is None:
+        return None
+    slots = await lock_object_day(session, slot_day.object_id, slot_day.slot_date)
+    return next((slot for slot in slots if slot.id == timeslot_id), None)
+
+
+async def locked_slot_capacity(
+    session: AsyncSession,
+    timeslot: TimeSlot,
+    tz: pytz.BaseTzInfo,
+    exclude_schedule_id: Optional[int] = None
+) -> SlotCapacity:
+    """Блокировка объекта-дня тайм-слота и занятость слота — перед созданием или переносом смены.
+
+    exclude_schedule_id — редактируемая смена, которая не занимает место.
+    """
+    await lock_timeslot(session, timeslot.id)
+    capacity = await get_object_day_capacity(session, [timeslot], tz, exclude_schedule_id=exclude_schedule_id)
+    return capacity[timeslot.id]
+
+
+async def get_slot_free_intervals(
+    session: AsyncSession,
+    slot: TimeSlot,
+    tz_name: Optional[str]
+) -> List[Dict[str, str]]:
+    """Свободные интервалы тайм-слота для модалки планирования: [{"start": "HH:MM", "end": "HH:MM"}]."""
+    tz = get_timezone(tz_name)
+    capacity = (await get_object_day_capacity(session, [slot], tz))[slot.id]
+    return [
+        {"start": start.strftime("%H:%M"), "end": end.strftime("%H:%M")}
+        for start, end in capacity.free_time_intervals()
+    ]
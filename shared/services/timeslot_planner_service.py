@@ -0,0 +1,266 @@
+"""Пакетное создание тайм-слотов по графику работы и шаблонам планирования.
+
+Раньше годовое планирование делало SELECT на каждый рабочий день каждого
+объекта, а применение шаблона создавало слоты по одному через
+TimeSlotService.create_timeslot (проверки и commit на каждый слот).
+Здесь работа разбита на фазы:
+
+1. plan — даты считаются арифметикой по маске дней недели и периоду
+   повторения (без обхода всех дней периода с проверками);
+2. load — существующие слоты всех объектов за период загружаются одним
+   запросом;
+3. write — недостающие слоты вставляются пакетами
+   INSERT ... ON CONFLICT DO NOTHING, всё в одной транзакции.
+
+Маска дней недели: бит 1 << weekday() (понедельник — бит 0), как в
+Object.work_days_mask.
+"""
+
+import time as time_module
+from dataclasses import dataclass, field
+from datetime import date, time, timedelta
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.cache.calendar_cache import mark_changed_days
+from core.logging.logger import logger
+from domain.entities.time_slot import TimeSlot
+
+
+ALL_DAYS_MASK = 0b1111111
+WORK_WEEK_MASK = 0b0011111  # пн-пт, значение по умолчанию Object.work_days_mask
+
+# Строк в одном INSERT: 12 колонок × 1000 строк — с запасом ниже
+# лимита PostgreSQL на число параметров запроса (32767)
+TIMESLOT_INSERT_BATCH = 1000
+
+
+@dataclass(frozen=True)
+class PlannedSlot:
+    """Тайм-слот, который нужно создать."""
+
+    object_id: int
+    slot_date: date
+    start_time: time
+    end_time: time
+    hourly_rate: Optional[Decimal] = None
+    max_employees: int = 1
+    notes: str = ''
+
+
+@dataclass
+class MaterializeResult:
+    """Итог пакетного создания тайм-слотов."""
+
+    created: List[Dict[str, Any]] = field(default_factory=list)  # id, object_id, slot_date, start_time, end_time
+    skipped: int = 0  # уже существовали или повторялись во входных данных
+    timings: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def created_count(self) -> int:
+        return len(self.created)
+
+
+def weekday_mask(days: Iterable[int]) -> int:
+    """Маска из номеров дней недели (0 — понедельник)."""
+    mask = 0
+    for day in days:
+        mask |= 1 << (int(day) % 7)
+    return mask
+
+
+def repeat_weekday_mask(repeat_type: Optional[str], repeat_days: Optional[str]) -> int:
+    """Маска дней для правил повторения шаблона планирования.
+
+    Те же правила, что в TemplateService._should_create_slots_for_date:
+    none — ни одного дня, daily/monthly — каждый день, weekly — дни из
+    repeat_days (номера weekday() через запятую), если они не заданы — каждый день.
+    """
+    if repeat_type in ("daily", "monthly"):
+        return ALL_DAYS_MASK
+    if repeat_type == "weekly":
+        days = [d for d in (repeat_days or "").split(",") if d.strip()]
+        return weekday_mask(days) if days else ALL_DAYS_MASK
+    return 0
+
+
+def plan_dates(
+    start_date: date,
+    end_date: date,
+    days_mask: int = ALL_DAYS_MASK,
+    repeat_weeks: int = 1,
+) -> List[date]:
+    """Даты периода, попадающие в маску дней недели и цикл повторения.
+
+    Недели цикла отсчитываются от понедельника недели start_date: при
+    repeat_weeks=2 берется неделя start_date, через одну и т.д. (номер
+    ISO-недели не используется, поэтому цикл не сбивается на границе года).
+    """
+    if end_date < start_date or not days_mask & ALL_DAYS_MASK:
+        return []
+
+    step = timedelta(weeks=max(int(repeat_weeks or 1), 1))
+    anchor = start_date - timedelta(days=start_date.weekday())
+    result: List[date] = []
+    for weekday in range(7):
+        if not days_mask & (1 << weekday):
+            continue
+        current = anchor + timedelta(days=weekday)
+        if current < start_date:
+            current += step
+        while current <= end_date:
+            result.append(current)
+            current += step
+    result.sort()
+    return result
+
+
+def _slot_key(slot: Any, match_times: bool) -> Tuple:
+    if match_times:
+        return (slot.object_id, slot.slot_date, slot.start_time, slot.end_time)
+    return (slot.object_id, slot.slot_date)
+
+
+def filter_new_slots(
+    slots: Iterable[PlannedSlot],
+    existing_keys: Set[Tuple],
+    match_times: bool = True,
+) -> Tuple[List[PlannedSlot], int]:
+    """Слоты, которых еще нет (и без повторов внутри входных данных).
+
+    Returns:
+        (новые слоты, число пропущенных)
+    """
+    seen = set(existing_keys)
+    new_slots: List[PlannedSlot] = []
+    skipped = 0
+    for slot in slots:
+        key = _slot_key(slot, match_times)
+        if key in seen:
+            skipped += 1
+            continue
+        seen.add(key)
+        new_slots.append(slot)
+    return new_slots, skipped
+
+
+def _insert_row(slot: PlannedSlot) -> Dict[str, Any]:
+    # Значения по умолчанию — как в TimeSlotService.create_timeslot
+    return {
+        "object_id": slot.object_id,
+        "slot_date": slot.slot_date,
+        "start_time": slot.start_time,
+        "end_time": slot.end_time,
+        "hourly_rate": slot.hourly_rate,
+        "max_employees": slot.max_employees,
+        "is_additional": False,
+        "is_active": True,
+        "notes": slot.notes,
+        "penalize_late_start": True,
+        "ignore_object_tasks": False,
+    }
+
+
+class TimeslotPlanner:
+    """Пакетная запись тайм-слотов в одной транзакции."""
+
+    def __init__(self, session: AsyncSession, batch_size: int = TIMESLOT_INSERT_BATCH):
+        self.session = session
+        self.batch_size = batch_size
+
+    async def load_existing_keys(
+        self,
+        object_ids: Iterable[int],
+        start_date: date,
+        end_date: date,
+        match_times: bool = True,
+        active_only: bool = True,
+    ) -> Set[Tuple]:
+        """Ключи существующих слотов объектов за период (один запрос)."""
+        object_ids = sorted(set(object_ids))
+        if not object_ids:
+            return set()
+
+        columns = [TimeSlot.object_id, TimeSlot.slot_date]
+        if match_times:
+            columns += [TimeSlot.start_time, TimeSlot.end_time]
+        query = select(*columns).where(
+            TimeSlot.object_id.in_(object_ids),
+            TimeSlot.slot_date >= start_date,
+            TimeSlot.slot_date <= end_date,
+        )
+        if active_only:
+            query = query.where(TimeSlot.is_active == True)
+
+        result = await self.session.execute(query)
+        return {tuple(row) for row in result.all()}
+
+    async def materialize(
+        self,
+        slots: Sequence[PlannedSlot],
+        match_times: bool = True,
+        active_only: bool = True,
+        commit: bool = True,
+    ) -> MaterializeResult:
+        """Создать недостающие тайм-слоты.
+
+        Args:
+            slots: Слоты к созданию (могут повторять существующие)
+            match_times: Дубликат — тот же объект, дата и время (иначе — любой слот объекта в эту дату)
+            active_only: Учитывать только активные слоты (удаленные можно пересоздать)
+            commit: Зафиксировать транзакцию (иначе commit остается вызывающему)
+
+        В time_slots нет уникального ключа на дату (в день бывает несколько
+        слотов), поэтому дубликаты отсекаются по загруженным ключам, а
+        ON CONFLICT DO NOTHING страхует вставку от конфликтов по ключам таблицы.
+        """
+        result = MaterializeResult()
+        if not slots:
+            return result
+
+        started = time_module.perf_counter()
+        existing = await self.load_existing_keys(
+            (slot.object_id for slot in slots),
+            min(slot.slot_date for slot in slots),
+            max(slot.slot_date for slot in slots),
+            match_times=match_times,
+            active_only=active_only,
+        )
+        new_slots, result.skipped = filter_new_slots(slots, existing, match_times)
+        loaded = time_module.perf_counter()
+        result.timings["load"] = round(loaded - started, 4)
+
+        for offset in range(0, len(new_slots), self.batch_size):
+            batch = new_slots[offset:offset + self.batch_size]
+            statement = (
+                pg_insert(TimeSlot)
+                .values([_insert_row(slot) for slot in batch])
+                .on_conflict_do_nothing()
+                .returning(
+                    TimeSlot.id,
+                    TimeSlot.object_id,
+                    TimeSlot.slot_date,
+                    TimeSlot.start_time,
+                    TimeSlot.end_time,
+                )
+            )
+            rows = await self.session.execute(statement)
+            result.created.extend(dict(row._mapping) for row in rows)
+
+        mark_changed_days(
+            self.session,
+            {(row["object_id"], row["slot_date"]) for row in result.created},
+        )
+        if commit:
+            await self.session.commit()
+        result.timings["write"] = round(time_module.perf_counter() - loaded, 4)
+
+        logger.info(
+            f"Timeslots materialized: created={result.created_count}, skipped={result.skipped}",
+            timings=result.timings,
+        )
+        return result
@@ -1,6 +1,6 @@
 """Шаблоны уведомлений."""
 
 from .base_templates import NotificationTemplateManager
+from .registry import NotificationTemplateRegistry, notification_templates
 
-__all__ = ["NotificationTemplateManager"]
-
+__all__ = ["NotificationTemplateManager", "NotificationTemplateRegistry", "notification_templates"]
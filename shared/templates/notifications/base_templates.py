@@ -1,7 +1,6 @@
 """Шаблоны уведомлений для StaffProBot."""
 
-from typing import Dict, Any, Optional
-from string import Template
+from typing import Dict, Any, List, Optional
 from domain.entities.notification import NotificationType, NotificationChannel
 from core.logging.logger import logger
 
@@ -473,41 +472,34 @@ class NotificationTemplateManager:
             
         Returns:
             Словарь с title, message (plain или html в зависимости от канала)
+        
+        Кастомные шаблоны из БД переопределяют статические (см. registry).
         """
-        try:
-            # Получаем шаблон
-            template_data = cls.ALL_TEMPLATES.get(notification_type)
-            
-            if not template_data:
-                logger.warning(f"Template not found for {notification_type.value}")
-                return {
-                    "title": "Уведомление",
-                    "message": "Содержимое уведомления недоступно."
-                }
-            
-            # Определяем формат в зависимости от канала
-            if channel in (NotificationChannel.TELEGRAM, NotificationChannel.MAX):
-                message_template = template_data.get("telegram", template_data.get("plain", ""))
-            elif channel in [NotificationChannel.EMAIL, NotificationChannel.IN_APP]:
-                message_template = template_data.get("html", template_data.get("plain", ""))
-            else:
-                message_template = template_data.get("plain", "")
-            
-            # Рендерим с подстановкой переменных
-            title = Template(template_data["title"]).safe_substitute(variables)
-            message = Template(message_template).safe_substitute(variables)
-            
-            return {
-                "title": title,
-                "message": message
-            }
+        from .registry import notification_templates
+
+        return notification_templates.render(notification_type, channel, variables)
+    
+    @classmethod
+    def render_many(
+        cls,
+        notification_type: NotificationType,
+        channel: NotificationChannel,
+        variables_list: List[Dict[str, Any]]
+    ) -> List[Dict[str, str]]:
+        """
+        Рендеринг одного шаблона для многих получателей (шаблон компилируется один раз).
+        
+        Args:
+            notification_type: Тип уведомления
+            channel: Канал доставки
+            variables_list: Переменные для подстановки по получателям
             
-        except Exception as e:
-            logger.error(f"Error rendering template: {e}", notification_type=notification_type.value, error=str(e))
-            return {
-                "title": "Уведомление",
-                "message": "Ошибка при формировании сообщения."
-            }
+        Returns:
+            Список словарей с title, message в порядке variables_list
+        """
+        from .registry import notification_templates
+
+        return notification_templates.render_many(notification_type, channel, variables_list)
     
     @classmethod
     def get_template_variables(cls, notification_type: NotificationType) -> list[str]:
@@ -0,0 +1,186 @@
+"""Реестр скомпилированных шаблонов уведомлений.
+
+Шаблоны компилируются в string.Template один раз на пару (тип, канал):
+статические — при первом обращении, кастомные (NotificationTemplate) — при
+загрузке из БД.
+
+По умолчанию рассылка, как и раньше, использует только статические шаблоны.
+С settings.notification_templates_custom_override кастомный шаблон канала
+переопределяет кастомный шаблон для всех каналов, тот — статический.
+
+Кастомные шаблоны перезагружаются одним запросом, когда меняется версия
+тега (core.cache.notification_template_cache); без Redis — не чаще
+settings.notification_templates_refresh_seconds. Рендер синхронный и не
+обращается к БД: перед циклом рассылки достаточно вызвать refresh().
+"""
+
+import time
+from dataclasses import dataclass
+from string import Template
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+
+from core.cache import notification_template_cache
+from core.config.settings import settings
+from core.database.session import get_async_session
+from core.logging.logger import logger
+from domain.entities.notification import NotificationChannel, NotificationType
+from domain.entities.notification_template import NotificationTemplate
+
+
+DEFAULT_TITLE = "Уведомление"
+NOT_FOUND_MESSAGE = "Содержимое уведомления недоступно."
+ERROR_MESSAGE = "Ошибка при формировании сообщения."
+
+TemplateKey = Tuple[NotificationType, Optional[NotificationChannel]]
+
+
+def message_format(channel: NotificationChannel) -> str:
+    """Формат сообщения канала: telegram | html | plain."""
+    if channel in (NotificationChannel.TELEGRAM, NotificationChannel.MAX):
+        return "telegram"
+    if channel in (NotificationChannel.EMAIL, NotificationChannel.IN_APP):
+        return "html"
+    return "plain"
+
+
+@dataclass(frozen=True)
+class CompiledTemplate:
+    """Заголовок и сообщение, разобранные один раз."""
+
+    title: Template
+    message: Template
+
+    def render(self, variables: Dict[str, Any]) -> Dict[str, str]:
+        return {
+            "title": self.title.safe_substitute(variables),
+            "message": self.message.safe_substitute(variables),
+        }
+
+
+def compile_static(template_data: Dict[str, str], channel: NotificationChannel) -> CompiledTemplate:
+    fmt = message_format(channel)
+    if fmt == "plain":
+        message = template_data.get("plain", "")
+    else:
+        message = template_data.get(fmt, template_data.get("plain", ""))
+    return CompiledTemplate(title=Template(template_data["title"]), message=Template(message))
+
+
+def compile_custom(
+    row: NotificationTemplate,
+    channel: NotificationChannel,
+    static_title: Optional[str]
+) -> CompiledTemplate:
+    message = row.plain_template or ""
+    if message_format(channel) == "html" and row.html_template:
+        message = row.html_template
+    title = row.subject_template or static_title or DEFAULT_TITLE
+    return CompiledTemplate(title=Template(title), message=Template(message))
+
+
+class NotificationTemplateRegistry:
+    """Скомпилированные шаблоны по (тип, канал) с перезагрузкой кастомных."""
+
+    def __init__(self):
+        self._compiled: Dict[Tuple[NotificationType, NotificationChannel], Optional[CompiledTemplate]] = {}
+        self._custom: Dict[TemplateKey, NotificationTemplate] = {}
+        self._version: Optional[int] = None
+        self._loaded_at: Optional[float] = None
+        notification_template_cache.add_local_listener(self.invalidate)
+
+    def invalidate(self) -> None:
+        """Перезагрузить кастомные шаблоны при следующем refresh()."""
+        self._loaded_at = None
+
+    async def refresh(self) -> None:
+        """Перезагрузка кастомных шаблонов, если они изменились."""
+        if not settings.notification_templates_custom_override:
+            return
+        version = await notification_template_cache.current_version()
+        if self._loaded_at is not None:
+            if version is not None and version == self._version:
+                return
+            if version is None and time.monotonic() - self._loaded_at < settings.notification_templates_refresh_seconds:
+                return
+        try:
+            async with get_async_session() as session:
+                result = await session.execute(
+                    select(NotificationTemplate)
+                    .where(NotificationTemplate.is_active == True)
+                    .order_by(NotificationTemplate.updated_at, NotificationTemplate.id)
+                )
+                rows = result.scalars().all()
+        except Exception as e:
+            logger.warning(f"Failed to load custom notification templates: {e}")
+            return
+        self.load(rows, version)
+
+    def load(self, rows: Iterable[NotificationTemplate], version: Optional[int] = None) -> None:
+        """Заменить кастомные шаблоны (более поздние строки переопределяют ранние)."""
+        self._custom = {(row.type, row.channel): row for row in rows}
+        self._compiled = {}
+        self._version = version
+        self._loaded_at = time.monotonic()
+        logger.debug("Notification templates loaded", custom=len(self._custom), version=version)
+
+    def get(self, notification_type: NotificationType, channel: NotificationChannel) -> Optional[CompiledTemplate]:
+        """Скомпилированный шаблон; None — если шаблона нет."""
+        key = (notification_type, channel)
+        try:
+            return self._compiled[key]
+        except KeyError:
+            pass
+        from .base_templates import NotificationTemplateManager
+
+        template_data = NotificationTemplateManager.ALL_TEMPLATES.get(notification_type)
+        row = None
+        if settings.notification_templates_custom_override:
+            row = self._custom.get((notification_type, channel)) or self._custom.get((notification_type, None))
+        if row is not None:
+            compiled = compile_custom(row, channel, template_data.get("title") if template_data else None)
+        elif template_data:
+            compiled = compile_static(template_data, channel)
+        else:
+            compiled = None
+        self._compiled[key] = compiled
+        return compiled
+
+    def render(
+        self,
+        notification_type: NotificationType,
+        channel: NotificationChannel,
+        variables: Dict[str, Any]
+    ) -> Dict[str, str]:
+        """Рендер одного уведомления: {title, message}."""
+        return self.render_many(notification_type, channel, [variables])[0]
+
+    def render_many(
+        self,
+        notification_type: NotificationType,
+        channel: NotificationChannel,
+        variables_list: Iterable[Dict[str, Any]]
+    ) -> List[Dict[str, str]]:
+        """Рендер одного шаблона для многих наборов переменных."""
+        try:
+            compiled = self.get(notification_type, channel)
+        except Exception as e:
+            logger.error(f"Error compiling template: {e}", notification_type=notification_type.value, error=str(e))
+            return [{"title": DEFAULT_TITLE, "message": ERROR_MESSAGE} for _ in variables_list]
+
+        if compiled is None:
+            logger.warning(f"Template not found for {notification_type.value}")
+            return [{"title": DEFAULT_TITLE, "message": NOT_FOUND_MESSAGE} for _ in variables_list]
+
+        rendered = []
+        for variables in variables_list:
+            try:
+                rendered.append(compiled.render(variables))
+            except Exception as e:
+                logger.error(f"Error rendering template: {e}", notification_type=notification_type.value, error=str(e))
+                rendered.append({"title": DEFAULT_TITLE, "message": ERROR_MESSAGE})
+        return rendered
+
+
+notification_templates = NotificationTemplateRegistry()
@@ -53,10 +53,8 @@ async def test_calendar_after_optimization():
         print(f'Смен: {calendar_1.total_shifts}')
         
         # Проверяем ключи в Redis
-        timeslot_keys = await cache.keys("calendar_timeslots:*")
-        shift_keys = await cache.keys("calendar_shifts:*")
-        print(f'Ключей timeslots в кэше: {len(timeslot_keys)}')
-        print(f'Ключей shifts в кэше: {len(shift_keys)}')
+        fragment_keys = await cache.keys("calendar_fragment:*")
+        print(f'Фрагментов календаря в кэше: {len(fragment_keys)}')
         
         # Тест 2: Повторная загрузка (Cache Hit)
         print('\n--- Тест 2: Повторная загрузка (Cache Hit) ---')
@@ -0,0 +1,157 @@
+"""Регрессионный тест количества SQL-запросов календаря.
+
+Один запрос календаря должен выполнять фиксированное число запросов
+к БД независимо от количества смен и тайм-слотов (без N+1).
+"""
+
+from datetime import date, datetime, time, timedelta
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from domain.entities.shift import Shift
+from domain.entities.shift_schedule import ShiftSchedule
+from domain.entities.time_slot import TimeSlot
+from shared.services.calendar_filter_service import CalendarFilterService
+
+
+# timeslots + actual shifts + planned shifts (с anti-join)
+EXPECTED_CALENDAR_QUERIES = 3
+
+OBJECT_ID = 1
+PERIOD_START = date(2025, 3, 1)
+PERIOD_END = date(2025, 3, 31)
+
+ACCESSIBLE_OBJECTS = [{
+    'id': OBJECT_ID,
+    'name': 'Объект',
+    'hourly_rate': 300.0,
+    'timezone': 'Europe/Moscow',
+    'can_edit': True,
+    'can_edit_schedule': True,
+    'can_view': True,
+}]
+
+
+def _make_timeslot(index: int) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=1000 + index,
+        object_id=OBJECT_ID,
+        slot_date=PERIOD_START + timedelta(days=index % 28),
+        start_time=time(9, 0),
+        end_time=time(18, 0),
+        hourly_rate=None,
+        max_employees=2,
+        is_active=True,
+        notes=None,
+    )
+
+
+def _make_actual_shift(index: int) -> SimpleNamespace:
+    start = datetime.combine(PERIOD_START + timedelta(days=index % 28), time(6, 0))
+    return SimpleNamespace(
+        id=2000 + index,
+        user_id=10 + index,
+        object_id=OBJECT_ID,
+        time_slot_id=1000 + index,
+        start_time=start,
+        end_time=start + timedelta(hours=8),
+        status="completed",
+        hourly_rate=300,
+        total_hours=8,
+        total_payment=2400,
+        notes=None,
+        is_planned=True,
+        schedule_id=None,
+        start_coordinates=None,
+        end_coordinates=None,
+    )
+
+
+def _make_schedule(index: int) -> SimpleNamespace:
+    start = datetime.combine(PERIOD_START + timedelta(days=index % 28), time(6, 0))
+    return SimpleNamespace(
+        id=3000 + index,
+        user_id=10 + index,
+        object_id=OBJECT_ID,
+        time_slot_id=1000 + index,
+        planned_start=start,
+        planned_end=start + timedelta(hours=8),
+        status="planned",
+        hourly_rate=300,
+        notes=None,
+    )
+
+
+def _make_session(size: int) -> MagicMock:
+    """Сессия-заглушка, отвечающая на запросы календаря `size` строками."""
+    rows = {
+        TimeSlot: [_make_timeslot(i) for i in range(size)],
+        Shift: [(_make_actual_shift(i), "Иван", "Иванов") for i in range(size)],
+        ShiftSchedule: [(_make_schedule(i), "Петр", "Петров") for i in range(size)],
+    }
+
+    async def execute(statement, *args, **kwargs):
+        entity = statement.column_descriptions[0]['entity']
+        result = MagicMock()
+        if entity is TimeSlot:
+            result.scalars.return_value.all.return_value = rows[TimeSlot]
+        else:
+            result.all.return_value = rows.get(entity, [])
+        return result
+
+    session = MagicMock()
+    session.execute = AsyncMock(side_effect=execute)
+    return session
+
+
+async def _calendar_query_count(size: int):
+    session = _make_session(size)
+    service = CalendarFilterService(session)
+    service.object_access_service.get_accessible_objects = AsyncMock(return_value=ACCESSIBLE_OBJECTS)
+
+    data = await service.get_calendar_data(
+        user_telegram_id=1,
+        user_role="owner",
+        date_range_start=PERIOD_START,
+        date_range_end=PERIOD_END,
+    )
+    return session.execute.await_count, data
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("size", [1, 10, 200])
+async def test_calendar_query_count_is_constant(size):
+    """Число запросов не зависит от количества смен и тайм-слотов."""
+    query_count, data = await _calendar_query_count(size)
+
+    assert query_count == EXPECTED_CALENDAR_QUERIES
+    assert data.total_timeslots == size
+    assert data.total_shifts == size * 2
+
+
+@pytest.mark.asyncio
+async def test_planned_shifts_use_anti_join():
+    """Проверка «есть ли фактическая смена» встроена в основной запрос."""
+    captured = []
+
+    async def execute(statement, *args, **kwargs):
+        captured.append(statement)
+        result = MagicMock()
+        result.all.return_value = []
+        return result
+
+    session = MagicMock()
+    session.execute = AsyncMock(side_effect=execute)
+    service = CalendarFilterService(session)
+
+    await service._get_planned_shifts(
+        [OBJECT_ID], PERIOD_START, PERIOD_END, {OBJECT_ID: ACCESSIBLE_OBJECTS[0]}, {}
+    )
+
+    assert len(captured) == 1
+    sql = str(captured[0].compile(dialect=postgresql.dialect()))
+    assert "NOT (EXISTS" in sql
+    assert "JOIN users" in sql
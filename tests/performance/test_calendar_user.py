@@ -111,10 +111,8 @@ async def test_calendar_for_user(telegram_id: int = 5577223137):
     print(f'Hit Rate: {stats.get("hit_rate")}%')
     
     # Проверяем ключи в кэше
-    timeslot_keys = await cache.keys("calendar_timeslots:*")
-    shift_keys = await cache.keys("calendar_shifts:*")
-    print(f'Ключей timeslots: {len(timeslot_keys)}')
-    print(f'Ключей shifts: {len(shift_keys)}')
+    fragment_keys = await cache.keys("calendar_fragment:*")
+    print(f'Фрагментов календаря: {len(fragment_keys)}')
     
     await cache.disconnect()
     
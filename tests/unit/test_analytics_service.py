@@ -2,7 +2,7 @@
 
 import pytest
 from datetime import date, timedelta
-from unittest.mock import Mock, patch
+from unittest.mock import Mock
 from apps.analytics.analytics_service import AnalyticsService
 
 
@@ -13,27 +13,23 @@ class TestAnalyticsService:
         """Настройка перед каждым тестом."""
         self.analytics_service = AnalyticsService()
     
-    @patch('apps.analytics.analytics_service.get_sync_session')
-    def test_get_dashboard_metrics_no_user(self, mock_session):
+    async def test_get_dashboard_metrics_no_user(self, sync_db_session):
         """Тест получения метрик дашборда для несуществующего пользователя."""
         # Настройка мока
-        mock_db = Mock()
-        mock_session.return_value.__enter__.return_value = mock_db
+        mock_db = sync_db_session
         mock_db.query.return_value.filter.return_value.first.return_value = None
         
         # Выполнение
-        result = self.analytics_service.get_dashboard_metrics(99999)
+        result = await self.analytics_service.get_dashboard_metrics(99999)
         
         # Проверка
         assert "error" in result
         assert "Пользователь не найден" in result["error"]
     
-    @patch('apps.analytics.analytics_service.get_sync_session')
-    def test_get_dashboard_metrics_no_objects(self, mock_session):
+    async def test_get_dashboard_metrics_no_objects(self, sync_db_session):
         """Тест получения метрик дашборда для пользователя без объектов."""
         # Настройка мока
-        mock_db = Mock()
-        mock_session.return_value.__enter__.return_value = mock_db
+        mock_db = sync_db_session
         
         # Мокаем пользователя
         mock_user = Mock()
@@ -44,7 +40,7 @@ class TestAnalyticsService:
         mock_db.query.return_value.filter.return_value.all.return_value = []
         
         # Выполнение
-        result = self.analytics_service.get_dashboard_metrics(123456)
+        result = await self.analytics_service.get_dashboard_metrics(123456)
         
         # Проверка
         assert result["objects_count"] == 0
@@ -53,16 +49,14 @@ class TestAnalyticsService:
         assert result["week_stats"]["shifts"] == 0
         assert result["month_stats"]["shifts"] == 0
     
-    @patch('apps.analytics.analytics_service.get_sync_session')
-    def test_get_object_report_no_access(self, mock_session):
+    async def test_get_object_report_no_access(self, sync_db_session):
         """Тест получения отчета по объекту без прав доступа."""
         # Настройка мока
-        mock_db = Mock()
-        mock_session.return_value.__enter__.return_value = mock_db
+        mock_db = sync_db_session
         mock_db.query.return_value.filter.return_value.first.return_value = None
         
         # Выполнение
-        result = self.analytics_service.get_object_report(
+        result = await self.analytics_service.get_object_report(
             object_id=1,
             start_date=date.today(),
             end_date=date.today(),
@@ -73,16 +67,14 @@ class TestAnalyticsService:
         assert "error" in result
         assert "не найден или нет прав доступа" in result["error"]
     
-    @patch('apps.analytics.analytics_service.get_sync_session')
-    def test_get_personal_report_no_user(self, mock_session):
+    async def test_get_personal_report_no_user(self, sync_db_session):
         """Тест получения персонального отчета для несуществующего пользователя."""
         # Настройка мока
-        mock_db = Mock()
-        mock_session.return_value.__enter__.return_value = mock_db
+        mock_db = sync_db_session
         mock_db.query.return_value.filter.return_value.first.return_value = None
         
         # Выполнение
-        result = self.analytics_service.get_personal_report(
+        result = await self.analytics_service.get_personal_report(
             user_id=99999,
             start_date=date.today(),
             end_date=date.today()
@@ -132,12 +124,10 @@ class TestAnalyticsService:
         # Проверка
         assert result == []
     
-    @patch('apps.analytics.analytics_service.get_sync_session')
-    def test_get_period_stats_empty(self, mock_session):
+    def test_get_period_stats_empty(self):
         """Тест получения статистики за период с пустыми данными."""
         # Настройка мока
         mock_db = Mock()
-        mock_session.return_value.__enter__.return_value = mock_db
         mock_db.query.return_value.filter.return_value.all.return_value = []
         
         # Выполнение
@@ -150,12 +140,10 @@ class TestAnalyticsService:
         assert result["hours"] == 0
         assert result["earnings"] == 0
     
-    @patch('apps.analytics.analytics_service.get_sync_session')
-    def test_get_top_objects_empty(self, mock_session):
+    def test_get_top_objects_empty(self):
         """Тест получения топ объектов с пустыми данными."""
         # Настройка мока
         mock_db = Mock()
-        mock_session.return_value.__enter__.return_value = mock_db
         mock_db.query.return_value.join.return_value.filter.return_value.group_by.return_value.order_by.return_value.limit.return_value.all.return_value = []
         
         # Выполнение
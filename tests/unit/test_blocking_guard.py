@@ -0,0 +1,77 @@
+"""Unit-тесты проверки синхронных запросов к БД в потоке event loop."""
+
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+
+from core.database import blocking_guard
+from core.database.blocking_guard import BlockingDatabaseCallError, install_blocking_guard
+from core.database.session import run_in_async_session
+
+
+@pytest.fixture
+def guard_mode():
+    previous = blocking_guard.current_guard_mode()
+    yield install_blocking_guard
+    install_blocking_guard(previous)
+    blocking_guard._reported_callers.clear()
+
+
+@pytest.fixture
+def sync_engine():
+    engine = create_engine("sqlite://", poolclass=NullPool)
+    yield engine
+    engine.dispose()
+
+
+def _select_one(engine):
+    with engine.connect() as conn:
+        return conn.execute(text("select 1")).scalar()
+
+
+def test_sync_call_outside_event_loop_is_allowed(guard_mode, sync_engine):
+    guard_mode("raise")
+
+    assert _select_one(sync_engine) == 1
+
+
+async def test_sync_call_on_event_loop_raises(guard_mode, sync_engine):
+    guard_mode("raise")
+
+    with pytest.raises(BlockingDatabaseCallError, match="_select_one"):
+        _select_one(sync_engine)
+
+    # В отдельном потоке event loop не блокируется
+    assert await asyncio.to_thread(_select_one, sync_engine) == 1
+
+
+async def test_warn_mode_logs_once_per_caller(guard_mode, sync_engine, monkeypatch):
+    warning = MagicMock()
+    monkeypatch.setattr(blocking_guard.logger, "warning", warning)
+    guard_mode("warn")
+
+    assert _select_one(sync_engine) == 1
+    assert _select_one(sync_engine) == 1
+
+    warning.assert_called_once()
+    assert "_select_one" in warning.call_args.args[0]
+
+
+def test_unknown_mode_rejected():
+    with pytest.raises(ValueError):
+        install_blocking_guard("loud")
+
+
+async def test_run_in_async_session_passes_sync_session(sync_db_session):
+    class Service:
+        @run_in_async_session
+        def load(self, db, item_id, scale=1):
+            """Загрузка."""
+            return self, db, item_id * scale
+
+    service = Service()
+    assert await service.load(3, scale=2) == (service, sync_db_session, 6)
+    assert Service.load.__doc__ == "Загрузка."
@@ -45,7 +45,7 @@ class TestBotHandlers:
     @pytest.mark.asyncio
     async def test_start_command_new_user(self, mock_update, mock_context):
         """Тест команды /start для нового пользователя."""
-        with patch('apps.bot.handlers_div.core_handlers.user_manager') as mock_user_manager:
+        with patch('apps.bot.handlers_div.core_handlers.user_manager', new_callable=AsyncMock) as mock_user_manager:
             mock_user_manager.is_user_registered.return_value = False
             mock_user_manager.register_user.return_value = {"id": 12345}
             
@@ -66,7 +66,7 @@ class TestBotHandlers:
     @pytest.mark.asyncio
     async def test_start_command_existing_user(self, mock_update, mock_context):
         """Тест команды /start для существующего пользователя."""
-        with patch('apps.bot.handlers_div.core_handlers.user_manager') as mock_user_manager:
+        with patch('apps.bot.handlers_div.core_handlers.user_manager', new_callable=AsyncMock) as mock_user_manager:
             mock_user_manager.is_user_registered.return_value = True
             
             await start_command(mock_update, mock_context)
@@ -110,7 +110,7 @@ class TestBotHandlers:
     @pytest.mark.asyncio
     async def test_status_command_unregistered_user(self, mock_update, mock_context):
         """Тест команды /status для незарегистрированного пользователя."""
-        with patch('apps.bot.handlers.user_manager') as mock_user_manager:
+        with patch('apps.bot.handlers.user_manager', new_callable=AsyncMock) as mock_user_manager:
             mock_user_manager.is_user_registered.return_value = False
             
             await status_command(mock_update, mock_context)
@@ -158,7 +158,7 @@ class TestButtonCallbacks:
         """Тест callback для открытия смены."""
         mock_callback_update.callback_query.data = "open_shift"
         
-        with patch('apps.bot.handlers_div.core_handlers.user_manager') as mock_user_manager:
+        with patch('apps.bot.handlers_div.core_handlers.user_manager', new_callable=AsyncMock) as mock_user_manager:
             mock_user_manager.is_user_registered.return_value = True
             
             await button_callback(mock_callback_update, mock_context)
@@ -176,7 +176,7 @@ class TestButtonCallbacks:
         """Тест callback для закрытия смены."""
         mock_callback_update.callback_query.data = "close_shift"
         
-        with patch('apps.bot.handlers_div.core_handlers.user_manager') as mock_user_manager:
+        with patch('apps.bot.handlers_div.core_handlers.user_manager', new_callable=AsyncMock) as mock_user_manager:
             mock_user_manager.is_user_registered.return_value = True
             
             await button_callback(mock_callback_update, mock_context)
@@ -194,7 +194,7 @@ class TestButtonCallbacks:
         """Тест callback для создания объекта."""
         mock_callback_update.callback_query.data = "create_object"
         
-        with patch('apps.bot.handlers_div.core_handlers.user_manager') as mock_user_manager:
+        with patch('apps.bot.handlers_div.core_handlers.user_manager', new_callable=AsyncMock) as mock_user_manager:
             mock_user_manager.is_user_registered.return_value = True
             
             # Мокаем object_creation_handlers
@@ -211,7 +211,7 @@ class TestButtonCallbacks:
         """Тест callback для получения отчета."""
         mock_callback_update.callback_query.data = "get_report"
         
-        with patch('apps.bot.handlers_div.core_handlers.user_manager') as mock_user_manager:
+        with patch('apps.bot.handlers_div.core_handlers.user_manager', new_callable=AsyncMock) as mock_user_manager:
             mock_user_manager.is_user_registered.return_value = True
             
             await button_callback(mock_callback_update, mock_context)
@@ -229,7 +229,7 @@ class TestButtonCallbacks:
         """Тест callback для помощи."""
         mock_callback_update.callback_query.data = "help"
         
-        with patch('apps.bot.handlers_div.core_handlers.user_manager') as mock_user_manager:
+        with patch('apps.bot.handlers_div.core_handlers.user_manager', new_callable=AsyncMock) as mock_user_manager:
             mock_user_manager.is_user_registered.return_value = True
             
             await button_callback(mock_callback_update, mock_context)
@@ -247,7 +247,7 @@ class TestButtonCallbacks:
         """Тест callback для статуса."""
         mock_callback_update.callback_query.data = "status"
         
-        with patch('apps.bot.handlers_div.core_handlers.user_manager') as mock_user_manager:
+        with patch('apps.bot.handlers_div.core_handlers.user_manager', new_callable=AsyncMock) as mock_user_manager:
             mock_user_manager.is_user_registered.return_value = True
             
             await button_callback(mock_callback_update, mock_context)
@@ -265,7 +265,7 @@ class TestButtonCallbacks:
         """Тест callback для главного меню."""
         mock_callback_update.callback_query.data = "main_menu"
         
-        with patch('apps.bot.handlers_div.core_handlers.user_manager') as mock_user_manager:
+        with patch('apps.bot.handlers_div.core_handlers.user_manager', new_callable=AsyncMock) as mock_user_manager:
             mock_user_manager.is_user_registered.return_value = True
             
             await button_callback(mock_callback_update, mock_context)
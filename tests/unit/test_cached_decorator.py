@@ -0,0 +1,184 @@
+"""Unit-тесты декоратора @cached: ключи, single-flight и stale-while-revalidate."""
+
+import asyncio
+from datetime import date
+from enum import Enum
+from unittest.mock import MagicMock
+
+import pytest
+
+from core.cache import memoize
+from core.cache.memoize import cached, cached_stats
+from core.cache.redis_cache import RedisCache
+
+
+class _Status(Enum):
+    ACTIVE = "active"
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.locks = set()
+
+    async def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.locks:
+            return None
+        self.locks.add(key)
+        return True
+
+    async def delete(self, key):
+        self.locks.discard(key)
+
+
+class _FakeCache:
+    """Кэш в словаре с сериализацией как у RedisCache."""
+
+    is_connected = True
+
+    def __init__(self):
+        self.store = {}
+        self.redis = _FakeRedis()
+
+    async def get(self, key, serialize="json", local=True):
+        payload = self.store.get(key)
+        return None if payload is None else RedisCache._deserialize(payload, serialize)
+
+    async def set(self, key, value, ttl=None, serialize="json", tags=None, local=True):
+        self.store[key] = RedisCache._serialize(value, serialize)
+        return True
+
+    async def get_tag_versions(self, tags):
+        return {tag: 0 for tag in tags}
+
+
+@pytest.fixture
+def fake_cache(monkeypatch):
+    fake = _FakeCache()
+    monkeypatch.setattr(memoize, "cache", fake)
+    cached_stats.reset()
+    return fake
+
+
+class _Service:
+    def __init__(self):
+        self.db = MagicMock()
+        self.calls = []
+
+    @cached(ttl=60, key_prefix="test_objects")
+    async def get_objects(self, owner_id: int, include_inactive: bool = False):
+        self.calls.append((owner_id, include_inactive))
+        return [owner_id, include_inactive]
+
+
+async def test_key_ignores_self_and_defaults(fake_cache):
+    first, second = _Service(), _Service()
+
+    await first.get_objects(1)
+    assert await second.get_objects(1, include_inactive=False) == [1, False]
+    await second.get_objects(2)
+
+    assert first.calls == [(1, False)]
+    assert second.calls == [(2, False)]
+    assert len(fake_cache.store) == 2
+    assert all(key.startswith("test_objects:_Service.get_objects:") for key in fake_cache.store)
+
+
+async def test_key_args_and_stable_values(fake_cache):
+    calls = []
+
+    @cached(ttl=60, key_prefix="report", key_args=("owner_id", "day", "status"))
+    async def report(owner_id, day, status, request_id):
+        calls.append(request_id)
+        return len(calls)
+
+    assert await report(1, date(2026, 10, 1), _Status.ACTIVE, request_id=object()) == 1
+    assert await report(1, date(2026, 10, 1), _Status.ACTIVE, request_id=object()) == 1
+    assert await report(1, date(2026, 10, 2), _Status.ACTIVE, request_id=object()) == 2
+
+
+def test_unknown_key_args_rejected():
+    with pytest.raises(ValueError):
+        @cached(key_args=("missing",))
+        async def func(owner_id):
+            return owner_id
+
+
+async def test_unstable_argument_bypasses_cache(fake_cache):
+    calls = []
+
+    @cached(ttl=60, key_prefix="unstable")
+    async def func(value):
+        calls.append(value)
+        return 1
+
+    await func(object())
+    await func(object())
+
+    assert len(calls) == 2
+    assert fake_cache.store == {}
+    assert cached_stats.snapshot()["unstable"]["bypass"] == 2
+
+
+async def test_concurrent_misses_share_one_call(fake_cache):
+    release = asyncio.Event()
+    calls = []
+
+    @cached(ttl=60, key_prefix="single_flight")
+    async def load(owner_id):
+        calls.append(owner_id)
+        await release.wait()
+        return {"owner_id": owner_id}
+
+    tasks = [asyncio.create_task(load(1)) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*tasks)
+
+    assert calls == [1]
+    assert all(result == {"owner_id": 1} for result in results)
+    # Ожидающие получают копии, а не общий изменяемый объект
+    assert len({id(result) for result in results}) == 5
+    stats = cached_stats.snapshot()["single_flight"]
+    assert (stats["miss"], stats["shared"]) == (1, 4)
+
+
+async def test_error_is_shared_and_not_cached(fake_cache):
+    @cached(ttl=60, key_prefix="failing")
+    async def fail():
+        await asyncio.sleep(0)
+        raise ValueError("boom")
+
+    results = await asyncio.gather(fail(), fail(), return_exceptions=True)
+
+    assert all(isinstance(result, ValueError) for result in results)
+    assert fake_cache.store == {}
+
+
+async def test_stale_value_served_while_one_call_refreshes(fake_cache, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(memoize.time, "time", lambda: now[0])
+    release = asyncio.Event()
+    calls = []
+
+    @cached(ttl=60, key_prefix="swr", stale_ttl=60)
+    async def load():
+        calls.append(now[0])
+        if len(calls) > 1:
+            await release.wait()
+        return len(calls)
+
+    assert await load() == 1
+    now[0] += 61
+
+    refresher = asyncio.create_task(load())
+    await asyncio.sleep(0)
+    assert await load() == 1  # устаревшее значение без ожидания
+    release.set()
+    assert await refresher == 2
+    assert await load() == 2
+
+    assert len(calls) == 2
+    assert fake_cache.redis.locks == set()
+    stats = cached_stats.snapshot()["swr"]
+    assert (stats["refresh"], stats["stale"], stats["hit"]) == (1, 1, 1)
+    assert stats["hit_ratio"] == 50.0
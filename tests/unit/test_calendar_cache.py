@@ -0,0 +1,105 @@
+"""Unit-тесты для общего кэша фрагментов календаря."""
+
+from datetime import date, datetime, time
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from core.cache import calendar_cache as calendar_cache_module
+from core.cache.calendar_cache import (
+    ALL_FRAGMENTS_TAG,
+    _instance_days,
+    day_tag,
+    fragment_tags,
+    view_tags,
+)
+from domain.entities.time_slot import TimeSlot
+from shared.services.calendar_filter_service import CalendarFilterService
+
+
+OBJECT = {
+    'id': 1,
+    'name': 'Объект',
+    'hourly_rate': 300.0,
+    'timezone': 'Europe/Moscow',
+    'can_edit': True,
+    'can_edit_schedule': True,
+    'can_view': True,
+}
+
+
+class TestCalendarCacheTags:
+    """Тесты тегов фрагментов и ответов."""
+
+    def test_fragment_tags_do_not_include_object_tag(self):
+        """Правка одного дня не сбрасывает остальные дни объекта."""
+        tags = fragment_tags(1, date(2025, 3, 1))
+
+        assert tags == [day_tag(1, date(2025, 3, 1)), ALL_FRAGMENTS_TAG]
+
+    def test_view_tags_are_stable(self):
+        """Теги ответа не зависят от порядка и повторов объектов."""
+        assert view_tags([2, 1, 2]) == view_tags([1, 2])
+
+    def test_instance_days_include_previous_date(self):
+        """Перенос тайм-слота сбрасывает и старый, и новый день."""
+        slot = TimeSlot(object_id=1, slot_date=date(2025, 3, 1), start_time=time(9), end_time=time(18))
+        state = MagicMock()
+        state.attrs = {
+            'object_id': MagicMock(history=MagicMock(deleted=())),
+            'slot_date': MagicMock(history=MagicMock(deleted=(date(2025, 2, 28),))),
+        }
+
+        original_inspect = calendar_cache_module.inspect
+        calendar_cache_module.inspect = lambda instance: state
+        try:
+            days = _instance_days(slot, "time_slots")
+        finally:
+            calendar_cache_module.inspect = original_inspect
+
+        assert days == {(1, date(2025, 3, 1)), (1, date(2025, 2, 28))}
+
+
+@pytest.mark.asyncio
+async def test_calendar_reuses_cached_fragments(monkeypatch):
+    """Повторный запрос собирается из фрагментов без обращения к БД."""
+    storage = {}
+
+    async def get_fragments(object_ids, start, end):
+        pairs = [(object_id, day) for object_id in object_ids for day in calendar_cache_module.iter_days(start, end)]
+        found = {pair: storage[pair] for pair in pairs if pair in storage}
+        return found, [pair for pair in pairs if pair not in storage]
+
+    async def set_fragments(fragments, versions):
+        storage.update(fragments)
+
+    cache = calendar_cache_module.calendar_cache
+    monkeypatch.setattr(cache, "get_fragments", get_fragments)
+    monkeypatch.setattr(cache, "set_fragments", set_fragments)
+    monkeypatch.setattr(cache, "snapshot_versions", AsyncMock(return_value={}))
+
+    slot = MagicMock(
+        id=10, object_id=1, slot_date=date(2025, 3, 2), start_time=time(9), end_time=time(18),
+        hourly_rate=None, max_employees=1, is_active=True, notes=None,
+    )
+    timeslots_result = MagicMock()
+    timeslots_result.scalars.return_value.all.return_value = [slot]
+    empty_result = MagicMock()
+    empty_result.all.return_value = []
+
+    session = MagicMock()
+    session.execute = AsyncMock(side_effect=[timeslots_result, empty_result, empty_result])
+    service = CalendarFilterService(session)
+    service.object_access_service.get_accessible_objects = AsyncMock(return_value=[OBJECT])
+
+    for _ in range(2):
+        data = await service.get_calendar_data(
+            user_telegram_id=1,
+            user_role="owner",
+            date_range_start=date(2025, 3, 1),
+            date_range_end=date(2025, 3, 3),
+        )
+        assert [timeslot.id for timeslot in data.timeslots] == [10]
+
+    assert session.execute.await_count == 3
+    assert len(storage) == 3
@@ -374,43 +374,29 @@ class TestCalendarFilterService:
         assert updated_timeslots[0].status == TimeslotStatus.EMPTY
 
     @pytest.mark.asyncio
-    async def test_cache_key_generation(self, calendar_service):
-        """Тест генерации ключей кэша."""
-        # Тест без фильтра объектов
-        key1 = calendar_service._generate_cache_key(
-            user_telegram_id=123456789,
-            user_role="owner",
-            date_range_start=date(2024, 1, 1),
-            date_range_end=date(2024, 1, 7)
-        )
-        
-        # Тест с фильтром объектов
-        key2 = calendar_service._generate_cache_key(
-            user_telegram_id=123456789,
-            user_role="owner",
-            date_range_start=date(2024, 1, 1),
-            date_range_end=date(2024, 1, 7),
-            object_filter=[1, 2, 3]
-        )
-        
-        # Проверяем, что ключи разные
-        assert key1 != key2
-        assert len(key1) == 32  # MD5 hash length
-        assert len(key2) == 32
-
-    @pytest.mark.asyncio
-    async def test_cache_ttl(self, calendar_service):
-        """Тест TTL кэша."""
-        # Сохраняем данные в кэш
-        test_data = {"test": "data"}
-        calendar_service._set_cache("test_key", test_data, ttl_minutes=1)
-        
-        # Проверяем, что данные есть в кэше
-        cached_data = calendar_service._get_from_cache("test_key")
-        assert cached_data == test_data
-        
-        # Проверяем, что данные есть в TTL
-        assert "test_key" in calendar_service._cache_ttl
+    async def test_build_timeslots_applies_object_permissions(self, calendar_service):
+        """Права и данные объекта накладываются на общие строки фрагмента."""
+        rows = [{
+            'id': 1,
+            'object_id': 1,
+            'slot_date': date(2024, 1, 1),
+            'start_time': time(9, 0),
+            'end_time': time(17, 0),
+            'hourly_rate': None,
+            'max_employees': None,
+            'is_active': True,
+            'notes': None,
+        }]
+        objects_map = {1: {'id': 1, 'name': 'Test Object', 'hourly_rate': 500.0, 'can_edit': False}}
+
+        timeslots = calendar_service._build_timeslots(rows, objects_map)
+
+        assert len(timeslots) == 1
+        assert timeslots[0].object_name == "Test Object"
+        assert timeslots[0].hourly_rate == 500.0
+        assert timeslots[0].max_employees == 1
+        assert timeslots[0].can_edit is False
+        assert calendar_service._build_timeslots(rows, {}) == []
 
 
 class TestObjectAccessService:
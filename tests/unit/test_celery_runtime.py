@@ -0,0 +1,92 @@
+"""Unit-тесты постоянного event loop для Celery-задач."""
+
+import asyncio
+import threading
+
+import pytest
+
+from core.celery.runtime import WorkerRuntime, async_task
+import core.celery.runtime as runtime_module
+from shared.services.senders import telegram_sender
+
+
+@pytest.fixture
+def worker_runtime(monkeypatch):
+    runtime = WorkerRuntime()
+    monkeypatch.setattr(runtime_module, "runtime", runtime)
+    yield runtime
+    runtime.shutdown()
+
+
+async def _current_loop():
+    return asyncio.get_running_loop()
+
+
+def test_tasks_share_one_loop(worker_runtime):
+    first = worker_runtime.run(_current_loop())
+    second = worker_runtime.run(_current_loop())
+
+    assert first is second
+    assert first.is_running()
+    assert worker_runtime._thread is not threading.current_thread()
+
+
+def test_exception_is_propagated(worker_runtime):
+    async def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError, match="boom"):
+        worker_runtime.run(fail())
+
+    # loop продолжает обслуживать следующие задачи
+    assert worker_runtime.run(_current_loop()).is_running()
+
+
+def test_run_inside_runtime_loop_is_rejected(worker_runtime):
+    async def nested():
+        coro = _current_loop()
+        try:
+            worker_runtime.run(coro)
+        finally:
+            coro.close()
+
+    with pytest.raises(RuntimeError):
+        worker_runtime.run(nested())
+
+
+def test_async_task_decorator(worker_runtime):
+    @async_task
+    async def add(a, b=0):
+        """Сложение."""
+        return a + b, asyncio.get_running_loop()
+
+    result, loop = add(2, b=3)
+
+    assert result == 5
+    assert loop is worker_runtime.loop
+    assert add.__doc__ == "Сложение."
+
+
+def test_shutdown_stops_loop(worker_runtime):
+    loop = worker_runtime.start()
+    worker_runtime.shutdown()
+
+    assert worker_runtime.loop is None
+    assert loop.is_closed()
+
+
+def test_telegram_sender_is_shared_within_loop(worker_runtime, monkeypatch):
+    monkeypatch.setattr(telegram_sender.settings, "telegram_bot_token_override", "123:test")
+
+    async def get_senders():
+        return telegram_sender.get_telegram_sender(), telegram_sender.get_telegram_sender(5)
+
+    first, pooled = worker_runtime.run(get_senders())
+    second, pooled_again = worker_runtime.run(get_senders())
+
+    assert first is second
+    assert pooled is pooled_again
+    assert first is not pooled
+    assert first.throttle is pooled.throttle
+    assert telegram_sender.get_telegram_sender() is not first
+    assert telegram_sender.get_telegram_sender().throttle is first.throttle
@@ -0,0 +1,163 @@
+"""Unit-тесты потоковой выгрузки XLSX/CSV."""
+
+import io
+import os
+from types import SimpleNamespace
+
+import pytest
+from openpyxl import load_workbook
+
+from apps.web.services.payroll_report_exporter import (
+    MULTI_OBJECT_TITLE,
+    write_accruals_sheet,
+    write_payments_sheet,
+)
+from core.export.streaming import (
+    ColumnWidths,
+    StreamingWorkbook,
+    file_response,
+    iter_csv,
+    save_workbook,
+)
+
+
+def _load(workbook):
+    return load_workbook(io.BytesIO(workbook.to_bytes()))
+
+
+def _values(ws):
+    return [list(row) for row in ws.iter_rows(values_only=True)]
+
+
+async def _aiter(items):
+    for item in items:
+        yield item
+
+
+def test_column_widths_follow_longest_value_with_limit():
+    widths = ColumnWidths(max_width=10)
+    widths.observe(["abc", None, 12345])
+    widths.observe(["a", "x" * 50])
+
+    assert widths.widths() == {1: 5, 2: 10, 3: 7}
+
+
+def test_streaming_workbook_writes_header_rows_and_widths():
+    workbook = StreamingWorkbook()
+    sheet = workbook.add_sheet("Отчет", ["Сотрудник", "Сумма"])
+    sheet.append(["Иванов Иван Иванович", 1500.5])
+    sheet.append([])
+    sheet.append(["ИТОГО", 1500.5])
+
+    ws = _load(workbook)["Отчет"]
+
+    assert _values(ws) == [["Сотрудник", "Сумма"], ["Иванов Иван Иванович", 1500.5], [None, None], ["ИТОГО", 1500.5]]
+    assert ws["A1"].font.bold
+    assert ws.column_dimensions["A"].width == len("Иванов Иван Иванович") + 2
+    assert ws.column_dimensions["B"].width == len("1500.5") + 2
+
+
+def test_widths_are_fixed_after_sample_window():
+    workbook = StreamingWorkbook(sample_rows=3)
+    sheet = workbook.add_sheet("Лист", ["ID"])
+    for index in range(5):
+        sheet.append([index])
+    sheet.append(["очень длинное значение после окна"])
+
+    ws = _load(workbook)["Лист"]
+
+    assert ws.max_row == 7
+    assert ws.column_dimensions["A"].width == 4
+    assert sheet.rows_written == 7
+
+
+def test_empty_workbook_still_valid():
+    assert _load(StreamingWorkbook()).sheetnames == ["Лист1"]
+
+
+async def test_save_workbook_and_file_response_remove_file():
+    workbook = StreamingWorkbook()
+    workbook.add_sheet("Лист", ["A"]).append([1])
+    path = await save_workbook(workbook)
+
+    response = file_response(path, "отчёт.xlsx")
+    chunks = [chunk async for chunk in response.body_iterator]
+
+    assert b"".join(chunks).startswith(b"PK")
+    assert not os.path.exists(path)
+    assert response.headers["content-disposition"].startswith('attachment; filename="%D0%BE')
+
+
+@pytest.mark.parametrize("source", [list, _aiter])
+async def test_iter_csv_chunks_rows(source):
+    rows = [[index, f"Имя {index}"] for index in range(5)]
+
+    chunks = [chunk async for chunk in iter_csv(source(rows), headers=["ID", "Имя"], rows_per_chunk=2)]
+
+    assert len(chunks) == 3
+    text = b"".join(chunks).decode("utf-8-sig")
+    assert text.splitlines() == ["ID,Имя"] + [f"{index},Имя {index}" for index in range(5)]
+
+
+def _entry(object_id, title, last_name, total, is_multi=False, status="active"):
+    return SimpleNamespace(
+        is_multi=is_multi,
+        object_id=object_id,
+        object_title=title,
+        object_name=title,
+        last_name=last_name,
+        first_name="",
+        contract_status=status,
+        shifts_count=2,
+        hours_worked=8,
+        hourly_rate=100,
+        total_bonuses=0,
+        total_deductions=0,
+        net_amount=total,
+    )
+
+
+async def test_accruals_sheet_groups_objects_and_multi_object_employees():
+    rows = [
+        _entry(1, "Альфа", "Иванов", 100),
+        _entry(1, "Альфа", "Петров", 50, status="terminated"),
+        _entry(2, "Бета", "Сидоров", 30),
+        _entry(1, "Альфа", "Кузнецов", 10, is_multi=True),
+        _entry(2, "Бета", "Кузнецов", 20, is_multi=True),
+    ]
+    workbook = StreamingWorkbook()
+    sheet = workbook.add_sheet("Отчет по начислениям")
+
+    count = await write_accruals_sheet(sheet, _aiter(rows))
+
+    values = [[cell for cell in row if cell not in (None, "")] for row in _values(_load(workbook)["Отчет по начислениям"])]
+    assert count == 5
+    assert values == [
+        ["Альфа"],
+        ["Иванов", "Работает", 2, 8, 100, 0, 0, 100],
+        ["Петров", "Уволен", 2, 8, 100, 0, 0, 50],
+        ["Итого по объекту", 150],
+        [],
+        ["Бета"],
+        ["Сидоров", "Работает", 2, 8, 100, 0, 0, 30],
+        ["Итого по объекту", 30],
+        [],
+        [MULTI_OBJECT_TITLE],
+        ["Альфа", "Кузнецов", "Работает", 2, 8, 100, 0, 0, 10],
+        ["Бета", "Кузнецов", "Работает", 2, 8, 100, 0, 0, 20],
+        [],
+        ["ОБЩИЙ ИТОГ", 210],
+    ]
+
+
+def test_payments_sheet_totals():
+    workbook = StreamingWorkbook()
+    sheet = workbook.add_sheet("Отчет по выплатам")
+    write_payments_sheet(sheet, [
+        {"last_name": "Иванов", "first_name": "Иван", "net_total": 100.0, "paid": 60.0,
+         "payment_methods": "cash", "remainder": 40.0},
+        {"last_name": "Петров", "first_name": "", "net_total": 50.0, "paid": 0.0,
+         "payment_methods": "", "remainder": 50.0},
+    ])
+
+    assert _values(_load(workbook)["Отчет по выплатам"])[-1] == ["ИТОГО:", 150, 60, None, 90]
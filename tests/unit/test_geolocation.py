@@ -269,3 +269,126 @@ class TestGeolocationIntegration:
         result = DistanceCalculator.parse_coordinates(date_line)
         assert result == (0.0, 180.0)
 
+
+
+class TestSpatialQueries:
+    """Тесты пространственных запросов к PostGIS."""
+    
+    @staticmethod
+    def _session(rows=()):
+        from unittest.mock import AsyncMock, MagicMock
+        
+        captured = []
+        
+        async def execute(statement):
+            captured.append(statement)
+            result = MagicMock()
+            result.all.return_value = list(rows)
+            return result
+        
+        session = MagicMock()
+        session.execute = AsyncMock(side_effect=execute)
+        return session, captured
+    
+    @staticmethod
+    def _sql(statement) -> str:
+        from sqlalchemy.dialects import postgresql
+        return str(statement.compile(dialect=postgresql.dialect()))
+    
+    @pytest.mark.asyncio
+    async def test_within_distance_uses_dwithin(self):
+        """Проверка радиуса выполняется в БД через ST_DWithin по geography."""
+        from types import SimpleNamespace
+        
+        row = SimpleNamespace(id=1, name="Магазин", radius=500, distance=120.456)
+        session, captured = self._session([row])
+        
+        result = await LocationValidator().find_objects_within_distance(
+            session, "55.7558,37.6176", [1, 2]
+        )
+        
+        sql = self._sql(captured[0])
+        assert "ST_DWithin(objects.location" in sql
+        assert "ST_MakePoint" in sql
+        assert result == [{
+            'id': 1,
+            'name': "Магазин",
+            'distance_meters': 120.46,
+            'max_distance_meters': 500,
+            'is_within_distance': True,
+        }]
+    
+    @pytest.mark.asyncio
+    async def test_nearest_objects_uses_knn_order(self):
+        session, captured = self._session()
+        
+        await LocationValidator().find_nearest_objects(session, "55.7558,37.6176", [1], limit=3)
+        
+        sql = self._sql(captured[0])
+        assert "ORDER BY objects.location <->" in sql
+        assert "LIMIT" in sql
+    
+    @pytest.mark.asyncio
+    async def test_invalid_coordinates_skip_query(self):
+        session, captured = self._session()
+        
+        result = await LocationValidator().find_objects_within_distance(session, "bad", [1])
+        
+        assert result == []
+        assert captured == []
+
+
+class TestBatchDistanceCalculator:
+    """Тесты пакетного расчета расстояний."""
+    
+    MOSCOW = "55.7558,37.6176"
+    SPB = "59.9311,30.3609"
+    KAZAN = "55.7887,49.1221"
+    
+    def test_pairwise_matches_scalar(self):
+        import numpy as np
+        from core.geolocation.batch_distance import BatchDistanceCalculator as calc
+        
+        a = calc.parse_points([self.MOSCOW, self.SPB, self.KAZAN])
+        b = calc.parse_points([self.SPB, self.KAZAN, self.MOSCOW])
+        
+        distances = calc.pairwise(a, b)
+        expected = [
+            DistanceCalculator.haversine_distance(*p, *q) for p, q in zip(a, b)
+        ]
+        assert np.allclose(distances, expected, atol=1e-6)
+    
+    def test_invalid_points_give_nan(self):
+        import numpy as np
+        from core.geolocation.batch_distance import BatchDistanceCalculator as calc
+        
+        points = calc.parse_points([self.MOSCOW, None, "bad", "91,0"])
+        distances = calc.pairwise(points, calc.parse_points([self.MOSCOW] * 4))
+        
+        assert distances[0] == pytest.approx(0.0)
+        assert np.isnan(distances[1:]).all()
+        assert calc.within(distances, [10] * 4).tolist() == [True, False, False, False]
+    
+    def test_nearest_skips_invalid_targets(self, monkeypatch):
+        from core.geolocation import batch_distance
+        from core.geolocation.batch_distance import BatchDistanceCalculator as calc
+        
+        # Маленький блок, чтобы проверить обработку по частям
+        monkeypatch.setattr(batch_distance, "NEAREST_CHUNK_ELEMENTS", 3)
+        points = calc.parse_points([self.MOSCOW, None, "59.93,30.36"])
+        targets = calc.parse_points(["bad", self.SPB, self.MOSCOW])
+        
+        indices, distances = calc.nearest(points, targets)
+        
+        assert indices.tolist() == [2, -1, 1]
+        assert distances[0] == pytest.approx(0.0)
+        assert distances[2] < 200
+    
+    def test_parse_coordinates_cached(self):
+        from core.geolocation.distance_calculator import _parse_coordinates_cached
+        
+        _parse_coordinates_cached.cache_clear()
+        DistanceCalculator.parse_coordinates(self.MOSCOW)
+        DistanceCalculator.parse_coordinates(self.MOSCOW)
+        
+        assert _parse_coordinates_cached.cache_info().hits == 1
@@ -0,0 +1,111 @@
+"""Unit-тесты для локального уровня кэша и тегов."""
+
+import json
+import time
+
+from core.cache.local_cache import LocalLRUCache, TagVersionMap
+from core.cache.redis_cache import RedisCache
+
+
+class TestLocalLRUCache:
+    """Тесты для LRU-кэша процесса."""
+
+    def test_set_and_get(self):
+        """Значение читается после записи."""
+        local = LocalLRUCache(max_entries=10, ttl_seconds=30)
+        local.set("user:1", b'{"id": 1}', "json")
+
+        entry = local.get("user:1")
+        assert entry is not None
+        assert entry.payload == b'{"id": 1}'
+        assert local.hits == 1
+
+    def test_lru_eviction(self):
+        """При переполнении вытесняется давно не использованная запись."""
+        local = LocalLRUCache(max_entries=2, ttl_seconds=30)
+        local.set("a", b"1", "json")
+        local.set("b", b"2", "json")
+        local.get("a")
+        local.set("c", b"3", "json")
+
+        assert "a" in local
+        assert "b" not in local
+        assert "c" in local
+        assert local.evictions == 1
+
+    def test_ttl_is_capped_and_expires(self):
+        """TTL записи не больше TTL уровня и не больше переданного."""
+        local = LocalLRUCache(max_entries=10, ttl_seconds=30)
+        local.set("short", b"1", "json", ttl_seconds=0.01)
+        time.sleep(0.02)
+
+        assert local.get("short") is None
+        assert local.misses == 1
+
+    def test_delete_pattern(self):
+        """Удаление по glob-паттерну."""
+        local = LocalLRUCache(max_entries=10, ttl_seconds=30)
+        local.set("calendar_shifts:1", b"1", "json")
+        local.set("calendar_shifts:2", b"2", "json")
+        local.set("user:1", b"3", "json")
+
+        assert local.delete_pattern("calendar_shifts:*") == 2
+        assert len(local) == 1
+
+
+class TestTagVersionMap:
+    """Тесты для локальных версий тегов."""
+
+    def test_versions_only_grow(self):
+        """Запоздавшее сообщение не откатывает версию назад."""
+        versions = TagVersionMap(ttl_seconds=30)
+        versions.set("owner_objects", 5)
+        versions.set("owner_objects", 3)
+
+        assert versions.get("owner_objects") == 5
+
+
+class TestRedisCacheInvalidation:
+    """Тесты упаковки тегов и обработки pub/sub сообщений."""
+
+    def test_pack_unpack_roundtrip(self):
+        """Версии тегов переживают упаковку."""
+        raw = RedisCache._pack(b'{"a": 1}', {"api_objects": 7})
+        payload, tags = RedisCache._unpack(raw)
+
+        assert payload == b'{"a": 1}'
+        assert tags == {"api_objects": 7}
+
+    def test_unpack_untagged_payload(self):
+        """Значения без тегов читаются как раньше."""
+        payload, tags = RedisCache._unpack(b'"plain"')
+
+        assert payload == b'"plain"'
+        assert tags == {}
+
+    def test_foreign_invalidation_evicts_local_entry(self):
+        """Сообщение другого процесса вытесняет ключ и обновляет версии тегов."""
+        redis_cache = RedisCache()
+        redis_cache.local = LocalLRUCache(max_entries=10, ttl_seconds=30)
+        redis_cache.local.set("user:1", b"1", "json")
+
+        redis_cache._handle_invalidation({
+            "type": "message",
+            "data": json.dumps({"origin": "other", "keys": ["user:1"], "tags": {"user_objects": 2}})
+        })
+
+        assert "user:1" not in redis_cache.local
+        assert redis_cache.tag_versions.get("user_objects") == 2
+
+    def test_own_invalidation_keeps_local_entry(self):
+        """Собственные сообщения не вытесняют только что записанный ключ."""
+        redis_cache = RedisCache()
+        redis_cache.local = LocalLRUCache(max_entries=10, ttl_seconds=30)
+        redis_cache.local.set("user:1", b"1", "json")
+
+        redis_cache._handle_invalidation({
+            "type": "message",
+            "data": json.dumps({"origin": redis_cache.instance_id, "keys": ["user:1"]})
+        })
+
+        assert "user:1" in redis_cache.local
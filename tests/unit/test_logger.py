@@ -0,0 +1,127 @@
+"""Unit-тесты структурированного логгера: очередь, ленивые поля, ограничение частоты."""
+
+import importlib
+import json
+import logging
+import queue
+
+import pytest
+
+from core.logging.logger import JSONFormatter, NonBlockingQueueHandler, StructuredLogger, TextFormatter
+
+
+# core.logging экспортирует объект logger под тем же именем, что и модуль
+logger_module = importlib.import_module("core.logging.logger")
+
+
+class _ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+@pytest.fixture
+def structured():
+    log = StructuredLogger("staffprobot.test")
+    handler = _ListHandler()
+    log.logger.addHandler(handler)
+    log.logger.setLevel(logging.INFO)
+    log.logger.propagate = False
+    yield log, handler.records
+    log.logger.removeHandler(handler)
+
+
+def test_disabled_level_does_not_build_payload(structured):
+    log, records = structured
+
+    log.debug(lambda: 1 / 0, lazy=lambda: 1 / 0)
+
+    assert records == []
+
+
+def test_lazy_fields_are_added_when_enabled(structured):
+    log, records = structured
+
+    log.info("Shift closed", shift_id=1, lazy=lambda: {"details": [1, 2]})
+
+    assert records[0].shift_id == 1
+    assert records[0].details == [1, 2]
+    # Место вызова, а не модуль логгера
+    assert records[0].funcName == "test_lazy_fields_are_added_when_enabled"
+
+
+def test_rate_limit_is_per_call_site_and_reports_suppressed(structured, monkeypatch):
+    log, records = structured
+    now = [100.0]
+    monkeypatch.setattr(logger_module.time, "monotonic", lambda: now[0])
+
+    def hot_loop(times):
+        for _ in range(times):
+            log.info("Hot loop", rate_limit=10)
+
+    hot_loop(5)
+    log.info("Other site", rate_limit=10)
+    now[0] += 11
+    hot_loop(2)
+
+    assert [r.getMessage() for r in records] == ["Hot loop", "Other site", "Hot loop"]
+    assert records[2].suppressed == 4
+
+
+def test_sample_zero_drops_all(structured):
+    log, records = structured
+
+    for _ in range(10):
+        log.info("Sampled", sample=0.0)
+
+    assert records == []
+
+
+def test_queue_handler_merges_message_and_counts_drops():
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+    record = logging.LogRecord("x", logging.INFO, __file__, 1, "value=%s", (42,), None)
+
+    handler.handle(record)
+    handler.handle(logging.LogRecord("x", logging.INFO, __file__, 1, "dropped", None, None))
+
+    queued = handler.queue.get_nowait()
+    assert queued.msg == "value=42" and queued.args is None
+    assert handler.dropped == 1
+
+    handler.handle(logging.LogRecord("x", logging.INFO, __file__, 1, "next", None, None))
+    assert handler.queue.get_nowait().dropped_records == 1
+
+
+@pytest.mark.parametrize("serializer", ["json", "orjson"])
+def test_json_formatter_includes_extra_fields(serializer):
+    record = logging.LogRecord("x", logging.INFO, __file__, 1, "Привет", None, None)
+    record.shift_id = 7
+    record.payload = {"at": object()}
+
+    entry = json.loads(JSONFormatter(serializer).format(record))
+
+    assert entry["message"] == "Привет"
+    assert entry["shift_id"] == 7
+    assert entry["payload"]["at"].startswith("<object")
+
+
+def test_text_formatter_appends_extra_fields():
+    record = logging.LogRecord("x", logging.INFO, __file__, 1, "Auto-closed shift", None, None)
+    record.shift_id = 7
+    record.time_source = "timeslot"
+
+    text = TextFormatter("%(levelname)s - %(message)s").format(record)
+
+    assert text == "INFO - Auto-closed shift | shift_id=7 time_source=timeslot"
+
+
+def test_record_attribute_names_are_renamed(structured):
+    log, records = structured
+
+    log.info("Bonuses granted", created=3, module="tasks")
+
+    assert records[0].created_ == 3
+    assert records[0].module_ == "tasks"
@@ -0,0 +1,273 @@
+"""Unit-тесты пакетной рассылки уведомлений и лимитов отправки."""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from core.celery.tasks import notification_tasks
+from domain.entities.notification import Notification, NotificationType
+from shared.services.senders.bulk_sender import BulkMessage, BulkSender, latency_summary
+from shared.services.senders.throttle import MessageThrottle, TokenBucket
+
+
+class TestTokenBucket:
+    """Тесты token bucket."""
+
+    def test_burst_then_wait(self):
+        """Запас расходуется сразу, дальше токены резервируются по очереди."""
+        bucket = TokenBucket(rate=10, capacity=2)
+
+        assert bucket.reserve() == 0
+        assert bucket.reserve() == 0
+        assert bucket.reserve() == pytest.approx(0.1, abs=0.01)
+        assert bucket.reserve() == pytest.approx(0.2, abs=0.01)
+
+    def test_rate_must_be_positive(self):
+        with pytest.raises(ValueError):
+            TokenBucket(rate=0)
+
+    def test_throttle_limits_chat_count(self):
+        """Число бакетов чатов ограничено."""
+        throttle = MessageThrottle(global_rate=100, chat_rate=1, max_chats=2)
+        for chat_id in range(5):
+            throttle._chat_bucket(chat_id)
+
+        assert len(throttle._chats) <= 2
+
+    @pytest.mark.asyncio
+    async def test_pause_blocks_global_acquire(self):
+        """Пауза flood control задерживает все отправки."""
+        throttle = MessageThrottle(global_rate=1000, chat_rate=1000)
+        throttle.pause(0.05)
+
+        started = asyncio.get_running_loop().time()
+        await throttle.acquire_global()
+
+        assert asyncio.get_running_loop().time() - started >= 0.04
+
+
+class TestBulkSender:
+    """Тесты движка массовой отправки."""
+
+    @pytest.mark.asyncio
+    async def test_keeps_order_within_chat(self):
+        """Сообщения одному чату уходят по порядку, разным чатам — параллельно."""
+        delivered = []
+
+        def make_send(chat, index):
+            async def send():
+                await asyncio.sleep(0.01 if index == 0 else 0)
+                delivered.append((chat, index))
+                return True
+            return send
+
+        messages = [
+            BulkMessage(chat_key=chat, send=make_send(chat, index), ref=(chat, index))
+            for index in range(3)
+            for chat in ("a", "b")
+        ]
+        report = await BulkSender(concurrency=4).send(messages)
+
+        assert report.sent == 6
+        assert [index for chat, index in delivered if chat == "a"] == [0, 1, 2]
+        assert [index for chat, index in delivered if chat == "b"] == [0, 1, 2]
+
+    @pytest.mark.asyncio
+    async def test_reports_failures_and_latency(self):
+        async def ok():
+            return True
+
+        async def boom():
+            raise RuntimeError("boom")
+
+        report = await BulkSender(concurrency=2).send([
+            BulkMessage(chat_key=1, send=ok, ref=1),
+            BulkMessage(chat_key=2, send=boom, ref=2, meta={"telegram_id": 2}),
+        ])
+
+        assert report.results == {1: None, 2: "boom"}
+        assert report.errors == [{"telegram_id": 2, "reason": "boom"}]
+        assert report.as_dict()["latency"]["count"] == 2
+
+    def test_latency_summary(self):
+        summary = latency_summary([float(value) for value in range(1, 101)])
+
+        assert summary["p50_ms"] == 50
+        assert summary["p95_ms"] == 95
+        assert summary["max_ms"] == 100
+
+
+def _notification(notif_id: int, user_id: int, channel: str = "telegram") -> Notification:
+    return Notification(
+        id=notif_id,
+        user_id=user_id,
+        type=NotificationType.SHIFT_REMINDER.value,
+        channel=channel,
+        title="t",
+        message="m",
+        data={},
+    )
+
+
+@pytest.mark.asyncio
+async def test_claim_batch_skips_locked_rows():
+    """Пачка забирается с FOR UPDATE SKIP LOCKED и ограничена по размеру."""
+    captured = []
+
+    async def execute(statement, *args, **kwargs):
+        captured.append(statement)
+        result = MagicMock()
+        result.scalars.return_value.all.return_value = []
+        return result
+
+    session = MagicMock()
+    session.execute = AsyncMock(side_effect=execute)
+
+    await notification_tasks._claim_batch(session, 50, 900)
+
+    sql = str(captured[0].compile(dialect=postgresql.dialect()))
+    assert "FOR UPDATE SKIP LOCKED" in sql
+    assert "LIMIT" in sql
+
+
+@pytest.mark.asyncio
+async def test_claim_batch_reclaims_stale_sending_rows():
+    """Строки, зависшие в sending дольше аренды, забираются повторно."""
+    captured = []
+
+    async def execute(statement, *args, **kwargs):
+        captured.append(statement)
+        result = MagicMock()
+        result.scalars.return_value.all.return_value = []
+        return result
+
+    session = MagicMock()
+    session.execute = AsyncMock(side_effect=execute)
+
+    before = datetime.now(timezone.utc)
+    await notification_tasks._claim_batch(session, 50, 900)
+
+    compiled = captured[0].compile(dialect=postgresql.dialect())
+    sql = str(compiled)
+    assert "notifications.claimed_at < %(claimed_at_1)s" in sql
+    assert "notifications.claimed_at IS NULL" in sql
+    assert "sending" in compiled.params.values()
+    cutoff = compiled.params["claimed_at_1"]
+    assert before - timedelta(seconds=901) < cutoff <= datetime.now(timezone.utc) - timedelta(seconds=900)
+
+
+@pytest.mark.asyncio
+async def test_mark_sending_records_claim_time():
+    session = MagicMock()
+    session.execute = AsyncMock()
+
+    await notification_tasks._mark_many(session, [1, 2], "sending")
+
+    compiled = session.execute.await_args.args[0].compile(dialect=postgresql.dialect())
+    assert "claimed_at=%(claimed_at)s" in str(compiled)
+    assert compiled.params["status"] == "sending"
+
+
+@pytest.mark.asyncio
+async def test_send_batch_is_concurrent_and_reports_failures():
+    """Отправка идет параллельно; ошибки получателей попадают в результат."""
+    notifications = [_notification(i, user_id=i) for i in range(1, 6)]
+    notifications.append(_notification(99, user_id=404))
+    users = [SimpleNamespace(id=i, telegram_id=1000 + i, role="employee") for i in range(1, 6)]
+
+    user_result = MagicMock()
+    user_result.scalars.return_value.all.return_value = users
+    session = MagicMock()
+    session.execute = AsyncMock(return_value=user_result)
+
+    in_flight = 0
+    max_in_flight = 0
+
+    async def send_notification(notification, telegram_id, variables):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return notification.id != 3
+
+    tg_sender = MagicMock()
+    tg_sender.send_notification = AsyncMock(side_effect=send_notification)
+    throttle = MessageThrottle(global_rate=1000, chat_rate=1000, chat_burst=10)
+    latencies = []
+
+    with patch(
+        "shared.services.notification_auto_login_vars.enrich_variables_with_action_link",
+        AsyncMock(return_value={}),
+    ):
+        results = await notification_tasks._send_batch(
+            session, notifications, tg_sender, MagicMock(), BulkSender(3, throttle), latencies
+        )
+
+    assert max_in_flight == 3
+    assert results[1] is None
+    assert results[3] == "Send failed"
+    assert results[99] == "User not found"
+    assert len(latencies) == 5
+    # Один запрос за получателями, MAX-аккаунты не нужны
+    assert session.execute.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_telegram_retry_after_pauses_all_sends():
+    """RetryAfter ставит общую паузу и повторяет отправку без расхода попыток."""
+    from telegram.error import RetryAfter
+    from shared.services.senders.telegram_sender import TelegramNotificationSender
+
+    sender = TelegramNotificationSender(
+        bot_token="123:abc", throttle=MessageThrottle(global_rate=1000, chat_rate=1000)
+    )
+    sender.bot = MagicMock()
+    sender.bot.send_message = AsyncMock(side_effect=[RetryAfter(0), True])
+    sender.throttle.pause = MagicMock()
+
+    assert await sender.send_text(1, "hi") is True
+    # Нулевой retry_after не должен превращаться в повтор без паузы
+    sender.throttle.pause.assert_called_once_with(1.0)
+    assert sender.bot.send_message.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_batch_is_committed_as_sending_before_send():
+    """Пачка фиксируется в sending до отправки; сбой записи итогов не возвращает ее в pending."""
+    from contextlib import asynccontextmanager
+
+    events = []
+    session = MagicMock()
+    session.commit = AsyncMock(side_effect=lambda: events.append("commit"))
+    session.rollback = AsyncMock(side_effect=lambda: events.append("rollback"))
+
+    @asynccontextmanager
+    async def celery_session():
+        yield session
+
+    async def mark_many(session, notif_ids, status, error=None):
+        events.append(("mark", status))
+
+    async def send_batch(*args, **kwargs):
+        events.append("send")
+        return {1: None}
+
+    async def apply_results(session, results):
+        raise RuntimeError("db down")
+
+    tg_sender = MagicMock()
+    with patch("core.database.session.get_celery_session", celery_session), \
+            patch("shared.services.senders.telegram_sender.get_telegram_sender", return_value=tg_sender), \
+            patch("shared.services.senders.max_sender.get_max_sender", return_value=MagicMock()), \
+            patch.object(notification_tasks, "_claim_batch", AsyncMock(return_value=[_notification(1, 1)])), \
+            patch.object(notification_tasks, "_mark_many", mark_many), \
+            patch.object(notification_tasks, "_send_batch", send_batch), \
+            patch.object(notification_tasks, "_apply_results", apply_results):
+        await notification_tasks._dispatch_all_scheduled()
+
+    assert events == [("mark", "sending"), "commit", "send", "rollback"]
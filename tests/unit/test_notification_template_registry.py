@@ -0,0 +1,127 @@
+"""Unit-тесты реестра скомпилированных шаблонов уведомлений."""
+
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from domain.entities.notification import NotificationChannel, NotificationType
+from shared.templates.notifications import registry as registry_module
+from shared.templates.notifications.registry import NotificationTemplateRegistry
+
+
+VARIABLES = {"user_name": "Иван", "object_name": "ТЦ", "shift_time": "10:00", "cancellation_reason": "болезнь"}
+
+
+@pytest.fixture
+def custom_override():
+    with patch.object(registry_module.settings, "notification_templates_custom_override", True):
+        yield
+
+
+def _row(channel=None, plain="Кастом: $user_name", html=None, subject=None):
+    return SimpleNamespace(
+        type=NotificationType.SHIFT_CANCELLED,
+        channel=channel,
+        plain_template=plain,
+        html_template=html,
+        subject_template=subject,
+    )
+
+
+def test_static_template_is_compiled_once():
+    registry = NotificationTemplateRegistry()
+
+    first = registry.get(NotificationType.SHIFT_CANCELLED, NotificationChannel.TELEGRAM)
+    second = registry.get(NotificationType.SHIFT_CANCELLED, NotificationChannel.TELEGRAM)
+
+    assert first is second
+    assert registry.render(NotificationType.SHIFT_CANCELLED, NotificationChannel.TELEGRAM, VARIABLES)["title"] == "Смена отменена"
+
+
+def test_render_many_keeps_order():
+    registry = NotificationTemplateRegistry()
+
+    rendered = registry.render_many(
+        NotificationType.SHIFT_CANCELLED,
+        NotificationChannel.SMS,
+        [{**VARIABLES, "user_name": name} for name in ("Анна", "Борис")],
+    )
+
+    assert "Анна" in rendered[0]["message"]
+    assert "Борис" in rendered[1]["message"]
+
+
+def test_custom_templates_ignored_without_override():
+    registry = NotificationTemplateRegistry()
+    registry.load([_row()])
+
+    rendered = registry.render(NotificationType.SHIFT_CANCELLED, NotificationChannel.SMS, VARIABLES)
+
+    assert "Кастом" not in rendered["message"]
+    assert rendered["title"] == "Смена отменена"
+
+
+@pytest.mark.asyncio
+async def test_refresh_skips_db_without_override():
+    registry = NotificationTemplateRegistry()
+
+    with patch.object(registry_module, "get_async_session") as get_session:
+        await registry.refresh()
+
+    get_session.assert_not_called()
+
+
+def test_custom_channel_template_overrides_all_channel_template(custom_override):
+    registry = NotificationTemplateRegistry()
+    registry.load([
+        _row(channel=None, plain="Для всех: $user_name"),
+        _row(channel=NotificationChannel.TELEGRAM, plain="Телеграм: $user_name", subject="Отмена"),
+    ])
+
+    telegram = registry.render(NotificationType.SHIFT_CANCELLED, NotificationChannel.TELEGRAM, VARIABLES)
+    email = registry.render(NotificationType.SHIFT_CANCELLED, NotificationChannel.EMAIL, VARIABLES)
+
+    assert telegram == {"title": "Отмена", "message": "Телеграм: Иван"}
+    # Без subject_template заголовок берется из статического шаблона
+    assert email == {"title": "Смена отменена", "message": "Для всех: Иван"}
+
+
+def test_load_drops_previously_compiled_templates(custom_override):
+    registry = NotificationTemplateRegistry()
+    static = registry.render(NotificationType.SHIFT_CANCELLED, NotificationChannel.SMS, VARIABLES)
+
+    registry.load([_row()])
+
+    assert registry.render(NotificationType.SHIFT_CANCELLED, NotificationChannel.SMS, VARIABLES)["message"] == "Кастом: Иван"
+    registry.load([])
+    assert registry.render(NotificationType.SHIFT_CANCELLED, NotificationChannel.SMS, VARIABLES) == static
+
+
+@pytest.mark.asyncio
+async def test_refresh_reloads_only_when_version_changes(custom_override):
+    registry = NotificationTemplateRegistry()
+    registry.load([], version=1)
+    version = AsyncMock(return_value=1)
+
+    with patch.object(registry_module.notification_template_cache, "current_version", version), \
+            patch.object(registry_module, "get_async_session") as get_session:
+        await registry.refresh()
+        get_session.assert_not_called()
+
+        version.return_value = 2
+        await registry.refresh()
+        get_session.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_local_commit_forces_reload(custom_override):
+    registry = NotificationTemplateRegistry()
+    registry.load([], version=1)
+    registry.invalidate()
+
+    with patch.object(registry_module.notification_template_cache, "current_version", AsyncMock(return_value=1)), \
+            patch.object(registry_module, "get_async_session") as get_session:
+        await registry.refresh()
+
+    get_session.assert_called_once()
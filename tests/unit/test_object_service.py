@@ -1,7 +1,7 @@
 """Unit тесты для ObjectService."""
 
 import pytest
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import Mock, patch
 from datetime import time
 from apps.bot.services.object_service import ObjectService
 from domain.entities.object import Object
@@ -19,12 +19,9 @@ class TestObjectService:
             return service
     
     @pytest.fixture
-    def mock_session(self):
+    def mock_session(self, sync_db_session):
         """Mock для сессии базы данных."""
-        session = MagicMock()
-        session.__enter__ = Mock(return_value=session)
-        session.__exit__ = Mock(return_value=None)
-        return session
+        return sync_db_session
     
     @pytest.fixture
     def sample_user(self):
@@ -54,12 +51,8 @@ class TestObjectService:
         assert object_service is not None
         assert hasattr(object_service, 'location_validator')
     
-    @patch('apps.bot.services.object_service.get_sync_session')
-    def test_create_object_success(self, mock_get_session, object_service, mock_session, sample_user, sample_object_data):
+    async def test_create_object_success(self, object_service, mock_session, sample_user, sample_object_data):
         """Тест успешного создания объекта."""
-        # Настраиваем моки
-        mock_get_session.return_value = mock_session
-        
         # Mock для валидации координат
         object_service.location_validator.validate_coordinates.return_value = {'valid': True}
         
@@ -82,7 +75,7 @@ class TestObjectService:
         mock_session.refresh = Mock(side_effect=lambda obj: setattr(obj, 'id', 1))
         
         # Выполняем тест
-        result = object_service.create_object(**sample_object_data)
+        result = await object_service.create_object(**sample_object_data)
         
         # Проверяем результат
         assert result['success'] is True
@@ -94,7 +87,7 @@ class TestObjectService:
         mock_session.add.assert_called_once()
         mock_session.commit.assert_called_once()
     
-    def test_create_object_invalid_coordinates(self, object_service, sample_object_data):
+    async def test_create_object_invalid_coordinates(self, object_service, mock_session, sample_object_data):
         """Тест создания объекта с неверными координатами."""
         # Mock для валидации координат
         object_service.location_validator.validate_coordinates.return_value = {
@@ -103,14 +96,14 @@ class TestObjectService:
         }
         
         # Выполняем тест
-        result = object_service.create_object(**sample_object_data)
+        result = await object_service.create_object(**sample_object_data)
         
         # Проверяем результат
         assert result['success'] is False
         assert 'Ошибка координат' in result['error']
         assert 'Неверный формат координат' in result['error']
     
-    def test_create_object_invalid_time_format(self, object_service, sample_object_data):
+    async def test_create_object_invalid_time_format(self, object_service, mock_session, sample_object_data):
         """Тест создания объекта с неверным форматом времени."""
         # Mock для валидации координат
         object_service.location_validator.validate_coordinates.return_value = {'valid': True}
@@ -119,13 +112,13 @@ class TestObjectService:
         sample_object_data['opening_time'] = 'invalid_time'
         
         # Выполняем тест
-        result = object_service.create_object(**sample_object_data)
+        result = await object_service.create_object(**sample_object_data)
         
         # Проверяем результат
         assert result['success'] is False
         assert 'Неверный формат времени' in result['error']
     
-    def test_create_object_closing_before_opening(self, object_service, sample_object_data):
+    async def test_create_object_closing_before_opening(self, object_service, mock_session, sample_object_data):
         """Тест создания объекта с временем закрытия раньше открытия."""
         # Mock для валидации координат
         object_service.location_validator.validate_coordinates.return_value = {'valid': True}
@@ -135,17 +128,15 @@ class TestObjectService:
         sample_object_data['closing_time'] = '09:00'
         
         # Выполняем тест
-        result = object_service.create_object(**sample_object_data)
+        result = await object_service.create_object(**sample_object_data)
         
         # Проверяем результат
         assert result['success'] is False
         assert 'Время закрытия должно быть позже времени открытия' in result['error']
     
-    @patch('apps.bot.services.object_service.get_sync_session')
-    def test_create_object_user_not_found(self, mock_get_session, object_service, mock_session, sample_object_data):
+    async def test_create_object_user_not_found(self, object_service, mock_session, sample_object_data):
         """Тест создания объекта для несуществующего пользователя."""
         # Настраиваем моки
-        mock_get_session.return_value = mock_session
         object_service.location_validator.validate_coordinates.return_value = {'valid': True}
         
         # Mock для поиска пользователя - пользователь не найден
@@ -154,18 +145,14 @@ class TestObjectService:
         mock_session.execute.return_value = mock_result
         
         # Выполняем тест
-        result = object_service.create_object(**sample_object_data)
+        result = await object_service.create_object(**sample_object_data)
         
         # Проверяем результат
         assert result['success'] is False
         assert 'Пользователь не найден в базе данных' in result['error']
     
-    @patch('apps.bot.services.object_service.get_sync_session')
-    def test_get_all_objects_success(self, mock_get_session, object_service, mock_session):
+    async def test_get_all_objects_success(self, object_service, mock_session):
         """Тест получения всех объектов."""
-        # Настраиваем моки
-        mock_get_session.return_value = mock_session
-        
         # Mock объекты
         obj1 = Mock()
         obj1.id = 1
@@ -196,7 +183,7 @@ class TestObjectService:
         mock_session.execute.return_value = mock_result
         
         # Выполняем тест
-        result = object_service.get_all_objects()
+        result = await object_service.get_all_objects()
         
         # Проверяем результат
         assert len(result) == 2
@@ -207,12 +194,8 @@ class TestObjectService:
         assert result[1]['name'] == 'Объект 2'
         assert result[1]['max_distance_meters'] == 300
     
-    @patch('apps.bot.services.object_service.get_sync_session')
-    def test_get_object_by_id_success(self, mock_get_session, object_service, mock_session):
+    async def test_get_object_by_id_success(self, object_service, mock_session):
         """Тест получения объекта по ID."""
-        # Настраиваем моки
-        mock_get_session.return_value = mock_session
-        
         # Mock объект
         obj = Mock()
         obj.id = 1
@@ -231,7 +214,7 @@ class TestObjectService:
         mock_session.execute.return_value = mock_result
         
         # Выполняем тест
-        result = object_service.get_object_by_id(1)
+        result = await object_service.get_object_by_id(1)
         
         # Проверяем результат
         assert result is not None
@@ -239,28 +222,20 @@ class TestObjectService:
         assert result['name'] == 'Тестовый объект'
         assert result['max_distance_meters'] == 400
     
-    @patch('apps.bot.services.object_service.get_sync_session')
-    def test_get_object_by_id_not_found(self, mock_get_session, object_service, mock_session):
+    async def test_get_object_by_id_not_found(self, object_service, mock_session):
         """Тест получения несуществующего объекта по ID."""
-        # Настраиваем моки
-        mock_get_session.return_value = mock_session
-        
         mock_result = Mock()
         mock_result.scalar_one_or_none.return_value = None
         mock_session.execute.return_value = mock_result
         
         # Выполняем тест
-        result = object_service.get_object_by_id(999)
+        result = await object_service.get_object_by_id(999)
         
         # Проверяем результат
         assert result is None
     
-    @patch('apps.bot.services.object_service.get_sync_session')
-    def test_get_user_objects_success(self, mock_get_session, object_service, mock_session, sample_user):
+    async def test_get_user_objects_success(self, object_service, mock_session, sample_user):
         """Тест получения объектов пользователя."""
-        # Настраиваем моки
-        mock_get_session.return_value = mock_session
-        
         # Mock для поиска пользователя
         mock_user_result = Mock()
         mock_user_result.scalar_one_or_none.return_value = sample_user
@@ -285,35 +260,27 @@ class TestObjectService:
         mock_session.execute.side_effect = [mock_user_result, mock_objects_result]
         
         # Выполняем тест
-        result = object_service.get_user_objects(12345)
+        result = await object_service.get_user_objects(12345)
         
         # Проверяем результат
         assert len(result) == 1
         assert result[0]['id'] == 1
         assert result[0]['name'] == 'Объект пользователя'
     
-    @patch('apps.bot.services.object_service.get_sync_session')
-    def test_get_user_objects_user_not_found(self, mock_get_session, object_service, mock_session):
+    async def test_get_user_objects_user_not_found(self, object_service, mock_session):
         """Тест получения объектов несуществующего пользователя."""
-        # Настраиваем моки
-        mock_get_session.return_value = mock_session
-        
         mock_result = Mock()
         mock_result.scalar_one_or_none.return_value = None
         mock_session.execute.return_value = mock_result
         
         # Выполняем тест
-        result = object_service.get_user_objects(99999)
+        result = await object_service.get_user_objects(99999)
         
         # Проверяем результат
         assert result == []
     
-    @patch('apps.bot.services.object_service.get_sync_session')
-    def test_update_object_field_max_distance_success(self, mock_get_session, object_service, mock_session, sample_user):
+    async def test_update_object_field_max_distance_success(self, object_service, mock_session, sample_user):
         """Тест успешного обновления поля max_distance_meters."""
-        # Настраиваем моки
-        mock_get_session.return_value = mock_session
-        
         # Mock для поиска пользователя
         mock_user_result = Mock()
         mock_user_result.scalar_one_or_none.return_value = sample_user
@@ -331,7 +298,7 @@ class TestObjectService:
         mock_session.execute.side_effect = [mock_user_result, mock_object_result]
         
         # Выполняем тест
-        result = object_service.update_object_field(1, 'max_distance_meters', '300', 12345)
+        result = await object_service.update_object_field(1, 'max_distance_meters', '300', 12345)
         
         # Проверяем результат
         assert result['success'] is True
@@ -339,12 +306,8 @@ class TestObjectService:
         assert result['new_value'] == '300'
         mock_session.commit.assert_called_once()
     
-    @patch('apps.bot.services.object_service.get_sync_session')
-    def test_update_object_field_invalid_distance(self, mock_get_session, object_service, mock_session, sample_user):
+    async def test_update_object_field_invalid_distance(self, object_service, mock_session, sample_user):
         """Тест обновления поля max_distance_meters с неверным значением."""
-        # Настраиваем моки
-        mock_get_session.return_value = mock_session
-        
         # Mock для поиска пользователя
         mock_user_result = Mock()
         mock_user_result.scalar_one_or_none.return_value = sample_user
@@ -361,18 +324,14 @@ class TestObjectService:
         mock_session.execute.side_effect = [mock_user_result, mock_object_result]
         
         # Выполняем тест с неверным значением (слишком большое)
-        result = object_service.update_object_field(1, 'max_distance_meters', '10000', 12345)
+        result = await object_service.update_object_field(1, 'max_distance_meters', '10000', 12345)
         
         # Проверяем результат
         assert result['success'] is False
         assert 'от 10 до 5000 метров' in result['error']
     
-    @patch('apps.bot.services.object_service.get_sync_session')
-    def test_update_object_field_access_denied(self, mock_get_session, object_service, mock_session, sample_user):
+    async def test_update_object_field_access_denied(self, object_service, mock_session, sample_user):
         """Тест обновления объекта без прав доступа."""
-        # Настраиваем моки
-        mock_get_session.return_value = mock_session
-        
         # Mock для поиска пользователя
         mock_user_result = Mock()
         mock_user_result.scalar_one_or_none.return_value = sample_user
@@ -389,7 +348,7 @@ class TestObjectService:
         mock_session.execute.side_effect = [mock_user_result, mock_object_result]
         
         # Выполняем тест
-        result = object_service.update_object_field(1, 'max_distance_meters', '300', 12345)
+        result = await object_service.update_object_field(1, 'max_distance_meters', '300', 12345)
         
         # Проверяем результат
         assert result['success'] is False
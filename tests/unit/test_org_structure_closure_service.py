@@ -0,0 +1,194 @@
+"""Unit-тесты замыкания иерархии подразделений и проекции эффективных настроек."""
+
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from domain.entities.object import Object
+from domain.entities.org_structure import OrgStructureUnit, OrgUnitEffectiveSettings
+from shared.services.late_penalty_calculator import LatePenaltyCalculator
+from shared.services.org_structure_closure_service import (
+    build_closure,
+    load_units_by_schedule,
+    object_cancellation_settings,
+    object_late_settings,
+    resolve_effective_settings,
+    unit_levels,
+)
+
+
+def _unit(id, parent_id=None, **overrides):
+    values = dict(
+        id=id,
+        parent_id=parent_id,
+        owner_id=100,
+        name=f"Подразделение {id}",
+        level=0,
+        payment_system_id=None,
+        payment_schedule_id=None,
+        organization_profile_id=None,
+        inherit_late_settings=True,
+        late_threshold_minutes=None,
+        late_penalty_per_minute=None,
+        inherit_cancellation_settings=True,
+        cancellation_short_notice_hours=None,
+        cancellation_short_notice_fine=None,
+        cancellation_invalid_reason_fine=None,
+    )
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
+def _tree():
+    """1 → 2 → 3 → 4 и 1 → 5."""
+    return [
+        _unit(1, payment_system_id=10, payment_schedule_id=20, organization_profile_id=30,
+              inherit_late_settings=False, late_threshold_minutes=5, late_penalty_per_minute=Decimal("10")),
+        _unit(2, 1, payment_schedule_id=21,
+              inherit_cancellation_settings=False, cancellation_short_notice_hours=12,
+              cancellation_short_notice_fine=Decimal("500")),
+        _unit(3, 2, inherit_late_settings=False, late_threshold_minutes=0, late_penalty_per_minute=Decimal("7")),
+        _unit(4, 3),
+        _unit(5, 1, inherit_late_settings=False),  # не наследует, но порог не задан — берется от родителя
+    ]
+
+
+def test_build_closure_contains_all_ancestor_pairs():
+    closure = {(row["ancestor_id"], row["descendant_id"]): row["depth"] for row in build_closure(_tree())}
+
+    assert closure[(4, 4)] == 0
+    assert closure[(3, 4)] == 1
+    assert closure[(1, 4)] == 3
+    assert closure[(1, 5)] == 1
+    assert (2, 5) not in closure
+    assert len(closure) == 1 + 2 + 3 + 4 + 2  # каждый узел со всеми предками
+
+
+def test_build_closure_survives_cycle_in_data():
+    closure = build_closure([_unit(1, 2), _unit(2, 1)])
+
+    assert sorted((row["ancestor_id"], row["descendant_id"], row["depth"]) for row in closure) == [
+        (1, 1, 0), (1, 2, 1), (2, 1, 1), (2, 2, 0),
+    ]
+
+
+def test_unit_levels_from_closure():
+    assert unit_levels(build_closure(_tree())) == {1: 0, 2: 1, 3: 2, 4: 3, 5: 1}
+
+
+def test_resolve_effective_settings_inherits_payment_and_profile():
+    effective = resolve_effective_settings(_tree())
+
+    assert effective[4]["payment_system_id"] == 10
+    assert effective[4]["payment_schedule_id"] == 21
+    assert effective[4]["organization_profile_id"] == 30
+    assert effective[5]["payment_schedule_id"] == 20
+
+
+def test_resolve_effective_settings_late_and_cancellation_sources():
+    effective = resolve_effective_settings(_tree())
+
+    assert effective[4]["late_threshold_minutes"] == 0
+    assert effective[4]["late_penalty_per_minute"] == Decimal("7")
+    assert effective[4]["late_source_unit_id"] == 3
+    assert effective[5]["late_source_unit_id"] == 1
+    assert effective[2]["late_source_name"] == "Подразделение 1"
+    assert effective[4]["cancellation_short_notice_hours"] == 12
+    assert effective[4]["cancellation_source_unit_id"] == 2
+    assert effective[1]["cancellation_source_unit_id"] is None
+
+
+def test_projection_matches_recursive_model_methods():
+    rows = _tree()
+    units = {}
+    for row in rows:
+        units[row.id] = OrgStructureUnit(**{k: v for k, v in vars(row).items() if k != "parent_id"})
+    for row in rows:
+        units[row.id].parent = units.get(row.parent_id)
+
+    effective = resolve_effective_settings(rows)
+
+    for unit_id, unit in units.items():
+        row = effective[unit_id]
+        late = unit.get_inherited_late_settings()
+        cancellation = unit.get_inherited_cancellation_settings()
+        assert row["payment_system_id"] == unit.get_inherited_payment_system_id()
+        assert row["payment_schedule_id"] == unit.get_inherited_payment_schedule_id()
+        assert row["late_threshold_minutes"] == late["threshold_minutes"]
+        assert row["late_penalty_per_minute"] == late["penalty_per_minute"]
+        assert row["cancellation_short_notice_hours"] == cancellation["short_notice_hours"]
+        assert row["cancellation_short_notice_fine"] == cancellation["short_notice_fine"]
+
+
+def test_late_threshold_without_penalty_inherits_from_parent():
+    rows = [
+        _unit(1, inherit_late_settings=False, late_threshold_minutes=5, late_penalty_per_minute=Decimal("10")),
+        _unit(2, 1, inherit_late_settings=False, late_threshold_minutes=15),  # ставка не задана
+    ]
+    parent = OrgStructureUnit(**{k: v for k, v in vars(rows[0]).items() if k != "parent_id"})
+    child = OrgStructureUnit(**{k: v for k, v in vars(rows[1]).items() if k != "parent_id"})
+    child.parent = parent
+
+    effective = resolve_effective_settings(rows)
+
+    assert effective[2]["late_threshold_minutes"] == 5
+    assert effective[2]["late_penalty_per_minute"] == Decimal("10")
+    assert effective[2]["late_source_unit_id"] == 1
+    assert child.get_inherited_late_settings() == {
+        'threshold_minutes': 5,
+        'penalty_per_minute': Decimal("10"),
+        'inherited_from': "Подразделение 1",
+    }
+
+
+def test_object_settings_prefer_own_then_unit():
+    unit_settings = OrgUnitEffectiveSettings(**resolve_effective_settings(_tree())[4])
+    obj = Object(
+        inherit_late_settings=True,
+        inherit_cancellation_settings=False,
+        cancellation_short_notice_hours=6,
+    )
+
+    assert object_late_settings(obj, unit_settings) == {
+        'threshold_minutes': 0,
+        'penalty_per_minute': Decimal("7"),
+        'source': 'org_unit',
+    }
+    assert object_cancellation_settings(obj, unit_settings)['source'] == 'object'
+    assert object_late_settings(obj, None)['source'] == 'default'
+    assert object_cancellation_settings(Object(inherit_cancellation_settings=True), None)['short_notice_hours'] == 24
+
+
+@pytest.mark.asyncio
+async def test_late_penalty_calculator_reads_projection_once():
+    session = AsyncMock()
+    result = MagicMock()
+    result.scalar_one_or_none.return_value = OrgUnitEffectiveSettings(
+        **resolve_effective_settings(_tree())[4]
+    )
+    session.execute.return_value = result
+    obj = Object(id=1, org_unit_id=4, inherit_late_settings=True)
+
+    settings = await LatePenaltyCalculator(session).get_late_penalty_settings(obj)
+
+    assert settings == {
+        'threshold_minutes': 0,
+        'penalty_per_minute': Decimal("7"),
+        'inherited_from': "Подразделение 3",
+    }
+    assert session.execute.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_load_units_by_schedule_groups_by_schedule_and_owner():
+    session = AsyncMock()
+    result = MagicMock()
+    result.all.return_value = [(20, 100, 1), (20, 100, 5), (21, 100, 2), (21, 100, 3), (20, 200, 9)]
+    session.execute.return_value = result
+
+    units_by_schedule = await load_units_by_schedule(session)
+
+    assert units_by_schedule == {20: {100: {1, 5}, 200: {9}}, 21: {100: {2, 3}}}
+    assert session.execute.await_count == 1
@@ -0,0 +1,80 @@
+"""Unit-тесты общей инвалидации тегов кэша по событиям ORM."""
+
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from core.cache import object_cache
+from core.cache.orm_invalidation import ALL_CHANGES, TagInvalidation
+
+
+def _session(*instances):
+    return SimpleNamespace(new=list(instances), dirty=[], deleted=[], info={})
+
+
+def _invalidation(collect=lambda instance, table: [instance.id], invalidate=None):
+    return TagInvalidation("test_cache", ["items"], collect, invalidate or MagicMock())
+
+
+def test_commit_passes_collected_keys_of_tracked_tables():
+    invalidate = MagicMock()
+    invalidation = _invalidation(invalidate=invalidate)
+    session = _session(
+        SimpleNamespace(__tablename__="items", id=1),
+        SimpleNamespace(__tablename__="other", id=2),
+    )
+
+    invalidation.after_flush(session, None)
+    invalidation.after_commit(session)
+
+    invalidate.assert_called_once_with({1})
+    assert invalidation.pending_key not in session.info
+
+
+def test_collect_error_invalidates_everything():
+    def collect(instance, table):
+        raise ValueError("no history")
+
+    invalidate = MagicMock()
+    invalidation = _invalidation(collect=collect, invalidate=invalidate)
+    session = _session(SimpleNamespace(__tablename__="items", id=1))
+
+    invalidation.after_flush(session, None)
+    invalidation.after_commit(session)
+
+    invalidate.assert_called_once_with({ALL_CHANGES})
+
+
+def test_bulk_statement_and_rollback():
+    invalidate = MagicMock()
+    invalidation = _invalidation(invalidate=invalidate)
+    session = _session()
+    state = MagicMock(is_update=False, is_delete=True, session=session)
+    state.statement.table.name = "items"
+
+    invalidation.do_orm_execute(state)
+    assert session.info[invalidation.pending_key] == {ALL_CHANGES}
+
+    invalidation.after_rollback(session)
+    invalidation.after_commit(session)
+
+    invalidate.assert_not_called()
+
+
+def test_invalidate_error_does_not_break_commit():
+    invalidation = _invalidation(invalidate=MagicMock(side_effect=RuntimeError("redis down")))
+    session = _session()
+    invalidation.mark(session, [5])
+
+    invalidation.after_commit(session)
+
+    assert invalidation.pending_key not in session.info
+
+
+def test_object_commit_invalidates_owner_object_lists():
+    session = _session(SimpleNamespace(__tablename__="objects", id=3, owner_id=1))
+    object_cache.invalidation.after_flush(session, None)
+
+    with patch.object(object_cache, "schedule_tag_invalidation") as schedule:
+        object_cache.invalidation.after_commit(session)
+
+    schedule.assert_called_once_with([object_cache.OBJECTS_TAG])
@@ -0,0 +1,193 @@
+"""Unit-тесты пакетного расчета начислений по графикам выплат."""
+
+from datetime import date
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from shared.services.payroll_batch_service import (
+    AdjustmentRow,
+    EntryDraft,
+    PayrollBatchResult,
+    PayrollBatchService,
+    PayrollTask,
+)
+
+
+PERIOD = (date(2026, 10, 1), date(2026, 10, 15))
+TODAY = date(2026, 10, 16)
+
+
+def _contract(id=1, employee_id=10, allowed_objects=(100,), inherit=True, schedule_id=None):
+    return SimpleNamespace(
+        id=id,
+        employee_id=employee_id,
+        owner_id=1,
+        allowed_objects=list(allowed_objects),
+        inherit_payment_schedule=inherit,
+        payment_schedule_id=schedule_id,
+    )
+
+
+def _adjustment(id, amount, adjustment_type="shift_base", object_id=100, shift_id=None,
+                hours=None, is_applied=False, payroll_entry_id=None, day=5):
+    adjustment = SimpleNamespace(
+        id=id,
+        employee_id=10,
+        object_id=object_id,
+        shift_id=shift_id,
+        adjustment_type=adjustment_type,
+        amount=Decimal(str(amount)),
+        details={"hours": hours} if hours is not None else None,
+        description=None,
+        is_applied=is_applied,
+        payroll_entry_id=payroll_entry_id,
+    )
+    day_date = date(2026, 10, day)
+    return AdjustmentRow(adjustment, day_date if shift_id else None, day_date)
+
+
+def _service(rows, objects=(100, 200)):
+    service = PayrollBatchService(MagicMock())
+    for row in rows:
+        service._adjustments[row.adjustment.employee_id].append(row)
+        service._state[row.adjustment.id] = (row.adjustment.is_applied, row.adjustment.payroll_entry_id)
+    service._objects = {obj_id: SimpleNamespace(id=obj_id) for obj_id in objects}
+    return service
+
+
+def _task(kind, contract):
+    return PayrollTask(kind, 1, PERIOD[0], PERIOD[1], contract)
+
+
+class TestScheduleResolution:
+    def test_inherited_schedule_read_from_unit_settings(self):
+        service = PayrollBatchService(MagicMock())
+        service._objects = {
+            100: SimpleNamespace(id=100, payment_schedule_id=None, org_unit_id=3),
+            200: SimpleNamespace(id=200, payment_schedule_id=5, org_unit_id=3),
+        }
+        unit_settings = {3: SimpleNamespace(unit_id=3, payment_schedule_id=7)}
+
+        assert service._effective_schedule_id(_contract(allowed_objects=(100,)), unit_settings) == 7
+        assert service._effective_schedule_id(_contract(allowed_objects=(200,)), unit_settings) == 5
+        assert service._effective_schedule_id(_contract(allowed_objects=(100,)), {}) is None
+        assert service._effective_schedule_id(_contract(inherit=False, schedule_id=9), unit_settings) == 9
+
+    def test_schedule_units_filtered_by_schedule_owner(self):
+        units_by_schedule = {7: {1: {1, 2, 3}, 2: {10}}}
+
+        own = SimpleNamespace(id=7, owner_id=2)
+        system = SimpleNamespace(id=7, owner_id=None)
+        other = SimpleNamespace(id=8, owner_id=None)
+
+        assert PayrollBatchService._schedule_unit_ids(units_by_schedule, own) == {10}
+        assert PayrollBatchService._schedule_unit_ids(units_by_schedule, system) == {1, 2, 3, 10}
+        assert PayrollBatchService._schedule_unit_ids(units_by_schedule, other) == set()
+
+
+class TestCompute:
+    def test_schedule_task_groups_by_object(self):
+        service = _service([
+            _adjustment(1, 1000, hours=8, shift_id=501),
+            _adjustment(2, 200, adjustment_type="task_bonus"),
+            _adjustment(3, -150, adjustment_type="late_start"),
+            _adjustment(4, 500, object_id=200, hours=4, shift_id=502),
+            _adjustment(5, 999, day=20),  # вне периода
+        ])
+        result = PayrollBatchResult()
+
+        service._compute_schedule_task(_task("schedule", _contract()), TODAY, result)
+
+        entry = service._entries[(10, 100, *PERIOD)]
+        assert entry.entry_id is None
+        assert entry.values["gross_amount"] == 1000.0
+        assert entry.values["total_bonuses"] == 200.0
+        assert entry.values["total_deductions"] == 150.0
+        assert entry.values["net_amount"] == 1050.0
+        assert entry.values["hourly_rate"] == 125.0
+        assert service._entries[(10, 200, *PERIOD)].values["gross_amount"] == 500.0
+        assert (result.entries_created, result.adjustments_applied) == (2, 4)
+        assert service._state[5] == (False, None)
+
+    def test_adjustment_is_applied_once_per_run(self):
+        service = _service([_adjustment(1, 1000, hours=8)])
+        result = PayrollBatchResult()
+
+        service._compute_schedule_task(_task("schedule", _contract(id=1)), TODAY, result)
+        service._compute_schedule_task(_task("schedule", _contract(id=2)), TODAY, result)
+
+        assert result.entries_created == 1
+        assert result.adjustments_applied == 1
+        assert service._entries[(10, 100, *PERIOD)].contract_id == 1
+
+    def test_existing_entry_recalculated_with_applied_adjustments(self):
+        service = _service([
+            _adjustment(1, 1000, hours=8, is_applied=True, payroll_entry_id=77),
+            _adjustment(2, 500, hours=4),
+        ])
+        key = (10, 100, *PERIOD)
+        service._entries[key] = EntryDraft(key, 1, {}, entry_id=77)
+        result = PayrollBatchResult()
+
+        service._compute_schedule_task(_task("schedule", _contract()), TODAY, result)
+
+        assert service._entries[key].values["gross_amount"] == 1500.0
+        assert result.entries_updated == 1
+        assert service._state[2] == (True, 77)
+
+    def test_individual_task_uses_first_object_and_resets_hanging(self):
+        service = _service([
+            _adjustment(1, 1000, hours=8),
+            _adjustment(2, 700, object_id=200),  # смена на другом объекте
+            _adjustment(3, -100, adjustment_type="manual_deduction", object_id=200, is_applied=True),
+        ])
+        result = PayrollBatchResult()
+
+        service._compute_individual_task(_task("individual", _contract(inherit=False, schedule_id=1)), result)
+
+        entry = service._entries[(10, 100, *PERIOD)]
+        assert entry.values["gross_amount"] == 1000.0
+        assert entry.values["total_deductions"] == 100.0
+        assert service._state[2] == (False, None)
+        assert service._state[3] == (True, (10, 100, *PERIOD))
+
+    def test_individual_task_without_objects_is_skipped(self):
+        service = _service([_adjustment(1, 1000)])
+        result = PayrollBatchResult()
+
+        service._compute_individual_task(_task("individual", _contract(allowed_objects=())), result)
+
+        assert service._entries == {}
+
+
+class TestWrite:
+    @pytest.mark.asyncio
+    async def test_new_entries_inserted_in_one_statement(self):
+        service = _service([_adjustment(1, 1000, hours=8), _adjustment(2, 500, object_id=200)])
+        service._compute_schedule_task(_task("schedule", _contract()), TODAY, PayrollBatchResult())
+
+        statements = []
+
+        async def execute(statement, params=None):
+            statements.append((statement, params))
+            result = MagicMock()
+            result.all.return_value = [
+                SimpleNamespace(id=900 + obj_id, employee_id=10, object_id=obj_id,
+                                period_start=PERIOD[0], period_end=PERIOD[1])
+                for obj_id in (100, 200)
+            ]
+            return result
+
+        service.session.execute = AsyncMock(side_effect=execute)
+        await service._write()
+
+        insert_statement, adjustments_update = statements[0], statements[1]
+        assert insert_statement[0].is_insert
+        assert len(statements) == 2
+        assert sorted(adjustments_update[1], key=lambda p: p["b_id"]) == [
+            {"b_id": 1, "b_is_applied": True, "b_entry_id": 1000},
+            {"b_id": 2, "b_is_applied": True, "b_entry_id": 1100},
+        ]
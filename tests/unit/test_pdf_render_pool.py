@@ -0,0 +1,135 @@
+"""Unit-тесты пула генерации PDF и кэша по содержимому."""
+
+import asyncio
+import threading
+from datetime import date
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+
+from apps.web.services.pdf_service import PDFService, render_contract_pdf
+from core.config.settings import settings
+from core.pdf.render_pool import PdfRenderPool, content_cache_key
+
+
+CONTRACT = SimpleNamespace(
+    id=1,
+    contract_number="Д-15",
+    title="Трудовой договор",
+    start_date=date(2026, 1, 10),
+    end_date=None,
+    hourly_rate=Decimal("350.00"),
+    content="<p>Первый пункт</p><p><b>Второй</b> пункт</p>",
+)
+
+
+class _MemoryCachePool(PdfRenderPool):
+    """Пул с кэшем в словаре вместо Redis."""
+
+    def __init__(self):
+        super().__init__()
+        self.store = {}
+
+    async def _get_cached(self, cache_key):
+        return self.store.get(cache_key)
+
+    async def _set_cached(self, cache_key, pdf_bytes):
+        self.store[cache_key] = pdf_bytes
+
+
+@pytest.fixture
+def thread_mode(monkeypatch):
+    monkeypatch.setattr(settings, "pdf_render_workers", 0)
+
+
+def test_cache_key_depends_on_content():
+    data = PDFService._contract_render_data(CONTRACT)
+
+    assert content_cache_key("contract", data) == content_cache_key("contract", dict(data))
+    assert content_cache_key("contract", data) != content_cache_key("contract", {**data, "title": "Другой"})
+    assert content_cache_key("contract", data) != content_cache_key("report", data)
+    # Границы частей учитываются: ("ab", "c") != ("a", "bc")
+    assert content_cache_key("html", "ab", "c") != content_cache_key("html", "a", "bc")
+
+
+def test_render_contract_pdf_from_plain_data():
+    pdf = render_contract_pdf(PDFService._contract_render_data(CONTRACT))
+
+    assert pdf.startswith(b"%PDF")
+
+
+async def test_render_runs_off_event_loop(thread_mode):
+    pool = PdfRenderPool()
+    loop_thread = threading.get_ident()
+    render_threads = []
+
+    def render(value):
+        render_threads.append(threading.get_ident())
+        return value
+
+    assert await pool.render("test", render, b"%PDF-1") == b"%PDF-1"
+    assert render_threads and render_threads[0] != loop_thread
+
+
+async def test_cached_document_is_not_rendered_again(thread_mode):
+    pool = _MemoryCachePool()
+    calls = []
+
+    def render(value):
+        calls.append(value)
+        return value
+
+    key = content_cache_key("test", "doc")
+    first = await pool.render("test", render, b"%PDF-1", cache_key=key)
+    second = await pool.render("test", render, b"%PDF-1", cache_key=key)
+
+    assert first == second == b"%PDF-1"
+    assert len(calls) == 1
+
+
+async def test_concurrent_requests_share_one_render(thread_mode):
+    pool = _MemoryCachePool()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def render(value):
+        calls.append(value)
+        started.set()
+        release.wait(5)
+        return value
+
+    key = content_cache_key("test", "doc")
+    first = asyncio.create_task(pool.render("test", render, b"%PDF-1", cache_key=key))
+    await asyncio.to_thread(started.wait, 5)
+    second = asyncio.create_task(pool.render("test", render, b"%PDF-1", cache_key=key))
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await asyncio.gather(first, second) == [b"%PDF-1", b"%PDF-1"]
+    assert len(calls) == 1
+
+
+async def test_render_error_is_not_cached(thread_mode):
+    pool = _MemoryCachePool()
+
+    def render(value):
+        raise ValueError(value)
+
+    with pytest.raises(ValueError):
+        await pool.render("test", render, "broken", cache_key="k")
+
+    assert pool.store == {}
+    assert pool._inflight == {}
+
+
+async def test_process_pool_renders_contract(monkeypatch):
+    monkeypatch.setattr(settings, "pdf_render_workers", 1)
+    pool = PdfRenderPool()
+    try:
+        pdf = await pool.render("contract", render_contract_pdf, PDFService._contract_render_data(CONTRACT))
+    finally:
+        pool.shutdown()
+
+    assert pdf.startswith(b"%PDF")
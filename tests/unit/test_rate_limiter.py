@@ -121,3 +121,76 @@ async def test_rate_limiter_graceful_degradation():
     # Или вернуть True из-за обработки исключения
     assert result in [True, False]  # Зависит от состояния cache.is_connected
 
+
+
+def test_gcra_burst_then_steady_rate():
+    """GCRA: пачка до лимита, дальше квота восстанавливается равномерно."""
+    from core.utils.rate_limiter import gcra
+
+    tat = None
+    for i in range(5):
+        result, tat = gcra(tat, now=100.0, limit=5, period=60)
+        assert result.allowed, f"Request {i+1} should be allowed"
+        assert result.remaining == 4 - i
+
+    result, _ = gcra(tat, now=100.0, limit=5, period=60)
+    assert result.allowed is False
+    assert result.retry_after == pytest.approx(12.0)
+
+    # Через один интервал (60/5 = 12 с) освобождается ровно один запрос
+    result, tat = gcra(tat, now=112.0, limit=5, period=60)
+    assert result.allowed is True
+    assert result.remaining == 0
+
+
+def test_gcra_peek_does_not_consume():
+    """Стоимость 0 — только остаток квоты."""
+    from core.utils.rate_limiter import gcra
+
+    _, tat = gcra(None, now=0.0, limit=10, period=60)
+    result, new_tat = gcra(tat, now=0.0, limit=10, period=60, cost=0)
+
+    assert result.remaining == 9
+    assert new_tat == tat
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_local_fallback_keeps_limiting(monkeypatch):
+    """При недоступном Redis лимит считается в памяти процесса, а не отключается."""
+    from unittest.mock import AsyncMock
+    from core.utils.rate_limiter import LocalRateLimiter
+
+    monkeypatch.setattr(RateLimiter, "_local", LocalRateLimiter())
+    monkeypatch.setattr(RateLimiter, "_redis_retry_at", 0.0)
+    monkeypatch.setattr(cache, "is_connected", False)
+    connect = AsyncMock(side_effect=ConnectionError("redis down"))
+    monkeypatch.setattr(cache, "connect", connect)
+
+    results = [await RateLimiter.check_rate_limit("fallback_user", 3, 60) for _ in range(4)]
+
+    assert results == [True, True, True, False]
+    # После ошибки подключение не повторяется на каждый запрос
+    assert connect.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_single_round_trip(monkeypatch):
+    """Решение и остаток приходят одним вызовом скрипта."""
+    from unittest.mock import AsyncMock, MagicMock
+
+    script = AsyncMock(return_value=[1, 7, 18000, 0])
+    redis_client = MagicMock()
+    redis_client.register_script.return_value = script
+    script.registered_client = redis_client
+
+    monkeypatch.setattr(RateLimiter, "_gcra_script", None)
+    monkeypatch.setattr(RateLimiter, "_redis_retry_at", 0.0)
+    monkeypatch.setattr(cache, "is_connected", True)
+    monkeypatch.setattr(cache, "redis", redis_client)
+
+    result = await RateLimiter.hit("user:1", 10, 60)
+
+    assert result.allowed is True
+    assert result.remaining == 7
+    assert result.reset_seconds == 18
+    script.assert_awaited_once_with(keys=["rate_limit:user:1"], args=[10, 60000, 1])
@@ -0,0 +1,88 @@
+"""
+Unit-тесты инкрементальных агрегатов рейтинга.
+
+Тестируем:
+- Веса свежести отзывов
+- Распределение по звездам
+- Приращение рейтинга только при смене учета отзыва
+"""
+from datetime import datetime, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from domain.entities.review import Rating
+from shared.services.rating_service import RatingService
+
+
+@pytest.fixture
+def session():
+    session = AsyncMock(spec=AsyncSession)
+    no_appeal = MagicMock()
+    no_appeal.scalar_one_or_none.return_value = None
+    session.execute = AsyncMock(return_value=no_appeal)
+    return session
+
+
+def _review(status="approved", rating="4.5", published_at=None):
+    return SimpleNamespace(
+        id=1,
+        status=status,
+        rating=Decimal(rating),
+        target_type="object",
+        target_id=7,
+        published_at=published_at or datetime(2025, 6, 1),
+    )
+
+
+def test_review_weight_decays_with_floor():
+    now = datetime(2025, 6, 1, 12, 0)
+    half_life = RatingService.DECAY_HALF_LIFE_DAYS
+
+    # Свежие отзывы (не старше суток) — полный вес
+    assert RatingService._calculate_review_weight(now - timedelta(hours=30), now) == 1.0
+    assert RatingService._calculate_review_weight(now - timedelta(days=half_life), now) == pytest.approx(0.5)
+    # Старые отзывы не теряют значимость полностью
+    assert RatingService._calculate_review_weight(now - timedelta(days=2000), now) == 0.1
+
+
+def test_star_bucket_floors_and_clamps():
+    assert RatingService.star_bucket(Decimal("4.5")) == 4
+    assert RatingService.star_bucket(Decimal("5.0")) == 5
+    assert RatingService.star_bucket(Decimal("0.5")) == 1
+
+
+def test_rating_distribution():
+    rating = Rating(target_type="object", target_id=1, stars_1=0, stars_2=1, stars_3=0, stars_4=3, stars_5=2)
+
+    assert rating.rating_distribution == {"1": 0, "2": 1, "3": 0, "4": 3, "5": 2}
+
+
+@pytest.mark.asyncio
+async def test_apply_review_change_skips_unchanged_state(session):
+    service = RatingService(session)
+
+    await service.apply_review_change(_review(status="pending"), was_counted=False)
+
+    session.execute.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_approved_review_upserts_aggregate(session):
+    service = RatingService(session)
+
+    await service.apply_review_change(_review(), was_counted=False)
+
+    # Проверка обжалований, upsert агрегата и пересчет среднего цели
+    assert session.execute.await_count == 3
+    upsert, refresh = (call.args[0] for call in session.execute.await_args_list[1:])
+    sql = str(upsert.compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT ON CONSTRAINT uq_ratings_target DO UPDATE" in sql
+    assert "stars_4" in sql
+    refresh_sql = str(refresh.compile(dialect=postgresql.dialect()))
+    assert refresh_sql.startswith("UPDATE ratings SET average_rating=(SELECT")
+    assert "greatest(exp(" in refresh_sql
@@ -0,0 +1,36 @@
+"""Рассылка текста в группы отчётов нескольких объектов."""
+
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from shared.services import report_group_broadcast as broadcast
+from shared.services.report_group_broadcast import ObjectReportGroupChannels
+
+
+def _channels(telegram_chat_id, max_report_chat_id=None):
+    return ObjectReportGroupChannels(
+        telegram_chat_id=telegram_chat_id,
+        max_report_chat_id=max_report_chat_id,
+        allow_telegram=True,
+        allow_max=True,
+    )
+
+
+@pytest.mark.asyncio
+async def test_shared_chat_gets_one_message_and_failures_are_reported():
+    objects = [SimpleNamespace(id=1), SimpleNamespace(id=2), SimpleNamespace(id=3)]
+    channels = {1: _channels("-100"), 2: _channels("-100"), 3: _channels("-200")}
+    tg_sender = MagicMock(throttle=None)
+    tg_sender.send_text = AsyncMock(side_effect=lambda chat_id, text, parse_mode: chat_id == "-100")
+
+    with patch.object(broadcast, "resolve_object_report_group_channels", AsyncMock(side_effect=lambda s, obj: channels[obj.id])), \
+            patch.object(broadcast.settings, "telegram_bot_token_override", "token"), \
+            patch.object(broadcast.settings, "max_features_enabled", False), \
+            patch("shared.services.senders.telegram_sender.get_telegram_sender", return_value=tg_sender):
+        results = await broadcast.send_report_group_texts(MagicMock(), objects, "С праздником")
+
+    assert tg_sender.send_text.await_count == 2
+    assert [(obj.id, res["telegram"]["ok"]) for obj, res in results] == [(1, True), (2, True), (3, False)]
+    assert all(res["max"]["ok"] is False for _, res in results)
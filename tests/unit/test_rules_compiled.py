@@ -0,0 +1,168 @@
+"""Unit-тесты скомпилированных правил Rules Engine и их кэша."""
+
+import json
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from core.cache import rules_cache as rules_cache_module
+from core.cache.rules_cache import (
+    ALL_RULES_TAG,
+    GLOBAL_RULES_TAG,
+    RulesCache,
+    owner_tag,
+    ruleset_tags,
+)
+from domain.entities.rule import Rule
+from shared.services.rules_engine import CompiledRuleSet, RulesEngine, compile_rule
+
+
+def _rule(id, scope="late", priority=100, condition=None, action=None, owner_id=1):
+    return Rule(
+        id=id,
+        owner_id=owner_id,
+        code=f"rule_{id}",
+        name=f"Правило {id}",
+        scope=scope,
+        priority=priority,
+        condition_json=json.dumps(condition or {}),
+        action_json=json.dumps(action or {"type": "fine", "amount": id}),
+        is_active=True,
+    )
+
+
+def _rules():
+    return [
+        _rule(1, condition={"object_id": 10, "late_minutes": 5}),
+        _rule(2, condition={"object_id": 20}),
+        _rule(3, condition={}),  # без условий — подходит любому контексту
+        _rule(4, condition={"object_id": 10}),
+        _rule(5, scope="cancellation", condition={"reason": "short_notice"}),
+    ]
+
+
+class TestCompiledRuleSet:
+    """Тесты компиляции и индексации правил."""
+
+    def test_invalid_json_is_skipped(self):
+        rule = _rule(1)
+        rule.condition_json = "{not json"
+
+        assert compile_rule(rule, 0) is None
+
+    def test_matches_all_condition_pairs(self):
+        ruleset = CompiledRuleSet(_rules())
+
+        actions = ruleset.evaluate("late", {"object_id": 10, "late_minutes": 5})
+
+        assert [a["amount"] for a in actions] == [1, 3, 4]
+
+    def test_keeps_priority_order_across_index_buckets(self):
+        ruleset = CompiledRuleSet(_rules())
+
+        actions = ruleset.evaluate("late", {"object_id": 10, "late_minutes": 7})
+
+        assert [a["amount"] for a in actions] == [3, 4]
+
+    def test_unknown_key_value_uses_unindexed_rules(self):
+        ruleset = CompiledRuleSet(_rules())
+
+        assert [a["amount"] for a in ruleset.evaluate("late", {"object_id": 99})] == [3]
+        assert [a["amount"] for a in ruleset.evaluate("late", {"object_id": [1]})] == [3]
+
+    def test_scopes_are_separate(self):
+        ruleset = CompiledRuleSet(_rules())
+
+        assert [a["amount"] for a in ruleset.evaluate("cancellation", {"reason": "short_notice"})] == [5]
+        assert ruleset.evaluate("task", {}) == []
+
+    def test_returned_actions_are_copies(self):
+        ruleset = CompiledRuleSet(_rules())
+
+        ruleset.evaluate("late", {"object_id": 20})[0]["amount"] = 0
+
+        assert ruleset.evaluate("late", {"object_id": 20})[0]["amount"] == 2
+
+
+class TestRulesEngine:
+    """Тесты оценки с кэшем скомпилированных правил."""
+
+    @pytest.fixture
+    def session(self):
+        result = MagicMock()
+        result.scalars.return_value.all.return_value = _rules()
+        session = MagicMock()
+        session.execute = AsyncMock(return_value=result)
+        return session
+
+    @pytest.mark.asyncio
+    async def test_evaluate_many_loads_rules_once(self, session, monkeypatch):
+        monkeypatch.setattr(rules_cache_module.cache, "is_connected", False)
+        engine = RulesEngine(session)
+
+        results = await engine.evaluate_many(1, "late", [{"object_id": 10}, {"object_id": 20}, {}])
+        single = await engine.evaluate(1, "late", {"object_id": 20})
+
+        assert [[a["amount"] for a in actions] for actions in results] == [[3, 4], [2, 3], [3]]
+        assert [a["amount"] for a in single] == [2, 3]
+        assert session.execute.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_process_cache_is_reused_while_versions_match(self, session, monkeypatch):
+        versions = {tag: 0 for tag in ruleset_tags(1)}
+        test_cache = RulesCache(max_entries=8)
+        test_cache.snapshot_versions = AsyncMock(return_value=versions)
+        monkeypatch.setattr("shared.services.rules_engine.rules_cache", test_cache)
+
+        await RulesEngine(session).evaluate(1, "late", {})
+        await RulesEngine(session).evaluate(1, "late", {})
+        assert session.execute.await_count == 1
+
+        test_cache.snapshot_versions.return_value = {**versions, owner_tag(1): 1}
+        await RulesEngine(session).evaluate(1, "late", {})
+        assert session.execute.await_count == 2
+
+
+class TestRulesCacheInvalidation:
+    """Тесты сбора изменений правил по событиям ORM."""
+
+    def _session(self, *instances):
+        session = MagicMock()
+        session.info = {}
+        session.new = list(instances)
+        session.dirty = []
+        session.deleted = []
+        return session
+
+    def test_commit_invalidates_owner_and_global_tags(self, monkeypatch):
+        scheduled = []
+        monkeypatch.setattr(rules_cache_module, "schedule_tag_invalidation", scheduled.append)
+        session = self._session(_rule(1, owner_id=7), _rule(2, owner_id=None))
+
+        rules_cache_module.invalidation.after_flush(session, None)
+        rules_cache_module.invalidation.after_commit(session)
+
+        assert scheduled == [sorted([owner_tag(7), GLOBAL_RULES_TAG])]
+
+    def test_bulk_update_invalidates_all(self, monkeypatch):
+        scheduled = []
+        monkeypatch.setattr(rules_cache_module, "schedule_tag_invalidation", scheduled.append)
+        session = self._session()
+        state = MagicMock(is_update=True, is_delete=False, session=session)
+        state.statement.table.name = "rules"
+
+        rules_cache_module.invalidation.do_orm_execute(state)
+        rules_cache_module.invalidation.after_commit(session)
+
+        assert scheduled == [[ALL_RULES_TAG]]
+
+    def test_rollback_discards_pending(self, monkeypatch):
+        scheduled = []
+        monkeypatch.setattr(rules_cache_module, "schedule_tag_invalidation", scheduled.append)
+        session = self._session(_rule(1))
+
+        rules_cache_module.invalidation.after_flush(session, None)
+        rules_cache_module.invalidation.after_rollback(session)
+        rules_cache_module.invalidation.after_commit(session)
+
+        assert scheduled == []
@@ -0,0 +1,117 @@
+"""Unit-тесты инструментирования SQL и бюджета запросов HTTP-запроса."""
+
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from core.monitoring import sql_instrumentation
+from core.monitoring.middleware import RequestMetricsMiddleware
+from core.monitoring.sql_instrumentation import (
+    QueryStats,
+    check_query_budget,
+    current_query_stats,
+    parse_statement,
+    track_queries,
+)
+
+
+@pytest.fixture
+def metrics(monkeypatch):
+    collector = MagicMock()
+    monkeypatch.setattr(sql_instrumentation, "metrics_collector", collector)
+    return collector
+
+
+class TestParseStatement:
+    """Тесты меток таблицы/операции и формы запроса."""
+
+    def test_select_with_parameter_list(self):
+        table, operation, shape = parse_statement(
+            "SELECT shifts.id FROM shifts WHERE shifts.object_id IN ($1, $2, $3) AND shifts.status = $4"
+        )
+
+        assert (table, operation) == ("shifts", "select")
+        assert shape == "SELECT shifts.id FROM shifts WHERE shifts.object_id IN (?...) AND shifts.status = ?"
+
+    def test_same_shape_for_different_list_sizes(self):
+        first = parse_statement("SELECT * FROM users WHERE users.id IN ($1, $2)")[2]
+        second = parse_statement("SELECT * FROM users WHERE users.id IN ($1, $2, $3, $4)")[2]
+
+        assert first == second
+
+    def test_write_operations(self):
+        assert parse_statement('INSERT INTO "public"."rules" (code) VALUES ($1)')[:2] == ("rules", "insert")
+        assert parse_statement("UPDATE notifications SET status=$1 WHERE notifications.id = $2")[:2] == ("notifications", "update")
+        assert parse_statement("DELETE FROM time_slots WHERE time_slots.id = %(id)s")[:2] == ("time_slots", "delete")
+
+    def test_cte_uses_main_statement(self):
+        statement = "WITH recent AS (SELECT id FROM shifts) UPDATE payroll_entries SET x = $1"
+
+        assert parse_statement(statement)[:2] == ("payroll_entries", "update")
+
+    def test_other_statements(self):
+        assert parse_statement("SET TIME ZONE 'UTC'")[:2] == ("-", "other")
+
+
+def test_after_cursor_execute_records_metrics_and_request_stats(metrics, monkeypatch):
+    monkeypatch.setattr(sql_instrumentation.settings, "sql_slow_query_ms", 0)
+    conn = SimpleNamespace(info={})
+    statement = "SELECT * FROM objects WHERE objects.id = $1"
+
+    with track_queries("GET /owner/objects") as stats:
+        for _ in range(3):
+            sql_instrumentation._before_cursor_execute(conn, None, statement, (), None, False)
+            sql_instrumentation._after_cursor_execute(conn, None, statement, (), None, False)
+
+    assert stats.count == 3
+    assert stats.repeated(3) == [("SELECT * FROM objects WHERE objects.id = ?", 3)]
+    assert metrics.record_db_query.call_count == 3
+    assert metrics.record_db_query.call_args[0][:2] == ("objects", "select")
+    assert current_query_stats() is None
+    assert conn.info["query_start"] == []
+
+
+def test_check_query_budget_reports_violations(metrics):
+    stats = QueryStats(label="GET /owner/objects")
+    for _ in range(5):
+        stats.record("SELECT * FROM objects WHERE objects.id = ?", 0.001)
+    stats.record("SELECT * FROM users", 0.001)
+
+    assert check_query_budget(stats, "/owner/objects", budget=10, repeat_threshold=10) == []
+    assert check_query_budget(stats, "/owner/objects", budget=4, repeat_threshold=5) == ["budget", "repeated"]
+    metrics.record_query_budget_exceeded.assert_any_call("/owner/objects", "repeated")
+
+
+class TestRequestMetricsMiddleware:
+    """Тесты метки маршрута и записи метрик запроса."""
+
+    @pytest.mark.asyncio
+    async def test_records_route_template_and_status(self, metrics, monkeypatch):
+        collector = MagicMock()
+        monkeypatch.setattr("core.monitoring.middleware.metrics_collector", collector)
+
+        def endpoint():
+            pass
+
+        route = SimpleNamespace(path="/owner/objects/{object_id}", endpoint=endpoint)
+
+        async def app(scope, receive, send):
+            scope["endpoint"] = endpoint
+            await send({"type": "http.response.start", "status": 404})
+
+        async def send(message):
+            pass
+
+        middleware = RequestMetricsMiddleware(app)
+        scope = {"type": "http", "method": "GET", "path": "/owner/objects/7", "app": SimpleNamespace(routes=[route])}
+        await middleware(scope, None, send)
+
+        collector.record_http_request.assert_called_once()
+        assert collector.record_http_request.call_args[0][:3] == ("GET", "/owner/objects/{object_id}", 404)
+        collector.record_request_queries.assert_called_once_with("/owner/objects/{object_id}", 0)
+
+    def test_unrouted_request_has_fixed_label(self):
+        middleware = RequestMetricsMiddleware(None)
+
+        assert middleware.route_template({"path": "/random/123"}) == RequestMetricsMiddleware.UNMATCHED
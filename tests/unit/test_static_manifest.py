@@ -0,0 +1,74 @@
+"""Unit-тесты манифеста статических файлов."""
+
+import gzip
+import json
+
+from apps.web.utils.static_manifest import (
+    MANIFEST_NAME,
+    build_manifest,
+    choose_encoding,
+    hashed_name,
+    load_manifest,
+    read_manifest,
+)
+
+
+def _static(tmp_path):
+    static_dir = tmp_path / "static"
+    (static_dir / "css").mkdir(parents=True)
+    (static_dir / "css" / "main.css").write_text("body { color: black; }\n" * 100)
+    (static_dir / "favicon.ico").write_bytes(b"\x00\x01")
+    return static_dir
+
+
+def test_hashed_name_keeps_directory_and_suffix():
+    name = hashed_name("js/admin/list.js", b"content")
+
+    assert name.startswith("js/admin/list.")
+    assert name.endswith(".js")
+    assert name != hashed_name("js/admin/list.js", b"other")
+
+
+def test_build_writes_hashed_copies_and_compressed_variants(tmp_path):
+    static_dir = _static(tmp_path)
+    build_dir = tmp_path / "build"
+
+    manifest = build_manifest(static_dir, build_dir)
+
+    css = manifest.assets["css/main.css"]
+    assert (build_dir / css.path).read_bytes() == (static_dir / "css" / "main.css").read_bytes()
+    assert "gzip" in css.encodings
+    assert gzip.decompress((build_dir / f"{css.path}.gz").read_bytes()) == (static_dir / "css" / "main.css").read_bytes()
+    # Маленькие файлы не сжимаются
+    assert manifest.assets["favicon.ico"].encodings == ()
+    assert json.loads((build_dir / MANIFEST_NAME).read_text())["assets"]["css/main.css"]["path"] == css.path
+
+
+def test_url_is_dict_lookup_with_fallback(tmp_path):
+    manifest = build_manifest(_static(tmp_path), tmp_path / "build")
+
+    assert manifest.url("css/main.css") == f"/static/{manifest.assets['css/main.css'].path}"
+    assert manifest.url("js/missing.js") == "/static/js/missing.js"
+
+
+def test_load_rebuilds_when_sources_change(tmp_path):
+    static_dir = _static(tmp_path)
+    build_dir = tmp_path / "build"
+    old_path = build_manifest(static_dir, build_dir).assets["css/main.css"].path
+
+    assert load_manifest(static_dir, build_dir).assets["css/main.css"].path == old_path
+
+    (static_dir / "css" / "main.css").write_text("body { color: red; }\n" * 100)
+    new_path = load_manifest(static_dir, build_dir).assets["css/main.css"].path
+
+    assert new_path != old_path
+    assert read_manifest(build_dir).assets["css/main.css"].path == new_path
+    # Устаревшие копии удаляются
+    assert not (build_dir / old_path).exists()
+
+
+def test_choose_encoding_prefers_brotli_and_respects_q_zero():
+    assert choose_encoding("gzip, deflate, br", ("br", "gzip")) == "br"
+    assert choose_encoding("gzip, br;q=0", ("br", "gzip")) == "gzip"
+    assert choose_encoding("identity", ("br", "gzip")) is None
+    assert choose_encoding("gzip", ()) is None
@@ -0,0 +1,128 @@
+"""
+Unit-тесты назначения задач Tasks v2 и начисления бонусов.
+
+Тестируем:
+- Фильтр планов по дате и окну времени начала
+- Условие принадлежности плана объекту
+- Подбор пар (план, смена) одним INSERT ... SELECT
+- Сдвиг отметки начисления бонусов на max(completed_at)
+"""
+from datetime import date, datetime, time
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.celery.tasks import task_bonuses
+from core.celery.tasks.task_assignment import (
+    create_task_entries_for_date,
+    plan_covers_object,
+    should_create_entry_for_date,
+    start_time_matches,
+)
+from domain.entities.shift_schedule import ShiftSchedule
+
+
+def _plan(**kwargs):
+    values = dict(
+        planned_date=None,
+        recurrence_end_date=None,
+        recurrence_type=None,
+        recurrence_config=None,
+        planned_time_start=None,
+    )
+    values.update(kwargs)
+    return SimpleNamespace(**values)
+
+
+def test_start_time_window():
+    plan = _plan(planned_time_start=time(9, 0))
+
+    assert start_time_matches(plan, datetime(2025, 3, 10, 9, 30))
+    assert start_time_matches(plan, datetime(2025, 3, 10, 8, 30))
+    assert not start_time_matches(plan, datetime(2025, 3, 10, 9, 31))
+    assert start_time_matches(_plan(), datetime(2025, 3, 10, 23, 0))
+
+
+def test_plan_for_specific_date():
+    plan = _plan(planned_date=datetime(2025, 3, 10))
+
+    assert should_create_entry_for_date(plan, date(2025, 3, 10))
+    assert not should_create_entry_for_date(plan, date(2025, 3, 11))
+
+
+def test_plan_covers_object_compiles_to_jsonb_containment():
+    sql = str(plan_covers_object(ShiftSchedule.object_id).compile(dialect=postgresql.dialect()))
+
+    assert "@>" in sql
+    assert "jsonb_build_array(shift_schedules.object_id)" in sql
+    assert "task_plans_v2.object_id IS NULL" in sql
+
+
+@pytest.mark.asyncio
+async def test_bonuses_without_completed_entries_keep_watermark():
+    session = AsyncMock(spec=AsyncSession)
+    empty = MagicMock()
+    empty.scalar_one_or_none.return_value = None
+    empty.scalar.return_value = None
+    session.execute = AsyncMock(return_value=empty)
+
+    assert await task_bonuses.process_completed_tasks_bonuses(session) == 0
+    # Чтение отметки и max(completed_at); вставки и коммита нет
+    assert session.execute.await_count == 2
+    session.commit.assert_not_called()
+
+
+def _compiled(statement):
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+@pytest.mark.asyncio
+async def test_candidate_pairs_inserted_in_one_statement():
+    plans = MagicMock()
+    plans.scalars.return_value.all.return_value = [
+        SimpleNamespace(id=1, **vars(_plan())),
+        SimpleNamespace(id=2, **vars(_plan(planned_date=datetime(2025, 3, 11)))),
+    ]
+    inserted = MagicMock()
+    inserted.all.return_value = [(101,), (102,)]
+    session = AsyncMock(spec=AsyncSession)
+    session.execute = AsyncMock(side_effect=[plans, inserted])
+
+    assert await create_task_entries_for_date(session, date(2025, 3, 10)) == 2
+
+    sql = _compiled(session.execute.await_args_list[1].args[0])
+    assert sql.startswith("INSERT INTO task_entries_v2 (template_id, plan_id, shift_schedule_id, employee_id")
+    assert "JOIN shift_schedules ON" in sql
+    assert "NOT (EXISTS (SELECT" in sql
+    assert "ON CONFLICT (plan_id, shift_schedule_id) WHERE shift_id IS NULL DO NOTHING" in sql
+    # План на другую дату отсеивается до запроса
+    params = session.execute.await_args_list[1].args[0].compile(dialect=postgresql.dialect()).params
+    assert [1] in params.values()
+    session.commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_bonuses_advance_watermark_to_last_completion():
+    watermark = datetime(2025, 3, 10, 9, 0)
+    last_completed = datetime(2025, 3, 10, 9, 40)
+    stored = MagicMock()
+    stored.scalar_one_or_none.return_value = watermark.isoformat()
+    latest = MagicMock()
+    latest.scalar.return_value = last_completed
+    inserted = MagicMock()
+    inserted.all.return_value = [(Decimal("100"),), (Decimal("-50"),)]
+    session = AsyncMock(spec=AsyncSession)
+    session.execute = AsyncMock(side_effect=[stored, latest, inserted])
+
+    with patch.object(task_bonuses, "set_watermark", AsyncMock()) as set_watermark:
+        assert await task_bonuses.process_completed_tasks_bonuses(session) == 2
+
+    sql = _compiled(session.execute.await_args_list[2].args[0])
+    assert sql.startswith("INSERT INTO payroll_adjustments")
+    assert "ON CONFLICT (task_entry_v2_id) WHERE task_entry_v2_id IS NOT NULL DO NOTHING" in sql
+    set_watermark.assert_awaited_once_with(session, last_completed)
+    session.commit.assert_awaited_once()
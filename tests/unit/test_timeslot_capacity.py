@@ -0,0 +1,157 @@
+"""Unit-тесты расчета вместимости тайм-слотов."""
+
+from datetime import date, datetime, time
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+import pytz
+from sqlalchemy.dialects import postgresql
+
+from domain.entities.shift_schedule import ShiftSchedule
+from domain.entities.time_slot import TimeSlot
+from shared.services.timeslot_capacity_service import (
+    Booking,
+    SlotWindow,
+    as_utc,
+    compute_capacity,
+    get_slot_free_intervals,
+    lock_timeslot,
+)
+
+
+TZ = pytz.timezone("Europe/Moscow")
+DAY = date(2025, 3, 10)
+
+
+def _window(slot_id, start, end, max_employees=1):
+    return SlotWindow.local(slot_id, DAY, time(*start), time(*end), max_employees, TZ)
+
+
+def _booking(start, end=None, slot_id=None):
+    start_dt = TZ.localize(datetime.combine(DAY, time(*start)))
+    end_dt = TZ.localize(datetime.combine(DAY, time(*end))) if end else None
+    return Booking(start=start_dt, end=end_dt, time_slot_id=slot_id)
+
+
+def _local(hour, minute=0):
+    return TZ.localize(datetime.combine(DAY, time(hour, minute)))
+
+
+def test_empty_slot_is_fully_free():
+    capacity = compute_capacity([_window(1, (9, 0), (17, 0), 2)], [])[1]
+
+    assert capacity.peak == 0
+    assert capacity.available == 2
+    assert capacity.bookings == 0
+    assert capacity.free_time_intervals() == [(time(9, 0), time(17, 0))]
+    assert capacity.occupied_minutes == 0
+
+
+def test_free_intervals_respect_max_employees():
+    windows = [_window(1, (9, 0), (17, 0), 2)]
+    bookings = [
+        _booking((9, 0), (13, 0), slot_id=1),
+        _booking((11, 0), (15, 0), slot_id=1),
+    ]
+
+    capacity = compute_capacity(windows, bookings)[1]
+
+    assert capacity.peak == 2
+    assert capacity.bookings == 2
+    # 11-13 занято обоими местами
+    assert capacity.free_time_intervals() == [(time(9, 0), time(11, 0)), (time(13, 0), time(17, 0))]
+    assert capacity.occupied_minutes == 8 * 60
+    assert capacity.fits(_local(13), _local(17))
+    assert not capacity.fits(_local(10), _local(12))
+
+
+def test_back_to_back_bookings_share_one_seat():
+    capacity = compute_capacity(
+        [_window(1, (9, 0), (15, 0), 1)],
+        [_booking((9, 0), (12, 0), slot_id=1), _booking((12, 0), (15, 0), slot_id=1)],
+    )[1]
+
+    assert capacity.peak == 1
+    assert capacity.bookings == 2
+    assert capacity.free_time_intervals() == []
+
+
+def test_unlinked_bookings_count_in_every_overlapping_slot():
+    windows = [_window(1, (8, 0), (12, 0)), _window(2, (12, 0), (20, 0)), _window(3, (20, 0), (22, 0))]
+    bookings = [
+        _booking((10, 0), (14, 0)),  # без привязки: пересекает слоты 1 и 2
+        _booking((15, 0), (16, 0), slot_id=1),  # чужой слот: в слоте 2 не учитывается
+    ]
+
+    capacity = compute_capacity(windows, bookings)
+
+    assert capacity[1].free_time_intervals() == [(time(8, 0), time(10, 0))]
+    assert capacity[2].free_time_intervals() == [(time(14, 0), time(20, 0))]
+    assert capacity[2].bookings == 1
+    assert capacity[3].bookings == 0
+    assert capacity[3].peak == 0
+
+
+def test_open_booking_occupies_until_slot_end():
+    capacity = compute_capacity([_window(1, (9, 0), (18, 0))], [_booking((11, 0))])[1]
+
+    assert capacity.free_time_intervals() == [(time(9, 0), time(11, 0))]
+    assert not capacity.fits(_local(16), _local(18))
+
+
+def test_fits_rejects_interval_outside_slot():
+    capacity = compute_capacity([_window(1, (9, 0), (12, 0))], [])[1]
+
+    assert capacity.fits(_local(9), _local(12))
+    assert not capacity.fits(_local(8), _local(10))
+    assert not capacity.fits(_local(11), _local(13))
+
+
+def test_naive_datetimes_are_utc():
+    booking_start = as_utc(datetime(2025, 3, 10, 6, 0))  # 09:00 МСК
+    capacity = compute_capacity(
+        [_window(1, (9, 0), (12, 0))],
+        [Booking(start=booking_start, end=as_utc(datetime(2025, 3, 10, 7, 0)), time_slot_id=1)],
+    )[1]
+
+    assert capacity.free_time_intervals() == [(time(10, 0), time(12, 0))]
+
+
+@pytest.mark.asyncio
+async def test_lock_timeslot_locks_whole_object_day_in_id_order():
+    slots = [TimeSlot(id=1, object_id=7, slot_date=DAY), TimeSlot(id=2, object_id=7, slot_date=DAY)]
+    day_result = MagicMock()
+    day_result.one_or_none.return_value = SimpleNamespace(object_id=7, slot_date=DAY)
+    slots_result = MagicMock()
+    slots_result.scalars.return_value.all.return_value = slots
+    session = AsyncMock()
+    session.execute.side_effect = [day_result, slots_result]
+
+    assert await lock_timeslot(session, 2) is slots[1]
+
+    lock_sql = str(session.execute.await_args_list[1].args[0].compile(dialect=postgresql.dialect()))
+    assert "time_slots.object_id = " in lock_sql
+    assert "time_slots.slot_date = " in lock_sql
+    assert lock_sql.endswith("ORDER BY time_slots.id FOR UPDATE")
+
+
+@pytest.mark.asyncio
+async def test_slot_free_intervals_count_unlinked_bookings():
+    slot = TimeSlot(
+        id=1, object_id=7, slot_date=DAY, start_time=time(9, 0), end_time=time(17, 0), max_employees=1
+    )
+    unlinked = ShiftSchedule(
+        planned_start=datetime(2025, 3, 10, 8, 0),  # 11:00 МСК
+        planned_end=datetime(2025, 3, 10, 10, 0),
+        time_slot_id=None,
+    )
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = [unlinked]
+    session = AsyncMock()
+    session.execute.return_value = result
+
+    assert await get_slot_free_intervals(session, slot, "Europe/Moscow") == [
+        {"start": "09:00", "end": "11:00"},
+        {"start": "13:00", "end": "17:00"},
+    ]
@@ -0,0 +1,148 @@
+"""Unit-тесты пакетного создания тайм-слотов."""
+
+from datetime import date, time, timedelta
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from shared.services.timeslot_planner_service import (
+    ALL_DAYS_MASK,
+    WORK_WEEK_MASK,
+    PlannedSlot,
+    TimeslotPlanner,
+    filter_new_slots,
+    plan_dates,
+    repeat_weekday_mask,
+    weekday_mask,
+)
+
+
+def _naive_dates(start, end, mask, repeat_weeks):
+    """Обход по дням — эталон для арифметики plan_dates."""
+    anchor = start - timedelta(days=start.weekday())
+    result = []
+    current = start
+    while current <= end:
+        week_offset = (current - anchor).days // 7
+        if mask & (1 << current.weekday()) and week_offset % repeat_weeks == 0:
+            result.append(current)
+        current += timedelta(days=1)
+    return result
+
+
+def _slot(object_id=1, slot_date=date(2027, 1, 4), start=time(9), end=time(18)):
+    return PlannedSlot(object_id=object_id, slot_date=slot_date, start_time=start, end_time=end)
+
+
+@pytest.mark.parametrize("mask", [ALL_DAYS_MASK, WORK_WEEK_MASK, weekday_mask([0, 3, 6]), weekday_mask([5])])
+@pytest.mark.parametrize("repeat_weeks", [1, 2, 3])
+def test_plan_dates_matches_day_by_day_walk(mask, repeat_weeks):
+    start, end = date(2026, 12, 3), date(2028, 1, 15)
+
+    assert plan_dates(start, end, mask, repeat_weeks) == _naive_dates(start, end, mask, repeat_weeks)
+
+
+def test_plan_dates_repeat_cycle_survives_year_boundary():
+    # 2027-12-27 и 2028-01-03 — соседние недели, хотя номера ISO-недель 52 и 1
+    dates = plan_dates(date(2027, 12, 20), date(2028, 1, 10), weekday_mask([0]), repeat_weeks=2)
+
+    assert dates == [date(2027, 12, 20), date(2028, 1, 3)]
+
+
+def test_plan_dates_empty_cases():
+    assert plan_dates(date(2027, 1, 2), date(2027, 1, 1)) == []
+    assert plan_dates(date(2027, 1, 1), date(2027, 12, 31), 0) == []
+    assert len(plan_dates(date(2027, 1, 1), date(2027, 12, 31))) == 365
+
+
+def test_repeat_weekday_mask_follows_template_rules():
+    assert repeat_weekday_mask("none", "0,1") == 0
+    assert repeat_weekday_mask("daily", None) == ALL_DAYS_MASK
+    assert repeat_weekday_mask("monthly", "") == ALL_DAYS_MASK
+    assert repeat_weekday_mask("weekly", "") == ALL_DAYS_MASK
+    assert repeat_weekday_mask("weekly", "0, 2,4") == weekday_mask([0, 2, 4])
+
+
+def test_filter_new_slots_skips_existing_and_repeated():
+    existing = {(1, date(2027, 1, 4), time(9), time(18))}
+    slots = [
+        _slot(),  # уже есть
+        _slot(start=time(10)),  # другое время — новый
+        _slot(start=time(10)),  # повтор во входных данных
+        _slot(object_id=2),
+    ]
+
+    new_slots, skipped = filter_new_slots(slots, existing)
+
+    assert new_slots == [_slot(start=time(10)), _slot(object_id=2)]
+    assert skipped == 2
+
+
+def test_filter_new_slots_by_date_only():
+    new_slots, skipped = filter_new_slots([_slot(start=time(10))], {(1, date(2027, 1, 4))}, match_times=False)
+
+    assert new_slots == []
+    assert skipped == 1
+
+
+def _session(existing_rows, inserted_ids):
+    session = MagicMock()
+    session.info = {}
+    session.commit = AsyncMock()
+    ids = iter(inserted_ids)
+    statements = []
+
+    async def execute(statement):
+        statements.append(statement)
+        result = MagicMock()
+        if len(statements) == 1:
+            result.all.return_value = existing_rows
+            return result
+        params = statement.compile().params
+        count = sum(1 for key in params if key.startswith("object_id"))
+        rows = []
+        for index in range(count):
+            rows.append(SimpleNamespace(_mapping={
+                "id": next(ids),
+                "object_id": params[f"object_id_m{index}"],
+                "slot_date": params[f"slot_date_m{index}"],
+                "start_time": params[f"start_time_m{index}"],
+                "end_time": params[f"end_time_m{index}"],
+            }))
+        return rows
+
+    session.execute = execute
+    return session, statements
+
+
+async def test_materialize_inserts_missing_slots_in_batches_and_commits_once():
+    days = [date(2027, 1, 4) + timedelta(days=i) for i in range(5)]
+    slots = [_slot(object_id=object_id, slot_date=day) for object_id in (1, 2) for day in days]
+    session, statements = _session(
+        existing_rows=[(1, days[0], time(9), time(18))],
+        inserted_ids=range(100, 200),
+    )
+
+    result = await TimeslotPlanner(session, batch_size=4).materialize(slots)
+
+    # 1 SELECT существующих + 3 INSERT по 4/4/1 строк
+    assert len(statements) == 4
+    assert all("ON CONFLICT DO NOTHING" in str(stmt.compile(dialect=postgresql.dialect())) for stmt in statements[1:])
+    assert result.created_count == 9
+    assert result.skipped == 1
+    assert [row["id"] for row in result.created] == list(range(100, 109))
+    session.commit.assert_awaited_once()
+    assert (2, days[4]) in session.info["calendar_cache_pending"]
+    assert (1, days[0]) not in session.info["calendar_cache_pending"]
+
+
+async def test_materialize_without_slots_does_nothing():
+    session, statements = _session([], [])
+
+    result = await TimeslotPlanner(session).materialize([])
+
+    assert result.created_count == 0
+    assert statements == []
+    session.commit.assert_not_awaited()
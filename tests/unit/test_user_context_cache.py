@@ -0,0 +1,85 @@
+"""Unit-тесты кэша контекста пользователя и мемоизации в AuthMiddleware."""
+
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from apps.web.middleware.auth_middleware import AuthMiddleware
+from core.cache import user_context_cache as ucc
+
+
+def _request(token: str = "token-1") -> SimpleNamespace:
+    return SimpleNamespace(cookies={"access_token": token}, state=SimpleNamespace())
+
+
+def _middleware(user: dict) -> AuthMiddleware:
+    middleware = AuthMiddleware()
+    middleware.auth_service = MagicMock()
+    middleware.auth_service.verify_token = AsyncMock(
+        return_value={"id": user["id"], "telegram_id": 100, "role": user["role"]}
+    )
+    middleware._load_user = AsyncMock(side_effect=lambda payload: dict(user))
+    return middleware
+
+
+@pytest.mark.asyncio
+async def test_user_resolved_once_per_request():
+    """Повторные вызовы в рамках запроса не обращаются к БД и кэшу."""
+    middleware = _middleware({"id": 7, "role": "owner"})
+    request = _request()
+
+    with patch.object(ucc.cache, "is_connected", False):
+        first = await middleware.get_current_user(request)
+        second = await middleware.get_current_user(request)
+
+    assert first == {"id": 7, "role": "owner"}
+    assert second is first
+    assert middleware._load_user.await_count == 1
+    assert middleware.auth_service.verify_token.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_shared_cache_hit_skips_database():
+    """Между запросами контекст берется из общего кэша."""
+    middleware = _middleware({"id": 7, "role": "owner"})
+
+    with patch.object(ucc.user_context_cache, "get", AsyncMock(return_value={"id": 7, "role": "owner"})):
+        user = await middleware.get_current_user(_request())
+
+    assert user["role"] == "owner"
+    middleware._load_user.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_loaded_user_is_cached_with_snapshot_versions():
+    middleware = _middleware({"id": 7, "role": "owner"})
+    versions = {ucc.user_tag(7): 3, ucc.ALL_CONTEXTS_TAG: 1}
+
+    with patch.object(ucc.user_context_cache, "get", AsyncMock(return_value=None)), \
+         patch.object(ucc.user_context_cache, "snapshot_versions", AsyncMock(return_value=versions)), \
+         patch.object(ucc.user_context_cache, "set", AsyncMock()) as cache_set:
+        await middleware.get_current_user(_request("abc"))
+
+    cache_set.assert_awaited_once_with("abc", {"id": 7, "role": "owner"}, versions)
+
+
+def test_orm_changes_invalidate_user_tags():
+    """Изменение пользователя или профиля владельца сбрасывает тег пользователя."""
+    user = SimpleNamespace(__tablename__="users", id=7)
+    profile = SimpleNamespace(__tablename__="owner_profiles", user_id=8)
+    other = SimpleNamespace(__tablename__="objects", id=1)
+    session = SimpleNamespace(new=[profile], dirty=[user, other], deleted=[], info={})
+
+    ucc.invalidation.after_flush(session, None)
+
+    with patch.object(ucc, "schedule_tag_invalidation") as schedule:
+        ucc.invalidation.after_commit(session)
+
+    schedule.assert_called_once_with([ucc.user_tag(7), ucc.user_tag(8)])
+    assert ucc.invalidation.pending_key not in session.info
+
+
+def test_token_version_distinguishes_tokens():
+    assert ucc.context_key("a") != ucc.context_key("b")
+    assert ucc.context_key("a") == ucc.context_key("a")